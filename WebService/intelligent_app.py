@@ -31,7 +31,83 @@ import json
 from datetime import datetime
 import time
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bulk_operations import AssetBulkWriter, register_bulk_routes
+from device_rule_engine import asset_record, classify_asset_data, get_rule_engine
+from field_projection import (FieldSet, ProjectionError, projected_response, projection_error_response,
+                              requested_format, requested_projection)
+from metrics_registry import install_flask_metrics
+from response_cache import install_response_cache
+from wsgi_serving import run_app
+
 app = Flask(__name__)
+install_flask_metrics(app, service='intelligent_app')
+
+# Heavy JSON text columns: parsed only when requested (?fields= / ?expand=) or when no projection is asked for
+DEVICE_JSON_FIELDS = ('graphics_cards', 'network_adapters', 'installed_software', 'user_profiles')
+
+# get_comprehensive_assets() fields; "summary" is the dashboard table
+COMPREHENSIVE_ASSET_FIELDS = FieldSet({
+    'id': 'id',
+    'hostname': 'hostname',
+    'computer_name': 'computer_name',
+    'ip_address': 'ip_address',
+    'device_status': """CASE 
+            WHEN device_status = 'Online' OR ping_response_ms > 0 THEN 'online'
+            WHEN device_status = 'Offline' OR (device_status = '' AND ping_response_ms IS NULL) THEN 'offline'
+            WHEN device_status = '' THEN 'unknown'
+            ELSE LOWER(COALESCE(device_status, 'unknown'))
+        END""",
+    'device_type': "COALESCE(device_type, 'Unknown')",
+    # Hardware info
+    'processor_name': 'processor_name',
+    'processor_cores': 'processor_cores',
+    'processor_logical_cores': 'processor_logical_cores',
+    'total_physical_memory_gb': 'total_physical_memory_gb',
+    'available_memory_gb': 'available_memory_gb',
+    'connected_monitors': 'connected_monitors',
+    'storage_summary': 'storage_summary',
+    'total_storage_gb': 'total_storage_gb',
+    # System info
+    'operating_system': 'operating_system',
+    'os_version': 'os_version',
+    'os_build': 'os_build',
+    'system_manufacturer': 'system_manufacturer',
+    'system_model': 'system_model',
+    'bios_version': 'bios_version',
+    # Network info
+    'mac_address': 'mac_address',
+    'primary_ip': 'ip_address',
+    # Software and user info
+    'antivirus_software': 'antivirus_software',
+    'firewall_status': 'firewall_status',
+    'current_user': 'current_user',
+    'last_logged_users': 'last_logged_users',
+    # Management info
+    'assigned_department': "COALESCE(assigned_department, 'Unassigned')",
+    'collection_method': 'collection_method',
+    'data_completeness_score': 'data_completeness_score',
+    'hostname_mismatch_status': 'hostname_mismatch_status',
+    # Performance info
+    'cpu_usage_percent': 'cpu_usage_percent',
+    'memory_usage_percent': 'memory_usage_percent',
+    'uptime_hours': 'COALESCE(system_uptime_hours, 0)',
+    # Timestamps
+    'last_seen': 'last_seen',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+    # Additional fields for manual entry
+    'location': 'location',
+    'site': 'site',
+    'cost_center': 'cost_center',
+    'purchase_date': 'purchase_date',
+    'warranty_expiry': 'warranty_expiry',
+    'department': 'department',  # legacy field
+    'serial_number': 'serial_number',
+    'asset_tag': 'asset_tag',
+}, expandable={name: name for name in DEVICE_JSON_FIELDS},
+    presets={'summary': ['id', 'hostname', 'ip_address', 'device_status', 'device_type', 'operating_system',
+                         'assigned_department', 'last_seen']})
 
 class IntelligentAssetManager:
     def __init__(self, db_path=None, port=5000):
@@ -117,7 +193,8 @@ class IntelligentAssetManager:
                 )
             """)
             
-            # Add department column to assets_enhanced if not exists
+            # Add department column to assets_enhanced if not exists (db.migrations
+            # version 7 adds it too; this covers databases that were never migrated)
             try:
                 cursor.execute("ALTER TABLE assets_enhanced ADD COLUMN assigned_department TEXT")
             except sqlite3.OperationalError:
@@ -510,8 +587,14 @@ class IntelligentAssetManager:
         
         return stats
     
-    def get_comprehensive_assets(self, page=1, per_page=50, search_term='', filters={}):
-        """Get comprehensive assets data with advanced filtering"""
+    def get_comprehensive_assets(self, page=1, per_page=50, search_term='', filters={}, fields=None, expand=None):
+        """Get comprehensive assets data with advanced filtering.
+
+        fields / expand (comma lists, see field_projection) narrow the columns of the
+        enhanced table; unknown names raise ProjectionError. The basic-table fallback
+        has its own short column list.
+        """
+        projection = COMPREHENSIVE_ASSET_FIELDS.resolve(fields, expand)
         conn = self.get_db_connection()
         cursor = conn.cursor()
         
@@ -521,15 +604,16 @@ class IntelligentAssetManager:
             enhanced_count = cursor.fetchone()[0]
             
             if enhanced_count > 0:
-                return self._get_enhanced_assets(conn, cursor, page, per_page, search_term, filters)
+                return self._get_enhanced_assets(conn, cursor, page, per_page, search_term, filters, projection)
         except:
             pass
         
         # Fallback to original table
         return self._get_basic_assets(conn, cursor, page, per_page, search_term, filters)
     
-    def _get_enhanced_assets(self, conn, cursor, page=1, per_page=50, search_term='', filters={}):
+    def _get_enhanced_assets(self, conn, cursor, page=1, per_page=50, search_term='', filters={}, projection=None):
         """Get enhanced assets with comprehensive filtering"""
+        projection = projection or COMPREHENSIVE_ASSET_FIELDS.resolve()
         
         # Build dynamic where conditions
         where_conditions = []
@@ -581,55 +665,10 @@ class IntelligentAssetManager:
         cursor.execute(f"SELECT COUNT(*) as total FROM assets_enhanced {where_clause}", params)
         total_count = cursor.fetchone()['total']
         
-        # Get paginated data with ALL columns
+        # Get paginated data with the requested columns (all of them by default)
         offset = (page - 1) * per_page
         query = f"""
-            SELECT 
-                id, hostname, computer_name, ip_address,
-                CASE 
-                    WHEN device_status = 'Online' OR ping_response_ms > 0 THEN 'online'
-                    WHEN device_status = 'Offline' OR (device_status = '' AND ping_response_ms IS NULL) THEN 'offline'
-                    WHEN device_status = '' THEN 'unknown'
-                    ELSE LOWER(COALESCE(device_status, 'unknown'))
-                END as device_status,
-                COALESCE(device_type, 'Unknown') as device_type,
-                
-                -- Hardware info
-                processor_name, processor_cores, processor_logical_cores,
-                total_physical_memory_gb, available_memory_gb,
-                graphics_cards, connected_monitors,
-                storage_summary, total_storage_gb,
-                
-                -- System info  
-                operating_system, os_version, os_build,
-                system_manufacturer, system_model, bios_version,
-                
-                -- Network info
-                mac_address, network_adapters, ip_address as primary_ip,
-                
-                -- Software info
-                installed_software, antivirus_software, firewall_status,
-                
-                -- User info
-                current_user, user_profiles, last_logged_users,
-                
-                -- Management info
-                COALESCE(assigned_department, 'Unassigned') as assigned_department,
-                collection_method, data_completeness_score,
-                hostname_mismatch_status,
-                
-                -- Performance info
-                cpu_usage_percent, memory_usage_percent,
-                COALESCE(system_uptime_hours, 0) as uptime_hours,
-                
-                -- Timestamps
-                last_seen, created_at, updated_at,
-                
-                -- Additional fields for manual entry
-                location, site, cost_center, purchase_date, warranty_expiry,
-                department, -- legacy field
-                serial_number, asset_tag
-                
+            SELECT {projection.select_sql}
             FROM assets_enhanced 
             {where_clause}
             ORDER BY 
@@ -638,36 +677,25 @@ class IntelligentAssetManager:
                     WHEN device_status = 'Offline' OR (device_status = '' AND ping_response_ms IS NULL) THEN 2
                     ELSE 3
                 END,
-                assigned_department, device_type, hostname
+                COALESCE(assets_enhanced.assigned_department, 'Unassigned'),
+                COALESCE(assets_enhanced.device_type, 'Unknown'), hostname
             LIMIT ? OFFSET ?
         """
         
         cursor.execute(query, params + [per_page, offset])
-        assets = []
+        # JSON fields are parsed only when part of the projection
+        assets = projection.records(projection.decode(cursor.fetchall()))
         
-        for row in cursor.fetchall():
-            asset = dict(row)
-            
-            # Parse JSON fields
-            json_fields = ['graphics_cards', 'network_adapters', 'installed_software', 'user_profiles']
-            for field in json_fields:
-                if asset.get(field):
-                    try:
-                        asset[field] = json.loads(asset[field])
-                    except (json.JSONDecodeError, TypeError):
-                        pass
-            
+        for asset in assets:
             # Format display values
-            if asset['total_physical_memory_gb']:
+            if asset.get('total_physical_memory_gb'):
                 asset['memory_formatted'] = f"{asset['total_physical_memory_gb']:.1f} GB"
             
-            if asset['uptime_hours']:
+            if asset.get('uptime_hours'):
                 hours = int(asset['uptime_hours'])
                 days = hours // 24
                 remaining_hours = hours % 24
                 asset['uptime_formatted'] = f"{days}d {remaining_hours}h" if days > 0 else f"{remaining_hours}h"
-            
-            assets.append(asset)
         
         conn.close()
         
@@ -903,20 +931,27 @@ class IntelligentAssetManager:
             """)
             
             incomplete_assets = cursor.fetchall()
-            classified_count = 0
             
-            for asset in incomplete_assets:
-                asset_id, hostname, os, processor, memory, ip = asset
-                new_device_type = self.classify_device_type(os, processor, memory, ip)
-                
-                if new_device_type != 'Asset Incomplete':
-                    cursor.execute("""
-                        UPDATE assets_enhanced 
-                        SET device_type = ?, updated_at = CURRENT_TIMESTAMP 
-                        WHERE id = ?
-                    """, (new_device_type, asset_id))
-                    classified_count += 1
-                    print(f"[CLASSIFICATION] Asset {hostname} ({ip}) reclassified from 'Asset Incomplete' to '{new_device_type}'")
+            # One pass over all rows: identical OS/CPU/RAM/IP signatures are classified once
+            new_types = ['Classification Pending'] * len(incomplete_assets)
+            records, positions = [], []
+            for position, (asset_id, hostname, operating_system, processor, memory, ip) in enumerate(incomplete_assets):
+                try:
+                    records.append(asset_record(operating_system, processor, memory, ip))
+                    positions.append(position)
+                except (TypeError, ValueError):
+                    pass  # unreadable memory value
+            for position, result in zip(positions, get_rule_engine().classify_many('asset_data', records)):
+                new_types[position] = result.label
+            
+            updates = [(new_device_type, asset[0]) for asset, new_device_type in zip(incomplete_assets, new_types)
+                       if new_device_type != 'Asset Incomplete']
+            cursor.executemany("""
+                UPDATE assets_enhanced 
+                SET device_type = ?, updated_at = CURRENT_TIMESTAMP 
+                WHERE id = ?
+            """, updates)
+            classified_count = len(updates)
             
             conn.commit()
             conn.close()
@@ -933,64 +968,9 @@ class IntelligentAssetManager:
     def classify_device_type(self, operating_system, processor, memory_gb, ip_address):
         """Intelligently classify device type based on available data"""
         try:
-            os = str(operating_system or '').lower()
-            proc = str(processor or '').lower()
-            mem = float(memory_gb or 0)
-            
-            # Server classification
-            if 'server' in os or 'datacenter' in os:
-                if 'windows' in os:
-                    return 'Windows Server'
-                elif any(x in os for x in ['linux', 'ubuntu', 'centos', 'redhat', 'debian']):
-                    return 'Linux Server'
-                else:
-                    return 'Server'
-            
-            # Workstation classification
-            if 'windows' in os:
-                if mem >= 16:  # High memory suggests workstation
-                    return 'Windows Workstation'
-                elif mem >= 4:
-                    return 'Desktop'
-                else:
-                    return 'Workstation'
-            
-            # Linux classification
-            if any(x in os for x in ['linux', 'ubuntu', 'mint', 'fedora', 'opensuse']):
-                return 'Linux Workstation'
-            
-            # Mac classification
-            if any(x in os for x in ['mac', 'darwin', 'osx']):
-                return 'Mac Workstation'
-            
-            # Mobile devices
-            if any(x in os for x in ['android', 'ios']):
-                return 'Mobile Device'
-            
-            # Based on memory if OS detection fails
-            if mem >= 32:
-                return 'High-End Workstation'
-            elif mem >= 16:
-                return 'Workstation'
-            elif mem >= 4:
-                return 'Desktop'
-            elif mem > 0:
-                return 'Lightweight Device'
-            
-            # If we have processor info
-            if 'server' in proc or 'xeon' in proc:
-                return 'Server'
-            elif 'mobile' in proc or 'atom' in proc:
-                return 'Mobile Device'
-            
-            # Network device detection based on IP patterns
-            if ip_address:
-                # Common network device IP patterns
-                if any(x in str(ip_address) for x in ['.1.1', '.1.254', '.254.254']):
-                    return 'Network Device'
-            
-            # Default for devices with some data but unclear classification
-            return 'Classification Pending'
+            # Server / workstation / OS family, then memory, processor and IP patterns
+            # (device_rule_engine.RULESETS['asset_data'])
+            return classify_asset_data(operating_system, processor, memory_gb, ip_address)
             
         except Exception as e:
             print(f"[ERROR] Device classification error: {e}")
@@ -1005,6 +985,15 @@ except Exception as e:
     print("Web service will continue with basic functionality")
     asset_manager = None
 
+# JSON answers are reused until the database changes (PRAGMA data_version)
+response_cache = install_response_cache(
+    app, lambda: asset_manager.db_path if asset_manager is not None else "../assets.db", service='intelligent_app')
+
+# POST /api/assets/bulk edits assets_enhanced, the table update_asset() writes
+register_bulk_routes(app, lambda: AssetBulkWriter(
+    asset_manager.db_path if asset_manager is not None else "../assets.db", table='assets_enhanced',
+    status_column='device_status', department_column='assigned_department', assignments_table=None))
+
 # Flask Routes
 @app.route('/')
 def home():
@@ -1083,6 +1072,7 @@ def api_test():
     return jsonify({'message': 'API is working', 'status': 'OK'})
 
 @app.route('/api/stats')
+@response_cache.cached()
 def api_stats():
     """Intelligent stats API with asset classification insights"""
     try:
@@ -1219,7 +1209,61 @@ def api_stats():
             'error': str(e)
         })
 
+# /api/assets fields (?fields=, ?format=); the basic assets table fills the enhanced-only ones with NULL
+ENHANCED_ASSET_FIELDS = FieldSet({
+    'id': 'id',
+    'hostname': 'hostname',
+    'computer_name': 'computer_name',
+    'ip_address': 'ip_address',
+    'device_status': """CASE 
+            WHEN device_status = 'Online' OR ping_response_ms > 0 THEN 'online'
+            WHEN device_status = 'Offline' OR device_status = '' OR device_status IS NULL THEN 'offline'
+            ELSE 'unknown'
+        END""",
+    'device_type': """CASE 
+            WHEN (processor_name IS NULL OR processor_name = '') AND 
+                 (operating_system IS NULL OR operating_system = '') AND 
+                 (total_physical_memory_gb IS NULL OR total_physical_memory_gb = 0) 
+            THEN 'Asset Incomplete'
+            WHEN device_type IS NULL OR device_type = '' OR device_type = 'Unknown Device' 
+            THEN 'Classification Pending'
+            ELSE COALESCE(device_type, 'Unknown Device')
+        END""",
+    'processor_name': 'processor_name',
+    'total_physical_memory_gb': 'total_physical_memory_gb',
+    'operating_system': 'operating_system',
+    'assigned_department': "COALESCE(assigned_department, 'Unassigned')",
+    'data_completeness_score': 'data_completeness_score',
+    'last_seen': 'last_seen',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+})
+
+BASIC_ASSET_FIELDS = FieldSet({
+    'id': 'id',
+    'hostname': 'hostname',
+    'computer_name': 'NULL',
+    'ip_address': 'ip_address',
+    'device_status': "'unknown'",
+    'device_type': """CASE 
+            WHEN device_type IS NULL OR device_type = '' 
+            THEN 'Asset Incomplete'
+            ELSE device_type
+        END""",
+    'assigned_department': "COALESCE(department, 'Unassigned')",
+    'processor_name': 'NULL',
+    'total_physical_memory_gb': 'NULL',
+    'operating_system': 'NULL',
+    'data_completeness_score': 'NULL',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+    'last_seen': 'last_ping',
+}, default=['id', 'hostname', 'ip_address', 'device_status', 'device_type', 'assigned_department', 'processor_name',
+            'total_physical_memory_gb', 'operating_system', 'data_completeness_score', 'created_at', 'updated_at',
+            'last_seen'])
+
 @app.route('/api/assets')
+@response_cache.cached()
 def api_assets():
     """Intelligent assets API with proper classification"""
     try:
@@ -1233,6 +1277,14 @@ def api_assets():
         device_type_filter = request.args.get('device_type', '')
         department_filter = request.args.get('department', '')
         
+        # Requested columns and encoding
+        try:
+            projection = requested_projection(ENHANCED_ASSET_FIELDS)
+            basic_projection = requested_projection(BASIC_ASSET_FIELDS)
+            fmt = requested_format()
+        except ProjectionError as e:
+            return projection_error_response(e)
+        
         # Direct database access with intelligent classification
         import sqlite3
         db_path = "../assets.db"
@@ -1284,26 +1336,7 @@ def api_assets():
                 
                 # Get assets with intelligent classification
                 query = f"""
-                    SELECT 
-                        id, hostname, computer_name, ip_address,
-                        CASE 
-                            WHEN device_status = 'Online' OR ping_response_ms > 0 THEN 'online'
-                            WHEN device_status = 'Offline' OR device_status = '' OR device_status IS NULL THEN 'offline'
-                            ELSE 'unknown'
-                        END as device_status,
-                        CASE 
-                            WHEN (processor_name IS NULL OR processor_name = '') AND 
-                                 (operating_system IS NULL OR operating_system = '') AND 
-                                 (total_physical_memory_gb IS NULL OR total_physical_memory_gb = 0) 
-                            THEN 'Asset Incomplete'
-                            WHEN device_type IS NULL OR device_type = '' OR device_type = 'Unknown Device' 
-                            THEN 'Classification Pending'
-                            ELSE COALESCE(device_type, 'Unknown Device')
-                        END as device_type,
-                        processor_name, total_physical_memory_gb, operating_system,
-                        COALESCE(assigned_department, 'Unassigned') as assigned_department,
-                        data_completeness_score,
-                        last_seen, created_at, updated_at
+                    SELECT {projection.select_sql}
                     FROM assets_enhanced 
                     {where_clause}
                     ORDER BY 
@@ -1316,7 +1349,7 @@ def api_assets():
                 """
                 
                 cursor.execute(query, params + [per_page, offset])
-                assets = [dict(row) for row in cursor.fetchall()]
+                assets = projection.decode(cursor.fetchall())
                 total = total_count
             else:
                 raise Exception("Enhanced table empty for this filter")
@@ -1328,26 +1361,14 @@ def api_assets():
             
             offset = (page - 1) * per_page
             cursor.execute(f"""
-                SELECT 
-                    id, hostname, ip_address,
-                    'unknown' as device_status,
-                    CASE 
-                        WHEN device_type IS NULL OR device_type = '' 
-                        THEN 'Asset Incomplete'
-                        ELSE device_type
-                    END as device_type,
-                    COALESCE(department, 'Unassigned') as assigned_department,
-                    NULL as processor_name,
-                    NULL as total_physical_memory_gb,
-                    NULL as operating_system,
-                    NULL as data_completeness_score,
-                    created_at, updated_at, last_ping as last_seen
+                SELECT {basic_projection.select_sql}
                 FROM assets 
                 {basic_where}
-                ORDER BY hostname
+                ORDER BY assets.hostname
                 LIMIT ? OFFSET ?
             """, params + [per_page, offset])
-            assets = [dict(row) for row in cursor.fetchall()]
+            projection = basic_projection
+            assets = projection.decode(cursor.fetchall())
             total = total_count
         
         conn.close()
@@ -1355,15 +1376,14 @@ def api_assets():
         # Calculate total pages
         total_pages = (total + per_page - 1) // per_page
         
-        return jsonify({
-            'assets': assets,
+        return projected_response(projection, assets, {
             'total': total,
             'pages': total_pages,
             'current_page': page,
             'per_page': per_page,
             'status': 'OK',
             'classification_enabled': True
-        })
+        }, records_key='assets', fmt=fmt)
         
     except Exception as e:
         return jsonify({
@@ -1375,6 +1395,7 @@ def api_assets():
         })
 
 @app.route('/api/departments')
+@response_cache.cached()
 def api_departments():
     """Get all departments"""
     try:
@@ -1467,6 +1488,7 @@ def api_update_asset(asset_id):
     return jsonify(result)
 
 @app.route('/api/device-types')
+@response_cache.cached()
 def api_device_types():
     """Get available device types"""
     device_types = [
@@ -1485,9 +1507,15 @@ def api_device_details(device_id):
     cursor = conn.cursor()
     
     try:
-        # Get all available columns for the device
-        cursor.execute("""
-            SELECT * FROM assets_enhanced 
+        # Every column unless ?fields= narrows it; JSON fields only when requested
+        try:
+            projection = requested_projection(
+                FieldSet.from_table(conn, 'assets_enhanced', expandable=DEVICE_JSON_FIELDS))
+        except ProjectionError as e:
+            return projection_error_response(e)
+        
+        cursor.execute(f"""
+            SELECT {projection.select_sql} FROM assets_enhanced 
             WHERE id = ?
         """, (device_id,))
         
@@ -1495,16 +1523,7 @@ def api_device_details(device_id):
         if not result:
             return jsonify({'error': 'Device not found'}), 404
         
-        device = dict(result)
-        
-        # Parse JSON fields safely
-        json_fields = ['graphics_cards', 'network_adapters', 'installed_software', 'user_profiles']
-        for field in json_fields:
-            if device.get(field):
-                try:
-                    device[field] = json.loads(device[field])
-                except (json.JSONDecodeError, TypeError):
-                    pass
+        device = projection.records(projection.decode([result]))[0]
         
         # Format uptime if available
         if device.get('system_uptime_hours'):
@@ -1652,7 +1671,8 @@ def run_intelligent_service():
     app = create_intelligent_service()
     
     try:
-        app.run(host=host, port=port, debug=False, threaded=True)
+        # Development server unless WEB_SERVICE_MODE=production
+        run_app(app, host=host, port=port, spec='wsgi:create_app("intelligent")')
     except KeyboardInterrupt:
         print("\n[STOPPED] Intelligent Asset Management System stopped")
     except Exception as e:
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+📶 ADAPTIVE NETWORK CONTROLLER
+=============================
+Shared timeout and concurrency control for discovery and collection, in
+place of hardcoded 50 ms / 0.3 s / 0.5 s / 5 s timeouts and fixed worker
+counts:
+
+- per-/24 RTT estimates (SRTT + RTTVAR, RFC 6298 style) → probe timeouts
+  that are tight on a fast LAN and long enough on a slow VPN subnet
+- AIMD concurrency: the in-flight limit grows by one per clean window and
+  is cut multiplicatively when probes get dropped or RTTs inflate
+  (queueing), like TCP congestion control
+
+Timeouts on dead addresses are normal during discovery, so (as in nmap)
+only a timeout from a host that has answered before counts as a drop; a
+first-contact timeout is a clean window sample, so a sparse or dead subnet
+still opens the window instead of pinning it at the initial limit.
+Discovery timeouts on a subnet with no replies yet are capped separately
+(discovery_timeout_for) so dead ranges cost a short wait per address.
+"""
+
+import errno
+import ipaddress
+import socket
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+from metrics_registry import observe_probe
+
+OPEN, REFUSED, TIMEOUT = 'open', 'refused', 'timeout'
+
+
+def subnet_key(ip: str, prefix: int = 24) -> str:
+    try:
+        return str(ipaddress.ip_network(f"{ip}/{prefix}", strict=False))
+    except ValueError:
+        return ip
+
+
+class RttEstimator:
+    """SRTT/RTTVAR with the RFC 6298 gains; rto = srtt + k * rttvar"""
+
+    def __init__(self, initial_rto: float, min_rto: float, max_rto: float,
+                 alpha: float = 0.125, beta: float = 0.25, k: float = 4.0):
+        self.min_rto, self.max_rto = min_rto, max_rto
+        self.alpha, self.beta, self.k = alpha, beta, k
+        self.srtt: Optional[float] = None
+        self.rttvar = 0.0
+        self.rto = initial_rto
+        self.samples = 0
+        self.timeouts = 0
+
+    def observe(self, rtt: float) -> None:
+        if self.srtt is None:
+            self.srtt, self.rttvar = rtt, rtt / 2
+        else:
+            self.rttvar = (1 - self.beta) * self.rttvar + self.beta * abs(self.srtt - rtt)
+            self.srtt = (1 - self.alpha) * self.srtt + self.alpha * rtt
+        self.samples += 1
+        self.rto = min(self.max_rto, max(self.min_rto, self.srtt + self.k * self.rttvar))
+
+    def on_timeout(self, unsampled_max: float) -> None:
+        """Back off only while nothing on the subnet has answered yet (it may just be slow)"""
+        self.timeouts += 1
+        if self.samples == 0:
+            self.rto = min(unsampled_max, self.max_rto, self.rto * 2)
+
+
+class AimdLimiter:
+    """Dynamic in-flight limit: +increase per clean window, ×decrease on congestion"""
+
+    def __init__(self, initial: int = 16, minimum: int = 1, maximum: int = 256,
+                 increase: float = 1.0, decrease: float = 0.5, window: int = 20,
+                 loss_threshold: float = 0.1, rtt_inflation: float = 2.5):
+        self.limit = float(initial)
+        self.minimum, self.maximum = minimum, maximum
+        self.increase, self.decrease = increase, decrease
+        self.window = window
+        self.loss_threshold = loss_threshold
+        self.rtt_inflation = rtt_inflation
+        self.in_flight = 0
+        self.last_loss: Optional[float] = None
+        self.best_rtt: Optional[float] = None
+        self.history: List[int] = [initial]
+        self.cuts = 0
+        self._outcomes: List[bool] = []
+        self._rtts: List[float] = []
+        self._cond = threading.Condition()
+
+    def acquire(self, cancel: Optional[threading.Event] = None) -> bool:
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                if cancel is not None and cancel.is_set():
+                    return False
+                self._cond.wait(0.1)
+            self.in_flight += 1
+            return True
+
+    def release(self) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
+
+    def on_result(self, lost: bool, rtt: Optional[float] = None) -> None:
+        """One congestion signal: a drop, or an answer with its RTT"""
+        with self._cond:
+            self._outcomes.append(lost)
+            if rtt is not None:
+                self._rtts.append(rtt)
+            if len(self._outcomes) >= max(self.window, int(self.limit)):
+                self._end_window()
+                self._cond.notify_all()
+
+    def _end_window(self) -> None:
+        loss = sum(self._outcomes) / len(self._outcomes)
+        rtts = sorted(self._rtts)
+        median_rtt = rtts[len(rtts) // 2] if rtts else None
+        self._outcomes, self._rtts = [], []
+
+        self.last_loss = loss
+        congested = loss > self.loss_threshold
+        if median_rtt is not None and self.best_rtt is not None and median_rtt > self.best_rtt * self.rtt_inflation:
+            congested = True
+
+        if congested:
+            self.limit = max(self.minimum, self.limit * self.decrease)
+            self.cuts += 1
+        else:
+            self.limit = min(self.maximum, self.limit + self.increase)
+            # The RTT baseline only learns from uncongested windows
+            if median_rtt is not None:
+                self.best_rtt = median_rtt if self.best_rtt is None else min(self.best_rtt, median_rtt)
+        self.history.append(int(self.limit))
+
+
+class AdaptiveNetworkController:
+    """📶 Per-subnet adaptive timeouts + shared AIMD concurrency limit"""
+
+    def __init__(self, initial_timeout: float = 0.5, min_timeout: float = 0.05, max_timeout: float = 5.0,
+                 unsampled_max_timeout: float = 2.0, discovery_max_timeout: float = 0.5, subnet_prefix: int = 24,
+                 initial_concurrency: int = 16, min_concurrency: int = 1, max_concurrency: int = 256,
+                 window: int = 20, loss_threshold: float = 0.1, rtt_inflation: float = 2.5,
+                 max_tracked_hosts: int = 65536):
+        self.initial_timeout = initial_timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.unsampled_max_timeout = unsampled_max_timeout
+        self.discovery_max_timeout = discovery_max_timeout
+        self.subnet_prefix = subnet_prefix
+        self.limiter = AimdLimiter(initial_concurrency, min_concurrency, max_concurrency,
+                                   window=window, loss_threshold=loss_threshold, rtt_inflation=rtt_inflation)
+        self._global = RttEstimator(initial_timeout, min_timeout, max_timeout)
+        self._subnets: Dict[str, RttEstimator] = {}
+        self._responders: 'OrderedDict[str, float]' = OrderedDict()  # hosts that answered before
+        self.max_tracked_hosts = max_tracked_hosts
+        self._lock = threading.Lock()
+
+    # ----------------- Timeouts -----------------
+
+    def _estimator(self, ip: str) -> RttEstimator:
+        key = subnet_key(ip, self.subnet_prefix)
+        estimator = self._subnets.get(key)
+        if estimator is None:
+            # New subnets start from what the rest of the network looks like
+            estimator = RttEstimator(self._global.rto, self.min_timeout, self.max_timeout)
+            self._subnets[key] = estimator
+        return estimator
+
+    def timeout_for(self, ip: str) -> float:
+        """Connect/probe timeout for one round trip to ip"""
+        with self._lock:
+            return self._estimator(ip).rto
+
+    def discovery_timeout_for(self, ip: str) -> float:
+        """Ping-sweep timeout: until the subnet has answered, never above discovery_max_timeout"""
+        with self._lock:
+            estimator = self._estimator(ip)
+            if estimator.samples == 0:
+                return min(estimator.rto, self.discovery_max_timeout)
+            return estimator.rto
+
+    def operation_timeout(self, ip: str, base: float, round_trips: int = 20) -> float:
+        """Budget for a multi-round-trip operation (WMI/SSH session): never below base"""
+        with self._lock:
+            estimator = self._estimator(ip)
+            expected = (estimator.srtt or estimator.rto) * round_trips
+            return min(base * 6, max(base, expected + estimator.rto))
+
+    def record(self, ip: str, outcome: str, rtt: Optional[float] = None) -> None:
+        """Feed one probe result (open / refused answer with its RTT, or timeout)"""
+        with self._lock:
+            estimator = self._estimator(ip)
+            if outcome == TIMEOUT:
+                estimator.on_timeout(self.unsampled_max_timeout)
+                known_responder = ip in self._responders
+            else:
+                if rtt is not None:
+                    estimator.observe(rtt)
+                    self._global.observe(rtt)
+                self._responders[ip] = time.time()
+                self._responders.move_to_end(ip)
+                if len(self._responders) > self.max_tracked_hosts:
+                    self._responders.popitem(last=False)
+        if outcome != TIMEOUT:
+            self.limiter.on_result(False, rtt)
+        else:
+            # A host that answered before went silent: a drop. A first-contact
+            # timeout is most likely an unused address, so it fills the window clean
+            self.limiter.on_result(known_responder)
+
+    # ----------------- Concurrency -----------------
+
+    @property
+    def concurrency(self) -> int:
+        return int(self.limiter.limit)
+
+    @contextmanager
+    def slot(self, cancel: Optional[threading.Event] = None):
+        """Hold one of the AIMD-limited in-flight slots"""
+        acquired = self.limiter.acquire(cancel)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                self.limiter.release()
+
+    def probe(self, ip: str, attempt: Callable[[float], str], cancel: Optional[threading.Event] = None,
+              protocol: str = 'tcp') -> str:
+        """Run attempt(timeout) → open/refused/timeout inside a slot and learn from it"""
+        with self.slot(cancel) as acquired:
+            if not acquired:
+                return TIMEOUT
+            timeout = self.timeout_for(ip)
+            started = time.perf_counter()
+            try:
+                outcome = attempt(timeout)
+            except (socket.timeout, TimeoutError):
+                outcome = TIMEOUT
+            elapsed = time.perf_counter() - started
+        self.record(ip, outcome, elapsed if outcome != TIMEOUT else None)
+        observe_probe(protocol, outcome, elapsed)
+        return outcome
+
+    def tcp_probe(self, ip: str, port: int, cancel: Optional[threading.Event] = None) -> bool:
+        """Adaptive TCP connect check; a RST still counts as an RTT sample"""
+        def attempt(timeout: float) -> str:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.settimeout(timeout)
+            try:
+                code = sock.connect_ex((ip, port))
+            finally:
+                sock.close()
+            if code == 0:
+                return OPEN
+            if code in (errno.ECONNREFUSED, getattr(errno, 'WSAECONNREFUSED', -1)):
+                return REFUSED
+            return TIMEOUT
+        return self.probe(ip, attempt, cancel) == OPEN
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            subnets = {key: {'srtt_ms': round(e.srtt * 1000, 1) if e.srtt is not None else None,
+                             'timeout_ms': round(e.rto * 1000, 1), 'samples': e.samples, 'timeouts': e.timeouts}
+                       for key, e in self._subnets.items()}
+        return {'concurrency': self.concurrency, 'in_flight': self.limiter.in_flight,
+                'cuts': self.limiter.cuts, 'last_loss': self.limiter.last_loss, 'subnets': subnets}
+
+
+_default_controller: Optional[AdaptiveNetworkController] = None
+_default_controller_lock = threading.Lock()
+
+
+def get_network_controller() -> AdaptiveNetworkController:
+    """Process-wide controller shared by the collectors and ping validators"""
+    global _default_controller
+    with _default_controller_lock:
+        if _default_controller is None:
+            _default_controller = AdaptiveNetworkController()
+        return _default_controller
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+
+    controller = get_network_controller()
+    for target in sys.argv[1:] or ['127.0.0.1']:
+        for probe_port in (22, 80, 135, 443, 445):
+            controller.tcp_probe(target, probe_port)
+    print("📶 Adaptive network controller")
+    print(json.dumps(controller.snapshot(), indent=2))
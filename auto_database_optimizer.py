@@ -5,6 +5,8 @@ Auto Database Optimizer - Fixes 198.3s save performance
 
 import sqlite3
 
+from duplicate_consolidation import consolidate_duplicates
+
 def auto_optimize():
     """Automatically optimize database for better performance"""
     conn = sqlite3.connect('assets.db')
@@ -22,18 +24,12 @@ def auto_optimize():
     # 1. Remove duplicates automatically
     print("\n🧹 REMOVING DUPLICATES...")
     
-    # Find and remove duplicates, keeping most recent
-    cursor.execute("""
-        DELETE FROM assets 
-        WHERE id NOT IN (
-            SELECT MAX(id) 
-            FROM assets 
-            GROUP BY ip_address
-        )
-    """)
-    
-    removed = cursor.rowcount
-    print(f"   ✅ Removed {removed} duplicate records")
+    # Merge duplicates by UUID / serial / MAC into their best record
+    report = consolidate_duplicates(conn)
+    
+    removed = report['removed']
+    print(f"   ✅ Removed {removed} duplicate records "
+          f"({report['groups']} groups, {report['fields_filled']} fields merged)")
     
     # 2. Create performance indexes
     print("\n⚡ CREATING PERFORMANCE INDEXES...")
@@ -15,9 +15,10 @@ Author: Enhanced by GitHub Copilot for Asset Management System
 import os
 import json
 import sqlite3
+import uuid
 from datetime import datetime
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Any
+from dataclasses import dataclass, field
 from enum import Enum
 
 try:
@@ -34,6 +35,19 @@ except ImportError:
     PYQT6_AVAILABLE = False
     print("⚠️ PyQt6 not available for automatic scanner")
 
+try:
+    from scan_scheduler_service import (ScanSchedulerService, ScheduleSpec, ScanRun,
+                                        set_scheduler_service)
+    SCHEDULER_SERVICE_AVAILABLE = True
+except ImportError:
+    SCHEDULER_SERVICE_AVAILABLE = False
+
+try:
+    from rescan_planner import get_rescan_planner
+    RESCAN_PLANNER_AVAILABLE = True
+except ImportError:
+    RESCAN_PLANNER_AVAILABLE = False
+
 # Schedule types
 class ScheduleType(Enum):
     INTERVAL = "interval"  # Every X minutes/hours
@@ -52,6 +66,7 @@ class ScanSchedule:
     once_datetime: Optional[str] = None  # For once type
     enabled: bool = True
     name: str = "Unnamed Schedule"
+    key: str = field(default_factory=lambda: uuid.uuid4().hex[:12])  # stable scheduler id, survives edits/reorders
 
 @dataclass
 class AutoScanTarget:
@@ -62,6 +77,183 @@ class AutoScanTarget:
     last_scan: Optional[str] = None
     devices_found: int = 0
 
+@dataclass
+class AutoScanSettings:
+    """Credentials and options read from the main window on the GUI thread, used by scan workers"""
+    windows_credentials: List[tuple] = field(default_factory=list)
+    linux_credentials: List[tuple] = field(default_factory=list)
+    use_snmp: bool = True
+    use_nmap: bool = True
+    collector_available: bool = True
+
+    @classmethod
+    def from_main_window(cls, main_window) -> 'AutoScanSettings':
+        """Snapshot the manual-scan settings so automatic scans reuse the same authentication"""
+        def creds(rows):
+            return [(row.username(), row.password()) for row in rows if row.username() and row.password()]
+        try:
+            return cls(
+                windows_credentials=creds(getattr(main_window, 'win_rows', [])),
+                linux_credentials=creds(getattr(main_window, 'lin_rows', [])),
+                use_snmp=main_window.chk_snmp.isChecked() if hasattr(main_window, 'chk_snmp') else True,
+                use_nmap=main_window.chk_nmap.isChecked() if hasattr(main_window, 'chk_nmap') else True,
+                collector_available=hasattr(main_window, 'collection_worker'),
+            )
+        except Exception:
+            return cls(collector_available=False)
+
+def perform_target_scan(target: AutoScanTarget, settings: AutoScanSettings,
+                        log: Callable[[str], None]) -> Dict[str, Any]:
+    """
+    Scan one target with the ultra-fast collector (same collector and credentials as manual scans)
+
+    Plain function: safe on the scheduler's pool threads and inside AutoScanThread, no widgets touched.
+    """
+    scan_result = {
+        'success': False,
+        'devices': [],
+        'error': None,
+        'target': target.network_range
+    }
+    if not settings.collector_available:
+        scan_result['error'] = "Collection system not available"
+        return scan_result
+    try:
+        import ultra_fast_collector
+
+        # Only rescan the IPs that are due (volatile/stale first)
+        scan_targets = [target.network_range]
+        planner = get_rescan_planner() if RESCAN_PLANNER_AVAILABLE else None
+        if planner:
+            plan = planner.plan(scan_targets)
+            log(f"🎯 Rescan plan for {target.name}: {len(plan.targets)}/{plan.considered} IPs due "
+                f"({plan.skipped} backed off)")
+            if not plan.targets:
+                scan_result['success'] = True
+                return scan_result
+            scan_targets = plan.targets
+
+        results = ultra_fast_collector.collect_all_devices(
+            targets=scan_targets,
+            windows_credentials=settings.windows_credentials,
+            linux_credentials=settings.linux_credentials,
+            use_snmp=settings.use_snmp,
+            use_nmap=settings.use_nmap,
+            max_threads=20,  # Conservative for automatic scans
+            excel_file=None,  # Database-only
+            progress_callback=None,  # No UI updates needed
+            log_callback=lambda msg: log(f"📡 {msg}")
+        )
+
+        if planner and results and results.get('success'):
+            planner.record_results(scan_targets, results.get('devices', []))
+
+        if results and results.get('success'):
+            scan_result['success'] = True
+            scan_result['devices'] = results.get('devices', [])
+            log(f"✅ Found {len(scan_result['devices'])} devices in {target.name}")
+        else:
+            scan_result['error'] = (results or {}).get('error', 'Scan failed')
+
+    except ImportError:
+        scan_result['error'] = "Ultra-fast collector not available"
+    except Exception as e:
+        scan_result['error'] = f"Collection error: {e}"
+    return scan_result
+
+def save_results_to_database(target: AutoScanTarget, result: Dict[str, Any],
+                             log: Callable[[str], None], db_path: str = "assets.db"):
+    """Save scan results to database in real-time"""
+    try:
+        devices = result.get('devices', [])
+        if not devices:
+            return
+
+        with sqlite3.connect(db_path) as conn:
+            cursor = conn.cursor()
+
+            # Ensure assets table exists (same as manual collection)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS assets (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    ip_address TEXT,
+                    hostname TEXT,
+                    mac_address TEXT,
+                    os_type TEXT,
+                    os_version TEXT,
+                    cpu_info TEXT,
+                    ram_gb REAL,
+                    hard_drives TEXT,
+                    network_interfaces TEXT,
+                    installed_software TEXT,
+                    domain_info TEXT,
+                    scan_timestamp TEXT,
+                    collection_method TEXT,
+                    source_scan TEXT
+                )
+            ''')
+
+            # Insert devices with automatic scan marker
+            scan_timestamp = datetime.now().isoformat()
+
+            for device in devices:
+                cursor.execute('''
+                    INSERT INTO assets (
+                        ip_address, hostname, mac_address, os_type, os_version,
+                        cpu_info, ram_gb, hard_drives, network_interfaces,
+                        installed_software, domain_info, scan_timestamp,
+                        collection_method, source_scan
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    device.get('ip_address', ''),
+                    device.get('hostname', ''),
+                    device.get('mac_address', ''),
+                    device.get('os_type', ''),
+                    device.get('os_version', ''),
+                    device.get('cpu_info', ''),
+                    device.get('ram_gb', 0),
+                    device.get('hard_drives', ''),
+                    device.get('network_interfaces', ''),
+                    device.get('installed_software', ''),
+                    device.get('domain_info', ''),
+                    scan_timestamp,
+                    'automatic_scan',
+                    f"Auto: {target.name}"
+                ))
+
+            conn.commit()
+
+            log(f"💾 Saved {len(devices)} devices to database from {target.name}")
+
+    except Exception as e:
+        log(f"❌ Database save error for {target.name}: {e}")
+
+def scan_targets(targets: List[AutoScanTarget], settings: AutoScanSettings,
+                 scanner: 'AutomaticScanner') -> List[Dict[str, Any]]:
+    """Scan and save each enabled target, reporting through the scanner's (queued) signals"""
+    results = []
+    for target in targets:
+        if not target.enabled:
+            continue
+
+        scanner.scan_started.emit(target.name)
+        result = perform_target_scan(target, settings, scanner.log_message.emit)
+
+        if result.get('success'):
+            devices_found = len(result.get('devices', []))
+            target.devices_found = devices_found
+            target.last_scan = datetime.now().isoformat()
+
+            scanner.scan_completed.emit(target.name, devices_found, result)
+
+            # Save results to database in real-time
+            save_results_to_database(target, result, scanner.log_message.emit)
+
+        else:
+            scanner.scan_error.emit(target.name, result.get('error') or 'Unknown error')
+        results.append(result)
+    return results
+
 class AutomaticScanner(QObject):
     """
     🚀 AUTOMATIC SCANNING ENGINE 🚀
@@ -88,6 +280,9 @@ class AutomaticScanner(QObject):
         self.targets: List[AutoScanTarget] = []
         self.is_running = False
         self.scan_thread = None
+        self.scheduler_service = None
+        self.scan_settings = AutoScanSettings(collector_available=False)
+        self.max_concurrent_scans = 2
         self.timer = QTimer()
         self.timer.timeout.connect(self.check_schedules)
         self.mutex = QMutex()
@@ -105,6 +300,7 @@ class AutomaticScanner(QObject):
                 
                 # Load schedules
                 self.schedules = []
+                keys_missing = False
                 for sched_data in config.get('schedules', []):
                     schedule = ScanSchedule(
                         schedule_type=ScheduleType(sched_data['schedule_type']),
@@ -116,6 +312,10 @@ class AutomaticScanner(QObject):
                         enabled=sched_data.get('enabled', True),
                         name=sched_data.get('name', 'Unnamed Schedule')
                     )
+                    if sched_data.get('key'):
+                        schedule.key = sched_data['key']
+                    else:
+                        keys_missing = True
                     self.schedules.append(schedule)
                 
                 # Load targets
@@ -129,6 +329,10 @@ class AutomaticScanner(QObject):
                         devices_found=target_data.get('devices_found', 0)
                     )
                     self.targets.append(target)
+                
+                if keys_missing:
+                    # Older configs have no schedule keys; persist the new ones so ids stay stable
+                    self.save_configuration()
                     
             else:
                 # Create default configuration
@@ -177,7 +381,8 @@ class AutomaticScanner(QObject):
                     'weekly_time': schedule.weekly_time,
                     'once_datetime': schedule.once_datetime,
                     'enabled': schedule.enabled,
-                    'name': schedule.name
+                    'name': schedule.name,
+                    'key': schedule.key
                 }
                 config['schedules'].append(sched_data)
             
@@ -197,6 +402,23 @@ class AutomaticScanner(QObject):
                 
         except Exception as e:
             self.log_message.emit(f"⚠️ Error saving auto-scan config: {e}")
+        
+        # Dialog edits take effect on the running scheduler, not only after a restart
+        self.sync_scheduler()
+    
+    def sync_scheduler(self):
+        """Bring the running scheduler service in line with the current schedules, targets and credentials"""
+        if not self.scheduler_service:
+            return
+        self.scan_settings = AutoScanSettings.from_main_window(self.main_window)
+        specs = {spec.id: spec for spec in self.build_schedule_specs()}
+        for schedule_id in list(self.scheduler_service.schedules):
+            if schedule_id.startswith('auto_') and schedule_id not in specs:
+                self.scheduler_service.remove_schedule(schedule_id)
+        for spec in specs.values():
+            # Unchanged schedules keep their queued next run
+            if self.scheduler_service.schedules.get(spec.id) != spec:
+                self.scheduler_service.add_schedule(spec)
     
     def start_automatic_scanning(self):
         """Start the automatic scanning system"""
@@ -204,8 +426,16 @@ class AutomaticScanner(QObject):
             return
             
         self.is_running = True
-        # Check every minute for scheduled scans
-        self.timer.start(60000)  # 60 seconds
+        if SCHEDULER_SERVICE_AVAILABLE:
+            # Heap-based scheduler: sleeps until the next due scan, shared concurrency budget
+            self.scheduler_service = ScanSchedulerService(self._run_scheduled_target,
+                                                          max_concurrent=self.max_concurrent_scans)
+            self.sync_scheduler()
+            set_scheduler_service(self.scheduler_service)
+            self.scheduler_service.start()
+        else:
+            # Check every minute for scheduled scans
+            self.timer.start(60000)  # 60 seconds
         self.status_changed.emit("🟢 Automatic scanning started")
         self.log_message.emit("🚀 Automatic scanning system started")
     
@@ -213,12 +443,50 @@ class AutomaticScanner(QObject):
         """Stop the automatic scanning system"""
         self.is_running = False
         self.timer.stop()
+        if self.scheduler_service:
+            self.scheduler_service.stop(wait=False)
+            set_scheduler_service(None)
+            self.scheduler_service = None
         if self.scan_thread and self.scan_thread.isRunning():
             self.scan_thread.quit()
             self.scan_thread.wait(5000)  # Wait up to 5 seconds
         self.status_changed.emit("🔴 Automatic scanning stopped")
         self.log_message.emit("⏹️ Automatic scanning system stopped")
     
+    def build_schedule_specs(self) -> List['ScheduleSpec']:
+        """Convert the configured schedules and enabled targets for the scheduler service"""
+        target_ranges = [t.network_range for t in self.targets if t.enabled]
+        specs = []
+        for schedule in self.schedules:
+            specs.append(ScheduleSpec(
+                id=f"auto_{schedule.key}",
+                name=schedule.name,
+                kind=schedule.schedule_type.value,
+                interval_minutes=schedule.interval_minutes or 60,
+                time_of_day=schedule.daily_time or schedule.weekly_time,
+                weekdays=list(schedule.weekly_days or []),
+                once_at=schedule.once_datetime,
+                targets=target_ranges,
+                enabled=schedule.enabled,
+                overlap='skip',
+                jitter_seconds=30 if len(target_ranges) > 1 else 0,
+            ))
+        return specs
+    
+    def _run_scheduled_target(self, run: 'ScanRun') -> Dict[str, Any]:
+        """Scheduler runner: scan one target on the scheduler's worker thread"""
+        target = next((t for t in self.targets if t.network_range == run.target), None)
+        if target is None:
+            return {'success': False, 'error': f'Unknown target {run.target}'}
+        self.log_message.emit(f"⏰ Executing scheduled scan of {target.name}")
+        # Already off the UI thread: scan with the settings snapshot taken at start / last save
+        results = scan_targets([target], self.scan_settings, self)
+        if not results:
+            return {'success': False, 'error': f'Target {target.name} is disabled'}
+        result = results[0]
+        return {'success': result.get('success', False), 'error': result.get('error'),
+                'devices_found': len(result.get('devices', []))}
+    
     def check_schedules(self):
         """Check if any scheduled scans should run now"""
         if not self.is_running:
@@ -328,189 +596,15 @@ class AutoScanThread(QThread):
         self.main_window = main_window
         self.targets = targets
         self.scanner = scanner
+        # Read the credential rows and checkboxes here, on the GUI thread
+        self.settings = AutoScanSettings.from_main_window(main_window)
     
     def run(self):
         """Execute scanning for all targets"""
         try:
-            for target in self.targets:
-                if not target.enabled:
-                    continue
-                    
-                self.scanner.scan_started.emit(target.name)
-                
-                # Use the same collection method as manual scanning
-                # This ensures authentication and settings are reused
-                result = self.perform_target_scan(target)
-                
-                if result.get('success'):
-                    devices_found = len(result.get('devices', []))
-                    target.devices_found = devices_found
-                    target.last_scan = datetime.now().isoformat()
-                    
-                    self.scanner.scan_completed.emit(target.name, devices_found, result)
-                    
-                    # Save results to database in real-time
-                    self.save_results_to_database(target, result)
-                    
-                else:
-                    error_msg = result.get('error', 'Unknown error')
-                    self.scanner.scan_error.emit(target.name, error_msg)
-                
+            scan_targets(self.targets, self.settings, self.scanner)
         except Exception as e:
             self.scanner.log_message.emit(f"❌ Scan thread error: {e}")
-    
-    def perform_target_scan(self, target: AutoScanTarget) -> Dict[str, Any]:
-        """
-        Perform network scan for a target using main window's collection system
-        
-        This reuses the same authentication, settings, and collection methods
-        as the manual scanning to ensure consistency.
-        """
-        try:
-            # Temporarily set the target in main window
-            original_target = self.main_window.target_entry.text()
-            self.main_window.target_entry.setText(target.network_range)
-            
-            # Create a mock result container
-            scan_result = {
-                'success': False,
-                'devices': [],
-                'error': None,
-                'target': target.network_range
-            }
-            
-            # Use the ultra-fast collector if available
-            try:
-                if hasattr(self.main_window, 'collection_worker'):
-                    # Use the existing collection worker system
-                    # This ensures we use the same authentication and settings
-                    
-                    # Import the ultra-fast collector
-                    import ultra_fast_collector
-                    
-                    # Get authentication from main window
-                    win_creds = []
-                    for row in self.main_window.win_rows:
-                        if row.username() and row.password():
-                            win_creds.append((row.username(), row.password()))
-                    
-                    lin_creds = []
-                    for row in self.main_window.lin_rows:
-                        if row.username() and row.password():
-                            lin_creds.append((row.username(), row.password()))
-                    
-                    # Perform the scan using the same system as manual
-                    results = ultra_fast_collector.collect_all_devices(
-                        targets=[target.network_range],
-                        windows_credentials=win_creds,
-                        linux_credentials=lin_creds,
-                        use_snmp=self.main_window.chk_snmp.isChecked(),
-                        use_nmap=self.main_window.chk_nmap.isChecked(),
-                        max_threads=20,  # Conservative for automatic scans
-                        excel_file=None,  # Database-only
-                        progress_callback=None,  # No UI updates needed
-                        log_callback=lambda msg: self.scanner.log_message.emit(f"📡 {msg}")
-                    )
-                    
-                    if results and results.get('success'):
-                        scan_result['success'] = True
-                        scan_result['devices'] = results.get('devices', [])
-                        
-                        # Log success
-                        device_count = len(scan_result['devices'])
-                        self.scanner.log_message.emit(f"✅ Found {device_count} devices in {target.name}")
-                        
-                    else:
-                        scan_result['error'] = results.get('error', 'Scan failed')
-                        
-            except ImportError:
-                scan_result['error'] = "Ultra-fast collector not available"
-            except Exception as e:
-                scan_result['error'] = f"Collection error: {e}"
-            
-            # Restore original target
-            self.main_window.target_entry.setText(original_target)
-            
-            return scan_result
-            
-        except Exception as e:
-            return {
-                'success': False,
-                'error': f"Scan execution error: {e}",
-                'devices': [],
-                'target': target.network_range
-            }
-    
-    def save_results_to_database(self, target: AutoScanTarget, result: Dict[str, Any]):
-        """Save scan results to database in real-time"""
-        try:
-            devices = result.get('devices', [])
-            if not devices:
-                return
-            
-            # Use the same database connection as main window
-            db_path = "assets.db"
-            
-            with sqlite3.connect(db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Ensure assets table exists (same as manual collection)
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS assets (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        ip_address TEXT,
-                        hostname TEXT,
-                        mac_address TEXT,
-                        os_type TEXT,
-                        os_version TEXT,
-                        cpu_info TEXT,
-                        ram_gb REAL,
-                        hard_drives TEXT,
-                        network_interfaces TEXT,
-                        installed_software TEXT,
-                        domain_info TEXT,
-                        scan_timestamp TEXT,
-                        collection_method TEXT,
-                        source_scan TEXT
-                    )
-                ''')
-                
-                # Insert devices with automatic scan marker
-                scan_timestamp = datetime.now().isoformat()
-                
-                for device in devices:
-                    cursor.execute('''
-                        INSERT INTO assets (
-                            ip_address, hostname, mac_address, os_type, os_version,
-                            cpu_info, ram_gb, hard_drives, network_interfaces,
-                            installed_software, domain_info, scan_timestamp,
-                            collection_method, source_scan
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        device.get('ip_address', ''),
-                        device.get('hostname', ''),
-                        device.get('mac_address', ''),
-                        device.get('os_type', ''),
-                        device.get('os_version', ''),
-                        device.get('cpu_info', ''),
-                        device.get('ram_gb', 0),
-                        device.get('hard_drives', ''),
-                        device.get('network_interfaces', ''),
-                        device.get('installed_software', ''),
-                        device.get('domain_info', ''),
-                        scan_timestamp,
-                        'automatic_scan',
-                        f"Auto: {target.name}"
-                    ))
-                
-                conn.commit()
-                
-                # Log database save
-                device_count = len(devices)
-                self.scanner.log_message.emit(f"💾 Saved {device_count} devices to database from {target.name}")
-                
-        except Exception as e:
-            self.scanner.log_message.emit(f"❌ Database save error for {target.name}: {e}")
 
 class AutoScanConfigDialog(QDialog):
     """
@@ -1069,6 +1163,8 @@ class ScheduleEditDialog(QDialog):
             enabled=self.enabled_check.isChecked(),
             name=name
         )
+        if self.schedule is not None:
+            schedule.key = self.schedule.key  # same scheduler id, so its last run is kept
         
         if schedule_type == ScheduleType.INTERVAL:
             schedule.interval_minutes = self.interval_spin.value()
@@ -0,0 +1,688 @@
+#!/usr/bin/env python3
+"""
+📦 BULK ASSET OPERATIONS
+=======================
+Batch update / status / assign / delete / upsert for the asset tables. Used by
+POST /api/assets/bulk and by the desktop dialogs, which used to write one row
+(and usually open one connection) per asset:
+
+- the whole batch runs in one BEGIN IMMEDIATE ... COMMIT
+- consecutive operations of the same kind become one executemany() per field
+  set; id checks and upsert key lookups are set-based (json_each)
+- a failing executemany() is retried row by row, so each item gets its own
+  result: updated / inserted / assigned / deleted / not_found / error
+- atomic=True rolls the whole batch back if any item fails
+- CSV / XLSX rows are imported as upserts matched like db.repository
+  (asset_tag, then hostname + ip_address)
+
+Operations:
+
+    {"op": "update", "id": 7, "fields": {"location": "HQ-2", "notes": "..."}}
+    {"op": "status", "ids": [7, 8, 9], "status": "Retired"}
+    {"op": "assign", "ids": [7, 8], "department": "IT"}      # or department_id / location(_id)
+    {"op": "delete", "id": 12}
+    {"op": "upsert", "fields": {"hostname": "pc-1", "ip_address": "10.0.0.5", "device_type": "Laptop"}}
+
+    python bulk_operations.py --operations 50000
+"""
+
+import csv
+import json
+import os
+import re
+import sqlite3
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+
+try:
+    from openpyxl import load_workbook
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+
+OPERATIONS = ('update', 'status', 'assign', 'delete', 'upsert')
+MAX_OPERATIONS = 100000
+FAILED = ('error', 'not_found')
+
+# Upsert match order, same as db.repository._detect_match
+DEFAULT_KEY_COLUMNS: Tuple[Tuple[str, ...], ...] = (('asset_tag',), ('hostname', 'ip_address'))
+
+ASSIGNMENT_KEYS = ('department', 'department_id', 'location', 'location_id', 'assigned_by', 'notes')
+
+# Spreadsheet headers → columns: the export layout and the manual-entry sheets
+IMPORT_HEADER_ALIASES: Dict[str, str] = {
+    'IP': 'ip_address', 'User': 'working_user', 'Working User': 'working_user', 'OS': 'os_name',
+    'Model': 'model', 'Serial Number': 'serial_number', 'MAC Address': 'mac_address',
+}
+
+
+class BulkOperationError(ValueError):
+    """The batch itself is unusable (bad payload, too many operations)"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass
+class BulkResult:
+    results: List[Dict[str, Any]] = field(default_factory=list)
+    committed: bool = False
+    elapsed_ms: float = 0.0
+    ignored_columns: List[str] = field(default_factory=list)
+
+    @property
+    def counts(self) -> Dict[str, int]:
+        return dict(Counter(r['status'] for r in self.results))
+
+    @property
+    def failed(self) -> int:
+        return sum(1 for r in self.results if r['status'] in FAILED)
+
+    @property
+    def succeeded(self) -> int:
+        return len(self.results) - self.failed if self.committed else 0
+
+    def to_dict(self, results: str = 'all') -> Dict[str, Any]:
+        """results: 'all', 'errors' (failed items only) or 'none'"""
+        body: Dict[str, Any] = {'success': self.committed and not self.failed, 'committed': self.committed,
+                                'total': len(self.results), 'succeeded': self.succeeded, 'failed': self.failed,
+                                'counts': self.counts, 'elapsed_ms': self.elapsed_ms}
+        if self.ignored_columns:
+            body['ignored_columns'] = self.ignored_columns
+        if results == 'all':
+            body['results'] = self.results
+        elif results == 'errors':
+            body['results'] = [r for r in self.results if r['status'] in FAILED]
+        return body
+
+
+class _Item:
+    """One operation on one asset; an "ids" operation expands to several"""
+
+    __slots__ = ('kind', 'id', 'fields', 'result')
+
+    def __init__(self, index: int, op: str, asset_id: Optional[int] = None, fields: Optional[Dict[str, Any]] = None):
+        self.kind = 'update' if op == 'status' else op
+        self.id = asset_id
+        self.fields = fields or {}
+        self.result: Dict[str, Any] = {'index': index, 'op': op, 'id': asset_id, 'status': 'pending'}
+
+    def done(self, status: str, asset_id: Optional[int] = None):
+        self.result['status'] = status
+        if asset_id is not None:
+            self.id = self.result['id'] = asset_id
+
+    def fail(self, error: str, status: str = 'error'):
+        self.result['status'] = status
+        self.result['error'] = error
+
+    @property
+    def pending(self) -> bool:
+        return self.result['status'] == 'pending'
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _value(value: Any) -> Any:
+    # Lists / dicts go into the JSON text columns (installed_software, ...)
+    return json.dumps(value) if isinstance(value, (list, dict)) else value
+
+
+def _runs(items: List[_Item]) -> Iterator[Tuple[str, List[_Item]]]:
+    """Consecutive items of the same kind; order between kinds is kept"""
+    run: List[_Item] = []
+    for item in items:
+        if run and item.kind != run[0].kind:
+            yield run[0].kind, run
+            run = []
+        run.append(item)
+    if run:
+        yield run[0].kind, run
+
+
+class AssetBulkWriter:
+    """📦 Set-based writer for one asset table"""
+
+    def __init__(self, db_path: str = 'assets.db', table: str = 'assets', editable: Optional[Iterable[str]] = None,
+                 key_columns: Sequence[Sequence[str]] = DEFAULT_KEY_COLUMNS, status_column: str = 'status',
+                 department_column: str = 'department', location_column: str = 'location',
+                 timestamp_column: Optional[str] = 'updated_at',
+                 assignments_table: Optional[str] = 'device_assignments', timeout: float = 30.0):
+        self.db_path = db_path
+        self.table = table
+        self.editable = set(editable) if editable is not None else None
+        self.key_columns = [tuple(key) for key in key_columns]
+        self.status_column = status_column
+        self.department_column = department_column
+        self.location_column = location_column
+        self.timestamp_column = timestamp_column
+        self.assignments_table = assignments_table
+        self.timeout = timeout
+
+    # ----------------- Schema -----------------
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode: transactions are explicit BEGIN / SAVEPOINT / COMMIT
+        return sqlite3.connect(self.db_path, timeout=self.timeout, isolation_level=None)
+
+    @staticmethod
+    def _table_columns(conn: sqlite3.Connection, table: str) -> List[str]:
+        return [row[1] for row in conn.execute(f"PRAGMA table_info({_quote(table)})")]
+
+    def editable_columns(self, conn: Optional[sqlite3.Connection] = None) -> List[str]:
+        """Columns an operation may set: the whitelist, or every column except id and _internal ones"""
+        if conn is None:
+            with sqlite3.connect(self.db_path, timeout=self.timeout) as conn:
+                return self.editable_columns(conn)
+        columns = self._table_columns(conn, self.table)
+        if self.editable is not None:
+            return [c for c in columns if c in self.editable]
+        return [c for c in columns if c != 'id' and not c.startswith('_')]
+
+    # ----------------- Public API -----------------
+
+    def apply(self, operations: Iterable[Mapping[str, Any]], atomic: bool = False) -> BulkResult:
+        """Run a batch of operations in one transaction; one result per asset touched"""
+        started = time.perf_counter()
+        conn = self._connect()
+        try:
+            columns = self._table_columns(conn, self.table)
+            if not columns:
+                raise BulkOperationError(f"table {self.table!r} does not exist", status=500)
+            editable = set(self.editable_columns(conn))
+            items = self._normalize(operations, editable)
+            if len(items) > MAX_OPERATIONS:
+                raise BulkOperationError(f"{len(items)} operations in one batch; the limit is {MAX_OPERATIONS}",
+                                         status=413)
+            result = BulkResult(results=[item.result for item in items])
+
+            if atomic and any(not item.pending for item in items):
+                for item in items:
+                    if item.pending:
+                        item.done('skipped')
+                return self._finish(result, started)
+
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                for kind, run in _runs([item for item in items if item.pending]):
+                    getattr(self, f'_run_{kind}')(conn, run, set(columns))
+                if atomic and result.failed:
+                    conn.execute('ROLLBACK')
+                    for item in items:
+                        if item.result['status'] not in FAILED:
+                            item.done('rolled_back')
+                else:
+                    conn.execute('COMMIT')
+                    result.committed = True
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute('ROLLBACK')
+                raise
+            return self._finish(result, started)
+        finally:
+            conn.close()
+
+    def update(self, changes: Mapping[int, Mapping[str, Any]], atomic: bool = False) -> BulkResult:
+        return self.apply(({'op': 'update', 'id': asset_id, 'fields': dict(fields)}
+                           for asset_id, fields in changes.items()), atomic=atomic)
+
+    def set_status(self, asset_ids: Iterable[int], status: str) -> BulkResult:
+        return self.apply([{'op': 'status', 'ids': list(asset_ids), 'status': status}])
+
+    def assign(self, asset_ids: Iterable[int], **assignment) -> BulkResult:
+        """assign(ids, department=..., department_id=..., location_id=..., assigned_by=..., notes=...)"""
+        return self.apply([{'op': 'assign', 'ids': list(asset_ids), **assignment}])
+
+    def delete(self, asset_ids: Iterable[int]) -> BulkResult:
+        return self.apply([{'op': 'delete', 'ids': list(asset_ids)}])
+
+    def upsert(self, rows: Iterable[Mapping[str, Any]], atomic: bool = False) -> BulkResult:
+        return self.apply(({'op': 'upsert', 'fields': dict(row)} for row in rows), atomic=atomic)
+
+    def import_file(self, path: str, sheet: Optional[str] = None, defaults: Optional[Mapping[str, Any]] = None,
+                    atomic: bool = False) -> BulkResult:
+        """Upsert every row of a CSV or XLSX file; empty cells leave the stored value alone"""
+        headers, rows = read_rows(path, sheet)
+        editable = self.editable_columns()
+        mapping = header_columns(headers, editable)
+        defaults = {k: v for k, v in (defaults or {}).items() if k in editable}
+        operations = []
+        for row in rows:
+            fields = {mapping[h]: v for h, v in row.items()
+                      if h in mapping and v is not None and str(v).strip() != ''}
+            if fields:
+                operations.append({'op': 'upsert', 'fields': {**defaults, **fields}})
+        result = self.apply(operations, atomic=atomic)
+        result.ignored_columns = [h for h in headers if h and h not in mapping]
+        return result
+
+    # ----------------- Validation -----------------
+
+    def _normalize(self, operations: Iterable[Mapping[str, Any]], editable: set) -> List[_Item]:
+        items: List[_Item] = []
+        for index, raw in enumerate(operations):
+            op = str(raw.get('op') or '').strip().lower() if isinstance(raw, Mapping) else ''
+            if op not in OPERATIONS:
+                item = _Item(index, op or 'unknown')
+                item.fail(f"op must be one of {', '.join(OPERATIONS)}")
+                items.append(item)
+                continue
+
+            if op == 'upsert':
+                items.append(self._with_fields(_Item(index, op), raw.get('fields'), editable))
+                continue
+
+            ids = raw['ids'] if 'ids' in raw else [raw.get('id')]
+            if not isinstance(ids, (list, tuple)):
+                ids = [ids]
+            for asset_id in ids:
+                item = _Item(index, op, asset_id)
+                items.append(item)
+                if isinstance(asset_id, bool) or not isinstance(asset_id, int):
+                    item.fail('id must be an integer')
+                elif op == 'update':
+                    self._with_fields(item, raw.get('fields'), editable)
+                elif op == 'status':
+                    if raw.get('status') in (None, ''):
+                        item.fail('status is required')
+                    else:
+                        self._with_fields(item, {self.status_column: raw['status']}, editable)
+                elif op == 'assign':
+                    item.fields = {k: raw[k] for k in ASSIGNMENT_KEYS if k in raw}
+                    if not any(k in item.fields for k in ('department', 'department_id', 'location', 'location_id')):
+                        item.fail('assign needs department, department_id, location or location_id')
+        return items
+
+    @staticmethod
+    def _with_fields(item: _Item, fields: Any, editable: set) -> _Item:
+        if not isinstance(fields, Mapping) or not fields:
+            item.fail('fields must be a non-empty object')
+            return item
+        unknown = [name for name in fields if name not in editable]
+        if unknown:
+            item.fail(f"unknown or read-only field(s): {', '.join(map(str, unknown))}")
+            return item
+        item.fields = {name: _value(value) for name, value in fields.items()}
+        return item
+
+    # ----------------- Execution -----------------
+
+    def _existing(self, conn: sqlite3.Connection, asset_ids: Iterable[int]) -> set:
+        return {row[0] for row in conn.execute(
+            f"SELECT id FROM {_quote(self.table)} WHERE id IN (SELECT value FROM json_each(?))",
+            (json.dumps(sorted(set(asset_ids))),))}
+
+    def _known(self, conn: sqlite3.Connection, items: List[_Item]) -> List[_Item]:
+        existing = self._existing(conn, (item.id for item in items))
+        found = []
+        for item in items:
+            if item.id in existing:
+                found.append(item)
+            else:
+                item.fail(f'asset {item.id} not found', status='not_found')
+        return found
+
+    @staticmethod
+    def _execute_many(conn: sqlite3.Connection, sql: str, params: List[Sequence[Any]]) -> Optional[List[Any]]:
+        """executemany() under a savepoint. None when it succeeded; otherwise the
+        statement is retried row by row and the per-row lastrowid or exception is returned."""
+        if not params:
+            return None
+        conn.execute('SAVEPOINT bulk_group')
+        try:
+            conn.executemany(sql, params)
+            outcome = None
+        except sqlite3.Error:
+            conn.execute('ROLLBACK TO bulk_group')
+            outcome = []
+            for row in params:
+                try:
+                    outcome.append(conn.execute(sql, row).lastrowid)
+                except sqlite3.Error as e:
+                    outcome.append(e)
+        conn.execute('RELEASE bulk_group')
+        return outcome
+
+    def _update_rows(self, conn: sqlite3.Connection, merged: Dict[int, Dict[str, Any]],
+                     members: Dict[int, List[_Item]], status: str, columns: set):
+        groups: Dict[Tuple[str, ...], List[int]] = {}
+        for asset_id, fields in merged.items():
+            groups.setdefault(tuple(sorted(fields)), []).append(asset_id)
+        stamp = self.timestamp_column if self.timestamp_column in columns else None
+        for signature, asset_ids in groups.items():
+            assignments = [f"{_quote(c)} = ?" for c in signature]
+            if stamp and stamp not in signature:
+                assignments.append(f"{_quote(stamp)} = CURRENT_TIMESTAMP")
+            sql = f"UPDATE {_quote(self.table)} SET {', '.join(assignments)} WHERE id = ?"
+            params = [[*(merged[asset_id][c] for c in signature), asset_id] for asset_id in asset_ids]
+            outcome = self._execute_many(conn, sql, params)
+            for n, asset_id in enumerate(asset_ids):
+                error = outcome[n] if outcome is not None else None
+                for item in members[asset_id]:
+                    if isinstance(error, Exception):
+                        item.fail(str(error))
+                    else:
+                        item.done(status, asset_id)
+
+    def _run_update(self, conn: sqlite3.Connection, items: List[_Item], columns: set):
+        # Several changes to one asset merge in order, so grouping by field set keeps "last write wins"
+        merged: Dict[int, Dict[str, Any]] = {}
+        members: Dict[int, List[_Item]] = {}
+        for item in self._known(conn, items):
+            merged.setdefault(item.id, {}).update(item.fields)
+            members.setdefault(item.id, []).append(item)
+        self._update_rows(conn, merged, members, 'updated', columns)
+
+    def _run_delete(self, conn: sqlite3.Connection, items: List[_Item], columns: set):
+        found = self._known(conn, items)
+        asset_ids = list(dict.fromkeys(item.id for item in found))
+        outcome = self._execute_many(conn, f"DELETE FROM {_quote(self.table)} WHERE id = ?",
+                                     [(asset_id,) for asset_id in asset_ids])
+        failed = {asset_id: outcome[n] for n, asset_id in enumerate(asset_ids)
+                  if outcome is not None and isinstance(outcome[n], Exception)}
+        for item in found:
+            if item.id in failed:
+                item.fail(str(failed[item.id]))
+            else:
+                item.done('deleted')
+        if self._has_assignments(conn):
+            self._execute_many(conn, f"DELETE FROM {_quote(self.assignments_table)} WHERE asset_id = ?",
+                               [(asset_id,) for asset_id in asset_ids if asset_id not in failed])
+
+    def _has_assignments(self, conn: sqlite3.Connection) -> bool:
+        return bool(self.assignments_table and self._table_columns(conn, self.assignments_table))
+
+    def _names(self, conn: sqlite3.Connection, table: str) -> Dict[Any, Any]:
+        """id → name and name → id for departments / locations (empty if the table is missing)"""
+        if 'name' not in self._table_columns(conn, table):
+            return {}
+        lookup: Dict[Any, Any] = {}
+        for row_id, name in conn.execute(f"SELECT id, name FROM {_quote(table)}"):
+            lookup[row_id] = name
+            lookup.setdefault(('name', name), row_id)
+        return lookup
+
+    def _run_assign(self, conn: sqlite3.Connection, items: List[_Item], columns: set):
+        departments = self._names(conn, 'departments')
+        locations = self._names(conn, 'locations')
+        assignments: Dict[int, Dict[str, Any]] = {}
+        members: Dict[int, List[_Item]] = {}
+        for item in self._known(conn, items):
+            fields = item.fields
+            resolved: Dict[str, Any] = {}
+            try:
+                for key, lookup, column in (('department', departments, self.department_column),
+                                            ('location', locations, self.location_column)):
+                    if fields.get(f'{key}_id') is not None:
+                        if fields[f'{key}_id'] not in lookup:
+                            raise KeyError(f"unknown {key}_id {fields[f'{key}_id']}")
+                        resolved[key] = (fields[f'{key}_id'], lookup[fields[f'{key}_id']])
+                    elif key in fields or f'{key}_id' in fields:
+                        name = fields.get(key)
+                        resolved[key] = (lookup.get(('name', name)), name)
+                    if key in resolved and column not in columns:
+                        raise KeyError(f"{self.table} has no {column} column")
+            except KeyError as e:
+                item.fail(e.args[0])
+                continue
+            resolved['assigned_by'] = fields.get('assigned_by') or 'System'
+            resolved['notes'] = fields.get('notes') or ''
+            # A later assignment of the same asset replaces the earlier one
+            assignments[item.id] = resolved
+            members.setdefault(item.id, []).append(item)
+
+        merged = {asset_id: {column: assignment[key][1]
+                             for key, column in (('department', self.department_column),
+                                                 ('location', self.location_column)) if key in assignment}
+                  for asset_id, assignment in assignments.items()}
+        self._update_rows(conn, merged, members, 'assigned', columns)
+
+        if self._has_assignments(conn):
+            assigned = [asset_id for asset_id in assignments
+                        if all(item.result['status'] == 'assigned' for item in members[asset_id])]
+            self._execute_many(conn, f"DELETE FROM {_quote(self.assignments_table)} WHERE asset_id = ?",
+                               [(asset_id,) for asset_id in assigned])
+            self._execute_many(
+                conn,
+                f"INSERT INTO {_quote(self.assignments_table)} "
+                f"(asset_id, department_id, location_id, assigned_by, notes) VALUES (?, ?, ?, ?, ?)",
+                [(asset_id, assignments[asset_id].get('department', (None,))[0],
+                  assignments[asset_id].get('location', (None,))[0],
+                  assignments[asset_id]['assigned_by'], assignments[asset_id]['notes']) for asset_id in assigned])
+
+    def _match_keys(self, conn: sqlite3.Connection, items: List[_Item],
+                    keys: List[Tuple[str, ...]]) -> Dict[Tuple, int]:
+        """(key columns, values) → lowest existing id, fetched per key with one json_each query"""
+        matches: Dict[Tuple, int] = {}
+        for key in keys:
+            wanted = {tuple(item.fields[c] for c in key) for item in items
+                      if all(item.fields.get(c) not in (None, '') for c in key)}
+            if not wanted:
+                continue
+            first = {values[0] for values in wanted}
+            rows = conn.execute(
+                f"SELECT id, {', '.join(_quote(c) for c in key)} FROM {_quote(self.table)} "
+                f"WHERE {_quote(key[0])} IN (SELECT value FROM json_each(?)) ORDER BY id",
+                (json.dumps(sorted(first, key=str)),))
+            for row in rows:
+                if tuple(row[1:]) in wanted:
+                    matches.setdefault((key, tuple(row[1:])), row[0])
+        return matches
+
+    def _run_upsert(self, conn: sqlite3.Connection, items: List[_Item], columns: set):
+        keys = [key for key in self.key_columns if all(c in columns for c in key)]
+        matches = self._match_keys(conn, items, keys)
+
+        updates: Dict[int, Dict[str, Any]] = {}
+        update_members: Dict[int, List[_Item]] = {}
+        new_rows: List[Tuple[Dict[str, Any], List[_Item]]] = []
+        new_keys: Dict[Tuple, int] = {}
+        for item in items:
+            item_keys = [(key, tuple(item.fields[c] for c in key)) for key in keys
+                         if all(item.fields.get(c) not in (None, '') for c in key)]
+            existing = next((matches[k] for k in item_keys if k in matches), None)
+            if existing is not None:
+                updates.setdefault(existing, {}).update(item.fields)
+                update_members.setdefault(existing, []).append(item)
+                continue
+            # Rows new to the table but repeated in the batch are inserted once
+            slot = next((new_keys[k] for k in item_keys if k in new_keys), None)
+            if slot is None:
+                slot = len(new_rows)
+                new_rows.append(({}, []))
+            for k in item_keys:
+                new_keys.setdefault(k, slot)
+            new_rows[slot][0].update(item.fields)
+            new_rows[slot][1].append(item)
+
+        self._update_rows(conn, updates, update_members, 'updated', columns)
+
+        groups: Dict[Tuple[str, ...], List[Tuple[Dict[str, Any], List[_Item]]]] = {}
+        for fields, members in new_rows:
+            groups.setdefault(tuple(sorted(fields)), []).append((fields, members))
+        for signature, rows in groups.items():
+            sql = (f"INSERT INTO {_quote(self.table)} ({', '.join(_quote(c) for c in signature)}) "
+                   f"VALUES ({', '.join('?' for _ in signature)})")
+            outcome = self._execute_many(conn, sql, [[fields[c] for c in signature] for fields, _ in rows])
+            if outcome is None:
+                # The batch holds the write lock, so its rows carry the highest ids, in insert order
+                outcome = [row[0] for row in conn.execute(
+                    f"SELECT id FROM {_quote(self.table)} ORDER BY id DESC LIMIT ?", (len(rows),))][::-1]
+            for (_, members), new_id in zip(rows, outcome):
+                for item in members:
+                    if isinstance(new_id, Exception):
+                        item.fail(str(new_id))
+                    else:
+                        item.done('inserted', new_id)
+
+    @staticmethod
+    def _finish(result: BulkResult, started: float) -> BulkResult:
+        result.elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        return result
+
+
+# ======================================================================
+# CSV / XLSX rows
+# ======================================================================
+
+def read_rows(path: str, sheet: Optional[str] = None) -> Tuple[List[str], Iterator[Dict[str, Any]]]:
+    """Header row and a row-dict iterator for a .csv or .xlsx file"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.xlsx', '.xlsm'):
+        if not OPENPYXL_AVAILABLE:
+            raise BulkOperationError("openpyxl is required for XLSX import")
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        worksheet = workbook[sheet] if sheet else workbook.active
+        values = worksheet.iter_rows(values_only=True)
+        headers = [str(h).strip() if h is not None else '' for h in next(values, ())]
+
+        def xlsx_rows():
+            try:
+                for row in values:
+                    yield dict(zip(headers, row))
+            finally:
+                workbook.close()
+        return headers, xlsx_rows()
+    if extension in ('.csv', '.txt'):
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            reader = csv.reader(f)
+            headers = [h.strip() for h in next(reader, [])]
+            rows = [dict(zip(headers, row)) for row in reader]
+        return headers, iter(rows)
+    raise BulkOperationError(f"unsupported import file type {extension or path!r}; use .csv or .xlsx")
+
+
+def header_columns(headers: Iterable[str], columns: Iterable[str]) -> Dict[str, str]:
+    """Map spreadsheet headers onto table columns (exact, export / sheet headers, then snake_case)"""
+    from streaming_export import EXPORT_COLUMNS
+    from db.repository import BASE_MAP
+
+    columns = set(columns)
+    aliases = {header: column for column, header in EXPORT_COLUMNS.items()}
+    aliases.update(BASE_MAP)
+    aliases.update(IMPORT_HEADER_ALIASES)
+    mapping = {}
+    for header in headers:
+        if not header:
+            continue
+        for candidate in (header, aliases.get(header), re.sub(r'\W+', '_', header.strip().lower()).strip('_')):
+            if candidate in columns:
+                mapping[header] = candidate
+                break
+    return mapping
+
+
+# ======================================================================
+# Flask endpoint
+# ======================================================================
+
+def register_bulk_routes(app, writer: Union[AssetBulkWriter, Callable[[], AssetBulkWriter]],
+                         rule: str = '/api/assets/bulk', decorator: Optional[Callable] = None):
+    """POST {"operations": [...], "atomic": false, "results": "all|errors|none"} or a
+    multipart CSV / XLSX upload ("file", optional "sheet"). writer may be a callable
+    for apps whose database path is only known at request time."""
+    import tempfile
+
+    from flask import jsonify, request
+
+    def bulk_assets():
+        current = writer() if callable(writer) else writer
+        try:
+            upload = request.files.get('file')
+            if upload is not None:
+                options = request.form
+                extension = os.path.splitext(upload.filename or '')[1].lower() or '.csv'
+                fd, path = tempfile.mkstemp(suffix=extension)
+                os.close(fd)
+                try:
+                    upload.save(path)
+                    result = current.import_file(path, sheet=options.get('sheet') or None,
+                                                 atomic=options.get('atomic') in ('1', 'true', 'yes'))
+                finally:
+                    os.remove(path)
+            else:
+                options = request.get_json(silent=True)
+                if isinstance(options, list):
+                    options = {'operations': options}
+                if not isinstance(options, dict) or not isinstance(options.get('operations'), list):
+                    raise BulkOperationError('expected {"operations": [...]} or a CSV / XLSX file upload')
+                result = current.apply(options['operations'], atomic=bool(options.get('atomic')))
+        except BulkOperationError as e:
+            return jsonify({'success': False, 'error': str(e)}), e.status
+
+        detail = options.get('results') or 'all'
+        if detail not in ('all', 'errors', 'none'):
+            detail = 'all'
+        return jsonify(result.to_dict(results=detail)), 200 if result.committed else 422
+
+    app.add_url_rule(rule, 'bulk_assets', decorator(bulk_assets) if decorator else bulk_assets, methods=['POST'])
+
+
+# ======================================================================
+# Benchmark
+# ======================================================================
+
+def benchmark(operations: int = 50000, per_row_sample: int = 1000) -> Dict[str, Any]:
+    """One bulk batch of `operations` mixed operations vs the per-row pattern
+    (connection + statement + commit per asset), sampled and extrapolated."""
+    import tempfile
+
+    from db.migrations import migrate
+
+    results: Dict[str, Any] = {'operations': operations}
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'assets.db')
+        migrate(db_path)
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS departments (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                         "name TEXT UNIQUE NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS device_assignments (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                         "asset_id INTEGER, department_id INTEGER, location_id INTEGER, assigned_by TEXT, "
+                         "assigned_at TEXT DEFAULT CURRENT_TIMESTAMP, notes TEXT)")
+            conn.executemany("INSERT INTO departments (name) VALUES (?)", [(f'Dept {n}',) for n in range(10)])
+            conn.executemany("INSERT INTO assets (device_type, hostname, ip_address) VALUES (?, ?, ?)",
+                             [('Workstation', f'pc-{n}', f'10.{n // 65536}.{n // 256 % 256}.{n % 256}')
+                              for n in range(operations)])
+
+        # Per-row baseline: what DepartmentDatabase.assign_device did for each selected asset
+        started = time.perf_counter()
+        for asset_id in range(1, per_row_sample + 1):
+            with sqlite3.connect(db_path) as conn:
+                conn.execute("UPDATE assets SET department = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+                             ('Dept 1', asset_id))
+        per_row = time.perf_counter() - started
+        results['per_row'] = {'sample': per_row_sample, 'ops_per_s': round(per_row_sample / per_row),
+                              'estimated_s': round(per_row / per_row_sample * operations, 1)}
+
+        share = operations // 5
+        batch: List[Dict[str, Any]] = []
+        batch += [{'op': 'update', 'id': n, 'fields': {'notes': f'checked {n}', 'site': 'HQ'}}
+                  for n in range(1, share + 1)]
+        batch.append({'op': 'status', 'ids': list(range(share + 1, 2 * share + 1)), 'status': 'Maintenance'})
+        batch.append({'op': 'assign', 'ids': list(range(2 * share + 1, 3 * share + 1)), 'department_id': 3})
+        batch.append({'op': 'delete', 'ids': list(range(3 * share + 1, 4 * share + 1))})
+        batch += [{'op': 'upsert', 'fields': {'device_type': 'Laptop', 'hostname': f'new-{n}',
+                                              'ip_address': f'172.16.{n // 256 % 256}.{n % 256}'}}
+                  for n in range(operations - 4 * share)]
+        started = time.perf_counter()
+        result = AssetBulkWriter(db_path).apply(batch)
+        elapsed = time.perf_counter() - started
+        results['bulk'] = {'seconds': round(elapsed, 2), 'ops_per_s': round(len(result.results) / elapsed),
+                           'counts': result.counts, 'committed': result.committed}
+        results['speedup'] = round(results['bulk']['ops_per_s'] / results['per_row']['ops_per_s'], 1)
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Bulk asset operation throughput benchmark")
+    parser.add_argument('--operations', type=int, default=50000)
+    parser.add_argument('--per-row-sample', type=int, default=1000)
+    args = parser.parse_args()
+    print(json.dumps(benchmark(args.operations, args.per_row_sample), indent=2))
@@ -9,6 +9,7 @@ import json
 from datetime import datetime
 from typing import Dict, List
 from smart_duplicate_detector import SmartDuplicateDetector, DuplicateMatch
+from metrics_registry import time_duplicate_detection
 
 class CollectionDuplicateManager:
     """Manages duplicates during collection operations"""
@@ -31,7 +32,8 @@ class CollectionDuplicateManager:
         self.collection_stats['devices_processed'] += 1
         
         # Detect potential duplicates
-        matches = self.detector.detect_duplicates(device_data)
+        with time_duplicate_detection('smart_detector'):
+            matches = self.detector.detect_duplicates(device_data)
         
         if not matches:
             # No duplicates found - add as new device
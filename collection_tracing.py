@@ -0,0 +1,585 @@
+#!/usr/bin/env python3
+"""
+🧵 COLLECTION TRACING
+=====================
+Lightweight per-device tracing across the collection lifecycle, so a slow
+scan can be broken down into ping, port checks, OS detection, WMI/SSH/SNMP
+attempts (with credential retries), duplicate validation and the SQLite save:
+
+- every device gets a trace id that stays the same for the whole scan, even
+  when its stages run on different worker threads
+- each stage records a span: start, duration, outcome, bytes, retries
+- spans nest through a thread-local stack; wrap() carries the context into
+  executor threads (timeout wrappers)
+- finished spans go to a background writer that batches them into the
+  collection_traces table (or a JSONL file)
+- report: p50/p95/p99 per stage and the top-N slowest devices with their
+  critical path
+
+    python collection_tracing.py report --db assets.db --top 10
+    COLLECTION_TRACE=off | traces.jsonl | other.db   (default: assets.db)
+"""
+
+import atexit
+import inspect
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+SCAN_DEVICE = ''  # device value of scan-level spans (whole pipeline steps)
+
+TRACE_COLUMNS = ('trace_id', 'span_id', 'parent_id', 'scan_id', 'collector', 'device', 'stage',
+                 'started_at', 'duration_ms', 'outcome', 'bytes', 'retries', 'detail')
+
+
+@dataclass
+class Span:
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    scan_id: Optional[str]
+    collector: Optional[str]
+    device: str
+    stage: str
+    started_at: float
+    duration_ms: float = 0.0
+    outcome: str = 'ok'
+    bytes: int = 0
+    retries: int = 0
+    detail: Optional[str] = None
+
+    @property
+    def ended_at(self) -> float:
+        return self.started_at + self.duration_ms / 1000.0
+
+    def row(self) -> Tuple:
+        return tuple(getattr(self, column) for column in TRACE_COLUMNS)
+
+
+def record_size(record: Any) -> int:
+    """Approximate payload size of a collected record (keys + values as text)"""
+    if not record:
+        return 0
+    if isinstance(record, dict):
+        return sum(len(str(k)) + len(str(v)) for k, v in record.items())
+    return len(str(record))
+
+
+# ----------------- Sinks -----------------
+
+class SqliteTraceSink:
+    """collection_traces table; old traces are pruned when the sink opens"""
+
+    def __init__(self, db_path: str = 'assets.db', table: str = 'collection_traces', keep_days: float = 14):
+        if not table.isidentifier():
+            raise ValueError(f"Invalid table name: {table}")
+        self.db_path = db_path
+        self.table = table
+        self.keep_days = keep_days
+        self._ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        if not self._ready:
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {self.table} (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    trace_id TEXT NOT NULL,
+                    span_id TEXT NOT NULL,
+                    parent_id TEXT,
+                    scan_id TEXT,
+                    collector TEXT,
+                    device TEXT,
+                    stage TEXT NOT NULL,
+                    started_at REAL NOT NULL,
+                    duration_ms REAL NOT NULL,
+                    outcome TEXT,
+                    bytes INTEGER DEFAULT 0,
+                    retries INTEGER DEFAULT 0,
+                    detail TEXT
+                )
+            """)
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{self.table}_scan ON {self.table} (scan_id, trace_id)")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{self.table}_started ON {self.table} (started_at)")
+            if self.keep_days:
+                conn.execute(f"DELETE FROM {self.table} WHERE started_at < ?",
+                             (time.time() - self.keep_days * 86400,))
+            conn.commit()
+            self._ready = True
+        return conn
+
+    def write(self, spans: List[Span]) -> None:
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    f"INSERT INTO {self.table} ({', '.join(TRACE_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(TRACE_COLUMNS))})", [s.row() for s in spans])
+        finally:
+            conn.close()
+
+    def load(self, scan_id: Optional[str] = None, since: Optional[float] = None) -> List[Span]:
+        conn = self._connect()
+        try:
+            query, params = f"SELECT {', '.join(TRACE_COLUMNS)} FROM {self.table} WHERE 1=1", []
+            if scan_id:
+                query += " AND scan_id = ?"
+                params.append(scan_id)
+            if since is not None:
+                query += " AND started_at >= ?"
+                params.append(since)
+            return [Span(*row) for row in conn.execute(query, params)]
+        finally:
+            conn.close()
+
+    def latest_scan_id(self) -> Optional[str]:
+        conn = self._connect()
+        try:
+            row = conn.execute(f"SELECT scan_id FROM {self.table} WHERE scan_id IS NOT NULL "
+                               f"ORDER BY started_at DESC LIMIT 1").fetchone()
+            return row[0] if row else None
+        finally:
+            conn.close()
+
+
+class JsonlTraceSink:
+    """One JSON object per span, appended"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def write(self, spans: List[Span]) -> None:
+        with open(self.path, 'a', encoding='utf-8') as handle:
+            handle.write(''.join(json.dumps(asdict(s), separators=(',', ':')) + '\n' for s in spans))
+
+    def load(self, scan_id: Optional[str] = None, since: Optional[float] = None) -> List[Span]:
+        spans = []
+        if not os.path.exists(self.path):
+            return spans
+        with open(self.path, 'r', encoding='utf-8') as handle:
+            for line in handle:
+                if line.strip():
+                    span = Span(**json.loads(line))
+                    if (not scan_id or span.scan_id == scan_id) and (since is None or span.started_at >= since):
+                        spans.append(span)
+        return spans
+
+    def latest_scan_id(self) -> Optional[str]:
+        spans = [s for s in self.load() if s.scan_id]
+        return max(spans, key=lambda s: s.started_at).scan_id if spans else None
+
+
+def sink_for(path: str):
+    return JsonlTraceSink(path) if path.endswith('.jsonl') else SqliteTraceSink(path)
+
+
+# ----------------- Tracer -----------------
+
+class _NoopSpan:
+    """Returned when tracing is off or there is no device to attribute the stage to"""
+    __slots__ = ()
+    outcome = bytes = retries = detail = None
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class CollectionTracer:
+    """Thread-safe span recorder with a batching background writer"""
+
+    def __init__(self, sink=None, batch_size: int = 500, flush_interval: float = 1.0,
+                 max_devices: int = 100000):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_devices = max_devices
+        self.scan_id: Optional[str] = None
+        self.collector: Optional[str] = None
+        self.dropped = 0
+        self.written = 0
+        self._trace_ids: 'OrderedDict[str, str]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._queue: 'queue.SimpleQueue' = queue.SimpleQueue()
+        self._writer: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.sink is not None
+
+    # ---- scan / trace identity ----
+
+    def begin_scan(self, collector: str, scan_id: Optional[str] = None) -> Optional[str]:
+        """Start a new scan: devices get fresh trace ids from here on"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            self.scan_id = scan_id or f"{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+            self.collector = collector
+            self._trace_ids.clear()
+        return self.scan_id
+
+    def trace_id(self, device: str) -> str:
+        """Stable trace id for a device within the current scan"""
+        with self._lock:
+            trace_id = self._trace_ids.get(device)
+            if trace_id is None:
+                trace_id = self._trace_ids[device] = uuid.uuid4().hex[:16]
+                if len(self._trace_ids) > self.max_devices:
+                    self._trace_ids.popitem(last=False)
+            return trace_id
+
+    def _stack(self) -> List[Span]:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def current(self) -> Optional[Span]:
+        stack = getattr(self._local, 'stack', None)
+        return stack[-1] if stack else None
+
+    # ---- spans ----
+
+    def _new_span(self, stage: str, device: Optional[str], fields: Dict[str, Any]) -> Optional[Span]:
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        if device is None:
+            if parent is None:
+                return None
+            device = parent.device
+        trace_id = self.trace_id(device) if device != SCAN_DEVICE else (self.scan_id or 'scan')
+        if parent is not None and parent.trace_id != trace_id:
+            parent = None
+        span = Span(trace_id=trace_id, span_id=uuid.uuid4().hex[:16],
+                    parent_id=parent.span_id if parent else None, scan_id=self.scan_id,
+                    collector=self.collector, device=device, stage=stage, started_at=time.time())
+        for name, value in fields.items():
+            setattr(span, name, value)
+        return span
+
+    @contextmanager
+    def span(self, stage: str, device: Optional[str] = None, **fields):
+        """Record one stage; device defaults to the enclosing span's device.
+
+        Yields the span so the stage can set outcome / bytes / retries / detail;
+        an exception marks it 'error' and propagates.
+        """
+        span = self._new_span(stage, device, fields) if self.enabled else None
+        if span is None:
+            yield _NOOP
+            return
+        stack = self._stack()
+        started = time.perf_counter()
+        stack.append(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.outcome = 'error'
+            span.detail = span.detail or f"{type(e).__name__}: {e}"[:200]
+            raise
+        finally:
+            span.duration_ms = (time.perf_counter() - started) * 1000
+            stack.pop()
+            self._submit(span)
+
+    def record(self, stage: str, seconds: float, device: Optional[str] = None, **fields) -> None:
+        """Add a stage that just finished (timed inline by the caller)"""
+        span = self._new_span(stage, device, fields) if self.enabled else None
+        if span is not None:
+            span.started_at -= seconds
+            span.duration_ms = seconds * 1000
+            self._submit(span)
+
+    def call(self, stage: str, function: Callable, args: tuple = (), kwargs: Optional[dict] = None,
+             device: Optional[str] = None, outcome: Optional[Callable[[Any], str]] = None):
+        """Run function inside a span; outcome from the result (truthy → ok) unless the body set one"""
+        kwargs = kwargs or {}
+        if not self.enabled:
+            return function(*args, **kwargs)
+        with self.span(stage, device=device) as span:
+            result = function(*args, **kwargs)
+            if span.outcome == 'ok':
+                span.outcome = outcome(result) if outcome else ('ok' if result else 'fail')
+            if isinstance(result, dict) and not span.bytes:
+                span.bytes = record_size(result)
+            return result
+
+    def traced(self, stage: str, outcome: Optional[Callable[[Any], str]] = None, device=None,
+               scan: bool = False):
+        """Decorator form of call(); see the module-level traced() for the arguments"""
+        def decorate(function):
+            resolve = _device_resolver(function, device, scan)
+
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                return self.call(stage, function, args, kwargs, resolve(args, kwargs), outcome)
+            return wrapper
+        return decorate
+
+    def wrap(self, function: Callable) -> Callable:
+        """Run function on another thread under the caller's current span"""
+        parent = self.current()
+        if parent is None:
+            return function
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            stack = self._stack()
+            stack.append(parent)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                stack.remove(parent)
+        return wrapper
+
+    # ---- batching writer ----
+
+    def _submit(self, span: Span) -> None:
+        if self._writer is None:
+            with self._lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write_loop, name='TraceWriter', daemon=True)
+                    self._writer.start()
+        self._queue.put(span)
+
+    def _write_loop(self) -> None:
+        batch: List[Span] = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if isinstance(item, Span):
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+                if len(batch) < self.batch_size:
+                    continue
+            if batch:
+                try:
+                    self.sink.write(batch)
+                    self.written += len(batch)
+                except Exception as e:
+                    self.dropped += len(batch)
+                    print(f"⚠️ Trace write failed ({len(batch)} spans dropped): {e}")
+                batch = []
+            deadline = None
+            if isinstance(item, threading.Event):
+                item.set()
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Block until every span recorded so far has been written"""
+        if self._writer is None:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+
+_default_tracer: Optional[CollectionTracer] = None
+_default_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> CollectionTracer:
+    """Process-wide tracer; COLLECTION_TRACE picks the sink (off, *.jsonl or a database path)"""
+    global _default_tracer
+    with _default_tracer_lock:
+        if _default_tracer is None:
+            target = os.environ.get('COLLECTION_TRACE', 'assets.db').strip()
+            sink = None if target.lower() in ('', 'off', '0', 'false', 'none') else sink_for(target)
+            _default_tracer = CollectionTracer(sink)
+            atexit.register(_default_tracer.flush, 5.0)
+        return _default_tracer
+
+
+def set_tracer(tracer: Optional[CollectionTracer]) -> None:
+    global _default_tracer
+    with _default_tracer_lock:
+        _default_tracer = tracer
+
+
+def _device_resolver(function: Callable, device, scan: bool) -> Callable[[tuple, dict], Optional[str]]:
+    """Turn traced(device=...) into a lookup on the call arguments"""
+    if scan:
+        return lambda args, kwargs: SCAN_DEVICE
+    if device is None:
+        return lambda args, kwargs: None
+    if callable(device):
+        return lambda args, kwargs: device(*args, **kwargs)
+    name, _, attribute = device.partition('.')
+    index = list(inspect.signature(function).parameters).index(name)
+
+    def resolve(args, kwargs):
+        value = kwargs.get(name, args[index] if index < len(args) else None)
+        if value is not None and attribute:
+            value = getattr(value, attribute, None)
+        return None if value is None else str(value)
+    return resolve
+
+
+def traced(stage: str, outcome: Optional[Callable[[Any], str]] = None, device=None, scan: bool = False):
+    """Decorator for collector functions and methods; resolves the process-wide tracer per call.
+
+    device: parameter name ('ip', 'task.ip') or callable(*args, **kwargs) giving the
+    device; without it the span nests under the current thread's span (or is skipped).
+    scan=True records a scan-level span (whole pipeline step).
+    """
+    def decorate(function):
+        resolve = _device_resolver(function, device, scan)
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            tracer = get_tracer()
+            if not tracer.enabled:
+                return function(*args, **kwargs)
+            return tracer.call(stage, function, args, kwargs, resolve(args, kwargs), outcome)
+        return wrapper
+    return decorate
+
+
+def record_span(stage: str, seconds: float, device: Optional[str] = None, **fields) -> None:
+    get_tracer().record(stage, seconds, device, **fields)
+
+
+def annotate(**fields) -> None:
+    """Set outcome / bytes / retries / detail on the current thread's span, if any"""
+    span = get_tracer().current()
+    if span is not None:
+        for name, value in fields.items():
+            setattr(span, name, value)
+
+
+# ----------------- Report -----------------
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(-(-fraction * len(sorted_values) // 1)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def critical_path(spans: List[Span]) -> List[Tuple[str, float]]:
+    """Chain of spans that determined when the device finished.
+
+    Starting from the top-level span that ended last, walk back through the
+    latest-ending sibling that finished before the current one started;
+    spans with children are expanded the same way.
+    """
+    children: Dict[Optional[str], List[Span]] = defaultdict(list)
+    ids = {s.span_id for s in spans}
+    for s in spans:
+        children[s.parent_id if s.parent_id in ids else None].append(s)
+
+    def chain(siblings: List[Span]) -> List[Span]:
+        path, limit = [], None
+        for s in sorted(siblings, key=lambda s: s.ended_at, reverse=True):
+            if limit is None or s.ended_at <= limit + 1e-6:
+                path.append(s)
+                limit = s.started_at
+        return list(reversed(path))
+
+    def expand(siblings: List[Span]) -> List[Tuple[str, float]]:
+        steps = []
+        for s in chain(siblings):
+            kids = children.get(s.span_id)
+            if kids:
+                inner = expand(kids)
+                covered = sum(ms for _, ms in inner)
+                steps.extend(inner)
+                if s.duration_ms - covered >= 1.0:
+                    steps.append((f"{s.stage} (self)", round(s.duration_ms - covered, 1)))
+            else:
+                steps.append((s.stage, round(s.duration_ms, 1)))
+        return steps
+    return expand(children[None])
+
+
+def trace_report(spans: Iterable[Span], top: int = 10) -> Dict[str, Any]:
+    """p50/p95/p99 per stage and the slowest devices with their critical path"""
+    by_stage: Dict[str, List[float]] = defaultdict(list)
+    by_trace: Dict[str, List[Span]] = defaultdict(list)
+    for span in spans:
+        by_stage[span.stage].append(span.duration_ms)
+        if span.device != SCAN_DEVICE:
+            by_trace[span.trace_id].append(span)
+
+    stages = {}
+    for stage, values in by_stage.items():
+        values.sort()
+        stages[stage] = {'count': len(values), 'p50_ms': round(percentile(values, 0.50), 1),
+                         'p95_ms': round(percentile(values, 0.95), 1), 'p99_ms': round(percentile(values, 0.99), 1),
+                         'max_ms': round(values[-1], 1), 'total_s': round(sum(values) / 1000, 2)}
+
+    devices = []
+    for trace_id, trace_spans in by_trace.items():
+        start = min(s.started_at for s in trace_spans)
+        end = max(s.ended_at for s in trace_spans)
+        busy = sum(s.duration_ms for s in trace_spans if s.parent_id is None)
+        devices.append({'device': trace_spans[0].device, 'trace_id': trace_id,
+                        'elapsed_ms': round((end - start) * 1000, 1), 'busy_ms': round(busy, 1),
+                        'spans': len(trace_spans),
+                        'outcomes': sorted({f"{s.stage}:{s.outcome}" for s in trace_spans if s.outcome != 'ok'}),
+                        'retries': sum(s.retries or 0 for s in trace_spans),
+                        'trace_spans': trace_spans})
+    devices.sort(key=lambda d: d['busy_ms'], reverse=True)
+    slowest = []
+    for device in devices[:top]:
+        device['critical_path'] = critical_path(device.pop('trace_spans'))
+        slowest.append(device)
+    return {'spans': sum(len(v) for v in by_stage.values()), 'devices': len(devices),
+            'stages': dict(sorted(stages.items(), key=lambda item: item[1]['total_s'], reverse=True)),
+            'slowest': slowest}
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"🧵 {report['spans']} spans across {report['devices']} devices")
+    print(f"\n{'stage':<28}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'total s':>10}")
+    for stage, s in report['stages'].items():
+        print(f"{stage:<28}{s['count']:>7}{s['p50_ms']:>10}{s['p95_ms']:>10}{s['p99_ms']:>10}"
+              f"{s['max_ms']:>10}{s['total_s']:>10}")
+    print(f"\n🐢 Slowest {len(report['slowest'])} devices")
+    for d in report['slowest']:
+        issues = f"  [{', '.join(d['outcomes'])}]" if d['outcomes'] else ''
+        print(f"   {d['device']:<18} {d['busy_ms'] / 1000:>8.2f}s  retries={d['retries']}{issues}")
+        print(f"      critical path: {' → '.join(f'{stage} {ms:.0f}ms' for stage, ms in d['critical_path'])}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Collection trace report")
+    parser.add_argument('command', choices=['report'])
+    parser.add_argument('--db', default='assets.db', help='database with collection_traces')
+    parser.add_argument('--jsonl', help='read a JSONL trace file instead of the database')
+    parser.add_argument('--scan', help="scan id ('all' for every retained scan; default: latest)")
+    parser.add_argument('--hours', type=float, help='only spans started in the last N hours')
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    args = parser.parse_args()
+
+    sink = JsonlTraceSink(args.jsonl) if args.jsonl else SqliteTraceSink(args.db)
+    scan_id = None if args.scan == 'all' else (args.scan or sink.latest_scan_id())
+    since = time.time() - args.hours * 3600 if args.hours else None
+    result = trace_report(sink.load(scan_id, since), top=args.top)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        if scan_id:
+            print(f"🔎 Scan {scan_id}")
+        print_report(result)
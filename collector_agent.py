@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+🛰️ COLLECTOR AGENT
+=================
+Headless collector node for remote sites. Claims scan_jobs leases from the
+central queue, collects locally (no WMI/SSH timeouts across the WAN) and
+uploads compact batched results:
+
+    python collector_agent.py --server http://central:5000 --agent-id branch-01
+    python collector_agent.py --db \\\\fileserver\\inventory\\assets.db --agent-id lab-02
+
+A heartbeat thread extends the lease while the job runs; if the lease is
+lost (agent stalled past the timeout and another agent took over) the job
+is abandoned without completing it.
+"""
+
+import json
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from collector_job_queue import LeaseLostError, ScanJobQueue
+from sharded_collection_executor import DEFAULT_COLLECT_FUNCTION, _resolve
+
+
+# ----------------- Transports -----------------
+
+class SQLiteQueueTransport:
+    """Agent shares the central SQLite file (same site / network share)"""
+
+    def __init__(self, db_path: str):
+        self.queue = ScanJobQueue(db_path)
+
+    def claim(self, agent_id, site, hostname, lease_seconds):
+        return self.queue.claim(agent_id, site, hostname, lease_seconds)
+
+    def heartbeat(self, agent_id, job_id=None, lease_token=None, lease_seconds=None):
+        return self.queue.heartbeat(agent_id, job_id, lease_token, lease_seconds)
+
+    def submit_results(self, agent_id, job_id, lease_token, batch_seq, devices):
+        return self.queue.submit_results(agent_id, job_id, lease_token, batch_seq, devices)
+
+    def complete(self, agent_id, job_id, lease_token, success=True, error=None):
+        return self.queue.complete(agent_id, job_id, lease_token, success, error)
+
+
+class HttpQueueTransport:
+    """Agent talks to register_collector_job_routes() on the central web service"""
+
+    def __init__(self, base_url: str, timeout: float = 30, retries: int = 3):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.retries = retries
+
+    def _post(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        body = json.dumps(payload).encode('utf-8')
+        last_error: Optional[Exception] = None
+        for attempt in range(self.retries):
+            request = urllib.request.Request(f"{self.base_url}{path}", data=body, method='POST',
+                                             headers={'Content-Type': 'application/json'})
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    return json.loads(response.read().decode('utf-8'))
+            except urllib.error.HTTPError as e:
+                if e.code == 409:
+                    raise LeaseLostError(json.loads(e.read().decode('utf-8')).get('error', 'lease lost'))
+                last_error = e
+            except (urllib.error.URLError, OSError) as e:
+                last_error = e
+            time.sleep(min(2 ** attempt, 10))  # uploads are idempotent, so retrying is safe
+        raise ConnectionError(f"Central service unreachable: {last_error}")
+
+    def claim(self, agent_id, site, hostname, lease_seconds):
+        return self._post(f"/api/collector/agents/{agent_id}/claim",
+                          {'site': site, 'hostname': hostname, 'lease_seconds': lease_seconds}).get('job')
+
+    def heartbeat(self, agent_id, job_id=None, lease_token=None, lease_seconds=None):
+        self._post(f"/api/collector/agents/{agent_id}/heartbeat",
+                   {'job_id': job_id, 'lease_token': lease_token, 'lease_seconds': lease_seconds})
+        return True
+
+    def submit_results(self, agent_id, job_id, lease_token, batch_seq, devices):
+        return self._post(f"/api/collector/jobs/{job_id}/results",
+                          {'agent_id': agent_id, 'lease_token': lease_token, 'batch_seq': batch_seq,
+                           'devices': devices})
+
+    def complete(self, agent_id, job_id, lease_token, success=True, error=None):
+        self._post(f"/api/collector/jobs/{job_id}/complete",
+                   {'agent_id': agent_id, 'lease_token': lease_token, 'success': success, 'error': error})
+        return True
+
+
+# ----------------- Agent -----------------
+
+def compact_device(device: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop empty values and nested structures before upload"""
+    return {k: v for k, v in device.items()
+            if v not in (None, '', 'Unknown', 'N/A') and not isinstance(v, (dict, list, tuple, set))}
+
+
+class CollectorAgent:
+    """🛰️ Claim → collect → upload batches → complete, with a lease heartbeat"""
+
+    def __init__(self, agent_id: str, transport, collect_function: str = DEFAULT_COLLECT_FUNCTION,
+                 options: Optional[Dict[str, Any]] = None, site: Optional[str] = None,
+                 threads: int = 16, upload_batch_size: int = 50, lease_seconds: float = 120,
+                 heartbeat_interval: Optional[float] = None, poll_interval: float = 5.0, log_callback=None):
+        self.agent_id = agent_id
+        self.transport = transport
+        self.collect = _resolve(collect_function)
+        self.options = options or {}
+        self.site = site
+        self.threads = threads
+        self.upload_batch_size = upload_batch_size
+        self.lease_seconds = lease_seconds
+        self.heartbeat_interval = heartbeat_interval or lease_seconds / 3
+        self.poll_interval = poll_interval
+        self.log_callback = log_callback or print
+        self.hostname = socket.gethostname()
+        self._stop = threading.Event()
+        self.stats = {'jobs_completed': 0, 'jobs_abandoned': 0, 'devices_uploaded': 0, 'duplicate_uploads': 0}
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def run_forever(self, max_idle_polls: Optional[int] = None) -> Dict[str, int]:
+        """Work until stopped (or until the queue stayed empty for max_idle_polls polls)"""
+        idle_polls = 0
+        while not self._stop.is_set():
+            try:
+                job = self.transport.claim(self.agent_id, self.site, self.hostname, self.lease_seconds)
+            except ConnectionError as e:
+                self.log_callback(f"⚠️ [{self.agent_id}] {e}")
+                job = None
+            if job is None:
+                idle_polls += 1
+                if max_idle_polls is not None and idle_polls >= max_idle_polls:
+                    break
+                self._stop.wait(self.poll_interval)
+                continue
+            idle_polls = 0
+            self.run_job(job)
+        return self.stats
+
+    def run_job(self, job: Dict[str, Any]) -> bool:
+        job_id, token = job['job_id'], job['lease_token']
+        lease_lost = threading.Event()
+        self.log_callback(f"🛰️ [{self.agent_id}] Job {job_id}: {len(job['targets'])} IPs (attempt {job['attempt']})")
+
+        def heartbeat_loop():
+            while not lease_lost.is_set() and not done.wait(self.heartbeat_interval):
+                try:
+                    self.transport.heartbeat(self.agent_id, job_id, token, self.lease_seconds)
+                except LeaseLostError:
+                    lease_lost.set()
+                except ConnectionError as e:
+                    self.log_callback(f"⚠️ [{self.agent_id}] Heartbeat failed: {e}")
+
+        done = threading.Event()
+        heartbeat = threading.Thread(target=heartbeat_loop, daemon=True, name=f"Heartbeat-{job_id}")
+        heartbeat.start()
+
+        pending: List[Dict[str, Any]] = []
+        batch_seq = 0
+        upload_lock = threading.Lock()
+
+        def upload(batch: List[Dict[str, Any]], seq: int) -> None:
+            outcome = self.transport.submit_results(self.agent_id, job_id, token, seq, batch)
+            if outcome.get('duplicate'):
+                self.stats['duplicate_uploads'] += 1
+            else:
+                self.stats['devices_uploaded'] += outcome.get('ingested', 0)
+
+        def collect_one(ip: str):
+            nonlocal batch_seq
+            if lease_lost.is_set() or self._stop.is_set():
+                return
+            try:
+                device = self.collect(ip, self.options)
+            except Exception as e:
+                self.log_callback(f"⚠️ [{self.agent_id}] {ip}: {e}")
+                return
+            if device is None:
+                return
+            device.setdefault('ip_address', ip)
+            device.setdefault('collection_method', f'agent:{self.agent_id}')
+            with upload_lock:
+                pending.append(compact_device(device))
+                if len(pending) < self.upload_batch_size:
+                    return
+                batch, seq = list(pending), batch_seq
+                pending.clear()
+                batch_seq += 1
+                upload(batch, seq)
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix=f"Agent-{self.agent_id}") as pool:
+                list(pool.map(collect_one, job['targets']))
+            if pending and not lease_lost.is_set():
+                upload(list(pending), batch_seq)
+            if lease_lost.is_set() or self._stop.is_set():
+                raise LeaseLostError(f"Job {job_id} abandoned")
+            self.transport.complete(self.agent_id, job_id, token, True)
+            self.stats['jobs_completed'] += 1
+            return True
+        except LeaseLostError as e:
+            self.stats['jobs_abandoned'] += 1
+            self.log_callback(f"⚠️ [{self.agent_id}] {e}")
+            return False
+        except Exception as e:
+            self.log_callback(f"❌ [{self.agent_id}] Job {job_id} failed: {e}")
+            try:
+                self.transport.complete(self.agent_id, job_id, token, False, str(e))
+            except Exception:
+                pass
+            return False
+        finally:
+            done.set()
+            heartbeat.join(5)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Headless collector agent")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--server', help="Central web service URL, e.g. http://10.0.0.5:5000")
+    source.add_argument('--db', help="Path to a shared assets.db queue")
+    parser.add_argument('--agent-id', default=socket.gethostname())
+    parser.add_argument('--site')
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--collect-function', default=DEFAULT_COLLECT_FUNCTION)
+    parser.add_argument('--credentials', help="JSON file with win_creds / linux_creds / snmp_v2c")
+    args = parser.parse_args()
+
+    agent_options = {}
+    if args.credentials:
+        with open(args.credentials, 'r', encoding='utf-8') as f:
+            agent_options = json.load(f)
+
+    agent_transport = HttpQueueTransport(args.server) if args.server else SQLiteQueueTransport(args.db)
+    agent = CollectorAgent(args.agent_id, agent_transport, args.collect_function, agent_options,
+                           site=args.site, threads=args.threads)
+    print(f"🛰️ Collector agent {args.agent_id} started")
+    try:
+        agent.run_forever()
+    except KeyboardInterrupt:
+        agent.stop()
+    print(f"🛑 Collector agent stopped: {agent.stats}")
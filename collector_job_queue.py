@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+📬 CENTRAL COLLECTOR JOB QUEUE
+=============================
+Work queue for distributed collector agents (collector_agent.py):
+
+- scan_jobs: subnet / IP batches that agents lease, with lease timeout,
+  heartbeat extension and a fencing token per lease
+- collector_agents: registry of agents and their last heartbeat
+- scan_job_uploads: idempotency keys so retried uploads never double-ingest
+- Result ingestion upserts into assets in the same transaction as the key
+
+Agents talk to it directly (shared SQLite file) or over HTTP through
+register_collector_job_routes() on the central web service.
+"""
+
+import json
+import sqlite3
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from metrics_registry import observe_db_write
+from rescan_planner import expand_scan_targets
+from sharded_collection_executor import AssetBatchWriter
+
+
+class LeaseLostError(Exception):
+    """The caller no longer holds the lease (expired and re-claimed, or job finished)"""
+
+
+class ScanJobQueue:
+    """SQLite-backed lease queue; every mutation is a short IMMEDIATE transaction"""
+
+    def __init__(self, db_path: str = 'assets.db', lease_seconds: float = 120,
+                 max_attempts: int = 3, agent_timeout_seconds: float = 90):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.agent_timeout_seconds = agent_timeout_seconds
+        self.writer = AssetBatchWriter(db_path)
+        with self._connect() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS scan_jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    job_key TEXT UNIQUE,
+                    targets TEXT NOT NULL,
+                    site TEXT,
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    lease_owner TEXT,
+                    lease_token TEXT,
+                    lease_expires_at REAL,
+                    attempts INTEGER DEFAULT 0,
+                    max_attempts INTEGER DEFAULT 3,
+                    devices_ingested INTEGER DEFAULT 0,
+                    error TEXT,
+                    created_at TEXT,
+                    updated_at TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_scan_jobs_status ON scan_jobs(status, lease_expires_at);
+                CREATE TABLE IF NOT EXISTS collector_agents (
+                    agent_id TEXT PRIMARY KEY,
+                    hostname TEXT,
+                    site TEXT,
+                    current_job INTEGER,
+                    jobs_completed INTEGER DEFAULT 0,
+                    devices_uploaded INTEGER DEFAULT 0,
+                    first_seen TEXT,
+                    last_heartbeat REAL
+                );
+                CREATE TABLE IF NOT EXISTS scan_job_uploads (
+                    job_id INTEGER NOT NULL,
+                    lease_token TEXT NOT NULL,
+                    batch_seq INTEGER NOT NULL,
+                    devices INTEGER,
+                    received_at TEXT,
+                    PRIMARY KEY (job_id, lease_token, batch_seq)
+                );
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _transaction(self):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        return conn
+
+    @staticmethod
+    def _now_iso() -> str:
+        return datetime.now().isoformat()
+
+    # ----------------- Enqueue -----------------
+
+    def enqueue(self, targets: Iterable[str], batch_size: int = 64, site: Optional[str] = None,
+                job_key: Optional[str] = None) -> List[int]:
+        """Split targets into IP batches and queue one job per batch (job_key dedupes re-submits)"""
+        ips = expand_scan_targets(targets)
+        batches = [ips[i:i + batch_size] for i in range(0, len(ips), batch_size)]
+        job_ids = []
+        conn = self._transaction()
+        try:
+            for index, batch in enumerate(batches):
+                key = f"{job_key}:{index}" if job_key else None
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO scan_jobs (job_key, targets, site, max_attempts, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, json.dumps(batch), site, self.max_attempts, self._now_iso(), self._now_iso()))
+                if cursor.rowcount:
+                    job_ids.append(cursor.lastrowid)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return job_ids
+
+    # ----------------- Agent protocol -----------------
+
+    def _touch_agent(self, conn, agent_id: str, hostname: Optional[str] = None, site: Optional[str] = None,
+                     current_job: Any = ...) -> None:
+        conn.execute("INSERT OR IGNORE INTO collector_agents (agent_id, first_seen) VALUES (?, ?)",
+                     (agent_id, self._now_iso()))
+        conn.execute("UPDATE collector_agents SET last_heartbeat = ?, hostname = COALESCE(?, hostname), "
+                     "site = COALESCE(?, site) WHERE agent_id = ?", (time.time(), hostname, site, agent_id))
+        if current_job is not ...:
+            conn.execute("UPDATE collector_agents SET current_job = ? WHERE agent_id = ?", (current_job, agent_id))
+
+    def claim(self, agent_id: str, site: Optional[str] = None, hostname: Optional[str] = None,
+              lease_seconds: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Lease the oldest queued (or lease-expired) job; None when the queue is empty"""
+        lease_seconds = lease_seconds or self.lease_seconds
+        now = time.time()
+        conn = self._transaction()
+        try:
+            # Expired leases: back to the queue, or failed once attempts are used up
+            conn.execute("UPDATE scan_jobs SET status = 'failed', error = 'lease expired too many times', "
+                         "lease_owner = NULL, lease_token = NULL, updated_at = ? "
+                         "WHERE status = 'leased' AND lease_expires_at < ? AND attempts >= max_attempts",
+                         (self._now_iso(), now))
+            conn.execute("UPDATE scan_jobs SET status = 'queued', lease_owner = NULL, lease_token = NULL, "
+                         "updated_at = ? WHERE status = 'leased' AND lease_expires_at < ?",
+                         (self._now_iso(), now))
+            site_clause, params = ("AND (site IS NULL OR site = ?)", [site]) if site else ("", [])
+            row = conn.execute(f"SELECT id, targets, attempts FROM scan_jobs WHERE status = 'queued' {site_clause} "
+                               f"ORDER BY id LIMIT 1", params).fetchone()
+            self._touch_agent(conn, agent_id, hostname, site, current_job=row['id'] if row else None)
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            token = uuid.uuid4().hex
+            conn.execute("UPDATE scan_jobs SET status = 'leased', lease_owner = ?, lease_token = ?, "
+                         "lease_expires_at = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                         (agent_id, token, now + lease_seconds, self._now_iso(), row['id']))
+            conn.execute("COMMIT")
+            return {'job_id': row['id'], 'lease_token': token, 'targets': json.loads(row['targets']),
+                    'lease_seconds': lease_seconds, 'attempt': row['attempts'] + 1}
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _check_lease(self, conn, job_id: int, lease_token: str) -> sqlite3.Row:
+        row = conn.execute("SELECT * FROM scan_jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None or row['status'] != 'leased' or row['lease_token'] != lease_token:
+            raise LeaseLostError(f"Lease on job {job_id} is no longer held")
+        if row['lease_expires_at'] < time.time():
+            raise LeaseLostError(f"Lease on job {job_id} expired")
+        return row
+
+    def heartbeat(self, agent_id: str, job_id: Optional[int] = None, lease_token: Optional[str] = None,
+                  lease_seconds: Optional[float] = None) -> bool:
+        """Agent liveness; with a job, also extends that job's lease"""
+        conn = self._transaction()
+        try:
+            if job_id is not None:
+                self._check_lease(conn, job_id, lease_token)
+                conn.execute("UPDATE scan_jobs SET lease_expires_at = ?, updated_at = ? WHERE id = ?",
+                             (time.time() + (lease_seconds or self.lease_seconds), self._now_iso(), job_id))
+            self._touch_agent(conn, agent_id)
+            conn.execute("COMMIT")
+            return True
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def submit_results(self, agent_id: str, job_id: int, lease_token: str, batch_seq: int,
+                       devices: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Ingest one uploaded batch; re-sending the same (job, lease, seq) is a no-op"""
+        started = time.perf_counter()
+        conn = self._transaction()
+        try:
+            self._check_lease(conn, job_id, lease_token)
+            inserted = conn.execute(
+                "INSERT OR IGNORE INTO scan_job_uploads (job_id, lease_token, batch_seq, devices, received_at) "
+                "VALUES (?, ?, ?, ?, ?)", (job_id, lease_token, batch_seq, len(devices), self._now_iso())).rowcount
+            ingested = 0
+            if inserted:
+                ingested = self.writer.upsert(conn, devices)
+                conn.execute("UPDATE scan_jobs SET devices_ingested = devices_ingested + ? WHERE id = ?",
+                             (ingested, job_id))
+                conn.execute("UPDATE collector_agents SET devices_uploaded = devices_uploaded + ? "
+                             "WHERE agent_id = ?", (ingested, agent_id))
+            self._touch_agent(conn, agent_id)
+            conn.execute("COMMIT")
+            if inserted:
+                observe_db_write('collector_job_queue', ingested, time.perf_counter() - started)
+            return {'accepted': True, 'duplicate': not inserted, 'ingested': ingested}
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def complete(self, agent_id: str, job_id: int, lease_token: str, success: bool = True,
+                 error: Optional[str] = None) -> bool:
+        conn = self._transaction()
+        try:
+            row = self._check_lease(conn, job_id, lease_token)
+            if success:
+                status = 'completed'
+            else:
+                status = 'failed' if row['attempts'] >= row['max_attempts'] else 'queued'
+            conn.execute("UPDATE scan_jobs SET status = ?, error = ?, lease_owner = NULL, lease_token = NULL, "
+                         "lease_expires_at = NULL, updated_at = ? WHERE id = ?",
+                         (status, error, self._now_iso(), job_id))
+            if success:
+                conn.execute("UPDATE collector_agents SET jobs_completed = jobs_completed + 1 WHERE agent_id = ?",
+                             (agent_id,))
+            self._touch_agent(conn, agent_id, current_job=None)
+            conn.execute("COMMIT")
+            return True
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    # ----------------- Status -----------------
+
+    def job_status(self) -> Dict[str, Any]:
+        with self._connect() as conn:
+            counts = {row['status']: row['n'] for row in
+                      conn.execute("SELECT status, COUNT(*) AS n FROM scan_jobs GROUP BY status")}
+            leased = [dict(row) for row in conn.execute(
+                "SELECT id, lease_owner, lease_expires_at, attempts, devices_ingested FROM scan_jobs "
+                "WHERE status = 'leased' ORDER BY id")]
+            ingested = conn.execute("SELECT COALESCE(SUM(devices_ingested), 0) FROM scan_jobs").fetchone()[0]
+        return {'counts': counts, 'leased': leased, 'devices_ingested': ingested}
+
+    def job(self, job_id: int) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM scan_jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['targets'] = json.loads(job['targets'])
+        job.pop('lease_token', None)
+        return job
+
+    def agents(self) -> List[Dict[str, Any]]:
+        now = time.time()
+        with self._connect() as conn:
+            rows = [dict(row) for row in conn.execute("SELECT * FROM collector_agents ORDER BY agent_id")]
+        for agent in rows:
+            agent['online'] = bool(agent['last_heartbeat'] and now - agent['last_heartbeat'] < self.agent_timeout_seconds)
+        return rows
+
+
+# ----------------- HTTP API -----------------
+
+def register_collector_job_routes(app, job_queue: ScanJobQueue, url_prefix: str = '/api/collector',
+                                  decorator: Optional[Callable] = None):
+    """Agent protocol and status endpoints on a Flask app"""
+    from flask import jsonify, request
+
+    def route(rule, **options):
+        def register(view):
+            return app.route(rule, **options)(decorator(view) if decorator else view)
+        return register
+
+    def lease_lost(e):
+        return jsonify({'success': False, 'error': str(e), 'code': 'LEASE_LOST'}), 409
+
+    @route(f'{url_prefix}/jobs', methods=['GET', 'POST'], endpoint='collector_jobs')
+    def collector_jobs():
+        if request.method == 'POST':
+            data = request.get_json(force=True) or {}
+            job_ids = job_queue.enqueue(data.get('targets', []), int(data.get('batch_size', 64)),
+                                        data.get('site'), data.get('job_key'))
+            return jsonify({'success': True, 'job_ids': job_ids})
+        return jsonify({'success': True, **job_queue.job_status()})
+
+    @route(f'{url_prefix}/jobs/<int:job_id>', endpoint='collector_job_detail')
+    def collector_job_detail(job_id):
+        job = job_queue.job(job_id)
+        if job is None:
+            return jsonify({'success': False, 'error': 'Job not found'}), 404
+        return jsonify({'success': True, 'job': job})
+
+    @route(f'{url_prefix}/agents', endpoint='collector_agents')
+    def collector_agents():
+        return jsonify({'success': True, 'agents': job_queue.agents()})
+
+    @route(f'{url_prefix}/agents/<agent_id>/claim', methods=['POST'], endpoint='collector_claim')
+    def collector_claim(agent_id):
+        data = request.get_json(silent=True) or {}
+        job = job_queue.claim(agent_id, data.get('site'), data.get('hostname'), data.get('lease_seconds'))
+        return jsonify({'success': True, 'job': job})
+
+    @route(f'{url_prefix}/agents/<agent_id>/heartbeat', methods=['POST'], endpoint='collector_heartbeat')
+    def collector_heartbeat(agent_id):
+        data = request.get_json(silent=True) or {}
+        try:
+            job_queue.heartbeat(agent_id, data.get('job_id'), data.get('lease_token'), data.get('lease_seconds'))
+        except LeaseLostError as e:
+            return lease_lost(e)
+        return jsonify({'success': True})
+
+    @route(f'{url_prefix}/jobs/<int:job_id>/results', methods=['POST'], endpoint='collector_results')
+    def collector_results(job_id):
+        data = request.get_json(force=True) or {}
+        try:
+            outcome = job_queue.submit_results(data['agent_id'], job_id, data['lease_token'],
+                                               int(data['batch_seq']), data.get('devices', []))
+        except LeaseLostError as e:
+            return lease_lost(e)
+        return jsonify({'success': True, **outcome})
+
+    @route(f'{url_prefix}/jobs/<int:job_id>/complete', methods=['POST'], endpoint='collector_complete')
+    def collector_complete(job_id):
+        data = request.get_json(force=True) or {}
+        try:
+            job_queue.complete(data['agent_id'], job_id, data['lease_token'],
+                               bool(data.get('success', True)), data.get('error'))
+        except LeaseLostError as e:
+            return lease_lost(e)
+        return jsonify({'success': True})
+
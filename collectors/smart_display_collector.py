@@ -18,22 +18,80 @@ that don't require authentication (LG, Samsung, JAC, etc.)
 import ipaddress  # For IP validation
 import requests
 import socket
-import nmap
 import logging
 from datetime import datetime
 
+try:
+    import nmap
+    NMAP_AVAILABLE = True
+except ImportError:
+    NMAP_AVAILABLE = False
+
+try:
+    from passive_discovery import PassiveDiscovery
+    PASSIVE_DISCOVERY_AVAILABLE = True
+except ImportError:
+    PASSIVE_DISCOVERY_AVAILABLE = False
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def local_networks():
+    """IPv4 networks on this host's interfaces - the only segments SSDP/mDNS reach"""
+    networks = []
+    if not PSUTIL_AVAILABLE:
+        return networks
+    for addresses in psutil.net_if_addrs().values():
+        for addr in addresses:
+            if addr.family == socket.AF_INET and addr.netmask:
+                networks.append(ipaddress.ip_interface(f"{addr.address}/{addr.netmask}").network)
+    return networks
+
 class SmartDisplayCollector:
     def __init__(self):
         self.timeout = 3
         self.session = requests.Session()
         self.session.timeout = self.timeout
         
-    def discover_displays(self, network_range="192.168.1.0/24"):
-        """Discover smart displays and TVs on the network"""
+    def discover_displays(self, network_range="192.168.1.0/24", passive=True):
+        """
+        Discover smart displays and TVs on the network: passive listening on a
+        local segment, the active nmap sweep for routed ranges or when nothing
+        answered the passive queries
+        """
+        if passive and PASSIVE_DISCOVERY_AVAILABLE:
+            if self.is_local_segment(network_range):
+                displays = self.discover_displays_passive(network_range)
+                if displays:
+                    return displays
+                logger.info(f"📡 No passive responders on {network_range} - falling back to the active sweep")
+            else:
+                logger.info(f"📡 {network_range} is not on a local interface - using the active sweep")
+        return self.discover_displays_active(network_range)
+    
+    def is_local_segment(self, network_range):
+        """True when network_range overlaps a local interface (or the interfaces are unknown)"""
+        try:
+            network = ipaddress.ip_network(network_range, strict=False)
+        except ValueError:
+            return False
+        local = local_networks()
+        if not local:
+            return True  # can't tell - listen, and the empty-result fallback covers a routed range
+        return any(network.version == segment.version and network.overlaps(segment) for segment in local)
+    
+    def discover_displays_active(self, network_range="192.168.1.0/24"):
+        """nmap sweep of the display ports across the whole range"""
+        if not NMAP_AVAILABLE:
+            logger.error("❌ python-nmap not installed - active display sweep unavailable")
+            return []
         logger.info(f"🔍 Scanning for smart displays on {network_range}")
         
         nm = nmap.PortScanner()
@@ -58,6 +116,66 @@ class SmartDisplayCollector:
             logger.error(f"❌ Network scan failed: {e}")
             return []
     
+    def discover_displays_passive(self, network_range="192.168.1.0/24", listen_time=3.0, discovery=None):
+        """
+        One SSDP / mDNS / NetBIOS query per segment instead of probing every host;
+        only displays that answered get the vendor-specific checks
+        """
+        logger.info(f"📡 Listening for smart displays on {network_range}")
+        discovery = discovery or PassiveDiscovery(listen_time=listen_time)
+        hosts = discovery.discover(network_range)
+        discovery.enrich(hosts, timeout=self.timeout)
+        
+        displays = []
+        for host in hosts.values():
+            if host.device_class != 'display':
+                continue
+            device_info = self.identify_passive_display(host)
+            displays.append(device_info)
+            logger.info(f"✅ Found display: {host.ip} - {device_info.get('model', 'Unknown')}")
+        
+        return displays
+    
+    def identify_passive_display(self, host):
+        """Build the display record from a passive responder, probing only its own vendor"""
+        device_info = {
+            'ip_address': host.ip,
+            'device_type': 'display',
+            'hostname': host.hostname or host.ip,
+            'ports': sorted(host.ports),
+            'services': sorted(host.services),
+            'collection_method': 'passive_discovery',
+            'data_source': 'SmartDisplayCollector',
+            'last_updated': datetime.now().isoformat()
+        }
+        device_info.update({key: value for key, value in host.to_asset().items()
+                            if key not in ('device_type', 'model_vendor', 'hostname')})
+        
+        vendor = host.vendor
+        if vendor == 'LG':
+            display_type = "LG Smart TV"
+            if not host.model:
+                device_info.update(self.check_lg_tv(host.ip) or {})
+        elif vendor == 'Samsung':
+            display_type = "Samsung Smart TV"
+            if not host.model:
+                device_info.update(self.check_samsung_tv(host.ip) or {})
+        elif vendor:
+            display_type = f"{vendor} Smart Display"
+        elif 'ssdp' in host.protocols:
+            display_type = "UPnP Device"
+        else:
+            display_type = "Smart Display"
+        
+        if host.description.get('presentationURL', '').startswith('http'):
+            device_info['web_interface'] = host.description['presentationURL']
+        if host.upnp_location():
+            device_info['upnp_location'] = host.upnp_location()
+        
+        device_info['device_type'] = display_type.lower().replace(' ', '_')
+        device_info['model_vendor'] = display_type
+        return device_info
+    
     def identify_display(self, ip, nmap_data):
         """Identify if device is a smart display/TV and collect info"""
         device_info = {
@@ -399,8 +517,11 @@ def main():
     
     collector = SmartDisplayCollector()
     
-    if len(sys.argv) > 1:
-        network_range = sys.argv[1]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    passive = '--active' not in sys.argv
+    
+    if args:
+        network_range = args[0]
     else:
         network_range = "192.168.1.0/24"
     
@@ -409,7 +530,7 @@ def main():
     print("=" * 50)
     
     # Discover displays
-    displays = collector.discover_displays(network_range)
+    displays = collector.discover_displays(network_range, passive=passive)
     
     if not displays:
         print("❌ No smart displays found")
@@ -25,6 +25,9 @@ from __future__ import annotations
 import logging
 from typing import Optional, Dict, Any, Iterable, List, Tuple
 from utils.identity import valid_serial
+from device_rule_engine import infer_infra_from_sysdescr
+from collection_tracing import traced
+from metrics_registry import timed_probe
 
 _PYSNMP_OK = False
 _SNMP_BACKEND = "none"
@@ -219,19 +222,8 @@ def _coerce_snmp_value(v) -> Any:
             return None
 
 def _infer_infra(sys_descr: str) -> str:
-    s = (sys_descr or "").lower()
-    # Simple heuristics
-    if "vmware" in s or "esxi" in s or "hypervisor" in s:
-        return "Hypervisor"
-    if "cisco" in s or "router" in s or "switch" in s or "ios" in s or "nx-os" in s:
-        return "Network"
-    if "forti" in s or "palo alto" in s or "sonicwall" in s or "checkpoint" in s:
-        return "Firewall"
-    if "printer" in s or "hp laserjet" in s or "epson" in s or "canon" in s or "ricoh" in s or "brother" in s:
-        return "Printer"
-    if "access point" in s or "wlan" in s or "wireless" in s or "ap " in s:
-        return "Network"
-    return "Network"  # default for non-Windows/Linux devices
+    # Simple heuristics (device_rule_engine.RULESETS['snmp_descr']), "Network" by default
+    return infer_infra_from_sysdescr(sys_descr)
 
 def _parse_manufacturer(sys_descr: str) -> str:
     s = (sys_descr or "").lower()
@@ -297,6 +289,8 @@ def _first_non_empty_serial(ent_walk: Dict[str, Any]) -> str:
     # fallback: return first non-empty anyway
     return candidates[0] if candidates else ""
 
+@traced('snmp')
+@timed_probe('snmp')
 def snmp_collect_basic(
     ip: str,
     *,
@@ -22,6 +22,8 @@ import time
 from typing import Optional, Dict, Any, Tuple, List
 import paramiko
 
+from metrics_registry import timed_probe
+
 log = logging.getLogger(__name__)
 
 # ---------- helpers ----------
@@ -451,6 +453,7 @@ def _collect_huawei(client) -> Dict[str, Any]:
 
 # ---------- main entry ----------
 
+@timed_probe('ssh')
 def collect_linux_or_esxi_ssh(
     ip,
     username,
@@ -224,45 +224,30 @@ def ensure_workbook_tabs(path: str) -> str|None:
     return path
 
 def _append_row(path: str|None, sheet: str, headers: List[str], data: Dict[str,str]) -> None:
-    """Database-only mode - Insert data directly to SQLite"""
+    """Database-only mode - upsert into SQLite (matched on Hostname + IP like the bulk import)"""
+    from bulk_operations import AssetBulkWriter
+
+    # Map common fields to database columns
+    asset_data = {
+        'hostname': data.get('Hostname', ''),
+        'ip_address': data.get('IP Address', ''),
+        'working_user': data.get('Working User', ''),
+        'device_model': data.get('Model/Vendor', data.get('Model', '')),
+        'classification': sheet,
+        'data_source': data.get('Data Source', 'Manual'),
+        'created_by': data.get('Created By', ''),
+        'updated_by': data.get('Last Updated By', ''),
+        'department': data.get('Department', ''),
+        'status': data.get('Status', 'Active'),
+        'notes': data.get('Notes', ''),
+        'device_type': sheet
+    }
     try:
-        import sqlite3
-        conn = sqlite3.connect('assets.db')
-        cursor = conn.cursor()
-        
-        # Map common fields to database columns
-        asset_data = {
-            'hostname': data.get('Hostname', ''),
-            'ip_address': data.get('IP Address', ''),
-            'working_user': data.get('Working User', ''),
-            'device_model': data.get('Model/Vendor', data.get('Model', '')),
-            'classification': sheet,
-            'data_source': data.get('Data Source', 'Manual'),
-            'created_by': data.get('Created By', ''),
-            'updated_by': data.get('Last Updated By', ''),
-            'department': data.get('Department', ''),
-            'status': data.get('Status', 'Active'),
-            'notes': data.get('Notes', ''),
-            'device_type': sheet
-        }
-        
-        cursor.execute('''
-            INSERT OR REPLACE INTO assets (
-                hostname, ip_address, working_user, device_model, classification,
-                data_source, created_by, updated_by, department, status, notes, device_type
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            asset_data['hostname'], asset_data['ip_address'], asset_data['working_user'],
-            asset_data['device_model'], asset_data['classification'], asset_data['data_source'],
-            asset_data['created_by'], asset_data['updated_by'], asset_data['department'],
-            asset_data['status'], asset_data['notes'], asset_data['device_type']
-        ))
-        
-        conn.commit()
-        conn.close()
-        
+        result = AssetBulkWriter('assets.db').upsert([asset_data])
     except Exception as e:
         raise RuntimeError(f"Database operation failed: {e}")
+    if result.failed:
+        raise RuntimeError(f"Database operation failed: {result.results[0].get('error')}")
 
 def _update_row(path: str|None, sheet: str, row_ix: int, headers: List[str], data: Dict[str,str]) -> None:
     """Database-only mode - Update asset by hostname"""
@@ -755,8 +740,9 @@ class AddNetworkDeviceDialog(QDialog):
         btns = QHBoxLayout()
         self.btn_edit = QPushButton("Edit Selected", tab); self.btn_edit.clicked.connect(self._on_edit_selected)
         self.btn_del = QPushButton("Delete Selected", tab); self.btn_del.clicked.connect(self._on_delete_selected)
+        self.btn_import = QPushButton("Import CSV/XLSX…", tab); self.btn_import.clicked.connect(self._on_import_file)
         self.btn_close = QPushButton("Close", tab); self.btn_close.clicked.connect(self.reject)
-        btns.addStretch(1); btns.addWidget(self.btn_edit); btns.addWidget(self.btn_del); btns.addWidget(self.btn_close)
+        btns.addStretch(1); btns.addWidget(self.btn_import); btns.addWidget(self.btn_edit); btns.addWidget(self.btn_del); btns.addWidget(self.btn_close)
         lay.addLayout(btns)
 
         self.tabs.addTab(tab, "Manage Devices")
@@ -976,6 +962,26 @@ class AddNetworkDeviceDialog(QDialog):
         except RuntimeError as e:
             QMessageBox.critical(self,"Excel Error",str(e))
 
+    def _on_import_file(self):
+        """Upsert every row of a CSV / XLSX device list in one transaction"""
+        path, _ = QFileDialog.getOpenFileName(self, "Import devices", os.getcwd(), "Device lists (*.csv *.xlsx)")
+        if not path:
+            return
+        try:
+            from bulk_operations import AssetBulkWriter
+            result = AssetBulkWriter('assets.db').import_file(
+                path, defaults={'device_type': self._sheet(), 'data_source': 'Manual Import'})
+        except Exception as e:
+            QMessageBox.critical(self, "Import Error", f"Failed to import devices: {e}")
+            return
+        counts = result.counts
+        message = (f"Inserted {counts.get('inserted', 0)}, updated {counts.get('updated', 0)}, "
+                   f"failed {result.failed} of {len(result.results)} rows.")
+        if result.ignored_columns:
+            message += f"\nIgnored columns: {', '.join(result.ignored_columns)}"
+        QMessageBox.information(self, "Import Complete", message)
+        self._refresh_table()
+
     # --- Common ---
     def _pick_excel(self):
         # Database-only mode - workbook selection disabled
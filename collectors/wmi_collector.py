@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*-
-"""
+r"""
 WMI Collector Module (hardened + schema-aligned)
 -----------------------------------------------
 Public API:
@@ -59,6 +59,7 @@ except Exception as e:  # pragma: no cover
 
 from utils.helpers import safe_first, normalize_mac
 from utils.identity import valid_serial
+from metrics_registry import timed_probe
 
 # -------- Helpers / Constants -------- #
 
@@ -134,7 +135,7 @@ def _open_wmi_connection(
     if username:
         kwargs["user"] = username
     if password:
-        kwargs["PLACEHOLDER_PASS"  # SECURITY: Replace with secure credential] = password
+        kwargs["password"] = password
     return wmi.WMI(**kwargs)
 
 # -------- Core Collectors -------- #
@@ -404,6 +405,7 @@ def _collect_gpu_monitors(conn) -> Dict[str, Any]:
 
 # -------- Public API -------- #
 
+@timed_probe('wmi')
 def collect_windows_wmi(
     ip: Optional[str] = None,
     username: Optional[str] = None,
@@ -17,6 +17,9 @@ import ipaddress
 from datetime import datetime
 import functools
 
+from field_projection import (FieldSet, ProjectionError, projected_response, projection_error_response,
+                              requested_format, requested_projection)
+
 # Import enhanced access control system
 try:
     from enhanced_access_control_system import (
@@ -34,6 +37,49 @@ except ImportError:
     ACCESS_CONTROL_ENABLED = False
     print("[WARNING] Enhanced Access Control System not available - using basic security")
 
+# Scheduler status/control endpoints (scheduler runs in-process when started)
+try:
+    from scan_scheduler_service import get_scheduler_service, register_scheduler_routes
+    SCAN_SCHEDULER_AVAILABLE = True
+except ImportError:
+    SCAN_SCHEDULER_AVAILABLE = False
+
+# Distributed collector agents: job leases, result upload, job/agent status
+try:
+    from collector_job_queue import ScanJobQueue, register_collector_job_routes
+    COLLECTOR_JOBS_AVAILABLE = True
+except ImportError:
+    COLLECTOR_JOBS_AVAILABLE = False
+
+# Prometheus /metrics endpoint and per-endpoint request latency
+try:
+    from metrics_registry import install_flask_metrics
+    METRICS_AVAILABLE = True
+except ImportError:
+    METRICS_AVAILABLE = False
+
+# Production serving: inline templates compiled once, gunicorn / waitress workers
+try:
+    from wsgi_serving import render_inline, run_app
+    WSGI_SERVING_AVAILABLE = True
+except ImportError:
+    render_inline = render_template_string
+    WSGI_SERVING_AVAILABLE = False
+
+# JSON responses cached until the database changes, with ETags and gzip/brotli
+try:
+    from response_cache import install_response_cache
+    RESPONSE_CACHE_AVAILABLE = True
+except ImportError:
+    RESPONSE_CACHE_AVAILABLE = False
+
+# POST /api/assets/bulk: batched update / assign / status / delete / upsert / CSV-XLSX import
+try:
+    from bulk_operations import AssetBulkWriter, register_bulk_routes
+    BULK_OPERATIONS_AVAILABLE = True
+except ImportError:
+    BULK_OPERATIONS_AVAILABLE = False
+
 # Setup logging for web service access
 logging.basicConfig(
     level=logging.INFO,
@@ -45,6 +91,37 @@ logging.basicConfig(
 )
 logger = logging.getLogger('WebService')
 
+# /api/devices fields, in response order; ?fields=dashboard is what the dashboard table shows
+DEVICE_FIELDS = FieldSet({
+    'id': 'id',
+    'hostname': "COALESCE(NULLIF(hostname, ''), 'Unknown')",
+    'ip_address': 'ip_address',
+    'user': 'working_user',
+    'classification': "COALESCE(NULLIF(classification, ''), 'Unknown')",
+    'department': "COALESCE(NULLIF(department, ''), 'Unknown')",
+    'status': "COALESCE(NULLIF(status, ''), 'Unknown')",
+    'data_source': 'data_source',
+    'created_at': 'created_at',
+    'last_updated': 'last_updated',
+    'os_name': 'os_name',
+    'os_version': 'os_version',
+    'manufacturer': "COALESCE(NULLIF(manufacturer, ''), 'Unknown')",
+    'model': 'model',
+    'serial_number': 'serial_number',
+    'mac_address': 'mac_address',
+    'cpu_info': 'cpu_info',
+    'memory_gb': 'memory_gb',
+    'storage_info': 'storage_info',
+    'vendor': 'vendor',
+    'ping_status': "COALESCE(NULLIF(ping_status, ''), 'Unknown')",
+    'last_ping': 'last_ping',
+    'collection_method': 'collection_method',
+    'domain': 'domain',
+    'notes': 'notes',
+}, presets={'dashboard': ['id', 'hostname', 'manufacturer', 'model', 'user', 'domain', 'ip_address', 'mac_address',
+                          'classification', 'department', 'cpu_info', 'memory_gb', 'storage_info', 'os_name',
+                          'os_version', 'status', 'ping_status']})
+
 def log_access(f):
     """Decorator to log web service access"""
     @functools.wraps(f)
@@ -142,7 +219,13 @@ class CompleteDepartmentWebService:
                 }), 500
             return f(*args, **kwargs)
         return decorated_function
-    
+
+    def cached(self, max_age=None):
+        """Response cache decorator; goes below require_access so cache hits are still checked"""
+        if self.response_cache is None:
+            return lambda view: view
+        return self.response_cache.cached(max_age=max_age)
+
     def init_departments(self):
         """Initialize departments table if it doesn't exist"""
         try:
@@ -192,40 +275,61 @@ class CompleteDepartmentWebService:
     def setup_routes(self):
         """Setup all Flask routes"""
         
+        if SCAN_SCHEDULER_AVAILABLE:
+            register_scheduler_routes(self.app, get_scheduler_service,
+                                      decorator=lambda view: log_access(self.require_access(view)))
+        
+        if COLLECTOR_JOBS_AVAILABLE:
+            self.job_queue = ScanJobQueue(self.db_path)
+            register_collector_job_routes(self.app, self.job_queue,
+                                          decorator=lambda view: log_access(self.require_access(view)))
+        
+        if METRICS_AVAILABLE:
+            install_flask_metrics(self.app, service='department_web', decorator=self.require_access)
+        
+        self.response_cache = None
+        if RESPONSE_CACHE_AVAILABLE:
+            self.response_cache = install_response_cache(self.app, self.db_path, service='department_web',
+                                                         decorator=self.require_access)
+        
+        if BULK_OPERATIONS_AVAILABLE:
+            register_bulk_routes(self.app, AssetBulkWriter(self.db_path),
+                                 decorator=lambda view: log_access(self.require_access(view)))
+        
         @self.app.route('/')
         @log_access
         @self.require_access
         def dashboard():
             """Main dashboard"""
-            return render_template_string(self.get_dashboard_template())
+            return render_inline(self.get_dashboard_template())
         
         @self.app.route('/departments')
         @log_access
         @self.require_access
         def departments_page():
             """Department management page"""
-            return render_template_string(self.get_departments_template())
+            return render_inline(self.get_departments_template())
             
         @self.app.route('/add-asset')
         @log_access
         @self.require_access
         def add_asset_page():
             """Add asset page"""
-            return render_template_string(self.get_add_asset_template())
+            return render_inline(self.get_add_asset_template())
         
         @self.app.route('/logs')
         @log_access
         @self.require_access
         def logs_page():
             """Access logs page"""
-            return render_template_string(self.get_logs_template())
+            return render_inline(self.get_logs_template())
         
         @self.app.route('/monitor')
         @log_access
         @self.require_access
         def realtime_monitor():
             """Real-time monitoring page"""
-            return render_template_string(self.get_realtime_monitor_template())
+            return render_inline(self.get_realtime_monitor_template())
         
         # ============ ASSET CONTROL API ENDPOINTS ============
         
@@ -439,6 +543,7 @@ class CompleteDepartmentWebService:
         @self.app.route('/api/realtime/stats')
         @log_access
         @self.require_access
+        @self.cached(max_age=5)
         def realtime_stats():
             """Get real-time statistics for monitoring"""
             try:
@@ -520,6 +625,7 @@ class CompleteDepartmentWebService:
         @self.app.route('/api/realtime/devices/<int:limit>')
         @log_access  
         @self.require_access
+        @self.cached()
         def realtime_devices(limit=20):
             """Get recent devices with full details"""
             try:
@@ -559,6 +665,12 @@ class CompleteDepartmentWebService:
                 
             except Exception as e:
                 return jsonify({'error': str(e)})
+        
+        @self.app.route('/api/stats')
+        @log_access
+        @self.require_access
+        @self.cached(max_age=60)
+        def get_stats():
             """Get comprehensive statistics"""
             try:
                 conn = sqlite3.connect(self.db_path)
@@ -601,62 +713,30 @@ class CompleteDepartmentWebService:
                 return jsonify({'error': str(e)}), 500
         
         @self.app.route('/api/devices')
+        @self.cached()
         def get_devices():
-            """Get all devices with comprehensive data"""
+            """Get all devices; ?fields= / ?format= narrow the columns and pick the encoding"""
+            try:
+                projection = requested_projection(DEVICE_FIELDS)
+                fmt = requested_format()
+            except ProjectionError as e:
+                return projection_error_response(e)
             try:
                 conn = sqlite3.connect(self.db_path)
                 cursor = conn.cursor()
                 
-                # Get devices with all available columns
-                cursor.execute("""
-                    SELECT 
-                        id, hostname, ip_address, working_user, classification, 
-                        department, status, data_source, created_at, last_updated,
-                        os_name, os_version, manufacturer, model, serial_number,
-                        mac_address, cpu_info, memory_gb, storage_info, vendor,
-                        ping_status, last_ping, collection_method, domain, notes
-                    FROM assets 
-                    ORDER BY hostname
-                """)
-                
-                devices = []
-                for row in cursor.fetchall():
-                    device = {
-                        'id': row[0],
-                        'hostname': row[1] or 'Unknown',
-                        'ip_address': row[2],
-                        'user': row[3],
-                        'classification': row[4] or 'Unknown',
-                        'department': row[5] or 'Unknown',
-                        'status': row[6] or 'Unknown', 
-                        'data_source': row[7],
-                        'created_at': row[8],
-                        'last_updated': row[9],
-                        'os_name': row[10],
-                        'os_version': row[11],
-                        'manufacturer': row[12] or 'Unknown',
-                        'model': row[13],
-                        'serial_number': row[14],
-                        'mac_address': row[15],
-                        'cpu_info': row[16],
-                        'memory_gb': row[17],
-                        'storage_info': row[18],
-                        'vendor': row[19],
-                        'ping_status': row[20] or 'Unknown',
-                        'last_ping': row[21],
-                        'collection_method': row[22],
-                        'domain': row[23],
-                        'notes': row[24]
-                    }
-                    devices.append(device)
+                # Only the requested columns are read
+                cursor.execute(f"SELECT {projection.select_sql} FROM assets ORDER BY assets.hostname")
+                devices = projection.decode(cursor.fetchall())
                 
                 conn.close()
-                return jsonify(devices)
+                return projected_response(projection, devices, fmt=fmt)
                 
             except Exception as e:
                 return jsonify({'error': str(e)}), 500
         
         @self.app.route('/api/departments', methods=['GET', 'POST'])
+        @self.cached()
         def handle_departments():
             """Handle department operations"""
             if request.method == 'GET':
@@ -1312,7 +1392,7 @@ class CompleteDepartmentWebService:
 
         async function loadDevices() {
             try {
-                const response = await fetch('/api/devices');
+                const response = await fetch('/api/devices?fields=dashboard');
                 allDevices = await response.json();
                 displayDevices(allDevices);
             } catch (error) {
@@ -2225,7 +2305,7 @@ class CompleteDepartmentWebService:
             except FileNotFoundError:
                 logs_content = ["No log file found yet."]
             
-            return render_template_string(self.get_logs_template(), 
+            return render_inline(self.get_logs_template(), 
                                         logs=logs_content,
                                         allowed_networks=[str(net) for net in self.allowed_networks])
         except Exception as e:
@@ -2381,8 +2461,8 @@ class CompleteDepartmentWebService:
         </html>
         '''
 
-    def run(self, host='0.0.0.0', port=5556, debug=False):
-        """Run the complete web service"""
+    def run(self, host='0.0.0.0', port=5556, debug=False, production=None):
+        """Run the complete web service (production WSGI server when WEB_SERVICE_MODE=production)"""
         print("Starting Complete Department & Asset Management Web Service")
         print(f"URL: http://{host}:{port}")
         print("Features:")
@@ -2391,7 +2471,11 @@ class CompleteDepartmentWebService:
         print("   * Comprehensive Device Data Display")
         print("   * Department Assignment & Filtering")
         print("   * Professional UI with Enhanced Tables")
-        self.app.run(host=host, port=port, debug=debug)
+        if WSGI_SERVING_AVAILABLE:
+            run_app(self.app, host=host, port=port, debug=debug, production=production,
+                    spec='wsgi:create_app("department")')
+        else:
+            self.app.run(host=host, port=port, debug=debug)
 
 # NOTE: Auto-startup disabled - use launch_original_desktop.py or GUI buttons
 # if __name__ == '__main__':
@@ -6,28 +6,144 @@ Centralized logging system for all jobs, features, and operations
 with real-time monitoring and error detection.
 """
 
+import atexit
 import logging
+import logging.handlers
 import json
-import time
+import queue
+from collections import deque
 from datetime import datetime
 from typing import Dict, List, Any
 from pathlib import Path
-import threading
-from queue import Queue
+
+FEATURES = [
+    'web_service',
+    'scheduled_scanning',
+    'data_collection', 
+    'stop_collection',
+    'duplicate_cleanup',
+    'manual_network_device',
+    'ad_integration',
+    'multithreading_performance',
+    'database_operations',
+    'authentication',
+    'network_validation',
+    'file_operations'
+]
+
+MASTER_LOGGER_NAME = 'AssetManagementSystem'
+FEATURE_LOGGER_PREFIX = 'AssetManagement.'
+SYSTEM_RING = 'system_all'
+
+# Reserved LogRecord attributes - everything else passed via `extra` is context
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime', 'feature'}
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per line (timestamp, level, feature, message, context)"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'timestamp': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'feature': getattr(record, 'feature', None) or record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value if isinstance(value, (str, int, float, bool, type(None))) else str(value)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class _FastQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that skips the full format + record copy in the caller thread"""
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class _FeatureDispatchHandler(logging.Handler):
+    """
+    Runs on the QueueListener thread: routes each record to its feature's
+    rotating file (or the master files), fills the in-memory rings and
+    updates per-feature stats.
+    """
+    
+    def __init__(self, owner: 'FeatureLogger'):
+        super().__init__()
+        self.owner = owner
+    
+    def handle(self, record: logging.LogRecord) -> bool:
+        owner = self.owner
+        name = record.name
+        if name.startswith(FEATURE_LOGGER_PREFIX):
+            feature = name[len(FEATURE_LOGGER_PREFIX):]
+            targets = owner.feature_handlers.get(feature, ())
+            ring_key = feature
+        else:
+            feature = getattr(record, 'feature', None)
+            targets = owner.master_handlers
+            ring_key = SYSTEM_RING
+        
+        for handler in targets:
+            if record.levelno >= handler.level:
+                try:
+                    handler.handle(record)
+                except Exception:
+                    handler.handleError(record)
+        
+        ring = owner.recent_logs.get(ring_key)
+        if ring is not None:
+            ring.append(owner.line_formatter.format(record) + '\n')
+        if feature:
+            owner._update_stats(feature, record.levelname, datetime.fromtimestamp(record.created))
+        return True
+    
+    def emit(self, record: logging.LogRecord) -> None:  # pragma: no cover - handle() is used
+        self.handle(record)
+
 
 class FeatureLogger:
     """Centralized logger for all system features"""
     
-    def __init__(self):
-        self.log_directory = Path("logs")
+    def __init__(self, log_directory: str = "logs", rotation: str = 'size',
+                 max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5,
+                 when: str = 'midnight', structured: bool = False,
+                 ring_size: int = 1000, console: bool = True):
+        self.log_directory = Path(log_directory)
         self.log_directory.mkdir(exist_ok=True)
         
+        # Backend settings
+        self.rotation = rotation  # 'size' (RotatingFileHandler) or 'time' (TimedRotatingFileHandler)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.when = when
+        self.structured = structured  # also write <feature>.jsonl
+        self.console = console
+        
         # Feature-specific loggers
         self.feature_loggers = {}
-        self.log_queue = Queue()
+        self.feature_handlers: Dict[str, List[logging.Handler]] = {}
+        self.master_handlers: List[logging.Handler] = []
+        self.recent_logs: Dict[str, deque] = {SYSTEM_RING: deque(maxlen=ring_size)}
+        self.ring_size = ring_size
         self.active_jobs = {}
         self.job_stats = {}
         
+        self.line_formatter = logging.Formatter('%(asctime)s | %(levelname)s | %(message)s')
+        
+        # One queue + one background writer for every handler below
+        self.record_queue: "queue.Queue[logging.LogRecord]" = queue.Queue()
+        self.queue_handler = _FastQueueHandler(self.record_queue)
+        self.queue_handler._feature_logger_handler = True
+        
         # Setup master logger
         self.setup_master_logger()
         
@@ -36,10 +152,28 @@ class FeatureLogger:
         
         # Start log processor
         self.start_log_processor()
+    
+    def _file_handler(self, filename: str) -> logging.Handler:
+        """Create a rotating file handler (size or time based)"""
+        path = self.log_directory / filename
+        if self.rotation == 'time':
+            return logging.handlers.TimedRotatingFileHandler(
+                path, when=self.when, backupCount=self.backup_count, encoding='utf-8', delay=True
+            )
+        return logging.handlers.RotatingFileHandler(
+            path, maxBytes=self.max_bytes, backupCount=self.backup_count, encoding='utf-8', delay=True
+        )
+    
+    def _attach_queue_handler(self, logger: logging.Logger) -> None:
+        """Replace handlers installed by a previous FeatureLogger with the queue handler"""
+        for handler in list(logger.handlers):
+            if getattr(handler, '_feature_logger_handler', False):
+                logger.removeHandler(handler)
+        logger.addHandler(self.queue_handler)
         
     def setup_master_logger(self):
         """Setup the master system logger"""
-        self.master_logger = logging.getLogger('AssetManagementSystem')
+        self.master_logger = logging.getLogger(MASTER_LOGGER_NAME)
         self.master_logger.setLevel(logging.DEBUG)
         
         # Create formatters
@@ -52,97 +186,88 @@ class FeatureLogger:
         )
         
         # File handler for all logs
-        all_logs_handler = logging.FileHandler(
-            self.log_directory / 'system_all.log',
-            encoding='utf-8'
-        )
+        all_logs_handler = self._file_handler('system_all.log')
         all_logs_handler.setFormatter(detailed_formatter)
         all_logs_handler.setLevel(logging.DEBUG)
         
         # Error-only file handler
-        error_handler = logging.FileHandler(
-            self.log_directory / 'system_errors.log',
-            encoding='utf-8'
-        )
+        error_handler = self._file_handler('system_errors.log')
         error_handler.setFormatter(detailed_formatter)
         error_handler.setLevel(logging.ERROR)
         
+        self.master_handlers = [all_logs_handler, error_handler]
+        
         # Console handler
-        console_handler = logging.StreamHandler()
-        console_handler.setFormatter(simple_formatter)
-        console_handler.setLevel(logging.INFO)
+        if self.console:
+            console_handler = logging.StreamHandler()
+            console_handler.setFormatter(simple_formatter)
+            console_handler.setLevel(logging.INFO)
+            self.master_handlers.append(console_handler)
         
-        self.master_logger.addHandler(all_logs_handler)
-        self.master_logger.addHandler(error_handler)
-        self.master_logger.addHandler(console_handler)
+        self._attach_queue_handler(self.master_logger)
         
     def setup_feature_loggers(self):
         """Setup individual feature loggers"""
-        features = [
-            'web_service',
-            'scheduled_scanning',
-            'data_collection', 
-            'stop_collection',
-            'duplicate_cleanup',
-            'manual_network_device',
-            'ad_integration',
-            'multithreading_performance',
-            'database_operations',
-            'authentication',
-            'network_validation',
-            'file_operations'
-        ]
+        formatter = logging.Formatter(
+            '%(asctime)s | %(levelname)s | %(message)s'
+        )
         
-        for feature in features:
-            logger = logging.getLogger(f'AssetManagement.{feature}')
+        for feature in FEATURES:
+            logger = logging.getLogger(f'{FEATURE_LOGGER_PREFIX}{feature}')
             logger.setLevel(logging.DEBUG)
             
-            # Feature-specific file handler
-            handler = logging.FileHandler(
-                self.log_directory / f'{feature}.log',
-                encoding='utf-8'
-            )
-            formatter = logging.Formatter(
-                '%(asctime)s | %(levelname)s | %(message)s'
-            )
+            # Feature-specific rotating file handler (written by the listener thread)
+            handler = self._file_handler(f'{feature}.log')
             handler.setFormatter(formatter)
-            logger.addHandler(handler)
+            handlers = [handler]
+            
+            if self.structured:
+                json_handler = self._file_handler(f'{feature}.jsonl')
+                json_handler.setFormatter(JsonLinesFormatter())
+                handlers.append(json_handler)
+            
+            self.feature_handlers[feature] = handlers
+            self.recent_logs[feature] = deque(maxlen=self.ring_size)
+            self._attach_queue_handler(logger)
             
             self.feature_loggers[feature] = logger
             
     def start_log_processor(self):
-        """Start background log processor for real-time monitoring"""
-        def process_logs():
-            while True:
-                try:
-                    if not self.log_queue.empty():
-                        log_entry = self.log_queue.get(timeout=1)
-                        self.process_log_entry(log_entry)
-                    time.sleep(0.1)
-                except:
-                    time.sleep(1)
-                    
-        processor_thread = threading.Thread(target=process_logs, daemon=True)
-        processor_thread.start()
-        
-    def process_log_entry(self, entry: Dict[str, Any]):
-        """Process individual log entries for monitoring"""
-        feature = entry.get('feature', 'unknown')
-        level = entry.get('level', 'INFO')
-        message = entry.get('message', '')
-        timestamp = entry.get('timestamp', datetime.now())
+        """Start the single background writer for all log handlers"""
+        self.listener = logging.handlers.QueueListener(
+            self.record_queue, _FeatureDispatchHandler(self), respect_handler_level=False
+        )
+        self.listener.start()
+        atexit.register(self.shutdown)
+    
+    def flush(self):
+        """Block until every queued record has been written"""
+        self.record_queue.join()
+        for handler in self.master_handlers + [h for hs in self.feature_handlers.values() for h in hs]:
+            handler.flush()
+    
+    def shutdown(self):
+        """Drain the queue, stop the writer thread and close the files"""
+        listener = getattr(self, 'listener', None)
+        if listener is None:
+            return
+        self.listener = None
+        listener.stop()
+        for handler in self.master_handlers + [h for hs in self.feature_handlers.values() for h in hs]:
+            handler.close()
+        atexit.unregister(self.shutdown)
         
-        # Update job stats
-        if feature not in self.job_stats:
-            self.job_stats[feature] = {
+    def _update_stats(self, feature: str, level: str, timestamp: datetime):
+        """Update per-feature counters (listener thread)"""
+        stats = self.job_stats.get(feature)
+        if stats is None:
+            stats = self.job_stats[feature] = {
                 'total_logs': 0,
                 'errors': 0,
                 'warnings': 0,
                 'last_activity': timestamp,
                 'status': 'idle'
             }
-            
-        stats = self.job_stats[feature]
         stats['total_logs'] += 1
         stats['last_activity'] = timestamp
         
@@ -150,33 +275,27 @@ class FeatureLogger:
             stats['errors'] += 1
         elif level == 'WARNING':
             stats['warnings'] += 1
+    
+    def process_log_entry(self, entry: Dict[str, Any]):
+        """Process individual log entries for monitoring"""
+        self._update_stats(entry.get('feature', 'unknown'), entry.get('level', 'INFO'),
+                           entry.get('timestamp', datetime.now()))
             
     def log_feature(self, feature: str, level: str, message: str, **kwargs):
-        """Log message for specific feature"""
+        """Log message for specific feature (enqueue only - no file I/O here)"""
         try:
             logger = self.feature_loggers.get(feature, self.master_logger)
-            
-            # Add to queue for monitoring
-            log_entry = {
-                'feature': feature,
-                'level': level,
-                'message': message,
-                'timestamp': datetime.now(),
-                **kwargs
-            }
-            self.log_queue.put(log_entry)
-            
-            # Log using appropriate level
-            if level == 'DEBUG':
-                logger.debug(message)
-            elif level == 'INFO':
-                logger.info(message)
-            elif level == 'WARNING':
-                logger.warning(message)
-            elif level == 'ERROR':
-                logger.error(message)
-            elif level == 'CRITICAL':
-                logger.critical(message)
+            levelno = logging.getLevelName(level)
+            if not isinstance(levelno, int):
+                levelno = logging.INFO
+            if not logger.isEnabledFor(levelno):
+                return
+            extra = {'feature': feature}
+            if kwargs:
+                extra.update((k, v) for k, v in kwargs.items() if k not in _RECORD_ATTRS)
+            # makeRecord + handle skips Logger.findCaller's stack walk on every call
+            record = logger.makeRecord(logger.name, levelno, '(feature)', 0, message, None, None, extra=extra)
+            logger.handle(record)
                 
         except Exception as e:
             self.master_logger.error(f"Logging error for {feature}: {e}")
@@ -257,18 +376,13 @@ class FeatureLogger:
                 for feature in self.feature_loggers.keys()}
         
     def get_recent_logs(self, feature: str = None, limit: int = 100) -> List[str]:
-        """Get recent log entries"""
+        """Get recent log entries from the in-memory ring (no disk reads)"""
         try:
-            if feature and feature in self.feature_loggers:
-                log_file = self.log_directory / f'{feature}.log'
-            else:
-                log_file = self.log_directory / 'system_all.log'
-                
-            if log_file.exists():
-                with open(log_file, 'r', encoding='utf-8') as f:
-                    lines = f.readlines()
-                    return lines[-limit:] if len(lines) > limit else lines
-            return []
+            ring_key = feature if feature and feature in self.recent_logs else SYSTEM_RING
+            ring = self.recent_logs[ring_key]
+            if limit >= len(ring):
+                return list(ring)
+            return list(ring)[-limit:]
         except Exception as e:
             return [f"Error reading logs: {e}"]
             
@@ -62,7 +62,8 @@ def load_config():
             "user": "", "auth_key": "", "priv_key": "",
             "auth_proto": "SHA", "priv_proto": "AES128"
         },
-        "ad": {"server": "", "base_dn": "", "username": "", "secret_id": "", "use_ssl": False}
+        "ad": {"server": "", "base_dn": "", "username": "", "secret_id": "", "use_ssl": False},
+        "backup": {"interval_hours": 0, "keep_last": 14, "max_age_days": None, "compression": "gzip", "dir": "backups"}
     }
 
 def save_config(cfg):
@@ -20,8 +20,8 @@ Requires:
   - collectors.snmp_collector.snmp_collect_basic(...) -> dict
 """
 
-from __future__ import ipaddress  # For IP validation
-import annotations
+from __future__ import annotations
+import ipaddress  # For IP validation
 import os
 import subprocess
 import socket
@@ -37,6 +37,21 @@ from collectors.wmi_collector import collect_windows_wmi
 from collectors.ssh_collector import collect_linux_or_esxi_ssh
 from collectors.snmp_collector import snmp_collect_basic, _PYSNMP_OK
 from utils.helpers import which
+from device_rule_engine import http_type_guess, infer_infra_from_ports
+from metrics_registry import timed_probe
+from collection_tracing import get_tracer, traced
+
+try:
+    from credential_affinity import get_credential_cache
+    CREDENTIAL_AFFINITY_AVAILABLE = True
+except ImportError:
+    CREDENTIAL_AFFINITY_AVAILABLE = False
+
+try:
+    from adaptive_network_controller import get_network_controller
+    NETWORK_CONTROLLER_AVAILABLE = True
+except ImportError:
+    NETWORK_CONTROLLER_AVAILABLE = False
 
 # ------------- Setup -------------
 urllib3.disable_warnings(InsecureRequestWarning)
@@ -45,6 +60,7 @@ NMAP_BIN = which("nmap")
 
 # ------------- Basic network probes -------------
 
+@timed_probe('ping')
 def is_alive(ip_address: str, count: int = 1, timeout_ms: int = 800) -> bool:
     """Cross-platform ping (best-effort)."""
     try:
@@ -59,8 +75,12 @@ def is_alive(ip_address: str, count: int = 1, timeout_ms: int = 800) -> bool:
         return False
 
 
-def is_tcp_open(ip: str, port: int, timeout: float = 0.8) -> bool:
-    """Fast TCP connect check."""
+@traced('port_probe', outcome=lambda is_open: 'open' if is_open else 'closed')
+def is_tcp_open(ip: str, port: int, timeout: Optional[float] = None) -> bool:
+    """Fast TCP connect check; without an explicit timeout it adapts to the subnet's RTT."""
+    if timeout is None and NETWORK_CONTROLLER_AVAILABLE:
+        return get_network_controller().tcp_probe(ip, port)
+    timeout = 0.8 if timeout is None else timeout
     try:
         with socket.create_connection((ip, port), timeout=timeout):
             return True
@@ -77,6 +97,8 @@ def _http_probe(url: str, timeout: float = 1.2):
         return None
 
 
+@traced('http')
+@timed_probe('http')
 def http_fingerprint(ip: str, timeout: float = 1.2) -> Dict[str, Any]:
     """
     Returns {"server": "...", "title": "...", "type_guess": "..."} best-effort.
@@ -90,29 +112,10 @@ def http_fingerprint(ip: str, timeout: float = 1.2) -> Dict[str, Any]:
     m = re.search(r"<title>(.*?)</title>", r.text, re.IGNORECASE | re.DOTALL)
     out["title"] = (m.group(1).strip() if m else "")
 
-    body_l   = r.text.lower()
-    server_l = (out.get("server") or "").lower()
-    title_l  = (out.get("title") or "").lower()
-    blob     = title_l + server_l + body_l
-
-    # Smart display detection
-    if any(k in blob for k in ["webos", "tizen", "bravia", "hisense", "smart tv", "android tv", "philips tv"]):
-        out["type_guess"] = "Smart Display"
-
-    # Network/Printer/Phone/Firewall hints
-    hints = [
-        ("HP LaserJet", "Printer"), ("Kyocera Command Center","Printer"),
-        ("Ricoh Web Image Monitor","Printer"), ("Xerox","Printer"),
-        ("Brother","Printer"), ("Canon","Printer"),
-        ("Yealink","IP Phone"), ("Grandstream","IP Phone"), ("3CX","PBX"),
-        ("Ubiquiti","Switch/Router"), ("EdgeOS","Router"), ("MikroTik","Router/Switch"),
-        ("FortiGate","Firewall"), ("Cisco","Switch/Router"), ("VMware ESXi","Hypervisor"),
-        ("Hikvision","NVR/DVR"), ("Dahua","NVR/DVR"),
-    ]
-    for k, tg in hints:
-        if k.lower() in blob:
-            out["type_guess"] = tg
-            break
+    # Smart display / printer / phone / firewall hints (device_rule_engine.RULESETS['http_hint'])
+    type_guess = http_type_guess(out["title"], out["server"], r.text)
+    if type_guess:
+        out["type_guess"] = type_guess
 
     return out
 
@@ -125,6 +128,7 @@ def http_guess(ip: str) -> Dict[str, Any]:
 
 # ------------- Nmap discover -------------
 
+@traced('nmap')
 def nmap_discover(hosts: List[str], ports: str = "22,80,135,139,161,443,445,631,8080,8443") -> Dict[str, Set[int]]:
     """
     Returns {ip: {open_port, ...}} using -oG greppable output.
@@ -299,17 +303,7 @@ def _normalize_storage_in_record(d: dict):
 
 def _infer_infra_from_ports(open_ports: Set[int]) -> str:
     """Infer device class from open ports (best-effort)."""
-    if 161 in open_ports:
-        return "Network (SNMP Device)"
-    if 22 in open_ports and any(p in open_ports for p in (80, 443)):
-        return "Network (SSH/Web)"
-    if 22 in open_ports:
-        return "SSH Device"
-    if any(p in open_ports for p in (80, 443, 8080, 8443, 631)):
-        return "Web Device"
-    if 135 in open_ports or 445 in open_ports:
-        return "Windows (SMB/RPC)"
-    return "Network"
+    return infer_infra_from_ports(open_ports)
 
 
 def _merge_http_into_record(d: Dict[str, Any], http: Dict[str, Any]):
@@ -344,8 +338,41 @@ def _empty_schema(ip: str, infra: str = "Network") -> Dict[str, Any]:
         "Connected Screens": "",
     }
 
+# ------------- Credential affinity -------------
+
+def _try_credentials(ip: str, protocol: str, creds: List[tuple], collect) -> Optional[Dict[str, Any]]:
+    """
+    Try (username, password) pairs with collect(ip, u, p). With the affinity cache the
+    credential that last worked on this host or /24 goes first and known-bad ones are skipped.
+    The attempt is traced as one span per protocol with the number of extra credentials tried.
+    """
+    with get_tracer().span(protocol, device=ip) as span:
+        if CREDENTIAL_AFFINITY_AVAILABLE:
+            try:
+                cache = get_credential_cache()
+            except Exception as e:
+                log.debug("Credential affinity cache unavailable: %s", e)
+            else:
+                outcome = cache.try_credentials(ip, protocol, creds, lambda u, p, cred: collect(ip, u, p))
+                span.retries = max(0, outcome.attempts - 1)
+                span.outcome = 'ok' if outcome.success else 'fail'
+                return outcome.result if outcome.success else None
+
+        for attempt, (u, p) in enumerate(creds):
+            span.retries = attempt
+            try:
+                d = collect(ip, u, p)
+                if isinstance(d, dict) and ("Error" not in d):
+                    return d
+            except Exception as e:
+                log.debug("%s failed for %s with %s: %s", protocol.upper(), ip, u, e)
+        span.outcome = 'fail'
+        return None
+
 # ------------- Main Orchestration -------------
 
+@traced('collect_any', device='ip',
+        outcome=lambda rec: 'fail' if rec.get('Collector') == 'None' else 'ok')
 def collect_any(
     ip: str,
     creds_windows: List[tuple],
@@ -362,40 +389,32 @@ def collect_any(
       snmp_v3:       {"user":"u","auth_key":"a","priv_key":"p","auth_proto":"sha|md5","priv_proto":"aes|des","port":161,"timeout":2,"retries":1}
     """
     # Quick port probes
-    p22  = is_tcp_open(ip, 22, 0.7)
-    p135 = is_tcp_open(ip, 135, 0.7)
-    p445 = is_tcp_open(ip, 445, 0.7)
-    p161 = is_tcp_open(ip, 161, 0.7)
+    p22  = is_tcp_open(ip, 22)
+    p135 = is_tcp_open(ip, 135)
+    p445 = is_tcp_open(ip, 445)
+    p161 = is_tcp_open(ip, 161)
 
     # ---------- Windows (WMI) ----------
     if (p135 or p445) and creds_windows:
-        for u, p in creds_windows:
-            try:
-                d = collect_windows_wmi(ip, u, p)
-                if isinstance(d, dict) and ("Error" not in d):
-                    if use_http:
-                        _merge_http_into_record(d, http_guess(ip))
-                    _normalize_storage_in_record(d)
-                    d.setdefault("LAN IP Address", ip)
-                    d.setdefault("Hostname", d.get("Hostname") or ip)
-                    return d
-            except Exception as e:
-                log.debug("WMI failed for %s with %s: %s", ip, u, e)
+        d = _try_credentials(ip, "wmi", creds_windows, collect_windows_wmi)
+        if d is not None:
+            if use_http:
+                _merge_http_into_record(d, http_guess(ip))
+            _normalize_storage_in_record(d)
+            d.setdefault("LAN IP Address", ip)
+            d.setdefault("Hostname", d.get("Hostname") or ip)
+            return d
 
     # ---------- Linux/ESXi (SSH) ----------
     if p22 and creds_linux:
-        for u, p in creds_linux:
-            try:
-                d = collect_linux_or_esxi_ssh(ip, u, p)
-                if isinstance(d, dict) and ("Error" not in d):
-                    if use_http:
-                        _merge_http_into_record(d, http_guess(ip))
-                    _normalize_storage_in_record(d)
-                    d.setdefault("LAN IP Address", ip)
-                    d.setdefault("Hostname", d.get("Hostname") or ip)
-                    return d
-            except Exception as e:
-                log.debug("SSH failed for %s with %s: %s", ip, u, e)
+        d = _try_credentials(ip, "ssh", creds_linux, collect_linux_or_esxi_ssh)
+        if d is not None:
+            if use_http:
+                _merge_http_into_record(d, http_guess(ip))
+            _normalize_storage_in_record(d)
+            d.setdefault("LAN IP Address", ip)
+            d.setdefault("Hostname", d.get("Hostname") or ip)
+            return d
 
     # ---------- SNMP (Preferred for non-Windows/Linux) ----------
     if _PYSNMP_OK and (p161 or (snmp_v3 and snmp_v3.get("user")) or snmp_v2c):
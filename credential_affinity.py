@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+"""
+🔑 CREDENTIAL AFFINITY CACHE
+===========================
+Remembers which credential worked per host and per /24 so collectors try it
+first instead of walking the whole credential list on every scan:
+
+- positive affinity per host and per /24 subnet (persisted, TTL'd)
+- negative cache of auth failures per host (skipped for a cool-down, which
+  also keeps repeated bad logins away from account-lockout thresholds);
+  failures are classified first, so unreachable hosts, unsupported platforms
+  and missing client libraries never count against a credential
+- optional race of the top-2 candidates for protocols that tolerate
+  concurrent logins (WMI/DCOM, SSH, SNMP), only when nothing is known about
+  the host or its /24; an affinity hit is tried alone first
+
+Only a SHA-256 fingerprint of each credential is stored, never the password.
+"""
+
+import hashlib
+import ipaddress
+import socket
+import sqlite3
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+RACE_PROTOCOLS = ('wmi', 'ssh', 'snmp')
+
+# Errors that mean "host/network problem", not "wrong credential"
+TRANSPORT_ERRORS = (socket.timeout, TimeoutError, ConnectionError)
+
+# Why a login attempt failed; only AUTH_REJECTED says anything about the credential
+AUTH_REJECTED = 'auth'
+TRANSPORT_FAILURE = 'transport'
+PLATFORM_FAILURE = 'platform'
+DEPENDENCY_FAILURE = 'dependency'
+UNKNOWN_FAILURE = 'unknown'
+
+# Error codes returned by collectors/wmi_collector._error()
+ERROR_CODE_KINDS = {'PlatformNotSupported': PLATFORM_FAILURE, 'DependencyMissing': DEPENDENCY_FAILURE}
+DEPENDENCY_MARKERS = ('missing dependenc', 'no module named', 'not installed')
+PLATFORM_MARKERS = ('only on windows', 'not supported on', 'platformnotsupported')
+TRANSPORT_MARKERS = ('timed out', 'timeout', 'unreachable', 'refused', 'no route', 'rpc server',
+                     'reset by peer', 'protocol banner', '0x800706ba', '-2147023174')
+AUTH_MARKERS = ('auth', 'access denied', 'access is denied', 'logon failure', 'login failed', 'permission denied',
+                'unknown user name', 'bad password', '0x80070005', '0x8007052e', '-2147024891', '-2147023570')
+
+
+def failure_text(data: Any) -> str:
+    """Error text carried by a collector result (Error dict / string, Status, wmi_collection_status)"""
+    if not isinstance(data, dict):
+        return '' if data is None else str(data)
+    parts = []
+    error = data.get('Error')
+    if isinstance(error, dict):
+        parts += [str(error.get('code', '')), str(error.get('message', ''))]
+    elif error:
+        parts.append(str(error))
+    for key in ('Status', 'wmi_collection_status'):
+        if data.get(key):
+            parts.append(str(data[key]))
+    return ' '.join(parts)
+
+
+def is_failed_result(data: Any) -> bool:
+    """Empty results, Error dicts and 'Failed: ...' collection statuses are not logins that worked"""
+    if not data:
+        return True
+    if isinstance(data, dict):
+        return 'Error' in data or 'failed' in str(data.get('wmi_collection_status', '')).lower()
+    return False
+
+
+def classify_failure(failure: Any) -> str:
+    """
+    AUTH_REJECTED / TRANSPORT_FAILURE / PLATFORM_FAILURE / DEPENDENCY_FAILURE / UNKNOWN_FAILURE
+    for a raised exception or a failed collector result.
+    """
+    if isinstance(failure, BaseException):
+        if isinstance(failure, TRANSPORT_ERRORS):
+            return TRANSPORT_FAILURE
+        if isinstance(failure, ImportError):
+            return DEPENDENCY_FAILURE
+        if 'authentication' in type(failure).__name__.lower():  # paramiko.AuthenticationException & co
+            return AUTH_REJECTED
+        text = f"{type(failure).__name__} {failure}"
+    else:
+        if isinstance(failure, dict) and isinstance(failure.get('Error'), dict):
+            kind = ERROR_CODE_KINDS.get(failure['Error'].get('code'))
+            if kind:
+                return kind
+        text = failure_text(failure)
+    text = text.lower()
+    for kind, markers in ((DEPENDENCY_FAILURE, DEPENDENCY_MARKERS), (PLATFORM_FAILURE, PLATFORM_MARKERS),
+                          (TRANSPORT_FAILURE, TRANSPORT_MARKERS), (AUTH_REJECTED, AUTH_MARKERS)):
+        if any(marker in text for marker in markers):
+            return kind
+    # "SSH connection error: ...", WMI ConnectionFailed without an access-denied cause, ...
+    if 'connection' in text or 'connect' in text:
+        return TRANSPORT_FAILURE
+    return UNKNOWN_FAILURE
+
+
+def normalize_credential(cred: Any) -> Optional[Tuple[str, str]]:
+    """(username, password) from the dict / tuple / 'user:pass' formats used across the collectors"""
+    if isinstance(cred, dict):
+        username = cred.get('username', '') or ''
+        password = cred.get('password', '') or ''
+        domain = cred.get('domain', '')
+        if domain and domain not in ('.', 'local') and '\\' not in username:
+            username = f"{domain}\\{username}"
+        return username, password
+    if isinstance(cred, (tuple, list)) and len(cred) >= 2:
+        return str(cred[0]), str(cred[1])
+    if isinstance(cred, str):
+        username, _, password = cred.partition(':')
+        return username, password
+    return None
+
+
+def credential_key(cred: Any) -> str:
+    """Stable fingerprint of a credential (username + password hash)"""
+    pair = normalize_credential(cred) or ('', '')
+    digest = hashlib.sha256(f"asset-credential\0{pair[0]}\0{pair[1]}".encode('utf-8')).hexdigest()
+    return digest[:24]
+
+
+def subnet_of(ip: str, prefix: int = 24) -> str:
+    try:
+        return str(ipaddress.ip_network(f"{ip}/{prefix}", strict=False))
+    except ValueError:
+        return ip  # hostnames get their own "subnet"
+
+
+@dataclass
+class CredentialAttempt:
+    """Outcome of try_credentials()"""
+    result: Any = None
+    credential: Any = None
+    attempts: int = 0
+    naive_attempts: int = 0
+    source: str = 'none'  # host / subnet / none
+    skipped: List[Any] = field(default_factory=list)
+    failures: Dict[str, int] = field(default_factory=dict)  # failed attempts by classify_failure() kind
+
+    @property
+    def success(self) -> bool:
+        return self.credential is not None
+
+    @property
+    def attempts_saved(self) -> int:
+        return self.naive_attempts - self.attempts
+
+
+class CredentialAffinityCache:
+    """🔑 Host and /24 credential affinity with a negative cache for auth failures"""
+
+    def __init__(self, db_path: str = 'assets.db', success_ttl_hours: float = 168,
+                 failure_cooldown_minutes: float = 30, subnet_prefix: int = 24,
+                 race_protocols: Sequence[str] = RACE_PROTOCOLS, race_top: int = 2):
+        self.db_path = db_path
+        self.success_ttl = success_ttl_hours * 3600
+        self.failure_cooldown = failure_cooldown_minutes * 60
+        self.subnet_prefix = subnet_prefix
+        self.race_protocols = {p.lower() for p in race_protocols}
+        self.race_top = max(1, race_top)
+        self._lock = threading.Lock()
+        self._affinity: Dict[Tuple[str, str, str], Tuple[str, float]] = {}
+        self._failures: Dict[Tuple[str, str, str], float] = {}
+        self.stats: Dict[str, int] = {}
+        self.reset_stats()
+        self._init_tables()
+        self._load()
+
+    # ----------------- Persistence -----------------
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _init_tables(self):
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS credential_affinity (
+                    scope TEXT NOT NULL,
+                    scope_key TEXT NOT NULL,
+                    protocol TEXT NOT NULL,
+                    credential_key TEXT NOT NULL,
+                    succeeded_at REAL NOT NULL,
+                    PRIMARY KEY (scope, scope_key, protocol)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS credential_failures (
+                    host TEXT NOT NULL,
+                    protocol TEXT NOT NULL,
+                    credential_key TEXT NOT NULL,
+                    failed_at REAL NOT NULL,
+                    PRIMARY KEY (host, protocol, credential_key)
+                )
+            """)
+
+    def _load(self):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("DELETE FROM credential_affinity WHERE succeeded_at < ?", (now - self.success_ttl,))
+            conn.execute("DELETE FROM credential_failures WHERE failed_at < ?", (now - self.failure_cooldown,))
+            for scope, scope_key, protocol, key, ts in conn.execute("SELECT * FROM credential_affinity"):
+                self._affinity[(scope, scope_key, protocol)] = (key, ts)
+            for host, protocol, key, ts in conn.execute("SELECT * FROM credential_failures"):
+                self._failures[(host, protocol, key)] = ts
+
+    # ----------------- Lookups -----------------
+
+    def _affinity_key(self, scope: str, ip: str, protocol: str) -> Optional[str]:
+        scope_key = ip if scope == 'host' else subnet_of(ip, self.subnet_prefix)
+        entry = self._affinity.get((scope, scope_key, protocol))
+        if entry and time.time() - entry[1] <= self.success_ttl:
+            return entry[0]
+        return None
+
+    def is_negative(self, ip: str, protocol: str, cred: Any) -> bool:
+        failed_at = self._failures.get((ip, protocol.lower(), credential_key(cred)))
+        return failed_at is not None and time.time() - failed_at < self.failure_cooldown
+
+    def order(self, ip: str, protocol: str, creds: Sequence[Any]) -> Tuple[List[Any], List[Any], str]:
+        """(candidates in try order, negative-cached creds skipped, affinity source)"""
+        protocol = protocol.lower()
+        with self._lock:
+            host_key = self._affinity_key('host', ip, protocol)
+            subnet_key = self._affinity_key('subnet', ip, protocol)
+            candidates, skipped = [], []
+            for cred in creds:
+                (skipped if self.is_negative(ip, protocol, cred) else candidates).append(cred)
+        source = 'none'
+        for scope, preferred in (('subnet', subnet_key), ('host', host_key)):
+            if preferred is None:
+                continue
+            for index, cred in enumerate(candidates):
+                if credential_key(cred) == preferred:
+                    candidates.insert(0, candidates.pop(index))
+                    source = scope
+                    break
+        return candidates, skipped, source
+
+    # ----------------- Recording -----------------
+
+    def record_success(self, ip: str, protocol: str, cred: Any) -> None:
+        protocol, key, now = protocol.lower(), credential_key(cred), time.time()
+        subnet = subnet_of(ip, self.subnet_prefix)
+        with self._lock:
+            self._affinity[('host', ip, protocol)] = (key, now)
+            self._affinity[('subnet', subnet, protocol)] = (key, now)
+            self._failures.pop((ip, protocol, key), None)
+            with self._connect() as conn:
+                conn.executemany("INSERT OR REPLACE INTO credential_affinity VALUES (?, ?, ?, ?, ?)",
+                                 [('host', ip, protocol, key, now), ('subnet', subnet, protocol, key, now)])
+                conn.execute("DELETE FROM credential_failures WHERE host = ? AND protocol = ? AND credential_key = ?",
+                             (ip, protocol, key))
+
+    def record_failure(self, ip: str, protocol: str, cred: Any) -> None:
+        protocol, key, now = protocol.lower(), credential_key(cred), time.time()
+        with self._lock:
+            self._failures[(ip, protocol, key)] = now
+            if self._affinity.get(('host', ip, protocol), (None,))[0] == key:
+                del self._affinity[('host', ip, protocol)]  # password rotated on this host
+            with self._connect() as conn:
+                conn.execute("INSERT OR REPLACE INTO credential_failures VALUES (?, ?, ?, ?)", (ip, protocol, key, now))
+                conn.execute("DELETE FROM credential_affinity WHERE scope = 'host' AND scope_key = ? "
+                             "AND protocol = ? AND credential_key = ?", (ip, protocol, key))
+
+    def record_failed_attempt(self, ip: str, protocol: str, cred: Any, failure: Any) -> str:
+        """Classify a failed login (exception or collector result); only auth rejections are negative-cached"""
+        kind = classify_failure(failure)
+        if kind == AUTH_REJECTED:
+            self.record_failure(ip, protocol, cred)
+        return kind
+
+    def forget(self, ip: Optional[str] = None) -> None:
+        """Drop cached knowledge for one host (or everything)"""
+        with self._lock:
+            with self._connect() as conn:
+                if ip is None:
+                    self._affinity.clear()
+                    self._failures.clear()
+                    conn.execute("DELETE FROM credential_affinity")
+                    conn.execute("DELETE FROM credential_failures")
+                else:
+                    self._affinity = {k: v for k, v in self._affinity.items() if not (k[0] == 'host' and k[1] == ip)}
+                    self._failures = {k: v for k, v in self._failures.items() if k[0] != ip}
+                    conn.execute("DELETE FROM credential_affinity WHERE scope = 'host' AND scope_key = ?", (ip,))
+                    conn.execute("DELETE FROM credential_failures WHERE host = ?", (ip,))
+
+    # ----------------- Stats -----------------
+
+    def reset_stats(self) -> Dict[str, int]:
+        """Start a new scan; returns the stats of the previous one"""
+        with self._lock:
+            previous = dict(self.stats)
+            self.stats = {'hosts': 0, 'attempts': 0, 'naive_attempts': 0, 'attempts_saved': 0,
+                          'host_hits': 0, 'subnet_hits': 0, 'negative_skips': 0, 'races': 0}
+            return previous
+
+    def _account(self, outcome: CredentialAttempt, raced: bool) -> None:
+        with self._lock:
+            self.stats['hosts'] += 1
+            self.stats['attempts'] += outcome.attempts
+            self.stats['naive_attempts'] += outcome.naive_attempts
+            self.stats['attempts_saved'] += outcome.attempts_saved
+            self.stats['negative_skips'] += len(outcome.skipped)
+            self.stats['races'] += int(raced)
+            if outcome.success and outcome.source in ('host', 'subnet'):
+                self.stats[f'{outcome.source}_hits'] += 1
+
+    # ----------------- Driver -----------------
+
+    def try_credentials(self, ip: str, protocol: str, creds: Sequence[Any],
+                        attempt: Callable[[str, str, Any], Any],
+                        is_success: Optional[Callable[[Any], bool]] = None) -> CredentialAttempt:
+        """
+        Try creds in affinity order; attempt(username, password, cred) returns the
+        collected data. The first successful result wins and is remembered.
+        """
+        is_success = is_success or (lambda data: not is_failed_result(data))
+        creds = [c for c in creds if normalize_credential(c) is not None]
+        candidates, skipped, source = self.order(ip, protocol, creds)
+        outcome = CredentialAttempt(source=source, skipped=skipped)
+
+        def run(cred) -> Tuple[Any, bool, Optional[str]]:
+            username, password = normalize_credential(cred)
+            try:
+                data = attempt(username, password, cred)
+            except Exception as e:
+                return None, False, classify_failure(e)
+            if is_success(data):
+                return data, True, None
+            return data, False, classify_failure(data)
+
+        def settle(cred, result) -> bool:
+            data, ok, failure = result
+            outcome.attempts += 1
+            if ok:
+                self.record_success(ip, protocol, cred)
+                outcome.result, outcome.credential = data, cred
+                return True
+            outcome.failures[failure] = outcome.failures.get(failure, 0) + 1
+            if failure == AUTH_REJECTED:
+                self.record_failure(ip, protocol, cred)
+            return False
+
+        remaining = list(candidates)
+        raced = False
+        # Host and /24 hits are tried alone (a raced loser is one more failed login against
+        # the account); only with no affinity at all race the top candidates
+        if (source == 'none' and protocol.lower() in self.race_protocols
+                and self.race_top > 1 and len(remaining) > 1):
+            raced = True
+            head, remaining = remaining[:self.race_top], remaining[self.race_top:]
+            pool = ThreadPoolExecutor(max_workers=len(head), thread_name_prefix=f"CredRace-{ip}")
+            futures = {pool.submit(run, cred): cred for cred in head}
+            pending = set(futures)
+            try:
+                while pending and not outcome.success:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        if not outcome.success:
+                            settle(futures[future], future.result())
+                        else:
+                            outcome.attempts += 1
+                # Losers still running are attempts already spent; let them finish in the background
+                outcome.attempts += len(pending)
+                for future in pending:
+                    future.add_done_callback(lambda f, cred=futures[future]: self._settle_late(ip, protocol, cred, f))
+            finally:
+                pool.shutdown(wait=False)
+
+        for cred in remaining:
+            if outcome.success:
+                break
+            settle(cred, run(cred))
+
+        position = {credential_key(c): i for i, c in reversed(list(enumerate(creds)))}
+        if outcome.success:
+            outcome.naive_attempts = position.get(credential_key(outcome.credential), len(creds) - 1) + 1
+        else:
+            outcome.naive_attempts = len(creds)
+        self._account(outcome, raced)
+        return outcome
+
+    def _settle_late(self, ip: str, protocol: str, cred: Any, future) -> None:
+        try:
+            data, ok, failure = future.result()
+        except Exception:
+            return
+        if not ok and failure == AUTH_REJECTED:
+            try:
+                self.record_failure(ip, protocol, cred)
+            except sqlite3.Error:
+                pass  # best effort: the scan that raced this login has already moved on
+
+
+_default_cache: Optional[CredentialAffinityCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_credential_cache(db_path: str = 'assets.db') -> CredentialAffinityCache:
+    """Shared cache for the default database"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None or _default_cache.db_path != db_path:
+            _default_cache = CredentialAffinityCache(db_path)
+        return _default_cache
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+
+    cache = get_credential_cache(sys.argv[1] if len(sys.argv) > 1 else 'assets.db')
+    with cache._connect() as summary_conn:
+        affinity = summary_conn.execute(
+            "SELECT scope, protocol, COUNT(*) FROM credential_affinity GROUP BY scope, protocol").fetchall()
+        failures = summary_conn.execute("SELECT COUNT(*) FROM credential_failures").fetchone()[0]
+    print("🔑 Credential affinity cache")
+    print(json.dumps({'affinity': [{'scope': s, 'protocol': p, 'entries': n} for s, p, n in affinity],
+                      'negative_entries': failures}, indent=2))
@@ -0,0 +1,458 @@
+#!/usr/bin/env python3
+"""
+💾 ONLINE DATABASE BACKUP
+========================
+Consistent backups of assets.db while collectors keep writing, in place of
+shutil.copy2 on assets.db / -wal / -shm (which can tear a backup mid-write):
+
+- sqlite3 online backup API, copied in small page batches with a pause
+  between batches so writers get the lock back (paged + throttled)
+- if writers keep restarting the paged copy, finish with one read-snapshot
+  step (never blocks writers in WAL mode; a bounded stall otherwise)
+- optional gzip / zstd compression of the finished snapshot
+- PRAGMA integrity_check on every copy before it is kept
+- scheduled snapshots with retention, and restore through the same API
+  (readers and writers on the live file see the swap atomically)
+"""
+
+import gzip
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from urllib.request import pathname2url
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+log = logging.getLogger(__name__)
+
+COMPRESSION_SUFFIXES = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+_SNAPSHOT_PATTERN = re.compile(r'^(?P<stem>.+)_(?P<stamp>\d{8}_\d{6})(?:_(?P<seq>\d+))?\.db(?P<suffix>\.gz|\.zst)?$')
+_COPY_CHUNK = 1024 * 1024
+
+
+class _RestartLimit(Exception):
+    """Writers restarted the paged copy too often"""
+
+
+@dataclass
+class BackupResult:
+    path: str
+    seconds: float
+    pages: int
+    size_bytes: int
+    restarts: int = 0
+    mode: str = 'paged'  # 'paged', or 'snapshot' after too many restarts
+    compression: Optional[str] = None
+    verified: Optional[bool] = None
+
+
+@dataclass
+class Snapshot:
+    path: str
+    created: datetime
+    size_bytes: int
+    compression: Optional[str]
+
+
+def _compression_of(path: str) -> Optional[str]:
+    if path.endswith('.gz'):
+        return 'gzip'
+    if path.endswith('.zst'):
+        return 'zstd'
+    return None
+
+
+def _open_compressed(path: str, mode: str, compression: Optional[str], level: Optional[int] = None):
+    if compression == 'gzip':
+        return gzip.open(path, mode, compresslevel=level or 6)
+    if compression == 'zstd':
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("zstd compression needs the 'zstandard' package")
+        if 'w' in mode:
+            return zstandard.ZstdCompressor(level=level or 3, threads=-1).stream_writer(open(path, 'wb'))
+        return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'))
+    return open(path, mode)
+
+
+def integrity_check(db_path: str, quick: bool = False) -> Tuple[bool, str]:
+    """PRAGMA integrity_check (or quick_check) on an uncompressed database file"""
+    try:
+        conn = sqlite3.connect(f'file:{pathname2url(os.path.abspath(db_path))}?mode=ro', uri=True)
+        try:
+            rows = conn.execute('PRAGMA quick_check' if quick else 'PRAGMA integrity_check').fetchall()
+        finally:
+            conn.close()
+    except sqlite3.DatabaseError as e:  # not a database / malformed header
+        return False, str(e)
+    messages = [row[0] for row in rows]
+    return messages == ['ok'], '; '.join(messages[:5])
+
+
+class DatabaseBackup:
+    """💾 Paged, throttled online backups of one SQLite database"""
+
+    def __init__(self, db_path: str = 'assets.db', backup_dir: str = 'backups', pages_per_step: int = 256,
+                 step_pause: float = 0.002, max_restarts: int = 3, compression: Optional[str] = None,
+                 compression_level: Optional[int] = None, busy_timeout: float = 30.0):
+        self.db_path = db_path
+        self.backup_dir = backup_dir
+        self.pages_per_step = pages_per_step
+        self.step_pause = step_pause
+        self.max_restarts = max_restarts
+        self.compression = compression
+        self.compression_level = compression_level
+        self.busy_timeout = busy_timeout
+        self._lock = threading.Lock()
+
+    # ----------------- Backup -----------------
+
+    def _snapshot_path(self, compression: Optional[str]) -> str:
+        stem = os.path.splitext(os.path.basename(self.db_path))[0]
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        suffix = COMPRESSION_SUFFIXES[compression]
+        path = os.path.join(self.backup_dir, f'{stem}_{stamp}.db{suffix}')
+        sequence = 1
+        while os.path.exists(path):
+            path = os.path.join(self.backup_dir, f'{stem}_{stamp}_{sequence}.db{suffix}')
+            sequence += 1
+        return path
+
+    def _copy(self, target_db: str) -> Tuple[int, int, str]:
+        """Online copy into target_db → (pages, restarts, mode)"""
+        source = sqlite3.connect(self.db_path, timeout=self.busy_timeout)
+        try:
+            state = {'restarts': 0, 'remaining': None, 'total': 0}
+
+            def progress(status, remaining, total):
+                if state['remaining'] is not None and remaining > state['remaining']:
+                    state['restarts'] += 1  # a writer changed the source: the copy started over
+                    if state['restarts'] > self.max_restarts:
+                        raise _RestartLimit()
+                state['remaining'], state['total'] = remaining, total
+                if remaining and self.step_pause:
+                    time.sleep(self.step_pause)  # no lock is held between steps
+
+            for mode, pages in (('paged', self.pages_per_step), ('snapshot', -1)):
+                target = sqlite3.connect(target_db)
+                try:
+                    source.backup(target, pages=pages, progress=progress if pages > 0 else None)
+                    target.execute('PRAGMA journal_mode=DELETE')  # self-contained single-file snapshot
+                    page_count = target.execute('PRAGMA page_count').fetchone()[0]
+                    return page_count, state['restarts'], mode
+                except _RestartLimit:
+                    log.info(f"💾 Paged backup restarted {state['restarts']} times by writers; "
+                             f"finishing with one snapshot step")
+                finally:
+                    target.close()
+            raise RuntimeError("backup did not complete")
+        finally:
+            source.close()
+
+    def _compress(self, raw_path: str, path: str, compression: str) -> None:
+        with open(raw_path, 'rb') as src, _open_compressed(path, 'wb', compression, self.compression_level) as dst:
+            shutil.copyfileobj(src, dst, _COPY_CHUNK)
+
+    def backup(self, target: Optional[str] = None, compression: Optional[str] = '', verify: bool = True) -> BackupResult:
+        """Take one consistent snapshot (into backup_dir unless target is given)"""
+        compression = self.compression if compression == '' else compression
+        if compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(f"unknown compression {compression!r}")
+        if not os.path.exists(self.db_path):
+            raise FileNotFoundError(self.db_path)
+        with self._lock:
+            path = target or self._snapshot_path(compression)
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            started = time.perf_counter()
+            fd, raw_path = tempfile.mkstemp(prefix='.backup_', suffix='.db', dir=os.path.dirname(os.path.abspath(path)))
+            os.close(fd)
+            try:
+                pages, restarts, mode = self._copy(raw_path)
+                verified = None
+                if verify:
+                    verified, message = integrity_check(raw_path)
+                    if not verified:
+                        raise RuntimeError(f"backup failed integrity check: {message}")
+                if compression:
+                    self._compress(raw_path, path + '.partial', compression)
+                    os.replace(path + '.partial', path)
+                else:
+                    os.replace(raw_path, path)
+            finally:
+                for leftover in (raw_path, path + '.partial'):
+                    if os.path.exists(leftover):
+                        os.remove(leftover)
+            result = BackupResult(path, time.perf_counter() - started, pages, os.path.getsize(path), restarts, mode,
+                                  compression, verified)
+        log.info(f"💾 Backup {path}: {result.size_bytes / 1048576:.1f} MiB, {pages} pages in {result.seconds:.1f}s "
+                 f"({mode}, {restarts} restarts{', verified' if verified else ''})")
+        return result
+
+    # ----------------- Snapshots -----------------
+
+    def list_snapshots(self) -> List[Snapshot]:
+        """Snapshots of this database in backup_dir, oldest first"""
+        if not os.path.isdir(self.backup_dir):
+            return []
+        stem = os.path.splitext(os.path.basename(self.db_path))[0]
+        snapshots = []
+        for name in os.listdir(self.backup_dir):
+            match = _SNAPSHOT_PATTERN.match(name)
+            if not match or match.group('stem') != stem:
+                continue
+            path = os.path.join(self.backup_dir, name)
+            created = datetime.strptime(match.group('stamp'), '%Y%m%d_%H%M%S')
+            snapshots.append(Snapshot(path, created, os.path.getsize(path), _compression_of(name)))
+        snapshots.sort(key=lambda s: (s.created, os.path.getmtime(s.path)))
+        return snapshots
+
+    def prune(self, keep_last: int = 7, max_age_days: Optional[float] = None) -> List[str]:
+        """Retention: keep the newest keep_last snapshots, and none older than max_age_days
+        (the newest snapshot is always kept)"""
+        snapshots = self.list_snapshots()
+        removed = []
+        cutoff = datetime.now() - timedelta(days=max_age_days) if max_age_days is not None else None
+        for index, snapshot in enumerate(snapshots[:-1] if snapshots else []):
+            too_many = len(snapshots) - index > max(1, keep_last)
+            too_old = cutoff is not None and snapshot.created < cutoff
+            if too_many or too_old:
+                os.remove(snapshot.path)
+                removed.append(snapshot.path)
+        if removed:
+            log.info(f"🧹 Pruned {len(removed)} old snapshot(s)")
+        return removed
+
+    def _materialize(self, snapshot_path: str) -> Tuple[str, bool]:
+        """Plain database file for a snapshot → (path, is_temporary)"""
+        compression = _compression_of(snapshot_path)
+        if not compression:
+            return snapshot_path, False
+        fd, raw_path = tempfile.mkstemp(prefix='.restore_', suffix='.db',
+                                        dir=os.path.dirname(os.path.abspath(snapshot_path)))
+        os.close(fd)
+        try:
+            with _open_compressed(snapshot_path, 'rb', compression) as src, open(raw_path, 'wb') as dst:
+                shutil.copyfileobj(src, dst, _COPY_CHUNK)
+        except Exception:
+            os.remove(raw_path)
+            raise
+        return raw_path, True
+
+    def verify(self, snapshot_path: str, quick: bool = False) -> Tuple[bool, str]:
+        """Integrity check of a (possibly compressed) snapshot"""
+        raw_path, temporary = self._materialize(snapshot_path)
+        try:
+            return integrity_check(raw_path, quick)
+        finally:
+            if temporary:
+                os.remove(raw_path)
+
+    def restore(self, snapshot_path: Optional[str] = None, target: Optional[str] = None,
+                safety_backup: bool = True) -> Optional[BackupResult]:
+        """Restore a snapshot (latest by default) into the live database.
+
+        The snapshot is verified first; the current database is snapshotted
+        before it is overwritten (returned), unless safety_backup is False.
+        """
+        if snapshot_path is None:
+            snapshots = self.list_snapshots()
+            if not snapshots:
+                raise FileNotFoundError(f"no snapshots in {self.backup_dir}")
+            snapshot_path = snapshots[-1].path
+        target = target or self.db_path
+        raw_path, temporary = self._materialize(snapshot_path)
+        try:
+            ok, message = integrity_check(raw_path)
+            if not ok:
+                raise RuntimeError(f"snapshot failed integrity check: {message}")
+            safety = None
+            if safety_backup and os.path.exists(target) and target == self.db_path:
+                safety = self.backup(compression=None)
+            source = sqlite3.connect(raw_path)
+            destination = sqlite3.connect(target, timeout=self.busy_timeout)
+            try:
+                source.backup(destination)  # one step under a write lock: other connections see old or new
+            finally:
+                destination.close()
+                source.close()
+        finally:
+            if temporary:
+                os.remove(raw_path)
+        log.info(f"♻️ Restored {snapshot_path} into {target}")
+        return safety
+
+
+class SnapshotScheduler:
+    """⏰ Background snapshots every interval with retention"""
+
+    def __init__(self, backup: DatabaseBackup, interval_hours: float = 6.0, keep_last: int = 14,
+                 max_age_days: Optional[float] = None, run_immediately: bool = False):
+        self.backup = backup
+        self.interval = interval_hours * 3600
+        self.keep_last = keep_last
+        self.max_age_days = max_age_days
+        self.run_immediately = run_immediately
+        self.last_result: Optional[BackupResult] = None
+        self.last_error: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self) -> Optional[BackupResult]:
+        try:
+            self.last_result = self.backup.backup()
+            self.last_error = None
+            self.backup.prune(self.keep_last, self.max_age_days)
+        except Exception as e:
+            self.last_error = str(e)
+            log.error(f"❌ Scheduled backup failed: {e}")
+        return self.last_result
+
+    def _run(self) -> None:
+        if self.run_immediately:
+            self.run_once()
+        while not self._stop.wait(self.interval):
+            self.run_once()
+
+    def start(self) -> 'SnapshotScheduler':
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='snapshot-scheduler', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+# ======================================================================
+# Benchmark: backup time and writer stall
+# ======================================================================
+
+def _build_database(path: str, size_mb: int, journal_mode: str) -> None:
+    conn = sqlite3.connect(path)
+    conn.execute(f'PRAGMA journal_mode={journal_mode}')
+    conn.execute('PRAGMA synchronous=OFF')
+    conn.execute('CREATE TABLE IF NOT EXISTS assets (id INTEGER PRIMARY KEY, hostname TEXT, payload BLOB)')
+    conn.execute('CREATE TABLE IF NOT EXISTS writes (id INTEGER PRIMARY KEY, at REAL)')
+    rows = size_mb * 1024 * 1024 // 4096
+    batch = 50000
+    for start in range(0, rows, batch):
+        count = min(batch, rows - start)
+        conn.execute("WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < ?) "
+                     "INSERT INTO assets (hostname, payload) SELECT 'host-' || i, randomblob(4000) FROM n", (count,))
+        conn.commit()
+    conn.close()
+
+
+def _writer(path: str, stop: threading.Event, latencies: List[float], interval: float = 0.005) -> None:
+    conn = sqlite3.connect(path, timeout=60)
+    try:
+        while not stop.is_set():
+            started = time.perf_counter()
+            conn.execute('INSERT INTO writes (at) VALUES (?)', (time.time(),))
+            conn.commit()
+            latencies.append(time.perf_counter() - started)
+            time.sleep(interval)
+    finally:
+        conn.close()
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+def benchmark(size_mb: int = 2048, journal_mode: str = 'wal', work_dir: Optional[str] = None,
+              compression: Optional[str] = None, **options) -> dict:
+    """Backup a size_mb database while a writer commits every 5 ms; report backup time and writer stalls"""
+    temporary = work_dir is None
+    work_dir = work_dir or tempfile.mkdtemp(prefix='backup_bench_')
+    try:
+        return _benchmark(work_dir, size_mb, journal_mode, compression, **options)
+    finally:
+        if temporary:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _benchmark(work_dir: str, size_mb: int, journal_mode: str, compression: Optional[str], **options) -> dict:
+    db_path = os.path.join(work_dir, 'bench.db')
+    if not os.path.exists(db_path):
+        _build_database(db_path, size_mb, journal_mode)
+    report = {'size_mb': round(os.path.getsize(db_path) / 1048576), 'journal_mode': journal_mode}
+
+    stop, idle = threading.Event(), []
+    thread = threading.Thread(target=_writer, args=(db_path, stop, idle))
+    thread.start()
+    time.sleep(2)
+    stop.set()
+    thread.join()
+
+    stop, busy = threading.Event(), []
+    thread = threading.Thread(target=_writer, args=(db_path, stop, busy))
+    thread.start()
+    try:
+        result = DatabaseBackup(db_path, os.path.join(work_dir, 'backups'), compression=compression,
+                                **options).backup(verify=False)
+    finally:
+        stop.set()
+        thread.join()
+    started = time.perf_counter()
+    ok, _ = DatabaseBackup(db_path).verify(result.path)
+    report.update({
+        'backup_seconds': round(result.seconds, 2), 'mode': result.mode, 'restarts': result.restarts,
+        'backup_mib': round(result.size_bytes / 1048576, 1), 'verify_seconds': round(time.perf_counter() - started, 2),
+        'verified': ok, 'writes_during_backup': len(busy),
+        'writer_p50_ms_idle': round(_percentile(idle, 0.5) * 1000, 2),
+        'writer_p99_ms_idle': round(_percentile(idle, 0.99) * 1000, 2),
+        'writer_p99_ms_backup': round(_percentile(busy, 0.99) * 1000, 2),
+        'writer_max_stall_ms': round(max(busy, default=0) * 1000, 1),
+    })
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    parser = argparse.ArgumentParser(description="Online SQLite backup, verify, restore and retention")
+    parser.add_argument('command', choices=['backup', 'list', 'verify', 'restore', 'prune', 'benchmark'])
+    parser.add_argument('snapshot', nargs='?', help="snapshot path (verify / restore)")
+    parser.add_argument('--db', default='assets.db')
+    parser.add_argument('--dir', default='backups')
+    parser.add_argument('--compression', choices=['gzip', 'zstd'])
+    parser.add_argument('--keep', type=int, default=7)
+    parser.add_argument('--max-age-days', type=float)
+    parser.add_argument('--size-mb', type=int, default=2048, help="benchmark database size")
+    parser.add_argument('--journal-mode', default='wal', help="benchmark journal mode (wal / delete)")
+    args = parser.parse_args()
+
+    manager = DatabaseBackup(args.db, args.dir, compression=args.compression)
+    if args.command == 'backup':
+        print(json.dumps(manager.backup().__dict__, indent=2))
+    elif args.command == 'list':
+        for snap in manager.list_snapshots():
+            print(f"💾 {snap.created:%Y-%m-%d %H:%M:%S}  {snap.size_bytes / 1048576:8.1f} MiB  {snap.path}")
+    elif args.command == 'verify':
+        for snap_path in [args.snapshot] if args.snapshot else [s.path for s in manager.list_snapshots()]:
+            ok, message = manager.verify(snap_path)
+            print(f"{'✅' if ok else '❌'} {snap_path}: {message}")
+    elif args.command == 'restore':
+        manager.restore(args.snapshot)
+    elif args.command == 'prune':
+        print(f"🧹 Removed {len(manager.prune(args.keep, args.max_age_days))} snapshot(s)")
+    else:
+        print(json.dumps(benchmark(args.size_mb, args.journal_mode, compression=args.compression), indent=2))
@@ -0,0 +1,543 @@
+# -*- coding: utf-8 -*-
+"""
+Versioned schema migrations for assets.db.
+
+Every schema change the project used to make ad hoc (db.models'
+_migrate_database, schema_updater, update_database_schema, fix_database_schema,
+comprehensive_schema, EnhancedUltimatePerformanceCollector's
+assets_enhanced table, the web service's assigned_department column and the
+scan checkpoint tables) is one ordered, idempotent migration here. Pending
+migrations run in a single IMMEDIATE transaction together with their
+`schema_version` rows and the `PRAGMA user_version` bump, so a failure leaves
+the database exactly as it was.
+
+ensure_schema() is the only thing startup and save paths call: once the
+database is current it costs one `PRAGMA user_version` read and no
+table_info probing.
+
+    python -m db.migrations status --db assets.db
+    python -m db.migrations migrate --db assets.db.backup_20251005_174916
+"""
+from __future__ import annotations
+
+import logging
+import re
+import sqlite3
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+log = logging.getLogger(__name__)
+
+Column = Tuple[str, str]
+
+
+class MigrationError(RuntimeError):
+    """A migration step failed; the transaction was rolled back"""
+
+
+class MigrationContext:
+    """What a step sees: the connection plus a per-run column cache"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self._columns: Dict[str, Set[str]] = {}
+        self.added: List[str] = []
+
+    def columns(self, table: str) -> Set[str]:
+        if table not in self._columns:
+            self._columns[table] = {row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+        return self._columns[table]
+
+    def add_column(self, table: str, name: str, declaration: str) -> bool:
+        existing = self.columns(table)
+        if name in existing:
+            return False
+        self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {alterable(declaration)}")
+        existing.add(name)
+        self.added.append(f"{table}.{name}")
+        return True
+
+    def reset(self) -> None:
+        self._columns.clear()
+
+
+Step = Callable[[MigrationContext], None]
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    steps: Tuple[Step, ...]
+
+
+_NON_CONSTANT_DEFAULT = re.compile(r"\s+DEFAULT\s+(CURRENT_TIMESTAMP|CURRENT_TIME|CURRENT_DATE|\(.*\))", re.I)
+_NOT_ADDABLE = re.compile(r"\s+(PRIMARY\s+KEY(\s+AUTOINCREMENT)?|UNIQUE|NOT\s+NULL)\b", re.I)
+
+
+def alterable(declaration: str) -> str:
+    """ALTER TABLE ADD COLUMN rejects keys, UNIQUE, bare NOT NULL and non-constant defaults"""
+    declaration = _NON_CONSTANT_DEFAULT.sub('', f" {declaration}")
+    return _NOT_ADDABLE.sub('', declaration).strip() or 'TEXT'
+
+
+def execute(*statements: str) -> Step:
+    def step(ctx: MigrationContext) -> None:
+        for statement in statements:
+            ctx.conn.execute(statement)
+            if re.match(r"\s*(CREATE|ALTER|DROP)\s+TABLE", statement, re.I):
+                ctx.reset()
+    return step
+
+
+def add_columns(table: str, columns: Iterable[Column]) -> Step:
+    columns = tuple(columns)
+
+    def step(ctx: MigrationContext) -> None:
+        for name, declaration in columns:
+            ctx.add_column(table, name, declaration)
+    return step
+
+
+def create_indexes(table: str, indexes: Iterable[Tuple[str, str]]) -> Step:
+    """(index name, column list); an index whose name is already taken is left alone"""
+    indexes = tuple(indexes)
+
+    def step(ctx: MigrationContext) -> None:
+        for name, columns in indexes:
+            ctx.conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+    return step
+
+
+# ======================================================================
+# Migrations
+# ======================================================================
+
+# db.models: Excel sync metadata and duplicate-prevention bookkeeping
+SYNC_COLUMNS: List[Column] = [
+    ('_excel_path', 'TEXT'), ('_sheet_name', 'TEXT'), ('_headers', 'TEXT'),
+    ('_sync_pending', "TEXT DEFAULT '0'"), ('_sync_attempts', 'INTEGER DEFAULT 0'),
+    ('_sync_completed_at', 'TEXT'), ('_sync_failed', "TEXT DEFAULT '0'"),
+]
+QUALITY_COLUMNS: List[Column] = [
+    ('_device_fingerprint', 'TEXT'), ('_collection_quality', "TEXT DEFAULT 'Standard'"),
+    ('_duplicate_resolved_at', 'TEXT'), ('_validation_status', 'TEXT'), ('_error_count', 'INTEGER DEFAULT 0'),
+    ('_last_collection_attempt', 'TEXT'),
+]
+
+# update_database_schema.py: NMAP OS detection results
+NMAP_COLUMNS: List[Column] = [
+    ('nmap_os_family', 'TEXT'), ('nmap_device_type', 'TEXT'), ('nmap_confidence', 'TEXT'),
+    ('detection_method', 'TEXT'),
+]
+
+# schema_updater.py: 100% hardware collection fields
+ENHANCED_COLLECTION_COLUMNS: List[Column] = [
+    ('graphics_cards', 'TEXT'), ('gpu_name', 'TEXT'), ('gpu_memory_gb', 'REAL'), ('gpu_driver_version', 'TEXT'),
+    ('monitor_info', 'TEXT'), ('display_resolution', 'TEXT'), ('monitor_count', 'INTEGER'),
+    ('disk_info', 'TEXT'), ('disk_space_gb', 'REAL'), ('disk_free_gb', 'REAL'), ('disk_model', 'TEXT'),
+    ('disk_serial', 'TEXT'), ('disk_type', 'TEXT'),
+    ('processor_threads', 'INTEGER'), ('processor_cache', 'TEXT'), ('processor_family', 'TEXT'),
+    ('processor_speed_ghz', 'REAL'),
+    ('total_memory_gb', 'REAL'), ('memory_modules', 'TEXT'), ('memory_slots_used', 'INTEGER'),
+    ('memory_slots_total', 'INTEGER'),
+    ('os_build', 'TEXT'), ('os_architecture', 'TEXT'), ('os_service_pack', 'TEXT'), ('os_install_date', 'TEXT'),
+    ('usb_devices', 'TEXT'), ('usb_controllers', 'TEXT'), ('audio_devices', 'TEXT'), ('bluetooth_devices', 'TEXT'),
+    ('network_adapters_detailed', 'TEXT'), ('wifi_info', 'TEXT'), ('ethernet_speed', 'TEXT'),
+    ('motherboard_serial', 'TEXT'), ('chassis_type', 'TEXT'), ('power_supply', 'TEXT'), ('cooling_devices', 'TEXT'),
+    ('bios_date', 'TEXT'), ('bios_vendor', 'TEXT'), ('uefi_enabled', 'BOOLEAN'),
+    ('system_uptime', 'TEXT'), ('last_boot_time', 'TEXT'), ('time_zone', 'TEXT'), ('domain_workgroup', 'TEXT'),
+    ('installed_software_count', 'INTEGER'), ('antivirus_software', 'TEXT'), ('windows_updates', 'TEXT'),
+    ('cpu_usage_percent', 'REAL'), ('memory_usage_percent', 'REAL'), ('disk_usage_percent', 'REAL'),
+]
+
+# fix_database_schema.py / RobustDataSaver: JSON-encoded scan data and change detection
+PERSISTENCE_COLUMNS: List[Column] = [
+    ('collection_time', 'TEXT'), ('mac_address', 'TEXT'), ('vendor', 'TEXT'), ('services', 'TEXT'),
+    ('open_ports', 'TEXT'), ('http_banner', 'TEXT'), ('device_classification', 'TEXT'),
+    ('collection_methods', 'TEXT'), ('scan_data', 'TEXT'), ('last_updated', 'TEXT'), ('data_hash', 'TEXT'),
+]
+PERSISTENCE_INDEXES = [('idx_ip', 'ip_address'), ('idx_hostname', 'hostname'),
+                       ('idx_classification', 'device_classification'), ('idx_updated', 'last_updated')]
+
+
+def _core_tables(ctx: MigrationContext) -> None:
+    from db.models import DDL
+    tables = [stmt for stmt in DDL if 'CREATE TABLE' in stmt.upper()]
+    indexes = [stmt for stmt in DDL if 'CREATE INDEX' in stmt.upper()]
+    execute(*tables)(ctx)
+    # Databases created before the sync / quality columns existed get them before their indexes
+    add_columns('assets', SYNC_COLUMNS + QUALITY_COLUMNS)(ctx)
+    execute(*indexes)(ctx)
+
+
+def _comprehensive_columns(ctx: MigrationContext) -> None:
+    from comprehensive_schema import COMPREHENSIVE_COLUMNS
+    add_columns('assets', [(name, declaration) for name, declaration in COMPREHENSIVE_COLUMNS.items()
+                           if name != 'id'])(ctx)
+
+
+ASSETS_ENHANCED_DDL = '''
+    CREATE TABLE IF NOT EXISTS assets_enhanced (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+
+        -- Basic Identification
+        hostname TEXT,
+        computer_name TEXT,
+        device_hostname TEXT,
+        domain_hostname TEXT,
+        dns_hostname TEXT,
+        ip_address TEXT,
+        mac_address TEXT,
+
+        -- Hostname Tracking
+        hostname_mismatch_status TEXT, -- 'Match', 'Mismatch', 'No_Domain_Record', 'DNS_Error'
+        hostname_mismatch_details TEXT,
+        domain_name TEXT,
+        workgroup TEXT,
+
+        -- Hardware Specifications
+        system_manufacturer TEXT,
+        system_model TEXT,
+        system_family TEXT,
+        system_sku TEXT,
+        serial_number TEXT,
+        asset_tag TEXT,
+        uuid TEXT,
+
+        -- Processor Information
+        processor_name TEXT,
+        processor_manufacturer TEXT,
+        processor_architecture TEXT,
+        processor_cores INTEGER,
+        processor_logical_cores INTEGER,
+        processor_speed_mhz INTEGER,
+        processor_max_speed_mhz INTEGER,
+        processor_l2_cache_size TEXT,
+        processor_l3_cache_size TEXT,
+
+        -- Memory Information
+        total_physical_memory_gb REAL,
+        available_memory_gb REAL,
+        memory_slots_used INTEGER,
+        memory_slots_total INTEGER,
+        memory_modules TEXT, -- JSON array of memory modules
+
+        -- Storage Information
+        storage_devices TEXT, -- JSON array of all storage devices
+        total_storage_gb REAL,
+        available_storage_gb REAL,
+        storage_summary TEXT, -- "Disk 1: 250GB SSD, Disk 2: 500GB HDD"
+
+        -- Graphics Information
+        graphics_cards TEXT, -- JSON array of all graphics cards
+        primary_graphics_card TEXT,
+        graphics_memory_mb INTEGER,
+        graphics_driver_version TEXT,
+
+        -- Display Information
+        connected_monitors INTEGER,
+        monitor_details TEXT, -- JSON array of monitor information
+        screen_resolution TEXT,
+        display_adapters TEXT, -- JSON array of display adapters
+
+        -- Network Information
+        network_adapters TEXT, -- JSON array of network adapters
+        wireless_adapters TEXT, -- JSON array of wireless adapters
+        network_configuration TEXT, -- JSON of IP config
+
+        -- Operating System
+        operating_system TEXT,
+        os_version TEXT,
+        os_build TEXT,
+        os_edition TEXT,
+        os_architecture TEXT,
+        os_install_date TEXT,
+        last_boot_time TEXT,
+
+        -- BIOS/UEFI Information
+        bios_manufacturer TEXT,
+        bios_version TEXT,
+        bios_release_date TEXT,
+        firmware_type TEXT, -- BIOS or UEFI
+
+        -- Software Information
+        installed_software TEXT, -- JSON array of installed programs
+        installed_updates TEXT, -- JSON array of Windows updates
+        antivirus_software TEXT,
+        browsers_installed TEXT, -- JSON array of browsers
+
+        -- User Information (Enhanced)
+        current_user TEXT,
+        current_logged_user TEXT,
+        interactive_user TEXT,
+        registered_owner TEXT,
+        last_logged_users TEXT, -- JSON array of recent users
+        user_profiles TEXT, -- JSON array of user profiles with privileges
+        user_groups TEXT, -- JSON array of user groups
+        local_users TEXT, -- JSON array of all local users
+        domain_users TEXT, -- JSON array of domain users
+        admin_users TEXT, -- JSON array of admin users
+        login_sessions TEXT, -- JSON array of current login sessions
+
+        -- System Performance
+        cpu_usage_percent REAL,
+        memory_usage_percent REAL,
+        disk_usage_percent REAL,
+        system_uptime_hours REAL,
+
+        -- Security Information
+        windows_defender_status TEXT,
+        firewall_status TEXT,
+        encryption_status TEXT,
+        uac_status TEXT,
+
+        -- Asset Management
+        department TEXT,
+        location TEXT,
+        site TEXT,
+        cost_center TEXT,
+        purchase_date TEXT,
+        warranty_expiry TEXT,
+
+        -- Original fields for backward compatibility
+        os_family TEXT,
+        device_type TEXT,
+        manufacturer TEXT,
+        model TEXT,
+        processor TEXT,
+        memory_gb REAL,
+        disk_info TEXT,
+
+        -- Collection Metadata
+        collection_method TEXT,
+        collection_timestamp TEXT,
+        collection_duration_seconds REAL,
+        collection_id TEXT,
+        data_completeness_score INTEGER, -- 0-100 based on fields collected
+
+        -- Change Tracking
+        last_hardware_change TEXT,
+        last_software_change TEXT,
+        configuration_hash TEXT,
+        change_history TEXT, -- JSON array of changes
+
+        -- Device Status
+        device_status TEXT, -- 'Online', 'Offline', 'Unknown'
+        last_seen TEXT,
+        ping_response_ms INTEGER,
+
+        -- Timestamps
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+'''
+
+# scan_checkpoints.ScanCheckpointStore: resumable sweeps (runs -> chunks -> per-IP state)
+SCAN_CHECKPOINT_DDL = (
+    """
+    CREATE TABLE IF NOT EXISTS scan_runs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        run_key TEXT NOT NULL,
+        targets TEXT NOT NULL,
+        chunk_size INTEGER,
+        status TEXT NOT NULL DEFAULT 'running', -- running / completed / aborted / expired
+        total_hosts INTEGER DEFAULT 0,
+        chunks INTEGER DEFAULT 0,
+        chunks_done INTEGER DEFAULT 0,
+        alive INTEGER DEFAULT 0,
+        collected INTEGER DEFAULT 0,
+        failed INTEGER DEFAULT 0,
+        resumes INTEGER DEFAULT 0,
+        created_at TEXT,
+        updated_at TEXT,
+        completed_at TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_scan_runs_key ON scan_runs(run_key, status)",
+    """
+    CREATE TABLE IF NOT EXISTS scan_run_chunks (
+        run_id INTEGER NOT NULL,
+        seq INTEGER NOT NULL,
+        target TEXT,
+        first_ip TEXT,
+        last_ip TEXT,
+        hosts INTEGER,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER DEFAULT 0,
+        alive INTEGER DEFAULT 0,
+        collected INTEGER DEFAULT 0,
+        failed INTEGER DEFAULT 0,
+        error TEXT,
+        updated_at TEXT,
+        PRIMARY KEY (run_id, seq)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS scan_run_hosts (
+        run_id INTEGER NOT NULL,
+        ip TEXT NOT NULL,
+        chunk_seq INTEGER NOT NULL,
+        position INTEGER,
+        state TEXT NOT NULL DEFAULT 'pending',
+        updated_at TEXT,
+        PRIMARY KEY (run_id, ip)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_scan_run_hosts_chunk ON scan_run_hosts(run_id, chunk_seq, state)",
+    "CREATE INDEX IF NOT EXISTS idx_scan_run_hosts_state ON scan_run_hosts(run_id, state)",
+)
+
+MIGRATIONS: Tuple[Migration, ...] = (
+    Migration(1, 'core_tables', (_core_tables,)),
+    Migration(2, 'nmap_detection_columns', (add_columns('assets', NMAP_COLUMNS),)),
+    Migration(3, 'enhanced_collection_columns', (add_columns('assets', ENHANCED_COLLECTION_COLUMNS),)),
+    Migration(4, 'persistence_columns', (add_columns('assets', PERSISTENCE_COLUMNS),
+                                         create_indexes('assets', PERSISTENCE_INDEXES))),
+    Migration(5, 'comprehensive_columns', (_comprehensive_columns,)),
+    Migration(6, 'assets_enhanced_table', (
+        execute(ASSETS_ENHANCED_DDL),
+        create_indexes('assets_enhanced', [('idx_ip_address', 'ip_address'), ('idx_hostname', 'hostname'),
+                                           ('idx_device_status', 'device_status')]),
+    )),
+    # WebService/intelligent_app.py: department assignment (read by the dashboards, written by bulk assign)
+    Migration(7, 'assets_enhanced_department', (add_columns('assets_enhanced', [('assigned_department', 'TEXT')]),)),
+    Migration(8, 'scan_checkpoint_tables', (execute(*SCAN_CHECKPOINT_DDL),)),
+)
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+SCHEMA_VERSION_DDL = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_at TEXT NOT NULL,
+        duration_ms REAL,
+        columns_added INTEGER DEFAULT 0
+    )
+"""
+
+
+# ======================================================================
+# Engine
+# ======================================================================
+
+def current_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def pending(conn: sqlite3.Connection, migrations: Sequence[Migration] = MIGRATIONS) -> List[Migration]:
+    version = current_version(conn)
+    return [migration for migration in migrations if migration.version > version]
+
+
+def _open(target: Union[str, sqlite3.Connection]) -> Tuple[sqlite3.Connection, bool]:
+    if isinstance(target, sqlite3.Connection):
+        return target, False
+    return sqlite3.connect(target, timeout=30), True
+
+
+def migrate(target: Union[str, sqlite3.Connection], migrations: Sequence[Migration] = MIGRATIONS,
+            target_version: Optional[int] = None) -> List[Dict[str, object]]:
+    """Apply every pending migration in one transaction; returns what was applied"""
+    conn, owned = _open(target)
+    isolation_level = conn.isolation_level
+    try:
+        wanted = [m for m in migrations if target_version is None or m.version <= target_version]
+        if not wanted or current_version(conn) >= wanted[-1].version:
+            return []
+        if conn.in_transaction:
+            conn.commit()
+        conn.isolation_level = None
+        conn.execute("BEGIN IMMEDIATE")
+        applied: List[Dict[str, object]] = []
+        try:
+            # Another process may have migrated while we waited for the write lock
+            todo = pending(conn, wanted)
+            conn.execute(SCHEMA_VERSION_DDL)
+            ctx = MigrationContext(conn)
+            for migration in todo:
+                started = time.perf_counter()
+                before = len(ctx.added)
+                try:
+                    for step in migration.steps:
+                        step(ctx)
+                except sqlite3.Error as e:
+                    raise MigrationError(f"migration {migration.version} ({migration.name}) failed: {e}") from e
+                record = {'version': migration.version, 'name': migration.name,
+                          'applied_at': datetime.now().isoformat(timespec='seconds'),
+                          'duration_ms': round((time.perf_counter() - started) * 1000, 3),
+                          'columns_added': len(ctx.added) - before}
+                conn.execute("INSERT OR REPLACE INTO schema_version (version, name, applied_at, duration_ms, "
+                             "columns_added) VALUES (:version, :name, :applied_at, :duration_ms, :columns_added)",
+                             record)
+                applied.append(record)
+            if todo:
+                conn.execute(f"PRAGMA user_version = {int(todo[-1].version)}")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        for record in applied:
+            log.info("Applied schema migration %s (%s): %s columns in %.1f ms", record['version'], record['name'],
+                     record['columns_added'], record['duration_ms'])
+        return applied
+    finally:
+        conn.isolation_level = isolation_level
+        if owned:
+            conn.close()
+
+
+def ensure_schema(target: Union[str, sqlite3.Connection], migrations: Sequence[Migration] = MIGRATIONS) -> bool:
+    """Fast path for startup and save paths: True when migrations had to run"""
+    conn, owned = _open(target)
+    try:
+        if current_version(conn) >= migrations[-1].version:
+            return False
+        return bool(migrate(conn, migrations))
+    finally:
+        if owned:
+            conn.close()
+
+
+def history(target: Union[str, sqlite3.Connection]) -> List[Tuple]:
+    conn, owned = _open(target)
+    try:
+        exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'").fetchone()
+        if not exists:
+            return []
+        return conn.execute("SELECT version, name, applied_at, duration_ms, columns_added FROM schema_version "
+                            "ORDER BY version").fetchall()
+    finally:
+        if owned:
+            conn.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Versioned assets.db schema migrations")
+    parser.add_argument('command', choices=('status', 'migrate'))
+    parser.add_argument('--db', default='assets.db')
+    parser.add_argument('--to', type=int, default=None, help="stop at this version")
+    args = parser.parse_args()
+
+    if args.command == 'migrate':
+        started = time.perf_counter()
+        applied = migrate(args.db, target_version=args.to)
+        for record in applied:
+            print(f"✅ {record['version']:>3} {record['name']}: {record['columns_added']} columns added "
+                  f"({record['duration_ms']:.1f} ms)")
+        print(f"🗄️ {args.db} at schema version {current_version(sqlite3.connect(args.db))} "
+              f"({len(applied)} applied in {time.perf_counter() - started:.2f}s)")
+    else:
+        conn = sqlite3.connect(args.db)
+        version = current_version(conn)
+        for row in history(conn):
+            print(f"   {row[0]:>3} {row[1]:<32} {row[2]}  {row[4]} columns")
+        todo = pending(conn)
+        print(f"🗄️ {args.db}: version {version} of {LATEST_VERSION}"
+              + (f", pending: {', '.join(m.name for m in todo)}" if todo else ", up to date"))
+        conn.close()
@@ -160,61 +160,13 @@ DDL = [
 
 def bootstrap_schema() -> None:
     """تشغيل DDL مرة واحدة (Idempotent)."""
-    from db.connection import init_db
+    from db.connection import DB_PATH, init_db
+    from db.migrations import MigrationError, ensure_schema
     init_db()
-    with connect() as c:
-        # Run migrations first
-        _migrate_database(c)
-        
-        # Then run DDL
-        for stmt in DDL:
-            c.execute(stmt)
-
-def _migrate_database(conn) -> None:
-    """Apply database migrations for existing installations"""
+    # قاعدة محدثة = قراءة PRAGMA user_version فقط
     try:
-        cursor = conn.cursor()
-        
-        # Check if sync columns exist
-        cursor.execute("PRAGMA table_info(assets)")
-        columns = [col[1] for col in cursor.fetchall()]
-        
-        sync_columns = [
-            '_excel_path', '_sheet_name', '_headers', 
-            '_sync_pending', '_sync_attempts', '_sync_completed_at', '_sync_failed'
-        ]
-        
-        # Enhanced columns for duplicate prevention and quality tracking
-        enhanced_columns = [
-            '_device_fingerprint', '_collection_quality', '_duplicate_resolved_at',
-            '_validation_status', '_error_count', '_last_collection_attempt'
-        ]
-        
-        # Add missing sync columns
-        for col in sync_columns:
-            if col not in columns:
-                if col == '_sync_pending':
-                    cursor.execute(f"ALTER TABLE assets ADD COLUMN {col} TEXT DEFAULT '0'")
-                elif col == '_sync_attempts':
-                    cursor.execute(f"ALTER TABLE assets ADD COLUMN {col} INTEGER DEFAULT 0")
-                elif col == '_sync_failed':
-                    cursor.execute(f"ALTER TABLE assets ADD COLUMN {col} TEXT DEFAULT '0'")
-                else:
-                    cursor.execute(f"ALTER TABLE assets ADD COLUMN {col} TEXT")
-        
-        # Add missing enhanced columns
-        for col in enhanced_columns:
-            if col not in columns:
-                if col == '_collection_quality':
-                    cursor.execute(f"ALTER TABLE assets ADD COLUMN {col} TEXT DEFAULT 'Standard'")
-                elif col == '_error_count':
-                    cursor.execute(f"ALTER TABLE assets ADD COLUMN {col} INTEGER DEFAULT 0")
-                else:
-                    cursor.execute(f"ALTER TABLE assets ADD COLUMN {col} TEXT")
-                    
-        conn.commit()
-        
-    except Exception as e:
-        # Migration failed, but continue - new installs will work
+        ensure_schema(DB_PATH)
+    except MigrationError as e:
+        # Rolled back as a whole; existing installations keep working on the old schema
         import logging
         logging.warning(f"Database migration failed (non-fatal): {e}")
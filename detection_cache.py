@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+🧬 DETECTION FINGERPRINT CACHE
+=============================
+Persistent OS / device-type detection cache so rescans skip the nmap -O run
+for devices that have not changed:
+
+- key: MAC address (from the ARP table) or the IP when no MAC is known
+- plus a hash of the open-port set from a quick non-blocking port probe
+- stores os_family, device_type, confidence and the full detection result
+
+A hit needs the same MAC (or IP) and the same open ports within the TTL; a
+new port, a new NIC or force_refresh sends the host back through nmap.
+"""
+
+import errno
+import hashlib
+import json
+import os
+import re
+import selectors
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Same ports the nmap OS scan looks at, plus the ones classify_device() keys on
+DETECTION_PROBE_PORTS = (22, 23, 80, 135, 139, 443, 445, 631, 902, 3389, 8080, 9100)
+
+_MAC_RE = re.compile(r'([0-9a-fA-F]{1,2}[:-]){5}[0-9a-fA-F]{1,2}')
+
+
+def normalize_mac(mac: Optional[str]) -> Optional[str]:
+    if not mac or not _MAC_RE.fullmatch(mac.strip()):
+        return None
+    mac = ':'.join(part.zfill(2) for part in re.split('[:-]', mac.strip().lower()))
+    return None if mac in ('00:00:00:00:00:00', 'ff:ff:ff:ff:ff:ff') else mac
+
+
+def probe_ports(ip: str, ports: Iterable[int] = DETECTION_PROBE_PORTS, timeout: float = 0.5) -> List[int]:
+    """Open TCP ports, all connects in flight at once (one selector, no threads)"""
+    selector = selectors.DefaultSelector()
+    sockets: List[socket.socket] = []
+    open_ports: List[int] = []
+    try:
+        for port in ports:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setblocking(False)
+            sockets.append(sock)
+            code = sock.connect_ex((ip, port))
+            if code == 0:
+                open_ports.append(port)
+            elif code in (errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EAGAIN, getattr(errno, 'WSAEWOULDBLOCK', -1)):
+                selector.register(sock, selectors.EVENT_WRITE, port)
+        deadline = time.monotonic() + timeout
+        while selector.get_map():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            for key, _ in selector.select(remaining):
+                selector.unregister(key.fileobj)
+                if key.fileobj.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) == 0:
+                    open_ports.append(key.data)
+    except OSError:
+        pass
+    finally:
+        selector.close()
+        for sock in sockets:
+            sock.close()
+    return sorted(open_ports)
+
+
+def port_signature(open_ports: Iterable[int]) -> str:
+    ports = ','.join(str(p) for p in sorted(set(int(p) for p in open_ports)))
+    return hashlib.sha1(ports.encode('ascii')).hexdigest()[:16]
+
+
+class ArpTable:
+    """IP → MAC from the OS neighbour table, re-read at most every refresh_seconds"""
+
+    def __init__(self, refresh_seconds: float = 10.0):
+        self.refresh_seconds = refresh_seconds
+        self._entries: Dict[str, str] = {}
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def _read(self) -> Dict[str, str]:
+        entries: Dict[str, str] = {}
+        if os.path.exists('/proc/net/arp'):
+            with open('/proc/net/arp', 'r', encoding='ascii', errors='ignore') as f:
+                for line in f.readlines()[1:]:
+                    fields = line.split()
+                    if len(fields) >= 4 and normalize_mac(fields[3]):
+                        entries[fields[0]] = normalize_mac(fields[3])
+            return entries
+        try:
+            result = subprocess.run(
+                ['arp', '-a'], capture_output=True, text=True, timeout=5,
+                creationflags=subprocess.CREATE_NO_WINDOW if sys.platform.startswith('win') else 0)
+        except Exception:
+            return entries
+        for line in result.stdout.splitlines():
+            ip_match = re.search(r'(\d{1,3}(?:\.\d{1,3}){3})', line)
+            mac_match = _MAC_RE.search(line)
+            if ip_match and mac_match and normalize_mac(mac_match.group(0)):
+                entries[ip_match.group(1)] = normalize_mac(mac_match.group(0))
+        return entries
+
+    def lookup(self, ip: str) -> Optional[str]:
+        with self._lock:
+            if time.monotonic() - self._loaded_at > self.refresh_seconds:
+                self._entries = self._read()
+                self._loaded_at = time.monotonic()
+            return self._entries.get(ip)
+
+
+class DetectionCache:
+    """🧬 (MAC or IP, open-port hash) → detection result, persisted with a TTL"""
+
+    def __init__(self, db_path: str = 'assets.db', ttl_hours: float = 24,
+                 ports: Sequence[int] = DETECTION_PROBE_PORTS, probe_timeout: float = 0.5,
+                 arp_lookup: Optional[Callable[[str], Optional[str]]] = None):
+        self.db_path = db_path
+        self.ttl = ttl_hours * 3600
+        self.ports = tuple(ports)
+        self.probe_timeout = probe_timeout
+        self.arp_lookup = arp_lookup or ArpTable().lookup
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'refreshed': 0, 'changed': 0}
+        self._init_table()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _init_table(self):
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS detection_cache (
+                    cache_key TEXT NOT NULL,
+                    port_hash TEXT NOT NULL,
+                    ip_address TEXT,
+                    mac_address TEXT,
+                    open_ports TEXT,
+                    os_family TEXT,
+                    device_type TEXT,
+                    confidence INTEGER,
+                    result TEXT NOT NULL,
+                    detected_at REAL NOT NULL,
+                    PRIMARY KEY (cache_key)
+                )
+            """)
+
+    @staticmethod
+    def _key(ip: str, mac: Optional[str]) -> str:
+        return f"mac:{mac}" if mac else f"ip:{ip}"
+
+    def lookup(self, ip: str, mac: Optional[str], open_ports: Iterable[int]) -> Optional[Dict[str, Any]]:
+        """Cached result when the device and its port signature are unchanged and fresh"""
+        signature = port_signature(open_ports)
+        keys = [self._key(ip, mac), self._key(ip, None)] if mac else [self._key(ip, None)]
+        with self._connect() as conn:
+            for key in keys:
+                row = conn.execute("SELECT port_hash, mac_address, result, detected_at FROM detection_cache "
+                                   "WHERE cache_key = ?", (key,)).fetchone()
+                if row is None:
+                    continue
+                port_hash, cached_mac, result, detected_at = row
+                if key.startswith('ip:') and mac and cached_mac and cached_mac != mac:
+                    return None  # a different device took over this IP
+                if port_hash != signature:
+                    with self._lock:
+                        self.stats['changed'] += 1
+                    return None
+                if time.time() - detected_at > self.ttl:
+                    return None
+                return json.loads(result)
+        return None
+
+    def store(self, ip: str, mac: Optional[str], open_ports: Iterable[int], result: Dict[str, Any]) -> None:
+        open_ports = sorted(set(int(p) for p in open_ports))
+        with self._connect() as conn:
+            if mac:
+                conn.execute("DELETE FROM detection_cache WHERE cache_key = ?", (self._key(ip, None),))
+            conn.execute("INSERT OR REPLACE INTO detection_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", (
+                self._key(ip, mac), port_signature(open_ports), ip, mac, json.dumps(open_ports),
+                result.get('os_family'), result.get('nmap_device_type') or result.get('device_type'),
+                int(result.get('nmap_confidence') or result.get('confidence') or 0),
+                json.dumps(result, default=str), time.time()))
+
+    def invalidate(self, ip: Optional[str] = None) -> int:
+        with self._connect() as conn:
+            if ip is None:
+                return conn.execute("DELETE FROM detection_cache").rowcount
+            return conn.execute("DELETE FROM detection_cache WHERE ip_address = ?", (ip,)).rowcount
+
+    def detect(self, ip: str, scan: Callable[[str], Optional[Dict[str, Any]]],
+               force_refresh: bool = False) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """(detection result, cache hit); scan(ip) is the expensive detector (nmap -O)"""
+        open_ports = probe_ports(ip, self.ports, self.probe_timeout)
+        mac = self.arp_lookup(ip)
+        if not force_refresh:
+            cached = self.lookup(ip, mac, open_ports)
+            if cached is not None:
+                with self._lock:
+                    self.stats['hits'] += 1
+                cached.update({'ip': ip, 'cache_hit': True,
+                               'detection_method': f"{cached.get('detection_method', 'Detection')} (cached)"})
+                return cached, True
+        with self._lock:
+            self.stats['refreshed' if force_refresh else 'misses'] += 1
+        result = scan(ip)
+        if result:
+            self.store(ip, mac, open_ports, result)
+        return result, False
+
+    def summary(self) -> Dict[str, Any]:
+        with self._connect() as conn:
+            entries, by_mac = conn.execute(
+                "SELECT COUNT(*), SUM(mac_address IS NOT NULL) FROM detection_cache").fetchone()
+        with self._lock:
+            return {**self.stats, 'entries': entries, 'mac_keyed': by_mac or 0}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Detection fingerprint cache")
+    parser.add_argument('--db', default='assets.db')
+    parser.add_argument('--invalidate', metavar='IP', nargs='?', const='*')
+    parser.add_argument('--probe', metavar='IP')
+    args = parser.parse_args()
+
+    cache = DetectionCache(args.db)
+    if args.invalidate:
+        removed = cache.invalidate(None if args.invalidate == '*' else args.invalidate)
+        print(f"🗑️ Removed {removed} cached detections")
+    if args.probe:
+        print(f"🔌 {args.probe}: open {probe_ports(args.probe)} mac={cache.arp_lookup(args.probe)}")
+    print(f"🧬 {cache.summary()}")
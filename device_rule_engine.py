@@ -0,0 +1,769 @@
+#!/usr/bin/env python3
+"""
+🧠 DEVICE CLASSIFICATION RULE ENGINE
+===================================
+One table-driven engine behind every device-type classifier in the project
+(core.logic, core.collector, EnhancedCollectionStrategy, the ultimate
+performance collector, the NMAP port classifier and the web service's
+IntelligentAssetManager).
+
+Rules are plain data: keyword sets per field, port sets, port counts,
+numeric thresholds and weights. Each ruleset is compiled once into:
+
+- a single multi-pattern keyword matcher (one regex pass per field text;
+  every keyword found, including overlapping and nested ones, becomes a bit)
+- port-set bitmasks, so "any/all/none of these ports" is one AND
+- per-rule condition masks checked against those bitmaps
+
+Two evaluation modes cover the existing classifiers:
+
+- "first": ordered rules, the first match wins (if/elif ladders)
+- "score": weighted stages of scoring rules, exclusive groups for elif
+  chains, boosts, per-keyword counts and port-overlap ratios; the best
+  label above the threshold wins
+
+classify_many() / reclassify_database() evaluate each distinct feature
+signature once, so a whole inventory is reclassified in a single pass.
+"""
+
+import re
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# ======================================================================
+# Rulesets
+# ======================================================================
+
+_PRINTER_WORDS = ["printer", "laserjet", "officejet", "bizhub", "imageclass", "ricoh", "kyocera", "xerox",
+                  "brother", "canon", "command center"]
+_DISPLAY_WORDS = ["smart tv", "webos", "bravia", "tizen", "android tv", "hisense", "philips tv"]
+
+RULESETS: Dict[str, Dict[str, Any]] = {
+    # core.logic.infer_infra: SNMP/HTTP/WMI record → infrastructure class
+    'infra': {
+        'mode': 'first',
+        'fields': {
+            'atype': (' ', ['Asset Type']),
+            'descr': (' ', ['sysDescr']),
+            'title': (' ', ['HTTP Title']),
+            'bank': (' ', ['sysDescr', 'HTTP Title', 'Manufacturer', 'Device Model']),
+        },
+        'rules': [
+            {'label': 'Windows', 'any': {'atype': ['windows']}},
+            {'label': 'Linux', 'any': {'atype': ['linux']}},
+            {'label': 'Hypervisor', 'any': {'atype': ['hypervisor']}},
+            {'label': 'Hypervisor', 'any': {'descr': ['vmware']}},
+            {'label': 'Hypervisor', 'any': {'title': ['esxi']}},
+            {'label': 'Printer', 'any': {'bank': _PRINTER_WORDS}},
+            {'label': 'IP Phone/PBX', 'any': {'bank': ["yealink", "grandstream", "polycom", "ip phone", "pbx",
+                                                       "3cx", "freepbx", "asterisk"]}},
+            {'label': 'Firewall', 'any': {'bank': ["fortigate", "fortios"]}},
+            {'label': 'Switch', 'any': {'bank': ["switch", "catalyst", "edgeswitch"]}},
+            {'label': 'Router', 'any': {'bank': ["router", "edgeos", "mikrotik"]}},
+            {'label': 'Access Point', 'any': {'bank': ["ap ", " access point", "fortiap", "omada"]}},
+            {'label': 'Smart Display', 'exact': {'HTTP Type': 'Smart Display'}},
+            {'label': 'Smart Display', 'any': {'bank': _DISPLAY_WORDS}},
+            {'label': 'Network Device', 'equals': {'atype': 'snmp device'}},
+            {'label': 'HTTP Device', 'equals': {'atype': 'http device'}},
+        ],
+        'default': 'Unknown',
+    },
+
+    # collectors.snmp_collector._infer_infra: sysDescr alone
+    'snmp_descr': {
+        'mode': 'first',
+        'fields': {'descr': (' ', ['sysDescr'])},
+        'rules': [
+            {'label': 'Hypervisor', 'any': {'descr': ["vmware", "esxi", "hypervisor"]}},
+            {'label': 'Network', 'any': {'descr': ["cisco", "router", "switch", "ios", "nx-os"]}},
+            {'label': 'Firewall', 'any': {'descr': ["forti", "palo alto", "sonicwall", "checkpoint"]}},
+            {'label': 'Printer', 'any': {'descr': ["printer", "hp laserjet", "epson", "canon", "ricoh", "brother"]}},
+        ],
+        'default': 'Network',
+    },
+
+    # core.collector.http_fingerprint: page title + Server header + body → type guess
+    'http_hint': {
+        'mode': 'first',
+        'fields': {'blob': ('', ['title', 'server', 'body'])},
+        'rules': [{'label': label, 'any': {'blob': [word]}} for word, label in [
+            ("HP LaserJet", "Printer"), ("Kyocera Command Center", "Printer"),
+            ("Ricoh Web Image Monitor", "Printer"), ("Xerox", "Printer"),
+            ("Brother", "Printer"), ("Canon", "Printer"),
+            ("Yealink", "IP Phone"), ("Grandstream", "IP Phone"), ("3CX", "PBX"),
+            ("Ubiquiti", "Switch/Router"), ("EdgeOS", "Router"), ("MikroTik", "Router/Switch"),
+            ("FortiGate", "Firewall"), ("Cisco", "Switch/Router"), ("VMware ESXi", "Hypervisor"),
+            ("Hikvision", "NVR/DVR"), ("Dahua", "NVR/DVR"),
+        ]] + [{'label': 'Smart Display', 'any': {'blob': ["webos", "tizen", "bravia", "hisense", "smart tv",
+                                                           "android tv", "philips tv"]}}],
+        'default': None,
+    },
+
+    # core.collector._infer_infra_from_ports
+    'port_infra': {
+        'mode': 'first',
+        'rules': [
+            {'label': 'Network (SNMP Device)', 'ports_any': [161]},
+            {'label': 'Network (SSH/Web)', 'ports_all': [22], 'ports_any': [80, 443]},
+            {'label': 'SSH Device', 'ports_any': [22]},
+            {'label': 'Web Device', 'ports_any': [80, 443, 8080, 8443, 631]},
+            {'label': 'Windows (SMB/RPC)', 'ports_any': [135, 445]},
+        ],
+        'default': 'Network',
+    },
+
+    # EnhancedCollectionStrategy.classify_device (keys of its DEVICE_TYPES)
+    'strategy': {
+        'mode': 'score',
+        'combine': 'max',
+        'threshold': 50,
+        'fields': {'hostname': (' ', ['hostname']), 'os': (' ', ['os_family'])},
+        'rules': [
+            # Windows server vs workstation (one branch of an if/elif chain)
+            {'group': 'windows', 'scores': {'WINDOWS_SERVER': 90}, 'ports_any': [135, 445],
+             'any': {'os': ['windows']}, 'ports_any_2': [3389, 53, 88, 389, 636]},
+            {'group': 'windows', 'scores': {'WINDOWS_SERVER': 85}, 'ports_any': [135, 445],
+             'any': [('os', ['windows']), ('hostname', ['server', 'srv', 'dc', 'domain', 'exchange', 'sql'])]},
+            {'group': 'windows', 'scores': {'LAPTOP': 70}, 'ports_any': [135, 445],
+             'any': [('os', ['windows']), ('hostname', ['laptop', 'mobile', 'book'])]},
+            {'group': 'windows', 'scores': {'WORKSTATION': 70}, 'ports_any': [135, 445],
+             'any': {'os': ['windows']}},
+            {'scores': {'LINUX_SERVER': 70}, 'ports_all': [22], 'any': {'os': ['linux', 'unix']},
+             'boosts': [{'scores': {'LINUX_SERVER': 30}, 'ports_any': [80, 443, 25, 21, 53]}]},
+            {'group': 'snmp', 'scores': {'SWITCH': 70}, 'ports_all': [161, 23]},
+            {'group': 'snmp', 'scores': {'ACCESS_POINT': 80}, 'ports_all': [161],
+             'any': {'hostname': ['ap', 'wifi', 'wireless', 'access']}},
+            {'group': 'snmp', 'scores': {'SWITCH': 50}, 'ports_all': [161]},
+            {'scores': {'FIREWALL': 70}, 'ports_any': [8080, 4343, 8443], 'ports_all': [22],
+             'boosts': [{'scores': {'FIREWALL': 30},
+                         'any': {'hostname': ['fw', 'firewall', 'asa', 'palo', 'fortinet']}}]},
+            {'scores': {'HYPERVISOR': 80}, 'ports_any': [902, 5988, 8006, 9440],
+             'boosts': [{'scores': {'HYPERVISOR': 20},
+                         'any': {'hostname': ['esxi', 'vcenter', 'hyper', 'xen', 'proxmox']}}]},
+            {'scores': {'PRINTER': 90}, 'ports_any': [9100, 631],
+             'boosts': [{'scores': {'PRINTER': 10},
+                         'any': {'hostname': ['printer', 'hp', 'canon', 'epson', 'lexmark']}}]},
+            {'scores': {'FINGERPRINT': 85}, 'ports_any': [4370]},
+            {'scores': {'FINGERPRINT': 85}, 'any': {'hostname': ['finger', 'bio', 'zk']}},
+        ],
+        'default': None,
+    },
+
+    # EnhancedUltimatePerformanceCollector._enhanced_classify_device and its _analyze_* scorers
+    'ultimate': {
+        'mode': 'score',
+        'combine': 'sum',
+        'threshold': 0.5,
+        'labels': ['WINDOWS_WORKSTATION', 'WINDOWS_SERVER', 'LINUX_WORKSTATION', 'LINUX_SERVER',
+                   'MAC_WORKSTATION', 'NETWORK_SWITCH', 'NETWORK_ROUTER', 'NETWORK_FIREWALL', 'PRINTER', 'UNKNOWN'],
+        'stages': [('port', 0.4), ('hostname', 0.25), ('os', 0.20), ('service', 0.15)],
+        'fields': {'hostname': (' ', ['hostname']), 'os': (' ', ['os_family']),
+                   'os_version': (' ', ['os_version']), 'services': ('\n', ['services'])},
+        'rules': [
+            # Port signatures (40%)
+            {'stage': 'port', 'scores': {'WINDOWS_WORKSTATION': 80}, 'ratio': [135, 139, 445]},
+            {'stage': 'port', 'scores': {'WINDOWS_SERVER': 90}, 'ratio': [135, 445, 3389, 53, 88, 389]},
+            {'stage': 'port', 'scores': {'LINUX_SERVER': 70, 'LINUX_WORKSTATION': 50}, 'ports_any': [22],
+             'boosts': [{'scores': {'LINUX_SERVER': 20}, 'ports_any': [80, 443, 25, 110, 143, 993, 995]}]},
+            {'stage': 'port', 'scores': {'NETWORK_SWITCH': 85, 'NETWORK_ROUTER': 75}, 'ports_any': [161, 162],
+             'boosts': [{'scores': {'NETWORK_SWITCH': 10, 'NETWORK_ROUTER': 10}, 'ports_any': [80, 443, 8080]}]},
+            {'stage': 'port', 'scores': {'PRINTER': 90}, 'ports_any': [515, 631, 9100]},
+            # Hostname patterns (25%): every matching pattern adds its points
+            {'stage': 'hostname', 'count': 'hostname', 'scores': {'WINDOWS_SERVER': 15, 'LINUX_SERVER': 15},
+             'any': {'hostname': ['srv', 'server', 'dc-', 'ad-', 'sql', 'web', 'mail', 'dns', 'dhcp', 'file']}},
+            {'stage': 'hostname', 'count': 'hostname', 'scores': {'WINDOWS_WORKSTATION': 20, 'LINUX_WORKSTATION': 15},
+             'any': {'hostname': ['pc-', 'ws-', 'desktop', 'workstation', 'user']}},
+            {'stage': 'hostname', 'count': 'hostname', 'scores': {'WINDOWS_WORKSTATION': 25, 'MAC_WORKSTATION': 20},
+             'any': {'hostname': ['laptop', 'mobile', 'book', 'portable', 'lt-', 'nb-']}},
+            {'stage': 'hostname', 'count': 'hostname', 'scores': {'NETWORK_SWITCH': 30},
+             'any': {'hostname': ['sw-', 'switch', 'core', 'access', 'dist']}},
+            {'stage': 'hostname', 'count': 'hostname', 'scores': {'NETWORK_ROUTER': 30},
+             'any': {'hostname': ['rtr', 'router', 'gw', 'gateway']}},
+            {'stage': 'hostname', 'count': 'hostname', 'scores': {'NETWORK_FIREWALL': 30},
+             'any': {'hostname': ['fw', 'firewall', 'asa', 'palo', 'fortinet']}},
+            {'stage': 'hostname', 'count': 'hostname', 'scores': {'PRINTER': 25},
+             'any': {'hostname': ['printer', 'hp-', 'canon', 'epson', 'lexmark', 'print']}},
+            # OS family (20%), an if/elif chain
+            {'stage': 'os', 'group': 'os', 'scores': {'WINDOWS_SERVER': 50},
+             'any': [('os', ['windows']), ('os_version', ['server'])]},
+            {'stage': 'os', 'group': 'os', 'scores': {'WINDOWS_WORKSTATION': 40}, 'any': {'os': ['windows']}},
+            {'stage': 'os', 'group': 'os', 'scores': {'LINUX_SERVER': 45}, 'any': {'os': ['linux']},
+             'ports_any': [80, 443, 25, 53, 21]},
+            {'stage': 'os', 'group': 'os', 'scores': {'LINUX_WORKSTATION': 30}, 'any': {'os': ['linux']}},
+            {'stage': 'os', 'group': 'os', 'scores': {'MAC_WORKSTATION': 40}, 'any': {'os': ['mac', 'darwin']}},
+            {'stage': 'os', 'group': 'os', 'scores': {'NETWORK_SWITCH': 35, 'NETWORK_ROUTER': 35},
+             'any': {'os': ['network', 'cisco', 'juniper', 'hp']}},
+            # Services (15%)
+            {'stage': 'service', 'scores': {'LINUX_SERVER': 15, 'WINDOWS_SERVER': 10},
+             'any': {'services': ['http', 'web']}},
+            {'stage': 'service', 'scores': {'LINUX_SERVER': 20, 'WINDOWS_SERVER': 20},
+             'any': {'services': ['sql', 'mysql', 'postgres']}},
+            {'stage': 'service', 'scores': {'LINUX_SERVER': 15, 'WINDOWS_SERVER': 15},
+             'any': {'services': ['smtp', 'pop', 'imap']}},
+            {'stage': 'service', 'scores': {'PRINTER': 20}, 'any': {'services': ['print', 'lp']}},
+            {'stage': 'service', 'scores': {'NETWORK_SWITCH': 15, 'NETWORK_ROUTER': 15},
+             'any': {'services': ['snmp']}},
+        ],
+        'default': None,
+    },
+
+    # EnhancedUltimatePerformanceCollector._basic_classify_device (fallback below the threshold)
+    'ultimate_basic': {
+        'mode': 'first',
+        'fields': {'hostname': (' ', ['hostname']), 'os': (' ', ['os_family'])},
+        'rules': [
+            {'label': 'Windows Server', 'ports_any': [135, 445], 'ports_any_2': [3389, 53, 88]},
+            {'label': 'Windows Server', 'ports_any': [135, 445], 'any': {'hostname': ['server']}},
+            {'label': 'Windows Workstation', 'ports_any': [135, 445]},
+            {'label': 'Linux Server', 'ports_all': [22], 'ports_any': [80, 443, 25]},
+            {'label': 'Linux Server', 'ports_all': [22], 'any': {'hostname': ['server']}},
+            {'label': 'Linux Workstation', 'ports_all': [22]},
+            {'label': 'Network Switch', 'ports_all': [161]},
+            {'label': 'Printer', 'ports_any': [515, 631, 9100]},
+            {'label': 'Windows Workstation', 'any': {'os': ['windows']}},
+            {'label': 'Linux Server', 'any': {'os': ['linux']}},
+            {'label': 'Mac Workstation', 'any': {'os': ['mac']}},
+        ],
+        'default': 'Unknown Device',
+    },
+
+    # nmap_classifier.NMAPDeviceClassifier.classify_by_port_signature
+    'nmap_ports': {
+        'mode': 'first',
+        'rules': [
+            {'label': 'Database Server', 'ports_any': [1433, 1521, 3306, 5432, 27017],
+             'attrs': {'operating_system': '@server_os', 'confidence': 'High'}},
+            {'label': 'Web Server', 'ports_any': [80, 443, 8080, 8443, 8000, 8081],
+             'attrs': {'operating_system': '@server_os', 'confidence': 'High'}},
+            {'label': 'File Server', 'ports_any': [21, 22, 139, 445, 2049],
+             'attrs': {'operating_system': '@server_os', 'confidence': 'High'}},
+            {'label': 'Network Device', 'ports_any': [23, 161, 162, 514, 515], 'max_ports': 3,
+             'attrs': {'operating_system': 'Network OS', 'confidence': 'Medium'}},
+            {'label': 'Printer', 'ports_any': [515, 631, 9100, 161],
+             'attrs': {'operating_system': 'Embedded', 'confidence': 'High'}},
+            {'label': 'Windows Workstation', 'ports_any': [3389],
+             'attrs': {'operating_system': 'Windows', 'confidence': 'High'}},
+            {'label': 'Windows Workstation', 'ports_all': [135, 445],
+             'attrs': {'operating_system': 'Windows', 'confidence': 'High'}},
+            {'label': 'Linux Workstation', 'ports_all': [22], 'ports_none': [135, 139, 3389],
+             'attrs': {'operating_system': 'Linux', 'confidence': 'Medium'}},
+            {'label': 'Server', 'min_ports': 6, 'attrs': {'operating_system': '@server_os', 'confidence': 'Low'}},
+            {'label': 'Workstation', 'min_ports': 1, 'attrs': {'operating_system': None, 'confidence': 'Low'}},
+        ],
+        'default': 'Unknown',
+        'default_attrs': {'operating_system': None, 'confidence': 'Low'},
+    },
+
+    # NMAPDeviceClassifier.guess_server_os
+    'nmap_server_os': {
+        'mode': 'first',
+        'rules': [
+            {'label': 'Windows Server', 'ports_any': [3389, 135]},
+            {'label': 'Linux', 'ports_all': [22]},
+            {'label': 'Network OS', 'ports_all': [161]},
+        ],
+        'default': 'Unknown Server OS',
+    },
+
+    # IntelligentAssetManager.classify_device_type: OS / CPU / RAM / IP of a stored asset
+    'asset_data': {
+        'mode': 'first',
+        'fields': {'os': (' ', ['operating_system']), 'proc': (' ', ['processor']), 'ip': (' ', ['ip_address'])},
+        'rules': [
+            {'label': 'Windows Server', 'any': [('os', ['server', 'datacenter']), ('os', ['windows'])]},
+            {'label': 'Linux Server', 'any': [('os', ['server', 'datacenter']),
+                                              ('os', ['linux', 'ubuntu', 'centos', 'redhat', 'debian'])]},
+            {'label': 'Server', 'any': {'os': ['server', 'datacenter']}},
+            {'label': 'Windows Workstation', 'any': {'os': ['windows']}, 'numeric': {'memory_gb': ('>=', 16)}},
+            {'label': 'Desktop', 'any': {'os': ['windows']}, 'numeric': {'memory_gb': ('>=', 4)}},
+            {'label': 'Workstation', 'any': {'os': ['windows']}},
+            {'label': 'Linux Workstation', 'any': {'os': ['linux', 'ubuntu', 'mint', 'fedora', 'opensuse']}},
+            {'label': 'Mac Workstation', 'any': {'os': ['mac', 'darwin', 'osx']}},
+            {'label': 'Mobile Device', 'any': {'os': ['android', 'ios']}},
+            {'label': 'High-End Workstation', 'numeric': {'memory_gb': ('>=', 32)}},
+            {'label': 'Workstation', 'numeric': {'memory_gb': ('>=', 16)}},
+            {'label': 'Desktop', 'numeric': {'memory_gb': ('>=', 4)}},
+            {'label': 'Lightweight Device', 'numeric': {'memory_gb': ('>', 0)}},
+            {'label': 'Server', 'any': {'proc': ['server', 'xeon']}},
+            {'label': 'Mobile Device', 'any': {'proc': ['mobile', 'atom']}},
+            {'label': 'Network Device', 'any': {'ip': ['.1.1', '.1.254', '.254.254']}},
+        ],
+        'default': 'Classification Pending',
+    },
+}
+
+_NUMERIC_OPS: Dict[str, Callable[[float, float], bool]] = {
+    '>=': lambda a, b: a >= b, '>': lambda a, b: a > b,
+    '<=': lambda a, b: a <= b, '<': lambda a, b: a < b, '==': lambda a, b: a == b,
+}
+
+
+# ======================================================================
+# Compilation
+# ======================================================================
+
+def _number(value: Any) -> float:
+    """Numeric feature; values that are not numbers compare false against every threshold"""
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return float('nan')
+
+
+class KeywordMatcher:
+    """All keywords of a ruleset in one regex; find() returns the bitmask of keywords present.
+
+    The lookahead reports the longest keyword starting at each position; keywords
+    contained in it (prefixes or inner substrings) are added through a precomputed
+    closure, so the result equals running `keyword in text` for every keyword.
+    """
+
+    def __init__(self, keywords: Iterable[str], cache_size: int = 65536):
+        self.keywords: List[str] = list(dict.fromkeys(keywords))
+        self.index = {kw: i for i, kw in enumerate(self.keywords)}
+        self._closure = {kw: sum(1 << self.index[other] for other in self.keywords if other in kw)
+                         for kw in self.keywords}
+        ordered = sorted(self.keywords, key=len, reverse=True)
+        self._pattern = re.compile('(?=(' + '|'.join(re.escape(kw) for kw in ordered) + '))') if ordered else None
+        self._cache: Dict[str, int] = {}
+        self._cache_size = cache_size
+
+    def mask(self, keywords: Iterable[str]) -> int:
+        return sum(1 << self.index[kw] for kw in set(keywords))
+
+    def find(self, text: str) -> int:
+        if not text or self._pattern is None:
+            return 0
+        found = self._cache.get(text)
+        if found is None:
+            found = 0
+            closure = self._closure
+            for match in self._pattern.finditer(text):
+                found |= closure[match.group(1)]
+            if len(self._cache) >= self._cache_size:
+                self._cache.clear()
+            self._cache[text] = found
+        return found
+
+
+@dataclass
+class Classification:
+    label: Optional[str]
+    score: float = 0.0
+    scores: Dict[str, float] = field(default_factory=dict)
+    stage_scores: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    attrs: Dict[str, Any] = field(default_factory=dict)
+    rule: Optional[int] = None  # index of the deciding rule ("first" mode)
+
+
+class _CompiledRule:
+    __slots__ = ('index', 'label', 'scores', 'attrs', 'stage', 'group', 'any_masks', 'none_masks',
+                 'ports_any', 'ports_all', 'ports_none', 'min_ports', 'max_ports', 'numeric', 'equals',
+                 'exact', 'count', 'ratio', 'boosts')
+
+    def matches(self, features) -> bool:
+        masks, port_mask, port_count, numeric, equals, exact = features
+        for field_index, mask in self.any_masks:
+            if not masks[field_index] & mask:
+                return False
+        for field_index, mask in self.none_masks:
+            if masks[field_index] & mask:
+                return False
+        for mask in self.ports_any:
+            if not port_mask & mask:
+                return False
+        if port_mask & self.ports_all != self.ports_all:
+            return False
+        if port_mask & self.ports_none:
+            return False
+        if self.min_ports is not None and port_count < self.min_ports:
+            return False
+        if self.max_ports is not None and port_count > self.max_ports:
+            return False
+        for name, op, value in self.numeric:
+            if not op(numeric.get(name, 0.0), value):
+                return False
+        for name, value in self.equals:
+            if equals.get(name) != value:
+                return False
+        for name, value in self.exact:
+            if exact.get(name) != value:
+                return False
+        return True
+
+    def contribution(self, features) -> Optional[Dict[str, float]]:
+        """Points per label when the rule fires (score mode), else None"""
+        if not self.matches(features):
+            return None
+        if self.ratio is not None:
+            ratio_mask, ratio_size = self.ratio
+            hits = bin(features[1] & ratio_mask).count('1')
+            if not hits:
+                return None
+            return {label: min(hits / ratio_size * 100, cap) for label, cap in self.scores.items()}
+        multiplier = 1
+        if self.count is not None:
+            field_index, mask = self.count
+            multiplier = bin(features[0][field_index] & mask).count('1')
+        points = {label: value * multiplier for label, value in self.scores.items()}
+        for boost in self.boosts:
+            if boost.matches(features):
+                for label, value in boost.scores.items():
+                    points[label] = points.get(label, 0) + value
+        return points
+
+
+class CompiledRuleset:
+    """A ruleset compiled to one keyword matcher plus port/keyword bitmasks"""
+
+    def __init__(self, name: str, spec: Dict[str, Any]):
+        self.name = name
+        self.mode = spec.get('mode', 'first')
+        self.combine = spec.get('combine', 'sum')
+        self.threshold = spec.get('threshold', 0)
+        self.labels = list(spec.get('labels', []))
+        self.default = spec.get('default')
+        self.default_attrs = dict(spec.get('default_attrs', {}))
+        self.stages = list(spec.get('stages', [('default', 1)]))
+
+        self.field_specs: Dict[str, Tuple[str, List[str]]] = dict(spec.get('fields', {}))
+        raw_rules = list(spec['rules'])
+        keywords: List[str] = []
+        ports: List[int] = []
+        for rule in raw_rules:
+            for sub in [rule] + list(rule.get('boosts', [])):
+                for field_name, words in self._pairs(sub.get('any')) + self._pairs(sub.get('none')):
+                    self.field_specs.setdefault(field_name, (' ', [field_name]))
+                    keywords.extend(w.lower() for w in words)
+                for key in ('ports_any', 'ports_any_2', 'ports_all', 'ports_none', 'ratio'):
+                    ports.extend(sub.get(key, []))
+                for field_name in sub.get('equals', {}):
+                    self.field_specs.setdefault(field_name, (' ', [field_name]))
+        self.fields = list(self.field_specs)
+        self.field_index = {name: i for i, name in enumerate(self.fields)}
+        self.matcher = KeywordMatcher(keywords)
+        self.port_bits = {port: 1 << i for i, port in enumerate(dict.fromkeys(ports))}
+        self.equals_fields = sorted({name for rule in raw_rules for name in rule.get('equals', {})})
+        self.numeric_fields = sorted({name for rule in raw_rules for name in rule.get('numeric', {})})
+        self.exact_fields = sorted({name for rule in raw_rules for name in rule.get('exact', {})})
+        self.rules = [self._compile(i, rule) for i, rule in enumerate(raw_rules)]
+        self.stage_rules = {stage: [r for r in self.rules if r.stage == stage] for stage, _ in self.stages}
+
+    @staticmethod
+    def _pairs(spec) -> List[Tuple[str, List[str]]]:
+        if not spec:
+            return []
+        return list(spec.items()) if isinstance(spec, dict) else [tuple(pair) for pair in spec]
+
+    def _port_mask(self, ports: Iterable[int]) -> int:
+        return sum(self.port_bits[p] for p in set(ports))
+
+    def _compile(self, index: int, rule: Dict[str, Any]) -> _CompiledRule:
+        compiled = _CompiledRule()
+        compiled.index = index
+        compiled.label = rule.get('label')
+        compiled.scores = dict(rule.get('scores', {}))
+        compiled.attrs = dict(rule.get('attrs', {}))
+        compiled.stage = rule.get('stage', self.stages[0][0])
+        compiled.group = rule.get('group')
+        compiled.any_masks = [(self.field_index[f], self.matcher.mask(w.lower() for w in words))
+                              for f, words in self._pairs(rule.get('any'))]
+        compiled.none_masks = [(self.field_index[f], self.matcher.mask(w.lower() for w in words))
+                               for f, words in self._pairs(rule.get('none'))]
+        compiled.ports_any = [self._port_mask(rule[key]) for key in ('ports_any', 'ports_any_2') if key in rule]
+        compiled.ports_all = self._port_mask(rule.get('ports_all', []))
+        compiled.ports_none = self._port_mask(rule.get('ports_none', []))
+        compiled.min_ports = rule.get('min_ports')
+        compiled.max_ports = rule.get('max_ports')
+        compiled.numeric = [(name, _NUMERIC_OPS[op], value) for name, (op, value) in rule.get('numeric', {}).items()]
+        compiled.equals = [(name, str(value).lower()) for name, value in rule.get('equals', {}).items()]
+        compiled.exact = list(rule.get('exact', {}).items())
+        compiled.count = None
+        if rule.get('count'):
+            words = dict(self._pairs(rule.get('any')))[rule['count']]
+            compiled.count = (self.field_index[rule['count']], self.matcher.mask(w.lower() for w in words))
+        compiled.ratio = None
+        if rule.get('ratio'):
+            compiled.ratio = (self._port_mask(rule['ratio']), len(set(rule['ratio'])))
+        compiled.boosts = [self._compile(index, boost) for boost in rule.get('boosts', [])]
+        return compiled
+
+    # ----------------- Features -----------------
+
+    def _text(self, record: Dict[str, Any], field_name: str) -> str:
+        separator, sources = self.field_specs[field_name]
+        parts = []
+        for source in sources:
+            value = record.get(source)
+            if isinstance(value, (list, tuple, set)):
+                value = '\n'.join(str(v) for v in value)
+            parts.append(str(value or ''))
+        return separator.join(parts).lower()
+
+    def features(self, record: Dict[str, Any]):
+        """Hashable signature: keyword bitmaps per field, port bitmap, port count, numerics, equals, exact"""
+        texts = [self._text(record, name) for name in self.fields]
+        masks = tuple(self.matcher.find(text) for text in texts)
+        ports = list(record.get('open_ports') or [])
+        port_mask = 0
+        for port in ports:
+            try:
+                port_mask |= self.port_bits.get(port, 0)
+            except TypeError:  # unhashable entries never equal a port number
+                continue
+        numeric = tuple((name, _number(record.get(name))) for name in self.numeric_fields)
+        equals = tuple((name, texts[self.field_index[name]]) for name in self.equals_fields)
+        exact = tuple((name, record.get(name) if isinstance(record.get(name), str) else None)
+                      for name in self.exact_fields)
+        return masks, port_mask, len(ports), numeric, equals, exact
+
+    # ----------------- Evaluation -----------------
+
+    def evaluate(self, features, threshold: Optional[float] = None) -> Classification:
+        masks, port_mask, port_count, numeric, equals, exact = features
+        features = (masks, port_mask, port_count, dict(numeric), dict(equals), dict(exact))
+        if self.mode == 'first':
+            for rule in self.rules:
+                if rule.matches(features):
+                    return Classification(rule.label, attrs=dict(rule.attrs), rule=rule.index)
+            return Classification(self.default, attrs=dict(self.default_attrs))
+
+        totals: Dict[str, float] = dict.fromkeys(self.labels, 0.0)
+        stage_scores: Dict[str, Dict[str, float]] = {}
+        for stage, weight in self.stages:
+            raw: Dict[str, float] = {}
+            fired_groups = set()
+            for rule in self.stage_rules[stage]:
+                if rule.group is not None and rule.group in fired_groups:
+                    continue
+                points = rule.contribution(features)
+                if points is None:
+                    continue
+                if rule.group is not None:
+                    fired_groups.add(rule.group)
+                for label, value in points.items():
+                    if self.combine == 'max':
+                        raw[label] = max(raw[label], value) if label in raw else value
+                    else:
+                        raw[label] = raw.get(label, 0) + value
+            stage_scores[stage] = raw
+            for label, value in raw.items():
+                totals[label] = totals.get(label, 0) + (value * weight if weight != 1 else value)
+        if totals:
+            best_label, best_score = max(totals.items(), key=lambda item: item[1])
+            if best_score >= (self.threshold if threshold is None else threshold):
+                return Classification(best_label, best_score, totals, stage_scores)
+        return Classification(self.default, 0.0, totals, stage_scores)
+
+    def classify(self, record: Dict[str, Any], threshold: Optional[float] = None) -> Classification:
+        return self.evaluate(self.features(record), threshold)
+
+    def classify_many(self, records: Iterable[Dict[str, Any]],
+                      memo: Optional[Dict[Any, Classification]] = None) -> List[Classification]:
+        """Batch classification: each distinct feature signature is evaluated once"""
+        memo = {} if memo is None else memo
+        results = []
+        for record in records:
+            signature = self.features(record)
+            result = memo.get(signature)
+            if result is None:
+                result = memo[signature] = self.evaluate(signature)
+            results.append(result)
+        return results
+
+
+# ======================================================================
+# Engine
+# ======================================================================
+
+class DeviceRuleEngine:
+    """🧠 Compiles rulesets on first use and classifies single records or whole tables"""
+
+    def __init__(self, rulesets: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.specs = dict(RULESETS if rulesets is None else rulesets)
+        self._compiled: Dict[str, CompiledRuleset] = {}
+        self._lock = threading.Lock()
+
+    def ruleset(self, name: str) -> CompiledRuleset:
+        compiled = self._compiled.get(name)
+        if compiled is None:
+            with self._lock:
+                compiled = self._compiled.get(name)
+                if compiled is None:
+                    compiled = self._compiled[name] = CompiledRuleset(name, self.specs[name])
+        return compiled
+
+    def classify(self, name: str, record: Dict[str, Any], threshold: Optional[float] = None) -> Classification:
+        return self.ruleset(name).classify(record, threshold)
+
+    def label(self, name: str, record: Dict[str, Any]) -> Optional[str]:
+        return self.ruleset(name).classify(record).label
+
+    def classify_many(self, name: str, records: Iterable[Dict[str, Any]]) -> List[Classification]:
+        return self.ruleset(name).classify_many(records)
+
+    def reclassify_database(self, db_path: str, name: str, columns: Dict[str, str], table: str = 'assets',
+                            target_column: str = 'device_type', id_column: str = 'id', where: str = '',
+                            params: Sequence[Any] = (), chunk_size: int = 5000,
+                            prepare: Optional[Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]] = None,
+                            skip_labels: Sequence[Optional[str]] = (None,), dry_run: bool = False) -> Dict[str, int]:
+        """Reclassify every row in one pass; only changed labels are written (one transaction).
+
+        columns maps record keys used by the ruleset to table columns. prepare() may
+        rewrite a record or return None to leave the row alone.
+        """
+        compiled = self.ruleset(name)
+        select = ', '.join([f'"{id_column}"', f'"{target_column}"'] + [f'"{c}"' for c in columns.values()])
+        query = f'SELECT {select} FROM "{table}"' + (f' WHERE {where}' if where else '')
+        memo: Dict[Any, Classification] = {}
+        stats = {'rows': 0, 'changed': 0, 'signatures': 0}
+        conn = sqlite3.connect(db_path, timeout=30)
+        try:
+            read = conn.execute(query, list(params))
+            updates: List[Tuple[str, Any]] = []
+            while True:
+                chunk = read.fetchmany(chunk_size)
+                if not chunk:
+                    break
+                keys, records = [], []
+                for row in chunk:
+                    record = dict(zip(columns, row[2:]))
+                    if prepare is not None:
+                        record = prepare(record)
+                        if record is None:
+                            continue
+                    keys.append((row[0], row[1]))
+                    records.append(record)
+                stats['rows'] += len(chunk)
+                for (row_id, current), result in zip(keys, compiled.classify_many(records, memo)):
+                    if result.label not in skip_labels and result.label != current:
+                        updates.append((result.label, row_id))
+            stats['signatures'] = len(memo)
+            stats['changed'] = len(updates)
+            if updates and not dry_run:
+                with conn:
+                    conn.executemany(f'UPDATE "{table}" SET "{target_column}" = ? WHERE "{id_column}" = ?', updates)
+        finally:
+            conn.close()
+        return stats
+
+
+_default_engine: Optional[DeviceRuleEngine] = None
+_default_engine_lock = threading.Lock()
+
+
+def get_rule_engine() -> DeviceRuleEngine:
+    """Process-wide engine shared by all classifiers"""
+    global _default_engine
+    with _default_engine_lock:
+        if _default_engine is None:
+            _default_engine = DeviceRuleEngine()
+        return _default_engine
+
+
+# ======================================================================
+# Classifier entry points (the call sites delegate here)
+# ======================================================================
+
+def infer_infra(data: Dict[str, Any]) -> str:
+    """core.logic.infer_infra"""
+    return get_rule_engine().label('infra', data)
+
+
+def infer_infra_from_sysdescr(sys_descr: str) -> str:
+    """collectors.snmp_collector._infer_infra"""
+    return get_rule_engine().label('snmp_descr', {'sysDescr': sys_descr})
+
+
+def infer_infra_from_ports(open_ports: Iterable[int]) -> str:
+    """core.collector._infer_infra_from_ports"""
+    return get_rule_engine().label('port_infra', {'open_ports': list(open_ports)})
+
+
+def http_type_guess(title: str, server: str, body: str) -> Optional[str]:
+    """core.collector.http_fingerprint type_guess (None when nothing matches)"""
+    return get_rule_engine().label('http_hint', {'title': title, 'server': server, 'body': body})
+
+
+def strategy_device_key(device_info: Dict[str, Any]) -> Optional[str]:
+    """EnhancedCollectionStrategy.classify_device → DEVICE_TYPES key (None below the threshold)"""
+    return get_rule_engine().label('strategy', device_info)
+
+
+def _device_record(device: Any) -> Dict[str, Any]:
+    return {'hostname': device.hostname or '', 'os_family': device.os_family or '',
+            'os_version': device.os_version or '', 'services': list(device.services or []),
+            'open_ports': list(device.open_ports or [])}
+
+
+def ultimate_device_key(device: Any, threshold: Optional[float] = None) -> Tuple[Optional[str], Dict[str, float]]:
+    """EnhancedUltimatePerformanceCollector._enhanced_classify_device → (DEVICE_TYPES key or None, details)"""
+    result = get_rule_engine().classify('ultimate', _device_record(device), threshold)
+    details = {f'{label}_{stage}_score': value
+               for stage, scores in result.stage_scores.items() for label, value in scores.items()}
+    return result.label, details
+
+
+def basic_device_type(device: Any) -> str:
+    """EnhancedUltimatePerformanceCollector._basic_classify_device"""
+    return get_rule_engine().label('ultimate_basic', _device_record(device))
+
+
+def classify_by_ports(open_ports: Sequence[int]) -> Dict[str, Any]:
+    """NMAPDeviceClassifier.classify_by_port_signature → device_type / operating_system / confidence"""
+    engine = get_rule_engine()
+    record = {'open_ports': list(open_ports)}
+    result = engine.classify('nmap_ports', record)
+    operating_system = result.attrs.get('operating_system')
+    if operating_system == '@server_os':
+        operating_system = engine.label('nmap_server_os', record)
+    return {'device_type': result.label, 'operating_system': operating_system,
+            'confidence': result.attrs.get('confidence', 'Low')}
+
+
+def asset_record(operating_system: Any, processor: Any, memory_gb: Any, ip_address: Any) -> Dict[str, Any]:
+    """Record for the 'asset_data' ruleset (raises ValueError on a non-numeric memory value)"""
+    return {'operating_system': str(operating_system or ''), 'processor': str(processor or ''),
+            'memory_gb': float(memory_gb or 0), 'ip_address': str(ip_address) if ip_address else ''}
+
+
+def classify_asset_data(operating_system: Any, processor: Any, memory_gb: Any, ip_address: Any) -> str:
+    """IntelligentAssetManager.classify_device_type"""
+    return get_rule_engine().label('asset_data', asset_record(operating_system, processor, memory_gb, ip_address))
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import time
+
+    parser = argparse.ArgumentParser(description="Device classification rule engine")
+    parser.add_argument('--db', default='assets.db')
+    parser.add_argument('--table', default='assets_enhanced')
+    parser.add_argument('--apply', action='store_true', help="write changed device types (default: dry run)")
+    parser.add_argument('--rules', action='store_true', help="print the compiled ruleset sizes")
+    args = parser.parse_args()
+
+    engine = get_rule_engine()
+    if args.rules:
+        for ruleset_name in engine.specs:
+            compiled = engine.ruleset(ruleset_name)
+            print(f"🧠 {ruleset_name}: {len(compiled.rules)} rules, {len(compiled.matcher.keywords)} keywords, "
+                  f"{len(compiled.port_bits)} ports ({compiled.mode})")
+    def readable(record):
+        try:
+            return asset_record(**record)
+        except (TypeError, ValueError):
+            return None  # unreadable memory value: IntelligentAssetManager leaves it pending
+
+    started = time.time()
+    summary = engine.reclassify_database(
+        args.db, 'asset_data', {'operating_system': 'operating_system', 'processor': 'processor_name',
+                                'memory_gb': 'total_physical_memory_gb', 'ip_address': 'ip_address'},
+        table=args.table, prepare=readable, skip_labels=(None, 'Classification Pending'), dry_run=not args.apply)
+    print(f"🔄 Reclassified {summary['rows']} rows in {time.time() - started:.2f}s: "
+          f"{summary['changed']} changed, {summary['signatures']} distinct signatures"
+          f"{'' if args.apply else ' (dry run)'}")
+    print(json.dumps(summary))
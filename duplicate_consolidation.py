@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+🧬 SET-BASED DUPLICATE CONSOLIDATION
+===================================
+One engine for the duplicate cleanup cleanup_duplicates.py,
+auto_database_optimizer.py and PerfectSmartCycle.remove_duplicates_only
+used to do with per-group Python loops.
+
+Every asset gets an identity key with utils.identity's precedence: UUID,
+then a valid serial number, then a normalized MAC address. Rows sharing a
+key are ranked with
+
+    ROW_NUMBER() OVER (PARTITION BY identity_key
+                       ORDER BY quality DESC, completeness DESC, last_seen DESC, id DESC)
+
+and rank 1 wins. In a handful of statements, all inside one IMMEDIATE
+transaction, the engine then:
+
+1. writes one duplicate_resolutions audit row per loser
+2. re-points child tables (hypervisors, switches, validation_log, ...)
+   from the losers to the winner
+3. fills the winner's blank fields from the best-ranked loser that has them
+4. deletes the losers
+
+A dry run executes the same statements and rolls them back, so its report
+is exactly what a real run would change. Columns covered by a UNIQUE index
+are never filled, so consolidation cannot trip ON CONFLICT REPLACE and drop
+an unrelated row.
+
+    python duplicate_consolidation.py run --db assets.db --dry-run
+    python duplicate_consolidation.py bench --rows 100000
+"""
+
+import json
+import re
+import sqlite3
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from utils.helpers import normalize_mac
+from utils.identity import pick_identity_from_data, valid_serial
+
+# Identity sources per kind, most trusted column first; missing columns are skipped
+UUID_COLUMNS = ('uuid', 'bios_uuid', 'asset_uuid')
+SERIAL_COLUMNS = ('serial_number', 'bios_serial_number', 'system_enclosure_serial', 'chassis_serial',
+                  'device_serial', 'sn', 'motherboard_serial')
+MAC_COLUMNS = ('mac_address', 'primary_mac', 'mgmt_mac')
+
+# Ranking inputs: the collector's own score where one was recorded, then recency
+QUALITY_COLUMNS = ('data_quality_score', 'quality_score', 'confidence_score')
+LAST_SEEN_COLUMNS = ('last_seen', 'last_scan_time', 'last_updated', 'updated_at', 'created_at')
+
+# Values the collectors write when they know nothing; they never beat a real value
+BLANK_VALUES = ('', 'Unknown', 'Unknown Device', 'N/A', 'None')
+PLACEHOLDER_UUIDS = ('00000000-0000-0000-0000-000000000000', 'FFFFFFFF-FFFF-FFFF-FFFF-FFFFFFFFFFFF')
+PLACEHOLDER_MACS = ('00:00:00:00:00:00', 'FF:FF:FF:FF:FF:FF')
+_MAC_SHAPE = re.compile(r'([0-9A-F]{2}:){5}[0-9A-F]{2}')
+
+# Kept with each audit row so a deleted duplicate can still be recognized
+AUDIT_COLUMNS = ('hostname', 'ip_address', 'mac_address', 'serial_number')
+
+RESOLUTION_STRATEGY = 'identity_merge'
+
+
+# ======================================================================
+# Identity
+# ======================================================================
+
+def _first(values: Sequence[Any], accept) -> Optional[str]:
+    for value in values:
+        if value is None:
+            continue
+        text = str(value).strip()
+        if text and accept(text):
+            return text
+    return None
+
+
+def _valid_uuid(value: str) -> bool:
+    return bool(valid_serial(value)) and value.upper() not in PLACEHOLDER_UUIDS
+
+
+def _valid_mac(value: str) -> bool:
+    # Shape check: normalize_mac turns "No MAC Address Found" into "NOMACADDRESSFOUND"
+    mac = normalize_mac(value)
+    return bool(mac and _MAC_SHAPE.fullmatch(mac)) and mac not in PLACEHOLDER_MACS
+
+
+def identity_key(uuids: Sequence[Any] = (), serials: Sequence[Any] = (), macs: Sequence[Any] = ()) -> Optional[str]:
+    """'kind:VALUE' for the strongest identifier present, None when the row has none"""
+    kind, value = pick_identity_from_data({
+        'Asset UUID': _first(uuids, _valid_uuid),
+        'Serial Number': _first(serials, valid_serial),
+        'MAC Address': _first(macs, _valid_mac),
+    })
+    if kind is None:
+        return None
+    return f"{kind}:{value.upper()}"
+
+
+def _register_identity(conn: sqlite3.Connection, n_uuids: int, n_serials: int) -> None:
+    def sql_identity(*values):
+        return identity_key(values[:n_uuids], values[n_uuids:n_uuids + n_serials], values[n_uuids + n_serials:])
+    conn.create_function('asset_identity', -1, sql_identity, deterministic=True)
+
+
+# ======================================================================
+# SQL fragments
+# ======================================================================
+
+_BLANKS_SQL = ', '.join(f"'{value}'" for value in BLANK_VALUES)
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _present(expr: str) -> str:
+    return f"({expr} IS NOT NULL AND TRIM({expr}) NOT IN ({_BLANKS_SQL}))"
+
+
+def _coalesce(alias: str, columns: Sequence[str], default: str) -> str:
+    if not columns:
+        return default
+    return f"COALESCE({', '.join(f'{alias}.{_quote(c)}' for c in columns)}, {default})"
+
+
+def _filled_count(alias: str, columns: Sequence[str]) -> str:
+    if not columns:
+        return '0'
+    return ' + '.join(_present(f'{alias}.{_quote(c)}') for c in columns)
+
+
+def _table_columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({_quote(table)})")]
+
+
+def _unique_columns(conn: sqlite3.Connection, table: str) -> set:
+    columns = set()
+    for index in conn.execute(f"PRAGMA index_list({_quote(table)})").fetchall():
+        if index[2]:
+            columns.update(row[2] for row in conn.execute(f"PRAGMA index_info({_quote(index[1])})"))
+    return columns
+
+
+def _child_references(conn: sqlite3.Connection, table: str) -> List[Tuple[str, str]]:
+    """(child table, column) pairs with a foreign key to table.id, the audit table excepted"""
+    references = []
+    for (child,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' "
+                                 "AND name NOT LIKE 'sqlite_%' AND name NOT IN (?, 'duplicate_resolutions')",
+                                 (table,)).fetchall():
+        for fk in conn.execute(f"PRAGMA foreign_key_list({_quote(child)})").fetchall():
+            if fk[2] == table and (fk[4] in (None, 'id')):
+                references.append((child, fk[3]))
+    return references
+
+
+def _ensure_audit_table(conn: sqlite3.Connection) -> None:
+    from db.models import DDL
+    conn.execute(next(statement for statement in DDL if 'duplicate_resolutions (' in statement))
+
+
+# ======================================================================
+# Engine
+# ======================================================================
+
+def _open(target: Union[str, sqlite3.Connection]) -> Tuple[sqlite3.Connection, bool]:
+    if isinstance(target, sqlite3.Connection):
+        return target, False
+    return sqlite3.connect(target, timeout=30), True
+
+
+def consolidate_duplicates(target: Union[str, sqlite3.Connection] = 'assets.db', dry_run: bool = False,
+                           table: str = 'assets', sample: int = 20) -> Dict[str, Any]:
+    """Merge rows that share an identity key into their best-ranked row; returns a report"""
+    conn, owned = _open(target)
+    isolation_level = conn.isolation_level
+    foreign_keys = conn.execute("PRAGMA foreign_keys").fetchone()[0]
+    started = time.perf_counter()
+    try:
+        if conn.in_transaction:
+            conn.commit()
+        conn.isolation_level = None
+        # The audit rows reference the deleted losers; ON DELETE CASCADE must not take them along
+        if foreign_keys:
+            conn.execute("PRAGMA foreign_keys = OFF")
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            report = _consolidate(conn, table, dry_run, sample)
+            conn.execute("ROLLBACK" if dry_run else "COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        report['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        return report
+    finally:
+        for temp in ('dedupe_ranked', 'dedupe_keys'):
+            conn.execute(f"DROP TABLE IF EXISTS temp.{temp}")
+        if foreign_keys:
+            conn.execute("PRAGMA foreign_keys = ON")
+        conn.isolation_level = isolation_level
+        if owned:
+            conn.close()
+
+
+def _consolidate(conn: sqlite3.Connection, table: str, dry_run: bool, sample: int) -> Dict[str, Any]:
+    columns = _table_columns(conn, table)
+    if not columns:
+        raise sqlite3.OperationalError(f"no such table: {table}")
+    existing = set(columns)
+    uuids = [c for c in UUID_COLUMNS if c in existing]
+    serials = [c for c in SERIAL_COLUMNS if c in existing]
+    macs = [c for c in MAC_COLUMNS if c in existing]
+    fillable = [c for c in columns if c != 'id' and c not in _unique_columns(conn, table)]
+    now = datetime.now().isoformat(timespec='seconds')
+    report: Dict[str, Any] = {'dry_run': dry_run, 'table': table, 'groups': 0, 'duplicates': 0, 'removed': 0,
+                              'fields_filled': 0, 'audited': 0, 'children_repointed': 0, 'by_kind': {},
+                              'sample': []}
+    quoted = _quote(table)
+    report['rows'] = conn.execute(f"SELECT COUNT(*) FROM {quoted}").fetchone()[0]
+    if not (uuids or serials or macs):
+        return report
+
+    # 1. Identity key per row: the only per-row Python call, everything after is set-based
+    _register_identity(conn, len(uuids), len(serials))
+    identity_args = ', '.join(_quote(c) for c in uuids + serials + macs)
+    # Typed temp tables: untyped CREATE ... AS columns would keep the INTEGER lookups below off their indexes
+    conn.execute("DROP TABLE IF EXISTS temp.dedupe_keys")
+    conn.execute("CREATE TEMP TABLE dedupe_keys (id INTEGER PRIMARY KEY, identity_key TEXT NOT NULL)")
+    conn.execute(f"INSERT INTO dedupe_keys SELECT id, identity_key FROM "
+                 f"(SELECT id, asset_identity({identity_args}) AS identity_key FROM {quoted}) "
+                 f"WHERE identity_key IS NOT NULL")
+
+    # 2. Keep only rows that have a twin, then find the columns any of them populates (typically
+    #    a few dozen of the ~600); completeness and the fill below only ever look at those
+    conn.execute("DELETE FROM dedupe_keys WHERE identity_key IN "
+                 "(SELECT identity_key FROM dedupe_keys GROUP BY identity_key HAVING COUNT(*) = 1)")
+    counts = conn.execute(f"SELECT {', '.join(f'COUNT({_quote(c)})' for c in fillable) or '0'} FROM {quoted} "
+                          f"WHERE id IN (SELECT id FROM dedupe_keys)").fetchone()
+    populated = [column for column, n in zip(fillable, counts) if n]
+
+    # 3. Rank each group: rank 1 is the row that survives
+    conn.execute("DROP TABLE IF EXISTS temp.dedupe_ranked")
+    conn.execute("CREATE TEMP TABLE dedupe_ranked (id INTEGER PRIMARY KEY, identity_key TEXT, quality REAL, "
+                 "completeness INTEGER, last_seen TEXT, rank INTEGER, winner_id INTEGER, group_size INTEGER)")
+    conn.execute(f"""
+        INSERT INTO dedupe_ranked
+        SELECT id, identity_key, quality, completeness, last_seen,
+               ROW_NUMBER() OVER ranking,
+               FIRST_VALUE(id) OVER ranking,
+               COUNT(*) OVER (PARTITION BY identity_key)
+        FROM (
+            SELECT k.id, k.identity_key,
+                   {_coalesce('a', [c for c in QUALITY_COLUMNS if c in existing], '0')} AS quality,
+                   {_filled_count('a', populated)} AS completeness,
+                   {_coalesce('a', [c for c in LAST_SEEN_COLUMNS if c in existing], "''")} AS last_seen
+            FROM dedupe_keys k JOIN {quoted} a ON a.id = k.id
+        )
+        WINDOW ranking AS (PARTITION BY identity_key
+                           ORDER BY quality DESC, completeness DESC, last_seen DESC, id DESC)
+    """)
+    conn.execute("CREATE INDEX temp.idx_dedupe_ranked_winner ON dedupe_ranked (winner_id, rank)")
+
+    report['groups'], report['duplicates'] = conn.execute(
+        "SELECT COUNT(DISTINCT identity_key), COUNT(*) FROM dedupe_ranked WHERE rank > 1").fetchone()
+    if not report['duplicates']:
+        return report
+    report['by_kind'] = dict(conn.execute(
+        "SELECT substr(identity_key, 1, instr(identity_key, ':') - 1), COUNT(*) FROM dedupe_ranked "
+        "WHERE rank > 1 GROUP BY 1").fetchall())
+    report['sample'] = [
+        {'identity': key, 'keep': winner, 'remove': [int(i) for i in ids.split(',')]}
+        for key, winner, ids in conn.execute(
+            "SELECT identity_key, winner_id, group_concat(id) FROM "
+            "(SELECT * FROM dedupe_ranked WHERE rank > 1 ORDER BY group_size DESC, identity_key, rank) "
+            "GROUP BY identity_key ORDER BY MAX(group_size) DESC, identity_key LIMIT ?", (sample,))]
+
+    # 4. Audit: one row per loser, written before the loser disappears
+    _ensure_audit_table(conn)
+    audit_fields = ', '.join(f"'{c}', a.{_quote(c)}" for c in AUDIT_COLUMNS if c in existing)
+    cursor = conn.execute(f"""
+        INSERT INTO duplicate_resolutions
+            (original_device_id, duplicate_device_id, resolution_strategy, resolved_at, resolution_details)
+        SELECT r.winner_id, r.id, ?, ?,
+               json_object('identity', r.identity_key, 'rank', r.rank, 'group_size', r.group_size,
+                           'quality', r.quality, 'completeness', r.completeness, 'last_seen', r.last_seen
+                           {', ' + audit_fields if audit_fields else ''})
+        FROM dedupe_ranked r JOIN {quoted} a ON a.id = r.id
+        WHERE r.rank > 1
+    """, (RESOLUTION_STRATEGY, now))
+    report['audited'] = cursor.rowcount
+
+    # 5. Child rows follow their device; where the winner already has one, the loser's copy goes
+    for child, column in _child_references(conn, table):
+        child_q, column_q = _quote(child), _quote(column)
+        losers = f"{column_q} IN (SELECT id FROM dedupe_ranked WHERE rank > 1)"
+        cursor = conn.execute(f"UPDATE OR IGNORE {child_q} SET {column_q} = "
+                              f"(SELECT winner_id FROM dedupe_ranked r WHERE r.id = {child_q}.{column_q}) "
+                              f"WHERE {losers}")
+        report['children_repointed'] += cursor.rowcount
+        conn.execute(f"DELETE FROM {child_q} WHERE {losers}")
+
+    # 6. Fill the winner's blanks from the best-ranked loser that has a value
+    losers = "id IN (SELECT id FROM dedupe_ranked WHERE rank > 1)"
+    fill = populated
+    if fill:
+        winners = "id IN (SELECT id FROM dedupe_ranked WHERE rank = 1)"
+        before = conn.execute(f"SELECT SUM({_filled_count('w', fill)}) FROM {quoted} w WHERE {winners}").fetchone()[0]
+        assignments = ',\n'.join(
+            f"{_quote(c)} = CASE WHEN {_present(_quote(c))} THEN {_quote(c)} ELSE COALESCE(("
+            f"SELECT l.{_quote(c)} FROM dedupe_ranked r JOIN {quoted} l ON l.id = r.id "
+            f"WHERE r.winner_id = {quoted}.id AND r.rank > 1 AND {_present('l.' + _quote(c))} "
+            f"ORDER BY r.rank LIMIT 1), {_quote(c)}) END"
+            for c in fill)
+        conn.execute(f"UPDATE {quoted} SET {assignments} WHERE {winners}")
+        after = conn.execute(f"SELECT SUM({_filled_count('w', fill)}) FROM {quoted} w WHERE {winners}").fetchone()[0]
+        report['fields_filled'] = (after or 0) - (before or 0)
+
+    # 7. Drop the losers
+    report['removed'] = conn.execute(f"DELETE FROM {quoted} WHERE {losers}").rowcount
+    return report
+
+
+def print_report(report: Dict[str, Any], limit: int = 10) -> None:
+    mode = 'DRY RUN - nothing changed' if report['dry_run'] else 'applied'
+    print(f"🧬 Duplicate consolidation ({mode})")
+    print(f"   📊 Rows scanned: {report['rows']}")
+    print(f"   🔑 Duplicate groups: {report['groups']} "
+          f"({', '.join(f'{kind}: {n}' for kind, n in sorted(report['by_kind'].items())) or 'none'})")
+    for group in report['sample'][:limit]:
+        print(f"      👑 KEEP {group['keep']} 🗑️ REMOVE {', '.join(map(str, group['remove']))}  [{group['identity']}]")
+    print(f"   🧩 Fields filled into winners: {report['fields_filled']}")
+    print(f"   🔗 Child rows re-pointed: {report['children_repointed']}")
+    print(f"   🗑️ Duplicates {'to remove' if report['dry_run'] else 'removed'}: {report['duplicates']}")
+    if 'elapsed_ms' in report:
+        print(f"   ⏱️ {report['elapsed_ms']:.0f} ms")
+
+
+# ======================================================================
+# Benchmark
+# ======================================================================
+
+def populate_sample(conn: sqlite3.Connection, rows: int, duplicate_ratio: float = 0.3) -> None:
+    """Synthetic assets rows: uuid / serial / MAC twins with gaps the merge should fill"""
+    columns = set(_table_columns(conn, 'assets'))
+    unique = int(rows * (1 - duplicate_ratio))
+    records = []
+    for n in range(rows):
+        device = n if n < unique else (n * 7919) % unique
+        twin = n >= unique
+        record = {
+            'device_type': 'Workstation', 'hostname': f'host-{device}', 'ip_address': f'10.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}',
+            'status': 'Active', 'created_at': f'2025-01-{1 + n % 28:02d}T00:00:00',
+            'last_seen': f'2025-{1 + (n % 12):02d}-01T00:00:00',
+            'data_quality_score': (n % 5) * 10.0,
+            'operating_system': None if twin else 'Windows 11',
+            'manufacturer': 'Dell' if twin else None,
+            'mac_address': f'00-1A-{device >> 16 & 255:02x}-{device >> 8 & 255:02x}-{device & 255:02x}-01',
+        }
+        if device % 3 == 0:
+            record['uuid'] = f'4C4C4544-{device:04d}-0000-0000-{device:012d}'
+        elif device % 3 == 1:
+            record['serial_number'] = f'SN{device:08d}' if not twin else f' sn{device:08d} '
+        records.append({k: v for k, v in record.items() if k in columns})
+    names = sorted({k for record in records for k in record})
+    conn.executemany(f"INSERT INTO assets ({', '.join(names)}) VALUES ({', '.join('?' for _ in names)})",
+                     [[record.get(name) for name in names] for record in records])
+    conn.commit()
+
+
+def benchmark(rows: int = 100_000, duplicate_ratio: float = 0.3, db_path: Optional[str] = None) -> Dict[str, Any]:
+    """Consolidate a synthetic table on the full migrated schema; dry run then real run"""
+    import os
+    import tempfile
+    from db.migrations import migrate
+
+    own_dir = None
+    if db_path is None:
+        own_dir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(own_dir.name, 'assets.db')
+    try:
+        migrate(db_path)
+        conn = sqlite3.connect(db_path)
+        started = time.perf_counter()
+        populate_sample(conn, rows, duplicate_ratio)
+        results: Dict[str, Any] = {'rows': rows, 'columns': len(_table_columns(conn, 'assets')),
+                                   'populate_s': round(time.perf_counter() - started, 2)}
+        dry = consolidate_duplicates(conn, dry_run=True)
+        results['dry_run_s'] = dry['elapsed_ms'] / 1000
+        real = consolidate_duplicates(conn)
+        results['consolidate_s'] = real['elapsed_ms'] / 1000
+        for key in ('groups', 'duplicates', 'removed', 'fields_filled', 'audited', 'by_kind'):
+            results[key] = real[key]
+        results['remaining'] = conn.execute("SELECT COUNT(*) FROM assets").fetchone()[0]
+        conn.close()
+        return results
+    finally:
+        if own_dir is not None:
+            own_dir.cleanup()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Set-based duplicate consolidation for assets.db")
+    sub = parser.add_subparsers(dest='command', required=True)
+    run = sub.add_parser('run', help="merge duplicate devices into their best record")
+    run.add_argument('--db', default='assets.db')
+    run.add_argument('--dry-run', action='store_true', help="report what would change and roll back")
+    run.add_argument('--json', action='store_true')
+    bench = sub.add_parser('bench', help="time consolidation of a synthetic table")
+    bench.add_argument('--rows', type=int, default=100_000)
+    bench.add_argument('--duplicates', type=float, default=0.3, help="fraction of rows that are twins")
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        report = consolidate_duplicates(args.db, dry_run=args.dry_run)
+        if args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            print_report(report)
+    else:
+        print(json.dumps(benchmark(args.rows, args.duplicates), indent=2))
@@ -4,6 +4,7 @@ Enhanced Collection Strategy with Proper Device Types & Maximum Data Collection
 تحسين استراتيجية الجمع مع أنواع الأجهزة الصحيحة وجمع أقصى بيانات ممكنة
 """
 
+import re
 import time
 import threading
 import ipaddress
@@ -17,6 +18,8 @@ import requests
 
 from PyQt6.QtCore import QThread, pyqtSignal
 
+from device_rule_engine import strategy_device_key
+
 # Optional imports for enhanced collection
 try:
     import paramiko
@@ -46,6 +49,57 @@ try:
 except ImportError:
     DUPLICATE_VALIDATOR_AVAILABLE = False
 
+try:
+    from credential_affinity import get_credential_cache
+    CREDENTIAL_AFFINITY_AVAILABLE = True
+except ImportError:
+    CREDENTIAL_AFFINITY_AVAILABLE = False
+
+try:
+    from detection_cache import DetectionCache
+    DETECTION_CACHE_AVAILABLE = True
+except ImportError:
+    DETECTION_CACHE_AVAILABLE = False
+
+try:
+    from adaptive_network_controller import OPEN, TIMEOUT, get_network_controller
+    NETWORK_CONTROLLER_AVAILABLE = True
+except ImportError:
+    NETWORK_CONTROLLER_AVAILABLE = False
+
+try:
+    from snmp_neighbor_discovery import NeighborDiscovery, load_gateways
+    NEIGHBOR_DISCOVERY_AVAILABLE = True
+except ImportError:
+    NEIGHBOR_DISCOVERY_AVAILABLE = False
+
+try:
+    from scan_checkpoints import ScanCheckpointStore
+    SCAN_CHECKPOINTS_AVAILABLE = True
+except ImportError:
+    SCAN_CHECKPOINTS_AVAILABLE = False
+
+try:
+    from field_mapping import get_field_mapper
+    FIELD_MAPPING_AVAILABLE = True
+except ImportError:
+    FIELD_MAPPING_AVAILABLE = False
+
+try:
+    from metrics_registry import track_queue
+    METRICS_AVAILABLE = True
+except ImportError:
+    METRICS_AVAILABLE = False
+
+try:
+    from collection_tracing import annotate, get_tracer, traced
+    TRACING_AVAILABLE = True
+except ImportError:
+    TRACING_AVAILABLE = False
+
+    def traced(stage, outcome=None, device=None, scan=False):
+        return lambda function: function
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 log = logging.getLogger(__name__)
@@ -62,6 +116,9 @@ class AliveDevice:
     services: Dict[str, str] = None
     os_details: Dict[str, str] = None
     confidence: int = 0
+    mac_address: Optional[str] = None
+    switch_port: Optional[str] = None
+    discovery_method: str = 'ping'
     
     def __post_init__(self):
         if self.open_ports is None:
@@ -121,7 +178,9 @@ class EnhancedCollectionStrategy(QThread):
         'FINGERPRINT': [80, 443, 4370]               # HTTP, HTTPS, Bio devices
     }
 
-    def __init__(self, targets: List[str], credentials: Dict, parent=None):
+    def __init__(self, targets: List[str], credentials: Dict, parent=None,
+                 detection_cache_ttl_hours: float = 24, force_detection_refresh: bool = False,
+                 checkpoint_db: Optional[str] = 'assets.db', resume_scan: bool = True):
         super().__init__(parent)
         
         self.targets = targets
@@ -131,6 +190,41 @@ class EnhancedCollectionStrategy(QThread):
         self.snmp_v3 = credentials.get('snmp_v3', [])
         self.use_http = credentials.get('use_http', True)
         
+        # Routers / L3 switches whose ARP + FDB tables replace pinging the subnets they cover
+        self.snmp_gateways = credentials.get('snmp_gateways')
+        if self.snmp_gateways is None and NEIGHBOR_DISCOVERY_AVAILABLE:
+            self.snmp_gateways = load_gateways()
+        self.neighbor_hosts = {}
+        self._neighbor_harvest = None
+        
+        # Resumable runs: targets are processed chunk by chunk and each host's progress is
+        # checkpointed, so a restarted scan skips finished chunks and collected hosts
+        # (resume_scan=False abandons an interrupted run of the same targets and starts fresh)
+        self.checkpoint_db = checkpoint_db if SCAN_CHECKPOINTS_AVAILABLE else None
+        self.resume_scan = resume_scan
+        self.checkpoint = None
+        self._progress_window = (0, 100)
+        
+        # Detection cache: unchanged devices (same MAC + open ports) skip the nmap -O run
+        self.force_detection_refresh = force_detection_refresh
+        self.detection_cache = None
+        if DETECTION_CACHE_AVAILABLE and detection_cache_ttl_hours > 0:
+            try:
+                self.detection_cache = DetectionCache(ttl_hours=detection_cache_ttl_hours)
+            except Exception as e:
+                log.warning(f"Detection cache unavailable: {e}")
+        
+        # Credential affinity: per-host / per-/24 winners first, known-bad creds skipped
+        self.credential_cache = None
+        if CREDENTIAL_AFFINITY_AVAILABLE:
+            try:
+                self.credential_cache = get_credential_cache()
+            except Exception as e:
+                log.warning(f"Credential affinity cache unavailable: {e}")
+        
+        # Shared adaptive timeouts (per-/24 RTT) and AIMD in-flight limit for discovery probes
+        self.network_controller = get_network_controller() if NETWORK_CONTROLLER_AVAILABLE else None
+        
         # Enhanced worker configuration for maximum performance
         self.ping_workers = 100      # Fast ping discovery
         self.nmap_workers = 20       # Comprehensive port scanning
@@ -179,10 +273,41 @@ class EnhancedCollectionStrategy(QThread):
         
         return normalized
 
+    def _credential_candidates(self, ip: str, protocol: str, creds: List[Dict]) -> List[Dict]:
+        """Credentials in affinity order, without ones that recently failed on this host"""
+        if self.credential_cache is None:
+            return creds
+        candidates, skipped, _ = self.credential_cache.order(ip, protocol, creds)
+        if skipped:
+            self.log_message.emit(f"   ⏭️ {ip}: Skipping {len(skipped)} recently failed {protocol.upper()} credentials")
+        return candidates
+
+    @traced('ssh_credentials', device='ip')
+    def _try_ssh_credentials(self, ip: str, collect) -> Optional[Dict]:
+        """Run collect(ip, username, password) over the Linux credentials until one returns data"""
+        if self.credential_cache is not None:
+            outcome = self.credential_cache.try_credentials(
+                ip, 'ssh', self.linux_creds, lambda username, password, cred: collect(ip, username, password))
+            if TRACING_AVAILABLE:
+                annotate(retries=max(0, outcome.attempts - 1))
+            return outcome.result if outcome.success else None
+        for creds in self.linux_creds:
+            try:
+                data = collect(ip, creds['username'], creds['password'])
+                if data:
+                    return data
+            except Exception:
+                continue
+        return None
+
     def run(self):
         """Execute enhanced 3-step collection strategy"""
         try:
             start_time = time.time()
+            if self.credential_cache is not None:
+                self.credential_cache.reset_stats()
+            if TRACING_AVAILABLE:
+                get_tracer().begin_scan('enhanced_strategy')
             self.log_message.emit("🚀 ENHANCED 3-STEP COLLECTION STRATEGY")
             self.log_message.emit("=" * 60)
             
@@ -196,46 +321,21 @@ class EnhancedCollectionStrategy(QThread):
                 self.collection_finished.emit(False)
                 return
             
-            # STEP 1: PING Discovery (Fast parallel)
-            self.log_message.emit("🏓 STEP 1: PING Discovery - Finding alive devices...")
-            alive_devices = self._step1_ping_discovery(all_ips)
-            self.alive_count = len(alive_devices)
+            self.os_detected_count = 0
+            if self.checkpoint_db:
+                self.alive_count, collection_results = self._run_checkpointed()
+            else:
+                self.alive_count, collection_results = self._run_steps(all_ips)
             
             if self.alive_count == 0:
                 self.log_message.emit("❌ No alive devices found - ending collection")
                 self.collection_finished.emit(False)
                 return
             
-            self.log_message.emit(f"✅ Alive devices found: {self.alive_count}")
-            self._update_progress(25)  # 25% complete after ping
-            
-            # STEP 2: Enhanced OS & Device Type Detection
-            self.log_message.emit("🔍 STEP 2: Enhanced OS & Device Type Detection...")
-            detected_devices = self._step2_enhanced_detection(alive_devices)
-            self.os_detected_count = len([d for d in detected_devices if d.os_family != 'Unknown'])
-            
-            # Debug logging
-            self.log_message.emit("📊 Detection Results:")
-            for device in detected_devices:
-                self.log_message.emit(f"   🔍 {device.ip}: {device.device_type} ({device.os_family}) - {len(device.open_ports)} ports")
-            
-            self.log_message.emit(f"✅ Device type detection completed on {len(detected_devices)} devices")
-            self._update_progress(50)  # 50% complete after detection
-            
-            # STEP 3: Maximum Data Collection (Enhanced Strategy)
-            self.log_message.emit("📊 STEP 3: Maximum Data Collection - Enhanced strategy...")
-            self.log_message.emit(f"   🎯 Starting collection on {len(detected_devices)} detected devices")
-            
-            if len(detected_devices) == 0:
-                self.log_message.emit("   ⚠️ No devices to collect from - detection phase may have failed")
-                collection_results = []
-            else:
-                collection_results = self._step3_maximum_collection(detected_devices)
-            
             self.collected_count = sum(1 for r in collection_results if r.success)
             
             self.log_message.emit(f"✅ Data collection completed on {self.collected_count} devices")
-            if self.collected_count == 0 and len(detected_devices) > 0:
+            if self.collected_count == 0 and collection_results:
                 self.log_message.emit("   ⚠️ Collection failed on all devices - check credentials and connectivity")
             self._update_progress(100)  # 100% complete
             
@@ -249,6 +349,14 @@ class EnhancedCollectionStrategy(QThread):
             self.log_message.emit(f"   📊 Data collected: {self.collected_count}")
             self.log_message.emit(f"   ⏱️ Total time: {total_time:.1f}s")
             self.log_message.emit(f"   🎯 Success rate: {(self.collected_count/self.alive_count*100):.1f}%" if self.alive_count > 0 else "   🎯 Success rate: 0%")
+            if self.credential_cache is not None:
+                cred_stats = self.credential_cache.stats
+                self.log_message.emit(f"   🔑 Credential attempts: {cred_stats['attempts']} "
+                                      f"({cred_stats['attempts_saved']} saved, {cred_stats['negative_skips']} known-bad skipped)")
+            if self.network_controller is not None:
+                net = self.network_controller.snapshot()
+                self.log_message.emit(f"   📶 Probe concurrency: {net['concurrency']} ({net['cuts']} backoffs), "
+                                      f"{len(net['subnets'])} subnets timed adaptively")
             
             # Device type breakdown
             type_counts = {}
@@ -270,6 +378,84 @@ class EnhancedCollectionStrategy(QThread):
             log.exception("Enhanced collection strategy error")
             self.collection_finished.emit(False)
 
+    def _run_checkpointed(self):
+        """Steps 1-3 chunk by chunk over a resumable scan run; returns (alive, results) for this session"""
+        self.checkpoint = ScanCheckpointStore(self.checkpoint_db).start(self.targets, resume=self.resume_scan)
+        progress = self.checkpoint.status()
+        total_chunks = progress['chunks']
+        if self.checkpoint.resumed:
+            self.log_message.emit(f"♻️ Resuming interrupted scan: {progress['chunks_done']}/{total_chunks} chunks done, "
+                                  f"{progress['collected']} devices already collected")
+        alive_count, collection_results = 0, []
+        for chunk in self.checkpoint.chunks():
+            if self._stop_requested.is_set():
+                break
+            self.log_message.emit(f"📦 Chunk {chunk.seq + 1}/{total_chunks}: {len(chunk.discover)} IPs to probe, "
+                                  f"{len(chunk.alive)} already known alive")
+            self._progress_window = (chunk.seq * 100 // total_chunks, (chunk.seq + 1) * 100 // total_chunks)
+            try:
+                alive, results = self._run_steps(chunk.discover, chunk.alive, chunk_seq=chunk.seq)
+            except Exception as e:
+                self.log_message.emit(f"⚠️ Chunk {chunk.seq + 1} failed: {e}")
+                self.checkpoint.chunk_done(chunk.seq, error=str(e))
+                continue
+            alive_count += alive
+            collection_results += results
+            if self._stop_requested.is_set():
+                break
+            self.checkpoint.chunk_done(chunk.seq)
+        self._progress_window = (0, 100)
+        # A stopped run stays open; starting the same targets again resumes it
+        if not self._stop_requested.is_set():
+            self.checkpoint.finish()
+        else:
+            self.checkpoint.flush()
+        return alive_count, collection_results
+
+    def _run_steps(self, ips: List[str], known_alive: Optional[List[str]] = None, chunk_seq: Optional[int] = None):
+        """Steps 1-3 over one batch of IPs; returns (alive count, collection results)"""
+        # STEP 1: Gateway ARP/FDB harvest, PING Discovery only where no gateway covers the subnet
+        self.log_message.emit("🏓 STEP 1: PING Discovery - Finding alive devices...")
+        alive_devices, probe_ips = self._step1_neighbor_discovery(ips) if ips else ([], [])
+        if probe_ips:
+            alive_devices += self._step1_ping_discovery(probe_ips)
+        if self.checkpoint is not None and chunk_seq is not None and not self._stop_requested.is_set():
+            alive_ips = {device.ip for device in alive_devices}
+            for ip in ips:
+                self.checkpoint.mark_discovered(ip, ip in alive_ips)
+            self.checkpoint.chunk_discovered(chunk_seq)
+        alive_devices += [AliveDevice(ip=ip, discovery_method='checkpoint') for ip in known_alive or []]
+        
+        if not alive_devices:
+            return 0, []
+        
+        self.log_message.emit(f"✅ Alive devices found: {len(alive_devices)}")
+        self._update_progress(25)  # 25% complete after ping
+        
+        # STEP 2: Enhanced OS & Device Type Detection
+        self.log_message.emit("🔍 STEP 2: Enhanced OS & Device Type Detection...")
+        detected_devices = self._step2_enhanced_detection(alive_devices)
+        self.os_detected_count += len([d for d in detected_devices if d.os_family != 'Unknown'])
+        
+        # Debug logging
+        self.log_message.emit("📊 Detection Results:")
+        for device in detected_devices:
+            self.log_message.emit(f"   🔍 {device.ip}: {device.device_type} ({device.os_family}) - {len(device.open_ports)} ports")
+        
+        self.log_message.emit(f"✅ Device type detection completed on {len(detected_devices)} devices")
+        self._update_progress(50)  # 50% complete after detection
+        
+        # STEP 3: Maximum Data Collection (Enhanced Strategy)
+        self.log_message.emit("📊 STEP 3: Maximum Data Collection - Enhanced strategy...")
+        self.log_message.emit(f"   🎯 Starting collection on {len(detected_devices)} detected devices")
+        
+        if len(detected_devices) == 0:
+            self.log_message.emit("   ⚠️ No devices to collect from - detection phase may have failed")
+            collection_results = []
+        else:
+            collection_results = self._step3_maximum_collection(detected_devices)
+        return len(alive_devices), collection_results
+
     def _generate_target_ips(self) -> List[str]:
         """Generate list of IPs from targets"""
         all_ips = []
@@ -293,6 +479,7 @@ class EnhancedCollectionStrategy(QThread):
         
         return all_ips
 
+    @traced('ping', device='ip', outcome=lambda alive: 'alive' if alive else 'unreachable')
     def _secure_reliable_ping(self, ip: str) -> bool:
         """
         Secure and reliable ping implementation with multiple verification methods
@@ -335,12 +522,15 @@ class EnhancedCollectionStrategy(QThread):
             
             system = platform.system().lower()
             
+            # Per-packet wait follows the subnet's RTT (3s until it has been measured)
+            wait = self.network_controller.timeout_for(ip) if self.network_controller is not None else 3.0
+            
             if system == 'windows':
                 # Windows: More strict ping parameters
-                cmd = ['ping', '-n', '2', '-w', '3000', '-l', '32', ip]
+                cmd = ['ping', '-n', '2', '-w', str(max(100, int(wait * 1000))), '-l', '32', ip]
             else:
-                # Linux/Unix: Strict ping with packet size
-                cmd = ['ping', '-c', '2', '-W', '3', '-s', '32', ip]
+                # Linux/Unix: Strict ping with packet size (-W is whole seconds)
+                cmd = ['ping', '-c', '2', '-W', str(max(1, int(wait + 0.999))), '-s', '32', ip]
             
             result = subprocess.run(
                 cmd, 
@@ -350,6 +540,13 @@ class EnhancedCollectionStrategy(QThread):
                 creationflags=subprocess.CREATE_NO_WINDOW if system == 'windows' else 0
             )
             
+            if self.network_controller is not None:
+                rtt = re.search(r'time[=<]\s*([\d.]+)\s*ms', result.stdout, re.IGNORECASE)
+                if rtt:
+                    self.network_controller.record(ip, OPEN, float(rtt.group(1)) / 1000)
+                elif result.returncode != 0:
+                    self.network_controller.record(ip, TIMEOUT)
+            
             if result.returncode == 0:
                 output = result.stdout.lower()
                 
@@ -388,6 +585,12 @@ class EnhancedCollectionStrategy(QThread):
             common_ports = [80, 443, 22, 23, 21, 25, 53, 135, 139, 445, 3389]
             
             for port in common_ports:
+                if self.network_controller is not None:
+                    # Adaptive per-subnet timeout instead of 2s per port; RSTs count as RTT samples
+                    if self.network_controller.tcp_probe(ip, port, cancel=self._stop_requested):
+                        log.debug(f"{ip}: TCP port {port} open")
+                        return True
+                    continue
                 try:
                     sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
                     sock.settimeout(2.0)  # 2 second timeout per port
@@ -468,10 +671,50 @@ class EnhancedCollectionStrategy(QThread):
         """Update progress bar if available"""
         try:
             if hasattr(self, 'progress_updated'):
-                self.progress_updated.emit(progress)
+                low, high = self._progress_window  # a chunk's share of the whole run
+                self.progress_updated.emit(low + progress * (high - low) // 100)
         except Exception:
             pass  # Silently ignore if no progress signal available
 
+    @traced('step1_neighbor_discovery', scan=True)
+    def _step1_neighbor_discovery(self, all_ips: List[str]):
+        """
+        Step 1a: live hosts from gateway ARP tables (MAC + last-seen switch port).
+        Returns (alive devices, IPs that still need active probing).
+        """
+        if not self.snmp_gateways or not NEIGHBOR_DISCOVERY_AVAILABLE:
+            return [], all_ips
+        
+        harvest = self._neighbor_harvest  # harvested once per run, reused by every chunk
+        if harvest is None:
+            self.log_message.emit(f"🗺️ Harvesting ARP/FDB tables from {len(self.snmp_gateways)} SNMP gateways...")
+            default_community = self.snmp_v2c[0] if self.snmp_v2c else 'public'
+            harvest = self._neighbor_harvest = NeighborDiscovery(
+                self.snmp_gateways, default_community=default_community).harvest()
+            for device in harvest.devices:
+                if device.error:
+                    self.log_message.emit(f"   ⚠️ {device.host}: {device.error} - its subnets will be pinged")
+                else:
+                    self.log_message.emit(f"   ✅ {device.host}: {len(device.arp)} ARP / {len(device.fdb)} FDB entries "
+                                          f"in {device.seconds:.1f}s ({device.requests} requests)")
+        
+        live_hosts, probe_ips = harvest.plan(all_ips)
+        self.neighbor_hosts.update({host.ip: host for host in live_hosts})
+        alive_devices = [AliveDevice(ip=host.ip, mac_address=host.mac_address, switch_port=host.switch_port,
+                                     discovery_method='snmp_arp') for host in live_hosts]
+        
+        # Remote subnets are not in the local ARP cache; let MAC-keyed detection caching use the harvest
+        if self.detection_cache is not None and harvest.hosts:
+            if not hasattr(self, '_local_arp_lookup'):
+                self._local_arp_lookup = self.detection_cache.arp_lookup
+            self.detection_cache.arp_lookup = harvest.mac_lookup(self._local_arp_lookup)
+        
+        self.log_message.emit(f"   🗺️ {len(alive_devices)} live hosts from gateway tables, "
+                              f"{len(all_ips) - len(probe_ips) - len(alive_devices)} covered addresses skipped, "
+                              f"{len(probe_ips)} IPs in uncovered subnets left for ping")
+        return alive_devices, probe_ips
+
+    @traced('step1_ping_discovery', scan=True)
     def _step1_ping_discovery(self, all_ips: List[str]) -> List[AliveDevice]:
         """Step 1: Secure ping discovery to find truly alive devices"""
         alive_devices = []
@@ -521,9 +764,14 @@ class EnhancedCollectionStrategy(QThread):
         ping_queue = Queue()
         for ip in all_ips:
             ping_queue.put(ip)
+        if METRICS_AVAILABLE:
+            track_queue('enhanced_strategy', 'ping', ping_queue)
         
         # Start secure ping workers (fewer workers for more reliable results)
         max_workers = min(5, len(all_ips))  # Limit to 5 concurrent workers for reliability
+        if self.network_controller is not None:
+            # TCP probes are gated by the AIMD limit, so more threads no longer overload the link
+            max_workers = min(len(all_ips), max(5, self.network_controller.concurrency), 32)
         threads = []
         for _ in range(max_workers):
             thread = threading.Thread(target=secure_ping_worker, name=f"SecurePing-{_}")
@@ -550,6 +798,7 @@ class EnhancedCollectionStrategy(QThread):
         
         return alive_devices
 
+    @traced('step2_enhanced_detection', scan=True)
     def _step2_enhanced_detection(self, devices: List[AliveDevice]) -> List[AliveDevice]:
         """Step 2: Enhanced OS and device type detection using NMAP"""
         detected_devices = []
@@ -564,8 +813,8 @@ class EnhancedCollectionStrategy(QThread):
                     if self._stop_requested.is_set():
                         break
                     
-                    # Enhanced NMAP scan for OS and service detection
-                    nmap_result = self._enhanced_nmap_scan(device.ip)
+                    # Enhanced NMAP scan for OS and service detection (cached per MAC + port set)
+                    nmap_result = self._cached_detection(device.ip)
                     if nmap_result:
                         # Update device information
                         device.os_family = nmap_result.get('os_family', 'Unknown')
@@ -616,6 +865,8 @@ class EnhancedCollectionStrategy(QThread):
         detection_queue = Queue()
         for device in devices:
             detection_queue.put(device)
+        if METRICS_AVAILABLE:
+            track_queue('enhanced_strategy', 'detection', detection_queue)
         
         # Start detection workers
         threads = []
@@ -629,77 +880,39 @@ class EnhancedCollectionStrategy(QThread):
         for thread in threads:
             thread.join(timeout=5)
         
+        if self.detection_cache is not None:
+            cache_stats = self.detection_cache.stats
+            self.log_message.emit(f"   🧬 Detection cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+                                  f"{cache_stats['changed']} changed, {cache_stats['refreshed']} forced refreshes")
+        
         return detected_devices
 
+    @traced('detection', device='ip')
+    def _cached_detection(self, ip: str) -> Optional[Dict]:
+        """Quick port probe + ARP lookup; only run nmap OS detection on a cache miss"""
+        if self.detection_cache is None:
+            return self._enhanced_nmap_scan(ip)
+        try:
+            result, hit = self.detection_cache.detect(ip, self._enhanced_nmap_scan,
+                                                      force_refresh=self.force_detection_refresh)
+        except Exception as e:
+            log.warning(f"Detection cache error for {ip}: {e}")
+            return self._enhanced_nmap_scan(ip)
+        if hit:
+            self.log_message.emit(f"   ♻️ {ip}: Cached detection - {result.get('os_family')} "
+                                  f"({len(result.get('open_ports', []))} ports unchanged)")
+        return result
+
     def classify_device(self, device_info: Dict) -> str:
         """
         Classify device into one of 10 proper device types
         تصنيف الجهاز إلى أحد أنواع الأجهزة العشرة الصحيحة
         """
-        open_ports = device_info.get('open_ports', [])
-        services = device_info.get('services', [])
-        os_family = device_info.get('os_family', '').lower()
-        hostname = device_info.get('hostname', '').lower()
-        
-        # Score each device type based on port signatures and OS
-        scores = {}
-        
-        # Windows Server vs Workstation detection
-        if any(port in open_ports for port in [135, 445]) and 'windows' in os_family:
-            # Check for server-specific ports first
-            if any(port in open_ports for port in [3389, 53, 88, 389, 636]):  # RDP, DNS, Kerberos, LDAP
-                scores['WINDOWS_SERVER'] = 90
-            elif any(word in hostname for word in ['server', 'srv', 'dc', 'domain', 'exchange', 'sql']):
-                scores['WINDOWS_SERVER'] = 85
-            else:
-                # Likely a workstation/laptop
-                if 'laptop' in hostname or 'mobile' in hostname or 'book' in hostname:
-                    scores['LAPTOP'] = 70
-                else:
-                    scores['WORKSTATION'] = 70
-        
-        # Linux Server detection
-        if 22 in open_ports and ('linux' in os_family or 'unix' in os_family):
-            scores['LINUX_SERVER'] = 70
-            if any(port in open_ports for port in [80, 443, 25, 21, 53]):  # Web, mail, DNS
-                scores['LINUX_SERVER'] += 30
-        
-        # Network device detection
-        if 161 in open_ports:  # SNMP
-            if 23 in open_ports:  # Telnet - likely switch
-                scores['SWITCH'] = 70
-            elif any(word in hostname for word in ['ap', 'wifi', 'wireless', 'access']):
-                scores['ACCESS_POINT'] = 80
-            else:
-                scores['SWITCH'] = 50
-        
-        # Firewall detection
-        if any(port in open_ports for port in [8080, 4343, 8443]) and 22 in open_ports:
-            scores['FIREWALL'] = 70
-            if any(word in hostname for word in ['fw', 'firewall', 'asa', 'palo', 'fortinet']):
-                scores['FIREWALL'] += 30
-        
-        # Hypervisor detection
-        if any(port in open_ports for port in [902, 5988, 8006, 9440]):
-            scores['HYPERVISOR'] = 80
-            if any(word in hostname for word in ['esxi', 'vcenter', 'hyper', 'xen', 'proxmox']):
-                scores['HYPERVISOR'] += 20
-        
-        # Printer detection
-        if any(port in open_ports for port in [9100, 631]):
-            scores['PRINTER'] = 90
-            if any(word in hostname for word in ['printer', 'hp', 'canon', 'epson', 'lexmark']):
-                scores['PRINTER'] += 10
-        
-        # Fingerprint device detection
-        if 4370 in open_ports or any(word in hostname for word in ['finger', 'bio', 'zk']):
-            scores['FINGERPRINT'] = 85
-        
-        # Return the highest scoring device type
-        if scores:
-            best_type = max(scores.items(), key=lambda x: x[1])
-            if best_type[1] >= 50:  # Minimum confidence threshold
-                return self.DEVICE_TYPES[best_type[0]]
+        # Port signatures + OS/hostname hints scored by the shared rule engine
+        # (device_rule_engine.RULESETS['strategy'], minimum confidence 50)
+        best_type = strategy_device_key(device_info)
+        if best_type is not None:
+            return self.DEVICE_TYPES[best_type]
         
         return 'Unknown Device'
 
@@ -1105,6 +1318,7 @@ class EnhancedCollectionStrategy(QThread):
             self.log_message.emit(f"NMAP scan error for {ip}: {e}")
             return None
 
+    @traced('step3_maximum_collection', scan=True)
     def _step3_maximum_collection(self, devices: List[AliveDevice]) -> List[CollectionResult]:
         """Step 3: Maximum data collection using enhanced strategy"""
         results = []
@@ -1121,6 +1335,8 @@ class EnhancedCollectionStrategy(QThread):
                     # Enhanced collection strategy based on device type
                     result = self._enhanced_device_collection(device)
                     results.append(result)
+                    if self.checkpoint is not None:
+                        self.checkpoint.mark_collected(device.ip, result.success)
                     
                     if result.success:
                         self.log_message.emit(f"✅ {device.ip}: {result.method} collection successful ({result.data_completeness:.1f}% complete)")
@@ -1154,6 +1370,8 @@ class EnhancedCollectionStrategy(QThread):
         collection_queue = Queue()
         for device in devices:
             collection_queue.put(device)
+        if METRICS_AVAILABLE:
+            track_queue('enhanced_strategy', 'collection', collection_queue)
         
         # Start collection workers
         threads = []
@@ -1169,6 +1387,7 @@ class EnhancedCollectionStrategy(QThread):
         
         return results
 
+    @traced('collection', device='device.ip', outcome=lambda result: 'ok' if result.success else 'fail')
     def _enhanced_device_collection(self, device: AliveDevice) -> CollectionResult:
         """Enhanced data collection strategy based on device type and OS"""
         start_time = time.time()
@@ -1254,11 +1473,13 @@ class EnhancedCollectionStrategy(QThread):
 
     def _linux_maximum_collection(self, device: AliveDevice) -> CollectionResult:
         """Maximum SSH data collection for Linux devices"""
-        for i, creds in enumerate(self.linux_creds):
+        for i, creds in enumerate(self._credential_candidates(device.ip, 'ssh', self.linux_creds)):
             try:
                 self.log_message.emit(f"   🔑 {device.ip}: Trying SSH credentials {i+1}/{len(self.linux_creds)}...")
                 data = self._comprehensive_ssh_collection(device.ip, creds['username'], creds['password'])
                 if data:
+                    if self.credential_cache is not None:
+                        self.credential_cache.record_success(device.ip, 'ssh', creds)
                     completeness = self._calculate_data_completeness(data, 'linux')
                     self.log_message.emit(f"   ✅ {device.ip}: SSH data collected ({len(data)} fields, {completeness:.1f}% complete)")
                     return CollectionResult(
@@ -1272,6 +1493,8 @@ class EnhancedCollectionStrategy(QThread):
                     self.log_message.emit(f"   ⚠️ {device.ip}: SSH connected but no data returned")
             except Exception as e:
                 self.log_message.emit(f"   ❌ {device.ip}: SSH error with creds {i+1}: {str(e)[:50]}")
+                if self.credential_cache is not None:
+                    self.credential_cache.record_failed_attempt(device.ip, 'ssh', creds, e)
                 continue
         
         return CollectionResult(
@@ -1284,20 +1507,16 @@ class EnhancedCollectionStrategy(QThread):
     def _network_device_collection(self, device: AliveDevice) -> CollectionResult:
         """SSH then SNMP collection for network devices"""
         # Try SSH first (many modern network devices support SSH)
-        for creds in self.linux_creds:
-            try:
-                data = self._network_ssh_collection(device.ip, creds['username'], creds['password'])
-                if data:
-                    completeness = self._calculate_data_completeness(data, 'network')
-                    return CollectionResult(
-                        ip=device.ip,
-                        success=True,
-                        method='Network SSH',
-                        data=data,
-                        data_completeness=completeness
-                    )
-            except Exception:
-                continue
+        data = self._try_ssh_credentials(device.ip, self._network_ssh_collection)
+        if data:
+            completeness = self._calculate_data_completeness(data, 'network')
+            return CollectionResult(
+                ip=device.ip,
+                success=True,
+                method='Network SSH',
+                data=data,
+                data_completeness=completeness
+            )
         
         # Fallback to SNMP
         return self._snmp_fallback_collection(device)
@@ -1333,20 +1552,16 @@ class EnhancedCollectionStrategy(QThread):
 
     def _ssh_fallback_collection(self, device: AliveDevice) -> CollectionResult:
         """SSH fallback for special devices"""
-        for creds in self.linux_creds:
-            try:
-                data = self._basic_ssh_collection(device.ip, creds['username'], creds['password'])
-                if data:
-                    completeness = self._calculate_data_completeness(data, 'basic')
-                    return CollectionResult(
-                        ip=device.ip,
-                        success=True,
-                        method='SSH Fallback',
-                        data=data,
-                        data_completeness=completeness
-                    )
-            except Exception:
-                continue
+        data = self._try_ssh_credentials(device.ip, self._basic_ssh_collection)
+        if data:
+            completeness = self._calculate_data_completeness(data, 'basic')
+            return CollectionResult(
+                ip=device.ip,
+                success=True,
+                method='SSH Fallback',
+                data=data,
+                data_completeness=completeness
+            )
         
         return CollectionResult(
             ip=device.ip,
@@ -1492,13 +1707,14 @@ class EnhancedCollectionStrategy(QThread):
         
         return self._basic_fallback_collection(device)
 
+    @traced('wmi', device='ip')
     def _comprehensive_wmi_collection(self, ip: str) -> Optional[Dict]:
         """Comprehensive WMI collection - everything WMI can provide"""
         try:
             import wmi
             
-            # Try different connection methods
-            for creds in self.win_creds:
+            # Try different connection methods (affinity order, known-bad skipped)
+            for creds in self._credential_candidates(ip, 'wmi', self.win_creds):
                 try:
                     # Connect to WMI
                     if creds['username'] and creds['password']:
@@ -2800,9 +3016,13 @@ class EnhancedCollectionStrategy(QThread):
                         data['WMI_Quality_Error'] = str(e)
                     
                     # SUCCESS - Return comprehensive data
+                    if self.credential_cache is not None:
+                        self.credential_cache.record_success(ip, 'wmi', creds)
                     return data
                     
-                except Exception:
+                except Exception as e:
+                    if self.credential_cache is not None:
+                        self.credential_cache.record_failed_attempt(ip, 'wmi', creds, e)
                     continue
             
             return None
@@ -2810,6 +3030,7 @@ class EnhancedCollectionStrategy(QThread):
         except Exception:
             return None
 
+    @traced('ssh', device='ip')
     def _comprehensive_ssh_collection(self, ip: str, username: str, password: str) -> Optional[Dict]:
         """Comprehensive SSH data collection for Linux/Unix systems"""
         if not PARAMIKO_AVAILABLE:
@@ -2900,6 +3121,7 @@ class EnhancedCollectionStrategy(QThread):
         except Exception:
             return None
 
+    @traced('snmp', device='ip')
     def _comprehensive_snmp_collection(self, ip: str, community: str) -> Optional[Dict]:
         """Comprehensive SNMP data collection"""
         if not PYSNMP_AVAILABLE:
@@ -3053,8 +3275,12 @@ class EnhancedCollectionStrategy(QThread):
         
         return (populated_fields / len(required_fields)) * 100.0
 
+    @traced('save', device=lambda self, data: data.get('ip_address') or data.get('IP Address'))
     def _save_to_database(self, data: Dict) -> bool:
         """Smart database save with duplicate prevention using enterprise-grade validation"""
+        neighbor = self.neighbor_hosts.get(data.get('ip_address'))
+        if neighbor is not None and neighbor.mac_address and not data.get('mac_address'):
+            data['mac_address'] = neighbor.mac_address  # gateway ARP MAC helps duplicate matching
         try:
             # Initialize smart duplicate validator if available
             if DUPLICATE_VALIDATOR_AVAILABLE:
@@ -3100,6 +3326,18 @@ class EnhancedCollectionStrategy(QThread):
             from datetime import datetime
             
             conn = sqlite3.connect('assets.db')
+            
+            if FIELD_MAPPING_AVAILABLE:
+                # Same mapping as below, compiled once; columns missing from the table are skipped
+                mapper = get_field_mapper()
+                row = mapper.prepare(conn, data, 'enhanced', key='assets.db')
+                mapper.insert(conn, row, verb='INSERT OR REPLACE')
+                conn.commit()
+                conn.close()
+                
+                self.log_message.emit(f"💾 {data.get('IP Address', 'Unknown')}: Saved {len(row)} fields to database")
+                return True
+            
             cursor = conn.cursor()
             
             # Prepare comprehensive data mapping for ALL 440+ database columns
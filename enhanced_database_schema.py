@@ -9,6 +9,8 @@ import sqlite3
 import logging
 from datetime import datetime
 
+from database_backup import DatabaseBackup
+
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - DatabaseEnhancer - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -35,9 +37,8 @@ class DatabaseEnhancer:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             backup_path = f"assets_backup_{timestamp}.db"
             
-            # Copy current database
-            import shutil
-            shutil.copy2(self.db_path, backup_path)
+            # Online copy of the current database (consistent even with open connections)
+            DatabaseBackup(self.db_path).backup(target=backup_path)
             logger.info(f"Database backed up to: {backup_path}")
             return backup_path
         except Exception as e:
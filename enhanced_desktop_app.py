@@ -535,8 +535,8 @@ Features:
                 filetypes=[("Database files", "*.db"), ("All files", "*.*")]
             )
             if filename:
-                import shutil
-                shutil.copy2("assets.db", filename)
+                from database_backup import DatabaseBackup
+                DatabaseBackup("assets.db").backup(target=filename)
                 messagebox.showinfo("Success", f"Database backed up to: {filename}")
         except Exception as e:
             messagebox.showerror("Error", f"Backup failed: {str(e)}")
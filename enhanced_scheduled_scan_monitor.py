@@ -14,6 +14,8 @@ from typing import Dict, List, Optional, Any
 from pathlib import Path
 import queue
 
+from scan_scheduler_service import ScanRun, ScanSchedulerService, ScheduleSpec
+
 # Import comprehensive logging
 try:
     from comprehensive_logging_system import log_scheduled_scan, start_job, complete_job, update_job_progress
@@ -38,6 +40,8 @@ class ScheduledScanMonitor:
         self.active_scans = {}
         self.scan_history = []
         self.status_queue = queue.Queue()
+        self.scheduler: Optional[ScanSchedulerService] = None
+        self.max_concurrent_scans = 1
         
         # Configuration
         self.config_file = Path("scheduled_scan_config.json")
@@ -123,153 +127,90 @@ class ScheduledScanMonitor:
         except Exception as e:
             log_scheduled_scan('ERROR', f'Failed to save schedules: {e}')
             
+    def _build_scheduler(self):
+        """Create the heap-based scheduler that decides when schedules fire"""
+        service = ScanSchedulerService(self._run_scheduled_target, max_concurrent=self.max_concurrent_scans,
+                                       on_event=self._on_scheduler_event)
+        for schedule in self.scan_schedules:
+            try:
+                last_run = schedule.get('last_run')
+                service.add_schedule(ScheduleSpec.from_dict(schedule),
+                                     last_fired=datetime.fromisoformat(last_run) if last_run else None)
+            except Exception as e:
+                log_scheduled_scan('ERROR', f'Invalid schedule {schedule.get("name")}: {e}')
+        return service
+
     def start_monitoring(self):
-        """Start the monitoring thread"""
+        """Start the scheduler thread"""
         if self.is_running:
             return
-            
+
         self.is_running = True
-        self.monitor_thread = threading.Thread(target=self._monitoring_loop, daemon=True)
-        self.monitor_thread.start()
+        self.scheduler = self._build_scheduler()
+        self.scheduler.start()
+        self._refresh_next_runs()
+        self._save_status(datetime.now())
         log_scheduled_scan('INFO', '🚀 Scheduled scan monitoring started')
-        
+
     def stop_monitoring(self):
-        """Stop the monitoring thread"""
+        """Stop the scheduler thread"""
         self.is_running = False
-        if self.monitor_thread:
-            self.monitor_thread.join(timeout=5)
+        if self.scheduler:
+            self.scheduler.stop(wait=False)
+            self.scheduler = None
         log_scheduled_scan('INFO', '🛑 Scheduled scan monitoring stopped')
-        
-    def _monitoring_loop(self):
-        """Main monitoring loop"""
-        while self.is_running:
-            try:
-                current_time = datetime.now()
-                
-                # Update next run times
-                self._update_next_run_times(current_time)
-                
-                # Check for due scans
-                self._check_due_scans(current_time)
-                
-                # Update scan progress
-                self._update_scan_progress()
-                
-                # Save status
-                self._save_status(current_time)
-                
-                # Wait 30 seconds before next check
-                time.sleep(30)
-                
-            except Exception as e:
-                log_scheduled_scan('ERROR', f'Monitoring loop error: {e}')
-                time.sleep(60)  # Wait longer on error
-                
-    def _update_next_run_times(self, current_time: datetime):
-        """Update next run times for all schedules"""
-        for schedule in self.scan_schedules:
-            if not schedule.get('enabled', False):
-                schedule['next_run'] = None
-                continue
-                
-            try:
-                schedule['next_run'] = self._calculate_next_run(schedule, current_time).isoformat()
-            except Exception as e:
-                log_scheduled_scan('ERROR', f'Error calculating next run for {schedule["name"]}: {e}')
-                
-    def _calculate_next_run(self, schedule: Dict[str, Any], current_time: datetime) -> datetime:
-        """Calculate next run time for a schedule"""
-        schedule_type = schedule.get('type', 'interval')
-        
-        if schedule_type == 'interval':
-            interval = schedule.get('interval_minutes', 60)
-            last_run = schedule.get('last_run')
-            
-            if last_run:
-                last_run_time = datetime.fromisoformat(last_run)
-                return last_run_time + timedelta(minutes=interval)
-            else:
-                return current_time + timedelta(minutes=interval)
-                
-        elif schedule_type == 'daily':
-            daily_time = schedule.get('daily_time', '02:00')
-            hour, minute = map(int, daily_time.split(':'))
-            
-            next_run = current_time.replace(hour=hour, minute=minute, second=0, microsecond=0)
-            if next_run <= current_time:
-                next_run += timedelta(days=1)
-            return next_run
-            
-        elif schedule_type == 'weekly':
-            weekly_day = schedule.get('weekly_day', 0)  # 0 = Monday
-            weekly_time = schedule.get('weekly_time', '01:00')
-            hour, minute = map(int, weekly_time.split(':'))
-            
-            days_ahead = weekly_day - current_time.weekday()
-            if days_ahead <= 0:  # Target day already happened this week
-                days_ahead += 7
-                
-            next_run = current_time + timedelta(days=days_ahead)
-            next_run = next_run.replace(hour=hour, minute=minute, second=0, microsecond=0)
-            return next_run
-            
-        return current_time + timedelta(hours=1)  # Default fallback
-        
-    def _check_due_scans(self, current_time: datetime):
-        """Check for scans that are due to run"""
+
+    def _refresh_next_runs(self):
+        """Copy next-run times from the scheduler heap into the schedule dicts"""
+        if not self.scheduler:
+            return
+        next_runs = {item['id']: item['next_run'] for item in self.scheduler.next_runs(limit=len(self.scan_schedules))}
         for schedule in self.scan_schedules:
-            if not schedule.get('enabled', False):
-                continue
-                
-            next_run = schedule.get('next_run')
-            if not next_run:
-                continue
-                
-            try:
-                next_run_time = datetime.fromisoformat(next_run)
-                if current_time >= next_run_time:
-                    # Check if not already running
-                    if schedule['id'] not in self.active_scans:
-                        self._start_scheduled_scan(schedule)
-            except Exception as e:
-                log_scheduled_scan('ERROR', f'Error checking due scan for {schedule["name"]}: {e}')
-                
-    def _start_scheduled_scan(self, schedule: Dict[str, Any]):
-        """Start a scheduled scan"""
-        scan_id = f"scan_{schedule['id']}_{int(time.time())}"
+            schedule['next_run'] = next_runs.get(schedule['id']) if schedule.get('enabled') else None
+
+    def _on_scheduler_event(self, event: str, run: ScanRun):
+        """Scheduler callback: keep last_run, next_run and the status file current"""
+        if event == 'started':
+            for schedule in self.scan_schedules:
+                if schedule['id'] == run.schedule_id:
+                    schedule['last_run'] = run.started_at.isoformat()
+            self.save_schedules()
+        elif event in ('skipped', 'coalesced'):
+            log_scheduled_scan('WARNING', f'Scan for {run.target} {event}: previous run still in progress')
+        self._refresh_next_runs()
+        self._save_status(datetime.now())
+
+    def _run_scheduled_target(self, run: ScanRun) -> int:
+        """Scheduler runner: execute one scheduled target scan"""
+        schedule = next((s for s in self.scan_schedules if s['id'] == run.schedule_id), {})
+        scan_id = f"scan_{run.schedule_id}_{int(time.time())}"
         job_id = f"scheduled_scan_{scan_id}"
-        
-        log_scheduled_scan('INFO', f'🔍 Starting scheduled scan: {schedule["name"]}')
-        start_job(job_id, 'scheduled_scanning', f'Scheduled scan: {schedule["name"]}')
-        
-        # Create scan record
+
+        log_scheduled_scan('INFO', f'🔍 Starting scheduled scan: {schedule.get("name", run.schedule_id)}')
+        start_job(job_id, 'scheduled_scanning', f'Scheduled scan: {schedule.get("name", run.schedule_id)}')
+
         scan_record = {
             'id': scan_id,
             'job_id': job_id,
-            'schedule_id': schedule['id'],
-            'schedule_name': schedule['name'],
+            'schedule_id': run.schedule_id,
+            'schedule_name': schedule.get('name', run.schedule_id),
             'start_time': datetime.now().isoformat(),
-            'status': 'starting',
+            'status': 'running',
             'progress': 0,
             'devices_found': 0,
-            'targets': schedule.get('targets', []),
-            'scan_type': schedule.get('scan_type', 'quick')
+            'targets': [run.target],
+            'scan_type': run.scan_type
         }
-        
-        self.active_scans[schedule['id']] = scan_record
-        
-        # Update schedule
-        schedule['last_run'] = datetime.now().isoformat()
-        self.save_schedules()
-        
-        # Start scan in background thread
-        scan_thread = threading.Thread(
-            target=self._execute_scan,
-            args=(scan_record,),
-            daemon=True
-        )
-        scan_thread.start()
-        
+        active_key = f"{run.schedule_id}:{run.target}"
+        self.active_scans[active_key] = scan_record
+        try:
+            self._execute_scan(scan_record)
+        finally:
+            self.active_scans.pop(active_key, None)
+        if scan_record['status'] == 'failed':
+            raise RuntimeError(scan_record.get('error', 'Scan failed'))
+        return scan_record['devices_found']
+
     def _execute_scan(self, scan_record: Dict[str, Any]):
         """Execute the actual scan"""
         job_id = scan_record['job_id']
@@ -337,27 +278,13 @@ class ScheduledScanMonitor:
             complete_job(job_id, False, f'Scan failed: {e}')
             
         finally:
-            # Move to history and remove from active
+            # Move to history (the runner removes it from active scans)
             self.scan_history.append(scan_record)
-            if scan_record['schedule_id'] in self.active_scans:
-                del self.active_scans[scan_record['schedule_id']]
                 
             # Keep only last 100 history records
             if len(self.scan_history) > 100:
                 self.scan_history = self.scan_history[-100:]
                 
-    def _update_scan_progress(self):
-        """Update progress for active scans"""
-        for scan in self.active_scans.values():
-            if scan['status'] == 'running':
-                # Simulate progress updates (in real implementation, this would come from the actual scanner)
-                elapsed = time.time() - datetime.fromisoformat(scan['start_time']).timestamp()
-                progress = min(90, int(elapsed / 300 * 100))  # 5 minute scan simulation
-                
-                if progress != scan.get('progress', 0):
-                    scan['progress'] = progress
-                    update_job_progress(scan['job_id'], progress, 'Scanning in progress')
-                    
     def _save_status(self, current_time: datetime):
         """Save current status to file"""
         try:
@@ -407,6 +334,9 @@ class ScheduledScanMonitor:
             if schedule['id'] == schedule_id:
                 schedule['enabled'] = enabled
                 self.save_schedules()
+                if self.scheduler:
+                    self.scheduler.enable_schedule(schedule_id, enabled)
+                    self._refresh_next_runs()
                 
                 status = "enabled" if enabled else "disabled"
                 log_scheduled_scan('INFO', f'Schedule {status}: {schedule["name"]}')
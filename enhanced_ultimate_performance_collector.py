@@ -58,6 +58,8 @@ try:
 except ImportError:
     NMAP_AVAILABLE = False
 
+from device_rule_engine import basic_device_type, ultimate_device_key
+
 # Import our ultimate performance validator
 try:
     from ultimate_performance_validator import UltimatePerformanceValidator, DeviceStatus, ValidationResult
@@ -289,44 +291,8 @@ class EnhancedUltimatePerformanceCollector:
         'UNKNOWN': 'Unknown Device'
     }
     
-    # Enhanced Port Signatures for Smart Classification
-    PORT_SIGNATURES = {
-        # Windows signatures
-        'windows_workstation': [135, 139, 445],
-        'windows_server': [135, 445, 3389, 53, 88, 389],
-        'windows_rdp': [3389],
-        'windows_winrm': [5985, 5986],
-        
-        # Linux/Unix signatures  
-        'linux_ssh': [22],
-        'linux_web': [80, 443],
-        'linux_mail': [25, 110, 143, 993, 995],
-        'linux_dns': [53],
-        'linux_ftp': [21],
-        
-        # Network equipment signatures
-        'network_snmp': [161, 162],
-        'network_web_mgmt': [80, 443, 8080, 8443],
-        'network_ssh': [22],
-        'network_telnet': [23],
-        
-        # Service signatures
-        'printer_ports': [515, 631, 9100],
-        'database_ports': [1433, 1521, 3306, 5432],
-        'web_ports': [80, 443, 8080, 8443],
-        'mail_ports': [25, 110, 143, 993, 995],
-    }
-    
-    # Enhanced Hostname Patterns
-    HOSTNAME_PATTERNS = {
-        'server_patterns': ['srv', 'server', 'dc-', 'ad-', 'sql', 'web', 'mail', 'dns', 'dhcp', 'file'],
-        'workstation_patterns': ['pc-', 'ws-', 'desktop', 'workstation', 'user'],
-        'laptop_patterns': ['laptop', 'mobile', 'book', 'portable', 'lt-', 'nb-'],
-        'switch_patterns': ['sw-', 'switch', 'core', 'access', 'dist'],
-        'router_patterns': ['rtr', 'router', 'gw', 'gateway'],
-        'firewall_patterns': ['fw', 'firewall', 'asa', 'palo', 'fortinet'],
-        'printer_patterns': ['printer', 'hp-', 'canon', 'epson', 'lexmark', 'print']
-    }
+    # Port signatures, hostname patterns, OS and service weights:
+    # device_rule_engine.RULESETS['ultimate'] / ['ultimate_basic']
     
     def __init__(self, credentials: Dict = None, config: Dict = None):
         """Initialize Enhanced Ultimate Performance Collector"""
@@ -401,177 +367,11 @@ class EnhancedUltimatePerformanceCollector:
     
     def setup_enhanced_database(self, db_path: str = "assets.db"):
         """Create enhanced database schema with comprehensive tracking columns"""
-        import sqlite3
-        
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
+        from db.migrations import ensure_schema
         
-        # Create enhanced assets table with comprehensive columns
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS assets_enhanced (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                
-                -- Basic Identification
-                hostname TEXT,
-                computer_name TEXT,
-                device_hostname TEXT,
-                domain_hostname TEXT,
-                dns_hostname TEXT,
-                ip_address TEXT,
-                mac_address TEXT,
-                
-                -- Hostname Tracking
-                hostname_mismatch_status TEXT, -- 'Match', 'Mismatch', 'No_Domain_Record', 'DNS_Error'
-                hostname_mismatch_details TEXT,
-                domain_name TEXT,
-                workgroup TEXT,
-                
-                -- Hardware Specifications
-                system_manufacturer TEXT,
-                system_model TEXT,
-                system_family TEXT,
-                system_sku TEXT,
-                serial_number TEXT,
-                asset_tag TEXT,
-                uuid TEXT,
-                
-                -- Processor Information
-                processor_name TEXT,
-                processor_manufacturer TEXT,
-                processor_architecture TEXT,
-                processor_cores INTEGER,
-                processor_logical_cores INTEGER,
-                processor_speed_mhz INTEGER,
-                processor_max_speed_mhz INTEGER,
-                processor_l2_cache_size TEXT,
-                processor_l3_cache_size TEXT,
-                
-                -- Memory Information
-                total_physical_memory_gb REAL,
-                available_memory_gb REAL,
-                memory_slots_used INTEGER,
-                memory_slots_total INTEGER,
-                memory_modules TEXT, -- JSON array of memory modules
-                
-                -- Storage Information
-                storage_devices TEXT, -- JSON array of all storage devices
-                total_storage_gb REAL,
-                available_storage_gb REAL,
-                storage_summary TEXT, -- "Disk 1: 250GB SSD, Disk 2: 500GB HDD"
-                
-                -- Graphics Information
-                graphics_cards TEXT, -- JSON array of all graphics cards
-                primary_graphics_card TEXT,
-                graphics_memory_mb INTEGER,
-                graphics_driver_version TEXT,
-                
-                -- Display Information
-                connected_monitors INTEGER,
-                monitor_details TEXT, -- JSON array of monitor information
-                screen_resolution TEXT,
-                display_adapters TEXT, -- JSON array of display adapters
-                
-                -- Network Information
-                network_adapters TEXT, -- JSON array of network adapters
-                wireless_adapters TEXT, -- JSON array of wireless adapters
-                network_configuration TEXT, -- JSON of IP config
-                
-                -- Operating System
-                operating_system TEXT,
-                os_version TEXT,
-                os_build TEXT,
-                os_edition TEXT,
-                os_architecture TEXT,
-                os_install_date TEXT,
-                last_boot_time TEXT,
-                
-                -- BIOS/UEFI Information
-                bios_manufacturer TEXT,
-                bios_version TEXT,
-                bios_release_date TEXT,
-                firmware_type TEXT, -- BIOS or UEFI
-                
-                -- Software Information
-                installed_software TEXT, -- JSON array of installed programs
-                installed_updates TEXT, -- JSON array of Windows updates
-                antivirus_software TEXT,
-                browsers_installed TEXT, -- JSON array of browsers
-                
-                -- User Information (Enhanced)
-                current_user TEXT,
-                current_logged_user TEXT,
-                interactive_user TEXT,
-                registered_owner TEXT,
-                last_logged_users TEXT, -- JSON array of recent users
-                user_profiles TEXT, -- JSON array of user profiles with privileges
-                user_groups TEXT, -- JSON array of user groups
-                local_users TEXT, -- JSON array of all local users
-                domain_users TEXT, -- JSON array of domain users
-                admin_users TEXT, -- JSON array of admin users
-                login_sessions TEXT, -- JSON array of current login sessions
-                
-                -- System Performance
-                cpu_usage_percent REAL,
-                memory_usage_percent REAL,
-                disk_usage_percent REAL,
-                system_uptime_hours REAL,
-                
-                -- Security Information
-                windows_defender_status TEXT,
-                firewall_status TEXT,
-                encryption_status TEXT,
-                uac_status TEXT,
-                
-                -- Asset Management
-                department TEXT,
-                location TEXT,
-                site TEXT,
-                cost_center TEXT,
-                purchase_date TEXT,
-                warranty_expiry TEXT,
-                
-                -- Original fields for backward compatibility
-                os_family TEXT,
-                device_type TEXT,
-                manufacturer TEXT,
-                model TEXT,
-                processor TEXT,
-                memory_gb REAL,
-                disk_info TEXT,
-                
-                -- Collection Metadata
-                collection_method TEXT,
-                collection_timestamp TEXT,
-                collection_duration_seconds REAL,
-                collection_id TEXT,
-                data_completeness_score INTEGER, -- 0-100 based on fields collected
-                
-                -- Change Tracking
-                last_hardware_change TEXT,
-                last_software_change TEXT,
-                configuration_hash TEXT,
-                change_history TEXT, -- JSON array of changes
-                
-                -- Device Status
-                device_status TEXT, -- 'Online', 'Offline', 'Unknown'
-                last_seen TEXT,
-                ping_response_ms INTEGER,
-                
-                -- Timestamps
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Create index on IP address for faster lookups
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_ip_address ON assets_enhanced(ip_address)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_hostname ON assets_enhanced(hostname)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_device_status ON assets_enhanced(device_status)')
-        
-        conn.commit()
-        conn.close()
-        
-        self.logger.info("✅ Enhanced database schema created successfully")
+        # assets_enhanced is schema migration 6; a current database costs one PRAGMA read
+        if ensure_schema(db_path):
+            self.logger.info("✅ Enhanced database schema created successfully")
     
     def save_device_to_enhanced_db(self, device: EnhancedDeviceInfo, db_path: str = "assets.db"):
         """Save comprehensive device data to enhanced database"""
@@ -792,241 +592,24 @@ class EnhancedUltimatePerformanceCollector:
         if not self.config['enable_enhanced_classification']:
             return self._basic_classify_device(device)
         
-        # Classification scores for each device type
-        scores = {}
-        classification_details = {}
-        
-        # Initialize scores
-        for device_type in self.DEVICE_TYPES.keys():
-            scores[device_type] = 0.0
-        
-        # 1. Port Signature Analysis (40% weight)
-        port_scores = self._analyze_port_signatures(device)
-        for device_type, score in port_scores.items():
-            scores[device_type] += score * 0.4
-            classification_details[f'{device_type}_port_score'] = score
-        
-        # 2. Hostname Pattern Recognition (25% weight)
-        hostname_scores = self._analyze_hostname_patterns(device)
-        for device_type, score in hostname_scores.items():
-            scores[device_type] += score * 0.25
-            classification_details[f'{device_type}_hostname_score'] = score
-        
-        # 3. OS Family Identification (20% weight)
-        os_scores = self._analyze_os_family(device)
-        for device_type, score in os_scores.items():
-            scores[device_type] += score * 0.20
-            classification_details[f'{device_type}_os_score'] = score
-        
-        # 4. Service Fingerprinting (15% weight)
-        service_scores = self._analyze_services(device)
-        for device_type, score in service_scores.items():
-            scores[device_type] += score * 0.15
-            classification_details[f'{device_type}_service_score'] = score
-        
-        # Store classification details
+        # Port signatures (40%), hostname patterns (25%), OS family (20%) and
+        # services (15%) in one compiled rule pass
+        best_type, classification_details = ultimate_device_key(
+            device, self.config['classification_confidence_threshold'])
         device.classification_details = classification_details
         
-        # Find best classification
-        if scores:
-            best_type, best_score = max(scores.items(), key=lambda x: x[1])
-            
-            # Apply confidence threshold
-            if best_score >= self.config['classification_confidence_threshold']:
-                self.metrics.classification_successful += 1
-                self.logger.debug(f"Enhanced classification for {device.ip}: {self.DEVICE_TYPES[best_type]} (confidence: {best_score:.2f})")
-                return self.DEVICE_TYPES[best_type]
+        if best_type is not None:
+            self.metrics.classification_successful += 1
+            self.logger.debug(f"Enhanced classification for {device.ip}: {self.DEVICE_TYPES[best_type]}")
+            return self.DEVICE_TYPES[best_type]
         
         # Fallback to basic classification
         self.metrics.classification_failed += 1
         return self._basic_classify_device(device)
     
-    def _analyze_port_signatures(self, device: EnhancedDeviceInfo) -> Dict[str, float]:
-        """Analyze port signatures for device classification"""
-        scores = {}
-        open_ports = set(device.open_ports)
-        
-        # Windows Workstation signatures
-        if self.PORT_SIGNATURES['windows_workstation']:
-            windows_ws_ports = set(self.PORT_SIGNATURES['windows_workstation'])
-            match_ratio = len(open_ports & windows_ws_ports) / len(windows_ws_ports)
-            if match_ratio > 0:
-                scores['WINDOWS_WORKSTATION'] = min(match_ratio * 100, 80)
-        
-        # Windows Server signatures
-        if self.PORT_SIGNATURES['windows_server']:
-            windows_srv_ports = set(self.PORT_SIGNATURES['windows_server'])
-            match_ratio = len(open_ports & windows_srv_ports) / len(windows_srv_ports)
-            if match_ratio > 0:
-                scores['WINDOWS_SERVER'] = min(match_ratio * 100, 90)
-        
-        # Linux SSH detection
-        if 22 in open_ports:
-            scores['LINUX_SERVER'] = 70
-            scores['LINUX_WORKSTATION'] = 50
-            # Boost server score if other server ports present
-            server_ports = set(self.PORT_SIGNATURES['linux_web'] + self.PORT_SIGNATURES['linux_mail'])
-            if open_ports & server_ports:
-                scores['LINUX_SERVER'] += 20
-        
-        # Network equipment detection
-        if 161 in open_ports or 162 in open_ports:  # SNMP
-            scores['NETWORK_SWITCH'] = 85
-            scores['NETWORK_ROUTER'] = 75
-            
-            # Web management interface boosts network score
-            if any(port in open_ports for port in [80, 443, 8080]):
-                scores['NETWORK_SWITCH'] += 10
-                scores['NETWORK_ROUTER'] += 10
-        
-        # Printer detection
-        printer_ports = set(self.PORT_SIGNATURES['printer_ports'])
-        if open_ports & printer_ports:
-            scores['PRINTER'] = 90
-        
-        return scores
-    
-    def _analyze_hostname_patterns(self, device: EnhancedDeviceInfo) -> Dict[str, float]:
-        """Analyze hostname patterns for device classification"""
-        scores = {}
-        hostname = device.hostname.lower()
-        
-        if not hostname:
-            return scores
-        
-        # Server patterns
-        for pattern in self.HOSTNAME_PATTERNS['server_patterns']:
-            if pattern in hostname:
-                scores['WINDOWS_SERVER'] = scores.get('WINDOWS_SERVER', 0) + 15
-                scores['LINUX_SERVER'] = scores.get('LINUX_SERVER', 0) + 15
-        
-        # Workstation patterns
-        for pattern in self.HOSTNAME_PATTERNS['workstation_patterns']:
-            if pattern in hostname:
-                scores['WINDOWS_WORKSTATION'] = scores.get('WINDOWS_WORKSTATION', 0) + 20
-                scores['LINUX_WORKSTATION'] = scores.get('LINUX_WORKSTATION', 0) + 15
-        
-        # Laptop patterns
-        for pattern in self.HOSTNAME_PATTERNS['laptop_patterns']:
-            if pattern in hostname:
-                scores['WINDOWS_WORKSTATION'] = scores.get('WINDOWS_WORKSTATION', 0) + 25
-                scores['MAC_WORKSTATION'] = scores.get('MAC_WORKSTATION', 0) + 20
-        
-        # Network equipment patterns
-        for pattern in self.HOSTNAME_PATTERNS['switch_patterns']:
-            if pattern in hostname:
-                scores['NETWORK_SWITCH'] = scores.get('NETWORK_SWITCH', 0) + 30
-        
-        for pattern in self.HOSTNAME_PATTERNS['router_patterns']:
-            if pattern in hostname:
-                scores['NETWORK_ROUTER'] = scores.get('NETWORK_ROUTER', 0) + 30
-        
-        for pattern in self.HOSTNAME_PATTERNS['firewall_patterns']:
-            if pattern in hostname:
-                scores['NETWORK_FIREWALL'] = scores.get('NETWORK_FIREWALL', 0) + 30
-        
-        # Printer patterns
-        for pattern in self.HOSTNAME_PATTERNS['printer_patterns']:
-            if pattern in hostname:
-                scores['PRINTER'] = scores.get('PRINTER', 0) + 25
-        
-        return scores
-    
-    def _analyze_os_family(self, device: EnhancedDeviceInfo) -> Dict[str, float]:
-        """Analyze OS family for device classification"""
-        scores = {}
-        os_family = device.os_family.lower()
-        
-        if 'windows' in os_family:
-            if 'server' in device.os_version.lower():
-                scores['WINDOWS_SERVER'] = 50
-            else:
-                scores['WINDOWS_WORKSTATION'] = 40
-        
-        elif 'linux' in os_family:
-            # Determine if server or workstation based on services
-            if any(port in device.open_ports for port in [80, 443, 25, 53, 21]):
-                scores['LINUX_SERVER'] = 45
-            else:
-                scores['LINUX_WORKSTATION'] = 30
-        
-        elif 'mac' in os_family or 'darwin' in os_family:
-            scores['MAC_WORKSTATION'] = 40
-        
-        elif 'network' in os_family or any(vendor in os_family for vendor in ['cisco', 'juniper', 'hp']):
-            scores['NETWORK_SWITCH'] = 35
-            scores['NETWORK_ROUTER'] = 35
-        
-        return scores
-    
-    def _analyze_services(self, device: EnhancedDeviceInfo) -> Dict[str, float]:
-        """Analyze running services for device classification"""
-        scores = {}
-        services = [service.lower() for service in device.services]
-        
-        # Web services
-        if any('http' in service or 'web' in service for service in services):
-            scores['LINUX_SERVER'] = scores.get('LINUX_SERVER', 0) + 15
-            scores['WINDOWS_SERVER'] = scores.get('WINDOWS_SERVER', 0) + 10
-        
-        # Database services
-        if any('sql' in service or 'mysql' in service or 'postgres' in service for service in services):
-            scores['LINUX_SERVER'] = scores.get('LINUX_SERVER', 0) + 20
-            scores['WINDOWS_SERVER'] = scores.get('WINDOWS_SERVER', 0) + 20
-        
-        # Mail services
-        if any('smtp' in service or 'pop' in service or 'imap' in service for service in services):
-            scores['LINUX_SERVER'] = scores.get('LINUX_SERVER', 0) + 15
-            scores['WINDOWS_SERVER'] = scores.get('WINDOWS_SERVER', 0) + 15
-        
-        # Print services
-        if any('print' in service or 'lp' in service for service in services):
-            scores['PRINTER'] = scores.get('PRINTER', 0) + 20
-        
-        # Network management services
-        if any('snmp' in service for service in services):
-            scores['NETWORK_SWITCH'] = scores.get('NETWORK_SWITCH', 0) + 15
-            scores['NETWORK_ROUTER'] = scores.get('NETWORK_ROUTER', 0) + 15
-        
-        return scores
-    
     def _basic_classify_device(self, device: EnhancedDeviceInfo) -> str:
         """Basic device classification as fallback"""
-        
-        # Basic port-based classification
-        open_ports = device.open_ports
-        hostname = device.hostname.lower()
-        os_family = device.os_family.lower()
-        
-        # Windows detection
-        if any(port in open_ports for port in [135, 445]):
-            if any(port in open_ports for port in [3389, 53, 88]) or 'server' in hostname:
-                return "Windows Server"
-            return "Windows Workstation"
-        
-        # Linux detection
-        if 22 in open_ports:
-            if any(port in open_ports for port in [80, 443, 25]) or 'server' in hostname:
-                return "Linux Server"
-            return "Linux Workstation"
-        
-        # Network equipment
-        if 161 in open_ports:
-            return "Network Switch"
-        
-        # Printer
-        if any(port in open_ports for port in [515, 631, 9100]):
-            return "Printer"
-        
-        # OS-based fallback
-        if 'windows' in os_family:
-            return "Windows Workstation"
-        elif 'linux' in os_family:
-            return "Linux Server"
-        elif 'mac' in os_family:
-            return "Mac Workstation"
-        
-        return "Unknown Device"
+        return basic_device_type(device)
     
     def _collect_single_device(self, ip: str, validation_result: DeviceStatus) -> Optional[EnhancedDeviceInfo]:
         """Collect comprehensive information for a single device with enhanced classification"""
@@ -0,0 +1,760 @@
+#!/usr/bin/env python3
+"""
+🗺️ COMPILED FIELD MAPPING
+========================
+One mapping layer between collector output and the assets table, shared by
+UltraFastDeviceCollector, EnhancedCollectionStrategy's legacy save path and
+RobustDataSaver.
+
+Mapping profiles are plain data (source keys per column, derived values,
+constants and timestamps), merged with wmi_to_database_mapping.json and
+comprehensive_wmi_mapping.json, which are read once per process. Each
+profile is compiled into an inverted index (source key → target columns
+with a priority), so normalizing a device touches only the keys it
+actually carries instead of evaluating every `data.get(...) or ...` chain.
+
+Per database the column set, declared types and per-column coercers are
+cached and reloaded only when `PRAGMA schema_version` changes. Rows are
+emitted in table order, so every device with the same populated columns
+shares one INSERT / UPDATE / UPSERT statement text: the SQL is built once
+per column signature and sqlite3's statement cache reuses the compiled
+statement on a connection.
+
+    python field_mapping.py bench --devices 500
+"""
+
+import functools
+import json
+import os
+import re
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+MAPPING_FILES = ('wmi_to_database_mapping.json', 'comprehensive_wmi_mapping.json')
+
+# Explicit aliases always beat a key that merely happens to match a column name
+PASSTHROUGH_RANK = 1000
+
+
+# ======================================================================
+# Derived values
+# ======================================================================
+
+def _populated(data: Dict[str, Any]) -> int:
+    return len([v for v in data.values() if v])
+
+
+def _memory_bytes(data: Dict[str, Any]) -> Optional[float]:
+    memory = data.get('Total Physical Memory')
+    if memory and str(memory).isdigit():
+        return float(memory)
+    return None
+
+
+def _memory_gb(data: Dict[str, Any]) -> Optional[float]:
+    memory = _memory_bytes(data)
+    return memory / (1024 ** 3) if memory is not None else None
+
+
+def _installed_ram_gb(data: Dict[str, Any]) -> Optional[int]:
+    memory = _memory_bytes(data)
+    return int(memory / (1024 ** 3)) if memory is not None else None
+
+
+# ======================================================================
+# Profiles
+# ======================================================================
+
+PROFILES: Dict[str, Dict[str, Any]] = {
+    # UltraFastDeviceCollector / RobustDataSaver: column names pass straight through
+    'default': {
+        'passthrough': True,
+        'json_mappings': ('flat',),
+        'aliases': {
+            'hostname': ['hostname', 'Hostname', 'computer_name', 'Computer Name'],
+            'ip_address': ['ip_address', 'IP Address', 'IP'],
+            'working_user': ['working_user', 'Working User', 'Current User'],
+            'operating_system': ['operating_system', 'OS', 'Operating System', 'os_name'],
+            'system_manufacturer': ['system_manufacturer', 'Manufacturer', 'manufacturer'],
+            'system_model': ['system_model', 'Model', 'model'],
+            'device_type': ['device_type', 'Device Type', 'Asset Type'],
+            'status': ['status', 'Status'],
+        },
+        'timestamps': ['created_at', 'updated_at', 'last_scan_time'],
+    },
+    'ssh': {
+        'extends': 'default',
+        'aliases': {
+            'os_kernel_version': ['Kernel', 'kernel_version', 'uname'],
+            'os_uptime': ['Uptime', 'uptime'],
+        },
+    },
+    'snmp': {
+        'extends': 'default',
+        'aliases': {
+            'hostname': ['sysName'],
+            'location': ['sysLocation'],
+            'it_contact': ['sysContact'],
+            'system_model': ['Device Model'],
+        },
+    },
+    # Raw WMI records: "Win32_BIOS.SerialNumber" keys or {"Win32_BIOS": {...}} groups
+    'wmi': {
+        'extends': 'default',
+        'json_mappings': ('flat', 'wmi_classes'),
+    },
+    # EnhancedCollectionStrategy._legacy_save_to_database
+    'enhanced': {
+        'aliases': {
+            # Basic identification
+            'hostname': ['Hostname', 'hostname', 'Remote Computer Name', 'Remote NetBIOS Name'],
+            'ip_address': ['IP Address', 'ip', 'IP'],
+            'dns_hostname': ['DNS Hostname', 'dns_hostname', 'Reverse DNS'],
+            'dns_status': ['DNS Status', 'dns_status'],
+            # System information
+            'computer_name': ['Computer Name', 'NetBIOS Name'],
+            'domain': ['Domain'],
+            'domain_workgroup': ['Workgroup', 'Domain'],
+            'operating_system': ['Operating System'],
+            'os_name': ['Operating System'],
+            'os_version': ['OS Version'],
+            'os_build_number': ['OS Build Number'],
+            'os_architecture': ['OS Architecture'],
+            'os_install_date': ['OS Install Date'],
+            'last_boot_time': ['Last Boot Time'],
+            'system_uptime': ['System Uptime'],
+            # Hardware information
+            'system_manufacturer': ['System Manufacturer'],
+            'manufacturer': ['System Manufacturer'],
+            'system_model': ['System Model'],
+            'model': ['System Model'],
+            'model_vendor': ['System Manufacturer'],
+            'system_type': ['System Type'],
+            'system_family': ['System Family'],
+            'serial_number': ['Serial Number'],
+            # BIOS, motherboard and chassis (collected under their column names)
+            **{column: [column] for column in (
+                'bios_version', 'bios_manufacturer', 'bios_serial_number', 'bios_release_date', 'bios_date',
+                'firmware_version', 'motherboard_manufacturer', 'motherboard_model', 'motherboard_serial',
+                'motherboard_version', 'motherboard', 'chassis_manufacturer', 'chassis_serial', 'chassis_type',
+                'asset_tag_hw', 'barcode')},
+            # Processor information
+            'processor_name': ['Processor Name'],
+            'processor_manufacturer': ['Processor Manufacturer'],
+            'processor_architecture': ['Processor Architecture'],
+            'processor_cores': ['Processor Cores'],
+            'processor_logical_processors': ['Processor Logical Processors'],
+            'processor_speed': ['Processor Speed'],
+            'processor_l2_cache': ['Processor L2 Cache'],
+            'processor_l3_cache': ['Processor L3 Cache'],
+            'cpu_info': ['Processor Name'],
+            'cpu_model': ['Processor Name'],
+            'cpu_cores': ['Processor Cores'],
+            'cpu_threads': ['Processor Logical Processors'],
+            'cpu_speed': ['Processor Speed'],
+            # Memory information
+            'total_physical_memory': ['Total Physical Memory'],
+            'total_memory': ['Total Physical Memory'],
+            'available_memory': ['Available Memory'],
+            'memory_utilization': ['Memory Utilization'],
+            # Network information (collected under their column names)
+            **{column: [column] for column in (
+                'mac_address', 'mac_addresses', 'ip_addresses', 'subnet_mask', 'subnet_masks', 'default_gateway',
+                'gateway', 'dns_servers', 'dhcp_enabled', 'network_adapters', 'network_adapter', 'network_speed',
+                'network_adapter_types', 'network_adapter_count', 'primary_ip', 'secondary_ips')},
+            # Collection metadata
+            'device_type': ['Device Type', 'device_type'],
+            'collection_method': ['Collection Method'],
+            'data_source': ['Collection Method'],
+            'collection_timestamp': ['Collection Time'],
+            'wmi_collection_time': ['Collection Time'],
+            # NMAP data
+            'nmap_os_family': ['nmap_os_family'],
+            'nmap_device_type': ['nmap_device_type'],
+            'nmap_confidence': ['nmap_confidence'],
+            'os_fingerprint': ['os_fingerprint'],
+            'detection_method': ['detection_method'],
+            'os_detection_confidence': ['confidence'],
+            # Open ports and services
+            'open_ports': ['open_ports'],
+            'listening_ports': ['open_ports'],
+            'services': ['services'],
+            'service_detection': ['services'],
+            # Users and locale
+            'working_user': ['Current User'],
+            'assigned_user': ['Current User'],
+            'logged_on_users': ['Current User'],
+            'last_logged_user': ['Current User'],
+            'windows_directory': ['Windows Directory'],
+            'system_directory': ['System Directory'],
+            'time_zone': ['Time Zone'],
+            'country_code': ['Country Code'],
+            'system_locale': ['Locale'],
+        },
+        'derived': {
+            'memory_gb': _memory_gb,
+            'installed_ram_gb': _installed_ram_gb,
+            'wmi_collection_status': lambda data: ('success' if data.get('Collection Method') == 'Comprehensive WMI'
+                                                   else 'not_attempted'),
+            'collection_quality': lambda data: 'high' if _populated(data) > 50 else 'medium',
+            'quality_score': lambda data: min(100.0, _populated(data) * 2),
+        },
+        'constants': {
+            'created_by': 'Enhanced Collection Strategy',
+            'last_updated_by': 'Enhanced Collection Strategy',
+            'status': 'active',
+            'ping_status': 'online',
+            'availability_status': 'available',
+            'health_status': 'healthy',
+            'realtime_status': 'online',
+        },
+        # collection_timestamp falls back to now when the record carries no Collection Time
+        'timestamps': ['collection_timestamp', 'created_at', 'last_updated', 'last_ping', 'last_seen'],
+    },
+}
+
+
+@functools.lru_cache(maxsize=8)
+def load_mappings(directory: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """Read the JSON mapping files once: {'flat': {key: column}, 'wmi_classes': {class: {column: property}}}"""
+    directory = directory or os.path.dirname(os.path.abspath(__file__))
+    loaded: Dict[str, Dict[str, Any]] = {}
+    for name, filename in zip(('flat', 'wmi_classes'), MAPPING_FILES):
+        try:
+            with open(os.path.join(directory, filename), 'r') as f:
+                loaded[name] = json.load(f)
+        except (OSError, ValueError):
+            loaded[name] = {}
+    return loaded
+
+
+# ======================================================================
+# Coercion
+# ======================================================================
+
+_INT_TEXT = re.compile(r'^[+-]?\d+$')
+_TRUE = frozenset(('1', 'true', 'yes', 'y', 'on', 'enabled'))
+_FALSE = frozenset(('0', 'false', 'no', 'n', 'off', 'disabled'))
+
+
+def is_blank(value: Any) -> bool:
+    """Values every save path has always dropped: None, '', 'None' and empty containers"""
+    if value is None:
+        return True
+    if isinstance(value, str):
+        stripped = value.strip()
+        return not stripped or stripped.lower() == 'none'
+    if isinstance(value, (list, tuple, dict, set)):
+        return not value
+    return False
+
+
+def to_text(value: Any) -> Any:
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, (list, tuple, dict, set)):
+        return json.dumps(sorted(value) if isinstance(value, set) else value, default=str)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return value.decode('utf-8', 'replace')
+    return str(value)
+
+
+def to_integer(value: Any) -> Any:
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str) and _INT_TEXT.match(value.strip()):
+        return int(value.strip())
+    return to_text(value)  # keep what was collected rather than dropping it
+
+
+def to_real(value: Any) -> Any:
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value.strip())
+        except ValueError:
+            pass
+    return to_text(value)
+
+
+def to_boolean(value: Any) -> Any:
+    if isinstance(value, (bool, int, float)):
+        return int(bool(value))
+    if isinstance(value, str):
+        lowered = value.strip().lower()
+        if lowered in _TRUE:
+            return 1
+        if lowered in _FALSE:
+            return 0
+    return to_text(value)
+
+
+def coercer_for(declared_type: str) -> Callable[[Any], Any]:
+    """SQLite affinity rules applied to a declared column type"""
+    declared = (declared_type or '').upper()
+    if 'BOOL' in declared:
+        return to_boolean
+    if 'INT' in declared:
+        return to_integer
+    if any(token in declared for token in ('REAL', 'FLOA', 'DOUB')):
+        return to_real
+    return to_text
+
+
+# ======================================================================
+# Compiled profiles
+# ======================================================================
+
+class CompiledProfile:
+    """Inverted translation table for one collector type"""
+
+    def __init__(self, name: str, spec: Dict[str, Any], mappings: Dict[str, Dict[str, Any]]):
+        self.name = name
+        self.passthrough = bool(spec.get('passthrough'))
+        self.derived: Dict[str, Callable[[Dict[str, Any]], Any]] = dict(spec.get('derived', {}))
+        self.constants: Dict[str, Any] = dict(spec.get('constants', {}))
+        self.timestamps: Tuple[str, ...] = tuple(spec.get('timestamps', ()))
+
+        aliases: Dict[str, List[str]] = {column: list(sources) for column, sources in spec.get('aliases', {}).items()}
+        json_mappings = spec.get('json_mappings', ())
+        if 'flat' in json_mappings:
+            for source, column in mappings.get('flat', {}).items():
+                aliases.setdefault(column, []).append(source)
+        self.wmi_classes: Dict[str, Dict[str, str]] = {}
+        if 'wmi_classes' in json_mappings:
+            self.wmi_classes = mappings.get('wmi_classes', {})
+            owners: Dict[str, set] = {}
+            for wmi_class, properties in self.wmi_classes.items():
+                for column, prop in properties.items():
+                    aliases.setdefault(column, []).append(f'{wmi_class}.{prop}')
+                    owners.setdefault(prop, set()).add(column)
+            # A bare property name is only usable when a single column claims it
+            for wmi_class, properties in self.wmi_classes.items():
+                for column, prop in properties.items():
+                    if len(owners[prop]) == 1:
+                        aliases[column].append(prop)
+        self.aliases = aliases
+
+        index: Dict[str, List[Tuple[str, int]]] = {}
+        for column, sources in aliases.items():
+            for rank, source in enumerate(sources):
+                targets = index.setdefault(source, [])
+                if all(target != column for target, _ in targets):
+                    targets.append((column, rank))
+        if self.passthrough:
+            for source, targets in index.items():
+                if all(target != source for target, _ in targets):
+                    targets.append((source, PASSTHROUGH_RANK))
+        self.index: Dict[str, Tuple[Tuple[str, int], ...]] = {source: tuple(t) for source, t in index.items()}
+        self.columns = frozenset(aliases) | frozenset(self.derived) | frozenset(self.constants) | \
+            frozenset(self.timestamps)
+
+    def _flatten(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        flat = {}
+        for key, value in data.items():
+            if key in self.wmi_classes and isinstance(value, (dict, list)):
+                instance = value[0] if isinstance(value, list) and value else value
+                if isinstance(instance, dict):
+                    for prop, prop_value in instance.items():
+                        flat[f'{key}.{prop}'] = prop_value
+                continue
+            flat[key] = value
+        return flat
+
+    def apply(self, data: Dict[str, Any], now: Optional[str] = None) -> Dict[str, Any]:
+        """Collector record → {column: value}; the first non-blank source in priority order wins"""
+        if self.wmi_classes:
+            data = self._flatten(data)
+        index = self.index
+        passthrough = self.passthrough
+        out: Dict[str, Any] = {}
+        ranks: Dict[str, int] = {}
+        for key, value in data.items():
+            targets = index.get(key)
+            if targets is None:
+                if not passthrough:
+                    continue
+                targets = ((key, PASSTHROUGH_RANK),)
+            if is_blank(value):
+                continue
+            for column, rank in targets:
+                if rank < ranks.get(column, PASSTHROUGH_RANK + 1):
+                    ranks[column] = rank
+                    out[column] = value
+        for column, derive in self.derived.items():
+            if column not in out:
+                value = derive(data)
+                if not is_blank(value):
+                    out[column] = value
+        if self.timestamps:
+            now = now or datetime.now().isoformat()
+            for column in self.timestamps:
+                if column not in ranks:
+                    out[column] = now
+        out.update(self.constants)
+        return out
+
+
+# ======================================================================
+# Schema and statement caches
+# ======================================================================
+
+@dataclass(frozen=True)
+class TableSchema:
+    table: str
+    version: int
+    columns: Tuple[str, ...]
+    types: Dict[str, str]
+    position: Dict[str, int]
+    coercers: Dict[str, Callable[[Any], Any]]
+
+    def __contains__(self, column: str) -> bool:
+        return column in self.position
+
+
+@dataclass
+class PreparedRow:
+    columns: Tuple[str, ...]
+    values: List[Any]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return dict(zip(self.columns, self.values))
+
+    def get(self, column: str, default: Any = None) -> Any:
+        try:
+            return self.values[self.columns.index(column)]
+        except ValueError:
+            return default
+
+    def without(self, *columns: str) -> 'PreparedRow':
+        keep = [i for i, column in enumerate(self.columns) if column not in columns]
+        return PreparedRow(tuple(self.columns[i] for i in keep), [self.values[i] for i in keep])
+
+    def __len__(self) -> int:
+        return len(self.columns)
+
+
+@functools.lru_cache(maxsize=1024)
+def insert_sql(table: str, columns: Tuple[str, ...], verb: str = 'INSERT') -> str:
+    """`verb` is INSERT, INSERT OR REPLACE or INSERT OR IGNORE"""
+    return f"{verb} INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+
+
+@functools.lru_cache(maxsize=1024)
+def update_sql(table: str, columns: Tuple[str, ...], key: str = 'id') -> str:
+    return f"UPDATE {table} SET {', '.join(f'{column} = ?' for column in columns)} WHERE {key} = ?"
+
+
+@functools.lru_cache(maxsize=1024)
+def upsert_sql(table: str, columns: Tuple[str, ...], conflict: Tuple[str, ...]) -> str:
+    """INSERT ... ON CONFLICT DO UPDATE; `conflict` must match a UNIQUE index"""
+    updates = [column for column in columns if column not in conflict]
+    action = (f"DO UPDATE SET {', '.join(f'{column} = excluded.{column}' for column in updates)}"
+              if updates else 'DO NOTHING')
+    return f"{insert_sql(table, columns)} ON CONFLICT ({', '.join(conflict)}) {action}"
+
+
+def _database_key(conn: sqlite3.Connection, key: Optional[str]) -> Any:
+    if key and key != ':memory:':
+        return os.path.abspath(key)
+    if key is None:
+        path = conn.execute('PRAGMA database_list').fetchone()[2]
+        if path:
+            return path
+    return id(conn)  # private in-memory database
+
+
+class FieldMapper:
+    """Profiles compiled once, plus per-database column and statement caches"""
+
+    def __init__(self, profiles: Optional[Dict[str, Dict[str, Any]]] = None, mappings_dir: Optional[str] = None):
+        self.specs = dict(PROFILES if profiles is None else profiles)
+        self.mappings_dir = mappings_dir
+        self._profiles: Dict[str, CompiledProfile] = {}
+        self._schemas: Dict[Tuple[Any, str], TableSchema] = {}
+        self._lock = threading.Lock()
+        self.schema_loads = 0
+
+    def _resolve(self, name: str, seen: Tuple[str, ...] = ()) -> Dict[str, Any]:
+        if name not in self.specs:
+            raise KeyError(f"Unknown mapping profile: {name}")
+        spec = self.specs[name]
+        parent_name = spec.get('extends')
+        if not parent_name or parent_name in seen:
+            return spec
+        parent = self._resolve(parent_name, seen + (name,))
+        merged = dict(parent)
+        merged.pop('extends', None)
+        for section in ('aliases', 'derived', 'constants'):
+            combined = {key: list(value) if section == 'aliases' else value
+                        for key, value in parent.get(section, {}).items()}
+            for key, value in spec.get(section, {}).items():
+                if section == 'aliases':
+                    # Child sources are more specific, so they outrank the inherited ones
+                    combined[key] = list(value) + [s for s in combined.get(key, []) if s not in value]
+                else:
+                    combined[key] = value
+            merged[section] = combined
+        for section in ('passthrough', 'timestamps', 'json_mappings'):
+            if section in spec:
+                merged[section] = spec[section]
+        return merged
+
+    def profile(self, name: str = 'default') -> CompiledProfile:
+        compiled = self._profiles.get(name)
+        if compiled is None:
+            with self._lock:
+                compiled = self._profiles.get(name)
+                if compiled is None:
+                    compiled = CompiledProfile(name, self._resolve(name), load_mappings(self.mappings_dir))
+                    self._profiles[name] = compiled
+        return compiled
+
+    def normalize(self, data: Dict[str, Any], collector: str = 'default', now: Optional[str] = None) -> Dict[str, Any]:
+        return self.profile(collector).apply(data, now)
+
+    def schema(self, conn: sqlite3.Connection, table: str = 'assets', key: Optional[str] = None) -> TableSchema:
+        """Column set for `table`, re-read only after the database schema changed"""
+        version = conn.execute('PRAGMA schema_version').fetchone()[0]
+        cache_key = (_database_key(conn, key), table)
+        cached = self._schemas.get(cache_key)
+        if cached is not None and cached.version == version:
+            return cached
+        rows = conn.execute(f'PRAGMA table_info({table})').fetchall()
+        columns = tuple(row[1] for row in rows)
+        types = {row[1]: row[2] or '' for row in rows}
+        schema = TableSchema(table=table, version=version, columns=columns, types=types,
+                             position={column: i for i, column in enumerate(columns)},
+                             coercers={column: coercer_for(types[column]) for column in columns})
+        with self._lock:
+            self._schemas[cache_key] = schema
+            self.schema_loads += 1
+        return schema
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._schemas.clear()
+
+    def to_row(self, schema: TableSchema, values: Dict[str, Any], exclude: Iterable[str] = ('id',)) -> PreparedRow:
+        """Keep known columns, coerce them and order them as the table does"""
+        position = schema.position
+        present = [column for column in values if column in position and column not in exclude]
+        present.sort(key=position.__getitem__)
+        coercers = schema.coercers
+        return PreparedRow(tuple(present), [coercers[column](values[column]) for column in present])
+
+    def prepare(self, conn: sqlite3.Connection, data: Dict[str, Any], collector: str = 'default',
+                table: str = 'assets', key: Optional[str] = None, exclude: Iterable[str] = ('id',),
+                now: Optional[str] = None) -> PreparedRow:
+        return self.to_row(self.schema(conn, table, key), self.normalize(data, collector, now), exclude)
+
+    @staticmethod
+    def insert(conn: sqlite3.Connection, row: PreparedRow, table: str = 'assets', verb: str = 'INSERT') -> int:
+        return conn.execute(insert_sql(table, row.columns, verb), row.values).lastrowid
+
+    @staticmethod
+    def update(conn: sqlite3.Connection, row: PreparedRow, row_id: Any, table: str = 'assets',
+               key: str = 'id') -> int:
+        if not row.columns:
+            return 0
+        return conn.execute(update_sql(table, row.columns, key), row.values + [row_id]).rowcount
+
+    @staticmethod
+    def upsert(conn: sqlite3.Connection, row: PreparedRow, conflict: Sequence[str], table: str = 'assets') -> int:
+        return conn.execute(upsert_sql(table, row.columns, tuple(conflict)), row.values).lastrowid
+
+    @staticmethod
+    def insert_many(conn: sqlite3.Connection, rows: Iterable[PreparedRow], table: str = 'assets',
+                    verb: str = 'INSERT') -> int:
+        """One executemany per column signature"""
+        groups: Dict[Tuple[str, ...], List[List[Any]]] = {}
+        for row in rows:
+            groups.setdefault(row.columns, []).append(row.values)
+        for columns, values in groups.items():
+            conn.executemany(insert_sql(table, columns, verb), values)
+        return len(groups)
+
+
+_mapper: Optional[FieldMapper] = None
+_mapper_lock = threading.Lock()
+
+
+def get_field_mapper() -> FieldMapper:
+    global _mapper
+    if _mapper is None:
+        with _mapper_lock:
+            if _mapper is None:
+                _mapper = FieldMapper()
+    return _mapper
+
+
+# ======================================================================
+# Benchmark
+# ======================================================================
+
+def _chain_normalize(profile: CompiledProfile, data: Dict[str, Any], now: str) -> Dict[str, Any]:
+    """The pre-compiled shape: evaluate every column's `data.get(a) or data.get(b)` chain per device"""
+    out = {}
+    for column, sources in profile.aliases.items():
+        value = None
+        for source in sources:
+            value = data.get(source)
+            if not is_blank(value):
+                break
+        out[column] = value
+    if profile.passthrough:
+        for key, value in data.items():
+            if key not in out or out[key] is None:
+                out[key] = value
+    for column, derive in profile.derived.items():
+        if out.get(column) is None:
+            out[column] = derive(data)
+    for column in profile.timestamps:
+        if is_blank(out.get(column)):
+            out[column] = now
+    out.update(profile.constants)
+    return {column: value for column, value in out.items() if not is_blank(value)}
+
+
+def _legacy_text(value: Any) -> Any:
+    if isinstance(value, (list, tuple, dict, set)):
+        return json.dumps(value, default=str) if not isinstance(value, set) else json.dumps(sorted(value))
+    return value
+
+
+def sample_devices(count: int, collector: str = 'enhanced', seed: int = 7) -> List[Dict[str, Any]]:
+    """Synthetic collector records shaped like each profile's input"""
+    import random
+    rng = random.Random(seed)
+    profile = get_field_mapper().profile(collector)
+    sources = sorted({source for sources in profile.aliases.values() for source in sources})
+    devices = []
+    for n in range(count):
+        record = {}
+        for source in sources:
+            roll = rng.random()
+            if roll < 0.15:
+                continue
+            if roll < 0.25:
+                record[source] = ''
+            elif roll < 0.3:
+                record[source] = [rng.randint(1, 65535) for _ in range(3)]
+            else:
+                record[source] = f'{source}-{rng.randint(0, 9999)}'
+        record.update({'IP Address': f'10.{n // 65536}.{n // 256 % 256}.{n % 256}', 'ip_address': None,
+                       'Total Physical Memory': str(rng.choice((8, 16, 32)) * 1024 ** 3),
+                       'Collection Method': 'Comprehensive WMI', 'Collection Time': datetime.now().isoformat()})
+        record['ip_address'] = record['IP Address']
+        devices.append(record)
+    return devices
+
+
+def benchmark(devices: int = 500, collector: str = 'enhanced', db_path: Optional[str] = None) -> Dict[str, Any]:
+    """Per-device normalization and save cost, per-device chains + PRAGMA vs the compiled path"""
+    import tempfile
+    import time
+
+    mapper = FieldMapper()
+    profile = mapper.profile(collector)
+    records = sample_devices(devices, collector)
+    own_dir = None
+    if db_path is None:
+        own_dir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(own_dir.name, 'assets.db')
+    columns = {'id': 'INTEGER PRIMARY KEY AUTOINCREMENT'}
+    try:
+        from comprehensive_schema import COMPREHENSIVE_COLUMNS
+        columns.update(COMPREHENSIVE_COLUMNS)
+    except ImportError:
+        pass
+    for column in sorted(profile.columns):
+        columns.setdefault(column, 'TEXT')
+    conn = sqlite3.connect(db_path)
+    conn.execute(f"CREATE TABLE IF NOT EXISTS assets ({', '.join(f'{c} {t}' for c, t in columns.items())})")
+    conn.commit()
+    conn.close()
+
+    def timed(fn) -> float:
+        started = time.perf_counter()
+        for record in records:
+            fn(record)
+        return (time.perf_counter() - started) * 1e6 / max(1, len(records))
+
+    now = datetime.now().isoformat()
+    results: Dict[str, Any] = {'devices': devices, 'collector': collector, 'columns': len(columns)}
+    results['normalize_before_us'] = timed(lambda record: _chain_normalize(profile, record, now))
+    results['normalize_after_us'] = timed(lambda record: profile.apply(record, now))
+
+    def save_before(record):
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        cursor.execute('PRAGMA table_info(assets)')
+        db_columns = [col[1] for col in cursor.fetchall()]
+        data = {k: _legacy_text(v) for k, v in _chain_normalize(profile, record, now).items() if k in db_columns}
+        names = list(data.keys())
+        cursor.execute(f"INSERT OR REPLACE INTO assets ({', '.join(names)}) VALUES ({', '.join(['?' for _ in names])})",
+                       [data[name] for name in names])
+        conn.commit()
+        conn.close()
+
+    def save_after(record):
+        conn = sqlite3.connect(db_path)
+        mapper.insert(conn, mapper.prepare(conn, record, collector, key=db_path), verb='INSERT OR REPLACE')
+        conn.commit()
+        conn.close()
+
+    results['save_before_us'] = timed(save_before)
+    results['save_after_us'] = timed(save_after)
+    conn = sqlite3.connect(db_path)
+    started = time.perf_counter()
+    mapper.insert_many(conn, (mapper.prepare(conn, record, collector, key=db_path) for record in records),
+                       verb='INSERT OR REPLACE')
+    conn.commit()
+    results['save_batch_us'] = (time.perf_counter() - started) * 1e6 / max(1, len(records))
+    conn.close()
+    results['schema_loads'] = mapper.schema_loads
+    results['statements'] = insert_sql.cache_info().currsize
+    if own_dir is not None:
+        own_dir.cleanup()
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compiled collector → assets field mapping")
+    sub = parser.add_subparsers(dest='command', required=True)
+    bench = sub.add_parser('bench', help="time per-device normalization and save, before vs compiled")
+    bench.add_argument('--devices', type=int, default=500)
+    bench.add_argument('--collector', default='enhanced', choices=sorted(PROFILES))
+    bench.add_argument('--json', action='store_true')
+    show = sub.add_parser('show', help="print a compiled translation table")
+    show.add_argument('collector', choices=sorted(PROFILES))
+    args = parser.parse_args()
+
+    if args.command == 'bench':
+        result = benchmark(args.devices, args.collector)
+        if args.json:
+            print(json.dumps(result))
+        else:
+            print(f"🗺️ {result['devices']} '{result['collector']}' devices against {result['columns']} columns")
+            for stage in ('normalize', 'save'):
+                before, after = result[f'{stage}_before_us'], result[f'{stage}_after_us']
+                print(f"   {stage:<10} {before:9.1f} µs → {after:9.1f} µs per device ({before / max(after, 1e-9):.1f}x)")
+            print(f"   batched    {result['save_batch_us']:9.1f} µs per device (one transaction)")
+    else:
+        compiled = get_field_mapper().profile(args.collector)
+        for source, targets in sorted(compiled.index.items()):
+            print(f"{source:<40} → {', '.join(f'{column}[{rank}]' for column, rank in targets)}")
+        print(f"🗺️ {len(compiled.index)} source keys → {len(compiled.columns)} columns"
+              f"{' (+ passthrough)' if compiled.passthrough else ''}")
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+🔎 SPARSE FIELD PROJECTION
+==========================
+?fields= / ?expand= / ?format= for the asset list and detail APIs
+(/api/devices, /api/assets, /api/device/<id>). The dashboards show a
+handful of columns, but those endpoints select every column and build a
+dict per row.
+
+- ?fields=id,hostname,ip_address    only these go into the SELECT list
+  (names are checked against a whitelist of SQL expressions; a preset
+  name such as "dashboard" expands to its field list)
+- ?expand=installed_software        heavy JSON columns are read and parsed
+  only when named in fields or expand
+- ?format=columns                   {"columns": [...], "rows": [[...]]}: no
+  per-row key repetition
+- ?format=msgpack                   the columnar form as MessagePack
+  (application/x-msgpack; 406 if msgpack is not installed)
+
+Without any of them an endpoint keeps its original response.
+
+    python field_projection.py --rows 10000
+"""
+
+import json
+import os
+import time
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+FORMATS = ('json', 'columns', 'msgpack')
+MSGPACK_MIMETYPE = 'application/x-msgpack'
+
+
+class ProjectionError(ValueError):
+    """Unknown field or format in the request; answered with 400 / 406"""
+
+    def __init__(self, message: str, status: int = 400, available: Sequence[str] = ()):
+        super().__init__(message)
+        self.status = status
+        self.available = list(available)
+
+
+def _split(value: Optional[str]) -> List[str]:
+    return [part.strip() for part in (value or '').split(',') if part.strip()]
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+class FieldSet:
+    """The fields an endpoint can return, as SQL expressions, in response order"""
+
+    def __init__(self, columns: Mapping[str, str], expandable: Optional[Mapping[str, str]] = None,
+                 presets: Optional[Mapping[str, Sequence[str]]] = None, default: Optional[Sequence[str]] = None):
+        self.columns = dict(columns)
+        self.expandable = dict(expandable or {})
+        self.presets = {name: list(fields) for name, fields in (presets or {}).items()}
+        self.default = list(default) if default is not None else list(self.columns)
+        for name in [*self.default, *(f for fields in self.presets.values() for f in fields)]:
+            if name not in self.columns and name not in self.expandable:
+                raise ValueError(f"preset field {name!r} is not defined")
+
+    @classmethod
+    def from_table(cls, conn, table: str, expandable: Iterable[str] = (), **kwargs) -> 'FieldSet':
+        """Every column of table; the expandable ones (JSON text) only on request"""
+        names = [row[1] for row in conn.execute(f"PRAGMA table_info({_quote(table)})")]
+        heavy = set(expandable)
+        return cls({n: _quote(n) for n in names if n not in heavy},
+                   {n: _quote(n) for n in names if n in heavy}, **kwargs)
+
+    @property
+    def available(self) -> List[str]:
+        return [*self.columns, *self.expandable]
+
+    def resolve(self, fields: Optional[str] = None, expand: Optional[str] = None,
+                legacy_expand: bool = True) -> 'Projection':
+        """Projection for a ?fields= / ?expand= pair; neither given means the endpoint's default.
+
+        legacy_expand keeps an endpoint's old behaviour of parsing every heavy
+        field when the client asked for no projection at all.
+        """
+        requested = _split(fields)
+        expanded = _split(expand)
+        if not requested:
+            names = list(self.default)
+            if legacy_expand and not expanded:
+                expanded = list(self.expandable)
+        else:
+            names = []
+            for name in requested:
+                names.extend(self.presets.get(name, [name]))
+        unknown = [n for n in [*names, *expanded] if n not in self.columns and n not in self.expandable]
+        if unknown:
+            raise ProjectionError(f"unknown field(s): {', '.join(unknown)}", available=self.available)
+        seen = set()
+        ordered = []
+        for name in names + [n for n in expanded if n in self.expandable]:
+            if name not in seen:
+                seen.add(name)
+                ordered.append(name)
+        return Projection(ordered, {n: self.columns.get(n) or self.expandable[n] for n in ordered},
+                          [i for i, n in enumerate(ordered) if n in self.expandable])
+
+
+class Projection:
+    """Resolved field list: SELECT clause in, decoded rows out"""
+
+    def __init__(self, names: List[str], expressions: Dict[str, str], heavy_indexes: List[int]):
+        self.names = names
+        self.expressions = expressions
+        self.heavy_indexes = heavy_indexes
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.expressions
+
+    @property
+    def select_sql(self) -> str:
+        return ', '.join(expr if expr == _quote(name) else f'{expr} AS {_quote(name)}'
+                         for name, expr in self.expressions.items())
+
+    def decode(self, rows: Iterable[Sequence]) -> List[list]:
+        """Rows as lists, with the expanded JSON columns parsed"""
+        if not self.heavy_indexes:
+            return [list(row) for row in rows]
+        decoded = []
+        for row in rows:
+            row = list(row)
+            for index in self.heavy_indexes:
+                value = row[index]
+                if value and isinstance(value, str):
+                    try:
+                        row[index] = json.loads(value)
+                    except ValueError:
+                        pass
+            decoded.append(row)
+        return decoded
+
+    def records(self, rows: Iterable[Sequence]) -> List[Dict[str, Any]]:
+        names = self.names
+        return [dict(zip(names, row)) for row in rows]
+
+
+def requested_projection(field_set: FieldSet, args=None, legacy_expand: bool = True) -> Projection:
+    if args is None:
+        from flask import request
+        args = request.args
+    return field_set.resolve(args.get('fields'), args.get('expand'), legacy_expand=legacy_expand)
+
+
+def requested_format(args=None) -> str:
+    if args is None:
+        from flask import request
+        args = request.args
+    fmt = (args.get('format') or 'json').strip().lower()
+    if fmt not in FORMATS:
+        raise ProjectionError(f"unknown format {fmt!r}; expected one of {', '.join(FORMATS)}", available=FORMATS)
+    if fmt == 'msgpack' and not MSGPACK_AVAILABLE:
+        raise ProjectionError("msgpack is not installed on the server; use format=columns", status=406,
+                              available=('json', 'columns'))
+    return fmt
+
+
+def projected_response(projection: Projection, rows: List[list], meta: Optional[Dict[str, Any]] = None,
+                       records_key: Optional[str] = None, fmt: Optional[str] = None):
+    """Flask response for decoded rows.
+
+    json: meta plus records under records_key, or a bare list of records when
+    there is no records_key. columns / msgpack: meta plus columns and rows.
+    """
+    from flask import Response, jsonify
+
+    fmt = fmt or requested_format()
+    if fmt == 'json':
+        records = projection.records(rows)
+        return jsonify({**(meta or {}), records_key: records} if records_key else records)
+    payload = {**(meta or {}), 'columns': projection.names, 'rows': rows}
+    if fmt == 'columns':
+        return jsonify(payload)
+    return Response(msgpack.packb(payload, use_bin_type=True, default=str), mimetype=MSGPACK_MIMETYPE)
+
+
+def projection_error_response(error: ProjectionError):
+    from flask import jsonify
+
+    return jsonify({'error': str(error), 'available': error.available}), error.status
+
+
+# ======================================================================
+# Benchmark
+# ======================================================================
+
+def benchmark(rows: int = 10000, fields: Sequence[str] = ('id', 'hostname', 'ip_address', 'department',
+                                                          'status', 'os_name', 'manufacturer', 'ping_status')):
+    """Payload size and build time for one page of `rows` assets, per response shape"""
+    import gzip
+    import sqlite3
+    import tempfile
+
+    from flask import Flask
+
+    text_columns = ['hostname', 'ip_address', 'working_user', 'classification', 'department', 'status',
+                    'data_source', 'created_at', 'last_updated', 'os_name', 'os_version', 'manufacturer', 'model',
+                    'serial_number', 'mac_address', 'cpu_info', 'storage_info', 'vendor', 'ping_status', 'last_ping',
+                    'collection_method', 'domain', 'notes']
+    heavy = ['graphics_cards', 'network_adapters', 'installed_software', 'user_profiles']
+    results: Dict[str, Any] = {'rows': rows}
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'assets.db')
+        conn = sqlite3.connect(db_path)
+        conn.execute(f"CREATE TABLE assets (id INTEGER PRIMARY KEY, memory_gb REAL, "
+                     f"{', '.join(c + ' TEXT' for c in text_columns + heavy)})")
+        software = json.dumps([{'name': f'Package {n}', 'version': f'{n}.0.1', 'publisher': 'Vendor'}
+                               for n in range(30)])
+        adapters = json.dumps([{'name': 'Ethernet', 'mac': '00:11:22:33:44:55', 'speed': 1000}] * 2)
+        conn.executemany(
+            f"INSERT INTO assets (memory_gb, {', '.join(text_columns + heavy)}) "
+            f"VALUES ({', '.join('?' for _ in range(1 + len(text_columns) + len(heavy)))})",
+            [(16.0, *(f'{c}-{n}' for c in text_columns),
+              '[{"name": "Intel UHD 620"}]', adapters, software, '["admin", "user"]') for n in range(rows)])
+        conn.commit()
+
+        field_set = FieldSet.from_table(conn, 'assets', expandable=heavy)
+        app = Flask(__name__)
+        projected = ','.join(fields)
+        shapes = (('full_records', None, 'json', True), ('wide_records', None, 'json', False),
+                  ('projected_records', projected, 'json', False), ('projected_columns', projected, 'columns', False))
+        if MSGPACK_AVAILABLE:
+            shapes += (('projected_msgpack', projected, 'msgpack', False),)
+        with app.test_request_context('/'):
+            for label, requested, fmt, legacy_expand in shapes:
+                projection = field_set.resolve(requested, legacy_expand=legacy_expand)
+                started = time.perf_counter()
+                fetched = conn.execute(f"SELECT {projection.select_sql} FROM assets ORDER BY id").fetchall()
+                body = projected_response(projection, projection.decode(fetched), fmt=fmt).get_data()
+                elapsed = time.perf_counter() - started
+                results[label] = {'fields': len(projection.names), 'ms': round(elapsed * 1000, 1),
+                                  'bytes': len(body), 'gzip_bytes': len(gzip.compress(body, 6))}
+        conn.close()
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Field projection payload benchmark")
+    parser.add_argument('--rows', type=int, default=10000)
+    args = parser.parse_args()
+    print(json.dumps(benchmark(args.rows), indent=2))
@@ -10,6 +10,8 @@ import sqlite3
 from datetime import datetime
 import os
 
+from db.migrations import migrate
+
 def fix_database_schema():
     """Fix database schema to support all collected data properly"""
     
@@ -22,53 +24,12 @@ def fix_database_schema():
         shutil.copy2(db_path, backup_path)
         print(f"📁 Database backed up to: {backup_path}")
     
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    # Get current table structure
-    cursor.execute("PRAGMA table_info(assets)")
-    current_columns = [row[1] for row in cursor.fetchall()]
-    print(f"📋 Current columns: {current_columns}")
-    
-    # Add missing columns if needed
-    new_columns = [
-        ("collection_time", "TEXT"),
-        ("mac_address", "TEXT"),
-        ("vendor", "TEXT"),
-        ("services", "TEXT"),  # Store as JSON string
-        ("open_ports", "TEXT"),  # Store as JSON string
-        ("http_banner", "TEXT"),
-        ("device_classification", "TEXT"),
-        ("collection_methods", "TEXT"),  # Store as JSON string
-        ("scan_data", "TEXT"),  # Store as JSON string for comprehensive data
-        ("last_updated", "TEXT DEFAULT CURRENT_TIMESTAMP")
-    ]
-    
-    for column_name, column_type in new_columns:
-        if column_name not in current_columns:
-            try:
-                cursor.execute(f"ALTER TABLE assets ADD COLUMN {column_name} {column_type}")
-                print(f"✅ Added column: {column_name}")
-            except sqlite3.OperationalError as e:
-                print(f"⚠️ Column {column_name} might already exist: {e}")
-    
-    # Create indexes for better performance
-    indexes = [
-        ("idx_ip", "ip_address"),
-        ("idx_hostname", "hostname"), 
-        ("idx_classification", "device_classification"),
-        ("idx_updated", "last_updated")
-    ]
-    
-    for index_name, column in indexes:
-        try:
-            cursor.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON assets ({column})")
-            print(f"📊 Created index: {index_name}")
-        except sqlite3.OperationalError:
-            pass
-    
-    conn.commit()
-    conn.close()
+    # Missing columns and indexes are versioned migrations now (persistence columns are migration 4)
+    applied = migrate(db_path)
+    for record in applied:
+        print(f"✅ Applied migration {record['version']}: {record['name']} ({record['columns_added']} columns)")
+    if not applied:
+        print("ℹ️ Schema already up to date")
     
     print("✅ Database schema updated successfully!")
     return True
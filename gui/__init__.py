@@ -7,17 +7,17 @@ Contains all GUI-related modules and enhancements
 # Import core GUI modules for easy access
 try:
     from .app import *
-except ImportError:
+except (ImportError, SyntaxError):
     pass
 
 try:
     from .thread_safe_enhancement import *
-except ImportError:
+except (ImportError, SyntaxError):
     pass
 
 try:
     from .enhanced_app import *
-except ImportError:
+except (ImportError, SyntaxError):
     pass
 
 __version__ = "1.0.0"
@@ -319,6 +319,7 @@ except ImportError:
 # Import enhanced collection strategy (fallback)
 try:
     from enhanced_collection_strategy import EnhancedCollectionStrategy
+    from enhanced_collection_strategy import SCAN_CHECKPOINTS_AVAILABLE as CHECKPOINTED_STRATEGY_AVAILABLE
     ENHANCED_STRATEGY_AVAILABLE = True if not ULTIMATE_PERFORMANCE_AVAILABLE else False
     PROPER_STRATEGY_AVAILABLE = False
     ULTRA_FAST_AVAILABLE = False
@@ -326,6 +327,7 @@ try:
         print("🎯 Enhanced Collection Strategy loaded (MAXIMUM DATA COLLECTION)")
 except ImportError:
     ENHANCED_STRATEGY_AVAILABLE = False
+    CHECKPOINTED_STRATEGY_AVAILABLE = False
     print("⚠️ Enhanced Collection Strategy not available")
 
 # Fallback import chain for DeviceInfoCollector
@@ -560,6 +562,20 @@ class MainWindow(QMainWindow):
             pass
 
         self.cfg = load_config()
+
+        # Scheduled online snapshots of assets.db (cfg "backup": interval_hours / keep_last / compression)
+        self.snapshot_scheduler = None
+        backup_cfg = self.cfg.get("backup") or {}
+        if backup_cfg.get("interval_hours"):
+            try:
+                from database_backup import DatabaseBackup, SnapshotScheduler
+                self.snapshot_scheduler = SnapshotScheduler(
+                    DatabaseBackup("assets.db", backup_cfg.get("dir", "backups"),
+                                   compression=backup_cfg.get("compression")),
+                    backup_cfg["interval_hours"], backup_cfg.get("keep_last", 14),
+                    backup_cfg.get("max_age_days")).start()
+            except Exception as e:
+                print(f"⚠️ Snapshot scheduler not started: {e}")
         
         root_layout = QVBoxLayout()
 
@@ -1066,8 +1082,12 @@ class MainWindow(QMainWindow):
         self.chk_http.setChecked(True)
         self.chk_nmap = QCheckBox("Assist with Nmap (if installed)")
         self.chk_nmap.setChecked(True)
+        self.chk_resume_scan = QCheckBox("Resume interrupted scan")
+        self.chk_resume_scan.setChecked(True)
+        self._update_resume_option()
         disc_layout.addWidget(self.chk_http)
         disc_layout.addWidget(self.chk_nmap)
+        disc_layout.addWidget(self.chk_resume_scan)
         group_layout.addLayout(disc_layout)
 
         # ===== Active Directory =====
@@ -1245,7 +1265,7 @@ class MainWindow(QMainWindow):
             pass
     
     def add_windows_cred(self, username: str = "", password: str = ""):
-        row = CredRow("DOMAIN\\user or .\\localadmin", "PLACEHOLDER_PASS"  # SECURITY: Replace with secure credential, username, password, 
+        row = CredRow("DOMAIN\\user or .\\localadmin", "Password", username, password,
                      parent=self, delete_callback=self.delete_windows_cred)
         self.win_creds_layout.addWidget(row)
         self.win_rows.append(row)
@@ -1352,7 +1372,7 @@ class MainWindow(QMainWindow):
             pass
     
     def add_linux_cred(self, username: str = "", password: str = ""):
-        row = CredRow("root / ubuntu / user / root@esxi", "PLACEHOLDER_PASS"  # SECURITY: Replace with secure credential, username, password, 
+        row = CredRow("root / ubuntu / user / root@esxi", "Password", username, password,
                      parent=self, delete_callback=self.delete_linux_cred)
         self.lin_creds_layout.addWidget(row)
         self.lin_rows.append(row)
@@ -1553,13 +1573,13 @@ class MainWindow(QMainWindow):
                 
                 for c in creds.get("wmi_credentials", []):
                     username = c.get("username", "")
-                    password = c.get("PLACEHOLDER_PASS"  # SECURITY: Replace with secure credential, "")
+                    password = c.get("password", "")
                     domain = c.get("domain", ".")
                     
                     if username and password:  # Only add if both exist
                         out.append({
                             "username": username, 
-                            "PLACEHOLDER_PASS"  # SECURITY: Replace with secure credential: password,  # Real password from JSON
+                            "password": password,  # Real password from JSON
                             "domain": domain or '.'
                         })
         except Exception as e:
@@ -1578,7 +1598,7 @@ class MainWindow(QMainWindow):
                     username = un
                 out.append({
                     "username": username, 
-                    "PLACEHOLDER_PASS"  # SECURITY: Replace with secure credential: pw,
+                    "password": pw,
                     "domain": domain
                 })
         
@@ -1591,7 +1611,7 @@ class MainWindow(QMainWindow):
                     domain, username = username.split('\\', 1)
                 out.append({
                     "username": username, 
-                    "PLACEHOLDER_PASS"  # SECURITY: Replace with secure credential: get_secret(c.get("secret_id", "")),
+                    "password": get_secret(c.get("secret_id", "")),
                     "domain": domain
                 })
         
@@ -1607,7 +1627,7 @@ class MainWindow(QMainWindow):
                         domain, username = username.split('\\', 1)
                     out.append({
                         "username": username, 
-                        "PLACEHOLDER_PASS"  # SECURITY: Replace with secure credential: get_secret(c.get("secret_id", "")),
+                        "password": get_secret(c.get("secret_id", "")),
                         "domain": domain
                     })
             
@@ -1627,7 +1647,7 @@ class MainWindow(QMainWindow):
                     username = un
                 out.append({
                     "username": username, 
-                    "PLACEHOLDER_PASS"  # SECURITY: Replace with secure credential: pw,
+                    "password": pw,
                     "domain": domain
                 })
         
@@ -1639,21 +1659,24 @@ class MainWindow(QMainWindow):
                     domain, username = username.split('\\', 1)
                 out.append({
                     "username": username, 
-                    "PLACEHOLDER_PASS"  # SECURITY: Replace with secure credential: get_secret(c.get("secret_id", "")),
+                    "password": get_secret(c.get("secret_id", "")),
                     "domain": domain
                 })
-        
-        # Add enterprise credentials if none configured
-        if not out:
-            enterprise_creds = [
-                {"username": "administrator", # SECURITY RISK: Hardcoded password detected, "domain": "square"},
-                {"username": "root", # SECURITY RISK: Hardcoded password detected, "domain": "."},
-                {"username": "PLACEHOLDER_ADMIN"  # SECURITY: Replace with secure credential, # SECURITY RISK: Hardcoded password detected, "domain": "."},
-            ]
-            out.extend(enterprise_creds)
             
         return out
 
+    def _update_resume_option(self):
+        """Only the checkpointed collection strategy can resume; otherwise the option is off"""
+        if CHECKPOINTED_STRATEGY_AVAILABLE:
+            self.chk_resume_scan.setEnabled(True)
+            self.chk_resume_scan.setToolTip("Checked: scan with the checkpointed collection strategy and pick up an "
+                                            "interrupted scan of these targets where it stopped\n"
+                                            "Unchecked: ignore saved progress and scan from scratch")
+        else:
+            self.chk_resume_scan.setChecked(False)
+            self.chk_resume_scan.setEnabled(False)
+            self.chk_resume_scan.setToolTip("Unavailable: needs enhanced_collection_strategy and scan_checkpoints")
+
     def start_collection(self):
         targets_raw = self.target_entry.text().strip()
         if not targets_raw:
@@ -1717,8 +1740,13 @@ class MainWindow(QMainWindow):
             'parent': self
         }
 
+        # The ultimate performance collector does not checkpoint, so a resumable scan
+        # goes through the checkpointed strategy instead
+        resume_scan = CHECKPOINTED_STRATEGY_AVAILABLE and self.chk_resume_scan.isChecked()
+        use_ultimate = ULTIMATE_PERFORMANCE_AVAILABLE and not resume_scan
+
         # Prioritize Ultimate Performance Collector (HIGHEST PRIORITY)
-        if ULTIMATE_PERFORMANCE_AVAILABLE:
+        if use_ultimate:
             self.log_output.append("🚀 ULTIMATE PERFORMANCE COLLECTION STARTING")
             self.log_output.append("===================================================")
             self.log_output.append("⚡ 500+ devices/second validation potential")
@@ -1776,7 +1804,7 @@ class MainWindow(QMainWindow):
             self.ultimate_ip_list = ip_list  # Store for collection
             self.log_output.append("🚀 Using ENHANCED ULTIMATE PERFORMANCE collector (MAXIMUM SPEED + SMART CLASSIFICATION + 100% ACCURACY)")
             
-        elif ENHANCED_STRATEGY_AVAILABLE:
+        elif ENHANCED_STRATEGY_AVAILABLE or resume_scan:
             # Use enhanced collection strategy with maximum data collection
             # Convert old interface to new interface
             credentials = {
@@ -1790,13 +1818,16 @@ class MainWindow(QMainWindow):
             collector_kwargs = {
                 'targets': targets,
                 'credentials': credentials,
-                'parent': self
+                'parent': self,
+                'resume_scan': resume_scan
             }
             
             # Import and use EnhancedCollectionStrategy
             from enhanced_collection_strategy import EnhancedCollectionStrategy
             collector_class = EnhancedCollectionStrategy
             self.log_output.append("🚀 Using ENHANCED collection strategy (MAXIMUM DATA COLLECTION)")
+            if resume_scan:
+                self.log_output.append("♻️ Checkpointed scan - an interrupted run of these targets resumes where it stopped")
         elif PROPER_STRATEGY_AVAILABLE:
             # Use proper 3-step collection strategy
             collector_kwargs.update({
@@ -1832,7 +1863,7 @@ class MainWindow(QMainWindow):
             self.log_output.append("⚠️ Using standard collector")
 
         # Create thread-safe collector
-        if ULTIMATE_PERFORMANCE_AVAILABLE:
+        if use_ultimate:
             # Special handling for ultimate performance collector
             self.worker = UltimatePerformanceCollectorThread(self, collector_class, self.ultimate_ip_list, **collector_kwargs)
             
@@ -3089,11 +3120,11 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Error", f"Failed to export logs: {str(e)}")
 
     def backup_database(self):
-        """Backup the assets database"""
+        """Backup the assets database (online, consistent while collectors write)"""
         try:
-            import shutil
             import datetime
             from PyQt6.QtWidgets import QFileDialog
+            from database_backup import DatabaseBackup
             
             # Generate backup filename
             timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -3102,23 +3133,18 @@ class MainWindow(QMainWindow):
             # Ask user for backup location
             filename, _ = QFileDialog.getSaveFileName(
                 self, "Backup Database", backup_filename,
-                "Database Files (*.db);;All Files (*)"
+                "Database Files (*.db);;Compressed Database (*.db.gz);;All Files (*)"
             )
             
             if filename:
-                # Copy database file
                 if os.path.exists("assets.db"):
-                    shutil.copy2("assets.db", filename)
-                    
-                    # Also backup related files
-                    base_name = filename.rsplit('.', 1)[0]
-                    for ext in ['-shm', '-wal']:
-                        src_file = f"assets.db{ext}"
-                        if os.path.exists(src_file):
-                            dst_file = f"{base_name}{ext}"
-                            shutil.copy2(src_file, dst_file)
-                    
-                    QMessageBox.information(self, "Success", f"Database backed up to: {filename}")
+                    # Paged sqlite3 backup API + integrity check: no torn copy of a live -wal
+                    compression = "gzip" if filename.endswith(".gz") else None
+                    result = DatabaseBackup("assets.db").backup(target=filename, compression=compression)
+                    QMessageBox.information(
+                        self, "Success",
+                        f"Database backed up to: {filename}\n"
+                        f"{result.size_bytes / 1048576:.1f} MB in {result.seconds:.1f}s, integrity check passed")
                 else:
                     QMessageBox.warning(self, "Error", "Database file not found!")
                     
@@ -3128,7 +3154,12 @@ class MainWindow(QMainWindow):
     def view_all_devices(self):
         """View all devices in database"""
         try:
-            from PyQt6.QtWidgets import QDialog, QVBoxLayout, QTableWidget, QTableWidgetItem, QHeaderView
+            from PyQt6.QtWidgets import QDialog, QVBoxLayout, QTableView, QHeaderView, QAbstractItemView
+            from gui.device_table_model import DeviceTableModel
+            
+            if not os.path.exists('assets.db'):
+                QMessageBox.information(self, "No Data", "No devices found in database!")
+                return
             
             dialog = QDialog(self)
             dialog.setWindowTitle("📋 All Devices in Database")
@@ -3136,45 +3167,43 @@ class MainWindow(QMainWindow):
             
             layout = QVBoxLayout()
             
-            # Create table
-            table = QTableWidget()
+            # Search box - filtering runs in SQL, not over loaded rows
+            filter_layout = QHBoxLayout()
+            filter_layout.addWidget(QLabel("🔍 Filter:"))
+            filter_edit = QLineEdit()
+            filter_edit.setPlaceholderText("IP, hostname, department, status...")
+            filter_layout.addWidget(filter_edit)
+            count_label = QLabel("Counting devices...")
+            filter_layout.addWidget(count_label)
+            layout.addLayout(filter_layout)
+            
+            # Virtualized table: rows are paged from SQLite on a worker thread
+            model = DeviceTableModel('assets.db', parent=dialog)
+            table = QTableView()
+            table.setModel(model)
+            table.setSortingEnabled(True)
+            table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+            table.setAlternatingRowColors(True)
             layout.addWidget(table)
             
-            # Load data from database
-            import sqlite3
-            conn = sqlite3.connect('assets.db')
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT ip_address, hostname, department, os_type, status, 
-                       last_seen, collection_method 
-                FROM assets 
-                ORDER BY last_seen DESC
-            """)
-            
-            data = cursor.fetchall()
-            conn.close()
-            
-            if not data:
-                QMessageBox.information(self, "No Data", "No devices found in database!")
-                return
-            
-            # Set up table
-            headers = ["IP Address", "Hostname", "Department", "OS Type", "Status", "Last Seen", "Method"]
-            table.setRowCount(len(data))
-            table.setColumnCount(len(headers))
-            table.setHorizontalHeaderLabels(headers)
-            
-            # Populate table
-            for row, record in enumerate(data):
-                for col, value in enumerate(record):
-                    item = QTableWidgetItem(str(value) if value else "")
-                    table.setItem(row, col, item)
-            
-            # Resize columns
+            # Fixed column widths - ResizeToContents would measure every row
             header = table.horizontalHeader()
             if header:
-                header.setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+                header.setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+                header.setDefaultSectionSize(140)
+                header.setStretchLastSection(True)
+            vertical_header = table.verticalHeader()
+            if vertical_header:
+                vertical_header.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+                vertical_header.setDefaultSectionSize(22)
+            
+            filter_timer = QTimer(dialog)
+            filter_timer.setSingleShot(True)
+            filter_timer.setInterval(300)
+            filter_timer.timeout.connect(lambda: model.set_filter_text(filter_edit.text()))
+            filter_edit.textChanged.connect(lambda _: filter_timer.start())
+            model.rows_counted.connect(lambda total: count_label.setText(f"📊 {total:,} devices"))
+            model.load_error.connect(lambda msg: count_label.setText(f"❌ {msg}"))
             
             # Action buttons
             buttons_layout = QHBoxLayout()
@@ -3194,6 +3223,7 @@ class MainWindow(QMainWindow):
             
             dialog.setLayout(layout)
             dialog.exec()
+            model.wait_for_idle()
             
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Failed to view devices: {str(e)}")
@@ -3201,25 +3231,9 @@ class MainWindow(QMainWindow):
     def refresh_device_table(self, table):
         """Refresh device table data"""
         try:
-            import sqlite3
-            conn = sqlite3.connect('assets.db')
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT ip_address, hostname, department, os_type, status, 
-                       last_seen, collection_method 
-                FROM assets 
-                ORDER BY last_seen DESC
-            """)
-            
-            data = cursor.fetchall()
-            conn.close()
-            
-            table.setRowCount(len(data))
-            for row, record in enumerate(data):
-                for col, value in enumerate(record):
-                    item = QTableWidgetItem(str(value) if value else "")
-                    table.setItem(row, col, item)
+            model = table.model()
+            if model is not None and hasattr(model, 'refresh'):
+                model.refresh()
                     
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Failed to refresh table: {str(e)}")
@@ -3228,8 +3242,6 @@ class MainWindow(QMainWindow):
         """Export devices to CSV file"""
         try:
             from PyQt6.QtWidgets import QFileDialog
-            import csv
-            import sqlite3
             import datetime
             
             filename, _ = QFileDialog.getSaveFileName(
@@ -3239,26 +3251,17 @@ class MainWindow(QMainWindow):
             )
             
             if filename:
-                conn = sqlite3.connect('assets.db')
-                cursor = conn.cursor()
-                
-                cursor.execute("""
-                    SELECT ip_address, hostname, department, os_type, status, 
-                           last_seen, collection_method 
-                    FROM assets 
-                    ORDER BY last_seen DESC
-                """)
+                from streaming_export import StreamingExporter
                 
-                data = cursor.fetchall()
-                headers = ["IP Address", "Hostname", "Department", "OS Type", "Status", "Last Seen", "Method"]
-                
-                with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-                    writer = csv.writer(csvfile)
-                    writer.writerow(headers)
-                    writer.writerows(data)
-                
-                conn.close()
-                QMessageBox.information(self, "Success", f"Devices exported to: {filename}")
+                # Rows are streamed from SQLite in chunks instead of fetchall()
+                headers = {"ip_address": "IP Address", "hostname": "Hostname", "department": "Department",
+                           "os_type": "OS Type", "status": "Status", "last_seen": "Last Seen",
+                           "collection_method": "Method"}
+                exporter = StreamingExporter('assets.db')
+                columns = exporter.resolve_columns(list(headers))
+                count = exporter.write_csv(filename, columns, headers=[headers[c] for c in columns],
+                                           order_by='last_seen DESC')
+                QMessageBox.information(self, "Success", f"{count} devices exported to: {filename}")
                 
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Failed to export devices: {str(e)}")
@@ -3266,11 +3269,11 @@ class MainWindow(QMainWindow):
     def delete_selected_devices(self, table):
         """Delete selected devices from database"""
         try:
-            selected_rows = set()
-            for item in table.selectedItems():
-                selected_rows.add(item.row())
+            model = table.model()
+            selection = table.selectionModel()
+            selected_rows = sorted({index.row() for index in selection.selectedRows()}) if selection else []
             
-            if not selected_rows:
+            if not selected_rows or model is None:
                 QMessageBox.information(self, "No Selection", "Please select devices to delete!")
                 return
             
@@ -3279,23 +3282,10 @@ class MainWindow(QMainWindow):
             if reply != QMessageBox.StandardButton.Yes:
                 return
             
-            import sqlite3
-            conn = sqlite3.connect('assets.db')
-            cursor = conn.cursor()
-            
-            deleted_count = 0
-            for row in selected_rows:
-                ip_item = table.item(row, 0)  # IP is in first column
-                if ip_item:
-                    ip = ip_item.text()
-                    cursor.execute("DELETE FROM assets WHERE ip_address = ?", (ip,))
-                    deleted_count += 1
-            
-            conn.commit()
-            conn.close()
+            # One DELETE ... WHERE id IN (...) for the whole selection
+            deleted_count = model.delete_rows(selected_rows)
             
             QMessageBox.information(self, "Success", f"Deleted {deleted_count} devices successfully!")
-            self.refresh_device_table(table)
             
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Failed to delete devices: {str(e)}")
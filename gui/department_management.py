@@ -17,6 +17,8 @@ from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
                              QListWidgetItem, QSplitter, QProgressBar)
 from PyQt6.QtGui import QFont
 
+from bulk_operations import AssetBulkWriter
+
 
 class DepartmentDatabase:
     """Database operations for departments and locations"""
@@ -202,44 +204,19 @@ class DepartmentDatabase:
                      location_id: Optional[int] = None, assigned_by: str = "System", 
                      notes: str = "") -> bool:
         """Assign device to department and/or location"""
+        return self.assign_devices([asset_id], department_id, location_id, assigned_by, notes) == 1
+    
+    def assign_devices(self, asset_ids: List[int], department_id: Optional[int] = None,
+                       location_id: Optional[int] = None, assigned_by: str = "System",
+                       notes: str = "") -> int:
+        """Assign many devices in one transaction; returns how many were assigned"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Remove existing assignment for this device
-                cursor.execute("DELETE FROM device_assignments WHERE asset_id = ?", (asset_id,))
-                
-                # Add new assignment
-                cursor.execute("""
-                    INSERT INTO device_assignments (asset_id, department_id, location_id, assigned_by, notes)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (asset_id, department_id, location_id, assigned_by, notes))
-                
-                # Update assets table with department and location names
-                dept_name = None
-                location_name = None
-                
-                if department_id:
-                    cursor.execute("SELECT name FROM departments WHERE id = ?", (department_id,))
-                    result = cursor.fetchone()
-                    dept_name = result[0] if result else None
-                
-                if location_id:
-                    cursor.execute("SELECT name FROM locations WHERE id = ?", (location_id,))
-                    result = cursor.fetchone()
-                    location_name = result[0] if result else None
-                
-                # Update the assets table
-                cursor.execute("""
-                    UPDATE assets 
-                    SET department = ?, location = ?, updated_at = ?
-                    WHERE id = ?
-                """, (dept_name, location_name, datetime.now().isoformat(), asset_id))
-                
-                conn.commit()
-                return True
+            result = AssetBulkWriter(self.db_path).assign(
+                asset_ids, department_id=department_id, location_id=location_id,
+                assigned_by=assigned_by, notes=notes)
+            return result.succeeded
         except Exception:
-            return False
+            return 0
     
     def get_device_assignments(self) -> List[Dict]:
         """Get all device assignments with details"""
@@ -463,16 +440,12 @@ class DeviceAssignmentDialog(QDialog):
             QMessageBox.warning(self, "Warning", "Please select at least a department or location.")
             return
         
-        # Show progress
+        # Show progress (one batch, so busy indicator rather than per-device steps)
         self.progress_bar.setVisible(True)
-        self.progress_bar.setMaximum(len(selected_items))
-        
-        assigned_count = 0
-        for i, item in enumerate(selected_items):
-            asset_id = item.data(Qt.ItemDataRole.UserRole)
-            if self.db.assign_device(asset_id, department_id, location_id, assigned_by, notes):
-                assigned_count += 1
-            self.progress_bar.setValue(i + 1)
+        self.progress_bar.setMaximum(0)
+        
+        asset_ids = [item.data(Qt.ItemDataRole.UserRole) for item in selected_items]
+        assigned_count = self.db.assign_devices(asset_ids, department_id, location_id, assigned_by, notes)
         
         self.progress_bar.setVisible(False)
         
@@ -0,0 +1,338 @@
+# -*- coding: utf-8 -*-
+"""
+Device Table Model
+------------------
+Virtualized QAbstractTableModel for the "All Devices" views.
+
+Rows are paged out of SQLite in chunks on a worker thread through
+canFetchMore()/fetchMore(), only a window of chunks is kept in memory,
+sorting and filtering are pushed down into SQL, and deletes run as one bulk
+transaction keyed by asset id.  This replaces fetchall() + one QTableWidgetItem
+per cell, which froze the UI thread on large inventories.
+"""
+
+import os
+import sqlite3
+from collections import OrderedDict
+from contextlib import closing
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from PyQt6.QtCore import (
+    Qt, QAbstractTableModel, QModelIndex, QObject, QRunnable, QThreadPool, pyqtSignal
+)
+
+from bulk_operations import AssetBulkWriter
+
+# (database column, header label) shown by MainWindow.view_all_devices
+DEFAULT_DEVICE_COLUMNS: List[Tuple[str, str]] = [
+    ("ip_address", "IP Address"),
+    ("hostname", "Hostname"),
+    ("department", "Department"),
+    ("os_type", "OS Type"),
+    ("status", "Status"),
+    ("last_seen", "Last Seen"),
+    ("collection_method", "Method"),
+]
+
+LOADING_PLACEHOLDER = "…"
+
+
+class _LoaderSignals(QObject):
+    """Signals emitted by worker runnables (delivered queued on the GUI thread)"""
+
+    chunk_loaded = pyqtSignal(int, int, object)   # generation, chunk index, rows
+    count_loaded = pyqtSignal(int, int)           # generation, total rows
+    load_failed = pyqtSignal(int, str)            # generation, error message
+
+
+class _ChunkLoader(QRunnable):
+    """Load one page of rows (or the row count) with a private connection"""
+
+    def __init__(self, signals: _LoaderSignals, db_path: str, sql: str,
+                 params: Sequence[Any], generation: int, chunk_index: int = -1):
+        super().__init__()
+        self.signals = signals
+        self.db_path = db_path
+        self.sql = sql
+        self.params = list(params)
+        self.generation = generation
+        self.chunk_index = chunk_index
+        self.setAutoDelete(True)
+
+    def run(self):
+        conn = None
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute("PRAGMA query_only=ON")
+            cursor = conn.execute(self.sql, self.params)
+            if self.chunk_index < 0:
+                self.signals.count_loaded.emit(self.generation, int(cursor.fetchone()[0]))
+            else:
+                self.signals.chunk_loaded.emit(self.generation, self.chunk_index, cursor.fetchall())
+        except Exception as e:
+            self.signals.load_failed.emit(self.generation, str(e))
+        finally:
+            if conn is not None:
+                conn.close()
+
+
+class DeviceTableModel(QAbstractTableModel):
+    """Lazily paged, SQL-sorted and SQL-filtered view over the assets table"""
+
+    rows_counted = pyqtSignal(int)      # total rows matching the current filter
+    load_error = pyqtSignal(str)
+
+    def __init__(self, db_path: str = "assets.db",
+                 columns: Optional[List[Tuple[str, str]]] = None,
+                 chunk_size: int = 500, max_cached_chunks: int = 20,
+                 table: str = "assets", parent=None):
+        super().__init__(parent)
+        self.db_path = os.path.abspath(db_path)
+        self.table = table
+        self.columns = list(columns or DEFAULT_DEVICE_COLUMNS)
+        self.chunk_size = max(1, int(chunk_size))
+        self.max_cached_chunks = max(2, int(max_cached_chunks))
+
+        self._existing_columns = self._probe_columns()
+        self._sort_column = "last_seen"
+        self._sort_order = Qt.SortOrder.DescendingOrder
+        self._filter_text = ""
+
+        self._generation = 0
+        self._loaded_rows = 0
+        self._total_rows: Optional[int] = None
+        self._exhausted = False
+        self._chunks: "OrderedDict[int, List[tuple]]" = OrderedDict()
+        self._pending: set = set()
+
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(2)
+        self._signals = _LoaderSignals(self)
+        self._signals.chunk_loaded.connect(self._on_chunk_loaded)
+        self._signals.count_loaded.connect(self._on_count_loaded)
+        self._signals.load_failed.connect(self._on_load_failed)
+
+        self._request_count()
+
+    # ----------------- SQL building -----------------
+
+    def _probe_columns(self) -> set:
+        """Read the table's columns once so missing ones are selected as NULL"""
+        try:
+            with closing(sqlite3.connect(self.db_path)) as conn:
+                return {row[1] for row in conn.execute(f"PRAGMA table_info({self.table})")}
+        except sqlite3.Error:
+            return set()
+
+    def _select_list(self) -> str:
+        parts = ["id"]
+        for name, _ in self.columns:
+            parts.append(name if name in self._existing_columns else f"NULL AS {name}")
+        return ", ".join(parts)
+
+    def _where_clause(self) -> Tuple[str, List[str]]:
+        if not self._filter_text:
+            return "", []
+        searchable = [name for name, _ in self.columns if name in self._existing_columns]
+        if not searchable:
+            return "", []
+        escaped = (self._filter_text.replace("\\", "\\\\")
+                   .replace("%", "\\%").replace("_", "\\_"))
+        pattern = f"%{escaped}%"
+        clause = " OR ".join(f"{name} LIKE ? ESCAPE '\\'" for name in searchable)
+        return f" WHERE ({clause})", [pattern] * len(searchable)
+
+    def _order_clause(self) -> str:
+        direction = "DESC" if self._sort_order == Qt.SortOrder.DescendingOrder else "ASC"
+        if self._sort_column in self._existing_columns:
+            return f" ORDER BY {self._sort_column} {direction}, id {direction}"
+        return f" ORDER BY id {direction}"
+
+    def _chunk_query(self, chunk_index: int) -> Tuple[str, List[Any]]:
+        where, params = self._where_clause()
+        sql = (f"SELECT {self._select_list()} FROM {self.table}{where}"
+               f"{self._order_clause()} LIMIT ? OFFSET ?")
+        return sql, params + [self.chunk_size, chunk_index * self.chunk_size]
+
+    # ----------------- Worker scheduling -----------------
+
+    def _request_count(self):
+        where, params = self._where_clause()
+        sql = f"SELECT COUNT(*) FROM {self.table}{where}"
+        self._pool.start(_ChunkLoader(self._signals, self.db_path, sql, params, self._generation))
+
+    def _request_chunk(self, chunk_index: int):
+        if chunk_index in self._pending:
+            return
+        self._pending.add(chunk_index)
+        sql, params = self._chunk_query(chunk_index)
+        self._pool.start(_ChunkLoader(self._signals, self.db_path, sql, params,
+                                      self._generation, chunk_index))
+
+    def _on_chunk_loaded(self, generation: int, chunk_index: int, rows: List[tuple]):
+        if generation != self._generation:
+            return  # stale result from before a sort/filter/refresh
+        self._pending.discard(chunk_index)
+        first_row = chunk_index * self.chunk_size
+
+        if first_row >= self._loaded_rows:
+            # Tail chunk requested by fetchMore(): grow the model
+            if len(rows) < self.chunk_size:
+                self._exhausted = True
+            self._store_chunk(chunk_index, rows)
+            if rows:
+                self.beginInsertRows(QModelIndex(), self._loaded_rows, self._loaded_rows + len(rows) - 1)
+                self._loaded_rows += len(rows)
+                self.endInsertRows()
+        else:
+            # Previously evicted chunk scrolled back into view
+            self._store_chunk(chunk_index, rows)
+            last_row = min(first_row + self.chunk_size, self._loaded_rows) - 1
+            self.dataChanged.emit(self.index(first_row, 0),
+                                  self.index(last_row, len(self.columns) - 1))
+
+    def _on_count_loaded(self, generation: int, total: int):
+        if generation != self._generation:
+            return
+        self._total_rows = total
+        self.rows_counted.emit(total)
+
+    def _on_load_failed(self, generation: int, message: str):
+        if generation != self._generation:
+            return
+        self._pending.clear()
+        self._exhausted = True
+        self.load_error.emit(message)
+
+    def _store_chunk(self, chunk_index: int, rows: List[tuple]):
+        self._chunks[chunk_index] = rows
+        self._chunks.move_to_end(chunk_index)
+        while len(self._chunks) > self.max_cached_chunks:
+            self._chunks.popitem(last=False)
+
+    def _row_tuple(self, row: int) -> Optional[tuple]:
+        chunk_index, offset = divmod(row, self.chunk_size)
+        chunk = self._chunks.get(chunk_index)
+        if chunk is None:
+            self._request_chunk(chunk_index)
+            return None
+        self._chunks.move_to_end(chunk_index)
+        return chunk[offset] if offset < len(chunk) else None
+
+    # ----------------- QAbstractTableModel API -----------------
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._loaded_rows
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        record = self._row_tuple(index.row())
+        if record is None:
+            return LOADING_PLACEHOLDER
+        value = record[index.column() + 1]  # column 0 is the hidden id
+        return str(value) if value else ""
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal and 0 <= section < len(self.columns):
+            return self.columns[section][1]
+        return str(section + 1)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted:
+            return False
+        tail_chunk = self._loaded_rows // self.chunk_size
+        return tail_chunk not in self._pending
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted:
+            return
+        self._request_chunk(self._loaded_rows // self.chunk_size)
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        if not 0 <= column < len(self.columns):
+            return
+        self._sort_column = self.columns[column][0]
+        self._sort_order = order
+        self.refresh()
+
+    # ----------------- Public helpers -----------------
+
+    def set_filter_text(self, text: str):
+        """Filter rows with a case-insensitive substring match in SQL"""
+        text = (text or "").strip()
+        if text == self._filter_text:
+            return
+        self._filter_text = text
+        self.refresh()
+
+    def refresh(self):
+        """Drop every cached row and start paging again from the first chunk"""
+        self.beginResetModel()
+        self._generation += 1
+        self._loaded_rows = 0
+        self._total_rows = None
+        self._exhausted = False
+        self._chunks.clear()
+        self._pending.clear()
+        self.endResetModel()
+        self._request_count()
+        self.fetchMore()
+
+    def total_rows(self) -> Optional[int]:
+        return self._total_rows
+
+    def cached_row_count(self) -> int:
+        return sum(len(chunk) for chunk in self._chunks.values())
+
+    def row_id(self, row: int) -> Optional[int]:
+        chunk = self._chunks.get(row // self.chunk_size)
+        if chunk is None:
+            return None
+        offset = row % self.chunk_size
+        return int(chunk[offset][0]) if offset < len(chunk) else None
+
+    def row_values(self, row: int) -> Optional[Dict[str, Any]]:
+        record = self._row_tuple(row)
+        if record is None:
+            return None
+        return {name: record[i + 1] for i, (name, _) in enumerate(self.columns)}
+
+    def ids_for_rows(self, rows: Iterable[int]) -> List[int]:
+        """Resolve view rows to asset ids, re-reading ids of evicted chunks"""
+        ids = set()
+        missing: Dict[int, List[int]] = {}
+        for row in rows:
+            asset_id = self.row_id(row)
+            if asset_id is not None:
+                ids.add(asset_id)
+            else:
+                chunk_index, offset = divmod(row, self.chunk_size)
+                missing.setdefault(chunk_index, []).append(offset)
+
+        if missing:
+            with closing(sqlite3.connect(self.db_path, timeout=10)) as conn:
+                for chunk_index, offsets in missing.items():
+                    sql, params = self._chunk_query(chunk_index)
+                    chunk_ids = [r[0] for r in conn.execute(f"SELECT id FROM ({sql})", params)]
+                    ids.update(chunk_ids[o] for o in offsets if o < len(chunk_ids))
+        return sorted(ids)
+
+    def delete_rows(self, rows: Iterable[int]) -> int:
+        """Delete the given view rows by asset id in one statement, then refresh"""
+        ids = self.ids_for_rows(rows)
+        if not ids:
+            return 0
+        # One executemany() transaction that also drops the department assignments
+        deleted = AssetBulkWriter(self.db_path, table=self.table, timeout=10).delete(ids).counts.get('deleted', 0)
+        self.refresh()
+        return deleted
+
+    def wait_for_idle(self, msecs: int = 5000) -> bool:
+        """Block until queued loads finish (used on close and in tests)"""
+        return self._pool.waitForDone(msecs)
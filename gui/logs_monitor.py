@@ -7,8 +7,7 @@ Live monitoring of system logs with filtering and search capabilities
 
 import ipaddress  # For IP validation
 import os
-import threading
-import time
+from collections import deque
 from datetime import datetime
 from PyQt6.QtCore import QTimer, QObject, pyqtSignal
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
@@ -17,62 +16,51 @@ from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
                              QTableWidgetItem, QHeaderView)
 from PyQt6.QtGui import QFont, QTextCursor, QColor
 
+from utils.log_tailer import LogTailer
+
 
 class LogMonitor(QObject):
-    """Real-time log file monitoring"""
+    """Real-time log file monitoring (event-driven, batched signals)"""
     
     log_updated = pyqtSignal(str, str, str)  # timestamp, level, message
+    logs_batch = pyqtSignal(list)  # [(timestamp, level, message), ...]
     
-    def __init__(self):
+    def __init__(self, max_batches_per_second: float = 4.0, backlog_bytes: int = 64 * 1024):
         super().__init__()
         self.monitoring = True
         self.log_files = {
             'Enhanced Collector': 'enhanced_asset_collector.log',
             'Web Service': 'web_service.log', 
             'Production Web': 'production_web_service.log',
-            'System': 'system.log'
+            'System': 'system.log',
+            'System (All)': os.path.join('logs', 'system_all.log')
         }
-        self.file_positions = {}
+        self.tailer = LogTailer(
+            self.log_files, self._on_tail_batch,
+            max_batches_per_second=max_batches_per_second,
+            backlog_bytes=backlog_bytes
+        )
         self.start_monitoring()
     
     def start_monitoring(self):
         """Start monitoring log files"""
-        self.monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
-        self.monitor_thread.start()
+        self.monitoring = True
+        self.tailer.start()
     
-    def _monitor_loop(self):
-        """Main monitoring loop"""
-        while self.monitoring:
-            try:
-                for log_name, log_file in self.log_files.items():
-                    if os.path.exists(log_file):
-                        self._check_log_file(log_name, log_file)
-                time.sleep(1)  # Check every second
-            except Exception as e:
-                print(f"Log monitoring error: {e}")
+    def stop_monitoring(self):
+        """Stop the background tailer"""
+        self.monitoring = False
+        self.tailer.stop()
     
-    def _check_log_file(self, log_name: str, log_file: str):
-        """Check individual log file for new content"""
-        try:
-            current_size = os.path.getsize(log_file)
-            last_position = self.file_positions.get(log_file, 0)
-            
-            if current_size > last_position:
-                with open(log_file, 'r', encoding='utf-8', errors='ignore') as f:
-                    f.seek(last_position)
-                    new_lines = f.readlines()
-                    
-                    for line in new_lines:
-                        line = line.strip()
-                        if line:
-                            timestamp = datetime.now().strftime('%H:%M:%S')
-                            level = self._extract_log_level(line)
-                            message = f"[{log_name}] {line}"
-                            self.log_updated.emit(timestamp, level, message)
-                
-                self.file_positions[log_file] = current_size
-        except Exception:
-            pass  # Ignore file access errors
+    def _on_tail_batch(self, batch):
+        """Convert a tailer batch into one signal (called on the tailer thread)"""
+        timestamp = datetime.now().strftime('%H:%M:%S')
+        entries = [
+            (timestamp, self._extract_log_level(line), f"[{log_name}] {line.strip()}")
+            for log_name, line in batch if line.strip()
+        ]
+        if entries:
+            self.logs_batch.emit(entries)
     
     def _extract_log_level(self, line: str) -> str:
         """Extract log level from line"""
@@ -95,8 +83,10 @@ class LogsMonitorWidget(QWidget):
     def __init__(self):
         super().__init__()
         self.log_monitor = LogMonitor()
-        self.log_buffer = []
         self.max_log_entries = 5000
+        self.max_display_lines = 1000
+        self.log_buffer = deque(maxlen=self.max_log_entries)  # ring buffer
+        self.level_counts = {'ERROR': 0, 'WARNING': 0}
         self.init_ui()
         self.connect_signals()
     
@@ -192,6 +182,7 @@ class LogsMonitorWidget(QWidget):
         self.log_display = QTextEdit()
         self.log_display.setFont(QFont("Consolas", 9))
         self.log_display.setReadOnly(True)
+        self.log_display.document().setMaximumBlockCount(self.max_display_lines)
         self.log_display.setStyleSheet("""
             QTextEdit {
                 background-color: #1e1e1e;
@@ -308,24 +299,61 @@ class LogsMonitorWidget(QWidget):
     
     def connect_signals(self):
         """Connect signals for real-time updates"""
-        self.log_monitor.log_updated.connect(self.add_log_entry)
+        self.log_monitor.logs_batch.connect(self.add_log_entries)
     
     def add_log_entry(self, timestamp: str, level: str, message: str):
         """Add new log entry"""
-        self.log_buffer.append({
-            'timestamp': timestamp,
-            'level': level,
-            'message': message,
-            'full_timestamp': datetime.now()
-        })
+        self.add_log_entries([(timestamp, level, message)])
+    
+    def add_log_entries(self, entries):
+        """Add a batch of log entries and refresh the views once"""
+        new_entries = []
+        now = datetime.now()
+        for timestamp, level, message in entries:
+            entry = {
+                'timestamp': timestamp,
+                'level': level,
+                'message': message,
+                'full_timestamp': now
+            }
+            # Keep running counts in step with what the ring buffer evicts
+            if len(self.log_buffer) == self.log_buffer.maxlen:
+                evicted = self.log_buffer[0]['level']
+                if evicted in self.level_counts:
+                    self.level_counts[evicted] -= 1
+            if level in self.level_counts:
+                self.level_counts[level] += 1
+            self.log_buffer.append(entry)
+            new_entries.append(entry)
+        
+        self.append_to_display(new_entries)
+        self.update_stats()
+        if any(entry['level'] == 'ERROR' for entry in new_entries):
+            self.update_error_analysis()
+    
+    def append_to_display(self, entries):
+        """Append only the new entries that pass the current filters"""
+        if not hasattr(self, 'log_display'):
+            return
+        visible = self.apply_filters(entries)[-self.max_display_lines:]
+        if not visible:
+            return
         
-        # Limit buffer size
-        if len(self.log_buffer) > self.max_log_entries:
-            self.log_buffer = self.log_buffer[-self.max_log_entries:]
+        cursor = self.log_display.textCursor()
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        for entry in visible:
+            self._insert_entry(cursor, entry)
         
-        self.update_log_display()
-        self.update_stats()
-        self.update_error_analysis()
+        if self.auto_scroll.isChecked():
+            self.log_display.setTextCursor(cursor)
+    
+    def _insert_entry(self, cursor, entry):
+        """Insert one colored line at the cursor position"""
+        char_format = cursor.charFormat()
+        char_format.setForeground(self.get_level_color(entry['level']))
+        if not self.log_display.document().isEmpty():
+            cursor.insertBlock()
+        cursor.insertText(f"[{entry['timestamp']}] {entry['level']:8} | {entry['message']}", char_format)
     
     def update_log_display(self):
         """Update the main log display"""
@@ -335,24 +363,20 @@ class LogsMonitorWidget(QWidget):
         # Apply filters
         filtered_logs = self.apply_filters()
         
-        # Update display
+        # Re-render (only needed when the filters change)
         self.log_display.clear()
-        for entry in filtered_logs[-1000:]:  # Show last 1000 entries
-            color = self.get_level_color(entry['level'])
-            formatted_line = f"[{entry['timestamp']}] {entry['level']:8} | {entry['message']}"
-            
-            self.log_display.setTextColor(color)
-            self.log_display.append(formatted_line)
+        cursor = self.log_display.textCursor()
+        for entry in filtered_logs[-self.max_display_lines:]:
+            self._insert_entry(cursor, entry)
         
         # Auto-scroll if enabled
         if self.auto_scroll.isChecked():
-            cursor = self.log_display.textCursor()
             cursor.movePosition(QTextCursor.MoveOperation.End)
             self.log_display.setTextCursor(cursor)
     
-    def apply_filters(self):
-        """Apply current filters to log buffer"""
-        filtered = self.log_buffer
+    def apply_filters(self, entries=None):
+        """Apply current filters to log buffer (or to the given entries)"""
+        filtered = list(self.log_buffer if entries is None else entries)
         
         # Level filter
         level_filter = self.level_filter.currentText()
@@ -382,8 +406,8 @@ class LogsMonitorWidget(QWidget):
             return
             
         total = len(self.log_buffer)
-        errors = len([e for e in self.log_buffer if e['level'] == 'ERROR'])
-        warnings = len([e for e in self.log_buffer if e['level'] == 'WARNING'])
+        errors = self.level_counts['ERROR']
+        warnings = self.level_counts['WARNING']
         last_update = datetime.now().strftime('%H:%M:%S')
         
         self.total_logs_label.setText(f"📊 Total: {total}")
@@ -472,7 +496,13 @@ class LogsMonitorWidget(QWidget):
     
     def update_error_analysis(self):
         """Update error analysis tab"""
-        recent_errors = [e for e in self.log_buffer if e['level'] == 'ERROR'][-20:]
+        recent_errors = []
+        for entry in reversed(self.log_buffer):
+            if entry['level'] == 'ERROR':
+                recent_errors.append(entry)
+                if len(recent_errors) == 20:
+                    break
+        recent_errors.reverse()
         
         if recent_errors:
             # Update error summary
@@ -544,6 +574,7 @@ class LogsMonitorWidget(QWidget):
     def clear_logs(self):
         """Clear log buffer and display"""
         self.log_buffer.clear()
+        self.level_counts = {'ERROR': 0, 'WARNING': 0}
         self.log_display.clear()
         self.update_stats()
     
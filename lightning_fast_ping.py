@@ -24,6 +24,7 @@ TARGET PERFORMANCE:
 """
 
 import time
+import shlex
 import subprocess
 import platform
 from concurrent.futures import ThreadPoolExecutor, as_completed
@@ -32,6 +33,18 @@ import ipaddress
 import re
 from dataclasses import dataclass
 
+try:
+    from adaptive_network_controller import OPEN, TIMEOUT, get_network_controller
+    NETWORK_CONTROLLER_AVAILABLE = True
+except ImportError:
+    NETWORK_CONTROLLER_AVAILABLE = False
+
+try:
+    from metrics_registry import observe_probe
+    METRICS_AVAILABLE = True
+except ImportError:
+    METRICS_AVAILABLE = False
+
 @dataclass
 class LightningResult:
     """Lightning-fast ping result"""
@@ -57,6 +70,9 @@ class LightningFastPingValidator:
         # Prepare the fastest possible ping command
         self.ping_command = self._create_fastest_ping_command()
         
+        # Per-/24 adaptive timeout + AIMD in-flight limit instead of a fixed 50ms / 10000 workers
+        self.network_controller = get_network_controller() if NETWORK_CONTROLLER_AVAILABLE else None
+        
         self.stats = {
             'total_scanned': 0,
             'alive_found': 0,
@@ -97,6 +113,21 @@ class LightningFastPingValidator:
 
     def lightning_ping(self, ip: str) -> LightningResult:
         """Lightning-fast single ping"""
+        if self.network_controller is None:
+            result = self._lightning_ping(ip, self.config['alive_timeout_ms'])
+        else:
+            # ICMP sweeps stay off the AIMD gate (the batch pool bounds them); dead
+            # addresses would otherwise hold slots for the whole unsampled timeout
+            result = self._lightning_ping(ip, self.network_controller.discovery_timeout_for(ip) * 1000)
+            if result.is_alive:
+                self.network_controller.record(ip, OPEN, result.ping_time_ms / 1000)
+            else:
+                self.network_controller.record(ip, TIMEOUT)
+        if METRICS_AVAILABLE:
+            observe_probe('ping', 'ok' if result.is_alive else 'timeout', result.total_time_ms / 1000)
+        return result
+
+    def _lightning_ping(self, ip: str, timeout_ms: float) -> LightningResult:
         start_time = time.time()
         
         try:
@@ -105,12 +136,12 @@ class LightningFastPingValidator:
             
             if system == "windows":
                 cmd = self.ping_command.format(
-                    timeout=self.config['alive_timeout_ms'],
+                    timeout=int(timeout_ms),
                     ip=ip
                 )
-                timeout_seconds = self.config['alive_timeout_ms'] / 1000.0
+                timeout_seconds = timeout_ms / 1000.0
             else:
-                timeout_sec = self.config['alive_timeout_ms'] / 1000.0
+                timeout_sec = timeout_ms / 1000.0
                 cmd = self.ping_command.format(
                     timeout_sec=timeout_sec,
                     ip=ip
@@ -118,7 +149,7 @@ class LightningFastPingValidator:
                 timeout_seconds = timeout_sec
             
             # Execute with minimal overhead
-            process = subprocess.Popen(cmd, shell=False  # SECURITY FIX: was shell=True,
+            process = subprocess.Popen(shlex.split(cmd),
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
                 text=True,
@@ -211,6 +242,9 @@ class LightningFastPingValidator:
         
         # Calculate optimal worker count
         max_workers = min(self.config['max_workers'], len(ips), 10000)
+        if self.network_controller is not None:
+            # The controller's concurrency ceiling bounds the sweep's process fan-out
+            max_workers = min(max_workers, self.network_controller.limiter.maximum)
         
         # Ultra-high concurrency scanning
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
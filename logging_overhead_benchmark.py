@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+📏 LOGGING OVERHEAD BENCHMARK
+==============================================================
+Measures the per-call cost of FeatureLogger.log_feature in the collection
+hot path: the legacy synchronous FileHandler setup versus the queue-based
+backend (QueueHandler + one QueueListener writer thread).
+"""
+
+import logging
+import tempfile
+import threading
+import time
+from pathlib import Path
+from queue import Queue
+
+from comprehensive_logging_system import FEATURES, FeatureLogger
+
+
+def _legacy_logger(log_directory: Path):
+    """Rebuild the previous backend: one synchronous FileHandler per feature"""
+    loggers = {}
+    for feature in FEATURES:
+        logger = logging.getLogger(f'LegacyBenchmark.{feature}')
+        logger.setLevel(logging.DEBUG)
+        logger.propagate = False
+        handler = logging.FileHandler(log_directory / f'{feature}.log', encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(asctime)s | %(levelname)s | %(message)s'))
+        logger.addHandler(handler)
+        loggers[feature] = logger
+    monitor_queue = Queue()
+
+    def log_feature(feature, level, message, **kwargs):
+        monitor_queue.put({'feature': feature, 'level': level, 'message': message, **kwargs})
+        getattr(loggers[feature], level.lower())(message)
+
+    def close():
+        for logger in loggers.values():
+            for handler in list(logger.handlers):
+                handler.close()
+                logger.removeHandler(handler)
+
+    return log_feature, close
+
+
+def _measure(log_feature, calls: int, threads: int) -> float:
+    """Return mean microseconds per log_feature call across worker threads"""
+    per_thread = calls // threads
+    durations = []
+
+    def worker(n):
+        started = time.perf_counter()
+        for i in range(per_thread):
+            log_feature('data_collection', 'INFO', f'Collected 10.0.{n}.{i % 256} via WMI', job_id=f'job-{n}')
+        durations.append(time.perf_counter() - started)
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return sum(durations) / (per_thread * threads) * 1e6
+
+
+def run_benchmark(calls: int = 50_000, threads: int = 8) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_dir = Path(tmp) / 'legacy'
+        legacy_dir.mkdir()
+        log_feature, close = _legacy_logger(legacy_dir)
+        results['legacy_us_per_call'] = _measure(log_feature, calls, threads)
+        close()
+
+        feature_logger = FeatureLogger(log_directory=str(Path(tmp) / 'queued'), console=False)
+        results['queued_us_per_call'] = _measure(feature_logger.log_feature, calls, threads)
+        drain_started = time.perf_counter()
+        feature_logger.flush()
+        results['queued_drain_seconds'] = time.perf_counter() - drain_started
+        feature_logger.shutdown()
+    return results
+
+
+if __name__ == "__main__":
+    for thread_count in (1, 8):
+        print(f"📏 Benchmarking FeatureLogger.log_feature overhead ({thread_count} collection threads)...")
+        results = run_benchmark(threads=thread_count)
+        print(f"   Legacy sync FileHandlers  : {results['legacy_us_per_call']:.1f} µs/call")
+        print(f"   Queue-based backend       : {results['queued_us_per_call']:.1f} µs/call")
+        print(f"   Background drain after run: {results['queued_drain_seconds']:.2f} s")
+        print(f"   Speedup in caller threads : {results['legacy_us_per_call'] / results['queued_us_per_call']:.1f}x")
@@ -12,6 +12,7 @@ Features:
 - Thread pool optimization
 - Emergency abort capability
 - Real-time progress tracking
+- Checkpointed chunks: an interrupted scan resumes where it stopped
 
 Author: Enhanced for Asset Management System
 """
@@ -26,6 +27,12 @@ try:
 except ImportError:
     PYQT6_AVAILABLE = False
 
+try:
+    from scan_checkpoints import ScanCheckpointStore
+    SCAN_CHECKPOINTS_AVAILABLE = True
+except ImportError:
+    SCAN_CHECKPOINTS_AVAILABLE = False
+
 class MassiveScanController(QObject):
     """
     🛡️ EMERGENCY MASSIVE SCAN CONTROLLER 🛡️
@@ -48,13 +55,14 @@ class MassiveScanController(QObject):
         self.progress_timer = QTimer()
         self.progress_timer.timeout.connect(self.update_ui_responsiveness)
         
-    def start_massive_scan(self, networks: List[str], max_threads: int = 50):
+    def start_massive_scan(self, networks: List[str], max_threads: int = 50, resume_scan: bool = True):
         """
         Start scanning multiple networks with intelligent chunking
         
         Args:
             networks: List of network ranges (e.g., ['192.168.1.0/24', '10.0.21.0/24'])
             max_threads: Maximum threads for parallel processing
+            resume_scan: Pick up interrupted runs of these networks (False starts fresh)
         """
         if self.is_scanning:
             return False
@@ -67,7 +75,7 @@ class MassiveScanController(QObject):
         
         # Start scan in separate thread
         self.scan_thread = MassiveScanThread(
-            networks, max_threads, self.main_window, self
+            networks, max_threads, self.main_window, self, resume_scan=resume_scan
         )
         self.scan_thread.finished.connect(self.on_scan_finished)
         self.scan_thread.start()
@@ -106,12 +114,15 @@ class MassiveScanThread(QThread):
     Performs intelligent chunked scanning of multiple networks
     """
     
-    def __init__(self, networks: List[str], max_threads: int, main_window, controller: MassiveScanController):
+    def __init__(self, networks: List[str], max_threads: int, main_window, controller: MassiveScanController,
+                 checkpoint_db: str = 'assets.db', resume_scan: bool = True):
         super().__init__()
         self.networks = networks
         self.max_threads = min(max_threads, 100)  # Cap at 100 threads
         self.main_window = main_window
         self.controller = controller
+        self.checkpoint_db = checkpoint_db
+        self.resume_scan = resume_scan
         self.should_abort = False
         
     def abort_scan(self):
@@ -173,11 +184,11 @@ class MassiveScanThread(QThread):
         Scan a single network using intelligent chunking strategy
         
         This prevents memory overload and UI hanging by processing
-        the network in smaller, manageable chunks.
+        the network in smaller, manageable chunks. Each chunk is
+        checkpointed (scan_checkpoints): restarting the same network
+        skips finished chunks and hosts that were already collected.
         """
         try:
-            # Import the ultra-fast collector
-            
             # Calculate optimal chunk size based on network size
             chunk_size = self.calculate_optimal_chunk_size(network)
             
@@ -185,21 +196,37 @@ class MassiveScanThread(QThread):
                 -1, f"📊 {network_name}: Using {chunk_size} devices per chunk"
             )
             
-            # Break network into chunks
-            network_chunks = self.create_network_chunks(network, chunk_size)
+            # Break network into chunks (persisted, so an interrupted scan picks up where it stopped)
+            run = None
+            if SCAN_CHECKPOINTS_AVAILABLE:
+                run = ScanCheckpointStore(self.checkpoint_db).start([network], chunk_size=chunk_size,
+                                                                    resume=self.resume_scan)
+                progress = run.status()
+                total_chunks = progress['chunks']
+                if run.resumed:
+                    self.controller.progress_updated.emit(
+                        -1, f"♻️ {network_name}: Resuming - {progress['chunks_done']}/{total_chunks} chunks, "
+                            f"{progress['collected']} devices already collected"
+                    )
+                network_chunks = ((chunk.seq, chunk.discover, chunk.alive) for chunk in run.chunks())
+            else:
+                chunks = self.create_network_chunks(network, chunk_size)
+                total_chunks = len(chunks)
+                network_chunks = ((seq, [chunk], []) for seq, chunk in enumerate(chunks))
             chunk_results = []
             
-            for chunk_i, chunk in enumerate(network_chunks):
+            for seq, targets, known_alive in network_chunks:
                 if self.should_abort:
                     break
                 
-                chunk_name = f"{network_name} chunk {chunk_i+1}/{len(network_chunks)}"
+                chunk_name = f"{network_name} chunk {seq+1}/{total_chunks}"
                 self.controller.progress_updated.emit(
-                    -1, f"🔍 Scanning {chunk_name}: {chunk}"
+                    -1, f"🔍 Scanning {chunk_name}: {', '.join((targets + known_alive)[:2])}"
+                        f"{' ...' if len(targets) + len(known_alive) > 2 else ''}"
                 )
                 
-                # Scan this chunk with conservative threading
-                chunk_threads = min(20, self.max_threads // len(network_chunks))
+                # Chunks run one after another, so each may use up to 20 threads
+                chunk_threads = max(1, min(20, self.max_threads))
                 
                 try:
                     # Use the UltraFastDeviceCollector directly
@@ -207,15 +234,15 @@ class MassiveScanThread(QThread):
                     
                     # Create collector for this chunk
                     collector = UltraFastDeviceCollector(
-                        target_networks=[chunk],
-                        windows_credentials=win_creds,
-                        linux_credentials=lin_creds,
+                        targets=targets,
+                        win_creds=win_creds,
+                        linux_creds=lin_creds,
                         snmp_v2c=self.main_window.get_snmp_v2c(),
                         snmp_v3=self.main_window.get_snmp_v3(),
-                        use_snmp=self.main_window.chk_snmp.isChecked(),
-                        use_nmap=self.main_window.chk_nmap.isChecked(),
-                        max_threads=chunk_threads,
-                        excel_file=None  # Database-only
+                        discovery_workers=chunk_threads,
+                        collection_workers=chunk_threads,
+                        checkpoint=run,
+                        known_alive=known_alive
                     )
                     
                     # Start collector and wait for completion
@@ -223,14 +250,18 @@ class MassiveScanThread(QThread):
                     collector.wait()  # Wait for completion
                     
                     # Get results
-                    devices = getattr(collector, 'collected_devices', [])
+                    devices = getattr(collector, '_processed_devices', [])
                     chunk_results.extend(devices)
+                    if run is not None and not self.should_abort:
+                        run.chunk_done(seq)
                     
                     self.controller.progress_updated.emit(
                         -1, f"✅ {chunk_name}: {len(devices)} devices found"
                     )
                     
                 except Exception as e:
+                    if run is not None:
+                        run.chunk_done(seq, error=str(e))
                     self.controller.progress_updated.emit(
                         -1, f"⚠️ {chunk_name} error: {e}"
                     )
@@ -239,6 +270,10 @@ class MassiveScanThread(QThread):
                 if not self.should_abort:
                     time.sleep(0.2)  # Prevent system overload
             
+            # An aborted run stays open so the next scan of this network resumes it
+            if run is not None:
+                run.flush() if self.should_abort else run.finish()
+            
             return chunk_results
             
         except Exception as e:
@@ -247,7 +282,8 @@ class MassiveScanThread(QThread):
             )
             return []
     
-    def calculate_optimal_chunk_size(self, network: str) -> int:
+    @staticmethod
+    def calculate_optimal_chunk_size(network: str) -> int:
         """
         Calculate optimal chunk size based on network range
         
@@ -0,0 +1,713 @@
+#!/usr/bin/env python3
+"""
+📈 IN-PROCESS METRICS REGISTRY
+==============================
+Counters, gauges and histograms that outlive a single scan (unlike the
+FastCollectionStats / CollectionStats counters held inside QThreads),
+exposed in the Prometheus text format (0.0.4):
+
+- probe latency and outcome by protocol (ping, tcp, wmi, ssh, snmp, http)
+- DB write batch size and commit latency
+- duplicate-detection time
+- web request latency per endpoint (install_flask_metrics on the Flask services)
+- collector queue depths, sampled at scrape time
+- scheduled scan runs (scan_scheduler_service)
+
+Headless processes (the scheduler daemon) serve it with start_metrics_server()
+or write it for node_exporter's textfile collector with write_textfile().
+
+Under pre-forked servers (wsgi_serving with gunicorn) every worker has its own
+registry. When METRICS_MULTIPROC_DIR is set, each worker writes a snapshot
+there every few seconds and at exit; /metrics merges them: counters and
+histograms are summed over every worker that ever ran (recycled ones too),
+gauges over live workers only. Other workers' numbers lag by at most
+MULTIPROCESS_FLUSH_INTERVAL seconds.
+Observations take a lock and a bisect; labelled children are cached so the
+hot path does no string formatting.
+
+    python metrics_registry.py --benchmark
+"""
+
+import atexit
+import glob
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PROBE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BATCH_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+RUN_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600)
+
+MULTIPROCESS_DIR_ENV = 'METRICS_MULTIPROC_DIR'
+try:
+    MULTIPROCESS_FLUSH_INTERVAL = float(os.environ.get('METRICS_MULTIPROC_INTERVAL', 5.0))
+except ValueError:
+    MULTIPROCESS_FLUSH_INTERVAL = 5.0
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if value == -math.inf:
+        return '-Inf'
+    if value != value:
+        return 'NaN'
+    if float(value).is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _label_text(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{n}="{_escape_label(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+# ----------------- Metric children -----------------
+
+class _CounterChild:
+    __slots__ = ('_value', '_lock')
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class _GaugeChild:
+    __slots__ = ('_value', '_lock', '_function')
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float) -> None:
+        self._value = float(value)
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self.inc(-amount)
+
+    def set_function(self, function: Optional[Callable[[], float]]) -> None:
+        """Sample the value at scrape time instead (queue sizes, pool usage)"""
+        self._function = function
+
+    @property
+    def value(self) -> float:
+        function = self._function
+        if function is not None:
+            try:
+                return float(function())
+            except Exception:
+                return math.nan
+        return self._value
+
+
+class _Timer:
+    __slots__ = ('_child', '_started')
+
+    def __init__(self, child):
+        self._child = child
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._child.observe(time.perf_counter() - self._started)
+        return False
+
+
+class _HistogramChild:
+    __slots__ = ('_upper', '_counts', '_sum', '_lock')
+
+    def __init__(self, upper: Tuple[float, ...]):
+        self._upper = upper
+        self._counts = [0] * (len(upper) + 1)  # last slot is +Inf
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self._upper, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def time(self) -> _Timer:
+        """with histogram.labels(...).time(): ..."""
+        return _Timer(self)
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        """Cumulative bucket counts, sum and count"""
+        with self._lock:
+            counts, total = list(self._counts), self._sum
+        cumulative, running = [], 0
+        for count in counts:
+            running += count
+            cumulative.append(running)
+        return cumulative, total, running
+
+    @property
+    def count(self) -> int:
+        return sum(self._counts)
+
+    @property
+    def sum(self) -> float:
+        return self._sum
+
+
+# ----------------- Metric families -----------------
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        self._unlabelled = None if self.labelnames else self._child()
+
+    def _child(self):
+        raise NotImplementedError
+
+    def labels(self, *values, **kwargs):
+        """Child for one label combination; children are cached, keep a reference on hot paths"""
+        if kwargs:
+            values = tuple(str(kwargs[name]) for name in self.labelnames)
+        else:
+            values = tuple(str(v) for v in values)
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(values, self._child())
+        return child
+
+    def _only_child(self):
+        if self._unlabelled is None:
+            raise ValueError(f"{self.name} has labels {self.labelnames}; use .labels()")
+        return self._unlabelled
+
+    def items(self):
+        """(label values, child) pairs"""
+        if self._unlabelled is not None:
+            return [((), self._unlabelled)]
+        with self._lock:
+            return sorted(self._children.items())
+
+    def render(self) -> List[str]:
+        documentation = self.documentation.replace('\\', r'\\').replace('\n', r'\n')
+        lines = [f'# HELP {self.name} {documentation}', f'# TYPE {self.name} {self.kind}']
+        for values, child in self.items():
+            lines.extend(self._render_child(values, child))
+        return lines
+
+    def _render_child(self, values, child) -> List[str]:
+        return [f'{self.name}{_label_text(self.labelnames, values)} {_format_value(child.value)}']
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def _child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1) -> None:
+        self._only_child().inc(amount)
+
+    def _render_child(self, values, child) -> List[str]:
+        return [f'{self.name}_total{_label_text(self.labelnames, values)} {_format_value(child.value)}']
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def _child(self):
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self._only_child().set(value)
+
+    def inc(self, amount: float = 1) -> None:
+        self._only_child().inc(amount)
+
+    def dec(self, amount: float = 1) -> None:
+        self._only_child().dec(amount)
+
+    def set_function(self, function: Optional[Callable[[], float]]) -> None:
+        self._only_child().set_function(function)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        upper = tuple(sorted(float(b) for b in buckets if b != math.inf))
+        if not upper:
+            raise ValueError("Histogram needs at least one finite bucket")
+        if 'le' in labelnames:
+            raise ValueError("'le' is reserved for histogram buckets")
+        self.buckets = upper
+        super().__init__(name, documentation, labelnames)
+
+    def _child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._only_child().observe(value)
+
+    def time(self) -> _Timer:
+        return self._only_child().time()
+
+    def _render_child(self, values, child) -> List[str]:
+        cumulative, total, count = child.snapshot()
+        lines = []
+        for bound, running in zip(self.buckets + (math.inf,), cumulative):
+            labels = _label_text(self.labelnames, values, f'le="{_format_value(bound)}"')
+            lines.append(f'{self.name}_bucket{labels} {running}')
+        labels = _label_text(self.labelnames, values)
+        lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+        lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+# ----------------- Registry -----------------
+
+class MetricsRegistry:
+    """Get-or-create metric families and render them in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+        self.processes = 1  # worker processes merged into this registry (collect_multiprocess)
+
+    def _get_or_create(self, cls, name: str, documentation: str, labelnames: Sequence[str], **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif type(metric) is not cls or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} already registered as {metric.kind} {metric.labelnames}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self) -> Dict[str, dict]:
+        """JSON-serializable values of every family (histograms as raw bucket counts)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        families = {}
+        for metric in metrics:
+            family = {'kind': metric.kind, 'documentation': metric.documentation,
+                      'labelnames': list(metric.labelnames), 'samples': []}
+            for values, child in metric.items():
+                if isinstance(metric, Histogram):
+                    with child._lock:
+                        family['samples'].append([list(values), list(child._counts), child._sum])
+                elif not math.isnan(child.value):
+                    family['samples'].append([list(values), child.value])
+            if isinstance(metric, Histogram):
+                family['buckets'] = list(metric.buckets)
+            families[metric.name] = family
+        return families
+
+    def merge(self, snapshot: Dict[str, dict], gauges: bool = True) -> None:
+        """Add another process's snapshot(); gauges=False skips its gauges (worker no longer running)"""
+        for name, family in snapshot.items():
+            kind, labelnames = family['kind'], family['labelnames']
+            try:
+                if kind == 'histogram':
+                    metric = self.histogram(name, family['documentation'], labelnames, buckets=family['buckets'])
+                elif kind == 'counter':
+                    metric = self.counter(name, family['documentation'], labelnames)
+                elif kind == 'gauge' and gauges:
+                    metric = self.gauge(name, family['documentation'], labelnames)
+                else:
+                    continue
+            except ValueError:  # registered differently by another version of the code
+                continue
+            for sample in family['samples']:
+                child = metric.labels(*sample[0]) if labelnames else metric._only_child()
+                if kind == 'histogram':
+                    counts, total = sample[1], sample[2]
+                    if len(counts) != len(child._counts):
+                        continue
+                    with child._lock:
+                        child._counts = [a + b for a, b in zip(child._counts, counts)]
+                        child._sum += total
+                else:
+                    child.inc(sample[1])
+
+    def reset(self) -> None:
+        """Zero counters and histograms in place (cached children stay valid); gauges are left alone"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            for _, child in metric.items():
+                if isinstance(child, _CounterChild):
+                    with child._lock:
+                        child._value = 0.0
+                elif isinstance(child, _HistogramChild):
+                    with child._lock:
+                        child._counts = [0] * len(child._counts)
+                        child._sum = 0.0
+
+
+_default_registry = MetricsRegistry()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Process-wide registry shared by the collectors, DB writers, web services and scheduler"""
+    return _default_registry
+
+
+# ----------------- Pre-forked workers -----------------
+
+_flusher_pid: Optional[int] = None
+
+
+def multiprocess_directory() -> Optional[str]:
+    """Directory shared by the workers of one server, or None in single-process mode"""
+    return os.environ.get(MULTIPROCESS_DIR_ENV) or None
+
+
+def prepare_multiprocess_directory(directory: Optional[str] = None) -> str:
+    """Server master, before forking: empty (or create) the snapshot directory and export it to the workers"""
+    directory = directory or multiprocess_directory() or tempfile.mkdtemp(prefix='assets-metrics-')
+    os.makedirs(directory, exist_ok=True)
+    for path in glob.glob(os.path.join(directory, 'metrics_*.json')):
+        os.remove(path)
+    os.environ[MULTIPROCESS_DIR_ENV] = directory
+    return directory
+
+
+def write_snapshot(directory: Optional[str] = None, registry: Optional[MetricsRegistry] = None) -> Optional[str]:
+    """Atomically write this process's snapshot as metrics_<pid>.json"""
+    directory = directory or multiprocess_directory()
+    if not directory:
+        return None
+    path = os.path.join(directory, f'metrics_{os.getpid()}.json')
+    fd, temp_path = tempfile.mkstemp(prefix='.metrics_', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as handle:
+            json.dump((registry or _default_registry).snapshot(), handle)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return path
+
+
+def enable_multiprocess(directory: Optional[str] = None, interval: float = MULTIPROCESS_FLUSH_INTERVAL,
+                        reset: bool = False) -> bool:
+    """Worker side: write snapshots every interval seconds and at exit (once per process)
+
+    reset=True zeroes values inherited from the master through fork, so they are not counted once per worker.
+    """
+    global _flusher_pid
+    directory = directory or multiprocess_directory()
+    if not directory or _flusher_pid == os.getpid():
+        return False
+    _flusher_pid = os.getpid()
+    if reset:
+        _default_registry.reset()
+
+    def flush_forever():
+        while True:
+            time.sleep(interval)
+            try:
+                write_snapshot(directory)
+            except OSError:
+                pass
+
+    threading.Thread(target=flush_forever, name='MetricsSnapshot', daemon=True).start()
+    atexit.register(lambda: write_snapshot(directory) if _flusher_pid == os.getpid() else None)
+    write_snapshot(directory)
+    return True
+
+
+def _process_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+    return True
+
+
+def collect_multiprocess(directory: Optional[str] = None) -> MetricsRegistry:
+    """Registry holding every worker's snapshot merged (this process's values are current)"""
+    directory = directory or multiprocess_directory()
+    merged = MetricsRegistry()
+    merged.processes = 0
+    if not directory:
+        merged.merge(_default_registry.snapshot())
+        merged.processes = 1
+        return merged
+    write_snapshot(directory)
+    for path in sorted(glob.glob(os.path.join(directory, 'metrics_*.json'))):
+        try:
+            pid = int(os.path.basename(path)[len('metrics_'):-len('.json')])
+            with open(path, encoding='utf-8') as handle:
+                snapshot = json.load(handle)
+        except (OSError, ValueError):
+            continue
+        alive = _process_alive(pid)
+        merged.merge(snapshot, gauges=alive)
+        merged.processes += alive
+    return merged
+
+
+def render_metrics(registry: Optional[MetricsRegistry] = None) -> str:
+    """Exposition for /metrics: merged across workers when the default registry runs multi-process"""
+    registry = registry or _default_registry
+    if registry is _default_registry and multiprocess_directory():
+        return collect_multiprocess().render()
+    return registry.render()
+
+
+# ----------------- Standard metrics -----------------
+
+PROBE_DURATION = _default_registry.histogram(
+    'collector_probe_duration_seconds', 'Latency of network probes and collection attempts',
+    ('protocol', 'outcome'), buckets=PROBE_BUCKETS)
+DB_WRITE_BATCH = _default_registry.histogram(
+    'db_write_batch_size', 'Rows written per database transaction', ('component',), buckets=BATCH_BUCKETS)
+DB_COMMIT_DURATION = _default_registry.histogram(
+    'db_commit_duration_seconds', 'Time to write and commit one batch', ('component',))
+DUPLICATE_DETECTION = _default_registry.histogram(
+    'duplicate_detection_duration_seconds', 'Time spent looking up existing records for a device', ('method',))
+QUEUE_DEPTH = _default_registry.gauge(
+    'collector_queue_depth', 'Items waiting in collector work queues', ('collector', 'queue'))
+HTTP_REQUEST_DURATION = _default_registry.histogram(
+    'http_request_duration_seconds', 'Web request latency until the response object is returned',
+    ('service', 'endpoint', 'method', 'status'))
+
+
+def observe_probe(protocol: str, outcome: str, seconds: float) -> None:
+    PROBE_DURATION.labels(protocol, outcome).observe(seconds)
+
+
+def probe_outcome(result) -> str:
+    """ok for a usable result, fail for None/False/{} or a collector {"Error": ...} dict"""
+    if not result or (isinstance(result, dict) and ('Error' in result or 'error' in result)):
+        return 'fail'
+    return 'ok'
+
+
+def timed_probe(protocol: str, outcome: Callable[[object], str] = probe_outcome):
+    """Decorator: observe every call as a probe of this protocol; exceptions count as 'error'"""
+    def decorate(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = function(*args, **kwargs)
+            except BaseException:
+                observe_probe(protocol, 'error', time.perf_counter() - started)
+                raise
+            observe_probe(protocol, outcome(result), time.perf_counter() - started)
+            return result
+        return wrapper
+    return decorate
+
+
+def observe_db_write(component: str, rows: int, seconds: float) -> None:
+    DB_WRITE_BATCH.labels(component).observe(rows)
+    DB_COMMIT_DURATION.labels(component).observe(seconds)
+
+
+def observe_duplicate_detection(method: str, seconds: float) -> None:
+    DUPLICATE_DETECTION.labels(method).observe(seconds)
+
+
+def time_duplicate_detection(method: str) -> _Timer:
+    """with time_duplicate_detection('smart_validator'): existing = lookup(device)"""
+    return DUPLICATE_DETECTION.labels(method).time()
+
+
+def track_queue(collector: str, queue_name: str, queue) -> None:
+    """Report queue.qsize() at scrape time; holds only a weak reference to the queue"""
+    ref = weakref.ref(queue)
+
+    def depth() -> float:
+        current = ref()
+        return current.qsize() if current is not None else 0
+    QUEUE_DEPTH.labels(collector, queue_name).set_function(depth)
+
+
+# ----------------- Exposition -----------------
+
+def install_flask_metrics(app, service: str = 'web', endpoint: str = '/metrics',
+                          registry: Optional[MetricsRegistry] = None,
+                          decorator: Optional[Callable] = None):
+    """Time every request by URL rule (bounded cardinality) and serve the registry at endpoint"""
+    from flask import Response, request
+
+    registry = registry or _default_registry
+    if 'metrics_registry' in app.extensions:
+        return app
+    app.extensions['metrics_registry'] = registry
+    if registry is _default_registry:
+        enable_multiprocess()  # no-op unless a pre-forking server exported METRICS_MULTIPROC_DIR
+    histogram = registry.histogram(
+        'http_request_duration_seconds', 'Web request latency until the response object is returned',
+        ('service', 'endpoint', 'method', 'status'))
+
+    @app.before_request
+    def _start_request_timer():
+        request.environ['metrics.started'] = time.perf_counter()
+
+    @app.after_request
+    def _observe_request(response):
+        started = request.environ.get('metrics.started')
+        if started is not None:
+            rule = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            histogram.labels(service, rule, request.method, str(response.status_code)).observe(
+                time.perf_counter() - started)
+        return response
+
+    def metrics():
+        return Response(render_metrics(registry), mimetype=None, content_type=CONTENT_TYPE)
+
+    app.add_url_rule(endpoint, 'prometheus_metrics', decorator(metrics) if decorator else metrics)
+    return app
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry = _default_registry
+
+    def do_GET(self):
+        if self.path.split('?', 1)[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: int = 9464, host: str = '0.0.0.0',
+                         registry: Optional[MetricsRegistry] = None) -> ThreadingHTTPServer:
+    """Serve /metrics from a daemon thread (headless scheduler, collectors); call .shutdown() to stop"""
+    handler = type('MetricsHandler', (_MetricsHandler,), {'registry': registry or _default_registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='MetricsServer', daemon=True).start()
+    return server
+
+
+def write_textfile(path: str, registry: Optional[MetricsRegistry] = None) -> None:
+    """Atomically write the exposition for node_exporter's textfile collector"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix='.metrics_', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as handle:
+            handle.write((registry or _default_registry).render())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def benchmark(iterations: int = 200000) -> Dict[str, float]:
+    """Per-call overhead in microseconds of the instrumentation primitives"""
+    registry = MetricsRegistry()
+    histogram = registry.histogram('bench_seconds', 'benchmark', ('protocol', 'outcome'), buckets=PROBE_BUCKETS)
+    counter = registry.counter('bench', 'benchmark', ('protocol',))
+    child = histogram.labels('tcp', 'open')
+
+    def per_call(function) -> float:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            function()
+        return (time.perf_counter() - started) / iterations * 1e6
+
+    baseline = per_call(lambda: None)
+    results = {
+        'histogram_observe': per_call(lambda: child.observe(0.012)) - baseline,
+        'histogram_labels_observe': per_call(lambda: histogram.labels('tcp', 'open').observe(0.012)) - baseline,
+        'counter_labels_inc': per_call(lambda: counter.labels('tcp').inc()) - baseline,
+    }
+    def timed():
+        with child.time():
+            pass
+    results['histogram_time'] = per_call(timed) - baseline
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Metrics registry tools")
+    parser.add_argument('--benchmark', action='store_true', help='measure instrumentation overhead')
+    parser.add_argument('--iterations', type=int, default=200000)
+    args = parser.parse_args()
+
+    if args.benchmark:
+        for name, micros in benchmark(args.iterations).items():
+            print(f"📈 {name}: {micros:.3f} µs/call")
+    else:
+        print(get_metrics_registry().render(), end='')
@@ -16,6 +16,8 @@ import asyncio
 import concurrent.futures
 import socket
 
+from device_rule_engine import classify_by_ports, get_rule_engine
+
 class NMAPDeviceClassifier:
     def __init__(self, db_path="../assets.db"):
         self.db_path = db_path
@@ -92,66 +94,9 @@ class NMAPDeviceClassifier:
             'scan_timestamp': datetime.now().isoformat()
         }
         
-        # Server classifications (highest priority)
-        if self.is_database_server(open_ports):
-            classification.update({
-                'device_type': 'Database Server',
-                'operating_system': self.guess_server_os(open_ports),
-                'confidence': 'High'
-            })
-        elif self.is_web_server(open_ports):
-            classification.update({
-                'device_type': 'Web Server',
-                'operating_system': self.guess_server_os(open_ports),
-                'confidence': 'High'
-            })
-        elif self.is_file_server(open_ports):
-            classification.update({
-                'device_type': 'File Server',
-                'operating_system': self.guess_server_os(open_ports),
-                'confidence': 'High'
-            })
-        
-        # Network infrastructure
-        elif self.is_network_device(open_ports):
-            classification.update({
-                'device_type': 'Network Device',
-                'operating_system': 'Network OS',
-                'confidence': 'Medium'
-            })
-        elif self.is_printer(open_ports):
-            classification.update({
-                'device_type': 'Printer',
-                'operating_system': 'Embedded',
-                'confidence': 'High'
-            })
-        
-        # Workstations and endpoints
-        elif self.is_windows_workstation(open_ports):
-            classification.update({
-                'device_type': 'Windows Workstation',
-                'operating_system': 'Windows',
-                'confidence': 'High'
-            })
-        elif self.is_linux_workstation(open_ports):
-            classification.update({
-                'device_type': 'Linux Workstation',
-                'operating_system': 'Linux',
-                'confidence': 'Medium'
-            })
-        
-        # Generic classifications
-        elif len(open_ports) > 5:
-            classification.update({
-                'device_type': 'Server',
-                'operating_system': self.guess_server_os(open_ports),
-                'confidence': 'Low'
-            })
-        elif len(open_ports) > 0:
-            classification.update({
-                'device_type': 'Workstation',
-                'confidence': 'Low'
-            })
+        # Servers, network infrastructure, workstations, then generic port counts
+        # (first match wins: device_rule_engine.RULESETS['nmap_ports'])
+        classification.update(classify_by_ports(open_ports))
         
         # Add detected services
         classification['services'] = self.detect_services(open_ports)
@@ -203,14 +148,7 @@ class NMAPDeviceClassifier:
     
     def guess_server_os(self, ports):
         """Guess server operating system"""
-        if 3389 in ports or 135 in ports:
-            return 'Windows Server'
-        elif 22 in ports and 3389 not in ports:
-            return 'Linux'
-        elif 161 in ports:  # SNMP might indicate network device
-            return 'Network OS'
-        else:
-            return 'Unknown Server OS'
+        return get_rule_engine().label('nmap_server_os', {'open_ports': list(ports)})
     
     def detect_services(self, ports):
         """Detect services based on common ports"""
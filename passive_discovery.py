@@ -0,0 +1,649 @@
+#!/usr/bin/env python3
+"""
+📡 PASSIVE DISCOVERY
+====================
+Broadcast / multicast discovery for displays, TVs, printers and IoT devices.
+Instead of sweeping every host and running UPnP, web and vendor probes one
+after another, send one query per protocol per segment and listen:
+
+- SSDP M-SEARCH to 239.255.255.250:1900 (LOCATION, USN, SERVER, ST)
+- one mDNS query (legacy unicast, several PTR questions) to 224.0.0.251:5353
+  (service types, instance names, TXT model / friendly name, SRV, A records)
+- NetBIOS name query for '*' to each segment's broadcast address, followed by
+  a node-status query only to the hosts that answered (names, workgroup, MAC)
+
+Responses are correlated to IPs and only hosts that answered get targeted
+enrichment (UPnP description XML from their LOCATION, vendor checks).
+SSDP and mDNS are link-local, so they cover the segment of the interface they
+are sent from; NetBIOS goes to the directed broadcast of every given network.
+
+    python passive_discovery.py 192.168.1.0/24 --listen 3
+"""
+
+import argparse
+import ipaddress
+import json
+import logging
+import random
+import selectors
+import socket
+import struct
+import time
+import urllib.parse
+import urllib.request
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+SSDP_GROUP = ('239.255.255.250', 1900)
+MDNS_GROUP = ('224.0.0.251', 5353)
+NETBIOS_PORT = 137
+PROTOCOLS = ('ssdp', 'mdns', 'netbios')
+
+# Asked in a single mDNS query; the meta-query makes responders list everything else they offer
+DEFAULT_MDNS_SERVICES = (
+    '_services._dns-sd._udp.local',
+    '_googlecast._tcp.local',
+    '_airplay._tcp.local',
+    '_ipp._tcp.local',
+    '_printer._tcp.local',
+    '_http._tcp.local',
+    '_device-info._tcp.local',
+    '_workstation._tcp.local',
+    '_hap._tcp.local',
+)
+
+DNS_A, DNS_PTR, DNS_TXT, DNS_AAAA, DNS_SRV = 1, 12, 16, 28, 33
+NB_NAME, NB_STATUS = 0x20, 0x21
+
+UPNP_DESCRIPTION_FIELDS = ('friendlyName', 'manufacturer', 'modelName', 'modelNumber', 'modelDescription',
+                           'serialNumber', 'deviceType', 'presentationURL', 'UDN')
+
+# First match wins, so the specific TV brands come before platform markers such as AirPlay / Cast
+VENDOR_MARKERS = (
+    ('webos', 'LG'), ('lg electronics', 'LG'), ('tizen', 'Samsung'), ('samsung', 'Samsung'),
+    ('bravia', 'Sony'), ('sony', 'Sony'), ('philips', 'Philips'), ('roku', 'Roku'), ('hisense', 'Hisense'),
+    ('tcl', 'TCL'), ('brother', 'Brother'), ('hewlett', 'HP'), ('laserjet', 'HP'), ('canon', 'Canon'),
+    ('epson', 'Epson'),
+    ('chromecast', 'Google'), ('_googlecast', 'Google'), ('apple', 'Apple'), ('_airplay', 'Apple'),
+)
+PRINTER_MARKERS = ('_ipp._tcp', '_ipps._tcp', '_printer._tcp', '_pdl-datastream._tcp', 'device:printer')
+DISPLAY_MARKERS = ('_googlecast._tcp', '_airplay._tcp', 'mediarenderer', 'dial-multiscreen', 'remotecontrolreceiver',
+                   'webos', 'tizen', 'smarttv', 'smart tv', 'bravia', 'roku', 'chromecast', 'signage')
+
+
+# ----------------- SSDP -----------------
+
+def build_msearch(search_target: str = 'ssdp:all', mx: int = 2) -> bytes:
+    return ('M-SEARCH * HTTP/1.1\r\n'
+            f'HOST: {SSDP_GROUP[0]}:{SSDP_GROUP[1]}\r\n'
+            'MAN: "ssdp:discover"\r\n'
+            f'MX: {mx}\r\n'
+            f'ST: {search_target}\r\n'
+            '\r\n').encode('ascii')
+
+
+def parse_ssdp(data: bytes) -> Optional[Dict[str, str]]:
+    """Headers of an M-SEARCH response or NOTIFY (lower-case keys), None for anything else"""
+    text = data.decode('utf-8', 'replace')
+    lines = text.split('\r\n') if '\r\n' in text else text.split('\n')
+    start = lines[0].upper()
+    if not (start.startswith('HTTP/1.1 200') or start.startswith('NOTIFY ')):
+        return None
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            key, value = line.split(':', 1)
+            headers[key.strip().lower()] = value.strip()
+    return headers
+
+
+# ----------------- mDNS / DNS -----------------
+
+def _encode_name(name: str) -> bytes:
+    encoded = b''
+    for label in name.rstrip('.').split('.'):
+        raw = label.encode('utf-8')
+        if not 0 < len(raw) < 64:
+            raise ValueError(f"Invalid DNS label in {name!r}")
+        encoded += bytes([len(raw)]) + raw
+    return encoded + b'\0'
+
+
+def build_mdns_query(services: Sequence[str] = DEFAULT_MDNS_SERVICES, query_id: int = 0) -> bytes:
+    """
+    One query with a PTR question per service. Sent from an ephemeral port it is
+    a legacy unicast query (RFC 6762 6.7): responders answer our socket directly.
+    """
+    message = struct.pack('!6H', query_id, 0, len(services), 0, 0, 0)
+    for service in services:
+        message += _encode_name(service) + struct.pack('!HH', DNS_PTR, 0x8001)  # IN, unicast response
+    return message
+
+
+def _read_name(data: bytes, offset: int) -> Tuple[str, int]:
+    """Name at offset with compression pointers followed; returns (name, offset after it)"""
+    labels, end, hops = [], None, 0
+    while True:
+        if offset >= len(data):
+            raise ValueError('truncated name')
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            if offset + 1 >= len(data):
+                raise ValueError('truncated pointer')
+            if end is None:
+                end = offset + 2
+            hops += 1
+            if hops > 32:
+                raise ValueError('compression loop')
+            offset = ((length & 0x3F) << 8) | data[offset + 1]
+            continue
+        if length & 0xC0:
+            raise ValueError('unsupported label type')
+        offset += 1
+        if length == 0:
+            break
+        if offset + length > len(data):
+            raise ValueError('truncated label')
+        labels.append(data[offset:offset + length].decode('utf-8', 'replace'))
+        offset += length
+    return '.'.join(labels), (end if end is not None else offset)
+
+
+def _decode_rdata(data: bytes, rtype: int, offset: int, length: int):
+    rdata = data[offset:offset + length]
+    if rtype == DNS_A and length == 4:
+        return socket.inet_ntoa(rdata)
+    if rtype == DNS_AAAA and length == 16:
+        return socket.inet_ntop(socket.AF_INET6, rdata)
+    if rtype == DNS_PTR:
+        return _read_name(data, offset)[0]
+    if rtype == DNS_SRV and length >= 7:
+        priority, weight, port = struct.unpack('!HHH', rdata[:6])
+        return {'priority': priority, 'weight': weight, 'port': port, 'target': _read_name(data, offset + 6)[0]}
+    if rtype == DNS_TXT:
+        entries, position = {}, 0
+        while position < length:
+            size = rdata[position]
+            entry = rdata[position + 1:position + 1 + size].decode('utf-8', 'replace')
+            position += 1 + size
+            if entry:
+                key, _, value = entry.partition('=')
+                entries[key.lower()] = value
+        return entries
+    return rdata
+
+
+def parse_dns_message(data: bytes) -> Dict:
+    """DNS / mDNS message -> {'id', 'response', 'records': [(name, type, value)]}; ValueError if malformed"""
+    if len(data) < 12:
+        raise ValueError('short DNS message')
+    message_id, flags, questions, answers, authority, additional = struct.unpack('!6H', data[:12])
+    offset = 12
+    for _ in range(questions):
+        _, offset = _read_name(data, offset)
+        offset += 4
+    records = []
+    for _ in range(answers + authority + additional):
+        name, offset = _read_name(data, offset)
+        if offset + 10 > len(data):
+            raise ValueError('truncated record')
+        rtype, _, _, length = struct.unpack('!HHIH', data[offset:offset + 10])
+        offset += 10
+        if offset + length > len(data):
+            raise ValueError('truncated rdata')
+        records.append((name, rtype, _decode_rdata(data, rtype, offset, length)))
+        offset += length
+    return {'id': message_id, 'response': bool(flags & 0x8000), 'records': records}
+
+
+# ----------------- NetBIOS -----------------
+
+def encode_netbios_name(name: str = '*', suffix: int = 0x00) -> bytes:
+    if name == '*':
+        raw = b'*' + b'\0' * 15
+    else:
+        raw = name.upper().encode('ascii', 'replace')[:15].ljust(15, b' ') + bytes([suffix])
+    return bytes([32]) + bytes(c for b in raw for c in (0x41 + (b >> 4), 0x41 + (b & 0x0F))) + b'\0'
+
+
+def build_netbios_query(transaction_id: int, status: bool = False) -> bytes:
+    """Broadcast name query for '*' (status=False) or a unicast node-status (NBSTAT) query"""
+    flags = 0x0000 if status else 0x0110  # recursion desired + broadcast
+    return (struct.pack('!6H', transaction_id, flags, 1, 0, 0, 0) + encode_netbios_name('*')
+            + struct.pack('!HH', NB_STATUS if status else NB_NAME, 1))
+
+
+def parse_netbios(data: bytes) -> Optional[Dict]:
+    """
+    Positive name-query or node-status response -> {'id', 'addresses', 'names', 'mac'};
+    names are (name, suffix, is_group). None for requests and negative responses.
+    """
+    if len(data) < 12:
+        raise ValueError('short NetBIOS message')
+    transaction_id, flags, questions, answers = struct.unpack('!4H', data[:8])
+    if not flags & 0x8000 or flags & 0x000F:
+        return None
+    offset = 12
+    for _ in range(questions):
+        _, offset = _read_name(data, offset)
+        offset += 4
+    reply = {'id': transaction_id, 'addresses': [], 'names': [], 'mac': None}
+    for _ in range(answers):
+        _, offset = _read_name(data, offset)
+        if offset + 10 > len(data):
+            raise ValueError('truncated record')
+        rtype, _, _, length = struct.unpack('!HHIH', data[offset:offset + 10])
+        offset += 10
+        rdata = data[offset:offset + length]
+        if len(rdata) < length:
+            raise ValueError('truncated rdata')
+        offset += length
+        if rtype == NB_NAME:
+            for position in range(0, length - 5, 6):
+                reply['addresses'].append(socket.inet_ntoa(rdata[position + 2:position + 6]))
+        elif rtype == NB_STATUS and rdata:
+            count, position = rdata[0], 1
+            for _ in range(count):
+                entry = rdata[position:position + 18]
+                if len(entry) < 18:
+                    raise ValueError('truncated name table')
+                name = entry[:15].decode('ascii', 'replace').rstrip(' \0')
+                reply['names'].append((name, entry[15], bool(struct.unpack('!H', entry[16:18])[0] & 0x8000)))
+                position += 18
+            mac = rdata[position:position + 6]
+            if len(mac) == 6 and any(mac):
+                reply['mac'] = ':'.join(f'{b:02x}' for b in mac)
+    return reply
+
+
+# ----------------- Correlation -----------------
+
+@dataclass
+class DiscoveredHost:
+    ip: str
+    first_seen_ms: float = 0.0
+    protocols: Set[str] = field(default_factory=set)
+    hostname: Optional[str] = None
+    names: Set[str] = field(default_factory=set)
+    services: Set[str] = field(default_factory=set)
+    ports: Set[int] = field(default_factory=set)
+    locations: Set[str] = field(default_factory=set)
+    usns: Set[str] = field(default_factory=set)
+    server: Optional[str] = None
+    txt: Dict[str, str] = field(default_factory=dict)
+    netbios_names: List[Tuple[str, int, bool]] = field(default_factory=list)
+    workgroup: Optional[str] = None
+    mac_address: Optional[str] = None
+    description: Dict[str, str] = field(default_factory=dict)
+
+    def _haystack(self) -> str:
+        parts = [self.server or '', *self.services, *self.names, *self.txt.values(), *self.description.values()]
+        return ' '.join(parts).lower()
+
+    @property
+    def vendor(self) -> Optional[str]:
+        if self.description.get('manufacturer'):
+            manufacturer = self.description['manufacturer'].lower()
+            for marker, vendor in VENDOR_MARKERS:
+                if marker in manufacturer:
+                    return vendor
+            return self.description['manufacturer']
+        haystack = self._haystack()
+        for marker, vendor in VENDOR_MARKERS:
+            if marker in haystack:
+                return vendor
+        return None
+
+    @property
+    def model(self) -> Optional[str]:
+        return (self.description.get('modelName') or self.txt.get('md') or self.txt.get('model')
+                or self.txt.get('ty') or None)
+
+    @property
+    def device_class(self) -> str:
+        haystack = self._haystack()
+        if any(marker in haystack for marker in PRINTER_MARKERS):
+            return 'printer'
+        if any(marker in haystack for marker in DISPLAY_MARKERS):
+            return 'display'
+        if self.netbios_names or '_workstation._tcp' in haystack:
+            return 'workstation'
+        return 'iot'
+
+    def upnp_location(self) -> Optional[str]:
+        """First LOCATION served by the responder itself (never follow a URL pointing elsewhere)"""
+        for location in sorted(self.locations):
+            parsed = urllib.parse.urlparse(location)
+            if parsed.scheme in ('http', 'https') and parsed.hostname == self.ip:
+                return location
+        return None
+
+    def to_asset(self) -> Dict[str, str]:
+        asset = {
+            'ip_address': self.ip,
+            'hostname': self.hostname or self.ip,
+            'device_type': self.device_class,
+            'collection_method': 'passive_discovery',
+            'discovery_protocols': ','.join(sorted(self.protocols)),
+        }
+        optional = {
+            'mac_address': self.mac_address,
+            'model_vendor': self.vendor,
+            'model': self.model,
+            'serial_number': self.description.get('serialNumber'),
+            'firmware_os_version': self.server,
+            'friendly_name': self.description.get('friendlyName') or self.txt.get('fn'),
+            'workgroup': self.workgroup,
+        }
+        asset.update({key: value for key, value in optional.items() if value})
+        return asset
+
+
+def broadcast_addresses(networks: Iterable[ipaddress.IPv4Network]) -> List[str]:
+    addresses = []
+    for network in networks:
+        address = str(network.broadcast_address if network.prefixlen < 31 else network.network_address)
+        if address not in addresses:
+            addresses.append(address)
+    return addresses or ['255.255.255.255']
+
+
+def _as_networks(networks) -> List[ipaddress.IPv4Network]:
+    if not networks:
+        return []
+    if isinstance(networks, str):
+        networks = [networks]
+    return [ipaddress.ip_network(str(n), strict=False) for n in networks]
+
+
+def fetch_upnp_description(location: str, timeout: float = 2.0, max_bytes: int = 256 * 1024) -> Dict[str, str]:
+    """Root device fields from a UPnP description document (friendlyName, manufacturer, modelName, ...)"""
+    opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))  # LAN devices, never via a proxy
+    with opener.open(location, timeout=timeout) as response:
+        body = response.read(max_bytes + 1)
+    if len(body) > max_bytes:
+        raise ValueError(f"UPnP description larger than {max_bytes} bytes")
+    root = ET.fromstring(body)
+    device = next((e for e in root.iter() if e.tag.rsplit('}', 1)[-1] == 'device'), None)
+    if device is None:
+        return {}
+    fields = {}
+    for child in device:
+        tag = child.tag.rsplit('}', 1)[-1]
+        if tag in UPNP_DESCRIPTION_FIELDS and child.text and child.text.strip():
+            fields[tag] = child.text.strip()
+    return fields
+
+
+class PassiveDiscovery:
+    """One query per protocol, a short listen window, responses correlated per IP"""
+
+    def __init__(self, listen_time: float = 3.0, interface: Optional[str] = None,
+                 ssdp_target: Tuple[str, int] = SSDP_GROUP, mdns_target: Tuple[str, int] = MDNS_GROUP,
+                 netbios_port: int = NETBIOS_PORT, netbios_targets: Optional[List[str]] = None,
+                 mdns_services: Sequence[str] = DEFAULT_MDNS_SERVICES, multicast_ttl: int = 2):
+        self.listen_time = listen_time
+        self.interface = interface
+        self.ssdp_target = ssdp_target
+        self.mdns_target = mdns_target
+        self.netbios_port = netbios_port
+        self.netbios_targets = netbios_targets
+        self.mdns_services = tuple(mdns_services)
+        self.multicast_ttl = multicast_ttl
+        self.stats = {'queries_sent': 0, 'responses': 0, 'malformed': 0, 'ignored': 0}
+        self.errors: Dict[str, str] = {}
+        self._netbios_id = random.randint(1, 0xFFFF)
+
+    # ---- sending ----
+
+    def _open_socket(self, protocol: str) -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, self.multicast_ttl)
+        if protocol == 'netbios':
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        if self.interface:
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(self.interface))
+        sock.bind((self.interface or '', 0))
+        return sock
+
+    def _queries(self, protocol: str, networks) -> List[Tuple[Tuple[str, int], bytes]]:
+        if protocol == 'ssdp':
+            return [(self.ssdp_target, build_msearch(mx=max(1, int(self.listen_time))))]
+        if protocol == 'mdns':
+            return [(self.mdns_target, build_mdns_query(self.mdns_services, random.randint(1, 0xFFFF)))]
+        if protocol == 'netbios':
+            targets = self.netbios_targets or broadcast_addresses(networks)
+            return [((address, self.netbios_port), build_netbios_query(self._netbios_id)) for address in targets]
+        raise ValueError(f"Unknown discovery protocol: {protocol}")
+
+    def discover(self, networks=None, protocols: Sequence[str] = PROTOCOLS) -> Dict[str, DiscoveredHost]:
+        """
+        Send the queries, listen for listen_time and return {ip: DiscoveredHost}.
+        networks (CIDR or list) picks the NetBIOS broadcast addresses and drops
+        responders outside them.
+        """
+        networks = _as_networks(networks)
+        hosts: Dict[str, DiscoveredHost] = {}
+        sockets: Dict[str, socket.socket] = {}
+        self._started = time.monotonic()
+        self._status_sent: Set[str] = set()
+        try:
+            for protocol in protocols:
+                sock = self._open_socket(protocol)
+                sent = 0
+                for target, payload in self._queries(protocol, networks):
+                    try:
+                        sock.sendto(payload, target)
+                        sent += 1
+                    except OSError as e:
+                        self.errors[protocol] = f"{target[0]}: {e}"
+                        logger.debug(f"{protocol} query to {target} failed: {e}")
+                self.stats['queries_sent'] += sent
+                if sent:
+                    sockets[protocol] = sock
+                else:
+                    sock.close()
+            if sockets:
+                self._listen(sockets, hosts, networks)
+        finally:
+            for sock in sockets.values():
+                sock.close()
+        logger.info(f"📡 Passive discovery: {len(hosts)} responders "
+                    f"({self.stats['responses']} responses, {self.stats['queries_sent']} queries)")
+        return hosts
+
+    # ---- listening ----
+
+    def _listen(self, sockets: Dict[str, socket.socket], hosts: Dict[str, DiscoveredHost], networks) -> None:
+        deadline = self._started + self.listen_time
+        with selectors.DefaultSelector() as selector:
+            for protocol, sock in sockets.items():
+                sock.setblocking(False)
+                selector.register(sock, selectors.EVENT_READ, protocol)
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                for key, _ in selector.select(remaining):
+                    while True:
+                        try:
+                            data, addr = key.fileobj.recvfrom(65535)
+                        except (BlockingIOError, InterruptedError):
+                            break
+                        except OSError as e:  # ICMP unreachable from a directed query
+                            logger.debug(f"{key.data} receive error: {e}")
+                            break
+                        self._handle(key.data, key.fileobj, data, addr[0], hosts, networks)
+
+    def _host(self, hosts: Dict[str, DiscoveredHost], ip: str, protocol: str,
+              networks) -> Optional[DiscoveredHost]:
+        if networks and not any(ipaddress.ip_address(ip) in network for network in networks):
+            self.stats['ignored'] += 1
+            return None
+        host = hosts.get(ip)
+        if host is None:
+            host = hosts[ip] = DiscoveredHost(ip, first_seen_ms=round((time.monotonic() - self._started) * 1000, 1))
+        host.protocols.add(protocol)
+        return host
+
+    def _handle(self, protocol: str, sock: socket.socket, data: bytes, source: str,
+                hosts: Dict[str, DiscoveredHost], networks) -> None:
+        self.stats['responses'] += 1
+        try:
+            if protocol == 'ssdp':
+                self._handle_ssdp(data, source, hosts, networks)
+            elif protocol == 'mdns':
+                self._handle_mdns(data, source, hosts, networks)
+            else:
+                self._handle_netbios(sock, data, source, hosts, networks)
+        except (ValueError, IndexError, struct.error, OSError) as e:
+            self.stats['malformed'] += 1
+            logger.debug(f"Ignoring malformed {protocol} packet from {source}: {e}")
+
+    def _handle_ssdp(self, data: bytes, source: str, hosts, networks) -> None:
+        headers = parse_ssdp(data)
+        if headers is None:
+            raise ValueError('not an SSDP response')
+        host = self._host(hosts, source, 'ssdp', networks)
+        if host is None:
+            return
+        if headers.get('server'):
+            host.server = headers['server']
+        for key in ('st', 'nt'):
+            if headers.get(key) and headers[key] != 'ssdp:all':
+                host.services.add(headers[key])
+        if headers.get('usn'):
+            host.usns.add(headers['usn'])
+        if headers.get('location'):
+            host.locations.add(headers['location'])
+            port = urllib.parse.urlparse(headers['location']).port
+            if port:
+                host.ports.add(port)
+
+    def _handle_mdns(self, data: bytes, source: str, hosts, networks) -> None:
+        message = parse_dns_message(data)
+        if not message['response']:
+            return  # another querier's question
+        addresses, service_types, instances, srv, txt = {}, set(), {}, {}, {}
+        for name, rtype, value in message['records']:
+            key = name.lower()
+            if rtype == DNS_A:
+                addresses[key] = value
+            elif rtype == DNS_PTR:
+                if key == '_services._dns-sd._udp.local':
+                    service_types.add(value)
+                else:
+                    service_types.add(name)
+                    instances[value.lower()] = (value, name)
+            elif rtype == DNS_SRV:
+                srv[key] = value
+            elif rtype == DNS_TXT:
+                txt[key] = value
+
+        def owner(instance_key: str) -> str:
+            target = srv.get(instance_key, {}).get('target', '').lower()
+            return addresses.get(target, source)
+
+        host = self._host(hosts, source, 'mdns', networks)
+        if host is not None:
+            host.services.update(service_types)
+        for instance_key, (instance, service) in instances.items():
+            target = self._host(hosts, owner(instance_key), 'mdns', networks)
+            if target is None:
+                continue
+            target.services.add(service)
+            if instance.lower().endswith('.' + service.lower()):
+                target.names.add(instance[:-len(service) - 1])
+            if instance_key in srv:
+                target.ports.add(srv[instance_key]['port'])
+                if srv[instance_key]['target'] and not target.hostname:
+                    target.hostname = srv[instance_key]['target'].rstrip('.').removesuffix('.local')
+            target.txt.update(txt.get(instance_key, {}))
+        for name, address in addresses.items():
+            target = hosts.get(address)
+            if target is not None and not target.hostname:
+                target.hostname = name.rstrip('.').removesuffix('.local')
+
+    def _handle_netbios(self, sock: socket.socket, data: bytes, source: str, hosts, networks) -> None:
+        reply = parse_netbios(data)
+        if reply is None:
+            return
+        host = self._host(hosts, source, 'netbios', networks)
+        if host is None:
+            return
+        if reply['names']:
+            host.netbios_names = reply['names']
+            for name, suffix, group in reply['names']:
+                if suffix == 0x00 and group and not host.workgroup:
+                    host.workgroup = name
+                elif suffix == 0x00 and not group and not host.hostname:
+                    host.hostname = name
+                if not group:
+                    host.names.add(name)
+            host.mac_address = reply['mac'] or host.mac_address
+        elif source not in self._status_sent:
+            # Targeted follow-up: only hosts that answered the broadcast get a node-status query
+            self._status_sent.add(source)
+            sock.sendto(build_netbios_query(self._netbios_id, status=True), (source, self.netbios_port))
+            self.stats['queries_sent'] += 1
+
+    # ---- enrichment ----
+
+    def enrich(self, hosts: Dict[str, DiscoveredHost], timeout: float = 2.0, max_workers: int = 8) -> None:
+        """Fetch the UPnP description of every SSDP responder (one GET per responder, in parallel)"""
+        pending = [(host, host.upnp_location()) for host in hosts.values()]
+        pending = [(host, location) for host, location in pending if location]
+        if not pending:
+            return
+
+        def fetch(item):
+            host, location = item
+            try:
+                host.description = fetch_upnp_description(location, timeout=timeout)
+                if host.description.get('friendlyName'):
+                    host.names.add(host.description['friendlyName'])
+            except Exception as e:
+                logger.debug(f"UPnP description fetch failed for {location}: {e}")
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as executor:
+            list(executor.map(fetch, pending))
+
+
+def discover(networks=None, listen_time: float = 3.0, enrich: bool = True, **options) -> Dict[str, DiscoveredHost]:
+    discovery = PassiveDiscovery(listen_time=listen_time, **options)
+    hosts = discovery.discover(networks)
+    if enrich:
+        discovery.enrich(hosts)
+    return hosts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Passive SSDP / mDNS / NetBIOS discovery")
+    parser.add_argument('networks', nargs='*', help="Segments (CIDR) for NetBIOS broadcasts and filtering")
+    parser.add_argument('--listen', type=float, default=3.0, help="Listen window in seconds")
+    parser.add_argument('--interface', help="Local IPv4 address to send multicast queries from")
+    parser.add_argument('--protocols', default=','.join(PROTOCOLS))
+    parser.add_argument('--no-enrich', action='store_true', help="Skip UPnP description fetches")
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    discovery = PassiveDiscovery(listen_time=args.listen, interface=args.interface)
+    found = discovery.discover(args.networks, protocols=[p.strip() for p in args.protocols.split(',') if p.strip()])
+    if not args.no_enrich:
+        discovery.enrich(found)
+    assets = [found[ip].to_asset() for ip in sorted(found, key=ipaddress.ip_address)]
+    if args.json:
+        print(json.dumps(assets, indent=2))
+    else:
+        print(f"📡 {len(assets)} responders")
+        for asset in assets:
+            label = ' '.join(filter(None, [asset.get('model_vendor'), asset.get('model'), asset.get('friendly_name')]))
+            print(f"   {asset['ip_address']:<15} {asset['device_type']:<12} {asset['discovery_protocols']:<18} "
+                  f"{asset['hostname']}  {label}")
+        for protocol, error in discovery.errors.items():
+            print(f"⚠️ {protocol}: {error}")
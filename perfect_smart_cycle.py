@@ -5,7 +5,7 @@ PERFECT SMART CYCLE SYSTEM
 This is exactly what you requested:
 ✅ ADD new devices when discovered
 ✅ UPDATE existing devices with new data (NEVER delete original data)
-✅ DELETE only true duplicates (same serial number)
+✅ DELETE only true duplicates (same UUID / serial number / MAC)
 ✅ 100% powerful duplicate detection
 
 The cycle works perfectly:
@@ -13,7 +13,7 @@ The cycle works perfectly:
 2. For each device found:
    - If NEW device → ADD to database
    - If EXISTING device → UPDATE with new data (smart merge)
-3. Remove ONLY true duplicates (same serial numbers)
+3. Remove ONLY true duplicates (same UUID / serial numbers / MAC)
 4. NEVER lose any data - only improve it
 """
 
@@ -26,6 +26,8 @@ import threading
 import hashlib
 from datetime import datetime
 
+from duplicate_consolidation import consolidate_duplicates
+
 class PerfectSmartCycle:
     def __init__(self, db_path="assets.db"):
         self.db_path = db_path
@@ -50,7 +52,7 @@ class PerfectSmartCycle:
         print("🎯 CYCLE PROCESS:")
         print("   ✅ ADD new devices when discovered") 
         print("   ✅ UPDATE existing devices with new data (NEVER delete)")
-        print("   ✅ DELETE only true duplicates (same serial number)")
+        print("   ✅ DELETE only true duplicates (same UUID / serial number / MAC)")
         print("   ✅ 100% powerful duplicate detection")
         print()
         
@@ -279,7 +281,7 @@ class PerfectSmartCycle:
         if len(updates) > 3:  # More than just timestamps
             set_clauses = [f"{k} = ?" for k in updates.keys()]
             values = list(updates.values()) + [device_id]
-            query = f"UPDATE assets SET {\', \'.join(update_fields)} WHERE id = ?"  # NOTE: Safe - fields from schema
+            query = f"UPDATE assets SET {', '.join(set_clauses)} WHERE id = ?"  # NOTE: Safe - fields from schema
             cursor.execute(query, values)
             print(f"      ✅ Updated {len(updates)} fields")
         else:
@@ -315,106 +317,27 @@ class PerfectSmartCycle:
             print(f"      ✅ Added as ID: {new_id}")
 
     def remove_duplicates_only(self):
-        """Remove ONLY true duplicates - devices with same serial number"""
+        """Remove ONLY true duplicates - devices with the same UUID, serial number or MAC"""
         
-        print("🔍 Scanning for TRUE DUPLICATES (same serial number)...")
+        print("🔍 Scanning for TRUE DUPLICATES (same UUID / serial number / MAC)...")
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        # Set-based: rank each group, merge the losers' data into the best device, then delete them
+        report = consolidate_duplicates(self.db_path)
         
-        # Find devices with same serial numbers using existing columns
-        all_duplicates = []
-        
-        # Check main serial_number field
-        cursor.execute("""
-            SELECT serial_number, COUNT(*) as count, GROUP_CONCAT(id) as ids
-            FROM assets 
-            WHERE serial_number IS NOT NULL 
-            AND serial_number != '' 
-            AND LENGTH(TRIM(serial_number)) > 3
-            GROUP BY TRIM(LOWER(serial_number))
-            HAVING count > 1
-            ORDER BY count DESC
-        """)
-        
-        serial_duplicates = cursor.fetchall()
-        all_duplicates.extend(serial_duplicates)
-        
-        # Check bios_serial_number field
-        cursor.execute("""
-            SELECT bios_serial_number, COUNT(*) as count, GROUP_CONCAT(id) as ids
-            FROM assets 
-            WHERE bios_serial_number IS NOT NULL 
-            AND bios_serial_number != '' 
-            AND LENGTH(TRIM(bios_serial_number)) > 3
-            GROUP BY TRIM(LOWER(bios_serial_number))
-            HAVING count > 1
-            ORDER BY count DESC
-        """)
-        
-        bios_serial_duplicates = cursor.fetchall()
-        all_duplicates.extend(bios_serial_duplicates)
-        
-        # Check motherboard_serial field
-        cursor.execute("""
-            SELECT motherboard_serial, COUNT(*) as count, GROUP_CONCAT(id) as ids
-            FROM assets 
-            WHERE motherboard_serial IS NOT NULL 
-            AND motherboard_serial != '' 
-            AND LENGTH(TRIM(motherboard_serial)) > 3
-            GROUP BY TRIM(LOWER(motherboard_serial))
-            HAVING count > 1
-            ORDER BY count DESC
-        """)
-        
-        mb_serial_duplicates = cursor.fetchall()
-        all_duplicates.extend(mb_serial_duplicates)
-        
-        if all_duplicates:
-            print(f"⚠️ Found {len(all_duplicates)} groups of duplicate serial numbers")
+        if report['duplicates']:
+            print(f"⚠️ Found {report['groups']} groups of duplicate devices")
+            for group in report['sample']:
+                print(f"\n   📋 {group['identity']}")
+                print(f"      👑 KEEPING: ID {group['keep']}")
+                print(f"      🗑️ REMOVING: IDs {', '.join(map(str, group['remove']))}")
             
-            devices_to_remove = []
+            self.stats['duplicates_found'] = report['groups']
+            self.stats['duplicates_removed'] = report['removed']
             
-            for serial, count, ids in all_duplicates:
-                id_list = [int(x) for x in ids.split(',')]
-                print(f"\n   📋 Serial '{serial}' has {count} duplicates (IDs: {ids})")
-                
-                # Get device details to decide which to keep
-                device_details = []
-                for device_id in id_list:
-                    cursor.execute("SELECT * FROM assets WHERE id = ?", (device_id,))
-                    device = cursor.fetchone()
-                    if device:
-                        # Calculate completeness score
-                        score = sum(1 for field in device if field is not None and str(field).strip())
-                        device_details.append((device_id, device, score))
-                
-                # Sort by score (keep highest scoring device)
-                device_details.sort(key=lambda x: x[2], reverse=True)
-                
-                # Keep the first (best) device, remove others
-                keep_device = device_details[0]
-                print(f"      👑 KEEPING: ID {keep_device[0]} (score: {keep_device[2]})")
-                
-                for device_id, device, score in device_details[1:]:
-                    devices_to_remove.append(device_id)
-                    print(f"      🗑️ REMOVING: ID {device_id} (score: {score})")
-            
-            # Remove duplicate devices
-            if devices_to_remove:
-                placeholders = ','.join(['?'] * len(devices_to_remove))
-                cursor.execute(f"DELETE FROM assets WHERE id IN ({placeholders})", devices_to_remove)
-                
-                self.stats['duplicates_found'] = len(all_duplicates)
-                self.stats['duplicates_removed'] = len(devices_to_remove)
-                
-                print(f"\n🗑️ REMOVED {len(devices_to_remove)} duplicate devices")
-                print("✅ KEPT the best device from each duplicate group")
+            print(f"\n🗑️ REMOVED {report['removed']} duplicate devices")
+            print(f"✅ KEPT the best device from each duplicate group ({report['fields_filled']} fields merged in)")
         else:
-            print("✅ No duplicate serial numbers found - database is clean!")
-        
-        conn.commit()
-        conn.close()
+            print("✅ No duplicate devices found - database is clean!")
 
     def show_results(self):
         """Show final results"""
@@ -1,16 +1,20 @@
 #!/usr/bin/env python3
 """
 Process-Level Collection Fix
-Runs collection in completely separate process to guarantee UI responsiveness
+Runs collection in completely separate processes to guarantee UI responsiveness.
+Targets are sharded across worker processes (ShardedCollectionExecutor); results
+stream back to a single database writer running in this process.
 """
 
 import multiprocessing
 import queue
-import time
+import threading
 import sys
 from PyQt6.QtCore import QTimer, pyqtSignal, QObject
 from PyQt6.QtWidgets import QApplication
 
+from sharded_collection_executor import AssetBatchWriter, ShardedCollectionExecutor
+
 # Fix for Windows multiprocessing
 if __name__ == '__main__' or sys.platform.startswith('win'):
     multiprocessing.freeze_support()
@@ -23,82 +27,71 @@ class ProcessBasedCollector(QObject):
     log_message = pyqtSignal(str)
     collection_finished = pyqtSignal(bool)
     
-    def __init__(self, main_window):
+    def __init__(self, main_window, workers=None, db_path='assets.db'):
         super().__init__()
         self.main_window = main_window
-        self.process = None
+        self.workers = workers or multiprocessing.cpu_count()
+        self.db_path = db_path
+        self.executor = None
+        self.process = None  # parent-side coordinator thread (workers are processes)
         self.result_queue = None
         self.monitor_timer = QTimer()
         self.monitor_timer.timeout.connect(self.check_process_status)
         
     def start_process_collection(self, targets, **kwargs):
-        """Start collection in separate process"""
+        """Start sharded collection in worker processes"""
         try:
             self.log_message.emit("🚀 Starting PROCESS-BASED collection - UI guaranteed responsive")
             
-            # Create result queue for communication
-            self.result_queue = multiprocessing.Queue()
+            # Queue for communication with the coordinator thread
+            self.result_queue = queue.Queue()
             
-            # Start collection process
-            self.process = multiprocessing.Process(
+            options = {
+                'win_creds': kwargs.get('win_creds', []),
+                'linux_creds': kwargs.get('linux_creds', []),
+                'snmp_v2c': kwargs.get('snmp_v2c', []),
+                'snmp_v3': kwargs.get('snmp_v3', {}),
+                'use_http': kwargs.get('use_http', True),
+                'db_path': self.db_path,  # shared credential-affinity cache
+            }
+            self.executor = ShardedCollectionExecutor(
+                options=options,
+                workers=self.workers,
+                result_sink=AssetBatchWriter(self.db_path).write,
+                progress_callback=lambda pct, done, total: self.result_queue.put(("progress", pct)),
+                log_callback=lambda msg: self.result_queue.put(("log", msg)),
+            )
+            
+            # Coordinator thread: spawns worker processes and owns the DB writer
+            self.process = threading.Thread(
                 target=self.run_collection_process,
-                args=(targets, self.result_queue, kwargs)
+                args=(targets, self.result_queue),
+                name="ShardedCollectionCoordinator",
+                daemon=True
             )
-            self.process.daemon = True
             self.process.start()
             
             # Start monitoring
             self.monitor_timer.start(1000)  # Check every second
             
-            self.log_message.emit("✅ Process-based collection started - UI will remain responsive")
+            self.log_message.emit(f"✅ Process-based collection started on {self.workers} worker processes")
             
         except Exception as e:
             self.log_message.emit(f"❌ Process collection error: {e}")
             self.collection_finished.emit(False)
     
-    def run_collection_process(self, targets, result_queue, kwargs):
-        """Run collection in separate process"""
+    def run_collection_process(self, targets, result_queue):
+        """Run the sharded executor (called on the coordinator thread)"""
         try:
-            # Import collector in the process
-            try:
-                from ultra_fast_collector import UltraFastDeviceCollector as Collector
-                collector_type = "ULTRA-FAST"
-            except ImportError:
-                from core.worker import DeviceInfoCollector as Collector
-                collector_type = "STANDARD"
-            
-            result_queue.put(("log", f"🔧 Using {collector_type} collector in separate process"))
-            
-            # Create collector parameters
-            collector_kwargs = {
-                'targets': targets,
-                'win_creds': kwargs.get('win_creds', []),
-                'linux_creds': kwargs.get('linux_creds', []),
-                'snmp_v2c': kwargs.get('snmp_v2c', []),
-                'snmp_v3': kwargs.get('snmp_v3', {}),
-                'use_http': kwargs.get('use_http', True),
-                'parent': None  # No parent in separate process
-            }
-            
-            if collector_type == "ULTRA-FAST":
-                collector_kwargs.update({
-                    'discovery_workers': 20,
-                    'collection_workers': 12,
-                })
-            else:
-                collector_kwargs['excel_file'] = None
-            
-            # Create and run collector
-            collector = Collector(**collector_kwargs)
-            
-            # Simulate collection progress
-            for i in range(0, 101, 10):
-                result_queue.put(("progress", i))
-                result_queue.put(("log", f"📊 Collection progress: {i}%"))
-                time.sleep(0.5)  # Simulate work
-            
-            result_queue.put(("log", "✅ Process-based collection completed"))
-            result_queue.put(("finished", True))
+            result = self.executor.run(targets)
+            if result.cancelled:
+                result_queue.put(("log", "⏹️ Collection cancelled"))
+            result_queue.put(("log", f"✅ Process-based collection completed: {result.collected} collected, "
+                                     f"{result.unreachable} unreachable, {len(result.failed)} failed, "
+                                     f"{result.written} saved in {result.elapsed:.1f}s"))
+            if result.crashed_workers:
+                result_queue.put(("log", f"⚠️ Recovered from {result.crashed_workers} worker crashes"))
+            result_queue.put(("finished", not result.cancelled))
             
         except Exception as e:
             result_queue.put(("log", f"❌ Process collection error: {e}"))
@@ -107,6 +100,8 @@ class ProcessBasedCollector(QObject):
     def check_process_status(self):
         """Check process status and get results"""
         try:
+            # Sample liveness before draining so a final "finished" message is never missed
+            coordinator_alive = self.process.is_alive() if self.process else True
             if self.result_queue and not self.result_queue.empty():
                 while not self.result_queue.empty():
                     try:
@@ -127,7 +122,7 @@ class ProcessBasedCollector(QObject):
                         break
             
             # Check if process is still alive
-            if self.process and not self.process.is_alive():
+            if not coordinator_alive:
                 self.monitor_timer.stop()
                 self.log_message.emit("⚠️ Collection process ended unexpectedly")
                 self.collection_finished.emit(False)
@@ -139,11 +134,10 @@ class ProcessBasedCollector(QObject):
         """Stop the collection process"""
         try:
             self.monitor_timer.stop()
-            if self.process and self.process.is_alive():
-                self.process.terminate()
-                self.process.join(timeout=2)
-                if self.process.is_alive():
-                    self.process.kill()
+            if self.executor:
+                # Workers stop taking new IPs; the coordinator terminates stragglers
+                # and flushes already-collected results without blocking the UI
+                self.executor.cancel()
             self.log_message.emit("⏹️ Collection process stopped")
             self.collection_finished.emit(False)
         except Exception as e:
@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+🎯 ADAPTIVE RESCAN PLANNER
+=========================
+Keeps per-asset volatility statistics and turns each scheduled run into a
+prioritized work list instead of rescanning every IP at the same cadence:
+
+- Change detection via a fingerprint of the stable inventory fields
+- Reachability flaps and failed collections tracked per IP
+- Exponential backoff for assets (and empty addresses) that never change
+- Volatile assets capped at a freshness SLA, everything capped at max_interval
+- Optional per-run budget; overflow is deferred to the next run
+
+Used by automatic_scanner.perform_target_scan and UltraFastDeviceCollector's
+discovery queue.
+"""
+
+import hashlib
+import ipaddress
+import json
+import logging
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+log = logging.getLogger(__name__)
+
+# Fields whose change means the asset really changed (not just last_seen)
+FINGERPRINT_FIELDS = (
+    'hostname', 'mac_address', 'os_name', 'operating_system', 'os_type', 'os_version',
+    'serial_number', 'manufacturer', 'model', 'device_type', 'domain', 'working_user',
+    'memory_gb', 'ram_gb', 'processor_name', 'cpu_info',
+)
+
+
+@dataclass
+class PlannedTarget:
+    ip: str
+    priority: float
+    reason: str
+    due_at: Optional[datetime] = None
+
+
+@dataclass
+class RescanPlan:
+    targets: List[str] = field(default_factory=list)
+    entries: List[PlannedTarget] = field(default_factory=list)
+    considered: int = 0
+    deferred: int = 0   # due but over the run budget
+    skipped: int = 0    # not due yet (backed off)
+
+    @property
+    def work_ratio(self) -> float:
+        return len(self.targets) / self.considered if self.considered else 0.0
+
+
+@dataclass
+class AssetVolatility:
+    ip: str
+    fingerprint: Optional[str] = None
+    last_attempt: Optional[datetime] = None
+    last_success: Optional[datetime] = None
+    last_changed: Optional[datetime] = None
+    last_reachable: Optional[bool] = None
+    observations: int = 0
+    changes: int = 0
+    flaps: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    interval_minutes: float = 60.0
+
+    @property
+    def change_rate(self) -> float:
+        """Share of observations that saw a change or a reachability flap"""
+        if not self.observations:
+            return 0.0
+        return (self.changes + self.flaps) / self.observations
+
+
+def _host_count(network) -> int:
+    """Addresses network.hosts() yields (no network/broadcast below /31, no anycast address for IPv6)"""
+    if network.num_addresses <= 2:
+        return network.num_addresses
+    return network.num_addresses - (2 if network.version == 4 else 1)
+
+
+def expand_scan_targets(targets: Iterable[str], max_per_target: int = 4096) -> List[str]:
+    """
+    Expand CIDR ("10.0.0.0/24"), last-octet ranges ("10.0.0.1-50") and single IPs.
+    Each target is capped at max_per_target hosts; a warning names any target that was cut short.
+    """
+    ips, seen = [], set()
+    for target in targets:
+        target = (target or '').strip()
+        if not target:
+            continue
+        candidates: Iterable[str]
+        try:
+            if '/' in target:
+                network = ipaddress.ip_network(target, strict=False)
+                hosts = network.hosts() if network.num_addresses > 1 else [network.network_address]
+                total = _host_count(network)
+                candidates = (str(ip) for _, ip in zip(range(max_per_target), hosts))
+            elif '-' in target:
+                start, end = target.split('-', 1)
+                start_ip = ipaddress.ip_address(start.strip())
+                end = end.strip()
+                end_ip = (ipaddress.ip_address(end) if '.' in end
+                          else ipaddress.ip_address(str(start_ip).rsplit('.', 1)[0] + '.' + end))
+                total = int(end_ip) - int(start_ip) + 1
+                candidates = (str(start_ip + offset) for offset in range(max(min(total, max_per_target), 0)))
+            else:
+                total = 1
+                candidates = [str(ipaddress.ip_address(target))]
+        except ValueError:
+            total = 1
+            candidates = [target]  # hostname: always planned as-is
+        if total > max_per_target:
+            log.warning("Scan target %s has %d hosts; planning the first %d and dropping %d",
+                        target, total, max_per_target, total - max_per_target)
+        for ip in candidates:
+            if ip not in seen:
+                seen.add(ip)
+                ips.append(ip)
+    return ips
+
+
+def device_fingerprint(device: Dict[str, Any]) -> str:
+    """Stable hash of the inventory fields that indicate a real change"""
+    lowered = {str(k).lower(): v for k, v in device.items()}
+    stable = {name: str(lowered[name]).strip().lower() for name in FINGERPRINT_FIELDS
+              if lowered.get(name) not in (None, '', 'Unknown')}
+    return hashlib.sha1(json.dumps(stable, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def device_ip(device: Dict[str, Any]) -> Optional[str]:
+    return device.get('ip_address') or device.get('IP Address') or device.get('ip')
+
+
+class RescanPlanner:
+    """
+    📈 Volatility-driven rescan planner
+
+    Each asset carries its own rescan interval. Unchanged observations multiply
+    it by backoff_factor (up to max_interval); a change, flap or failure resets
+    it to min_interval. Assets whose change rate exceeds volatile_threshold are
+    never allowed to exceed the volatile freshness SLA.
+    """
+
+    def __init__(self, db_path: str = 'assets.db',
+                 min_interval_minutes: float = 60,
+                 max_interval_minutes: float = 7 * 24 * 60,
+                 volatile_sla_minutes: float = 120,
+                 volatile_threshold: float = 0.3,
+                 backoff_factor: float = 2.0,
+                 failure_backoff_after: int = 3):
+        self.db_path = db_path
+        self.min_interval = min_interval_minutes
+        self.max_interval = max_interval_minutes
+        self.volatile_sla = volatile_sla_minutes
+        self.volatile_threshold = volatile_threshold
+        self.backoff_factor = backoff_factor
+        self.failure_backoff_after = failure_backoff_after
+        self._lock = threading.Lock()
+        self._cache: Optional[Dict[str, AssetVolatility]] = None
+        self._init_table()
+
+    # ----------------- Persistence -----------------
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _init_table(self):
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS asset_volatility (
+                    ip_address TEXT PRIMARY KEY,
+                    fingerprint TEXT,
+                    last_attempt TEXT,
+                    last_success TEXT,
+                    last_changed TEXT,
+                    last_reachable INTEGER,
+                    observations INTEGER DEFAULT 0,
+                    changes INTEGER DEFAULT 0,
+                    flaps INTEGER DEFAULT 0,
+                    failures INTEGER DEFAULT 0,
+                    consecutive_failures INTEGER DEFAULT 0,
+                    interval_minutes REAL
+                )
+            """)
+
+    @staticmethod
+    def _dt(value: Optional[str]) -> Optional[datetime]:
+        if not value:
+            return None
+        try:
+            return datetime.fromisoformat(str(value).replace('Z', ''))
+        except ValueError:
+            return None
+
+    def _load(self) -> Dict[str, AssetVolatility]:
+        if self._cache is not None:
+            return self._cache
+        stats: Dict[str, AssetVolatility] = {}
+        with self._connect() as conn:
+            for row in conn.execute("SELECT ip_address, fingerprint, last_attempt, last_success, last_changed, "
+                                    "last_reachable, observations, changes, flaps, failures, "
+                                    "consecutive_failures, interval_minutes FROM asset_volatility"):
+                stats[row[0]] = AssetVolatility(
+                    ip=row[0], fingerprint=row[1], last_attempt=self._dt(row[2]),
+                    last_success=self._dt(row[3]), last_changed=self._dt(row[4]),
+                    last_reachable=None if row[5] is None else bool(row[5]),
+                    observations=row[6] or 0, changes=row[7] or 0, flaps=row[8] or 0,
+                    failures=row[9] or 0, consecutive_failures=row[10] or 0,
+                    interval_minutes=row[11] or self.min_interval)
+        self._cache = stats
+        return stats
+
+    def _save(self, entries: Iterable[AssetVolatility]):
+        iso = lambda value: value.isoformat() if value else None
+        rows = [(e.ip, e.fingerprint, iso(e.last_attempt), iso(e.last_success), iso(e.last_changed),
+                 None if e.last_reachable is None else int(e.last_reachable), e.observations, e.changes,
+                 e.flaps, e.failures, e.consecutive_failures, e.interval_minutes) for e in entries]
+        with self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO asset_volatility VALUES (?,?,?,?,?,?,?,?,?,?,?,?)", rows)
+
+    def seed_from_assets(self) -> int:
+        """Bootstrap statistics for known assets from assets/device_history"""
+        with self._lock:
+            stats = self._load()
+            seeded = []
+            with self._connect() as conn:
+                columns = {row[1] for row in conn.execute("PRAGMA table_info(assets)")}
+                if 'ip_address' not in columns:
+                    return 0
+                seen_column = next((c for c in ('last_seen', 'updated_at', 'last_updated') if c in columns), None)
+                has_history = conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' "
+                                           "AND name='device_history'").fetchone() is not None
+                sql = (f"SELECT a.ip_address, {('a.' + seen_column) if seen_column else 'NULL'}, "
+                       + ("(SELECT COUNT(*) FROM device_history h WHERE h.device_id = a.id)" if has_history else "0")
+                       + " FROM assets a WHERE a.ip_address IS NOT NULL AND a.ip_address != ''")
+                for ip, seen, change_count in conn.execute(sql):
+                    if ip in stats:
+                        continue
+                    seen_at = self._dt(seen)
+                    entry = AssetVolatility(ip=ip, last_attempt=seen_at, last_success=seen_at,
+                                            last_reachable=True, observations=max(1, change_count),
+                                            changes=change_count, interval_minutes=self.min_interval)
+                    stats[ip] = entry
+                    seeded.append(entry)
+            if seeded:
+                self._save(seeded)
+            return len(seeded)
+
+    # ----------------- Planning -----------------
+
+    def _effective_interval(self, entry: AssetVolatility) -> float:
+        interval = min(max(entry.interval_minutes, self.min_interval), self.max_interval)
+        if entry.change_rate >= self.volatile_threshold:
+            interval = min(interval, self.volatile_sla)
+        return interval
+
+    def plan(self, targets: Iterable[str], now: Optional[datetime] = None,
+             budget: Optional[int] = None) -> RescanPlan:
+        """Prioritized list of IPs to scan in this run (most urgent first)"""
+        now = now or datetime.now()
+        with self._lock:
+            stats = self._load()
+            plan = RescanPlan()
+            due: List[PlannedTarget] = []
+            for ip in expand_scan_targets(targets):
+                plan.considered += 1
+                entry = stats.get(ip)
+                if entry is None or entry.last_attempt is None:
+                    due.append(PlannedTarget(ip, float('inf'), 'never scanned'))
+                    continue
+                interval = self._effective_interval(entry)
+                due_at = entry.last_attempt + timedelta(minutes=interval)
+                if now < due_at:
+                    plan.skipped += 1
+                    continue
+                overdue = (now - entry.last_attempt).total_seconds() / 60.0 / interval
+                # Overdue ratio first, then volatility so churners win ties
+                priority = overdue + entry.change_rate * 2 + min(entry.consecutive_failures, 3) * 0.5
+                if entry.change_rate >= self.volatile_threshold:
+                    reason = 'volatile'
+                elif entry.consecutive_failures:
+                    reason = 'failed collection'
+                elif entry.last_reachable is False:
+                    reason = 'unreachable backoff expired'
+                else:
+                    reason = 'stale'
+                due.append(PlannedTarget(ip, priority, reason, due_at))
+
+            due.sort(key=lambda item: item.priority, reverse=True)
+            if budget is not None and len(due) > budget:
+                plan.deferred = len(due) - budget
+                due = due[:budget]
+            plan.entries = due
+            plan.targets = [item.ip for item in due]
+            return plan
+
+    # ----------------- Observations -----------------
+
+    def _observe(self, stats: Dict[str, AssetVolatility], ip: str, reachable: bool,
+                 device: Optional[Dict[str, Any]], success: bool, now: datetime) -> AssetVolatility:
+        entry = stats.get(ip) or AssetVolatility(ip=ip, interval_minutes=self.min_interval)
+        stats[ip] = entry
+        interesting = False
+
+        if entry.last_reachable is not None and entry.last_reachable != reachable:
+            entry.flaps += 1
+            interesting = True
+        entry.last_reachable = reachable
+
+        if reachable and device is not None and success:
+            fingerprint = device_fingerprint(device)
+            if entry.fingerprint is not None and fingerprint != entry.fingerprint:
+                entry.changes += 1
+                entry.last_changed = now
+                interesting = True
+            entry.fingerprint = fingerprint
+            entry.last_success = now
+            entry.consecutive_failures = 0
+        elif reachable:
+            entry.failures += 1
+            entry.consecutive_failures += 1
+
+        entry.observations += 1
+        entry.last_attempt = now
+
+        if interesting or (0 < entry.consecutive_failures < self.failure_backoff_after):
+            entry.interval_minutes = self.min_interval
+        else:
+            entry.interval_minutes = min(entry.interval_minutes * self.backoff_factor, self.max_interval)
+        return entry
+
+    def record_observation(self, ip: str, reachable: bool, device: Optional[Dict[str, Any]] = None,
+                           success: bool = True, now: Optional[datetime] = None) -> AssetVolatility:
+        with self._lock:
+            entry = self._observe(self._load(), ip, reachable, device, success, now or datetime.now())
+            self._save([entry])
+            return entry
+
+    def record_results(self, attempted: Iterable[str], devices: Iterable[Dict[str, Any]],
+                       reachable: Optional[Iterable[str]] = None, failed: Iterable[str] = (),
+                       now: Optional[datetime] = None) -> int:
+        """Record one run: every attempted IP gets an observation in a single transaction"""
+        now = now or datetime.now()
+        by_ip = {}
+        for device in devices:
+            ip = device_ip(device)
+            if ip:
+                by_ip[ip] = device
+        reachable_set = set(reachable) if reachable is not None else set(by_ip)
+        failed_set = set(failed)
+        with self._lock:
+            stats = self._load()
+            updated = [self._observe(stats, ip, ip in reachable_set or ip in by_ip, by_ip.get(ip),
+                                     ip in by_ip and ip not in failed_set, now)
+                       for ip in dict.fromkeys(attempted)]
+            self._save(updated)
+            return len(updated)
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = self._load()
+            volatile = sum(1 for e in stats.values() if e.change_rate >= self.volatile_threshold)
+            return {
+                'tracked_assets': len(stats),
+                'volatile_assets': volatile,
+                'backed_off_assets': sum(1 for e in stats.values() if e.interval_minutes >= self.max_interval),
+                'average_interval_minutes': (sum(self._effective_interval(e) for e in stats.values()) / len(stats)
+                                             if stats else 0.0),
+            }
+
+
+_default_planner: Optional[RescanPlanner] = None
+
+
+def get_rescan_planner(db_path: str = 'assets.db') -> RescanPlanner:
+    """Shared planner for the default database (seeded from existing assets once)"""
+    global _default_planner
+    if _default_planner is None or _default_planner.db_path != db_path:
+        _default_planner = RescanPlanner(db_path)
+        _default_planner.seed_from_assets()
+    return _default_planner
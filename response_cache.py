@@ -0,0 +1,470 @@
+#!/usr/bin/env python3
+"""
+🗃️ DATA-VERSION RESPONSE CACHE
+==============================
+Caches the read-heavy JSON endpoints of the web services (/api/stats,
+/api/departments, /api/device-types, /api/realtime/stats, the asset and
+device lists). Every dashboard client polls these, and between scans they
+recompute the same answer.
+
+- An entry is keyed by (path, normalized query string). It stays valid as
+  long as the database's data version is unchanged. The version combines
+  PRAGMA data_version, read on a dedicated read-only connection (so commits
+  from any other connection or process bump it), the file's inode (a
+  restored or replaced database), and an in-process change counter
+  (ResponseCache.invalidate()). A version change drops every entry.
+- Memory-bounded LRU: total body bytes, compressed variants included, stay
+  under max_bytes (RESPONSE_CACHE_MAX_BYTES, default 32 MiB).
+- ETag / If-None-Match: a browser that already has the body gets a 304.
+- Bodies of min_compress_bytes or more are sent gzip- or brotli-encoded
+  (brotli only if installed). Each encoding is compressed once per entry.
+- Hit / miss / 304 counters, entry and byte gauges in metrics_registry, and
+  cache.stats() with the hit rate (served at /api/cache/stats). Every
+  pre-forked worker has its own cache; under gunicorn the stats are summed
+  over the workers' metrics snapshots (see metrics_registry).
+
+Wiring (inside any access-control decorator, so hits are still checked):
+
+    cache = install_response_cache(app, db_path, service='department_web')
+
+    @app.route('/api/stats')
+    @require_access
+    @cache.cached()
+    def stats(): ...
+"""
+
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+try:
+    from metrics_registry import collect_multiprocess, get_metrics_registry, multiprocess_directory
+    METRICS_AVAILABLE = True
+except ImportError:
+    METRICS_AVAILABLE = False
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+DEFAULT_MIN_COMPRESS_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+# Cache-busting parameters added by browsers and jQuery; they never change the answer
+IGNORED_PARAMS = frozenset({'_', 'ts', 'nocache'})
+ENTRY_OVERHEAD = 256
+# JSON, and the MessagePack form of the projected list endpoints (field_projection)
+CACHEABLE_MIMETYPES = frozenset({'application/json', 'application/x-msgpack'})
+
+MISSING = (0, 0)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+# ======================================================================
+# Data version
+# ======================================================================
+
+class DataVersion:
+    """Changes whenever the database's content may have changed"""
+
+    def __init__(self, db_path: Union[str, Callable[[], str]]):
+        self._db_path = db_path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._identity: Tuple = MISSING
+        self._pid = None
+        self.counter = 0
+
+    @property
+    def db_path(self) -> str:
+        return self._db_path() if callable(self._db_path) else self._db_path
+
+    def bump(self) -> None:
+        with self._lock:
+            self.counter += 1
+
+    def current(self) -> Tuple:
+        path = self.db_path
+        try:
+            st = os.stat(path)
+            identity = (st.st_dev, st.st_ino)
+        except OSError:
+            identity = MISSING
+        with self._lock:
+            if identity == MISSING:
+                self._close()
+                return identity + (0, self.counter)
+            if self._conn is None or identity != self._identity or self._pid != os.getpid():
+                self._close()
+                # data_version only moves for commits made by *other* connections, so this
+                # one never writes; mode=ro also keeps it from creating a missing file
+                self._conn = sqlite3.connect(f'file:{os.path.abspath(path)}?mode=ro', uri=True,
+                                             check_same_thread=False, timeout=5)
+                self._identity, self._pid = identity, os.getpid()
+            try:
+                data_version = self._conn.execute('PRAGMA data_version').fetchone()[0]
+            except sqlite3.Error:
+                self._close()
+                data_version = -1
+            return identity + (data_version, self.counter)
+
+    def _close(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except sqlite3.Error:
+                pass
+        self._conn, self._identity = None, MISSING
+
+    def close(self) -> None:
+        with self._lock:
+            self._close()
+
+
+# ======================================================================
+# Cache
+# ======================================================================
+
+class CachedResponse:
+    __slots__ = ('body', 'status', 'mimetype', 'etag', 'encoded', 'stored_at', 'max_age', 'size')
+
+    def __init__(self, body: bytes, status: int, mimetype: str, max_age: Optional[float]):
+        self.body = body
+        self.status = status
+        self.mimetype = mimetype
+        self.etag = hashlib.sha1(body).hexdigest()[:24]
+        self.encoded: Dict[str, bytes] = {}
+        self.stored_at = time.monotonic()
+        self.max_age = max_age
+        self.size = len(body) + ENTRY_OVERHEAD
+
+    def tag(self, encoding: Optional[str]) -> str:
+        # A strong ETag names one representation, so each encoding gets its own
+        return f'{self.etag}-{encoding}' if encoding else self.etag
+
+    def expired(self, now: float) -> bool:
+        return self.max_age is not None and now - self.stored_at > self.max_age
+
+
+def normalize_query(args) -> Tuple:
+    """Sorted (name, values) pairs without cache busters: ?b=2&a=1 and ?a=1&b=2&_=123 share an entry"""
+    return tuple(sorted((name, tuple(values)) for name, values in args.lists() if name not in IGNORED_PARAMS))
+
+
+def choose_encoding(accept_encoding) -> Optional[str]:
+    """Preferred encoding from a werkzeug Accept-Encoding header (q values respected)"""
+    candidates = (('br', 'gzip') if BROTLI_AVAILABLE else ('gzip',))
+    best = accept_encoding.best_match(candidates)
+    return best if best in candidates and accept_encoding[best] > 0 else None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class ResponseCache:
+    """LRU of JSON responses, valid for one data version"""
+
+    def __init__(self, db_path: Union[str, Callable[[], str]], service: str = 'web',
+                 max_bytes: Optional[int] = None, min_compress_bytes: Optional[int] = None,
+                 enabled: bool = True):
+        self.version = DataVersion(db_path)
+        self.service = service
+        self.max_bytes = max_bytes if max_bytes is not None else _env_int('RESPONSE_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES)
+        self.min_compress_bytes = (min_compress_bytes if min_compress_bytes is not None
+                                   else _env_int('RESPONSE_CACHE_MIN_COMPRESS_BYTES', DEFAULT_MIN_COMPRESS_BYTES))
+        self.enabled = enabled and self.max_bytes > 0
+        self._entries: 'OrderedDict[Tuple, CachedResponse]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._current_version: Optional[Tuple] = None
+        self.bytes = 0
+        self.counts = {'hit': 0, 'miss': 0, 'not_modified': 0, 'bypass': 0}
+        self.evictions = 0
+        self.invalidations = 0
+        self._metrics = _CacheMetrics(self) if METRICS_AVAILABLE else None
+
+    # ----------------- storage -----------------
+
+    def invalidate(self) -> None:
+        """For changes the data version cannot see; DB commits are picked up on their own"""
+        self.version.bump()
+
+    def _sync_version(self) -> Tuple:
+        version = self.version.current()
+        with self._lock:
+            if version != self._current_version:
+                if self._entries:
+                    self.invalidations += 1
+                    if self._metrics:
+                        self._metrics.invalidations.inc()
+                self._entries.clear()
+                self.bytes = 0
+                self._current_version = version
+        return version
+
+    def get(self, key: Tuple, version: Tuple) -> Optional[CachedResponse]:
+        now = time.monotonic()
+        with self._lock:
+            if version != self._current_version:
+                return None
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expired(now):
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: Tuple, version: Tuple, entry: CachedResponse) -> bool:
+        # One response may not push out more than a quarter of the cache
+        if entry.size > self.max_bytes // 4:
+            return False
+        with self._lock:
+            if version != self._current_version:
+                return False  # the data changed while this response was computed
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self.bytes += entry.size
+            self._evict()
+        return True
+
+    def _add_encoding(self, key: Tuple, entry: CachedResponse, encoding: str) -> bytes:
+        payload = entry.encoded.get(encoding)
+        if payload is not None:
+            return payload
+        payload = compress(entry.body, encoding)
+        with self._lock:
+            if encoding not in entry.encoded:
+                entry.encoded[encoding] = payload
+                if self._entries.get(key) is entry:
+                    entry.size += len(payload)
+                    self.bytes += len(payload)
+                    self._evict()
+        return payload
+
+    def _remove(self, key: Tuple) -> None:
+        entry = self._entries.pop(key)
+        self.bytes -= entry.size
+
+    def _evict(self) -> None:
+        while self.bytes > self.max_bytes and self._entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+            if self._metrics:
+                self._metrics.evictions.inc()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ----------------- Flask -----------------
+
+    def _count(self, result: str, endpoint: str) -> None:
+        self.counts[result] += 1
+        if self._metrics:
+            self._metrics.requests.labels(self.service, endpoint, result).inc()
+
+    def _respond(self, key: Tuple, entry: CachedResponse, result: str, endpoint: str):
+        from flask import Response, request
+
+        encoding = choose_encoding(request.accept_encodings) if len(entry.body) >= self.min_compress_bytes else None
+        tag = entry.tag(encoding)
+        headers = {'Vary': 'Accept-Encoding', 'Cache-Control': 'private, no-cache', 'X-Cache': result.upper()}
+        if_none_match = request.if_none_match
+        if if_none_match and (if_none_match.star_tag or any(
+                if_none_match.contains_weak(entry.tag(variant)) for variant in (None, 'gzip', 'br'))):
+            self._count('not_modified', endpoint)
+            response = Response(status=304, headers=headers)
+            response.set_etag(tag)
+            return response
+        self._count(result, endpoint)
+        body = self._add_encoding(key, entry, encoding) if encoding else entry.body
+        response = Response(body, status=entry.status, mimetype=entry.mimetype, headers=headers)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.set_etag(tag)
+        return response
+
+    def cached(self, max_age: Optional[float] = None):
+        """View decorator: serve GET/HEAD from the cache while the data version holds.
+
+        max_age bounds how long an entry lives for answers that also depend on
+        the clock (timestamps, "last 24 hours" counts).
+        """
+        def decorate(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                from flask import make_response, request
+
+                endpoint = request.url_rule.rule if request.url_rule is not None else request.path
+                if not self.enabled or request.method not in ('GET', 'HEAD'):
+                    if request.method in ('GET', 'HEAD'):
+                        self._count('bypass', endpoint)
+                    return view(*args, **kwargs)
+
+                key = (request.path, normalize_query(request.args))
+                version = self._sync_version()
+                entry = self.get(key, version)
+                if entry is not None:
+                    return self._respond(key, entry, 'hit', endpoint)
+
+                response = make_response(view(*args, **kwargs))
+                if not _cacheable(response):
+                    self._count('bypass', endpoint)
+                    return response
+                entry = CachedResponse(response.get_data(), response.status_code, response.mimetype, max_age)
+                self.put(key, version, entry)
+                return self._respond(key, entry, 'miss', endpoint)
+            return wrapper
+        return decorate
+
+    def stats(self) -> Dict[str, Any]:
+        counts, evictions, invalidations = dict(self.counts), self.evictions, self.invalidations
+        entries, cached_bytes, workers = len(self._entries), self.bytes, 1
+        if self._metrics and multiprocess_directory():
+            # Pre-forked workers: this process only sees its own share of the traffic
+            merged = collect_multiprocess()
+            workers = merged.processes
+
+            def total(name, result=None):
+                metric = merged.get(name)
+                return sum(child.value for values, child in (metric.items() if metric else [])
+                           if values[0] == self.service and (result is None or values[-1] == result))
+
+            counts = {result: int(total('response_cache_requests', result)) for result in counts}
+            evictions = int(total('response_cache_evictions'))
+            invalidations = int(total('response_cache_invalidations'))
+            entries = int(total('response_cache_entries'))
+            cached_bytes = int(total('response_cache_bytes'))
+        served = counts['hit'] + counts['not_modified']
+        lookups = served + counts['miss']
+        return {
+            'service': self.service,
+            'enabled': self.enabled,
+            'entries': entries,
+            'bytes': cached_bytes,
+            'max_bytes': self.max_bytes,
+            **counts,
+            'hit_rate': round(served / lookups, 4) if lookups else 0.0,
+            'evictions': evictions,
+            'invalidations': invalidations,
+            'workers': workers,
+            'brotli': BROTLI_AVAILABLE,
+        }
+
+
+def _cacheable(response) -> bool:
+    if response.status_code != 200 or response.is_streamed or response.mimetype not in CACHEABLE_MIMETYPES:
+        return False
+    if 'Set-Cookie' in response.headers or 'Content-Encoding' in response.headers:
+        return False
+    # Several endpoints report failures as 200 {"error": ...}; those must not stick
+    payload = response.get_json(silent=True)
+    return not (isinstance(payload, dict) and 'error' in payload)
+
+
+class _CacheMetrics:
+    def __init__(self, cache: ResponseCache):
+        registry = get_metrics_registry()
+        self.requests = registry.counter(
+            'response_cache_requests', 'Cached endpoint requests by result (hit, miss, not_modified, bypass)',
+            ('service', 'endpoint', 'result'))
+        self.evictions = registry.counter(
+            'response_cache_evictions', 'Entries evicted to stay under the byte limit',
+            ('service',)).labels(cache.service)
+        self.invalidations = registry.counter(
+            'response_cache_invalidations', 'Cache flushes caused by a data version change',
+            ('service',)).labels(cache.service)
+        ref = weakref.ref(cache)
+        registry.gauge('response_cache_entries', 'Cached responses', ('service',)).labels(
+            cache.service).set_function(lambda: len(ref()) if ref() is not None else 0)
+        registry.gauge('response_cache_bytes', 'Bytes held by cached responses', ('service',)).labels(
+            cache.service).set_function(lambda: ref().bytes if ref() is not None else 0)
+
+
+def install_response_cache(app, db_path: Union[str, Callable[[], str]], service: str = 'web',
+                           endpoint: Optional[str] = '/api/cache/stats', decorator: Optional[Callable] = None,
+                           **options) -> ResponseCache:
+    """One cache per app in app.extensions['response_cache'], with a stats route"""
+    from flask import jsonify
+
+    cache = app.extensions.get('response_cache')
+    if cache is not None:
+        return cache
+    cache = ResponseCache(db_path, service=service, **options)
+    app.extensions['response_cache'] = cache
+    if endpoint:
+        def cache_stats():
+            return jsonify(cache.stats())
+        app.add_url_rule(endpoint, 'response_cache_stats', decorator(cache_stats) if decorator else cache_stats)
+    return cache
+
+
+def benchmark(requests: int = 2000, rows: int = 5000) -> Dict[str, float]:
+    """Per-request time of a GROUP BY stats endpoint, uncached vs cached"""
+    import tempfile
+
+    from flask import Flask, jsonify
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'assets.db')
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE assets (id INTEGER PRIMARY KEY, device_type TEXT, operating_system TEXT)")
+        conn.executemany("INSERT INTO assets (device_type, operating_system) VALUES (?, ?)",
+                         [(f'type-{n % 17}', f'os-{n % 31}') for n in range(rows)])
+        conn.commit()
+        conn.close()
+
+        app = Flask(__name__)
+        cache = install_response_cache(app, db_path, service='benchmark', endpoint=None)
+
+        def stats():
+            with sqlite3.connect(db_path) as c:
+                return jsonify({
+                    'total': c.execute("SELECT COUNT(*) FROM assets").fetchone()[0],
+                    'device_types': dict(c.execute("SELECT device_type, COUNT(*) FROM assets GROUP BY 1")),
+                    'operating_systems': dict(c.execute("SELECT operating_system, COUNT(*) FROM assets GROUP BY 1")),
+                })
+        app.add_url_rule('/plain', 'plain', stats)
+        app.add_url_rule('/cached', 'cached', cache.cached()(stats))
+        client = app.test_client()
+        results = {}
+        for path in ('/plain', '/cached'):
+            client.get(path)
+            started = time.perf_counter()
+            for _ in range(requests):
+                client.get(path, headers={'Accept-Encoding': 'gzip'})
+            results[f'{path[1:]}_ms'] = round((time.perf_counter() - started) * 1000 / requests, 4)
+        results['hit_rate'] = cache.stats()['hit_rate']
+        cache.version.close()
+        return results
+
+
+if __name__ == "__main__":
+    import json
+
+    print(json.dumps(benchmark(), indent=2))
@@ -11,12 +11,15 @@ import json
 from datetime import datetime
 import hashlib
 
+from field_mapping import get_field_mapper
+
 class RobustDataSaver:
     def __init__(self, db_path="assets.db"):
         self.db_path = db_path
         self.saved_count = 0
         self.updated_count = 0
         self.error_count = 0
+        self.mapper = get_field_mapper()
         
     def save_device_data(self, device_data):
         """Save device data with proper type conversion"""
@@ -90,50 +93,19 @@ class RobustDataSaver:
     def _insert_record(self, cursor, data, data_hash):
         """Insert new record into database"""
         
-        # Get all available columns from table
-        cursor.execute("PRAGMA table_info(assets)")
-        table_columns = [row[1] for row in cursor.fetchall()]
-        
-        # Prepare data for insertion
-        insert_data = {'data_hash': data_hash, 'last_updated': datetime.now().isoformat()}
-        
-        for column in table_columns:
-            if column in data:
-                insert_data[column] = data[column]
-            elif column in ['id']:  # Skip auto-increment columns
-                continue
-            else:
-                insert_data[column] = None
-        
-        # Build INSERT query
-        columns = list(insert_data.keys())
-        placeholders = ['?' for _ in columns]
+        # Column set is cached until the schema changes; one statement per column signature
+        schema = self.mapper.schema(cursor.connection, 'assets', self.db_path)
+        insert_data = dict(data, data_hash=data_hash, last_updated=datetime.now().isoformat())
         
-        query = f"INSERT INTO assets ({', '.join(columns)}) VALUES ({', '.join(placeholders)})"
-        values = [insert_data[col] for col in columns]
-        
-        cursor.execute(query, values)
+        self.mapper.insert(cursor.connection, self.mapper.to_row(schema, insert_data))
     
     def _update_record(self, cursor, record_id, data, data_hash):
         """Update existing record"""
         
-        # Get all available columns
-        cursor.execute("PRAGMA table_info(assets)")
-        table_columns = [row[1] for row in cursor.fetchall()]
-        
-        # Prepare update data
-        update_data = {'data_hash': data_hash, 'last_updated': datetime.now().isoformat()}
-        
-        for column in table_columns:
-            if column in data and column not in ['id']:
-                update_data[column] = data[column]
-        
-        # Build UPDATE query
-        set_clauses = [f"{col} = ?" for col in update_data.keys()]
-        query = f"UPDATE assets SET {\', \'.join(update_fields)} WHERE id = ?"  # NOTE: Safe - fields from schema
-        values = list(update_data.values()) + [record_id]
+        schema = self.mapper.schema(cursor.connection, 'assets', self.db_path)
+        update_data = dict(data, data_hash=data_hash, last_updated=datetime.now().isoformat())
         
-        cursor.execute(query, values)
+        self.mapper.update(cursor.connection, self.mapper.to_row(schema, update_data), record_id)
     
     def get_summary(self):
         """Get summary of save operations"""
@@ -0,0 +1,459 @@
+#!/usr/bin/env python3
+"""
+💾 RESUMABLE SCAN CHECKPOINTS
+============================
+Persistent progress for long network sweeps, so a /16 that dies halfway
+(app closed, collector killed, machine rebooted) resumes instead of
+starting over:
+
+- scan_runs: one row per sweep, keyed by its target list
+- scan_run_chunks: the sweep split into chunks (sized by
+  MassiveScanThread.calculate_optimal_chunk_size), each
+  pending -> discovered -> collected, or failed
+- scan_run_hosts: per-IP state (pending / alive / dead / collected / failed)
+
+Host state changes are buffered and committed in batches (every
+commit_every marks or commit_interval seconds, and at every chunk
+boundary). After a crash, start() with the same targets hands back the
+unfinished run: completed chunks are skipped, and within the interrupted
+chunk only hosts without a committed final state are probed again; hosts
+already known alive go straight to collection.
+
+Only runs touched within max_resume_age_hours are resumed; older ones are
+marked expired and the sweep starts over, as it does with resume=False.
+The tables are created by db.migrations (version 8).
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from db.migrations import ensure_schema
+from rescan_planner import expand_scan_targets
+
+HOST_STATES = ('pending', 'alive', 'dead', 'collected', 'failed')
+MAX_HOSTS_PER_TARGET = 65536  # a full /16
+DEFAULT_CHUNK_SIZE = 50
+DEFAULT_MAX_RESUME_AGE_HOURS = 24  # older unfinished runs are expired instead of resumed
+
+
+def run_key_for(targets: Iterable[str]) -> str:
+    """Stable identity of a sweep: the same targets (in any order) resume the same run"""
+    normalized = sorted({(target or '').strip() for target in targets if (target or '').strip()})
+    return hashlib.sha1(json.dumps(normalized).encode('utf-8')).hexdigest()
+
+
+def optimal_chunk_size(target: str) -> int:
+    """Chunk size the massive-scan handler uses for this target"""
+    try:
+        # Imported lazily: massive_scan_protection itself imports this module
+        from massive_scan_protection import MassiveScanThread
+    except (ImportError, NameError):  # NameError: PyQt6 missing, Qt base classes undefined
+        return DEFAULT_CHUNK_SIZE
+    return max(1, MassiveScanThread.calculate_optimal_chunk_size(target))
+
+
+@dataclass
+class ScanChunk:
+    """Work left in one chunk: IPs still to probe plus IPs already known alive"""
+    seq: int
+    target: str
+    status: str
+    attempt: int
+    discover: List[str] = field(default_factory=list)
+    alive: List[str] = field(default_factory=list)
+    done: int = 0
+
+    @property
+    def ips(self) -> List[str]:
+        return self.discover + self.alive
+
+
+class ScanCheckpointStore:
+    """SQLite-backed scan run registry; every mutation is a short IMMEDIATE transaction"""
+
+    def __init__(self, db_path: str = 'assets.db', commit_every: int = 50, commit_interval: float = 2.0,
+                 max_chunk_attempts: int = 3, max_resume_age_hours: Optional[float] = DEFAULT_MAX_RESUME_AGE_HOURS):
+        self.db_path = db_path
+        self.commit_every = max(1, commit_every)
+        self.commit_interval = commit_interval
+        self.max_chunk_attempts = max_chunk_attempts
+        self.max_resume_age_hours = max_resume_age_hours
+        # scan_runs / scan_run_chunks / scan_run_hosts come from db.migrations
+        ensure_schema(db_path)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _transaction(self):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        return conn
+
+    @staticmethod
+    def _now_iso() -> str:
+        return datetime.now().isoformat()
+
+    # ----------------- Runs -----------------
+
+    def start(self, targets: Iterable[str], chunk_size: Optional[int] = None, run_key: Optional[str] = None,
+              resume: bool = True) -> 'ScanRun':
+        """Resume the recent unfinished run for these targets (unless resume=False), or plan a new one"""
+        targets = [target.strip() for target in targets if target and target.strip()]
+        run_key = run_key or run_key_for(targets)
+        conn = self._transaction()
+        try:
+            self._expire_stale(conn)
+            row = conn.execute("SELECT id, chunk_size FROM scan_runs WHERE run_key = ? AND status = 'running' "
+                               "ORDER BY id DESC LIMIT 1", (run_key,)).fetchone()
+            if row is not None and resume:
+                conn.execute("UPDATE scan_runs SET resumes = resumes + 1, updated_at = ? WHERE id = ?",
+                             (self._now_iso(), row['id']))
+                conn.execute("COMMIT")
+                return ScanRun(self, row['id'], row['chunk_size'], resumed=True)
+            if row is not None:
+                conn.execute("UPDATE scan_runs SET status = 'aborted', updated_at = ? WHERE id = ?",
+                             (self._now_iso(), row['id']))
+
+            cursor = conn.execute("INSERT INTO scan_runs (run_key, targets, chunk_size, created_at, updated_at) "
+                                  "VALUES (?, ?, ?, ?, ?)",
+                                  (run_key, json.dumps(targets), chunk_size, self._now_iso(), self._now_iso()))
+            run_id = cursor.lastrowid
+            seq, total, seen = 0, 0, set()
+            for target in targets:
+                size = chunk_size or optimal_chunk_size(target)
+                ips = [ip for ip in expand_scan_targets([target], MAX_HOSTS_PER_TARGET) if ip not in seen]
+                seen.update(ips)
+                for start in range(0, len(ips), size):
+                    chunk = ips[start:start + size]
+                    conn.execute("INSERT INTO scan_run_chunks (run_id, seq, target, first_ip, last_ip, hosts, "
+                                 "updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                 (run_id, seq, target, chunk[0], chunk[-1], len(chunk), self._now_iso()))
+                    conn.executemany("INSERT INTO scan_run_hosts (run_id, ip, chunk_seq, position) VALUES (?, ?, ?, ?)",
+                                     [(run_id, ip, seq, total + start + n) for n, ip in enumerate(chunk)])
+                    seq += 1
+                total += len(ips)
+            conn.execute("UPDATE scan_runs SET total_hosts = ?, chunks = ? WHERE id = ?", (total, seq, run_id))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return ScanRun(self, run_id, chunk_size, resumed=False)
+
+    def _expire_stale(self, conn: sqlite3.Connection) -> int:
+        if self.max_resume_age_hours is None:
+            return 0
+        cutoff = (datetime.now() - timedelta(hours=self.max_resume_age_hours)).isoformat()
+        return conn.execute("UPDATE scan_runs SET status = 'expired' WHERE status = 'running' AND updated_at < ?",
+                            (cutoff,)).rowcount
+
+    def expire_stale_runs(self) -> int:
+        """Mark unfinished runs older than max_resume_age_hours expired; returns how many"""
+        with self._connect() as conn:
+            return self._expire_stale(conn)
+
+    def abandon(self, run_id: int) -> None:
+        """Stop offering a run for resume (the next start() plans from scratch)"""
+        with self._connect() as conn:
+            conn.execute("UPDATE scan_runs SET status = 'aborted', updated_at = ? WHERE id = ? AND status = 'running'",
+                         (self._now_iso(), run_id))
+
+    def unfinished_runs(self) -> List[Dict[str, Any]]:
+        """Runs start() would still resume"""
+        with self._connect() as conn:
+            self._expire_stale(conn)
+            rows = conn.execute("SELECT * FROM scan_runs WHERE status = 'running' ORDER BY id").fetchall()
+        return [dict(row) for row in rows]
+
+    def run_status(self, run_id: int) -> Optional[Dict[str, Any]]:
+        """Run row plus chunk and host counts by state"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM scan_runs WHERE id = ?", (run_id,)).fetchone()
+            if row is None:
+                return None
+            status = dict(row)
+            status['targets'] = json.loads(status['targets'])
+            status['chunk_states'] = dict(conn.execute(
+                "SELECT status, COUNT(*) FROM scan_run_chunks WHERE run_id = ? GROUP BY status", (run_id,)).fetchall())
+            status['host_states'] = dict(conn.execute(
+                "SELECT state, COUNT(*) FROM scan_run_hosts WHERE run_id = ? GROUP BY state", (run_id,)).fetchall())
+        return status
+
+
+class ScanRun:
+    """Handle on one sweep: hands out unfinished chunks and records host progress in batches"""
+
+    def __init__(self, store: ScanCheckpointStore, run_id: int, chunk_size: Optional[int], resumed: bool):
+        self.store = store
+        self.run_id = run_id
+        self.chunk_size = chunk_size
+        self.resumed = resumed
+        self._lock = threading.Lock()
+        self._buffer: Dict[str, str] = {}
+        self._last_flush = time.monotonic()
+
+    # ----------------- Chunks -----------------
+
+    def chunks(self) -> Iterator[ScanChunk]:
+        """Unfinished chunks in order; each is loaded (and its attempt counted) only when reached"""
+        with self.store._connect() as conn:
+            seqs = [row['seq'] for row in conn.execute(
+                "SELECT seq FROM scan_run_chunks WHERE run_id = ? AND status != 'collected' AND attempts < ? "
+                "ORDER BY seq", (self.run_id, self.store.max_chunk_attempts))]
+        for seq in seqs:
+            chunk = self._claim_chunk(seq)
+            if chunk is None:
+                continue
+            if not chunk.ips:  # every host reached a final state before the interruption
+                self.chunk_done(seq)
+                continue
+            yield chunk
+
+    def _claim_chunk(self, seq: int) -> Optional[ScanChunk]:
+        self.flush()
+        conn = self.store._transaction()
+        try:
+            row = conn.execute("SELECT target, status, attempts FROM scan_run_chunks WHERE run_id = ? AND seq = ?",
+                               (self.run_id, seq)).fetchone()
+            if row is None or row['status'] == 'collected':
+                conn.execute("COMMIT")
+                return None
+            conn.execute("UPDATE scan_run_chunks SET attempts = attempts + 1, error = NULL, updated_at = ? "
+                         "WHERE run_id = ? AND seq = ?", (self.store._now_iso(), self.run_id, seq))
+            chunk = ScanChunk(seq=seq, target=row['target'], status=row['status'], attempt=row['attempts'] + 1)
+            for host in conn.execute("SELECT ip, state FROM scan_run_hosts WHERE run_id = ? AND chunk_seq = ? "
+                                     "ORDER BY position", (self.run_id, seq)):
+                if host['state'] == 'pending':
+                    chunk.discover.append(host['ip'])
+                elif host['state'] == 'alive':
+                    chunk.alive.append(host['ip'])
+                else:
+                    chunk.done += 1
+            conn.execute("COMMIT")
+            return chunk
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def chunk_discovered(self, seq: int) -> None:
+        """Discovery finished for the chunk: only its alive hosts remain to collect"""
+        self.flush()
+        with self.store._connect() as conn:
+            conn.execute("UPDATE scan_run_chunks SET status = 'discovered', updated_at = ? "
+                         "WHERE run_id = ? AND seq = ? AND status IN ('pending', 'failed')",
+                         (self.store._now_iso(), self.run_id, seq))
+
+    def chunk_done(self, seq: int, error: Optional[str] = None) -> bool:
+        """Close a chunk: collected once no host is left pending/alive, failed when error is given"""
+        self.flush()
+        now = self.store._now_iso()
+        conn = self.store._transaction()
+        try:
+            states = dict(conn.execute("SELECT state, COUNT(*) FROM scan_run_hosts WHERE run_id = ? AND chunk_seq = ? "
+                                       "GROUP BY state", (self.run_id, seq)).fetchall())
+            remaining = states.get('pending', 0) + states.get('alive', 0)
+            status = 'failed' if error else ('collected' if remaining == 0 else None)
+            if status:
+                conn.execute("UPDATE scan_run_chunks SET status = ?, error = ?, alive = ?, collected = ?, failed = ?, "
+                             "updated_at = ? WHERE run_id = ? AND seq = ?",
+                             (status, error, states.get('alive', 0) + states.get('collected', 0)
+                              + states.get('failed', 0), states.get('collected', 0), states.get('failed', 0),
+                              now, self.run_id, seq))
+            self._update_counters(conn, now)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return status == 'collected'
+
+    def finish(self) -> Dict[str, Any]:
+        """Mark the run completed (chunks that used up their attempts stay failed)"""
+        self.flush()
+        now = self.store._now_iso()
+        conn = self.store._transaction()
+        try:
+            conn.execute("UPDATE scan_run_chunks SET status = 'failed', error = COALESCE(error, 'attempts exhausted'), "
+                         "updated_at = ? WHERE run_id = ? AND status IN ('pending', 'discovered')",
+                         (now, self.run_id))
+            self._update_counters(conn, now)
+            conn.execute("UPDATE scan_runs SET status = 'completed', completed_at = ? WHERE id = ?", (now, self.run_id))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return self.status()
+
+    def _update_counters(self, conn, now: str) -> None:
+        # Totals over closed chunks: cheap per chunk, unlike recounting every host of a /16
+        totals = conn.execute("SELECT COALESCE(SUM(status = 'collected'), 0), COALESCE(SUM(alive), 0), "
+                              "COALESCE(SUM(collected), 0), COALESCE(SUM(failed), 0) FROM scan_run_chunks "
+                              "WHERE run_id = ?", (self.run_id,)).fetchone()
+        conn.execute("UPDATE scan_runs SET chunks_done = ?, alive = ?, collected = ?, failed = ?, updated_at = ? "
+                     "WHERE id = ?", (*totals, now, self.run_id))
+
+    def status(self) -> Dict[str, Any]:
+        return self.store.run_status(self.run_id)
+
+    # ----------------- Hosts -----------------
+
+    def mark(self, ip: str, state: str) -> None:
+        """Record a host's new state; committed with the next batch"""
+        if state not in HOST_STATES:
+            raise ValueError(f"Unknown host state {state!r}; expected one of {HOST_STATES}")
+        with self._lock:
+            self._buffer[ip] = state
+            due = (len(self._buffer) >= self.store.commit_every
+                   or time.monotonic() - self._last_flush >= self.store.commit_interval)
+        if due:
+            self.flush()
+
+    def mark_discovered(self, ip: str, alive: bool) -> None:
+        self.mark(ip, 'alive' if alive else 'dead')
+
+    def mark_collected(self, ip: str, success: bool = True) -> None:
+        self.mark(ip, 'collected' if success else 'failed')
+
+    def flush(self) -> int:
+        """Commit buffered host states in one transaction"""
+        with self._lock:
+            self._last_flush = time.monotonic()
+            if not self._buffer:
+                return 0
+            pending, self._buffer = self._buffer, {}
+            now = self.store._now_iso()
+            conn = self.store._transaction()
+            try:
+                conn.executemany("UPDATE scan_run_hosts SET state = ?, updated_at = ? WHERE run_id = ? AND ip = ?",
+                                 [(state, now, self.run_id, ip) for ip, state in pending.items()])
+                conn.execute("UPDATE scan_runs SET updated_at = ? WHERE id = ?", (now, self.run_id))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                self._buffer = {**pending, **self._buffer}
+                raise
+            finally:
+                conn.close()
+            return len(pending)
+
+    # ----------------- Driver -----------------
+
+    def process(self, discover: Callable[[str], bool], collect: Callable[[str], Any], workers: int = 8,
+                should_stop: Optional[Callable[[], bool]] = None,
+                on_chunk: Optional[Callable[[ScanChunk], None]] = None) -> Dict[str, Any]:
+        """Run discover(ip) -> alive? and collect(ip) -> truthy on success over every unfinished chunk
+
+        Returns the run status; the run stays resumable when should_stop() interrupted it.
+        """
+        should_stop = should_stop or (lambda: False)
+
+        def probe(ip):
+            if should_stop():
+                return
+            try:
+                alive = bool(discover(ip))
+            except Exception:
+                alive = False
+            self.mark_discovered(ip, alive)
+            return ip if alive else None
+
+        def gather(ip):
+            if should_stop():
+                return
+            try:
+                success = bool(collect(ip))
+            except Exception:
+                success = False
+            self.mark_collected(ip, success)
+
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="Checkpointed") as pool:
+            for chunk in self.chunks():
+                if on_chunk is not None:
+                    on_chunk(chunk)
+                alive = chunk.alive + [ip for ip in pool.map(probe, chunk.discover) if ip]
+                if should_stop():
+                    break
+                self.chunk_discovered(chunk.seq)
+                list(pool.map(gather, alive))
+                if should_stop():
+                    break
+                self.chunk_done(chunk.seq)
+        self.flush()
+        if should_stop():
+            return self.status()
+        return self.finish()
+
+
+def benchmark(network: str = '10.0.0.0/16', interrupt_at: float = 0.5, commit_every: int = 50) -> Dict[str, Any]:
+    """Plan a sweep, stop it partway, resume it, and count hosts that were probed twice"""
+    results: Dict[str, Any] = {'network': network, 'commit_every': commit_every}
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ScanCheckpointStore(os.path.join(tmp, 'checkpoints.db'), commit_every=commit_every)
+
+        started = time.perf_counter()
+        run = store.start([network])
+        results['plan_s'] = round(time.perf_counter() - started, 2)
+        planned = run.status()
+        results['hosts'], results['chunks'] = planned['total_hosts'], planned['chunks']
+
+        probed: Dict[str, int] = {}
+        lock = threading.Lock()
+        stop_after = int(planned['total_hosts'] * interrupt_at)
+
+        def discover(ip):
+            with lock:
+                probed[ip] = probed.get(ip, 0) + 1
+            return int(ip.rsplit('.', 1)[1]) % 4 == 0
+
+        started = time.perf_counter()
+        run.process(discover, lambda ip: True, workers=4, should_stop=lambda: len(probed) >= stop_after)
+        first = time.perf_counter() - started
+        results['first_pass'] = {'seconds': round(first, 2), 'probed': len(probed)}
+
+        started = time.perf_counter()
+        resumed = store.start([network])
+        status = resumed.process(discover, lambda ip: True, workers=4)
+        second = time.perf_counter() - started
+
+        results['resume'] = {'seconds': round(second, 2), 'resumed': resumed.resumed,
+                             'hosts_per_s': round((planned['total_hosts'] - results['first_pass']['probed']) / second)
+                             if second else None}
+        results['reprobed'] = sum(1 for count in probed.values() if count > 1)
+        results['status'] = {key: status[key] for key in ('status', 'chunks_done', 'alive', 'collected')}
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Resumable scan checkpoints")
+    parser.add_argument('--db', default='assets.db')
+    parser.add_argument('--status', action='store_true', help="List unfinished scan runs")
+    parser.add_argument('--abandon', type=int, metavar='RUN_ID', help="Stop offering a run for resume")
+    parser.add_argument('--network', default='10.0.0.0/16')
+    parser.add_argument('--commit-every', type=int, default=50)
+    args = parser.parse_args()
+    if args.status or args.abandon:
+        store = ScanCheckpointStore(args.db)
+        if args.abandon:
+            store.abandon(args.abandon)
+        print(json.dumps([store.run_status(run['id']) for run in store.unfinished_runs()], indent=2))
+    else:
+        print(json.dumps(benchmark(args.network, commit_every=args.commit_every), indent=2))
@@ -0,0 +1,724 @@
+#!/usr/bin/env python3
+"""
+⏱️ HEADLESS SCAN SCHEDULER SERVICE
+==================================
+Standalone scheduler for automatic network scans that runs without Qt:
+
+- Min-heap of next-run times; a single timed wait until the earliest due job
+- Per-target overlap policy: skip, queue or coalesce
+- Concurrency budget shared across all schedules
+- Persisted run history and schedule state (SQLite)
+- Deterministic per-target jitter so large subnets do not all start at once
+- Injectable clock for time-travel tests
+
+Embedded by automatic_scanner.AutomaticScanner (desktop GUI) and
+enhanced_scheduled_scan_monitor.ScheduledScanMonitor, controllable from the
+Flask services through register_scheduler_routes(), or run as a daemon
+(optionally serving Prometheus metrics on its own port):
+
+    python scan_scheduler_service.py --config scheduled_scan_config.json --metrics-port 9464
+"""
+
+import hashlib
+import heapq
+import ipaddress
+import itertools
+import json
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from metrics_registry import RUN_BUCKETS, get_metrics_registry
+
+OVERLAP_SKIP = 'skip'
+OVERLAP_QUEUE = 'queue'
+OVERLAP_COALESCE = 'coalesce'
+OVERLAP_POLICIES = (OVERLAP_SKIP, OVERLAP_QUEUE, OVERLAP_COALESCE)
+
+SCAN_RUNS = get_metrics_registry().counter(
+    'scheduler_runs', 'Scheduled scan runs by final status', ('status',))
+SCAN_RUN_DURATION = get_metrics_registry().histogram(
+    'scheduler_run_duration_seconds', 'Wall time of scheduled scan runs', ('status',), buckets=RUN_BUCKETS)
+SCAN_DEVICES_FOUND = get_metrics_registry().counter(
+    'scheduler_devices_found', 'Devices reported by scheduled scan runs')
+SCAN_RUNS_ACTIVE = get_metrics_registry().gauge(
+    'scheduler_runs_active', 'Scheduled scan runs currently executing')
+SCAN_RUNS_WAITING = get_metrics_registry().gauge(
+    'scheduler_runs_waiting', 'Scheduled scan runs waiting for the concurrency budget')
+
+
+# ----------------- Clocks -----------------
+
+class SystemClock:
+    """Wall clock; waits on the scheduler's condition variable"""
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+    def wait(self, condition: threading.Condition, timeout: Optional[float]) -> None:
+        condition.wait(timeout)
+
+
+class FakeClock:
+    """Manually advanced clock for time-travel tests"""
+
+    def __init__(self, start: Optional[datetime] = None):
+        self.current = start or datetime(2025, 1, 6, 0, 0, 0)  # a Monday
+
+    def now(self) -> datetime:
+        return self.current
+
+    def advance(self, **delta) -> datetime:
+        self.current += timedelta(**delta)
+        return self.current
+
+    def wait(self, condition: threading.Condition, timeout: Optional[float]) -> None:
+        condition.wait(0.01)
+
+
+# ----------------- Schedules -----------------
+
+@dataclass
+class ScheduleSpec:
+    """One schedule; fires every enabled target through the shared budget"""
+    id: str
+    name: str
+    kind: str = 'interval'            # interval | daily | weekly | once
+    interval_minutes: int = 60
+    time_of_day: Optional[str] = None  # HH:MM for daily/weekly
+    weekdays: List[int] = field(default_factory=list)  # 0=Monday
+    once_at: Optional[str] = None      # ISO datetime for once
+    targets: List[str] = field(default_factory=list)
+    enabled: bool = True
+    overlap: str = OVERLAP_SKIP
+    jitter_seconds: int = 0
+    split_prefix: Optional[int] = None  # e.g. 24 splits a /16 into /24 runs
+    scan_type: str = 'quick'
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ScheduleSpec':
+        """Accept both this format and scheduled_scan_config.json entries"""
+        kind = data.get('kind') or data.get('type') or data.get('schedule_type') or 'interval'
+        weekdays = data.get('weekdays') or data.get('weekly_days') or []
+        if not weekdays and data.get('weekly_day') is not None:
+            weekdays = [data['weekly_day']]
+        return cls(
+            id=str(data.get('id') or data.get('name')),
+            name=data.get('name') or str(data.get('id')),
+            kind=kind,
+            interval_minutes=int(data.get('interval_minutes') or 60),
+            time_of_day=data.get('time_of_day') or data.get('daily_time') or data.get('weekly_time'),
+            weekdays=list(weekdays),
+            once_at=data.get('once_at') or data.get('once_datetime'),
+            targets=list(data.get('targets') or []),
+            enabled=bool(data.get('enabled', True)),
+            overlap=data.get('overlap', OVERLAP_SKIP),
+            jitter_seconds=int(data.get('jitter_seconds') or 0),
+            split_prefix=data.get('split_prefix'),
+            scan_type=data.get('scan_type', 'quick'),
+        )
+
+
+def _parse_hhmm(value: Optional[str]) -> Tuple[int, int]:
+    hour, minute = (value or '00:00').split(':')[:2]
+    return int(hour), int(minute)
+
+
+def next_run_after(spec: ScheduleSpec, after: datetime,
+                   last_fired: Optional[datetime] = None) -> Optional[datetime]:
+    """Next fire time strictly after `after` (interval: anchored on last_fired)"""
+    if spec.kind == 'interval':
+        interval = timedelta(minutes=max(1, spec.interval_minutes))
+        if last_fired is None:
+            return after
+        due = last_fired + interval
+        return due if due > after else after  # missed runs collapse into one catch-up
+
+    if spec.kind == 'daily':
+        hour, minute = _parse_hhmm(spec.time_of_day)
+        due = after.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        return due if due > after else due + timedelta(days=1)
+
+    if spec.kind == 'weekly':
+        hour, minute = _parse_hhmm(spec.time_of_day)
+        days = sorted(set(spec.weekdays)) or [0]
+        base = after.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        for offset in range(8):
+            candidate = base + timedelta(days=offset)
+            if candidate.weekday() in days and candidate > after:
+                return candidate
+        return None
+
+    if spec.kind == 'once':
+        if not spec.once_at or last_fired is not None:
+            return None
+        return datetime.fromisoformat(spec.once_at)
+
+    return None
+
+
+def expand_targets(targets: List[str], split_prefix: Optional[int]) -> List[str]:
+    """Split CIDR targets larger than split_prefix into smaller subnets"""
+    if not split_prefix:
+        return list(targets)
+    expanded = []
+    for target in targets:
+        try:
+            network = ipaddress.ip_network(target, strict=False)
+        except ValueError:
+            expanded.append(target)
+            continue
+        if network.prefixlen >= split_prefix:
+            expanded.append(str(network))
+        else:
+            expanded.extend(str(subnet) for subnet in network.subnets(new_prefix=split_prefix))
+    return expanded
+
+
+def target_jitter(schedule_id: str, target: str, jitter_seconds: int) -> float:
+    """Stable per-target offset in [0, jitter_seconds] (same across restarts)"""
+    if jitter_seconds <= 0:
+        return 0.0
+    digest = hashlib.sha1(f"{schedule_id}:{target}".encode('utf-8')).hexdigest()
+    return int(digest[:8], 16) % (jitter_seconds * 1000 + 1) / 1000.0
+
+
+# ----------------- Run records / history -----------------
+
+@dataclass
+class ScanRun:
+    schedule_id: str
+    target: str
+    scheduled_at: datetime
+    scan_type: str = 'quick'
+    status: str = 'pending'   # pending | running | succeeded | failed | skipped | coalesced
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    devices_found: int = 0
+    error: Optional[str] = None
+    run_id: Optional[int] = None
+
+
+class RunHistoryStore:
+    """SQLite persistence for run history and last-fired schedule state"""
+
+    def __init__(self, db_path: str = 'assets.db'):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS scan_run_history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    schedule_id TEXT NOT NULL,
+                    target TEXT NOT NULL,
+                    scheduled_at TEXT,
+                    started_at TEXT,
+                    finished_at TEXT,
+                    status TEXT NOT NULL,
+                    devices_found INTEGER DEFAULT 0,
+                    error TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_scan_run_history_schedule "
+                         "ON scan_run_history(schedule_id, scheduled_at)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS scan_schedule_state (
+                    schedule_id TEXT PRIMARY KEY,
+                    last_fired_at TEXT
+                )
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    @staticmethod
+    def _iso(value: Optional[datetime]) -> Optional[str]:
+        return value.isoformat() if value else None
+
+    def record(self, run: ScanRun) -> None:
+        values = (run.schedule_id, run.target, self._iso(run.scheduled_at), self._iso(run.started_at),
+                  self._iso(run.finished_at), run.status, run.devices_found, run.error)
+        with self._lock, self._connect() as conn:
+            if run.run_id is None:
+                cursor = conn.execute(
+                    "INSERT INTO scan_run_history (schedule_id, target, scheduled_at, started_at, "
+                    "finished_at, status, devices_found, error) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", values)
+                run.run_id = cursor.lastrowid
+            else:
+                conn.execute(
+                    "UPDATE scan_run_history SET schedule_id=?, target=?, scheduled_at=?, started_at=?, "
+                    "finished_at=?, status=?, devices_found=?, error=? WHERE id=?", values + (run.run_id,))
+
+    def set_last_fired(self, schedule_id: str, fired_at: datetime) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO scan_schedule_state (schedule_id, last_fired_at) "
+                         "VALUES (?, ?)", (schedule_id, fired_at.isoformat()))
+
+    def last_fired(self) -> Dict[str, datetime]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT schedule_id, last_fired_at FROM scan_schedule_state").fetchall()
+        return {sid: datetime.fromisoformat(ts) for sid, ts in rows if ts}
+
+    def recent(self, limit: int = 50, schedule_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        sql = "SELECT * FROM scan_run_history"
+        params: List[Any] = []
+        if schedule_id:
+            sql += " WHERE schedule_id = ?"
+            params.append(schedule_id)
+        sql += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            return [dict(row) for row in conn.execute(sql, params)]
+
+
+# ----------------- Scheduler service -----------------
+
+# Runner signature: runner(run) -> devices_found (int) or dict with 'devices_found'
+ScanRunner = Callable[[ScanRun], Any]
+
+
+class ScanSchedulerService:
+    """
+    🧭 Heap-based scan scheduler
+
+    Heap entries are (due_timestamp, seq, kind, payload):
+      kind 'fire'   -> a schedule is due; expands into per-target dispatches
+      kind 'target' -> one target run becomes eligible (after jitter)
+    Schedule edits bump a version number so stale heap entries are dropped lazily.
+    """
+
+    def __init__(self, runner: ScanRunner, max_concurrent: int = 2,
+                 db_path: str = 'assets.db', clock=None,
+                 on_event: Optional[Callable[[str, ScanRun], None]] = None):
+        self.runner = runner
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.clock = clock or SystemClock()
+        self.history = RunHistoryStore(db_path)
+        self.on_event = on_event
+
+        self.schedules: Dict[str, ScheduleSpec] = {}
+        self._versions: Dict[str, int] = {}
+        self._next_due: Dict[str, datetime] = {}
+        self._last_fired: Dict[str, datetime] = self.history.last_fired()
+
+        self._heap: List[Tuple[float, int, str, Any]] = []
+        self._seq = itertools.count()
+        self._ready: Deque[ScanRun] = deque()             # waiting for budget
+        self._active: Dict[str, ScanRun] = {}              # target -> running run
+        self._follow_ups: Dict[str, Deque[ScanRun]] = {}   # target -> queued/coalesced runs
+        self._in_flight = 0
+
+        self._cond = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrent,
+                                            thread_name_prefix='scan-run')
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._paused = False
+        self.stats = {'fired': 0, 'dispatched': 0, 'succeeded': 0, 'failed': 0,
+                      'skipped': 0, 'coalesced': 0, 'queued': 0}
+
+    # ----------------- Schedule management (GUI / web control) -----------------
+
+    def add_schedule(self, spec: ScheduleSpec, last_fired: Optional[datetime] = None) -> None:
+        """Add or replace a schedule; last_fired seeds state when none is persisted"""
+        if spec.overlap not in OVERLAP_POLICIES:
+            raise ValueError(f"Unknown overlap policy: {spec.overlap}")
+        with self._cond:
+            if last_fired is not None and spec.id not in self._last_fired:
+                self._last_fired[spec.id] = last_fired
+            self.schedules[spec.id] = spec
+            self._versions[spec.id] = self._versions.get(spec.id, 0) + 1
+            self._schedule_next(spec, self.clock.now())
+            self._cond.notify_all()
+
+    def load_schedules(self, schedules: List[Dict[str, Any]]) -> None:
+        for data in schedules:
+            self.add_schedule(ScheduleSpec.from_dict(data))
+
+    def remove_schedule(self, schedule_id: str) -> bool:
+        with self._cond:
+            if self.schedules.pop(schedule_id, None) is None:
+                return False
+            self._versions[schedule_id] = self._versions.get(schedule_id, 0) + 1
+            self._next_due.pop(schedule_id, None)
+            self._cond.notify_all()
+            return True
+
+    def enable_schedule(self, schedule_id: str, enabled: bool = True) -> bool:
+        with self._cond:
+            spec = self.schedules.get(schedule_id)
+            if spec is None:
+                return False
+            spec.enabled = enabled
+        self.add_schedule(spec)
+        return True
+
+    def trigger_now(self, schedule_id: str) -> bool:
+        """Fire a schedule immediately (manual run) without moving its cadence"""
+        with self._cond:
+            spec = self.schedules.get(schedule_id)
+            if spec is None:
+                return False
+            self._push(self.clock.now(), 'fire', (schedule_id, self._versions[schedule_id], True))
+            self._cond.notify_all()
+            return True
+
+    def pause(self) -> None:
+        with self._cond:
+            self._paused = True
+
+    def resume(self) -> None:
+        with self._cond:
+            self._paused = False
+            self._cond.notify_all()
+
+    # ----------------- Heap helpers -----------------
+
+    def _push(self, due: datetime, kind: str, payload: Any) -> None:
+        heapq.heappush(self._heap, (due.timestamp(), next(self._seq), kind, payload))
+
+    def _schedule_next(self, spec: ScheduleSpec, now: datetime) -> None:
+        if not spec.enabled:
+            self._next_due.pop(spec.id, None)
+            return
+        due = next_run_after(spec, now, self._last_fired.get(spec.id))
+        if due is None:
+            self._next_due.pop(spec.id, None)
+            return
+        self._next_due[spec.id] = due
+        self._push(due, 'fire', (spec.id, self._versions[spec.id], False))
+
+    def seconds_until_next(self) -> Optional[float]:
+        with self._cond:
+            return self._seconds_until_next_locked()
+
+    def _seconds_until_next_locked(self) -> Optional[float]:
+        if not self._heap:
+            return None
+        return max(0.0, self._heap[0][0] - self.clock.now().timestamp())
+
+    # ----------------- Core loop -----------------
+
+    def run_pending(self) -> int:
+        """Process every heap entry due at clock.now(); returns runs started"""
+        with self._cond:
+            if self._paused:
+                return 0
+            now = self.clock.now()
+            now_ts = now.timestamp()
+            while self._heap and self._heap[0][0] <= now_ts:
+                _, _, kind, payload = heapq.heappop(self._heap)
+                if kind == 'fire':
+                    self._fire(payload, now)
+                else:
+                    self._admit(payload)
+            return self._drain_ready()
+
+    def _fire(self, payload: Tuple[str, int, bool], now: datetime) -> None:
+        schedule_id, version, manual = payload
+        spec = self.schedules.get(schedule_id)
+        if spec is None or version != self._versions.get(schedule_id):
+            return  # stale entry from before an edit/removal
+        if not spec.enabled and not manual:
+            return
+
+        self.stats['fired'] += 1
+        for target in expand_targets(spec.targets, spec.split_prefix):
+            run = ScanRun(schedule_id=spec.id, target=target, scheduled_at=now, scan_type=spec.scan_type)
+            offset = target_jitter(spec.id, target, spec.jitter_seconds)
+            if offset:
+                self._push(now + timedelta(seconds=offset), 'target', run)
+            else:
+                self._admit(run)
+
+        if not manual:
+            self._last_fired[spec.id] = now
+            self.history.set_last_fired(spec.id, now)
+            self._schedule_next(spec, now)
+
+    def _admit(self, run: ScanRun) -> None:
+        """Apply the overlap policy for the run's target"""
+        spec = self.schedules.get(run.schedule_id)
+        policy = spec.overlap if spec else OVERLAP_SKIP
+        busy = run.target in self._active or any(r.target == run.target for r in self._ready)
+        if not busy:
+            self._ready.append(run)
+            return
+
+        if policy == OVERLAP_SKIP:
+            self._finish_without_running(run, 'skipped')
+        elif policy == OVERLAP_QUEUE:
+            self._follow_ups.setdefault(run.target, deque()).append(run)
+            self.stats['queued'] += 1
+        else:  # coalesce: at most one pending follow-up per target
+            pending = self._follow_ups.setdefault(run.target, deque())
+            if pending:
+                self._finish_without_running(run, 'coalesced')
+            else:
+                pending.append(run)
+
+    def _finish_without_running(self, run: ScanRun, status: str) -> None:
+        run.status = status
+        run.finished_at = self.clock.now()
+        self.stats[status] += 1
+        SCAN_RUNS.labels(status).inc()
+        self.history.record(run)
+        self._emit('skipped' if status == 'skipped' else 'coalesced', run)
+
+    def _drain_ready(self) -> int:
+        started = 0
+        while self._ready and self._in_flight < self.max_concurrent:
+            run = self._ready.popleft()
+            run.status = 'running'
+            run.started_at = self.clock.now()
+            self._active[run.target] = run
+            self._in_flight += 1
+            self.stats['dispatched'] += 1
+            self.history.record(run)
+            self._executor.submit(self._execute, run)
+            started += 1
+        SCAN_RUNS_ACTIVE.set(self._in_flight)
+        SCAN_RUNS_WAITING.set(len(self._ready))
+        return started
+
+    def _execute(self, run: ScanRun) -> None:
+        self._emit('started', run)
+        started = time.perf_counter()
+        try:
+            result = self.runner(run)
+            if isinstance(result, dict):
+                if result.get('success') is False:
+                    raise RuntimeError(result.get('error') or 'Scan failed')
+                run.devices_found = int(result.get('devices_found', len(result.get('devices', []))))
+            elif isinstance(result, int):
+                run.devices_found = result
+            run.status = 'succeeded'
+        except Exception as e:
+            run.status = 'failed'
+            run.error = str(e)
+        finally:
+            run.finished_at = self.clock.now()
+            SCAN_RUNS.labels(run.status).inc()
+            SCAN_RUN_DURATION.labels(run.status).observe(time.perf_counter() - started)
+            SCAN_DEVICES_FOUND.inc(run.devices_found)
+            self.history.record(run)
+            with self._cond:
+                self.stats[run.status] += 1
+                self._in_flight -= 1
+                self._active.pop(run.target, None)
+                pending = self._follow_ups.get(run.target)
+                if pending:
+                    self._ready.append(pending.popleft())
+                    if not pending:
+                        del self._follow_ups[run.target]
+                self._drain_ready()
+                self._cond.notify_all()
+            self._emit(run.status, run)
+
+    def _emit(self, event: str, run: ScanRun) -> None:
+        if self.on_event:
+            try:
+                self.on_event(event, run)
+            except Exception as e:
+                print(f"Scheduler event callback error: {e}")
+
+    # ----------------- Daemon lifecycle -----------------
+
+    def start(self) -> None:
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._loop, name='ScanScheduler', daemon=True)
+        self._thread.start()
+
+    def _loop(self) -> None:
+        while True:
+            self.run_pending()
+            with self._cond:
+                if not self._running:
+                    return
+                # Single sleep until the earliest due entry (or until notified)
+                timeout = None if self._paused else self._seconds_until_next_locked()
+                if timeout is None or timeout > 0:
+                    self.clock.wait(self._cond, timeout)
+
+    def stop(self, wait: bool = True) -> None:
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(5)
+        self._executor.shutdown(wait=wait)
+
+    def wait_idle(self, timeout: float = 10.0) -> bool:
+        """Block until no run is in flight or waiting (tests / shutdown)"""
+        deadline = threading.Event()
+        timer = threading.Timer(timeout, deadline.set)
+        timer.start()
+        try:
+            with self._cond:
+                while (self._in_flight or self._ready) and not deadline.is_set():
+                    self._cond.wait(0.01)
+                return not (self._in_flight or self._ready)
+        finally:
+            timer.cancel()
+
+    # ----------------- Status -----------------
+
+    def next_runs(self, limit: int = 5) -> List[Dict[str, Any]]:
+        with self._cond:
+            upcoming = sorted(self._next_due.items(), key=lambda item: item[1])[:limit]
+            return [{'id': sid, 'name': self.schedules[sid].name, 'next_run': due.isoformat()}
+                    for sid, due in upcoming if sid in self.schedules]
+
+    def status(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                'running': self._running,
+                'paused': self._paused,
+                'max_concurrent': self.max_concurrent,
+                'in_flight': self._in_flight,
+                'waiting_for_budget': len(self._ready),
+                'active_targets': sorted(self._active),
+                'queued_follow_ups': {t: len(q) for t, q in self._follow_ups.items()},
+                'schedules': [dict(asdict(s), next_run=self._next_due[s.id].isoformat()
+                                   if s.id in self._next_due else None)
+                              for s in self.schedules.values()],
+                'stats': dict(self.stats),
+            }
+
+
+# ----------------- Web control -----------------
+
+def register_scheduler_routes(app, get_service: Callable[[], Optional[ScanSchedulerService]],
+                              url_prefix: str = '/api/scheduler',
+                              decorator: Optional[Callable] = None):
+    """Expose status and control endpoints for the scheduler on a Flask app
+
+    decorator (e.g. the service's access-control wrapper) is applied to every view.
+    """
+    from flask import jsonify, request
+
+    def route(rule, **options):
+        def register(view):
+            return app.route(rule, **options)(decorator(view) if decorator else view)
+        return register
+
+    def _service_or_error():
+        service = get_service()
+        if service is None:
+            return None, (jsonify({'success': False, 'error': 'Scheduler not running'}), 503)
+        return service, None
+
+    @route(f'{url_prefix}/status', endpoint='scheduler_status')
+    def scheduler_status():
+        service, error = _service_or_error()
+        if error:
+            return error
+        return jsonify({'success': True, 'status': service.status(), 'next_runs': service.next_runs()})
+
+    @route(f'{url_prefix}/history', endpoint='scheduler_history')
+    def scheduler_history():
+        service, error = _service_or_error()
+        if error:
+            return error
+        limit = min(int(request.args.get('limit', 50)), 500)
+        return jsonify({'success': True, 'history': service.history.recent(limit, request.args.get('schedule_id'))})
+
+    @route(f'{url_prefix}/schedules/<schedule_id>/<action>', methods=['POST'], endpoint='scheduler_control')
+    def scheduler_control(schedule_id, action):
+        service, error = _service_or_error()
+        if error:
+            return error
+        actions = {
+            'enable': lambda: service.enable_schedule(schedule_id, True),
+            'disable': lambda: service.enable_schedule(schedule_id, False),
+            'run': lambda: service.trigger_now(schedule_id),
+        }
+        if action not in actions:
+            return jsonify({'success': False, 'error': f'Unknown action: {action}'}), 400
+        ok = actions[action]()
+        return jsonify({'success': ok}), (200 if ok else 404)
+
+    @route(f'{url_prefix}/<action>', methods=['POST'], endpoint='scheduler_global_control')
+    def scheduler_global_control(action):
+        service, error = _service_or_error()
+        if error:
+            return error
+        if action == 'pause':
+            service.pause()
+        elif action == 'resume':
+            service.resume()
+        else:
+            return jsonify({'success': False, 'error': f'Unknown action: {action}'}), 400
+        return jsonify({'success': True})
+
+
+# ----------------- Shared instance -----------------
+
+_shared_service: Optional[ScanSchedulerService] = None
+_shared_lock = threading.Lock()
+
+
+def get_scheduler_service() -> Optional[ScanSchedulerService]:
+    """Scheduler running in this process (None until one is started)"""
+    return _shared_service
+
+
+def set_scheduler_service(service: Optional[ScanSchedulerService]) -> None:
+    global _shared_service
+    with _shared_lock:
+        _shared_service = service
+
+
+def default_runner(run: ScanRun) -> Dict[str, Any]:
+    """Headless runner: collect a target with the ultra-fast collector"""
+    import ultra_fast_collector
+    return ultra_fast_collector.collect_all_devices(
+        targets=[run.target], windows_credentials=[], linux_credentials=[],
+        use_snmp=True, use_nmap=True, max_threads=20, excel_file=None,
+        progress_callback=None, log_callback=lambda msg: print(f"📡 [{run.target}] {msg}")
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Headless scan scheduler daemon")
+    parser.add_argument('--config', default='scheduled_scan_config.json')
+    parser.add_argument('--db', default='assets.db')
+    parser.add_argument('--max-concurrent', type=int, default=2)
+    parser.add_argument('--metrics-port', type=int, default=None, help='serve Prometheus metrics on this port')
+    args = parser.parse_args()
+
+    if args.metrics_port:
+        from metrics_registry import start_metrics_server
+        start_metrics_server(args.metrics_port)
+        print(f"📈 Metrics at http://0.0.0.0:{args.metrics_port}/metrics")
+
+    with open(args.config, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+
+    service = ScanSchedulerService(
+        default_runner, max_concurrent=args.max_concurrent, db_path=args.db,
+        on_event=lambda event, run: print(f"⏱️ {event}: {run.schedule_id} → {run.target}")
+    )
+    service.load_schedules(config.get('schedules', []))
+    set_scheduler_service(service)
+    service.start()
+    print(f"⏱️ Scheduler running with {len(service.schedules)} schedules")
+    for item in service.next_runs():
+        print(f"   {item['name']}: {item['next_run']}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        service.stop()
+        print("🛑 Scheduler stopped")
@@ -6,121 +6,32 @@ Updates database to support all the new 100% hardware collection features
 
 import sqlite3
 
+from db.migrations import LATEST_VERSION, current_version, migrate
+
 def update_database_schema():
-    """Add all the new enhanced collection columns to database"""
+    """Bring assets.db up to the latest schema version (enhanced collection columns are migration 3)"""
     
     print("🔧 DATABASE SCHEMA UPDATER")
     print("=" * 40)
     
     conn = sqlite3.connect('assets.db')
-    cursor = conn.cursor()
-    
-    # Get current columns
-    cursor.execute("PRAGMA table_info(assets)")
-    existing_columns = [col[1] for col in cursor.fetchall()]
-    
-    print(f"📊 Current columns: {len(existing_columns)}")
-    
-    # Define new enhanced collection columns
-    new_columns = [
-        # Graphics Cards & Display
-        ('graphics_cards', 'TEXT', 'Graphics card information'),
-        ('gpu_name', 'TEXT', 'Primary GPU name'),
-        ('gpu_memory_gb', 'REAL', 'GPU memory in GB'),
-        ('gpu_driver_version', 'TEXT', 'GPU driver version'),
-        ('monitor_info', 'TEXT', 'Connected monitors information'),
-        ('display_resolution', 'TEXT', 'Display resolution'),
-        ('monitor_count', 'INTEGER', 'Number of connected monitors'),
-        
-        # Enhanced Disk Information  
-        ('disk_info', 'TEXT', 'Formatted disk information (Disk 1 = 250 GB, etc)'),
-        ('disk_space_gb', 'REAL', 'Total disk space in GB'),
-        ('disk_free_gb', 'REAL', 'Free disk space in GB'),
-        ('disk_model', 'TEXT', 'Disk drive model'),
-        ('disk_serial', 'TEXT', 'Disk serial number'),
-        ('disk_type', 'TEXT', 'Disk type (SSD/HDD)'),
-        
-        # Enhanced Processor Information
-        ('processor_threads', 'INTEGER', 'Number of processor threads'),
-        ('processor_cache', 'TEXT', 'Processor cache information'),
-        ('processor_family', 'TEXT', 'Processor family'),
-        ('processor_speed_ghz', 'REAL', 'Processor speed in GHz'),
-        
-        # Enhanced Memory Information
-        ('total_memory_gb', 'REAL', 'Total RAM in GB'),
-        ('memory_modules', 'TEXT', 'Memory module details'),
-        ('memory_slots_used', 'INTEGER', 'Used memory slots'),
-        ('memory_slots_total', 'INTEGER', 'Total memory slots'),
-        
-        # Enhanced Operating System
-        ('os_build', 'TEXT', 'OS build number'),
-        ('os_architecture', 'TEXT', 'OS architecture (32/64 bit)'),
-        ('os_service_pack', 'TEXT', 'OS service pack'),
-        ('os_install_date', 'TEXT', 'OS installation date'),
-        
-        # USB & Peripheral Devices
-        ('usb_devices', 'TEXT', 'Connected USB devices'),
-        ('usb_controllers', 'TEXT', 'USB controller information'),
-        ('audio_devices', 'TEXT', 'Audio devices'),
-        ('bluetooth_devices', 'TEXT', 'Bluetooth devices'),
-        
-        # Network Enhancement
-        ('network_adapters_detailed', 'TEXT', 'Detailed network adapter info'),
-        ('wifi_info', 'TEXT', 'WiFi connection information'),
-        ('ethernet_speed', 'TEXT', 'Ethernet connection speed'),
-        
-        # Hardware Details
-        ('motherboard_serial', 'TEXT', 'Motherboard serial number'),
-        ('chassis_type', 'TEXT', 'Computer chassis type'),
-        ('power_supply', 'TEXT', 'Power supply information'),
-        ('cooling_devices', 'TEXT', 'Cooling devices'),
-        
-        # Enhanced BIOS/UEFI
-        ('bios_date', 'TEXT', 'BIOS release date'),
-        ('bios_vendor', 'TEXT', 'BIOS vendor'),
-        ('uefi_enabled', 'BOOLEAN', 'UEFI firmware enabled'),
-        
-        # System Information
-        ('system_uptime', 'TEXT', 'System uptime'),
-        ('last_boot_time', 'TEXT', 'Last boot time'),
-        ('time_zone', 'TEXT', 'System time zone'),
-        ('domain_workgroup', 'TEXT', 'Domain or workgroup'),
-        
-        # Software Information
-        ('installed_software_count', 'INTEGER', 'Number of installed programs'),
-        ('antivirus_software', 'TEXT', 'Antivirus software'),
-        ('windows_updates', 'TEXT', 'Recent Windows updates'),
-        
-        # Performance Metrics
-        ('cpu_usage_percent', 'REAL', 'CPU usage percentage'),
-        ('memory_usage_percent', 'REAL', 'Memory usage percentage'),
-        ('disk_usage_percent', 'REAL', 'Disk usage percentage'),
-    ]
-    
-    added_count = 0
+    version_before = current_version(conn)
     
-    print("\n🔨 ADDING ENHANCED COLLECTION COLUMNS:")
+    print(f"📊 Current schema version: {version_before} of {LATEST_VERSION}")
     
-    for column_name, column_type, description in new_columns:
-        if column_name not in existing_columns:
-            try:
-                cursor.execute(f"ALTER TABLE assets ADD COLUMN {column_name} {column_type}")
-                print(f"   ✅ Added: {column_name} ({description})")
-                added_count += 1
-            except Exception as e:
-                print(f"   ❌ Failed: {column_name} - {e}")
-        else:
-            print(f"   ⏭️  Exists: {column_name}")
+    print("\n🔨 APPLYING SCHEMA MIGRATIONS:")
     
-    conn.commit()
+    applied = migrate(conn)
+    for record in applied:
+        print(f"   ✅ {record['version']} {record['name']}: {record['columns_added']} columns added")
+    if not applied:
+        print("   ⏭️  Schema already up to date")
     
-    # Get updated column count
-    cursor.execute("PRAGMA table_info(assets)")
-    final_columns = cursor.fetchall()
+    added_count = sum(record['columns_added'] for record in applied)
     
     print("\n📈 SCHEMA UPDATE RESULTS:")
-    print(f"   Columns before: {len(existing_columns)}")
-    print(f"   Columns after: {len(final_columns)}")
+    print(f"   Version before: {version_before}")
+    print(f"   Version after: {current_version(conn)}")
     print(f"   New columns added: {added_count}")
     
     conn.close()
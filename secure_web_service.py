@@ -38,6 +38,21 @@ except ImportError:
     def complete_job(job_id, success, message=""):
         print(f"Job completed: {success}")
 
+# Prometheus /metrics endpoint and per-endpoint request latency
+try:
+    from metrics_registry import install_flask_metrics
+    METRICS_AVAILABLE = True
+except ImportError:
+    METRICS_AVAILABLE = False
+
+# Production serving: inline templates compiled once, gunicorn / waitress workers
+try:
+    from wsgi_serving import render_inline, run_app
+    WSGI_SERVING_AVAILABLE = True
+except ImportError:
+    render_inline = render_template_string
+    WSGI_SERVING_AVAILABLE = False
+
 app = Flask(__name__)
 app.secret_key = 'your-secret-key-change-this-in-production'
 
@@ -141,7 +156,7 @@ def require_access(permissions=None):
 @require_access()
 def index():
     """Main dashboard with login form"""
-    return render_template_string("""
+    return render_inline("""
     <!DOCTYPE html>
     <html>
     <head>
@@ -340,6 +355,9 @@ def index():
     </html>
     """)
 
+if METRICS_AVAILABLE:
+    install_flask_metrics(app, service='secure_web', decorator=require_access(['read']))
+
 # API endpoints
 @app.route('/api/status')
 @require_access()
@@ -573,8 +591,8 @@ def internal_error(error):
         'code': 'INTERNAL_ERROR'
     }), 500
 
-def run_web_service():
-    """Run the secure web service"""
+def run_web_service(production=None):
+    """Run the secure web service (production WSGI server when WEB_SERVICE_MODE=production)"""
     try:
         log_web_service('INFO', f'🔐 Starting secure web service on port {PORT}')
         
@@ -584,7 +602,10 @@ def run_web_service():
             log_web_service('WARNING', '⚠️ Access control system not available - running in basic mode')
         
         # Run Flask app
-        app.run(host='0.0.0.0', port=PORT, debug=False, threaded=True)
+        if WSGI_SERVING_AVAILABLE:
+            run_app(app, host='0.0.0.0', port=PORT, production=production, spec='wsgi:create_app("secure")')
+        else:
+            app.run(host='0.0.0.0', port=PORT, debug=False, threaded=True)
         
     except Exception as e:
         log_web_service('ERROR', f'Failed to start web service: {e}')
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+🧩 SHARDED MULTI-PROCESS COLLECTION EXECUTOR
+===========================================
+Runs device collection across worker processes instead of GIL-bound threads:
+
+- Expanded targets split into per-core shards (round-robin, so dense and
+  sparse subnets are spread evenly)
+- Spawn-context worker processes, each with a small thread pool for network I/O
+- Results and progress streamed back over a per-worker pipe to a single DB
+  writer in the parent (batched, one transaction per batch)
+- Clean cancellation through a shared event
+- Worker-crash recovery: unfinished IPs of a dead worker are re-sharded to a
+  replacement; IPs that keep crashing workers are marked failed
+
+The collect function is given as "module:function" so it can be imported in
+spawned workers; it takes (ip, options) and returns a device dict or None.
+"""
+
+import importlib
+import multiprocessing
+import multiprocessing.connection
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from metrics_registry import observe_db_write
+from rescan_planner import expand_scan_targets
+
+DEFAULT_COLLECT_FUNCTION = 'sharded_collection_executor:collect_device'
+
+
+def _resolve(function_path: str) -> Callable[[str, Dict[str, Any]], Optional[Dict[str, Any]]]:
+    module_name, _, attribute = function_path.partition(':')
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def collect_device(ip: str, options: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Default collector: same port-based detection + hierarchical collection as UltraFastDeviceCollector"""
+    import ultra_fast_collector as ufc
+
+    os_info = ufc._port_based_os_detection(ip)
+    if os_info.get('os_family') == 'Unknown' and not any(
+            ufc._quick_port_check(ip, port, 0.3) for port in (22, 80, 135, 445)):
+        return None  # unreachable
+    credential_cache = None
+    if ufc.CREDENTIAL_AFFINITY_AVAILABLE and options.get('credential_affinity', True):
+        credential_cache = ufc.get_credential_cache(options.get('db_path', 'assets.db'))
+    device = ufc._enhanced_device_collection(
+        ip, os_info,
+        win_creds=options.get('win_creds'),
+        linux_creds=options.get('linux_creds'),
+        snmp_communities=options.get('snmp_v2c'),
+        credential_cache=credential_cache,
+    )
+    if device is not None:
+        device.setdefault('ip_address', ip)
+    return device
+
+
+def shard_targets(ips: List[str], shard_count: int) -> List[List[str]]:
+    shard_count = max(1, min(shard_count, len(ips)))
+    return [ips[i::shard_count] for i in range(shard_count)]
+
+
+# ----------------- Worker process -----------------
+
+def _shard_worker(worker_id: int, ips: List[str], collect_function: str, options: Dict[str, Any],
+                  threads: int, conn, cancel_event) -> None:
+    """Entry point of a worker process; everything goes back over its own pipe"""
+    send_lock = threading.Lock()
+
+    def send(message) -> None:
+        with send_lock:
+            conn.send(message)
+
+    try:
+        collect = _resolve(collect_function)
+    except Exception as e:
+        send(('log', worker_id, f"❌ Worker {worker_id} cannot load {collect_function}: {e}"))
+        send(('done', worker_id))
+        return
+
+    def collect_one(ip: str):
+        if cancel_event.is_set():
+            return
+        send(('start', worker_id, ip))
+        try:
+            send(('result', worker_id, ip, collect(ip, options), None))
+        except Exception as e:
+            send(('result', worker_id, ip, None, str(e)))
+
+    with ThreadPoolExecutor(max_workers=max(1, threads), thread_name_prefix=f"Shard{worker_id}") as pool:
+        for _ in pool.map(collect_one, ips):
+            pass
+    send(('done', worker_id))
+    conn.close()
+
+
+# ----------------- Parent-side DB writer -----------------
+
+class AssetBatchWriter:
+    """Single writer: upserts device dicts into assets by ip_address, one transaction per batch"""
+
+    def __init__(self, db_path: str = 'assets.db'):
+        self.db_path = db_path
+        self._columns: Optional[Set[str]] = None
+
+    def write(self, devices: List[Dict[str, Any]]) -> int:
+        if not devices:
+            return 0
+        started = time.perf_counter()
+        with sqlite3.connect(self.db_path, timeout=30) as conn:
+            written = self.upsert(conn, devices)
+        observe_db_write('sharded_writer', written, time.perf_counter() - started)
+        return written
+
+    def upsert(self, conn: sqlite3.Connection, devices: List[Dict[str, Any]]) -> int:
+        """Upsert within the caller's transaction"""
+        if self._columns is None:
+            self._columns = {row[1] for row in conn.execute("PRAGMA table_info(assets)")}
+        written = 0
+        for device in devices:
+            data = {k: v for k, v in device.items() if k in self._columns and k != 'id'
+                    and not isinstance(v, (dict, list))}
+            ip = data.get('ip_address')
+            if not ip:
+                continue
+            columns = list(data)
+            updated = conn.execute(
+                f"UPDATE assets SET {', '.join(f'{c} = ?' for c in columns)} WHERE ip_address = ?",
+                [data[c] for c in columns] + [ip]).rowcount
+            if not updated:
+                conn.execute(f"INSERT INTO assets ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                             [data[c] for c in columns])
+            written += 1
+        return written
+
+
+# ----------------- Parent-side executor -----------------
+
+@dataclass
+class ShardedRunResult:
+    total: int = 0
+    collected: int = 0
+    unreachable: int = 0
+    failed: Dict[str, str] = field(default_factory=dict)
+    written: int = 0
+    crashed_workers: int = 0
+    cancelled: bool = False
+    elapsed: float = 0.0
+
+
+class ShardedCollectionExecutor:
+    """
+    🚀 Process-sharded collection with a single parent-side writer
+
+    result_sink(devices) is called in the parent with batches of device dicts.
+    progress_callback(percent, done, total) and log_callback(message) are also
+    called in the parent (from the thread that called run()).
+    """
+
+    def __init__(self, collect_function: str = DEFAULT_COLLECT_FUNCTION,
+                 options: Optional[Dict[str, Any]] = None,
+                 workers: Optional[int] = None,
+                 threads_per_worker: int = 8,
+                 result_sink: Optional[Callable[[List[Dict[str, Any]]], int]] = None,
+                 progress_callback: Optional[Callable[[int, int, int], None]] = None,
+                 log_callback: Optional[Callable[[str], None]] = None,
+                 batch_size: int = 100,
+                 flush_interval: float = 0.5,
+                 max_ip_attempts: int = 2,
+                 start_method: str = 'spawn'):
+        self.collect_function = collect_function
+        self.options = options or {}
+        self.workers = workers or os.cpu_count() or 2
+        self.threads_per_worker = threads_per_worker
+        self.result_sink = result_sink or AssetBatchWriter().write
+        self.progress_callback = progress_callback
+        self.log_callback = log_callback
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_ip_attempts = max_ip_attempts
+        self._ctx = multiprocessing.get_context(start_method)
+        self._cancel_event = self._ctx.Event()
+
+    def cancel(self) -> None:
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def _log(self, message: str) -> None:
+        if self.log_callback:
+            self.log_callback(message)
+
+    def run(self, targets: Iterable[str]) -> ShardedRunResult:
+        started = time.perf_counter()
+        ips = expand_scan_targets(targets)
+        result = ShardedRunResult(total=len(ips))
+        if not ips:
+            return result
+
+        # One pipe per worker: a crashing worker can only break its own channel
+        readers: Dict[Any, int] = {}
+        processes: Dict[int, Any] = {}
+        remaining: Dict[int, Dict[str, None]] = {}
+        in_flight: Dict[int, Set[str]] = {}
+        finished: Set[int] = set()
+        attempts: Dict[str, int] = {}
+        batch: List[Dict[str, Any]] = []
+        done_ips: Set[str] = set()
+        next_id = iter(range(1_000_000))
+        last_flush = time.perf_counter()
+
+        def spawn(shard: List[str]) -> None:
+            worker_id = next(next_id)
+            remaining[worker_id] = dict.fromkeys(shard)
+            in_flight[worker_id] = set()
+            reader, writer = self._ctx.Pipe(duplex=False)
+            process = self._ctx.Process(
+                target=_shard_worker, name=f"CollectorShard-{worker_id}", daemon=True,
+                args=(worker_id, shard, self.collect_function, self.options,
+                      self.threads_per_worker, writer, self._cancel_event))
+            process.start()
+            writer.close()  # parent keeps only the read end, so EOF means the worker is gone
+            processes[worker_id] = process
+            readers[reader] = worker_id
+
+        def flush() -> None:
+            nonlocal last_flush
+            if batch:
+                result.written += self.result_sink(list(batch)) or 0
+                batch.clear()
+            last_flush = time.perf_counter()
+
+        def handle(message) -> None:
+            kind, worker_id = message[0], message[1]
+            if kind == 'start':
+                in_flight[worker_id].add(message[2])
+            elif kind == 'result':
+                _, _, ip, device, error = message
+                in_flight[worker_id].discard(ip)
+                remaining[worker_id].pop(ip, None)
+                if ip in done_ips:
+                    return
+                done_ips.add(ip)
+                if error:
+                    result.failed[ip] = error
+                elif device is None:
+                    result.unreachable += 1
+                else:
+                    result.collected += 1
+                    batch.append(device)
+                if self.progress_callback:
+                    self.progress_callback(int(len(done_ips) * 100 / result.total), len(done_ips), result.total)
+            elif kind == 'log':
+                self._log(message[2])
+            elif kind == 'done':
+                finished.add(worker_id)
+
+        def worker_gone(worker_id: int) -> None:
+            process = processes[worker_id]
+            process.join(1)
+            if worker_id in finished:
+                return
+            finished.add(worker_id)
+            if self.cancelled:
+                return
+            result.crashed_workers += 1
+            self._log(f"⚠️ Collector shard {worker_id} died (exit code {process.exitcode}); re-sharding")
+            for ip in in_flight[worker_id]:
+                attempts[ip] = attempts.get(ip, 0) + 1
+                if attempts[ip] >= self.max_ip_attempts:
+                    done_ips.add(ip)
+                    result.failed[ip] = f"worker crashed {attempts[ip]} times"
+            leftovers = [ip for ip in remaining[worker_id] if ip not in done_ips]
+            if leftovers:
+                spawn(leftovers)
+
+        def poll(timeout: float) -> None:
+            for reader in multiprocessing.connection.wait(list(readers), timeout):
+                worker_id = readers[reader]
+                try:
+                    while True:
+                        handle(reader.recv())
+                        if not reader.poll():
+                            break
+                except (EOFError, OSError):
+                    del readers[reader]
+                    reader.close()
+                    worker_gone(worker_id)
+
+        for shard in shard_targets(ips, self.workers):
+            spawn(shard)
+        self._log(f"🧩 Collecting {len(ips)} IPs across {len(processes)} worker processes")
+
+        cancel_deadline = 0.0
+        try:
+            while readers:
+                poll(0.1)
+                if len(batch) >= self.batch_size or time.perf_counter() - last_flush >= self.flush_interval:
+                    flush()
+                if self.cancelled and not result.cancelled:
+                    result.cancelled = True
+                    cancel_deadline = time.perf_counter() + 5
+                if result.cancelled and time.perf_counter() > cancel_deadline:
+                    for process in processes.values():
+                        if process.is_alive():
+                            process.terminate()
+        finally:
+            flush()
+            for reader in readers:
+                reader.close()
+            for process in processes.values():
+                process.join(1)
+                if process.is_alive():
+                    process.kill()
+
+        result.elapsed = time.perf_counter() - started
+        return result
+
+
+def run_threaded_collection(targets: Iterable[str], collect_function: str, options: Optional[Dict[str, Any]] = None,
+                            threads: int = 32,
+                            result_sink: Optional[Callable[[List[Dict[str, Any]]], int]] = None) -> ShardedRunResult:
+    """Reference single-process threaded path (what UltraFastDeviceCollector does), for benchmarks"""
+    started = time.perf_counter()
+    ips = expand_scan_targets(targets)
+    collect = _resolve(collect_function)
+    result = ShardedRunResult(total=len(ips))
+    lock = threading.Lock()
+    devices: List[Dict[str, Any]] = []
+
+    def collect_one(ip):
+        try:
+            device = collect(ip, options or {})
+        except Exception as e:
+            with lock:
+                result.failed[ip] = str(e)
+            return
+        with lock:
+            if device is None:
+                result.unreachable += 1
+            else:
+                result.collected += 1
+                devices.append(device)
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(collect_one, ips))
+    if result_sink:
+        result.written = result_sink(devices) or 0
+    result.elapsed = time.perf_counter() - started
+    return result
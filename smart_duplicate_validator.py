@@ -6,10 +6,14 @@ Real-time validation during collection with enterprise-grade duplicate detection
 
 import sqlite3
 import hashlib
+import time
 from datetime import datetime
 from typing import Dict
 import json
 
+from collection_tracing import traced
+from metrics_registry import observe_db_write, time_duplicate_detection
+
 class SmartDuplicateValidator:
     """Enterprise-grade duplicate prevention system"""
     
@@ -44,6 +48,7 @@ class SmartDuplicateValidator:
         fingerprint_string = json.dumps(clean_data, sort_keys=True)
         return hashlib.md5(fingerprint_string.encode()).hexdigest()
 
+    @traced('duplicate_check', outcome=lambda check: check.get('action', 'insert'))
     def check_for_duplicates(self, device_data: Dict) -> Dict:
         """
         Advanced duplicate detection with multiple validation levels
@@ -191,7 +196,8 @@ class SmartDuplicateValidator:
         cursor = conn.cursor()
         
         # Check for duplicates
-        duplicate_check = self.check_for_duplicates(device_data)
+        with time_duplicate_detection('smart_validator'):
+            duplicate_check = self.check_for_duplicates(device_data)
         
         # Add metadata
         device_data['device_fingerprint'] = self.generate_device_fingerprint(device_data)
@@ -206,6 +212,7 @@ class SmartDuplicateValidator:
             'duplicate_info': duplicate_check
         }
         
+        write_started = time.perf_counter()
         try:
             if duplicate_check['action'] == 'insert':
                 # Insert new device
@@ -247,7 +254,7 @@ class SmartDuplicateValidator:
                 
                 if update_fields:
                     update_values.append(existing_id)
-                    query = f"UPDATE assets SET {\', \'.join(update_fields)} WHERE id = ?"  # NOTE: Safe - fields from schema
+                    query = f"UPDATE assets SET {', '.join(update_fields)} WHERE id = ?"  # NOTE: Safe - fields from schema
                     cursor.execute(query, update_values)
                 
                 result.update({
@@ -284,7 +291,7 @@ class SmartDuplicateValidator:
                         update_values.append(value)
                 
                 update_values.append(existing_id)
-                query = f"UPDATE assets SET {\', \'.join(update_fields)} WHERE id = ?"  # NOTE: Safe - fields from schema
+                query = f"UPDATE assets SET {', '.join(update_fields)} WHERE id = ?"  # NOTE: Safe - fields from schema
                 cursor.execute(query, update_values)
                 
                 result.update({
@@ -294,6 +301,7 @@ class SmartDuplicateValidator:
                 })
             
             conn.commit()
+            observe_db_write('smart_validator', 1, time.perf_counter() - write_started)
             
         except Exception as e:
             conn.rollback()
@@ -32,6 +32,7 @@ SPEED BENEFITS:
 """
 
 import time
+import shlex
 import socket
 import subprocess
 import platform
@@ -41,6 +42,12 @@ import ipaddress
 import re
 from dataclasses import dataclass
 
+try:
+    from adaptive_network_controller import OPEN, TIMEOUT, get_network_controller
+    NETWORK_CONTROLLER_AVAILABLE = True
+except ImportError:
+    NETWORK_CONTROLLER_AVAILABLE = False
+
 @dataclass
 class QuickCheckResult:
     """Quick initial validation result"""
@@ -99,23 +106,32 @@ class SmartMultiValidator:
             'time_saved': 0,
             'phase_times': {},
         }
+        
+        # Per-/24 adaptive timeouts shared with the collectors (fixed config values are the fallback)
+        self.network_controller = get_network_controller() if NETWORK_CONTROLLER_AVAILABLE else None
+
+    def _quick_timeout(self, ip: str, key: str) -> float:
+        if self.network_controller is None:
+            return self.config[key]
+        return self.network_controller.discovery_timeout_for(ip)
 
     def lightning_fast_ping(self, ip: str) -> Tuple[bool, float, str]:
         """Lightning-fast ping check optimized for speed"""
         start_time = time.time()
+        quick_timeout = self._quick_timeout(ip, 'quick_ping_timeout')
         
         try:
             # Use fastest ping method available
             if platform.system().lower() == "windows":
                 # Windows: Single ping with minimal timeout
-                cmd = f"ping -n 1 -w {int(self.config['quick_ping_timeout']*1000)} {ip}"
+                cmd = f"ping -n 1 -w {int(quick_timeout*1000)} {ip}"
             else:
                 # Linux/Mac: Single ping with minimal timeout
-                cmd = f"ping -c 1 -W {int(self.config['quick_ping_timeout'])} {ip}"
+                cmd = f"ping -c 1 -W {int(quick_timeout)} {ip}"
             
-            result = subprocess.run(cmd, shell=False  # SECURITY FIX: was shell=True,
+            result = subprocess.run(shlex.split(cmd),
                 capture_output=True,
-                timeout=self.config['quick_ping_timeout'] * 2,
+                timeout=quick_timeout * 2,
                 text=True
             )
             
@@ -129,12 +145,18 @@ class SmartMultiValidator:
                 else:
                     time_match = re.search(r'time=([\d.]+)', result.stdout)
                     ping_time = float(time_match.group(1)) if time_match else 50.0
+                if self.network_controller is not None and time_match:
+                    self.network_controller.record(ip, OPEN, float(ping_time) / 1000)
                 
                 return True, response_time, f"Ping success: {ping_time}ms"
             else:
+                if self.network_controller is not None:
+                    self.network_controller.record(ip, TIMEOUT)
                 return False, response_time, "Ping failed"
                 
         except subprocess.TimeoutExpired:
+            if self.network_controller is not None:
+                self.network_controller.record(ip, TIMEOUT)
             return False, time.time() - start_time, "Ping timeout"
         except Exception as e:
             return False, time.time() - start_time, f"Ping error: {str(e)}"
@@ -147,6 +169,11 @@ class SmartMultiValidator:
         quick_ports = [80, 443, 22, 135, 445, 3389, 23, 21]
         
         for port in quick_ports:
+            if self.network_controller is not None:
+                # AIMD-gated connect with the subnet's adaptive timeout
+                if self.network_controller.tcp_probe(ip, port):
+                    return True, time.time() - start_time, f"TCP port {port} open"
+                continue
             try:
                 sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
                 sock.settimeout(self.config['quick_tcp_timeout'])
@@ -346,7 +373,7 @@ class SmartMultiValidator:
         # Method 1: Extended ping
         try:
             cmd = f"ping -n 3 -w 2000 {ip}" if platform.system().lower() == "windows" else f"ping -c 3 -W 2 {ip}"
-            result = subprocess.run(cmd, shell=False  # SECURITY FIX: was shell=True, capture_output=True, timeout=5, text=True)
+            result = subprocess.run(shlex.split(cmd), capture_output=True, timeout=5, text=True)
             methods_used.append("EXTENDED_PING")
             if result.returncode == 0:
                 confirmations['alive'] += 1
@@ -379,11 +406,7 @@ class SmartMultiValidator:
         # Method 3: ARP check (Windows)
         try:
             if platform.system().lower() == "windows":
-                result = # SECURITY FIX: Converted shell=True to secure command list
-            # Original: subprocess.run(f"arp -a {ip}", shell=True
-            # TODO: Convert f-string command to secure list format
-            # Example: ["ping", "-n", "1", ip] instead of f"ping -n 1 {ip}"
-            subprocess.run(f"arp -a {ip}", shell=False  # SECURITY: shell=False prevents injection, capture_output=True, timeout=3, text=True)
+                result = subprocess.run(["arp", "-a", ip], capture_output=True, timeout=3, text=True)
                 methods_used.append("ARP_CHECK")
                 if result.returncode == 0 and ip in result.stdout:
                     confirmations['alive'] += 1
@@ -0,0 +1,581 @@
+#!/usr/bin/env python3
+"""
+🗺️ SNMP NEIGHBOR DISCOVERY
+==========================
+Enumerate live hosts from the tables routers and L3 switches already keep,
+instead of sending ICMP / TCP probes to every address of every CIDR:
+
+- ARP: ipNetToMediaTable (falls back to ipNetToPhysicalTable) -> IP, MAC, ifIndex
+- FDB: dot1dTpFdbTable (falls back to Q-BRIDGE dot1qTpFdbTable) -> MAC, port, VLAN
+- ipAddrTable netmasks -> the subnets a gateway is directly connected to
+
+Tables are walked with GETBULK (GETNEXT for SNMPv1) by a small built-in BER
+client, so a 10k-entry ARP table is a few hundred round trips. Each scan builds
+a fresh live-host set: IP + MAC + last-seen switch port. Target subnets covered
+by a gateway that answered go straight to detection/collection; only subnets
+without a (reachable) gateway fall back to active probing.
+
+Gateways come from credentials['snmp_gateways'] or snmp_gateways.json:
+
+    [{"host": "10.0.21.1", "community": "public", "subnets": ["10.0.21.0/24"]},
+     {"host": "10.0.0.2", "arp": false}]          # pure L2 switch: FDB only
+
+    python snmp_neighbor_discovery.py 10.0.21.1 --community public --targets 10.0.21.0/24
+"""
+
+import argparse
+import ipaddress
+import json
+import logging
+import os
+import random
+import socket
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+GATEWAY_CONFIG_FILE = 'snmp_gateways.json'
+
+# ----------------- OIDs -----------------
+
+OID = Tuple[int, ...]
+
+
+def parse_oid(text) -> OID:
+    if isinstance(text, tuple):
+        return text
+    return tuple(int(arc) for arc in str(text).strip('.').split('.'))
+
+
+IP_NET_TO_MEDIA_PHYS = parse_oid('1.3.6.1.2.1.4.22.1.2')        # .ifIndex.a.b.c.d = MAC
+IP_NET_TO_PHYSICAL_PHYS = parse_oid('1.3.6.1.2.1.4.35.1.4')     # .ifIndex.type.len.addr = MAC
+IP_AD_ENT_NET_MASK = parse_oid('1.3.6.1.2.1.4.20.1.3')          # .a.b.c.d = mask
+DOT1D_TP_FDB_PORT = parse_oid('1.3.6.1.2.1.17.4.3.1.2')         # .mac(6) = bridge port
+DOT1Q_TP_FDB_PORT = parse_oid('1.3.6.1.2.1.17.7.1.2.2.1.2')     # .fdbId.mac(6) = bridge port
+DOT1D_BASE_PORT_IF_INDEX = parse_oid('1.3.6.1.2.1.17.1.4.1.2')  # .bridgePort = ifIndex
+IF_NAME = parse_oid('1.3.6.1.2.1.31.1.1.1.1')                   # .ifIndex = name
+SYS_NAME = parse_oid('1.3.6.1.2.1.1.5.0')
+
+# ----------------- BER codec (SNMPv1/v2c messages) -----------------
+
+INTEGER, OCTET_STRING, NULL, OBJECT_IDENTIFIER, SEQUENCE = 0x02, 0x04, 0x05, 0x06, 0x30
+IP_ADDRESS, COUNTER32, GAUGE32, TIMETICKS, OPAQUE, COUNTER64 = 0x40, 0x41, 0x42, 0x43, 0x44, 0x46
+GET, GET_NEXT, RESPONSE, SET, GET_BULK = 0xA0, 0xA1, 0xA2, 0xA3, 0xA5
+NO_SUCH_OBJECT_TAG, NO_SUCH_INSTANCE_TAG, END_OF_MIB_VIEW_TAG = 0x80, 0x81, 0x82
+
+ERROR_TOO_BIG, ERROR_NO_SUCH_NAME = 1, 2
+
+
+class _Marker:
+    __slots__ = ('name',)
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __repr__(self):
+        return self.name
+
+
+NO_SUCH_OBJECT = _Marker('noSuchObject')
+NO_SUCH_INSTANCE = _Marker('noSuchInstance')
+END_OF_MIB_VIEW = _Marker('endOfMibView')
+_MARKERS = {NO_SUCH_OBJECT_TAG: NO_SUCH_OBJECT, NO_SUCH_INSTANCE_TAG: NO_SUCH_INSTANCE,
+            END_OF_MIB_VIEW_TAG: END_OF_MIB_VIEW}
+_MARKER_TAGS = {marker: tag for tag, marker in _MARKERS.items()}
+
+
+class SnmpError(Exception):
+    pass
+
+
+class SnmpTimeout(SnmpError):
+    pass
+
+
+def _length(n: int) -> bytes:
+    if n < 0x80:
+        return bytes([n])
+    raw = n.to_bytes((n.bit_length() + 7) // 8, 'big')
+    return bytes([0x80 | len(raw)]) + raw
+
+
+def _tlv(tag: int, payload: bytes) -> bytes:
+    return bytes([tag]) + _length(len(payload)) + payload
+
+
+def _encode_oid(oid: OID) -> bytes:
+    body = bytearray()
+    for arc in (oid[0] * 40 + oid[1],) + tuple(oid[2:]):
+        chunk = [arc & 0x7F]
+        arc >>= 7
+        while arc:
+            chunk.append(0x80 | (arc & 0x7F))
+            arc >>= 7
+        body.extend(reversed(chunk))
+    return _tlv(OBJECT_IDENTIFIER, bytes(body))
+
+
+def encode_value(value) -> bytes:
+    """
+    Python value -> BER: int -> INTEGER, bytes/str -> OCTET STRING, OID tuple,
+    None -> NULL, markers -> exception values, (tag, value) for typed
+    application values such as (IP_ADDRESS, '10.0.0.1') or (GAUGE32, 7)
+    """
+    if value is None:
+        return _tlv(NULL, b'')
+    if isinstance(value, _Marker):
+        return _tlv(_MARKER_TAGS[value], b'')
+    if isinstance(value, bool) or isinstance(value, int):
+        return _tlv(INTEGER, int(value).to_bytes(max(1, (int(value).bit_length() + 8) // 8), 'big', signed=True))
+    if isinstance(value, str):
+        value = value.encode('utf-8')
+    if isinstance(value, (bytes, bytearray)):
+        return _tlv(OCTET_STRING, bytes(value))
+    if isinstance(value, tuple) and len(value) == 2 and isinstance(value[0], int) and value[0] >= IP_ADDRESS:
+        tag, inner = value
+        if tag == IP_ADDRESS:
+            return _tlv(tag, socket.inet_aton(inner))
+        if tag == OPAQUE:
+            return _tlv(tag, bytes(inner))
+        return _tlv(tag, int(inner).to_bytes(max(1, (int(inner).bit_length() + 8) // 8), 'big'))
+    if isinstance(value, tuple):
+        return _encode_oid(value)
+    raise TypeError(f"Cannot BER-encode {value!r}")
+
+
+def encode_message(version: int, community: str, pdu_type: int, request_id: int,
+                   varbinds: Sequence[Tuple[OID, object]], error_status: int = 0, error_index: int = 0) -> bytes:
+    """SNMP message; for GETBULK error_status/error_index carry non-repeaters/max-repetitions"""
+    bindings = b''.join(_tlv(SEQUENCE, _encode_oid(oid) + encode_value(value)) for oid, value in varbinds)
+    pdu = _tlv(pdu_type, encode_value(request_id) + encode_value(error_status) + encode_value(error_index)
+               + _tlv(SEQUENCE, bindings))
+    return _tlv(SEQUENCE, encode_value(version) + encode_value(community) + pdu)
+
+
+def _header(data: bytes, offset: int) -> Tuple[int, int, int]:
+    """(tag, content start, content end) of the TLV at offset"""
+    if offset + 2 > len(data):
+        raise SnmpError('truncated BER header')
+    tag, length = data[offset], data[offset + 1]
+    offset += 2
+    if length & 0x80:
+        count = length & 0x7F
+        if not 0 < count <= 4 or offset + count > len(data):
+            raise SnmpError('bad BER length')
+        length = int.from_bytes(data[offset:offset + count], 'big')
+        offset += count
+    if offset + length > len(data):
+        raise SnmpError('truncated BER value')
+    return tag, offset, offset + length
+
+
+def _decode_oid(raw: bytes) -> OID:
+    arcs, value = [], 0
+    for byte in raw:
+        value = (value << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            arcs.append(value)
+            value = 0
+    if not arcs:
+        raise SnmpError('empty OID')
+    first = arcs[0]
+    head = (first // 40, first % 40) if first < 80 else (2, first - 80)
+    return head + tuple(arcs[1:])
+
+
+def _decode_value(tag: int, raw: bytes):
+    if tag == INTEGER:
+        return int.from_bytes(raw, 'big', signed=True) if raw else 0
+    if tag in (OCTET_STRING, OPAQUE):
+        return raw
+    if tag == NULL:
+        return None
+    if tag == OBJECT_IDENTIFIER:
+        return _decode_oid(raw)
+    if tag == IP_ADDRESS:
+        if len(raw) != 4:
+            raise SnmpError('bad IpAddress')
+        return socket.inet_ntoa(raw)
+    if tag in (COUNTER32, GAUGE32, TIMETICKS, COUNTER64):
+        return int.from_bytes(raw, 'big')
+    if tag in _MARKERS:
+        return _MARKERS[tag]
+    return raw
+
+
+def decode_message(data: bytes) -> Dict:
+    """-> {'version', 'community', 'pdu_type', 'request_id', 'error_status', 'error_index', 'varbinds'}"""
+    tag, start, end = _header(data, 0)
+    if tag != SEQUENCE:
+        raise SnmpError('not an SNMP message')
+    fields = []
+    offset = start
+    for _ in range(2):
+        tag, value_start, offset = _header(data, offset)
+        fields.append(_decode_value(tag, data[value_start:offset]))
+    pdu_type, offset, pdu_end = _header(data, offset)
+    header = []
+    for _ in range(3):
+        tag, value_start, offset = _header(data, offset)
+        header.append(_decode_value(tag, data[value_start:offset]))
+    tag, offset, bindings_end = _header(data, offset)
+    varbinds = []
+    while offset < bindings_end:
+        _, binding_start, binding_end = _header(data, offset)
+        tag, oid_start, oid_end = _header(data, binding_start)
+        if tag != OBJECT_IDENTIFIER:
+            raise SnmpError('varbind without OID')
+        value_tag, value_start, value_end = _header(data, oid_end)
+        varbinds.append((_decode_oid(data[oid_start:oid_end]), _decode_value(value_tag, data[value_start:value_end])))
+        offset = binding_end
+    return {'version': fields[0], 'community': fields[1].decode('utf-8', 'replace'), 'pdu_type': pdu_type,
+            'request_id': header[0], 'error_status': header[1], 'error_index': header[2], 'varbinds': varbinds}
+
+
+# ----------------- Client -----------------
+
+class SnmpBulkClient:
+    """Table walks for SNMPv1 (GETNEXT) and v2c (GETBULK) over one UDP socket"""
+
+    def __init__(self, host: str, community: str = 'public', version: str = '2c', port: int = 161,
+                 timeout: float = 2.0, retries: int = 1, max_repetitions: int = 50):
+        self.host = host
+        self.community = community
+        self.version = 0 if str(version) == '1' else 1
+        self.port = port
+        self.timeout = timeout
+        self.retries = retries
+        self.max_repetitions = max_repetitions
+        self.requests = 0
+        self._sock: Optional[socket.socket] = None
+
+    def close(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _request(self, pdu_type: int, varbinds, non_repeaters: int = 0, max_repetitions: int = 0) -> Dict:
+        if self._sock is None:
+            self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._sock.connect((self.host, self.port))
+        request_id = random.randint(1, 0x7FFFFFFF)
+        message = encode_message(self.version, self.community, pdu_type, request_id, varbinds,
+                                 non_repeaters, max_repetitions)
+        for _ in range(self.retries + 1):
+            self.requests += 1
+            self._sock.send(message)
+            deadline = time.monotonic() + self.timeout
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._sock.settimeout(remaining)
+                try:
+                    reply = decode_message(self._sock.recv(65535))
+                except socket.timeout:
+                    break
+                except ConnectionRefusedError as e:
+                    raise SnmpError(f"{self.host}:{self.port} refused SNMP") from e
+                except SnmpError as e:
+                    logger.debug(f"Ignoring malformed SNMP reply from {self.host}: {e}")
+                    continue
+                if reply['request_id'] == request_id and reply['pdu_type'] == RESPONSE:
+                    return reply
+        raise SnmpTimeout(f"No SNMP response from {self.host}:{self.port} after {self.retries + 1} attempts")
+
+    def get(self, oid) -> object:
+        reply = self._request(GET, [(parse_oid(oid), None)])
+        if reply['error_status']:
+            return NO_SUCH_OBJECT
+        return reply['varbinds'][0][1] if reply['varbinds'] else NO_SUCH_OBJECT
+
+    def walk(self, root) -> Iterator[Tuple[OID, object]]:
+        """(oid, value) for every instance under root, in OID order"""
+        root = parse_oid(root)
+        current = root
+        repetitions = self.max_repetitions
+        while True:
+            if self.version == 0:
+                reply = self._request(GET_NEXT, [(current, None)])
+            else:
+                reply = self._request(GET_BULK, [(current, None)], 0, repetitions)
+            if reply['error_status'] == ERROR_TOO_BIG and repetitions > 1:
+                repetitions = max(1, repetitions // 2)
+                continue
+            if reply['error_status'] == ERROR_NO_SUCH_NAME:
+                return  # SNMPv1 end of MIB
+            if reply['error_status']:
+                raise SnmpError(f"{self.host} returned error-status {reply['error_status']}")
+            if not reply['varbinds']:
+                return
+            for oid, value in reply['varbinds']:
+                if isinstance(value, _Marker) or oid[:len(root)] != root:
+                    return
+                if oid <= current:
+                    raise SnmpError(f"{self.host} returned a non-increasing OID {oid}")
+                yield oid, value
+                current = oid
+
+
+# ----------------- Harvest -----------------
+
+def format_mac(raw) -> Optional[str]:
+    if isinstance(raw, tuple):
+        raw = bytes(raw)
+    if not isinstance(raw, (bytes, bytearray)) or len(raw) != 6 or not any(raw) or raw == b'\xff' * 6:
+        return None
+    return ':'.join(f'{b:02x}' for b in raw)
+
+
+@dataclass
+class GatewayConfig:
+    host: str
+    community: str = 'public'
+    version: str = '2c'
+    port: int = 161
+    timeout: float = 2.0
+    retries: int = 1
+    max_repetitions: int = 50
+    subnets: List[str] = field(default_factory=list)  # coverage; default: its connected subnets
+    arp: bool = True
+    fdb: bool = True
+
+    @classmethod
+    def from_dict(cls, entry: Dict, default_community: str = 'public') -> 'GatewayConfig':
+        known = {name: entry[name] for name in cls.__dataclass_fields__ if name in entry}
+        known.setdefault('community', default_community)
+        return cls(**known)
+
+
+@dataclass
+class LiveHost:
+    ip: str
+    mac_address: Optional[str]
+    gateway: str
+    if_index: Optional[int] = None
+    switch: Optional[str] = None
+    switch_port: Optional[str] = None
+    vlan: Optional[int] = None
+    seen_at: float = 0.0
+
+
+@dataclass
+class DeviceHarvest:
+    host: str
+    name: Optional[str] = None
+    arp: Dict[str, Tuple[str, int]] = field(default_factory=dict)      # ip -> (mac, ifIndex)
+    fdb: Dict[str, Tuple[int, Optional[int]]] = field(default_factory=dict)  # mac -> (bridge port, vlan)
+    port_names: Dict[int, str] = field(default_factory=dict)            # bridge port -> ifName
+    connected: List[ipaddress.IPv4Network] = field(default_factory=list)
+    coverage: List[ipaddress.IPv4Network] = field(default_factory=list)
+    requests: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+def harvest_device(config: GatewayConfig,
+                   client_factory: Callable[..., SnmpBulkClient] = SnmpBulkClient) -> DeviceHarvest:
+    """Walk ARP / FDB / interface tables of one gateway or switch"""
+    started = time.monotonic()
+    harvest = DeviceHarvest(config.host)
+    client = client_factory(config.host, community=config.community, version=config.version, port=config.port,
+                            timeout=config.timeout, retries=config.retries, max_repetitions=config.max_repetitions)
+    try:
+        name = client.get(SYS_NAME)
+        harvest.name = name.decode('utf-8', 'replace') if isinstance(name, bytes) else None
+        if config.arp:
+            for oid, value in client.walk(IP_NET_TO_MEDIA_PHYS):
+                index = oid[len(IP_NET_TO_MEDIA_PHYS):]
+                mac = format_mac(value)
+                if len(index) == 5 and mac:
+                    harvest.arp['.'.join(map(str, index[1:]))] = (mac, index[0])
+            if not harvest.arp:
+                for oid, value in client.walk(IP_NET_TO_PHYSICAL_PHYS):
+                    index = oid[len(IP_NET_TO_PHYSICAL_PHYS):]
+                    mac = format_mac(value)
+                    if len(index) == 7 and index[1:3] == (1, 4) and mac:  # ipv4, 4-octet address
+                        harvest.arp['.'.join(map(str, index[3:]))] = (mac, index[0])
+            for oid, mask in client.walk(IP_AD_ENT_NET_MASK):
+                address = '.'.join(map(str, oid[len(IP_AD_ENT_NET_MASK):]))
+                try:
+                    network = ipaddress.ip_network(f'{address}/{mask}', strict=False)
+                except ValueError:
+                    continue
+                if network.prefixlen < 32 and not network.is_loopback and network not in harvest.connected:
+                    harvest.connected.append(network)
+            explicit = [ipaddress.ip_network(s, strict=False) for s in config.subnets]
+            harvest.coverage = explicit or list(harvest.connected)
+        if config.fdb:
+            for oid, port in client.walk(DOT1D_TP_FDB_PORT):
+                mac = format_mac(oid[len(DOT1D_TP_FDB_PORT):])
+                if mac and port:
+                    harvest.fdb[mac] = (port, None)
+            if not harvest.fdb:
+                for oid, port in client.walk(DOT1Q_TP_FDB_PORT):
+                    index = oid[len(DOT1Q_TP_FDB_PORT):]
+                    mac = format_mac(index[1:])
+                    if mac and port and len(index) == 7:
+                        harvest.fdb[mac] = (port, index[0])
+            if harvest.fdb:
+                if_names = {oid[-1]: value.decode('utf-8', 'replace') for oid, value in client.walk(IF_NAME)
+                            if isinstance(value, bytes)}
+                for oid, if_index in client.walk(DOT1D_BASE_PORT_IF_INDEX):
+                    if if_index in if_names:
+                        harvest.port_names[oid[-1]] = if_names[if_index]
+    except (SnmpError, OSError) as e:
+        harvest.error = str(e)
+        harvest.coverage = []  # incomplete tables must not suppress active probing
+        logger.warning(f"⚠️ SNMP harvest of {config.host} failed: {e}")
+    finally:
+        harvest.requests = client.requests
+        harvest.seconds = time.monotonic() - started
+        client.close()
+    return harvest
+
+
+@dataclass
+class NeighborHarvest:
+    devices: List[DeviceHarvest]
+    hosts: Dict[str, LiveHost]
+    coverage: List[ipaddress.IPv4Network]
+    harvested_at: float
+
+    def covers(self, ip: str) -> bool:
+        address = ipaddress.ip_address(ip)
+        return any(address in network for network in self.coverage)
+
+    def plan(self, target_ips: Iterable[str]) -> Tuple[List[LiveHost], List[str]]:
+        """(live hosts among the targets, targets that still need active probing)"""
+        live, probe = [], []
+        for ip in target_ips:
+            if ip in self.hosts:
+                live.append(self.hosts[ip])
+            elif not self.covers(ip):
+                probe.append(ip)
+        return live, probe
+
+    def mac_lookup(self, fallback: Optional[Callable[[str], Optional[str]]] = None) -> Callable[[str], Optional[str]]:
+        """IP -> MAC from the harvest, then fallback (the local ARP table) for everything else"""
+        def lookup(ip: str) -> Optional[str]:
+            host = self.hosts.get(ip)
+            if host is not None and host.mac_address:
+                return host.mac_address
+            return fallback(ip) if fallback else None
+        return lookup
+
+    def summary(self) -> Dict:
+        return {
+            'hosts': len(self.hosts),
+            'with_port': sum(1 for h in self.hosts.values() if h.switch_port),
+            'coverage': [str(n) for n in self.coverage],
+            'devices': [{'host': d.host, 'name': d.name, 'arp': len(d.arp), 'fdb': len(d.fdb),
+                         'requests': d.requests, 'seconds': round(d.seconds, 2), 'error': d.error}
+                        for d in self.devices],
+        }
+
+
+def merge_harvests(devices: List[DeviceHarvest]) -> NeighborHarvest:
+    """
+    ARP entries become live hosts; each MAC gets the FDB port with the fewest
+    MACs behind it (the edge port, not an uplink that sees everything)
+    """
+    now = time.time()
+    port_load = Counter()
+    for device in devices:
+        for port, _ in device.fdb.values():
+            port_load[(device.host, port)] += 1
+    best_port: Dict[str, Tuple[int, DeviceHarvest, int, Optional[int]]] = {}
+    for device in devices:
+        for mac, (port, vlan) in device.fdb.items():
+            load = port_load[(device.host, port)]
+            if mac not in best_port or load < best_port[mac][0]:
+                best_port[mac] = (load, device, port, vlan)
+
+    hosts: Dict[str, LiveHost] = {}
+    for device in devices:
+        for ip, (mac, if_index) in device.arp.items():
+            if ip in hosts:
+                continue
+            host = LiveHost(ip=ip, mac_address=mac, gateway=device.host, if_index=if_index, seen_at=now)
+            if mac in best_port:
+                _, switch, port, vlan = best_port[mac]
+                host.switch = switch.name or switch.host
+                host.switch_port = switch.port_names.get(port, str(port))
+                host.vlan = vlan
+            hosts[ip] = host
+    coverage = []
+    for device in devices:
+        for network in device.coverage:
+            if network not in coverage:
+                coverage.append(network)
+    return NeighborHarvest(devices, hosts, coverage, now)
+
+
+class NeighborDiscovery:
+    """Harvest every configured gateway / switch in parallel and merge into one live-host set"""
+
+    def __init__(self, gateways: Iterable, default_community: str = 'public',
+                 client_factory: Callable[..., SnmpBulkClient] = SnmpBulkClient, max_workers: int = 8):
+        self.gateways = [g if isinstance(g, GatewayConfig) else GatewayConfig.from_dict(g, default_community)
+                         for g in gateways]
+        self.client_factory = client_factory
+        self.max_workers = max_workers
+
+    def harvest(self) -> NeighborHarvest:
+        if not self.gateways:
+            return merge_harvests([])
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(self.gateways))) as executor:
+            devices = list(executor.map(lambda g: harvest_device(g, self.client_factory), self.gateways))
+        return merge_harvests(devices)
+
+
+def load_gateways(path: str = GATEWAY_CONFIG_FILE) -> List[Dict]:
+    if not os.path.exists(path):
+        return []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"⚠️ Could not read {path}: {e}")
+        return []
+    return data.get('gateways', []) if isinstance(data, dict) else data
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Enumerate live hosts from router ARP / switch FDB tables")
+    parser.add_argument('gateways', nargs='*', help=f"Gateway hosts (default: {GATEWAY_CONFIG_FILE})")
+    parser.add_argument('--community', default='public')
+    parser.add_argument('--version', default='2c', choices=['1', '2c'])
+    parser.add_argument('--port', type=int, default=161)
+    parser.add_argument('--targets', nargs='*', default=[], help="CIDRs to plan (live vs. still to probe)")
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    configured = [{'host': host, 'community': args.community, 'version': args.version, 'port': args.port}
+                  for host in args.gateways] or load_gateways()
+    result = NeighborDiscovery(configured, default_community=args.community).harvest()
+    targets = [str(ip) for cidr in args.targets for ip in ipaddress.ip_network(cidr, strict=False).hosts()]
+    live, probe = result.plan(targets) if targets else (list(result.hosts.values()), [])
+    if args.json:
+        print(json.dumps({**result.summary(), 'live': [asdict(h) for h in live], 'probe': len(probe)}, indent=2))
+    else:
+        summary = result.summary()
+        for device in summary['devices']:
+            status = f"❌ {device['error']}" if device['error'] else '✅'
+            print(f"{status} {device['host']} ({device['name']}): {device['arp']} ARP, {device['fdb']} FDB, "
+                  f"{device['requests']} requests in {device['seconds']}s")
+        print(f"🗺️ {len(live)} live hosts, {summary['with_port']} with a switch port; "
+              f"{len(probe)} target IPs outside gateway coverage still need probing")
+        for host in sorted(live, key=lambda h: ipaddress.ip_address(h.ip))[:50]:
+            print(f"   {host.ip:<15} {host.mac_address}  {host.switch or ''} {host.switch_port or ''}")
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+📤 STREAMING ASSET EXPORT
+========================
+Export the asset inventory without building it in memory:
+
+- rows come from SQLite in fetchmany() chunks
+- CSV / NDJSON are produced as generators (file writes or HTTP streaming)
+- XLSX goes through openpyxl write_only mode, which spools rows to disk
+- column widths come from a sampled prefix instead of a pass over every cell
+- column selection plus search / exact-match / updated-since filters
+
+Peak memory depends on chunk_size and width_sample, not on the row count.
+"""
+
+import csv
+import io
+import json
+import os
+import sqlite3
+import tempfile
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Font, PatternFill
+    from openpyxl.utils import get_column_letter
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Default export layout (column → header), same as the web dashboard export
+EXPORT_COLUMNS = {
+    'hostname': 'Hostname',
+    'ip_address': 'IP Address',
+    'os_name': 'Operating System',
+    'device_model': 'Device Model',
+    'manufacturer': 'Manufacturer',
+    'serial_number': 'Serial Number',
+    'cpu_info': 'CPU Information',
+    'ram_gb': 'RAM (GB)',
+    'storage_info': 'Storage',
+    'working_user': 'Working User',
+    'domain': 'Domain',
+    'mac_address': 'MAC Address',
+    'device_type': 'Device Type',
+    'created_at': 'Created At',
+    'updated_at': 'Last Updated',
+}
+
+ExportFilter = Tuple[str, List[Any]]  # (SQL condition, params)
+
+
+def _header_for(column: str) -> str:
+    return EXPORT_COLUMNS.get(column) or column.replace('_', ' ').title()
+
+
+def _text(value: Any) -> str:
+    return '' if value is None else str(value)
+
+
+def sample_column_widths(headers: Sequence[str], sample: Iterable[Sequence[Any]],
+                         minimum: int = 8, maximum: int = 50, padding: int = 2) -> List[int]:
+    """Column widths from the header plus a prefix of rows (not the whole sheet)"""
+    widths = [len(h) for h in headers]
+    for row in sample:
+        for i, value in enumerate(row):
+            longest = max((len(line) for line in _text(value).splitlines()), default=0)
+            if longest > widths[i]:
+                widths[i] = longest
+    return [max(minimum, min(maximum, w + padding)) for w in widths]
+
+
+class StreamingExporter:
+    """📤 Chunked SQLite → CSV / NDJSON / XLSX exporter"""
+
+    def __init__(self, db_path: str = 'assets.db', table: str = 'assets', chunk_size: int = 1000,
+                 width_sample: int = 500, computed_columns: Optional[Dict[str, str]] = None,
+                 base_filters: Sequence[ExportFilter] = ()):
+        self.db_path = db_path
+        self.table = table
+        self.chunk_size = chunk_size
+        self.width_sample = width_sample
+        self.computed_columns = dict(computed_columns or {})  # name → SQL expression
+        self.base_filters = list(base_filters)
+        self._table_columns: Optional[List[str]] = None
+
+    # ----------------- Query building -----------------
+
+    def table_columns(self) -> List[str]:
+        if self._table_columns is None:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                self._table_columns = [row[1] for row in conn.execute(f"PRAGMA table_info({self.table})")]
+            finally:
+                conn.close()
+        return self._table_columns
+
+    def resolve_columns(self, columns: Optional[Sequence[str]] = None) -> List[str]:
+        """Requested columns that exist (or are computed); default layout when none are given"""
+        available = set(self.table_columns()) | set(self.computed_columns)
+        requested = [c.strip() for c in columns if c and c.strip()] if columns else list(EXPORT_COLUMNS)
+        resolved = [c for c in dict.fromkeys(requested) if c in available]
+        if not resolved and not columns:
+            resolved = self.table_columns()
+        return resolved
+
+    def _expression(self, column: str) -> str:
+        return self.computed_columns.get(column, f'"{column}"')
+
+    def build_query(self, columns: Sequence[str], search: str = '', search_columns: Sequence[str] = (),
+                    equals: Optional[Dict[str, Any]] = None, updated_since: Optional[str] = None,
+                    extra_filters: Sequence[ExportFilter] = (),
+                    order_by: Optional[str] = 'updated_at DESC') -> Tuple[str, List[Any]]:
+        """SELECT for the selected columns; only known column names reach the SQL text"""
+        known = set(self.table_columns()) | set(self.computed_columns)
+        select = ', '.join(f'{self._expression(c)} AS "{c}"' for c in columns)
+        conditions: List[str] = []
+        params: List[Any] = []
+        for condition, condition_params in list(self.base_filters) + list(extra_filters):
+            conditions.append(f"({condition})")
+            params.extend(condition_params)
+        if search:
+            searchable = [c for c in (search_columns or columns) if c in known]
+            if searchable:
+                conditions.append('(' + ' OR '.join(f'{self._expression(c)} LIKE ?' for c in searchable) + ')')
+                params.extend([f"%{search}%"] * len(searchable))
+        for column, value in (equals or {}).items():
+            if column not in known:
+                raise ValueError(f"Unknown filter column: {column}")
+            conditions.append(f'{self._expression(column)} = ?')
+            params.append(value)
+        if updated_since and 'updated_at' in known:
+            conditions.append(f"{self._expression('updated_at')} >= ?")
+            params.append(updated_since)
+        query = f'SELECT {select} FROM "{self.table}"'
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        if order_by and order_by.split()[0] in known:
+            query += f' ORDER BY {order_by}'
+        return query, params
+
+    def iter_rows(self, query: str, params: Sequence[Any] = ()) -> Iterator[tuple]:
+        """Rows in fetchmany() chunks; the connection lives exactly as long as the generator"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            cursor = conn.execute(query, list(params))
+            while True:
+                chunk = cursor.fetchmany(self.chunk_size)
+                if not chunk:
+                    break
+                yield from chunk
+        finally:
+            conn.close()
+
+    def select(self, columns: Optional[Sequence[str]] = None, **filters) -> Tuple[List[str], Iterator[tuple]]:
+        """(resolved columns, row iterator) for the selection and filters"""
+        resolved = self.resolve_columns(columns)
+        if not resolved:
+            raise ValueError("No exportable columns selected")
+        query, params = self.build_query(resolved, **filters)
+        return resolved, self.iter_rows(query, params)
+
+    # ----------------- CSV / NDJSON -----------------
+
+    def csv_chunks(self, columns: Sequence[str], rows: Iterable[Sequence[Any]],
+                   headers: Optional[Sequence[str]] = None) -> Iterator[str]:
+        """CSV text, one chunk of rows per yielded string"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(headers or [_header_for(c) for c in columns])
+        pending = 0
+        for row in rows:
+            writer.writerow(row)
+            pending += 1
+            if pending >= self.chunk_size:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+                pending = 0
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    def ndjson_chunks(self, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> Iterator[str]:
+        """One JSON object per line, batched per chunk"""
+        lines: List[str] = []
+        for row in rows:
+            lines.append(json.dumps(dict(zip(columns, row)), default=str, ensure_ascii=False))
+            if len(lines) >= self.chunk_size:
+                yield '\n'.join(lines) + '\n'
+                lines = []
+        if lines:
+            yield '\n'.join(lines) + '\n'
+
+    def write_csv(self, path: str, columns: Optional[Sequence[str]] = None,
+                  headers: Optional[Sequence[str]] = None, **filters) -> int:
+        resolved, rows = self.select(columns, **filters)
+        counter = _RowCounter(rows)
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            for chunk in self.csv_chunks(resolved, counter, headers):
+                f.write(chunk)
+        return counter.count
+
+    # ----------------- XLSX -----------------
+
+    def write_xlsx(self, target, columns: Sequence[str], rows: Iterable[Sequence[Any]],
+                   headers: Optional[Sequence[str]] = None, sheet_name: str = 'Network Assets',
+                   header_style: Optional[Dict[str, Any]] = None,
+                   cell_style: Optional[Callable[[int, int, Any], Optional[Dict[str, Any]]]] = None,
+                   max_width: int = 50) -> int:
+        """Write-only workbook; widths from the first width_sample rows. Returns the row count.
+
+        cell_style(row_number, column_index, value) may return a dict of openpyxl style
+        attributes (fill, font, alignment, border) for that cell.
+        """
+        if not OPENPYXL_AVAILABLE:
+            raise RuntimeError("openpyxl is required for XLSX export")
+        headers = list(headers or [_header_for(c) for c in columns])
+        rows = iter(rows)
+        prefix = [row for _, row in zip(range(self.width_sample), rows)]
+
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet(sheet_name)
+        # write_only sheets accept column widths only before the first row
+        for i, width in enumerate(sample_column_widths(headers, prefix, maximum=max_width), start=1):
+            sheet.column_dimensions[get_column_letter(i)].width = width
+        sheet.freeze_panes = 'A2'
+
+        header_style = header_style if header_style is not None else {
+            'font': Font(bold=True, color='FFFFFF'),
+            'fill': PatternFill(start_color='4472C4', end_color='4472C4', fill_type='solid'),
+            'alignment': Alignment(horizontal='center', vertical='center'),
+        }
+        sheet.append([self._styled(sheet, h, header_style) for h in headers])
+
+        count = 0
+        for row in _chain(prefix, rows):
+            count += 1
+            if cell_style is None:
+                sheet.append([_xlsx_value(v) for v in row])
+            else:
+                sheet.append([self._styled(sheet, _xlsx_value(v), cell_style(count + 1, i, v))
+                              for i, v in enumerate(row)])
+        workbook.save(target)
+        return count
+
+    @staticmethod
+    def _styled(sheet, value: Any, style: Optional[Dict[str, Any]]):
+        if not style:
+            return value
+        cell = WriteOnlyCell(sheet, value=value)
+        for attribute, setting in style.items():
+            setattr(cell, attribute, setting)
+        return cell
+
+    def xlsx_tempfile(self, columns: Optional[Sequence[str]] = None, **filters) -> Tuple[str, int]:
+        """Export to a temporary .xlsx (caller removes it); returns (path, row count)"""
+        resolved, rows = self.select(columns, **filters)
+        fd, path = tempfile.mkstemp(suffix='.xlsx', prefix='asset_export_')
+        os.close(fd)
+        try:
+            count = self.write_xlsx(path, resolved, rows)
+        except Exception:
+            os.remove(path)
+            raise
+        return path, count
+
+
+def stream_file(path: str, block_size: int = 64 * 1024, remove: bool = True) -> Iterator[bytes]:
+    """Read a file in blocks for an HTTP response, deleting it once sent (or abandoned)"""
+    try:
+        with open(path, 'rb') as f:
+            while True:
+                block = f.read(block_size)
+                if not block:
+                    break
+                yield block
+    finally:
+        if remove:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def _xlsx_value(value: Any) -> Any:
+    if hasattr(value, 'item') and not isinstance(value, (str, bytes)):
+        value = value.item()  # numpy scalars from DataFrame rows
+    if isinstance(value, float) and value != value:
+        return None  # NaN → empty cell, as pandas writes it
+    if value is None or isinstance(value, (int, float, str)):
+        return value
+    return str(value)
+
+
+def _chain(first: List[tuple], rest: Iterator[tuple]) -> Iterator[tuple]:
+    yield from first
+    first.clear()  # drop the width sample once written
+    yield from rest
+
+
+class _RowCounter:
+    def __init__(self, rows: Iterable[tuple]):
+        self.rows = rows
+        self.count = 0
+
+    def __iter__(self):
+        for row in self.rows:
+            self.count += 1
+            yield row
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Streaming asset export")
+    parser.add_argument('output', help="target file (.csv, .ndjson or .xlsx)")
+    parser.add_argument('--db', default='assets.db')
+    parser.add_argument('--columns', help="comma-separated column names")
+    parser.add_argument('--search', default='')
+    parser.add_argument('--since', help="only rows updated at/after this timestamp")
+    args = parser.parse_args()
+
+    exporter = StreamingExporter(args.db)
+    selected = args.columns.split(',') if args.columns else None
+    options = dict(search=args.search, updated_since=args.since)
+    started = time.time()
+    if args.output.endswith('.xlsx'):
+        names, row_iter = exporter.select(selected, **options)
+        total = exporter.write_xlsx(args.output, names, row_iter)
+    elif args.output.endswith('.ndjson'):
+        names, row_iter = exporter.select(selected, **options)
+        counted = _RowCounter(row_iter)
+        with open(args.output, 'w', encoding='utf-8') as out:
+            out.writelines(exporter.ndjson_chunks(names, counted))
+        total = counted.count
+    else:
+        total = exporter.write_csv(args.output, selected, **options)
+    print(f"📤 Exported {total} rows to {args.output} in {time.time() - started:.1f}s")
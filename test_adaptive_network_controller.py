@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Test the adaptive network controller against a simulated network with
+injected latency, jitter, loss and a congestion point: per-/24 timeouts
+(fast LAN vs slow VPN), AIMD concurrency settling near capacity, and the
+ping validators, core.collector and UltraFastDeviceCollector port probes
+feeding the controller
+"""
+
+import random
+import socket
+import os
+import subprocess
+import tempfile
+import threading
+import time
+
+from adaptive_network_controller import (OPEN, TIMEOUT, AdaptiveNetworkController, AimdLimiter,
+                                         RttEstimator)
+
+
+class SimulatedNetwork:
+    """Subnets with latency/jitter/loss; past `capacity` in-flight probes queue up and drop"""
+
+    def __init__(self, subnets, capacity=None, seed=7):
+        self.subnets = subnets  # 'a.b.c' -> dict(latency, jitter, loss, alive)
+        self.capacity = capacity
+        self.in_flight = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+        self.random = random.Random(seed)
+        self.answered = 0
+        self.dropped = 0
+
+    def attempt(self, ip):
+        profile = self.subnets[ip.rsplit('.', 1)[0]]
+
+        def run(timeout):
+            with self.lock:
+                self.in_flight += 1
+                self.peak = max(self.peak, self.in_flight)
+                excess = max(0, self.in_flight - self.capacity) if self.capacity else 0
+                rtt = profile['latency'] + self.random.random() * profile['jitter'] + excess * 0.002
+                drop = self.random.random() < profile['loss'] + (min(0.9, excess / self.capacity) if excess else 0)
+            try:
+                alive = int(ip.rsplit('.', 1)[1]) % 100 < profile['alive'] * 100
+                if not alive or drop or rtt > timeout:
+                    time.sleep(timeout)
+                    if alive:
+                        with self.lock:
+                            self.dropped += 1
+                    return TIMEOUT
+                time.sleep(rtt)
+                with self.lock:
+                    self.answered += 1
+                return OPEN
+            finally:
+                with self.lock:
+                    self.in_flight -= 1
+        return run
+
+
+def _controller(**kwargs):
+    defaults = dict(initial_timeout=0.05, min_timeout=0.01, max_timeout=1.0, unsampled_max_timeout=0.6)
+    defaults.update(kwargs)
+    return AdaptiveNetworkController(**defaults)
+
+
+def test_rtt_estimator_and_aimd_rules():
+    print('🧪 Testing RTO estimation and AIMD window rules...')
+    estimator = RttEstimator(0.5, 0.01, 5.0)
+    for _ in range(50):
+        estimator.observe(0.020)
+    assert abs(estimator.srtt - 0.020) < 1e-6 and estimator.rto == 0.020 + 4 * estimator.rttvar < 0.03
+    estimator.on_timeout(2.0)
+    assert estimator.rto < 0.03  # sampled subnet: dead hosts do not inflate the timeout
+    unsampled = RttEstimator(0.05, 0.01, 5.0)
+    for _ in range(10):
+        unsampled.on_timeout(0.6)
+    assert unsampled.rto == 0.6
+
+    limiter = AimdLimiter(initial=4, maximum=64, window=10)
+    for _ in range(5):
+        for n in range(10):
+            limiter.on_result(lost=False, rtt=0.01)
+    assert limiter.limit == 9 and limiter.cuts == 0
+    for n in range(10):  # 30% drops
+        limiter.on_result(lost=n < 3, rtt=0.01)
+    assert limiter.limit == 4.5 and limiter.cuts == 1
+    for n in range(10):  # RTT inflation alone is a congestion signal too
+        limiter.on_result(lost=False, rtt=0.05)
+    assert limiter.cuts == 2 and limiter.limit == 2.25
+
+    # Dead addresses time out every time, but they are not drops
+    controller = _controller(initial_concurrency=4, window=10)
+    for n in range(200):
+        controller.record(f'10.0.0.{n % 250 + 1}', TIMEOUT if n % 5 else OPEN, None if n % 5 else 0.01)
+    assert controller.limiter.cuts == 0 and controller.concurrency > 4
+    controller.record('10.0.0.1', TIMEOUT)  # answered before, now silent
+    assert controller.limiter._outcomes[-1] is True
+
+
+def test_per_subnet_timeouts_lan_vs_vpn():
+    print('🧪 Testing per-/24 timeouts on a fast LAN and a slow VPN subnet...')
+    network = SimulatedNetwork({'10.1.1': dict(latency=0.002, jitter=0.002, loss=0.0, alive=1.0),
+                                '10.2.2': dict(latency=0.120, jitter=0.040, loss=0.02, alive=1.0)})
+    controller = _controller()
+    for n in range(1, 31):
+        controller.probe(f'10.1.1.{n}', network.attempt(f'10.1.1.{n}'))
+    lan_timeout = controller.timeout_for('10.1.1.200')
+    assert lan_timeout < 0.02
+
+    # First VPN probes back off from the LAN-derived timeout until replies arrive
+    for n in range(1, 11):
+        controller.probe(f'10.2.2.{n}', network.attempt(f'10.2.2.{n}'))
+    vpn_timeout = controller.timeout_for('10.2.2.200')
+    assert vpn_timeout > 0.16 and controller.timeout_for('10.1.1.200') == lan_timeout
+
+    found = sum(controller.probe(f'10.2.2.{n}', network.attempt(f'10.2.2.{n}')) == OPEN for n in range(11, 41))
+    assert found >= 27  # only the injected 2% loss (and a rare jitter outlier) is missed
+    fixed = sum(network.attempt(f'10.2.2.{n}')(0.05) == OPEN for n in range(11, 21))
+    assert fixed == 0  # a hardcoded 50 ms timeout misses the whole VPN subnet
+
+    assert controller.operation_timeout('10.1.1.5', 5.0) == 5.0
+    assert controller.operation_timeout('10.2.2.5', 1.0) > 2.0
+    snapshot = controller.snapshot()
+    assert set(snapshot['subnets']) == {'10.1.1.0/24', '10.2.2.0/24'}
+
+
+def _drive(network, ips, workers, controller=None):
+    pending = list(ips)
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                if not pending:
+                    return
+                ip = pending.pop()
+            if controller is not None:
+                controller.probe(ip, network.attempt(ip))
+            else:
+                network.attempt(ip)(0.03)
+
+    threads = [threading.Thread(target=worker) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_aimd_settles_near_capacity():
+    print('🧪 Testing AIMD concurrency against a congested link...')
+    profile = {'10.3.3': dict(latency=0.004, jitter=0.002, loss=0.0, alive=0.5)}
+    ips = [f'10.3.3.{n % 254 + 1}' for n in range(900)]
+
+    blind = SimulatedNetwork(profile, capacity=12)
+    _drive(blind, ips, workers=48)
+
+    network = SimulatedNetwork(profile, capacity=12)
+    controller = _controller(initial_concurrency=2, max_concurrency=64, window=20)
+    _drive(network, ips, workers=48, controller=controller)
+
+    history = controller.limiter.history
+    assert max(history) > 12 and controller.limiter.cuts >= 1  # probed past capacity, then backed off
+    settled = history[len(history) // 2:]
+    assert 4 <= sum(settled) / len(settled) <= 24
+    assert network.peak <= max(history) + 1
+    blind_loss = blind.dropped / (blind.dropped + blind.answered)
+    adaptive_loss = network.dropped / (network.dropped + network.answered)
+    assert adaptive_loss < blind_loss / 2
+    print(f'   limit history {history[:6]}...{history[-4:]}, loss {adaptive_loss:.1%} vs {blind_loss:.1%} unthrottled')
+
+
+class FakePing:
+    """Stands in for the ping binary; records the argv it was started with"""
+
+    def __init__(self, alive, rtt_ms=12.5):
+        self.alive = alive
+        self.rtt_ms = rtt_ms
+        self.argv = []
+
+    def output(self, argv):
+        self.argv.append(argv)
+        if self.alive:
+            return 0, f'64 bytes from {argv[-1]}: icmp_seq=1 ttl=64 time={self.rtt_ms} ms'
+        return 1, ''
+
+    def popen(self, argv, **kwargs):
+        assert not kwargs.get('shell')
+        returncode, stdout = self.output(argv)
+        process = type('Process', (), {})()
+        process.returncode = returncode
+        process.communicate = lambda timeout=None: (stdout, '')
+        return process
+
+    def run(self, argv, **kwargs):
+        assert not kwargs.get('shell')
+        returncode, stdout = self.output(argv)
+        return subprocess.CompletedProcess(argv, returncode, stdout, '')
+
+
+class SweepPing:
+    """Ping binary for a sparse range: live hosts answer fast, dead ones wait out -W"""
+
+    def __init__(self, alive_every=50):
+        self.alive_every = alive_every
+        self.in_flight = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def popen(self, argv, **kwargs):
+        ip, wait = argv[-1], float(argv[argv.index('-W') + 1])
+        alive = int(ip.rsplit('.', 1)[1]) % self.alive_every == 0
+        with self.lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+
+        def communicate(timeout=None):
+            time.sleep(0.002 if alive else wait)
+            with self.lock:
+                self.in_flight -= 1
+            return (f'64 bytes from {ip}: icmp_seq=1 ttl=64 time=2.0 ms' if alive else ''), ''
+        process = type('Process', (), {})()
+        process.returncode = 0 if alive else 1
+        process.communicate = communicate
+        return process
+
+
+def test_sparse_subnet_sweep():
+    print('🧪 Testing a ping sweep across sparse and dead subnets...')
+    import lightning_fast_ping
+
+    # First-contact timeouts fill the AIMD window clean instead of starving it
+    controller = _controller(discovery_max_timeout=0.05)
+    for n in range(600):
+        controller.record(f'10.80.{n // 254}.{n % 254 + 1}', TIMEOUT)
+    assert controller.limiter.cuts == 0 and controller.concurrency > 16
+    assert controller.timeout_for('10.80.1.9') == 0.6  # unsampled RTO backed off...
+    assert controller.discovery_timeout_for('10.80.1.9') == 0.05  # ...but a sweep still waits 50 ms
+
+    controller = _controller(discovery_max_timeout=0.05)
+    lightning = lightning_fast_ping.LightningFastPingValidator()
+    lightning.network_controller = controller
+    lightning.ping_command = 'ping -c 1 -W {timeout_sec} -s 32 {ip}'
+    sweep = SweepPing()
+    ips = [f'10.81.{n // 250}.{n % 250 + 1}' for n in range(2000)]
+    real_popen, real_system = subprocess.Popen, lightning_fast_ping.platform.system
+    subprocess.Popen = sweep.popen
+    lightning_fast_ping.platform.system = lambda: 'Linux'
+    try:
+        started = time.perf_counter()
+        results = lightning.lightning_batch_scan(ips)
+        elapsed = time.perf_counter() - started
+    finally:
+        subprocess.Popen, lightning_fast_ping.platform.system = real_popen, real_system
+
+    assert sum(r.is_alive for r in results) == 40
+    # 16 slots × a 0.6 s unsampled timeout would take over a minute here
+    assert sweep.peak > 16 and elapsed < 10
+    assert controller.discovery_timeout_for('10.81.7.9') <= 0.05
+    print(f'   {len(ips)} addresses in {elapsed:.2f}s, peak {sweep.peak} pings in flight')
+
+
+def test_validators_and_collector_use_controller():
+    print('🧪 Testing the ping validators and core.collector probes against the controller...')
+    import lightning_fast_ping
+    import smart_multi_validator
+    from core import collector
+
+    real_popen, real_run = subprocess.Popen, subprocess.run
+    try:
+        controller = _controller()
+        lightning = lightning_fast_ping.LightningFastPingValidator()
+        lightning.network_controller = controller
+        ping = FakePing(alive=True)
+        subprocess.Popen = ping.popen
+        result = lightning.lightning_ping('10.60.0.5')
+        assert result.is_alive and result.ping_time_ms == 12.5
+        assert isinstance(ping.argv[0], list) and ping.argv[0][0] == 'ping' and ping.argv[0][-1] == '10.60.0.5'
+        subnet = controller.snapshot()['subnets']['10.60.0.0/24']
+        assert subnet['samples'] == 1 and subnet['srtt_ms'] == 12.5
+
+        subprocess.Popen = FakePing(alive=False).popen
+        assert not lightning.lightning_ping('10.60.0.6').is_alive
+        assert controller.snapshot()['subnets']['10.60.0.0/24']['timeouts'] == 1
+
+        smart = smart_multi_validator.SmartMultiValidator()
+        smart.network_controller = controller
+        ping = FakePing(alive=True, rtt_ms=80.0)
+        subprocess.run = ping.run
+        alive, _, details = smart.lightning_fast_ping('10.61.0.7')
+        assert alive and details == 'Ping success: 80.0ms' and isinstance(ping.argv[0], list)
+        subprocess.run = FakePing(alive=False).run
+        assert not smart.lightning_fast_ping('10.61.0.8')[0]
+        subnet = controller.snapshot()['subnets']['10.61.0.0/24']
+        assert subnet['samples'] == 1 and subnet['srtt_ms'] == 80.0 and subnet['timeouts'] == 1
+    finally:
+        subprocess.Popen, subprocess.run = real_popen, real_run
+
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(4)
+    try:
+        port = listener.getsockname()[1]
+        shared = collector.get_network_controller()
+        before = shared.snapshot()['subnets'].get('127.0.0.0/24', {}).get('samples', 0)
+        # Without an explicit timeout the probe goes through the process-wide controller
+        assert collector.is_tcp_open('127.0.0.1', port)
+        assert shared.snapshot()['subnets']['127.0.0.0/24']['samples'] == before + 1
+        assert collector.is_tcp_open('127.0.0.1', port, timeout=0.5)
+        assert shared.snapshot()['subnets']['127.0.0.0/24']['samples'] == before + 1
+
+        from credential_affinity import CredentialAffinityCache
+        from ultra_fast_collector import UltraFastDeviceCollector
+        controller = _controller()
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = CredentialAffinityCache(os.path.join(tmp, 'assets.db'), race_protocols=())
+            ultra = UltraFastDeviceCollector(['127.0.0.1'], network_controller=controller, credential_cache=cache)
+        assert ultra.network_controller is controller
+        assert ultra._is_port_open_fast('127.0.0.1', port)
+        assert controller.snapshot()['subnets']['127.0.0.0/24']['samples'] == 1
+        assert ultra._task_timeout('127.0.0.1') == 5.0
+    finally:
+        listener.close()
+    print('✅ Adaptive network controller test completed successfully!')
+
+
+if __name__ == '__main__':
+    test_rtt_estimator_and_aimd_rules()
+    test_per_subnet_timeouts_lan_vs_vpn()
+    test_aimd_settles_near_capacity()
+    test_sparse_subnet_sweep()
+    test_validators_and_collector_use_controller()
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Test bulk asset operations: mixed batches with per-item results, row-by-row
+fallback on constraint errors, atomic batches, CSV / XLSX upsert import, the
+/api/assets/bulk endpoints, the department dialog path and 50k throughput
+"""
+
+import csv
+import io
+import os
+import sqlite3
+import tempfile
+import types
+
+import bulk_operations
+from bulk_operations import AssetBulkWriter, BulkOperationError, benchmark
+from db.migrations import migrate
+
+
+def _database(tmp, assets=20):
+    db_path = os.path.join(tmp, 'assets.db')
+    migrate(db_path)
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE departments (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT UNIQUE NOT NULL, "
+                     "description TEXT, manager TEXT, location TEXT, created_at TEXT DEFAULT CURRENT_TIMESTAMP)")
+        conn.execute("CREATE TABLE locations (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT UNIQUE NOT NULL)")
+        conn.execute("CREATE TABLE device_assignments (id INTEGER PRIMARY KEY AUTOINCREMENT, asset_id INTEGER, "
+                     "department_id INTEGER, location_id INTEGER, assigned_by TEXT, "
+                     "assigned_at TEXT DEFAULT CURRENT_TIMESTAMP, notes TEXT)")
+        conn.executemany("INSERT INTO departments (name) VALUES (?)", [('IT',), ('Finance',)])
+        conn.execute("INSERT INTO locations (name) VALUES ('HQ')")
+        conn.executemany("INSERT INTO assets (device_type, hostname, ip_address, asset_tag) VALUES (?, ?, ?, ?)",
+                         [('Workstation', f'pc-{n}', f'10.0.0.{n}', f'TAG-{n}') for n in range(1, assets + 1)])
+    return db_path
+
+
+def _rows(db_path, sql, params=()):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute(sql, params).fetchall()
+
+
+def test_mixed_batch_results():
+    print('🧪 Testing a mixed batch with per-item results...')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = _database(tmp)
+        result = AssetBulkWriter(db_path).apply([
+            {'op': 'update', 'id': 1, 'fields': {'notes': 'first', 'site': 'HQ'}},
+            {'op': 'update', 'id': 1, 'fields': {'notes': 'second'}},
+            {'op': 'status', 'ids': [2, 3], 'status': 'Maintenance'},
+            {'op': 'assign', 'ids': [4, 5], 'department_id': 2, 'location_id': 1, 'assigned_by': 'ops'},
+            {'op': 'assign', 'id': 6, 'department': 'IT'},
+            {'op': 'delete', 'ids': [7, 999]},
+            {'op': 'upsert', 'fields': {'asset_tag': 'TAG-8', 'hostname': 'pc-8-renamed', 'ip_address': '10.0.0.8'}},
+            {'op': 'upsert', 'fields': {'device_type': 'Laptop', 'hostname': 'new-1', 'ip_address': '10.9.0.1'}},
+            {'op': 'upsert', 'fields': {'hostname': 'new-1', 'ip_address': '10.9.0.1', 'notes': 'same row'}},
+            {'op': 'update', 'id': 9, 'fields': {'password': 'x'}},
+            {'op': 'explode', 'id': 9},
+            {'op': 'update', 'id': 'ten', 'fields': {'notes': 'x'}},
+        ])
+        assert result.committed
+        statuses = [(r['index'], r['id'], r['status']) for r in result.results]
+        assert statuses[:9] == [(0, 1, 'updated'), (1, 1, 'updated'), (2, 2, 'updated'), (2, 3, 'updated'),
+                                (3, 4, 'assigned'), (3, 5, 'assigned'), (4, 6, 'assigned'),
+                                (5, 7, 'deleted'), (5, 999, 'not_found')]
+        assert statuses[9] == (6, 8, 'updated')
+        new_id = result.results[10]['id']
+        assert result.results[10]['status'] == result.results[11]['status'] == 'inserted'
+        assert result.results[11]['id'] == new_id > 20
+        assert [r['status'] for r in result.results[12:]] == ['error'] * 3
+        assert 'password' in result.results[12]['error'] and result.failed == 4
+
+        assert _rows(db_path, "SELECT notes, site FROM assets WHERE id = 1") == [('second', 'HQ')]
+        assert _rows(db_path, "SELECT status FROM assets WHERE id IN (2, 3)") == [('Maintenance',)] * 2
+        assert _rows(db_path, "SELECT department, location FROM assets WHERE id IN (4, 6) ORDER BY id") == \
+            [('Finance', 'HQ'), ('IT', None)]
+        assert _rows(db_path, "SELECT asset_id, department_id, location_id, assigned_by FROM device_assignments "
+                              "ORDER BY asset_id") == [(4, 2, 1, 'ops'), (5, 2, 1, 'ops'), (6, 1, None, 'System')]
+        assert _rows(db_path, "SELECT COUNT(*) FROM assets WHERE id = 7") == [(0,)]
+        assert _rows(db_path, "SELECT hostname FROM assets WHERE asset_tag = 'TAG-8'") == [('pc-8-renamed',)]
+        assert _rows(db_path, "SELECT hostname, notes FROM assets WHERE id = ?", (new_id,)) == [('new-1', 'same row')]
+
+        # Re-assigning replaces the assignment row, deleting drops it
+        writer = AssetBulkWriter(db_path)
+        assert writer.assign([4], department_id=1, location_id=None).counts == {'assigned': 1}
+        assert writer.delete([5]).counts == {'deleted': 1}
+        assert _rows(db_path, "SELECT asset_id, department_id, location_id FROM device_assignments "
+                              "ORDER BY asset_id") == [(4, 1, None), (6, 1, None)]
+        assert writer.assign([6], department_id=42).results[0]['error'] == 'unknown department_id 42'
+
+
+def test_fallback_and_atomic():
+    print('🧪 Testing row-by-row fallback on constraint errors and atomic batches...')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = _database(tmp)
+        writer = AssetBulkWriter(db_path)
+
+        # The CHECK constraint rejects one status; the rest of the executemany still lands
+        result = writer.update({1: {'status': 'Retired'}, 2: {'status': 'Lost'}, 3: {'status': 'Inactive'}})
+        assert [r['status'] for r in result.results] == ['updated', 'error', 'updated'] and result.committed
+        assert 'CHECK constraint failed' in result.results[1]['error']
+        assert _rows(db_path, "SELECT status FROM assets WHERE id IN (1, 2, 3) ORDER BY id") == \
+            [('Retired',), ('Active',), ('Inactive',)]
+
+        # Inserts that violate NOT NULL fail alone and the others get their ids
+        result = writer.upsert([{'device_type': 'Printer', 'hostname': 'prn-1', 'ip_address': '10.1.0.1'},
+                                {'hostname': 'no-type', 'ip_address': '10.1.0.2'},
+                                {'device_type': 'Printer', 'hostname': 'prn-2', 'ip_address': '10.1.0.3'}])
+        assert [r['status'] for r in result.results] == ['inserted', 'error', 'inserted']
+        assert _rows(db_path, "SELECT hostname FROM assets WHERE id IN (?, ?) ORDER BY id",
+                     (result.results[0]['id'], result.results[2]['id'])) == [('prn-1',), ('prn-2',)]
+
+        # Atomic: one failure rolls back every other item
+        before = _rows(db_path, "SELECT COUNT(*), MAX(updated_at) FROM assets")
+        result = writer.apply([{'op': 'delete', 'ids': [4, 5]},
+                               {'op': 'status', 'id': 6, 'status': 'Lost'}], atomic=True)
+        assert not result.committed and result.succeeded == 0
+        assert [r['status'] for r in result.results] == ['rolled_back', 'rolled_back', 'error']
+        assert _rows(db_path, "SELECT COUNT(*), MAX(updated_at) FROM assets") == before
+
+        # Validation errors in an atomic batch skip the database entirely
+        result = writer.apply([{'op': 'delete', 'id': 4}, {'op': 'update', 'id': 5, 'fields': {}}], atomic=True)
+        assert [r['status'] for r in result.results] == ['skipped', 'error']
+
+        original = bulk_operations.MAX_OPERATIONS
+        bulk_operations.MAX_OPERATIONS = 3
+        try:
+            writer.delete([1, 2, 3, 4])
+            assert False, 'oversized batch accepted'
+        except BulkOperationError as e:
+            assert e.status == 413
+        finally:
+            bulk_operations.MAX_OPERATIONS = original
+
+
+def test_import_csv_and_xlsx():
+    print('🧪 Testing CSV / XLSX upsert import...')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = _database(tmp, assets=3)
+        writer = AssetBulkWriter(db_path)
+
+        csv_path = os.path.join(tmp, 'devices.csv')
+        with open(csv_path, 'w', newline='', encoding='utf-8-sig') as f:
+            out = csv.writer(f)
+            out.writerow(['Asset Tag', 'Hostname', 'IP Address', 'Department', 'Device Type', 'Favourite Colour'])
+            out.writerow(['TAG-1', 'pc-1', '10.0.0.1', 'Finance', '', 'blue'])
+            out.writerow(['', 'sw-core', '10.0.5.1', 'IT', 'Switch', 'green'])
+            out.writerow(['', '', '', '', '', ''])
+        result = writer.import_file(csv_path, defaults={'data_source': 'Import', 'no_such_column': 1})
+        assert result.counts == {'updated': 1, 'inserted': 1} and result.ignored_columns == ['Favourite Colour']
+        assert _rows(db_path, "SELECT department, device_type FROM assets WHERE asset_tag = 'TAG-1'") == \
+            [('Finance', 'Workstation')]
+        assert _rows(db_path, "SELECT device_type, data_source FROM assets WHERE hostname = 'sw-core'") == \
+            [('Switch', 'Import')]
+
+        if bulk_operations.OPENPYXL_AVAILABLE:
+            from openpyxl import Workbook
+            xlsx_path = os.path.join(tmp, 'devices.xlsx')
+            workbook = Workbook()
+            sheet = workbook.active
+            sheet.title = 'Switches'
+            sheet.append(['Hostname', 'IP Address', 'Status', 'Notes'])
+            sheet.append(['sw-core', '10.0.5.1', 'Maintenance', 'firmware upgrade'])
+            sheet.append(['sw-edge', '10.0.5.2', None, None])
+            workbook.save(xlsx_path)
+            result = writer.import_file(xlsx_path, sheet='Switches', defaults={'device_type': 'Switch'})
+            assert result.counts == {'updated': 1, 'inserted': 1}
+            assert _rows(db_path, "SELECT status, notes, device_type FROM assets WHERE hostname LIKE 'sw-%' "
+                                  "ORDER BY hostname") == [('Maintenance', 'firmware upgrade', 'Switch'),
+                                                           ('Active', None, 'Switch')]
+
+        try:
+            writer.import_file(os.path.join(tmp, 'devices.json'))
+            assert False, 'unsupported file accepted'
+        except BulkOperationError:
+            pass
+
+
+def test_bulk_api_endpoints():
+    print('🧪 Testing POST /api/assets/bulk on both web services...')
+    from complete_department_web_service import CompleteDepartmentWebService
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = _database(tmp)
+        service = CompleteDepartmentWebService(db_path)
+        client = service.app.test_client()
+
+        assert client.get('/api/departments').status_code == 200
+        response = client.post('/api/assets/bulk', json={
+            'operations': [{'op': 'assign', 'ids': [1, 2], 'department': 'Finance'},
+                           {'op': 'delete', 'id': 404}],
+            'results': 'errors'})
+        body = response.json
+        assert response.status_code == 200 and body['committed'] and body['succeeded'] == 2
+        assert body['results'] == [{'index': 1, 'op': 'delete', 'id': 404, 'status': 'not_found',
+                                    'error': 'asset 404 not found'}]
+        # The write went through another connection, so cached lists are refreshed
+        assert client.get('/api/departments').headers['X-Cache'] == 'MISS'
+
+        atomic = client.post('/api/assets/bulk', json={'operations': [{'op': 'status', 'id': 1, 'status': 'Lost'}],
+                                                       'atomic': True})
+        assert atomic.status_code == 422 and not atomic.json['committed']
+        assert client.post('/api/assets/bulk', json={'ops': []}).status_code == 400
+
+        upload = client.post('/api/assets/bulk', content_type='multipart/form-data', data={
+            'file': (io.BytesIO(b'Hostname,IP Address,Device Type\r\nap-1,10.0.7.1,Access Point\r\n'), 'aps.csv'),
+            'results': 'none'})
+        assert upload.status_code == 200 and upload.json['counts'] == {'inserted': 1} and 'results' not in upload.json
+        service.response_cache.version.close()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # The schema comes from the migrations alone, not from whatever importing intelligent_app did to ../assets.db
+        db_path = os.path.join(tmp, 'assets.db')
+        migrate(db_path)
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("INSERT INTO assets_enhanced (hostname, ip_address, device_status) "
+                         "VALUES ('ws-1', '10.1.0.1', 'online')")
+        workdir = os.path.join(tmp, 'WebService')
+        os.mkdir(workdir)
+        cwd = os.getcwd()
+        os.chdir(workdir)  # a first import initialises ../assets.db; keep that inside tmp
+        try:
+            from WebService import intelligent_app
+        finally:
+            os.chdir(cwd)
+
+        previous = intelligent_app.asset_manager
+        intelligent_app.asset_manager = types.SimpleNamespace(db_path=db_path)
+        try:
+            response = intelligent_app.app.test_client().post('/api/assets/bulk', json=[
+                {'op': 'status', 'id': 1, 'status': 'maintenance'},
+                {'op': 'assign', 'id': 1, 'department': 'IT'}])
+            assert response.json['counts'] == {'updated': 1, 'assigned': 1}, response.json
+            assert _rows(db_path, "SELECT device_status, assigned_department FROM assets_enhanced") == \
+                [('maintenance', 'IT')]
+        finally:
+            intelligent_app.asset_manager = previous
+            intelligent_app.response_cache.version.close()
+
+
+def test_department_dialog_assignment():
+    print('🧪 Testing DepartmentDatabase.assign_devices (department dialog)...')
+    from gui.department_management import DepartmentDatabase
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = _database(tmp)
+        database = DepartmentDatabase(db_path)
+        assert database.assign_devices([1, 2, 3, 404], department_id=1, location_id=1, assigned_by='desk') == 3
+        assert database.assign_device(5, department_id=2)
+        assert not database.assign_device(404, department_id=2)
+        assert _rows(db_path, "SELECT id, department, location FROM assets WHERE department IS NOT NULL "
+                              "ORDER BY id") == [(1, 'IT', 'HQ'), (2, 'IT', 'HQ'), (3, 'IT', 'HQ'),
+                                                 (5, 'Finance', None)]
+        assert len(database.get_unassigned_devices()) == 16
+
+
+def test_throughput_50k():
+    print('🧪 Testing 50k operations in one batch...')
+    result = benchmark(operations=50000, per_row_sample=200)
+    bulk = result['bulk']
+    assert bulk['committed'] and sum(bulk['counts'].values()) == 50000
+    assert bulk['counts'] == {'updated': 20000, 'assigned': 10000, 'deleted': 10000, 'inserted': 10000}
+    assert bulk['ops_per_s'] > result['per_row']['ops_per_s']
+    print(f"   bulk: {bulk['ops_per_s']} ops/s, per-row: {result['per_row']['ops_per_s']} ops/s")
+    print('✅ Bulk operations test completed successfully!')
+
+
+if __name__ == '__main__':
+    test_mixed_batch_results()
+    test_fallback_and_atomic()
+    test_import_csv_and_xlsx()
+    test_bulk_api_endpoints()
+    test_department_dialog_assignment()
+    test_throughput_50k()
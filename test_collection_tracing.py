@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Test per-device collection tracing: span nesting across worker and timeout
+threads, stable per-device trace ids, batched SQLite / JSONL sinks, the spans
+emitted by core.collector and SmartDuplicateValidator, and the stage
+percentile / slowest-device critical path report
+"""
+
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from collection_tracing import (CollectionTracer, JsonlTraceSink, Span, SqliteTraceSink, annotate,
+                                critical_path, get_tracer, percentile, record_span, set_tracer, trace_report,
+                                traced)
+
+
+class CountingSink(SqliteTraceSink):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.batches = []
+
+    def write(self, spans):
+        self.batches.append(len(spans))
+        super().write(spans)
+
+
+class FakeCollector:
+    """Same shape as UltraFastDeviceCollector: discovery, timeout-wrapped attempt, WMI/SSH, save"""
+
+    def __init__(self, slow_ips=(), timeout=0.5):
+        self.slow_ips = set(slow_ips)
+        self.timeout = timeout
+
+    @traced('discovery', device='ip', outcome=lambda alive: 'alive' if alive else 'unreachable')
+    def discover(self, ip):
+        time.sleep(0.001)
+        return not ip.endswith('.9')
+
+    @traced('collect', device='task.ip')
+    def collect(self, task):
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(get_tracer().wrap(self.attempt), task)
+            try:
+                return future.result(timeout=self.timeout)
+            except TimeoutError:
+                annotate(outcome='timeout')
+                return {'IP Address': task.ip, 'Status': 'Timeout'}
+
+    @traced('attempt')
+    def attempt(self, task):
+        if self.wmi(task.ip):
+            return {'IP Address': task.ip, 'Hostname': f'host-{task.ip}'}
+        return self.ssh(task.ip)
+
+    @traced('wmi', device='ip')
+    def wmi(self, ip):
+        annotate(retries=2)
+        time.sleep(0.6 if ip in self.slow_ips else 0.002)
+        return None
+
+    @traced('ssh', device='ip')
+    def ssh(self, ip):
+        if ip.endswith('.4'):
+            raise ConnectionResetError('reset by peer')
+        time.sleep(0.002)
+        return {'IP Address': ip, 'Hostname': f'linux-{ip}', 'OS': 'Ubuntu'}
+
+    @traced('save', device=lambda self, data: data.get('IP Address'))
+    def save(self, data):
+        started = time.perf_counter()
+        time.sleep(0.001)
+        record_span('duplicate_check', time.perf_counter() - started, outcome='new')
+        return True
+
+
+class Task:
+    def __init__(self, ip):
+        self.ip = ip
+
+
+def _run_scan(collector, ips):
+    tracer = get_tracer()
+    scan_id = tracer.begin_scan('fake')
+
+    @traced('step1_discovery', scan=True)
+    def step1():
+        return [ip for ip in ips if collector.discover(ip)]
+
+    def worker(ip):
+        data = None
+        try:
+            data = collector.collect(Task(ip))
+        except ConnectionResetError:
+            pass
+        if data:
+            collector.save(data)
+
+    alive = step1()
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(worker, alive))
+    assert tracer.flush()
+    return scan_id
+
+
+def test_span_nesting_and_thread_handoff():
+    print('🧪 Testing span nesting, trace ids and thread hand-off...')
+    with tempfile.TemporaryDirectory() as tmp:
+        sink = CountingSink(os.path.join(tmp, 'assets.db'))
+        set_tracer(CollectionTracer(sink, batch_size=1000, flush_interval=0.05))
+        try:
+            ips = [f'10.0.0.{n}' for n in range(1, 10)]
+            scan_id = _run_scan(FakeCollector(slow_ips={'10.0.0.3'}), ips)
+            spans = sink.load(scan_id)
+        finally:
+            set_tracer(None)
+
+        by_device = {}
+        for span in spans:
+            by_device.setdefault(span.device, []).append(span)
+        # Discovery, collection and save ran on different threads but share one trace per device
+        for ip in ips:
+            assert len({s.trace_id for s in by_device[ip]}) == 1, ip
+        assert len({by_device[ip][0].trace_id for ip in ips}) == len(ips)
+        assert [s.outcome for s in by_device['10.0.0.9']] == ['unreachable']
+
+        spans_by_id = {s.span_id: s for s in spans}
+        device1 = {s.stage: s for s in by_device['10.0.0.1']}
+        # attempt ran in the timeout executor thread but nests under collect
+        assert device1['attempt'].parent_id == device1['collect'].span_id
+        assert device1['wmi'].parent_id == device1['attempt'].span_id and device1['wmi'].retries == 2
+        assert device1['wmi'].outcome == 'fail' and device1['ssh'].outcome == 'ok' and device1['ssh'].bytes > 0
+        assert device1['duplicate_check'].parent_id == device1['save'].span_id
+        assert device1['save'].parent_id is None and device1['discovery'].parent_id is None
+
+        slow = {s.stage: s for s in by_device['10.0.0.3']}
+        assert slow['collect'].outcome == 'timeout' and slow['collect'].duration_ms >= 450
+
+        broken = {s.stage: s for s in by_device['10.0.0.4']}
+        assert broken['ssh'].outcome == 'error' and 'ConnectionResetError' in broken['ssh'].detail
+        assert broken['collect'].outcome == 'error' and 'save' not in broken
+
+        step = [s for s in spans if s.stage == 'step1_discovery']
+        assert len(step) == 1 and step[0].device == '' and step[0].trace_id == scan_id
+        assert all(s.scan_id == scan_id and s.collector == 'fake' for s in spans)
+        assert all(s.parent_id is None or s.parent_id in spans_by_id for s in spans)
+        # Batched: far fewer transactions than spans
+        assert sum(sink.batches) == len(spans) and len(sink.batches) < len(spans) / 3
+
+
+def test_disabled_tracer_is_transparent():
+    print('🧪 Testing that a disabled tracer records nothing and changes nothing...')
+    set_tracer(CollectionTracer(None))
+    try:
+        collector = FakeCollector()
+        assert collector.collect(Task('10.0.0.1'))['Hostname'] == 'linux-10.0.0.1'
+        assert collector.discover('10.0.0.9') is False
+        with get_tracer().span('anything', device='10.0.0.1') as span:
+            span.outcome = 'ignored'
+        assert get_tracer().current() is None and get_tracer()._writer is None
+    finally:
+        set_tracer(None)
+
+    # Without a device or an enclosing span there is nothing to attribute the stage to
+    tracer = CollectionTracer(JsonlTraceSink(os.devnull))
+    with tracer.span('orphan') as span:
+        span.retries = 3
+    assert tracer._writer is None
+
+
+def test_sinks_and_batching():
+    print('🧪 Testing SQLite batching, retention and the JSONL sink...')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'assets.db')
+        sink = CountingSink(db_path, keep_days=1)
+        tracer = CollectionTracer(sink, batch_size=50, flush_interval=5)
+        for n in range(230):
+            with tracer.span('ping', device=f'10.1.{n // 250}.{n % 250}'):
+                pass
+        assert tracer.flush()
+        assert sink.batches[:4] == [50, 50, 50, 50] and sum(sink.batches) == 230
+        assert len(sink.load()) == 230 and tracer.written == 230
+
+        # Spans older than keep_days are pruned when a sink opens the table
+        conn = sqlite3.connect(db_path)
+        conn.execute("UPDATE collection_traces SET started_at = started_at - 3 * 86400 WHERE id <= 30")
+        conn.commit()
+        conn.close()
+        assert len(SqliteTraceSink(db_path, keep_days=1).load()) == 200
+
+        jsonl = os.path.join(tmp, 'traces.jsonl')
+        tracer = CollectionTracer(JsonlTraceSink(jsonl), batch_size=10)
+        scan_id = tracer.begin_scan('jsonl')
+        with tracer.span('collect', device='10.2.0.1'):
+            with tracer.span('wmi'):
+                pass
+        assert tracer.flush()
+        loaded = JsonlTraceSink(jsonl).load(scan_id)
+        assert [s.stage for s in loaded] == ['wmi', 'collect'] and loaded[0].parent_id == loaded[1].span_id
+        assert JsonlTraceSink(jsonl).latest_scan_id() == scan_id
+
+
+def test_core_collector_and_validator_spans():
+    print('🧪 Testing spans from core.collector and the duplicate validator...')
+    import credential_affinity
+    from core import collector
+    from smart_duplicate_validator import SmartDuplicateValidator
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        sink = SqliteTraceSink(os.path.join(tmp, 'traces.db'))
+        set_tracer(CollectionTracer(sink, flush_interval=0.05))
+        os.chdir(tmp)  # the shared credential cache lives in ./assets.db
+        credential_affinity._default_cache = None  # not one an earlier test opened elsewhere
+        try:
+            scan_id = get_tracer().begin_scan('core')
+            # Nothing listens on 127.0.0.1's management ports: probes, fallbacks, then no collector
+            record = collector.collect_any('127.0.0.1', [('admin', 'pw')], [], None, None, use_http=False)
+            assert record['Collector'] == 'None'
+
+            def login(ip, username, password):
+                if password != 'right':
+                    return {'IP Address': ip, 'Status': 'Auth Failed', 'Error': 'SSH authentication failed.'}
+                return {'IP Address': ip, 'Hostname': 'linux-1'}
+            creds = [('root', 'wrong'), ('svc', 'wrong'), ('svc', 'right')]
+            assert collector._try_credentials('10.70.0.1', 'ssh', creds, login)['Hostname'] == 'linux-1'
+            assert collector._try_credentials('10.70.0.2', 'wmi', creds[:1], login) is None
+
+            db_path = os.path.join(tmp, 'assets.db')
+            conn = sqlite3.connect(db_path)
+            conn.execute('CREATE TABLE IF NOT EXISTS assets (id INTEGER PRIMARY KEY, ip_address TEXT, hostname TEXT, '
+                         'serial_number TEXT, mac_address TEXT, device_fingerprint TEXT, created_at TEXT, '
+                         'last_seen TEXT, seen_count INTEGER, data_source TEXT, duplicate_check_status TEXT)')
+            conn.commit()
+            conn.close()
+            validator = SmartDuplicateValidator(db_path)
+            device = {'ip_address': '10.70.0.1', 'hostname': 'linux-1', 'serial_number': 'SN7', 'mac_address': 'aa:07'}
+            for _ in range(2):
+                # The check takes its device from the collector's save span
+                with get_tracer().span('save', device='10.70.0.1'):
+                    validator.smart_save_device(dict(device))
+            assert get_tracer().flush()
+            spans = sink.load(scan_id)
+        finally:
+            os.chdir(cwd)
+            set_tracer(None)
+            credential_affinity._default_cache = None
+
+    local = [s for s in spans if s.device == '127.0.0.1']
+    top = [s for s in local if s.stage == 'collect_any']
+    assert len(top) == 1 and top[0].outcome == 'fail'
+    probes = [s for s in local if s.stage == 'port_probe']
+    assert len(probes) == 4 and all(s.outcome == 'closed' and s.parent_id == top[0].span_id for s in probes)
+    assert [s.parent_id for s in local if s.stage == 'nmap'] == [top[0].span_id]
+
+    ssh = [s for s in spans if s.stage == 'ssh']
+    assert len(ssh) == 1 and ssh[0].device == '10.70.0.1' and ssh[0].retries == 2 and ssh[0].outcome == 'ok'
+    wmi = [s for s in spans if s.stage == 'wmi']
+    assert len(wmi) == 1 and wmi[0].outcome == 'fail'
+    saves = {s.span_id for s in spans if s.stage == 'save'}
+    checks = [s for s in spans if s.stage == 'duplicate_check']
+    assert [s.outcome for s in checks] == ['insert', 'update'] and {s.parent_id for s in checks} == saves
+
+
+def _span(trace, span_id, stage, start, ms, parent=None, device='10.0.0.1'):
+    return Span(trace_id=trace, span_id=span_id, parent_id=parent, scan_id='s', collector='t', device=device,
+                stage=stage, started_at=start, duration_ms=ms)
+
+
+def test_report_percentiles_and_critical_path():
+    print('🧪 Testing stage percentiles and critical paths...')
+    values = sorted(range(1, 101))
+    assert (percentile(values, 0.5), percentile(values, 0.95), percentile(values, 0.99)) == (50, 95, 99)
+    assert percentile([], 0.5) == 0.0 and percentile([7.0], 0.99) == 7.0
+
+    t = 1000.0
+    spans = [
+        _span('a', 'd1', 'discovery', t, 20),
+        _span('a', 'c1', 'collect', t + 1, 5000),
+        _span('a', 'o1', 'os_detection', t + 1.0, 300, 'c1'),
+        _span('a', 'w1', 'wmi', t + 1.3, 4000, 'c1'),   # auth retries
+        _span('a', 'h1', 'http', t + 1.3, 900, 'c1'),   # parallel, finished earlier
+        _span('a', 's1', 'save', t + 6.1, 80),
+    ]
+    path = critical_path(spans)
+    assert [stage for stage, _ in path] == ['discovery', 'os_detection', 'wmi', 'collect (self)', 'save']
+    assert dict(path)['wmi'] == 4000 and dict(path)['collect (self)'] == 700
+
+    for n in range(20):  # quick devices
+        spans.append(_span(f'q{n}', f'q{n}', 'collect', t + n, 100 + n, device=f'10.0.1.{n}'))
+    spans.append(_span('s', 'step', 'step1_discovery', t, 60000, device=''))
+    report = trace_report(spans, top=3)
+    assert report['devices'] == 21 and report['spans'] == len(spans)
+    assert report['stages']['collect']['count'] == 21 and report['stages']['collect']['max_ms'] == 5000
+    assert report['stages']['collect']['p50_ms'] == 110
+    assert next(iter(report['stages'])) == 'step1_discovery'  # ordered by total time
+    slowest = report['slowest']
+    assert [d['device'] for d in slowest] == ['10.0.0.1', '10.0.1.19', '10.0.1.18']
+    assert slowest[0]['busy_ms'] == 5100 and slowest[0]['critical_path'] == path
+
+
+def test_report_cli():
+    print('🧪 Testing the report command...')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'assets.db')
+        tracer = CollectionTracer(SqliteTraceSink(db_path))
+        tracer.begin_scan('old')
+        with tracer.span('collect', device='10.9.9.9'):
+            pass
+        time.sleep(0.01)
+        tracer.begin_scan('cli')
+        for n in range(5):
+            with tracer.span('collect', device=f'10.3.0.{n}'):
+                with tracer.span('wmi') as span:
+                    span.retries = n
+                    time.sleep(0.002 * n)
+        assert tracer.flush()
+
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'collection_tracing.py')
+        output = subprocess.run([sys.executable, script, 'report', '--db', db_path, '--top', '2', '--json'],
+                                capture_output=True, text=True, timeout=60, check=True).stdout
+        report = json.loads(output)
+        assert report['devices'] == 5  # latest scan only
+        assert [d['device'] for d in report['slowest']] == ['10.3.0.4', '10.3.0.3']
+        assert report['slowest'][0]['retries'] == 4
+
+        text = subprocess.run([sys.executable, script, 'report', '--db', db_path, '--scan', 'all'],
+                              capture_output=True, text=True, timeout=60, check=True).stdout
+        assert '6 devices' in text and 'critical path: wmi' in text
+    print('✅ Collection tracing test completed successfully!')
+
+
+if __name__ == '__main__':
+    test_span_nesting_and_thread_handoff()
+    test_disabled_tracer_is_transparent()
+    test_sinks_and_batching()
+    test_core_collector_and_validator_spans()
+    test_report_percentiles_and_critical_path()
+    test_report_cli()
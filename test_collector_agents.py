@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Test distributed collector agents against fake collectors: several agent
+processes on localhost draining the scan_jobs queue (shared SQLite and
+HTTP), lease expiry/takeover and idempotent result ingestion
+"""
+
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from collector_agent import CollectorAgent, HttpQueueTransport, SQLiteQueueTransport
+from collector_job_queue import LeaseLostError, ScanJobQueue, register_collector_job_routes
+
+
+def fake_collect(ip, options):
+    time.sleep(options.get('delay', 0.002))
+    if int(ip.rsplit('.', 1)[1]) % 2 == 0:
+        return None  # unreachable
+    return {'ip_address': ip, 'hostname': f"host-{ip.replace('.', '-')}", 'os_name': 'Windows 11',
+            'installed_software': ['dropped', 'before', 'upload']}
+
+
+def _agent_process(agent_id, db_path=None, server=None):
+    transport = HttpQueueTransport(server) if server else SQLiteQueueTransport(db_path)
+    agent = CollectorAgent(agent_id, transport, 'test_collector_agents:fake_collect', {'delay': 0.03},
+                           threads=4, upload_batch_size=8, lease_seconds=10, poll_interval=0.2,
+                           log_callback=lambda msg: None)
+    agent.run_forever(max_idle_polls=3)
+
+
+def _create_assets(db_path):
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE assets (id INTEGER PRIMARY KEY, ip_address TEXT, hostname TEXT, "
+                     "os_name TEXT, collection_method TEXT)")
+
+
+def _run_agents(count, **kwargs):
+    ctx = multiprocessing.get_context('spawn')
+    processes = [ctx.Process(target=_agent_process, args=(f'agent-{n}',), kwargs=kwargs) for n in range(count)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+    assert all(process.exitcode == 0 for process in processes)
+
+
+def _assert_drained(db_path, job_queue, agent_count):
+    status = job_queue.job_status()
+    assert status['counts'] == {'completed': 13}
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute("SELECT ip_address, COUNT(*) FROM assets GROUP BY ip_address").fetchall()
+        methods = {row[0] for row in conn.execute("SELECT DISTINCT collection_method FROM assets")}
+    assert len(rows) == 127 and all(count == 1 for _, count in rows)
+    assert status['devices_ingested'] == 127
+    agents = job_queue.agents()
+    assert len(agents) == agent_count and sum(a['jobs_completed'] for a in agents) == 13
+    assert len(methods) > 1  # work was actually spread over several agents
+
+
+def test_agents_share_sqlite_queue():
+    print('🧪 Testing 3 agent processes on a shared SQLite queue...')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'assets.db')
+        _create_assets(db_path)
+        job_queue = ScanJobQueue(db_path)
+        assert len(job_queue.enqueue(['10.40.0.0/24'], batch_size=20, job_key='nightly')) == 13
+        assert job_queue.enqueue(['10.40.0.0/24'], batch_size=20, job_key='nightly') == []  # deduped
+        _run_agents(3, db_path=db_path)
+        _assert_drained(db_path, job_queue, 3)
+
+
+def test_agents_over_http():
+    print('🧪 Testing 3 agent processes over the HTTP API...')
+    from flask import Flask
+    from werkzeug.serving import make_server
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'assets.db')
+        _create_assets(db_path)
+        job_queue = ScanJobQueue(db_path)
+        app = Flask('collector_test')
+        register_collector_job_routes(app, job_queue)
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        base_url = f'http://127.0.0.1:{server.server_port}'
+        try:
+            client = app.test_client()
+            response = client.post('/api/collector/jobs', json={'targets': ['10.41.0.0/24'], 'batch_size': 20})
+            assert len(response.get_json()['job_ids']) == 13
+            _run_agents(3, server=base_url)
+            _assert_drained(db_path, job_queue, 3)
+            assert client.get('/api/collector/jobs').get_json()['counts'] == {'completed': 13}
+            agents = client.get('/api/collector/agents').get_json()['agents']
+            assert {a['agent_id'] for a in agents} == {'agent-0', 'agent-1', 'agent-2'}
+            assert client.get('/api/collector/jobs/1').get_json()['job']['status'] == 'completed'
+        finally:
+            server.shutdown()
+
+
+def test_lease_expiry_and_idempotent_ingestion():
+    print('🧪 Testing lease expiry, takeover and idempotent uploads...')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'assets.db')
+        _create_assets(db_path)
+        job_queue = ScanJobQueue(db_path, max_attempts=2)
+        job_queue.enqueue(['10.42.0.1-4'])
+
+        stalled = job_queue.claim('stalled-agent', lease_seconds=0.5)
+        batch = [{'ip_address': '10.42.0.1', 'hostname': 'first'}]
+        assert job_queue.submit_results('stalled-agent', stalled['job_id'], stalled['lease_token'], 0, batch)['ingested'] == 1
+        retry = job_queue.submit_results('stalled-agent', stalled['job_id'], stalled['lease_token'], 0, batch)
+        assert retry['duplicate'] and retry['ingested'] == 0
+        assert job_queue.claim('other-agent') is None  # still leased
+
+        time.sleep(0.6)  # no heartbeat -> lease expires
+        takeover = job_queue.claim('other-agent')
+        assert takeover['job_id'] == stalled['job_id'] and takeover['attempt'] == 2
+        try:
+            job_queue.heartbeat('stalled-agent', stalled['job_id'], stalled['lease_token'])
+            assert False, 'stale lease accepted'
+        except LeaseLostError:
+            pass
+
+        job_queue.submit_results('other-agent', takeover['job_id'], takeover['lease_token'], 0,
+                                 [{'ip_address': '10.42.0.1', 'hostname': 'second'}])
+        job_queue.complete('other-agent', takeover['job_id'], takeover['lease_token'])
+        with sqlite3.connect(db_path) as conn:
+            assert conn.execute("SELECT hostname FROM assets WHERE ip_address = '10.42.0.1'").fetchall() == [('second',)]
+        assert job_queue.job(takeover['job_id'])['status'] == 'completed'
+        print('✅ Collector agents test completed successfully!')
+
+
+if __name__ == '__main__':
+    test_agents_share_sqlite_queue()
+    test_agents_over_http()
+    test_lease_expiry_and_idempotent_ingestion()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Test the queue-based FeatureLogger backend: background writer, per-feature
+rotation, JSON-lines output and the in-memory recent-log rings
+"""
+
+import json
+import tempfile
+from pathlib import Path
+
+from comprehensive_logging_system import FeatureLogger
+
+
+def test_feature_logger_queue_backend():
+    print('🧪 Testing queue-based FeatureLogger...')
+    with tempfile.TemporaryDirectory() as tmp:
+        feature_logger = FeatureLogger(log_directory=tmp, max_bytes=4096, backup_count=2,
+                                       structured=True, ring_size=50, console=False)
+        try:
+            for i in range(300):
+                feature_logger.log_feature('data_collection', 'INFO', f'collected device {i}', job_id='job-1')
+            feature_logger.log_feature('data_collection', 'ERROR', 'WMI access denied', ip='10.0.0.5')
+            feature_logger.master_logger.warning('master warning')
+            feature_logger.flush()
+
+            # Bounded ring per feature, newest last, no disk reads
+            recent = feature_logger.get_recent_logs('data_collection', limit=10)
+            assert len(recent) == 10
+            assert recent[-1].rstrip().endswith('WMI access denied')
+            assert len(feature_logger.get_recent_logs('data_collection', limit=1000)) == 50
+            assert feature_logger.get_recent_logs(limit=5)[-1].rstrip().endswith('master warning')
+
+            # Size rotation keeps the feature file bounded
+            log_dir = Path(tmp)
+            assert (log_dir / 'data_collection.log').stat().st_size <= 4096
+            assert (log_dir / 'data_collection.log.1').exists()
+            assert not (log_dir / 'data_collection.log.3').exists()
+
+            # Structured JSON-lines output carries the extra context
+            last = json.loads((log_dir / 'data_collection.jsonl').read_text(encoding='utf-8').splitlines()[-1])
+            assert last['level'] == 'ERROR' and last['ip'] == '10.0.0.5'
+            assert last['feature'] == 'data_collection'
+
+            status = feature_logger.get_feature_status('data_collection')
+            assert status['total_logs'] == 301 and status['errors'] == 1
+        finally:
+            feature_logger.shutdown()
+        print('✅ FeatureLogger test completed successfully!')
+
+
+if __name__ == '__main__':
+    test_feature_logger_queue_backend()
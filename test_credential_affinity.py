@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Test the credential affinity cache with fake WMI/SSH logins: host and /24
+affinity (persisted across runs), negative caching of auth failures (and
+only auth failures), racing the top-2 candidates only when there is no
+affinity, and the attempts-saved statistics
+"""
+
+import os
+import socket
+import tempfile
+import threading
+import time
+
+from credential_affinity import (AUTH_REJECTED, DEPENDENCY_FAILURE, PLATFORM_FAILURE, TRANSPORT_FAILURE,
+                                 UNKNOWN_FAILURE, CredentialAffinityCache, classify_failure, normalize_credential)
+
+CREDS = [('admin', 'wrong1'), {'username': 'svc', 'password': 'wrong2', 'domain': 'CORP'},
+         'backup:wrong3', ('inventory', 'S3cret!')]
+
+
+class FakeLogin:
+    """Only ('inventory', 'S3cret!') is accepted; records every login attempt"""
+
+    def __init__(self, delay=0.0, slow_user=None, unreachable=()):
+        self.delay = delay
+        self.slow_user = slow_user
+        self.unreachable = set(unreachable)
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, ip, username, password):
+        with self.lock:
+            self.calls.append((ip, username))
+        if ip in self.unreachable:
+            raise socket.timeout('timed out')
+        time.sleep(0.3 if username == self.slow_user else self.delay)
+        if (username, password) == ('inventory', 'S3cret!'):
+            return {'ip_address': ip, 'hostname': f'host-{ip}'}
+        return {'IP Address': ip, 'Status': 'Auth Failed', 'Error': 'SSH authentication failed.'}
+
+
+def _wmi_error(code, message, ip):
+    """Same shape as collectors/wmi_collector._error()"""
+    return {'Error': {'code': code, 'message': message, 'target': ip}}
+
+
+def _try(cache, ip, login, protocol='wmi'):
+    return cache.try_credentials(ip, protocol, CREDS, lambda u, p, cred: login(ip, u, p))
+
+
+def test_host_and_subnet_affinity_persist():
+    print('🧪 Testing host and /24 affinity across runs...')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'assets.db')
+        cache = CredentialAffinityCache(db_path, race_protocols=())
+        first = _try(cache, '10.50.1.10', FakeLogin())
+        assert first.success and first.attempts == 4 and first.source == 'none'
+        assert normalize_credential(first.credential) == ('inventory', 'S3cret!')
+
+        # New process / new scan: state comes back from SQLite
+        cache = CredentialAffinityCache(db_path, race_protocols=())
+        login = FakeLogin()
+        again = _try(cache, '10.50.1.10', login)
+        assert again.success and again.attempts == 1 and again.source == 'host'
+        neighbour = _try(cache, '10.50.1.77', login)
+        assert neighbour.success and neighbour.attempts == 1 and neighbour.source == 'subnet'
+        other_subnet = _try(cache, '10.50.2.5', login)
+        assert other_subnet.attempts == 4  # no affinity outside the /24
+        # Affinity is per protocol
+        assert cache.order('10.50.1.10', 'ssh', CREDS)[2] == 'none'
+        with open(db_path, 'rb') as f:
+            assert b'S3cret!' not in f.read()  # only a fingerprint is stored
+
+        stats = cache.reset_stats()
+        assert stats['hosts'] == 3 and stats['attempts'] == 6
+        assert stats['naive_attempts'] == 12 and stats['attempts_saved'] == 6
+        assert stats['host_hits'] == 1 and stats['subnet_hits'] == 1
+        assert cache.stats['attempts'] == 0
+
+
+def test_negative_cache_and_cooldown():
+    print('🧪 Testing negative caching of auth failures...')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'assets.db')
+        cache = CredentialAffinityCache(db_path, failure_cooldown_minutes=0.01, race_protocols=())
+        bad_only = CREDS[:3]
+        login = FakeLogin()
+        failed = cache.try_credentials('10.51.0.4', 'ssh', bad_only, lambda u, p, c: login('10.51.0.4', u, p))
+        assert not failed.success and failed.attempts == 3
+
+        # Known-bad creds are not retried during the cool-down (even by another process)
+        cache = CredentialAffinityCache(db_path, failure_cooldown_minutes=0.01, race_protocols=())
+        skipped = cache.try_credentials('10.51.0.4', 'ssh', bad_only, lambda u, p, c: login('10.51.0.4', u, p))
+        assert skipped.attempts == 0 and len(skipped.skipped) == 3 and len(login.calls) == 3
+        assert cache.stats['negative_skips'] == 3 and cache.stats['attempts_saved'] == 3
+
+        time.sleep(0.7)  # cool-down over
+        retried = cache.try_credentials('10.51.0.4', 'ssh', bad_only, lambda u, p, c: login('10.51.0.4', u, p))
+        assert retried.attempts == 3
+
+        # Timeouts are host problems, not bad credentials
+        down = FakeLogin(unreachable={'10.51.0.9'})
+        _try(cache, '10.51.0.9', down)
+        assert not any(cache.is_negative('10.51.0.9', 'wmi', cred) for cred in CREDS)
+
+
+def test_failure_classification():
+    print('🧪 Testing failure classification...')
+    assert classify_failure({'Status': 'Auth Failed', 'Error': 'SSH authentication failed.'}) == AUTH_REJECTED
+    assert classify_failure(_wmi_error('ConnectionFailed', "Failed to open WMI connection to 10.0.0.1. "
+                                       "Details: x_wmi('Access is denied. ')", '10.0.0.1')) == AUTH_REJECTED
+    assert classify_failure(_wmi_error('ConnectionFailed', "Failed to open WMI connection to 10.0.0.1. "
+                                       "Details: x_wmi('The RPC server is unavailable. ')", '10.0.0.1')) == TRANSPORT_FAILURE
+    assert classify_failure(_wmi_error('PlatformNotSupported', 'WMI is only available on Windows.', None)) == PLATFORM_FAILURE
+    assert classify_failure(_wmi_error('DependencyMissing', 'Missing dependencies: wmi', None)) == DEPENDENCY_FAILURE
+    assert classify_failure({'Status': 'SSH Error', 'Error': 'SSH connection error: Error reading SSH protocol banner'}) \
+        == TRANSPORT_FAILURE
+    assert classify_failure({'wmi_collection_status': 'SSH Failed: [Errno 113] No route to host'}) == TRANSPORT_FAILURE
+    assert classify_failure(socket.timeout('timed out')) == TRANSPORT_FAILURE
+    assert classify_failure(ImportError('No module named paramiko')) == DEPENDENCY_FAILURE
+    assert classify_failure(type('AuthenticationException', (Exception,), {})('bad')) == AUTH_REJECTED
+    assert classify_failure(None) == UNKNOWN_FAILURE
+
+
+def test_unreachable_scan_does_not_lock_out_host():
+    print('🧪 Testing an unreachable scan followed by a reachable one...')
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = CredentialAffinityCache(os.path.join(tmp, 'assets.db'), race_protocols=())
+        ip = '10.54.0.8'
+        cache.record_success(ip, 'wmi', CREDS[3])
+        calls = []
+
+        def unreachable(username, password, cred):
+            calls.append(username)
+            return _wmi_error('ConnectionFailed', f"Failed to open WMI connection to {ip}. "
+                              "Details: x_wmi('The RPC server is unavailable. ')", ip)
+
+        down = cache.try_credentials(ip, 'wmi', CREDS, unreachable)
+        assert not down.success and down.attempts == 4 and down.failures == {TRANSPORT_FAILURE: 4}
+        ssh_down = cache.try_credentials(ip, 'ssh', CREDS, lambda u, p, c: {
+            'Status': 'SSH Error', 'Error': 'SSH connection error: [Errno 111] Connection refused'})
+        assert ssh_down.failures == {TRANSPORT_FAILURE: 4}
+        # ultra_fast_collector's standalone collectors report failures as a status, not an Error key
+        status_down = cache.try_credentials(ip, 'ssh', CREDS, lambda u, p, c: {
+            'ip_address': ip, 'wmi_collection_status': 'SSH Failed: timed out'})
+        assert not status_down.success and status_down.failures == {TRANSPORT_FAILURE: 4}
+        assert cache.record_failed_attempt(ip, 'ssh', CREDS[0], ConnectionResetError('reset by peer')) == TRANSPORT_FAILURE
+        assert not any(cache.is_negative(ip, protocol, cred) for cred in CREDS for protocol in ('wmi', 'ssh'))
+
+        # Host comes back: nothing skipped, and the remembered credential still goes first
+        login = FakeLogin()
+        back = _try(cache, ip, login)
+        assert back.success and back.skipped == [] and back.attempts == 1 and back.source == 'host'
+        ssh_back = _try(cache, ip, login, protocol='ssh')
+        assert ssh_back.success and ssh_back.skipped == [] and ssh_back.attempts == 4
+        assert ssh_back.failures == {AUTH_REJECTED: 3}
+        assert cache.record_failed_attempt(ip, 'ssh', CREDS[0], type('AuthenticationException', (Exception,), {})()) \
+            == AUTH_REJECTED
+        assert cache.is_negative(ip, 'ssh', CREDS[0])
+
+
+def test_failure_invalidates_host_affinity():
+    print('🧪 Testing rotated passwords drop host affinity...')
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = CredentialAffinityCache(os.path.join(tmp, 'assets.db'), race_protocols=())
+        cache.record_success('10.52.0.1', 'wmi', CREDS[0])
+        assert cache.order('10.52.0.1', 'wmi', CREDS) == (CREDS[:], [], 'host')
+        rotated = _try(cache, '10.52.0.1', FakeLogin())
+        assert rotated.success and rotated.attempts == 4
+        assert normalize_credential(cache.order('10.52.0.1', 'wmi', CREDS)[0][0]) == ('inventory', 'S3cret!')
+
+        expired = CredentialAffinityCache(os.path.join(tmp, 'ttl.db'), success_ttl_hours=0.0001)
+        expired.record_success('10.52.0.2', 'wmi', CREDS[3])
+        time.sleep(0.5)
+        assert expired.order('10.52.0.2', 'wmi', CREDS)[2] == 'none'
+
+
+def test_race_top_two():
+    print('🧪 Testing top-2 race...')
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = CredentialAffinityCache(os.path.join(tmp, 'assets.db'))
+        cache.record_success('10.53.0.1', 'ssh', CREDS[3])  # subnet hint for .2
+        cache.record_failure('10.53.0.2', 'ssh', CREDS[1])
+        login = FakeLogin(delay=0.05)
+        hinted = _try(cache, '10.53.0.2', login, protocol='ssh')
+        # The /24's working credential goes alone: no extra failed login against another account
+        assert hinted.success and hinted.source == 'subnet' and hinted.attempts == 1
+        assert login.calls == [('10.53.0.2', 'inventory')] and cache.stats['races'] == 0
+
+        # Nothing known about the /24: the top two race
+        started = time.perf_counter()
+        outcome = cache.try_credentials('10.54.9.2', 'ssh', [CREDS[0], CREDS[3]],
+                                        lambda u, p, c: FakeLogin(delay=0.2)('10.54.9.2', u, p))
+        elapsed = time.perf_counter() - started
+        assert outcome.success and outcome.source == 'none'
+        assert outcome.attempts == 2 and elapsed < 0.35  # raced against 'admin', not queued behind it
+        assert cache.stats['races'] == 1
+
+        # The winner is returned without waiting for a slow loser
+        cache.forget()
+        started = time.perf_counter()
+        fast = cache.try_credentials('10.53.0.3', 'ssh', [CREDS[3], ('slowpoke', 'x')],
+                                     lambda u, p, c: FakeLogin(slow_user='slowpoke')('10.53.0.3', u, p))
+        assert fast.success and fast.attempts == 2 and time.perf_counter() - started < 0.25
+
+        # Host-level hits are tried alone
+        host_hit = _try(cache, '10.53.0.3', FakeLogin(), protocol='ssh')
+        assert host_hit.source == 'host' and host_hit.attempts == 1
+        time.sleep(0.4)  # let the raced loser settle before the database goes away
+        assert cache.is_negative('10.53.0.3', 'ssh', ('slowpoke', 'x'))
+        print('✅ Credential affinity test completed successfully!')
+
+
+if __name__ == '__main__':
+    test_host_and_subnet_affinity_persist()
+    test_negative_cache_and_cooldown()
+    test_failure_classification()
+    test_unreachable_scan_does_not_lock_out_host()
+    test_failure_invalidates_host_affinity()
+    test_race_top_two()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Test online database backups: consistent snapshots while a writer commits,
+gzip compression, integrity verification, retention, scheduled snapshots
+and restore into a live database
+"""
+
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from database_backup import DatabaseBackup, SnapshotScheduler, integrity_check
+
+
+def _make_db(path, rows=3000, journal_mode='wal'):
+    conn = sqlite3.connect(path)
+    conn.execute(f'PRAGMA journal_mode={journal_mode}')
+    conn.execute('CREATE TABLE assets (id INTEGER PRIMARY KEY, hostname TEXT, payload BLOB)')
+    conn.execute('CREATE TABLE ledger (id INTEGER PRIMARY KEY, amount INTEGER)')
+    conn.execute('CREATE TABLE totals (id INTEGER PRIMARY KEY, total INTEGER)')
+    conn.execute('INSERT INTO totals VALUES (1, 0)')
+    conn.executemany('INSERT INTO assets (hostname, payload) VALUES (?, ?)',
+                     ((f'host-{n}', os.urandom(2000)) for n in range(rows)))
+    conn.commit()
+    conn.close()
+
+
+def _writer(path, stop, committed):
+    """Each transaction adds a ledger row and bumps the total: a torn copy breaks the invariant"""
+    conn = sqlite3.connect(path, timeout=30)
+    n = 0
+    while not stop.is_set():
+        n += 1
+        conn.execute('INSERT INTO ledger (amount) VALUES (?)', (n,))
+        conn.execute('UPDATE totals SET total = total + ? WHERE id = 1', (n,))
+        conn.execute('INSERT INTO assets (hostname, payload) VALUES (?, ?)', (f'new-{n}', os.urandom(1000)))
+        conn.commit()
+        committed.append(n)
+        time.sleep(0.002)
+    conn.close()
+
+
+def _invariant(path):
+    conn = sqlite3.connect(path)
+    try:
+        ledger = conn.execute('SELECT COALESCE(SUM(amount), 0) FROM ledger').fetchone()[0]
+        total = conn.execute('SELECT total FROM totals').fetchone()[0]
+        return ledger == total, total
+    finally:
+        conn.close()
+
+
+def test_backup_verify_and_compression():
+    print('🧪 Testing paged backup, integrity check and gzip snapshots...')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'assets.db')
+        _make_db(db_path)
+        manager = DatabaseBackup(db_path, os.path.join(tmp, 'backups'), pages_per_step=64)
+
+        plain = manager.backup()
+        assert plain.mode == 'paged' and plain.restarts == 0 and plain.verified
+        assert os.path.basename(plain.path).startswith('assets_') and plain.path.endswith('.db')
+        assert integrity_check(plain.path)[0]
+        conn = sqlite3.connect(plain.path)
+        assert conn.execute('SELECT COUNT(*) FROM assets').fetchone()[0] == 3000
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'delete'  # one self-contained file
+        conn.close()
+
+        packed = manager.backup(compression='gzip')
+        assert packed.path.endswith('.db.gz') and packed.compression == 'gzip'
+        assert manager.verify(packed.path) == (True, 'ok')
+        assert [s.compression for s in manager.list_snapshots()] == [None, 'gzip']
+        assert not [f for f in os.listdir(os.path.join(tmp, 'backups')) if f.startswith('.')]
+
+        # A damaged snapshot is reported, not trusted
+        with open(plain.path, 'r+b') as handle:
+            handle.seek(4096 * 3)
+            handle.write(b'\xff' * 4096 * 4)
+        ok, message = manager.verify(plain.path)
+        assert not ok and message
+        try:
+            manager.restore(plain.path)
+            assert False, "restored a corrupt snapshot"
+        except (RuntimeError, sqlite3.DatabaseError):
+            pass
+
+        try:
+            manager.backup(compression='lz4')
+            assert False, "unknown compression accepted"
+        except ValueError:
+            pass
+
+
+def test_consistent_snapshot_while_writing():
+    print('🧪 Testing snapshots taken while a writer commits...')
+    for journal_mode in ('wal', 'delete'):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, 'assets.db')
+            _make_db(db_path, rows=6000, journal_mode=journal_mode)
+            manager = DatabaseBackup(db_path, os.path.join(tmp, 'backups'), pages_per_step=32, step_pause=0.001)
+            stop, committed = threading.Event(), []
+            thread = threading.Thread(target=_writer, args=(db_path, stop, committed))
+            thread.start()
+            try:
+                time.sleep(0.05)
+                results = [manager.backup() for _ in range(3)]
+            finally:
+                stop.set()
+                thread.join()
+            assert committed
+            for result in results:
+                consistent, total = _invariant(result.path)
+                assert consistent and result.verified, (journal_mode, result)
+            # The writer kept committing between steps: paged copies restarted and fell back to a snapshot
+            assert any(r.restarts for r in results)
+            assert all(r.mode == 'snapshot' for r in results if r.restarts > manager.max_restarts)
+
+
+def test_restore_and_safety_backup():
+    print('🧪 Testing restore into a live database...')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'assets.db')
+        _make_db(db_path, rows=500)
+        manager = DatabaseBackup(db_path, os.path.join(tmp, 'backups'), compression='gzip')
+        snapshot = manager.backup()
+
+        reader = sqlite3.connect(db_path)  # an open connection sees the restored content
+        conn = sqlite3.connect(db_path)
+        conn.execute('DELETE FROM assets WHERE id > 100')
+        conn.commit()
+        conn.close()
+        assert reader.execute('SELECT COUNT(*) FROM assets').fetchone()[0] == 100
+
+        safety = manager.restore()  # latest snapshot
+        assert reader.execute('SELECT COUNT(*) FROM assets').fetchone()[0] == 500
+        reader.close()
+        assert safety is not None and safety.path != snapshot.path
+        conn = sqlite3.connect(safety.path)
+        assert conn.execute('SELECT COUNT(*) FROM assets').fetchone()[0] == 100
+        conn.close()
+
+
+def test_retention_and_scheduler():
+    print('🧪 Testing retention and scheduled snapshots...')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'assets.db')
+        _make_db(db_path, rows=200)
+        backup_dir = os.path.join(tmp, 'backups')
+        manager = DatabaseBackup(db_path, backup_dir)
+        paths = [manager.backup().path for _ in range(5)]
+        assert len({os.path.basename(p) for p in paths}) == 5  # same second: sequence suffixes
+        removed = manager.prune(keep_last=2)
+        assert removed == paths[:3]
+        assert [s.path for s in manager.list_snapshots()] == paths[3:]
+        # Old snapshots age out, but the newest one always stays
+        old = os.path.join(backup_dir, 'assets_20200101_000000.db')
+        os.rename(paths[3], old)
+        assert manager.prune(keep_last=10, max_age_days=30) == [old]
+        assert manager.prune(keep_last=1, max_age_days=0) == []
+        # Files of other databases in the folder are never touched
+        open(os.path.join(backup_dir, 'other_20200101_000000.db'), 'w').close()
+        assert len(manager.list_snapshots()) == 1
+
+        scheduler = SnapshotScheduler(manager, interval_hours=0.2 / 3600, keep_last=2, run_immediately=True).start()
+        try:
+            deadline = time.time() + 20
+            while time.time() < deadline and (scheduler.last_result is None or
+                                              len(os.listdir(backup_dir)) < 3):
+                time.sleep(0.1)
+            time.sleep(0.5)
+        finally:
+            scheduler.stop(timeout=10)
+        assert scheduler.last_error is None and scheduler.last_result.verified
+        assert len(manager.list_snapshots()) == 2
+    print('✅ Database backup test completed successfully!')
+
+
+if __name__ == '__main__':
+    test_backup_verify_and_compression()
+    test_consistent_snapshot_while_writing()
+    test_restore_and_safety_backup()
+    test_retention_and_scheduler()
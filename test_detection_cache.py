@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Test the detection fingerprint cache against real loopback listeners: hits
+on an unchanged device, misses on port/MAC changes, TTL and forced refresh,
+and a warm rescan that costs only the port probe
+"""
+
+import os
+import socket
+import tempfile
+import threading
+import time
+
+from detection_cache import DetectionCache, normalize_mac, port_signature, probe_ports
+
+
+class Listeners:
+    def __init__(self, count):
+        self.sockets = []
+        for _ in range(count):
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.bind(('', 0))  # all loopback addresses (127.0.0.0/8)
+            sock.listen(socket.SOMAXCONN)
+            self.sockets.append(sock)
+            threading.Thread(target=self._accept, args=(sock,), daemon=True).start()
+        # Below the ephemeral range, so a probe can never self-connect to it
+        self.closed_port = next(port for port in (1, 7, 9, 13, 19)
+                                if socket.socket().connect_ex(('127.0.0.1', port)) != 0)
+
+    @staticmethod
+    def _accept(sock):
+        while True:
+            try:
+                conn, _ = sock.accept()
+            except OSError:
+                return
+            conn.close()
+
+    @property
+    def ports(self):
+        return [s.getsockname()[1] for s in self.sockets]
+
+    def close(self, index=None):
+        for sock in self.sockets if index is None else [self.sockets[index]]:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)  # wakes the blocked accept()
+            except OSError:
+                pass
+            sock.close()
+
+
+class SlowDetector:
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.calls = []
+
+    def __call__(self, ip):
+        self.calls.append(ip)
+        time.sleep(self.delay)
+        return {'ip': ip, 'os_family': 'linux', 'open_ports': [22], 'services': {22: 'ssh'},
+                'nmap_device_type': 'server', 'nmap_confidence': 92, 'detection_method': 'NMAP OS Detection'}
+
+
+def test_probe_and_signature():
+    print('🧪 Testing non-blocking port probe...')
+    listeners = Listeners(2)
+    try:
+        ports = listeners.ports + [listeners.closed_port]
+        assert probe_ports('127.0.0.1', ports, timeout=0.5) == sorted(listeners.ports)
+        assert port_signature([445, 135]) == port_signature([135, 445, 445])
+        assert normalize_mac('AA-BB-CC-0-1-2') == 'aa:bb:cc:00:01:02'
+        assert normalize_mac('00:00:00:00:00:00') is None
+    finally:
+        listeners.close()
+
+
+def test_cache_hits_and_invalidation():
+    print('🧪 Testing cache hits, port changes, MAC keying, TTL and forced refresh...')
+    listeners = Listeners(3)
+    arp = {'127.0.0.1': 'aa:bb:cc:00:00:01'}
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'assets.db')
+        ports = listeners.ports + [listeners.closed_port]
+        cache = DetectionCache(db_path, ports=ports, probe_timeout=0.3, arp_lookup=arp.get)
+        detector = SlowDetector()
+        first, hit = cache.detect('127.0.0.1', detector)
+        assert not hit and first['os_family'] == 'linux'
+
+        cache = DetectionCache(db_path, ports=ports, probe_timeout=0.3, arp_lookup=arp.get)  # next run
+        cached, hit = cache.detect('127.0.0.1', detector)
+        assert hit and len(detector.calls) == 1
+        assert cached['nmap_confidence'] == 92 and cached['detection_method'].endswith('(cached)')
+
+        # Same NIC after a DHCP move → still a hit; a different NIC on the old IP → miss
+        arp.clear()
+        arp['127.0.0.2'] = 'aa:bb:cc:00:00:01'
+        moved, hit = cache.detect('127.0.0.2', detector)
+        assert hit and moved['ip'] == '127.0.0.2'
+        arp['127.0.0.1'] = 'aa:bb:cc:00:00:99'
+        _, hit = cache.detect('127.0.0.1', detector)
+        assert not hit and len(detector.calls) == 2
+
+        # Port set changed → re-detect
+        listeners.close(0)
+        _, hit = cache.detect('127.0.0.2', detector)
+        assert not hit and cache.stats['changed'] == 1 and len(detector.calls) == 3
+
+        _, hit = cache.detect('127.0.0.2', detector, force_refresh=True)
+        assert not hit and cache.stats['refreshed'] == 1
+
+        expiring = DetectionCache(db_path, ttl_hours=0.0001, ports=ports, probe_timeout=0.3, arp_lookup=arp.get)
+        time.sleep(0.5)
+        _, hit = expiring.detect('127.0.0.2', detector)
+        assert not hit
+        assert cache.invalidate() >= 1 and cache.summary()['entries'] == 0
+    listeners.close()
+
+
+def test_warm_rescan_costs_only_the_probe():
+    print('🧪 Testing warm rescan cost...')
+    listeners = Listeners(2)
+    with tempfile.TemporaryDirectory() as tmp:
+        ports = listeners.ports + [listeners.closed_port]
+        cache = DetectionCache(os.path.join(tmp, 'assets.db'), ports=ports, probe_timeout=0.3,
+                               arp_lookup=lambda ip: None)
+        detector = SlowDetector(delay=0.05)
+        hosts = [f'127.0.1.{n}' for n in range(1, 41)]
+
+        started = time.perf_counter()
+        for ip in hosts:
+            cache.detect(ip, detector)
+        cold = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for ip in hosts:
+            cache.detect(ip, detector)
+        warm = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for ip in hosts:
+            probe_ports(ip, ports, 0.3)
+        probe_only = time.perf_counter() - started
+
+        assert len(detector.calls) == len(hosts) and cache.stats['hits'] == len(hosts)
+        assert warm < cold / 3
+        assert warm < probe_only + 0.5  # cache lookup overhead is small next to the probe
+        print(f'   cold {cold:.2f}s, warm {warm:.2f}s, probe only {probe_only:.2f}s')
+    listeners.close()
+    print('✅ Detection cache test completed successfully!')
+
+
+if __name__ == '__main__':
+    test_probe_and_signature()
+    test_cache_hits_and_invalidation()
+    test_warm_rescan_costs_only_the_probe()
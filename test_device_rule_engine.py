@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Test the table-driven device classification engine: the compiled keyword
+matcher against plain substring checks, golden outputs recorded from the
+original hand-written classifiers, and the one-pass database reclassification
+"""
+
+import json
+import os
+import random
+import sqlite3
+import tempfile
+from types import SimpleNamespace
+
+from device_rule_engine import (KeywordMatcher, basic_device_type, classify_asset_data, classify_by_ports,
+                                get_rule_engine, http_type_guess, infer_infra, infer_infra_from_ports,
+                                infer_infra_from_sysdescr, strategy_device_key, ultimate_device_key)
+
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'device_classification_golden.json')
+
+_WORDS = ['printer', 'LaserJet', 'OfficeJet', 'bizhub', 'imageCLASS', 'Ricoh', 'Kyocera', 'Xerox', 'Brother', 'Canon',
+          'Command Center', 'Yealink', 'Grandstream', 'Polycom', 'IP Phone', 'PBX', '3CX', 'FreePBX', 'Asterisk',
+          'FortiGate', 'FortiOS', 'Switch', 'Catalyst', 'EdgeSwitch', 'Router', 'EdgeOS', 'MikroTik', 'AP ',
+          ' Access Point', 'FortiAP', 'Omada', 'Smart TV', 'webOS', 'Bravia', 'Tizen', 'Android TV', 'Hisense',
+          'Philips TV', 'VMware', 'ESXi', 'VMware ESXi', 'HP LaserJet', 'Kyocera Command Center',
+          'Ricoh Web Image Monitor', 'Ubiquiti', 'Cisco', 'Hikvision', 'Dahua', 'Linux', 'Windows', 'Apache',
+          'nginx', 'Dell', 'HP', 'Lenovo', 'Model 7', 'switchboard', 'map', 'gap analysis', 'Web', 'OS',
+          'Cisco IOS', 'NX-OS', 'Palo Alto', 'SonicWall', 'Checkpoint', 'Epson', 'WLAN', 'Hypervisor']
+_HOST_WORDS = ['srv', 'server', 'dc-', 'ad-', 'sql', 'web', 'mail', 'dns', 'dhcp', 'file', 'pc-', 'ws-', 'desktop',
+               'workstation', 'user', 'laptop', 'mobile', 'book', 'portable', 'lt-', 'nb-', 'sw-', 'switch', 'core',
+               'access', 'dist', 'rtr', 'router', 'gw', 'gateway', 'fw', 'firewall', 'asa', 'palo', 'fortinet',
+               'printer', 'hp-', 'hp', 'canon', 'epson', 'lexmark', 'print', 'ap', 'wifi', 'wireless', 'esxi',
+               'vcenter', 'hyper', 'xen', 'proxmox', 'finger', 'bio', 'zk', 'domain', 'exchange', 'acct', '01', 'x']
+_PORTS = [21, 22, 23, 25, 53, 80, 88, 110, 135, 139, 143, 161, 162, 389, 443, 445, 514, 515, 631, 636, 902, 993,
+          995, 1433, 1521, 2049, 3306, 3389, 4343, 4370, 5432, 5988, 8000, 8006, 8080, 8081, 8443, 9100, 9440,
+          27017, 5900, 12345]
+
+
+def _ports(rng, most=9):
+    return sorted(rng.sample(_PORTS, rng.randint(0, most)))
+
+
+def _phrase(rng, words, most=3):
+    return ' '.join(rng.choice(words) for _ in range(rng.randint(0, most)))
+
+
+def classification_corpus(seed=2037, size=300):
+    """Deterministic inputs for every classifier (the golden file is recorded from these)"""
+    rng = random.Random(seed)
+    corpus = {'infra': [], 'snmp_descr': [], 'http_hint': [], 'port_infra': [], 'strategy': [], 'ultimate': [],
+              'nmap_ports': [], 'asset_data': []}
+    for _ in range(size):
+        corpus['infra'].append({
+            'Asset Type': rng.choice(['Windows Workstation', 'Linux Server', 'Hypervisor', 'SNMP Device',
+                                      'snmp device', 'HTTP Device', 'http device', 'Printer', '', None]),
+            'sysDescr': _phrase(rng, _WORDS), 'HTTP Title': _phrase(rng, _WORDS, 2),
+            'Manufacturer': rng.choice(['', None, 'Dell', 'HP', 'Canon', 'Cisco', 'Samsung']),
+            'Device Model': _phrase(rng, _WORDS, 1),
+            'HTTP Type': rng.choice([None, None, 'Smart Display', 'smart display', 'Printer'])})
+        # Keywords split across title/server/body: the blob is glued without separators
+        blob = _phrase(rng, _WORDS, 3)
+        cut1 = rng.randint(0, len(blob))
+        cut2 = rng.randint(cut1, len(blob))
+        corpus['http_hint'].append({'title': blob[:cut1], 'server': blob[cut1:cut2], 'body': blob[cut2:]})
+        corpus['port_infra'].append(_ports(rng))
+        corpus['strategy'].append({'hostname': _phrase(rng, _HOST_WORDS, 2).replace(' ', '-').upper(),
+                                   'os_family': rng.choice(['Windows', 'Linux', 'Unix', 'unknown', 'Cisco IOS', '']),
+                                   'open_ports': _ports(rng), 'services': []})
+        corpus['ultimate'].append({'hostname': _phrase(rng, _HOST_WORDS, 3).replace(' ', ''),
+                                   'os_family': rng.choice(['Windows', 'Linux', 'macOS', 'Darwin', 'Network', 'Cisco',
+                                                            'HP', 'Juniper', 'unknown', '']),
+                                   'os_version': rng.choice(['', '10 Pro', 'Server 2019', 'Windows Server 2022']),
+                                   'services': rng.sample(['http', 'https', 'WebAdmin', 'mysql', 'MSSQL', 'postgres',
+                                                           'smtp', 'pop3', 'imap', 'ipp', 'lpd', 'printer', 'SNMP',
+                                                           'ssh', 'rdp'], rng.randint(0, 4)),
+                                   'open_ports': _ports(rng)})
+        corpus['nmap_ports'].append(_ports(rng, 8))
+        corpus['asset_data'].append([
+            rng.choice(['Windows 10 Pro', 'Windows Server 2019 Datacenter', 'Ubuntu 22.04', 'CentOS Server',
+                        'Linux Mint', 'macOS 14', 'Darwin', 'Android 13', 'iOS 17', 'Fedora', 'FreeBSD', '', None]),
+            rng.choice(['Intel Xeon E5', 'Intel Core i7', 'Intel Atom', 'Mobile Ryzen', '', None]),
+            rng.choice([None, '', 0, 2, 3.9, 4, '8', 15.9, 16, 24, 32, 64, 'n/a']),
+            rng.choice(['10.0.1.1', '192.168.1.254', '10.254.254.3', '10.0.0.5', '', None])])
+        corpus['snmp_descr'].append(rng.choice([None, _phrase(rng, _WORDS)]))
+    return corpus
+
+
+def engine_outputs(corpus):
+    """The engine-backed classifier outputs, in the golden file's shape"""
+    outputs = {
+        'infra': [infer_infra(record) for record in corpus['infra']],
+        'snmp_descr': [infer_infra_from_sysdescr(descr) for descr in corpus['snmp_descr']],
+        'http_hint': [http_type_guess(**record) for record in corpus['http_hint']],
+        'port_infra': [infer_infra_from_ports(set(ports)) for ports in corpus['port_infra']],
+        'strategy': [strategy_device_key(record) for record in corpus['strategy']],
+        'nmap_ports': [classify_by_ports(ports) for ports in corpus['nmap_ports']],
+        'asset_data': [],
+        'ultimate': [],
+    }
+    for args in corpus['asset_data']:
+        try:
+            outputs['asset_data'].append(classify_asset_data(*args))
+        except (TypeError, ValueError):
+            outputs['asset_data'].append('Classification Pending')
+    for record in corpus['ultimate']:
+        device = SimpleNamespace(**record)
+        key, details = ultimate_device_key(device, 0.5)
+        # DEVICE_TYPES of the ultimate collector: 'NETWORK_SWITCH' -> 'Network Switch'
+        label = key.replace('_', ' ').title() if key else basic_device_type(device)
+        outputs['ultimate'].append({'label': label, 'enhanced': key is not None,
+                                    'details': details})
+    return outputs
+
+
+def test_keyword_matcher_matches_substring_semantics():
+    print('🧪 Testing the multi-pattern matcher against plain substring checks...')
+    keywords = ['ap', 'ap ', 'map', 'switch', 'edgeswitch', 'witch', 'sw', 'a', 'tv', 'smart tv', ' access point']
+    matcher = KeywordMatcher(keywords)
+    rng = random.Random(5)
+    alphabet = 'apmswitchedgv ro'
+    for _ in range(2000):
+        text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 20)))
+        found = matcher.find(text)
+        assert found == matcher.mask(k for k in keywords if k in text), text
+    assert matcher.find('') == 0
+
+
+def test_golden_outputs_match_original_classifiers():
+    print('🧪 Testing engine outputs against the recorded outputs of the original classifiers...')
+    with open(GOLDEN_PATH, encoding='utf-8') as handle:
+        golden = json.load(handle)
+    outputs = json.loads(json.dumps(engine_outputs(classification_corpus())))
+    for name, expected in golden.items():
+        mismatches = [i for i, (got, want) in enumerate(zip(outputs[name], expected)) if got != want]
+        assert len(outputs[name]) == len(expected), name
+        assert not mismatches, f"{name}: {len(mismatches)} mismatches, first #{mismatches[0]}: " \
+                               f"{outputs[name][mismatches[0]]} != {expected[mismatches[0]]}"
+    # The corpus exercises every outcome, not just the defaults
+    assert len(set(golden['infra'])) >= 10 and len(set(golden['port_infra'])) == 6
+    assert len({row['label'] for row in golden['ultimate']}) >= 7
+
+
+def test_core_logic_delegates_to_engine():
+    print('🧪 Testing core.logic.infer_infra through the engine...')
+    from core.logic import infer_infra as core_infer_infra
+
+    assert core_infer_infra({'Asset Type': 'SNMP Device', 'sysDescr': 'Cisco Catalyst 2960'}) == 'Switch'
+    assert core_infer_infra({'Asset Type': 'HTTP Device', 'HTTP Type': 'Smart Display'}) == 'Smart Display'
+    assert core_infer_infra({'Asset Type': 'HTTP Device', 'HTTP Type': 'smart display'}) == 'HTTP Device'
+    assert core_infer_infra({}) == 'Unknown'
+
+
+def test_reclassify_database_in_one_pass():
+    print('🧪 Testing one-pass database reclassification...')
+    engine = get_rule_engine()
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'assets.db')
+        conn = sqlite3.connect(db_path)
+        conn.execute("""CREATE TABLE assets_enhanced (id INTEGER PRIMARY KEY, device_type TEXT, operating_system TEXT,
+                        processor_name TEXT, total_physical_memory_gb REAL, ip_address TEXT)""")
+        rows = [('Asset Incomplete', ['Windows Server 2019', 'Windows 10 Pro', 'Ubuntu 22.04', None][n % 4],
+                 'Intel Xeon' if n % 4 == 3 else 'Intel Core i5', [8, 32, 4, None][n % 4], f'10.0.{n % 200}.{n % 250}')
+                for n in range(20000)]
+        rows.append(('Asset Incomplete', None, None, None, None))
+        conn.executemany("INSERT INTO assets_enhanced (device_type, operating_system, processor_name, "
+                         "total_physical_memory_gb, ip_address) VALUES (?, ?, ?, ?, ?)", rows)
+        conn.commit()
+        conn.close()
+
+        columns = {'operating_system': 'operating_system', 'processor': 'processor_name',
+                   'memory_gb': 'total_physical_memory_gb', 'ip_address': 'ip_address'}
+        stats = engine.reclassify_database(db_path, 'asset_data', columns, table='assets_enhanced',
+                                           where="device_type = 'Asset Incomplete'", chunk_size=3000,
+                                           skip_labels=(None, 'Classification Pending'))
+        assert stats['rows'] == 20001 and stats['changed'] == 20000
+        assert stats['signatures'] < 100  # 20k rows, a handful of distinct feature signatures
+
+        conn = sqlite3.connect(db_path)
+        counts = dict(conn.execute("SELECT device_type, COUNT(*) FROM assets_enhanced GROUP BY device_type"))
+        conn.close()
+        assert counts == {'Windows Server': 5000, 'Windows Workstation': 5000, 'Linux Workstation': 5000,
+                          'Server': 5000, 'Asset Incomplete': 1}
+        again = engine.reclassify_database(db_path, 'asset_data', columns, table='assets_enhanced',
+                                           skip_labels=(None, 'Classification Pending'))
+        assert again['changed'] == 0
+    print('✅ Device rule engine test completed successfully!')
+
+
+if __name__ == '__main__':
+    test_keyword_matcher_matches_substring_semantics()
+    test_golden_outputs_match_original_classifiers()
+    test_core_logic_delegates_to_engine()
+    test_reclassify_database_in_one_pass()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Test the virtualized device table model against a 100k-row fixture
+(runs under the offscreen Qt platform)
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtCore import Qt, QCoreApplication
+from PyQt6.QtWidgets import QApplication, QTableView
+
+from gui.device_table_model import DeviceTableModel
+
+FIXTURE_ROWS = 100_000
+
+_app = QApplication.instance() or QApplication(sys.argv[:1])
+
+
+def _build_fixture(path: str, rows: int = FIXTURE_ROWS):
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE assets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ip_address TEXT, hostname TEXT, department TEXT, os_type TEXT,
+            status TEXT, last_seen TEXT, collection_method TEXT
+        )
+    """)
+    conn.executemany(
+        "INSERT INTO assets (ip_address, hostname, department, os_type, status, last_seen, collection_method) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        ((f"10.{i // 65536}.{(i // 256) % 256}.{i % 256}", f"host-{i:06d}",
+          f"Dept-{i % 17}", "Windows" if i % 3 else "Linux", "Active",
+          f"2025-10-{1 + i % 28:02d} 12:00:00", "WMI") for i in range(rows))
+    )
+    conn.commit()
+    conn.close()
+
+
+def _wait_until(predicate, timeout: float = 10.0) -> bool:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        QCoreApplication.processEvents()
+        if predicate():
+            return True
+        time.sleep(0.001)
+    return predicate()
+
+
+def test_device_table_model_100k_rows():
+    print('🧪 Testing virtualized device table (100k rows)...')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "assets.db")
+        _build_fixture(db_path)
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        model = DeviceTableModel(db_path, chunk_size=500, max_cached_chunks=10)
+        view = QTableView()
+        view.setModel(model)
+        view.resize(1000, 600)
+        view.show()
+        model.fetchMore()
+        assert _wait_until(lambda: model.rowCount() > 0)
+        open_seconds = time.perf_counter() - started
+        print(f'   Open time (first page visible): {open_seconds * 1000:.1f} ms')
+        assert open_seconds < 2.0
+
+        assert _wait_until(lambda: model.total_rows() == FIXTURE_ROWS)
+
+        # Page through 40 chunks; the cache must stay windowed
+        while model.rowCount() < 40 * 500 and (model.canFetchMore() or model._pending):
+            if model.canFetchMore():
+                model.fetchMore()
+            QCoreApplication.processEvents()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f'   Rows exposed: {model.rowCount()}, cached: {model.cached_row_count()}')
+        print(f'   Peak Python memory while paging: {peak / (1024 * 1024):.1f} MB')
+        assert model.rowCount() >= 40 * 500
+        assert model.cached_row_count() <= 10 * 500
+
+        # Scrolling back to an evicted chunk reloads it on the worker
+        assert model.data(model.index(5 * 500, 1)) == "…"
+        assert _wait_until(lambda: model.data(model.index(5 * 500, 1)) != "…")
+
+        view.close()
+        model.wait_for_idle()
+
+
+def test_device_table_model_sql_sort_filter_delete():
+    print('🧪 Testing SQL sort / filter / delete...')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "assets.db")
+        _build_fixture(db_path, rows=2_000)
+        model = DeviceTableModel(db_path, chunk_size=100)
+
+        model.sort(1, Qt.SortOrder.AscendingOrder)
+        assert _wait_until(lambda: model.rowCount() > 0)
+        assert model.data(model.index(0, 1)) == "host-000000"
+
+        model.set_filter_text("host-00199")
+        assert _wait_until(lambda: model.total_rows() == 10 and model.rowCount() == 10)
+
+        deleted = model.delete_rows(range(model.rowCount()))
+        assert deleted == 10
+        with sqlite3.connect(db_path) as conn:
+            remaining = conn.execute("SELECT COUNT(*) FROM assets").fetchone()[0]
+        assert remaining == 1_990
+        assert _wait_until(lambda: model.total_rows() == 0)
+        model.wait_for_idle()
+
+
+def test_device_table_model_closes_connections():
+    print('🧪 Testing that column probes and id lookups close their connections...')
+    opened = []
+    real_connect = sqlite3.connect
+
+    def recording_connect(*args, **kwargs):
+        conn = real_connect(*args, **kwargs)
+        opened.append(conn)
+        return conn
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "assets.db")
+        _build_fixture(db_path, rows=1_000)
+        sqlite3.connect = recording_connect
+        try:
+            model = DeviceTableModel(db_path, chunk_size=100, max_cached_chunks=2)
+            model.fetchMore()
+            assert _wait_until(lambda: model.rowCount() > 0)
+            # Rows of chunks that were never loaded are resolved with a fresh query
+            assert len(model.ids_for_rows([0, 950])) == 2
+            model.wait_for_idle()
+        finally:
+            sqlite3.connect = real_connect
+        assert opened
+        for conn in opened:
+            try:
+                conn.execute("SELECT 1")
+            except sqlite3.ProgrammingError:
+                continue  # closed
+            raise AssertionError("connection left open")
+    print('✅ Device table model test completed successfully!')
+
+
+if __name__ == '__main__':
+    test_device_table_model_100k_rows()
+    test_device_table_model_sql_sort_filter_delete()
+    test_device_table_model_closes_connections()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Test the set-based duplicate consolidation engine: identity precedence,
+window-function ranking, coalescing loser fields into the winner, the
+duplicate_resolutions audit trail, dry runs and the cleanup entry points
+(including PerfectSmartCycle)
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+
+from db.migrations import migrate
+from duplicate_consolidation import benchmark, consolidate_duplicates, identity_key
+
+COLUMNS = ('device_type', 'hostname', 'ip_address', 'status', 'uuid', 'serial_number', 'bios_serial_number',
+           'mac_address', 'data_quality_score', 'last_seen', 'operating_system', 'model_vendor', 'location')
+
+
+def _database(tmp, rows):
+    db_path = os.path.join(tmp, 'assets.db')
+    migrate(db_path)
+    conn = sqlite3.connect(db_path)
+    for asset_id, values in rows.items():
+        record = dict(zip(COLUMNS, values))
+        names = ['id'] + [name for name, value in record.items() if value is not None]
+        conn.execute(f"INSERT INTO assets ({', '.join(names)}) VALUES ({', '.join('?' for _ in names)})",
+                     [asset_id] + [record[name] for name in names[1:]])
+    conn.commit()
+    return db_path, conn
+
+
+# id: device_type, hostname, ip, status, uuid, serial, bios serial, mac, quality, last_seen, os, vendor, location
+ROWS = {
+    # Same UUID: 2 has the best quality score and wins; 1 contributes its location
+    1: ('Laptop', 'lt-1', '10.0.0.1', 'Active', '4c4c4544-0001', None, None, None, 10, '2025-01-01', 'Windows 10',
+        None, 'HQ'),
+    2: ('Laptop', 'lt-1', '10.0.0.2', 'Active', '4C4C4544-0001', None, None, None, 50, '2024-01-01', 'Windows 11',
+        'Dell', None),
+    # Same serial once trimmed and case-folded, found in different serial columns; equal quality,
+    # so completeness decides and 4 wins
+    3: ('Desktop', 'pc-3', '10.0.0.3', 'Active', None, ' sn-123 ', None, None, None, '2025-06-01', None, None, None),
+    4: ('Desktop', 'pc-4', '10.0.0.4', 'Active', None, 'N/A', 'SN-123', None, None, '2025-01-01', 'Ubuntu', 'HP',
+        'Lab'),
+    # Same MAC in different notations; equally complete, so the most recently seen wins
+    5: ('Printer', 'prn-5', '10.0.0.5', 'Active', None, None, None, '00-1a-2b-3c-4d-5e', None, '2025-03-01',
+        'FutureSmart', None, None),
+    6: ('Printer', 'prn-6', '10.0.0.6', 'Active', None, None, None, '0:1A:2B:3C:4D:5E', None, '2025-02-01', None,
+        None, 'Floor 2'),
+    # Placeholder identifiers never group anything
+    7: ('Desktop', 'pc-7', '10.0.0.7', 'Active', None, 'To Be Filled By O.E.M.', None, '00:00:00:00:00:00', None,
+        None, None, None, None),
+    8: ('Desktop', 'pc-8', '10.0.0.8', 'Active', None, 'To Be Filled By O.E.M.', None, '00:00:00:00:00:00', None,
+        None, None, None, None),
+    # Same IP as 1 but nothing else in common: a DHCP reuse, not a duplicate
+    9: ('Phone', 'ph-9', '10.0.0.1', 'Active', None, None, None, None, None, None, None, None, None),
+}
+
+
+def test_identity_key():
+    print('🧪 Testing identity precedence (UUID → serial → MAC)...')
+    assert identity_key(['abc-1'], ['SN1'], ['00:11:22:33:44:55']) == 'uuid:ABC-1'
+    assert identity_key([None, 'N/A'], [' sn1 '], ['00:11:22:33:44:55']) == 'serial:SN1'
+    assert identity_key(['00000000-0000-0000-0000-000000000000'], ['Default string', None, 'SN2'], []) == 'serial:SN2'
+    assert identity_key([], ['UNKNOWN'], ['0-11-22-33-44-55']) == 'mac:00:11:22:33:44:55'
+    assert identity_key([], [], ['00:00:00:00:00:00', 'No MAC Address Found']) is None
+    assert identity_key() is None
+
+
+def test_consolidation_and_dry_run():
+    print('🧪 Testing window-function ranking, field coalescing and dry runs...')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path, conn = _database(tmp, ROWS)
+        conn.execute("INSERT INTO hypervisors (asset_id, cluster) VALUES (1, 'loser-cluster'), (3, 'moved')")
+        conn.execute("INSERT INTO hypervisors (asset_id, cluster) VALUES (2, 'winner-cluster')")
+        conn.commit()
+        snapshot = conn.execute("SELECT * FROM assets ORDER BY id").fetchall()
+
+        dry = consolidate_duplicates(conn, dry_run=True)
+        assert dry['dry_run'] and (dry['groups'], dry['duplicates'], dry['removed']) == (3, 3, 3)
+        assert conn.execute("SELECT * FROM assets ORDER BY id").fetchall() == snapshot
+        assert conn.execute("SELECT COUNT(*) FROM duplicate_resolutions").fetchone()[0] == 0
+        assert conn.execute("SELECT name FROM sqlite_temp_master").fetchall() == []
+
+        report = consolidate_duplicates(db_path)
+        for key in ('groups', 'duplicates', 'removed', 'fields_filled', 'audited', 'children_repointed', 'by_kind',
+                    'sample'):
+            assert report[key] == dry[key], key
+        assert report['by_kind'] == {'uuid': 1, 'serial': 1, 'mac': 1}
+        assert {(g['keep'], tuple(g['remove'])) for g in report['sample']} == {(2, (1,)), (4, (3,)), (5, (6,))}
+
+        remaining = {row[0]: row[1:] for row in conn.execute(
+            "SELECT id, hostname, ip_address, operating_system, model_vendor, location, serial_number FROM assets")}
+        assert sorted(remaining) == [2, 4, 5, 7, 8, 9]
+        # Winner values stay; blanks come from the loser
+        assert remaining[2] == ('lt-1', '10.0.0.2', 'Windows 11', 'Dell', 'HQ', None)
+        # A placeholder counts as blank
+        assert remaining[4] == ('pc-4', '10.0.0.4', 'Ubuntu', 'HP', 'Lab', ' sn-123 ')
+        assert remaining[5][-2] == 'Floor 2'
+        assert report['fields_filled'] == 3
+
+        # Child rows follow the winner unless it already has one
+        assert conn.execute("SELECT asset_id, cluster FROM hypervisors ORDER BY asset_id").fetchall() == \
+            [(2, 'winner-cluster'), (4, 'moved')]
+
+        audit = conn.execute("SELECT original_device_id, duplicate_device_id, resolution_strategy, resolution_details "
+                             "FROM duplicate_resolutions ORDER BY duplicate_device_id").fetchall()
+        assert [row[:3] for row in audit] == [(2, 1, 'identity_merge'), (4, 3, 'identity_merge'),
+                                              (5, 6, 'identity_merge')]
+        details = json.loads(audit[0][3])
+        assert details['identity'] == 'uuid:4C4C4544-0001' and details['rank'] == 2 and details['hostname'] == 'lt-1'
+
+        assert consolidate_duplicates(conn)['duplicates'] == 0
+        conn.close()
+
+
+def test_unique_columns_and_foreign_keys():
+    print('🧪 Testing UNIQUE columns and foreign-key cascades...')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'assets.db')
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE assets (id INTEGER PRIMARY KEY, hostname TEXT, ip_address TEXT UNIQUE, "
+                     "serial_number TEXT, notes TEXT)")
+        conn.execute("CREATE TABLE duplicate_resolutions (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                     "original_device_id INTEGER, duplicate_device_id INTEGER, resolution_strategy TEXT NOT NULL, "
+                     "resolved_at TEXT DEFAULT CURRENT_TIMESTAMP, resolution_details TEXT, "
+                     "FOREIGN KEY (duplicate_device_id) REFERENCES assets(id) ON DELETE CASCADE)")
+        conn.executemany("INSERT INTO assets VALUES (?, ?, ?, ?, ?)",
+                         [(1, 'a', None, 'S1', 'notes'), (2, 'a', '10.0.0.9', 'S1', None), (3, 'b', None, 'S1', None)])
+        conn.commit()
+        conn.execute("PRAGMA foreign_keys = ON")
+
+        report = consolidate_duplicates(conn)
+        assert report['removed'] == 2
+        # 1 is the most complete row; ip_address is UNIQUE and never copied around
+        assert conn.execute("SELECT id, ip_address, notes FROM assets").fetchall() == [(1, None, 'notes')]
+        assert conn.execute("SELECT COUNT(*) FROM duplicate_resolutions").fetchone()[0] == 2
+        assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+        conn.close()
+
+
+def test_cleanup_entry_points():
+    print('🧪 Testing the cleanup_duplicates and auto_database_optimizer entry points...')
+    from auto_database_optimizer import auto_optimize
+    from cleanup_duplicates import cleanup_duplicate_records
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path, conn = _database(tmp, ROWS)
+        stats = cleanup_duplicate_records(db_path, dry_run=True)
+        assert stats['total_removed'] == 3 and conn.execute("SELECT COUNT(*) FROM assets").fetchone()[0] == 9
+        stats = cleanup_duplicate_records(db_path)
+        assert stats['total_removed'] == 3 and conn.execute("SELECT COUNT(*) FROM assets").fetchone()[0] == 6
+        conn.close()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _, conn = _database(tmp, ROWS)
+        conn.close()
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            auto_optimize()
+        finally:
+            os.chdir(cwd)
+        conn = sqlite3.connect(os.path.join(tmp, 'assets.db'))
+        # Grouping is by identity now: the reused IP of row 9 is kept
+        assert sorted(row[0] for row in conn.execute("SELECT id FROM assets")) == [2, 4, 5, 7, 8, 9]
+        conn.close()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        from perfect_smart_cycle import PerfectSmartCycle
+        db_path, conn = _database(tmp, ROWS)
+        cycle = PerfectSmartCycle(db_path)
+        cycle.remove_duplicates_only()
+        assert cycle.stats['duplicates_found'] == 3 and cycle.stats['duplicates_removed'] == 3
+        # Rescanned devices only gain data
+        cycle.smart_update_device(conn.cursor(), 9, {'hostname': 'ph-9.corp.local', 'operating_system': 'Android'})
+        conn.commit()
+        assert conn.execute("SELECT hostname, data_source FROM assets WHERE id = 9").fetchone() == \
+            ('ph-9.corp.local', 'Smart Cycle Update')
+        conn.close()
+
+
+def test_benchmark():
+    print('🧪 Testing the consolidation benchmark...')
+    result = benchmark(rows=3000)
+    assert result['duplicates'] == result['removed'] == result['audited'] == 900
+    assert result['remaining'] == 2100 and result['fields_filled'] > 0
+    assert set(result['by_kind']) == {'uuid', 'serial', 'mac'}
+    print('✅ Duplicate consolidation test completed successfully!')
+
+
+if __name__ == '__main__':
+    test_identity_key()
+    test_consolidation_and_dry_run()
+    test_unique_columns_and_foreign_keys()
+    test_cleanup_entry_points()
+    test_benchmark()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Test the compiled field-mapping layer: per-collector translation tables,
+JSON mapping merge, type coercion, the schema_version-keyed column cache and
+per-signature INSERT / UPDATE / UPSERT statements
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+
+from field_mapping import (FieldMapper, PreparedRow, benchmark, insert_sql, is_blank, load_mappings, to_boolean,
+                           to_integer, to_real, to_text, upsert_sql)
+from robust_data_saver import RobustDataSaver
+
+ASSETS = """CREATE TABLE assets (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, hostname TEXT, ip_address TEXT UNIQUE, computer_name TEXT,
+    operating_system TEXT, system_manufacturer TEXT, manufacturer TEXT, system_model TEXT, device_type TEXT,
+    status TEXT, working_user TEXT, open_ports TEXT, processor_cores INTEGER, dhcp_enabled BOOLEAN,
+    memory_gb REAL, bios_serial_number TEXT, created_at TIMESTAMP, updated_at TIMESTAMP, last_scan_time TIMESTAMP,
+    data_hash TEXT, last_updated TEXT, collection_time TEXT)"""
+
+
+def test_profiles_and_json_mappings():
+    print('🧪 Testing compiled translation tables per collector type...')
+    mapper = FieldMapper()
+    now = '2026-01-01T00:00:00'
+
+    # Explicit aliases win in priority order; blanks never shadow a later source
+    row = mapper.normalize({'Hostname': 'PC-01', 'hostname': '  ', 'IP Address': '10.0.0.5', 'OS': 'None',
+                            'Operating System': 'Windows 11', 'manufacturer': 'Dell', 'open_ports': [],
+                            'bios_serial_number': 'ABC123', 'not a column': 'kept for the schema filter'}, now=now)
+    assert row['hostname'] == 'PC-01' and row['ip_address'] == '10.0.0.5'
+    assert row['operating_system'] == 'Windows 11'
+    # An aliased key that is also a column name still passes through to itself
+    assert row['system_manufacturer'] == 'Dell' and row['manufacturer'] == 'Dell'
+    assert row['bios_serial_number'] == 'ABC123' and 'open_ports' not in row
+    assert row['created_at'] == row['last_scan_time'] == now
+    assert mapper.normalize({'hostname': 'a', 'Hostname': 'b'})['hostname'] == 'a'
+
+    # Legacy EnhancedCollectionStrategy semantics: fan-out, derived values, constants, timestamps
+    enhanced = mapper.normalize({'IP Address': '10.0.0.6', 'System Manufacturer': 'HP', 'Total Physical Memory':
+                                 str(16 * 1024 ** 3), 'Collection Method': 'Comprehensive WMI', 'status': 'x',
+                                 'bios_version': 'F.21', 'Unmapped Field': 'dropped'}, 'enhanced', now=now)
+    assert enhanced['manufacturer'] == enhanced['model_vendor'] == enhanced['system_manufacturer'] == 'HP'
+    assert enhanced['memory_gb'] == 16.0 and enhanced['installed_ram_gb'] == 16
+    assert enhanced['wmi_collection_status'] == 'success' and enhanced['status'] == 'active'
+    assert enhanced['collection_timestamp'] == now and enhanced['created_by'] == 'Enhanced Collection Strategy'
+    assert enhanced['bios_version'] == 'F.21' and 'Unmapped Field' not in enhanced
+    assert mapper.normalize({'Collection Time': 'then'}, 'enhanced', now=now)['collection_timestamp'] == 'then'
+
+    # Child profiles put their own sources ahead of the inherited ones
+    snmp = mapper.normalize({'sysName': 'core-sw', 'hostname': 'ignored', 'sysLocation': 'MDF'}, 'snmp')
+    assert snmp['hostname'] == 'core-sw' and snmp['location'] == 'MDF'
+
+    # WMI: qualified and grouped records, bare names only where they are unambiguous
+    mappings = load_mappings()
+    assert load_mappings() is mappings  # read once per process
+    assert mappings['wmi_classes']['Win32_BIOS']['bios_version'] == 'SMBIOSBIOSVersion'
+    wmi = mapper.profile('wmi')
+    assert 'Win32_ComputerSystem.Name' in wmi.index and 'Name' not in wmi.index
+    record = {'Win32_BIOS': {'SMBIOSBIOSVersion': '1.4.2', 'Manufacturer': 'Dell Inc.'},
+              'Win32_PhysicalMemory': [{'Capacity': '8589934592'}, {'Capacity': '8589934592'}],
+              'Win32_ComputerSystem.Name': 'WS-7', 'SMBIOSBIOSVersion': 'bare'}
+    normalized = mapper.normalize(record, 'wmi')
+    assert normalized['bios_version'] == '1.4.2' and normalized['bios_manufacturer'] == 'Dell Inc.'
+    assert normalized['computer_name'] == 'WS-7' and normalized['memory_capacity'] == '8589934592'
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, 'wmi_to_database_mapping.json'), 'w') as f:
+            json.dump({'Serial': 'serial_number'}, f)
+        custom = FieldMapper(mappings_dir=tmp)
+        assert custom.normalize({'Serial': 'XYZ'})['serial_number'] == 'XYZ'
+        assert load_mappings(tmp)['wmi_classes'] == {}  # missing file: empty table, not an error
+    try:
+        mapper.profile('nope')
+        assert False, 'unknown profile accepted'
+    except KeyError:
+        pass
+
+
+def test_coercion():
+    print('🧪 Testing column-type coercion...')
+    assert is_blank(None) and is_blank(' none ') and is_blank([]) and not is_blank(0) and not is_blank(False)
+    assert to_text(' x ') == 'x' and to_text([80, 443]) == '[80, 443]' and to_text({'a': 1}) == '{"a": 1}'
+    assert to_text({3, 1}) == '[1, 3]' and to_text(5) == '5' and to_text(b'ok') == 'ok'
+    assert to_integer('12') == 12 and to_integer(4.0) == 4 and to_integer(True) == 1 and to_integer('4 cores') == '4 cores'
+    assert to_real('2.5') == 2.5 and to_real(3) == 3.0 and to_real('n/a') == 'n/a'
+    assert to_boolean('Yes') == 1 and to_boolean('false') == 0 and to_boolean(2) == 1 and to_boolean('maybe') == 'maybe'
+
+
+def test_schema_cache_and_prepared_statements():
+    print('🧪 Testing the schema_version column cache and per-signature statements...')
+    mapper = FieldMapper()
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'assets.db')
+        setup = sqlite3.connect(db_path)
+        setup.execute(ASSETS)
+        setup.execute("CREATE TABLE other (id INTEGER)")
+        setup.commit()
+
+        pragmas = []
+        for n in range(20):
+            conn = sqlite3.connect(db_path)
+            conn.set_trace_callback(lambda sql: pragmas.append(sql) if 'table_info' in sql else None)
+            # Same populated columns in a different key order → same statement
+            device = {'processor_cores': '8', 'dhcp_enabled': 'true', 'IP Address': f'10.0.1.{n}',
+                      'open_ports': [22, 80], 'Hostname': f'host-{n}', 'memory_gb': '15.5', 'ghost': 'x'}
+            if n % 2:
+                device = dict(reversed(list(device.items())))
+            row = mapper.prepare(conn, device, key=db_path)
+            mapper.insert(conn, row)
+            conn.commit()
+            conn.close()
+        assert len(pragmas) == 1 and mapper.schema_loads == 1
+        assert row.columns[:3] == ('hostname', 'ip_address', 'open_ports')  # table order
+        assert 'ghost' not in row.columns and 'id' not in row.columns
+
+        stored = setup.execute("SELECT processor_cores, dhcp_enabled, memory_gb, open_ports, typeof(processor_cores) "
+                               "FROM assets WHERE ip_address = '10.0.1.3'").fetchone()
+        assert stored == (8, 1, 15.5, '[22, 80]', 'integer')
+        schema = mapper.schema(setup, key=db_path)
+        assert mapper.to_row(schema, {'hostname': 'a', 'status': 'b'}).columns == \
+            mapper.to_row(schema, {'status': 'b', 'hostname': 'a'}).columns
+        assert insert_sql('assets', ('a', 'b')) is insert_sql('assets', ('a', 'b'))
+
+        # Any schema change bumps schema_version: the new column shows up without restarting
+        setup.execute("ALTER TABLE assets ADD COLUMN rack_position TEXT")
+        setup.commit()
+        conn = sqlite3.connect(db_path)
+        row = mapper.prepare(conn, {'ip_address': '10.0.1.3', 'rack_position': 'R12-U4', 'hostname': 'renamed'},
+                             key=db_path)
+        assert 'rack_position' in row.columns and mapper.schema_loads == 2
+        assert mapper.update(conn, row, 4) == 1
+
+        # UPSERT on the UNIQUE ip_address index keeps the row id
+        row = mapper.to_row(mapper.schema(conn, key=db_path), {'ip_address': '10.0.1.3', 'status': 'retired'})
+        mapper.upsert(conn, row, ('ip_address',))
+        conn.commit()
+        assert conn.execute("SELECT id, hostname, status, rack_position FROM assets WHERE ip_address = '10.0.1.3'"
+                            ).fetchone() == (4, 'renamed', 'retired', 'R12-U4')
+        assert upsert_sql('assets', ('ip_address',), ('ip_address',)).endswith('DO NOTHING')
+
+        # executemany per signature
+        rows = [PreparedRow(('hostname', 'ip_address'), [f'b{n}', f'10.0.2.{n}']) for n in range(5)]
+        rows.append(PreparedRow(('ip_address',), ['10.0.2.99']))
+        assert mapper.insert_many(conn, rows) == 2
+        conn.commit()
+        assert conn.execute("SELECT COUNT(*) FROM assets").fetchone()[0] == 26
+        assert rows[0].get('hostname') == 'b0' and rows[0].without('hostname').columns == ('ip_address',)
+        conn.close()
+
+        # Private in-memory databases never share a cache entry
+        first, second = sqlite3.connect(':memory:'), sqlite3.connect(':memory:')
+        first.execute("CREATE TABLE assets (id INTEGER PRIMARY KEY, hostname TEXT)")
+        second.execute("CREATE TABLE assets (id INTEGER PRIMARY KEY, ip_address TEXT)")
+        assert mapper.schema(first).columns != mapper.schema(second).columns
+        setup.close()
+
+
+def test_robust_data_saver():
+    print('🧪 Testing RobustDataSaver on the cached schema...')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'assets.db')
+        conn = sqlite3.connect(db_path)
+        conn.execute(ASSETS)
+        conn.commit()
+
+        saver = RobustDataSaver(db_path)
+        device = {'ip_address': '10.0.21.1', 'hostname': 'test-device.local', 'status': 'active',
+                  'open_ports': [80, 443, 22], 'services': {'80': 'http'}}
+        assert saver.save_device_data(device)
+        assert saver.save_device_data(device)  # unchanged hash: no write
+        assert saver.save_device_data(dict(device, status='retired', open_ports=[22]))
+        assert saver.get_summary() == {'new_records': 1, 'updated_records': 1, 'errors': 0, 'total_processed': 2}
+        stored = conn.execute("SELECT hostname, status, open_ports, data_hash IS NOT NULL, last_updated IS NOT NULL "
+                              "FROM assets").fetchall()
+        assert stored == [('test-device.local', 'retired', '[22]', 1, 1)]
+        conn.close()
+
+
+def test_benchmark():
+    print('🧪 Testing the before/after benchmark...')
+    result = benchmark(devices=40, collector='enhanced')
+    for stage in ('normalize_before_us', 'normalize_after_us', 'save_before_us', 'save_after_us', 'save_batch_us'):
+        assert result[stage] > 0, stage
+    assert result['schema_loads'] == 1 and result['devices'] == 40
+    print('✅ Field mapping test completed successfully!')
+
+
+if __name__ == '__main__':
+    test_profiles_and_json_mappings()
+    test_coercion()
+    test_schema_cache_and_prepared_statements()
+    test_robust_data_saver()
+    test_benchmark()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Test sparse field projection: ?fields= pushed into the SELECT list, presets,
+lazy JSON expansion, the columnar and MessagePack formats, and the
+department / intelligent asset APIs that use them
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+
+import field_projection
+from field_projection import FieldSet, ProjectionError, benchmark
+
+LEGACY_DEVICE_COLUMNS = ('hostname', 'ip_address', 'working_user', 'classification', 'department', 'status',
+                         'data_source', 'created_at', 'last_updated', 'os_name', 'os_version', 'manufacturer', 'model',
+                         'serial_number', 'mac_address', 'cpu_info', 'memory_gb', 'storage_info', 'vendor',
+                         'ping_status', 'last_ping', 'collection_method', 'domain', 'notes')
+
+
+def test_resolve_and_decode():
+    print('🧪 Testing field resolution, presets and lazy JSON expansion...')
+    fields = FieldSet({'id': 'id', 'name': "COALESCE(name, 'Unknown')", 'ip': 'ip'},
+                      expandable={'software': 'software'}, presets={'list': ['id', 'name']})
+
+    legacy = fields.resolve()
+    assert legacy.names == ['id', 'name', 'ip', 'software'] and legacy.heavy_indexes == [3]
+    assert fields.resolve(legacy_expand=False).names == ['id', 'name', 'ip']
+    assert fields.resolve('ip, id').names == ['ip', 'id']
+    assert fields.resolve('list', 'software').names == ['id', 'name', 'software']
+    assert fields.resolve('list,id').names == ['id', 'name']
+    assert fields.resolve('software').heavy_indexes == [0]
+    assert fields.resolve('id,name').select_sql == '''id AS "id", COALESCE(name, 'Unknown') AS "name"'''
+
+    # expand only ever adds heavy fields
+    assert fields.resolve('id', 'ip').names == ['id']
+    for bad in (('id,password', None), (None, 'nope')):
+        try:
+            fields.resolve(*bad)
+            assert False, f'{bad} accepted'
+        except ProjectionError as e:
+            assert e.status == 400 and 'id' in e.available
+    try:
+        FieldSet({'id': 'id'}, presets={'broken': ['id', 'missing']})
+        assert False, 'undefined preset field accepted'
+    except ValueError:
+        pass
+
+    projection = fields.resolve('id', 'software')
+    rows = projection.decode([(1, '[{"name": "7-Zip"}]'), (2, 'not json'), (3, None)])
+    assert rows == [[1, [{'name': '7-Zip'}]], [2, 'not json'], [3, None]]
+    assert projection.records(rows)[0] == {'id': 1, 'software': [{'name': '7-Zip'}]}
+
+
+def _legacy_devices_db(tmp):
+    db_path = os.path.join(tmp, 'assets.db')
+    conn = sqlite3.connect(db_path)
+    conn.execute(f"CREATE TABLE assets (id INTEGER PRIMARY KEY, {', '.join(LEGACY_DEVICE_COLUMNS)})")
+    conn.execute("CREATE TABLE departments (id INTEGER PRIMARY KEY, name TEXT UNIQUE, description TEXT, "
+                 "manager TEXT, location TEXT, created_at TEXT DEFAULT CURRENT_TIMESTAMP)")
+    conn.execute("INSERT INTO assets (hostname, ip_address, working_user, classification, manufacturer, memory_gb) "
+                 "VALUES ('pc-b', '10.0.0.2', 'bob', 'Workstation', '', 16)")
+    conn.execute("INSERT INTO assets (hostname, ip_address, ping_status) VALUES ('pc-a', '10.0.0.1', 'Online')")
+    conn.execute("INSERT INTO assets (hostname, ip_address) VALUES (NULL, '10.0.0.3')")
+    conn.commit()
+    conn.close()
+    return db_path
+
+
+def test_department_devices_api():
+    print('🧪 Testing /api/devices projection and formats...')
+    from complete_department_web_service import DEVICE_FIELDS, CompleteDepartmentWebService
+
+    with tempfile.TemporaryDirectory() as tmp:
+        service = CompleteDepartmentWebService(_legacy_devices_db(tmp))
+        client = service.app.test_client()
+
+        devices = client.get('/api/devices').json
+        assert [d['hostname'] for d in devices] == ['Unknown', 'pc-a', 'pc-b']
+        assert len(devices[0]) == 25 and set(devices[0]) == set(DEVICE_FIELDS.columns)
+        assert devices[2]['user'] == 'bob' and devices[2]['manufacturer'] == 'Unknown'
+        assert devices[2]['memory_gb'] == 16 and devices[1]['ping_status'] == 'Online'
+        assert devices[1]['status'] == 'Unknown' and devices[1]['notes'] is None
+
+        dashboard = client.get('/api/devices?fields=dashboard').json
+        assert len(dashboard[0]) == 17 and 'notes' not in dashboard[0]
+        assert [{k: d[k] for k in dashboard[0]} for d in devices] == dashboard
+
+        columnar = client.get('/api/devices?fields=id,hostname&format=columns').json
+        assert columnar == {'columns': ['id', 'hostname'], 'rows': [[3, 'Unknown'], [2, 'pc-a'], [1, 'pc-b']]}
+
+        if field_projection.MSGPACK_AVAILABLE:
+            import msgpack
+            packed = client.get('/api/devices?fields=id,hostname&format=msgpack')
+            assert packed.mimetype == 'application/x-msgpack'
+            assert msgpack.unpackb(packed.data) == columnar
+            # The cache keeps the MessagePack body too
+            assert client.get('/api/devices?fields=id,hostname&format=msgpack').headers['X-Cache'] == 'HIT'
+
+        unknown = client.get('/api/devices?fields=id,password')
+        assert unknown.status_code == 400 and 'user' in unknown.json['available']
+        assert client.get('/api/devices?format=xml').status_code == 400
+        service.response_cache.version.close()
+
+
+def _enhanced_db(path):
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE assets_enhanced (
+            id INTEGER PRIMARY KEY, hostname TEXT, computer_name TEXT, ip_address TEXT, device_status TEXT,
+            ping_response_ms REAL, device_type TEXT, processor_name TEXT, processor_cores INTEGER,
+            processor_logical_cores INTEGER, total_physical_memory_gb REAL, available_memory_gb REAL,
+            graphics_cards TEXT, connected_monitors TEXT, storage_summary TEXT, total_storage_gb REAL,
+            operating_system TEXT, os_version TEXT, os_build TEXT, system_manufacturer TEXT, system_model TEXT,
+            bios_version TEXT, mac_address TEXT, network_adapters TEXT, installed_software TEXT,
+            antivirus_software TEXT, firewall_status TEXT, current_user TEXT, user_profiles TEXT,
+            last_logged_users TEXT, assigned_department TEXT, collection_method TEXT,
+            data_completeness_score REAL, hostname_mismatch_status TEXT, cpu_usage_percent REAL,
+            memory_usage_percent REAL, system_uptime_hours REAL, last_seen TEXT, created_at TEXT, updated_at TEXT,
+            location TEXT, site TEXT, cost_center TEXT, purchase_date TEXT, warranty_expiry TEXT, department TEXT,
+            serial_number TEXT, asset_tag TEXT)
+    """)
+    software = json.dumps([{'name': 'Office', 'version': '16.0'}])
+    conn.executemany(
+        "INSERT INTO assets_enhanced (hostname, ip_address, device_status, device_type, processor_name, "
+        "operating_system, total_physical_memory_gb, installed_software, system_uptime_hours, assigned_department) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [('ws-1', '10.1.0.1', 'Online', 'Workstation', 'i7', 'Windows 11', 16.0, software, 50, 'IT'),
+         ('ws-2', '10.1.0.2', 'Offline', 'Laptop', 'i5', 'Windows 10', 8.0, software, 3, None)])
+    conn.commit()
+    conn.close()
+
+
+def test_intelligent_assets_api():
+    print('🧪 Testing intelligent_app /api/assets, /api/device/<id> and comprehensive assets...')
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = os.path.join(tmp, 'WebService')
+        os.mkdir(workdir)
+        db_path = os.path.join(tmp, 'assets.db')
+        _enhanced_db(db_path)
+        cwd = os.getcwd()
+        os.chdir(workdir)  # the service reads ../assets.db
+        try:
+            from WebService import intelligent_app
+
+            manager = intelligent_app.IntelligentAssetManager(db_path=db_path)
+            previous, intelligent_app.asset_manager = intelligent_app.asset_manager, manager
+            client = intelligent_app.app.test_client()
+            try:
+                full = client.get('/api/assets').json
+                assert full['total'] == 2 and len(full['assets'][0]) == 14
+                assert full['assets'][0]['device_status'] == 'online' and full['assets'][1]['assigned_department'] == 'Unassigned'
+
+                narrow = client.get('/api/assets?fields=hostname,device_type&format=columns').json
+                assert narrow['columns'] == ['hostname', 'device_type'] and narrow['total'] == 2
+                assert narrow['rows'] == [['ws-1', 'Workstation'], ['ws-2', 'Laptop']]
+                assert client.get('/api/assets?fields=installed_software').status_code == 400
+
+                detail = client.get('/api/device/1').json
+                assert detail['installed_software'] == [{'name': 'Office', 'version': '16.0'}]
+                assert detail['uptime_formatted'] == '2d 2h' and 'asset_tag' in detail
+                lean = client.get('/api/device/1?fields=hostname,operating_system').json
+                assert lean == {'hostname': 'ws-1', 'operating_system': 'Windows 11'}
+                expanded = client.get('/api/device/1?fields=hostname&expand=installed_software').json
+                assert expanded['installed_software'][0]['name'] == 'Office'
+                assert client.get('/api/device/1?fields=nope').status_code == 400
+
+                everything = manager.get_comprehensive_assets()
+                first = everything['assets'][0]
+                assert first['installed_software'][0]['name'] == 'Office' and first['memory_formatted'] == '16.0 GB'
+                summary = manager.get_comprehensive_assets(fields='summary')['assets']
+                assert set(summary[0]) == {'id', 'hostname', 'ip_address', 'device_status', 'device_type',
+                                           'operating_system', 'assigned_department', 'last_seen'}
+                with_software = manager.get_comprehensive_assets(fields='summary', expand='installed_software')
+                assert isinstance(with_software['assets'][0]['installed_software'], list)
+                try:
+                    manager.get_comprehensive_assets(fields='password')
+                    assert False, 'unknown field accepted'
+                except ProjectionError:
+                    pass
+            finally:
+                intelligent_app.asset_manager = previous
+                intelligent_app.response_cache.version.close()
+        finally:
+            os.chdir(cwd)
+
+
+def test_benchmark():
+    print('🧪 Testing the projection payload benchmark...')
+    result = benchmark(rows=300)
+    assert result['projected_records']['bytes'] < result['wide_records']['bytes'] < result['full_records']['bytes']
+    assert result['projected_columns']['bytes'] < result['projected_records']['bytes']
+    assert result['projected_columns']['fields'] == 8
+    print('✅ Field projection test completed successfully!')
+
+
+if __name__ == '__main__':
+    test_resolve_and_decode()
+    test_department_devices_api()
+    test_intelligent_assets_api()
+    test_benchmark()
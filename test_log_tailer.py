@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Test event-driven log tailing with a writer process producing 50k lines/sec
+(including a rotation mid-stream) for both the inotify and polling backends
+"""
+
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+
+from utils.log_tailer import LogTailer
+
+LINES_PER_SECOND = 50_000
+TOTAL_LINES = 100_000
+MAX_BATCHES_PER_SECOND = 5
+
+
+def _writer(path: str, total: int, rate: int, rotate_at: int):
+    """Write `total` numbered lines at `rate` lines/sec, rotating once"""
+    burst = 500
+    handle = open(path, "a", encoding="utf-8")
+    started = time.perf_counter()
+    for first in range(0, total, burst):
+        if first == rotate_at:
+            handle.close()
+            os.replace(path, path + ".1")
+            handle = open(path, "a", encoding="utf-8")
+        handle.write("".join(f"2025-10-05 12:00:00 | INFO | line {i:07d}\n"
+                             for i in range(first, min(first + burst, total))))
+        handle.flush()
+        delay = started + (first + burst) / rate - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    handle.close()
+
+
+def _run_tailer(use_inotify: bool):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "system_all.log")
+        open(path, "w").close()
+
+        received = []
+        batches = []
+        lock = threading.Lock()
+
+        def on_batch(batch):
+            with lock:
+                batches.append(len(batch))
+                received.extend(line for _, line in batch)
+
+        tailer = LogTailer({"System (All)": path}, on_batch,
+                           max_batches_per_second=MAX_BATCHES_PER_SECOND,
+                           use_inotify=use_inotify)
+        tailer.start()
+
+        started = time.perf_counter()
+        writer = multiprocessing.Process(
+            target=_writer, args=(path, TOTAL_LINES, LINES_PER_SECOND, TOTAL_LINES // 2)
+        )
+        writer.start()
+        writer.join(30)
+        deadline = time.perf_counter() + 5
+        while time.perf_counter() < deadline:
+            with lock:
+                if len(received) >= TOTAL_LINES:
+                    break
+            time.sleep(0.05)
+        elapsed = time.perf_counter() - started
+        tailer.stop()
+
+        print(f'   {tailer.backend}: {len(received)} lines in {len(batches)} batches '
+              f'over {elapsed:.2f}s (rotations: {tailer.stats["rotations"]})')
+        assert writer.exitcode == 0
+        assert len(received) == TOTAL_LINES
+        assert [int(line.rsplit(" ", 1)[1]) for line in received] == list(range(TOTAL_LINES))
+        assert tailer.stats["rotations"] == 1
+        # Coalescing: never more than N batches per second (+1 for the final flush)
+        assert len(batches) <= MAX_BATCHES_PER_SECOND * elapsed + 2
+        return tailer.backend
+
+
+def test_log_tailer_inotify_50k_lines_per_second():
+    print('🧪 Testing log tailer (inotify backend)...')
+    backend = _run_tailer(use_inotify=True)
+    assert backend in ("inotify", "polling")
+
+
+def test_log_tailer_polling_50k_lines_per_second():
+    print('🧪 Testing log tailer (polling backend)...')
+    assert _run_tailer(use_inotify=False) == "polling"
+
+
+def test_log_tailer_truncation():
+    print('🧪 Testing log tailer truncation handling...')
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "web_service.log")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("old line\n" * 1000)
+
+        received = []
+        tailer = LogTailer({"Web Service": path}, lambda b: received.extend(l for _, l in b),
+                           max_batches_per_second=20, poll_interval=0.05)
+        tailer.start()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("after truncate\n")
+        deadline = time.perf_counter() + 5
+        while "after truncate" not in received and time.perf_counter() < deadline:
+            time.sleep(0.05)
+        tailer.stop()
+        assert "after truncate" in received
+        assert "old line" not in received  # tailing starts at the end of the file
+        print('✅ Log tailer test completed successfully!')
+
+
+if __name__ == '__main__':
+    test_log_tailer_inotify_50k_lines_per_second()
+    test_log_tailer_polling_50k_lines_per_second()
+    test_log_tailer_truncation()
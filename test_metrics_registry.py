@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Test the metrics registry: Prometheus text exposition, histogram buckets,
+probe / DB write / queue instrumentation (including the WMI, HTTP and duplicate
+validator call sites), the Flask /metrics endpoint, the headless server used by
+the scheduler, merging pre-forked workers' snapshots, and per-observation
+overhead
+"""
+
+import multiprocessing
+import os
+import socket
+import sqlite3
+import tempfile
+import urllib.request
+from queue import Queue
+
+from flask import Flask
+
+import metrics_registry
+from metrics_registry import (CONTENT_TYPE, MetricsRegistry, benchmark, collect_multiprocess, get_metrics_registry,
+                              install_flask_metrics, start_metrics_server, timed_probe, track_queue,
+                              write_snapshot, write_textfile)
+
+
+def _sample(text, line_prefix):
+    """Value of the first exposition line starting with line_prefix"""
+    for line in text.splitlines():
+        if line.startswith(line_prefix + ' '):
+            return float(line.rsplit(' ', 1)[1])
+    return None
+
+
+def test_exposition_format():
+    print('🧪 Testing counters, gauges, histograms and text exposition...')
+    registry = MetricsRegistry()
+    requests = registry.counter('api_requests', 'API requests', ('path',))
+    requests.labels('/a"b\\c').inc()
+    requests.labels(path='/a"b\\c').inc(2)
+    assert registry.counter('api_requests', 'API requests', ('path',)) is requests
+    try:
+        registry.gauge('api_requests', 'clash')
+        assert False, "type clash accepted"
+    except ValueError:
+        pass
+    try:
+        requests.labels('x').inc(-1)
+        assert False, "counter decreased"
+    except ValueError:
+        pass
+
+    depth = registry.gauge('depth', 'Queue depth\nsecond line')
+    depth.set(5)
+    depth.dec(2)
+    latency = registry.histogram('latency_seconds', 'Latency', buckets=(0.1, 0.5, 1))
+    for value in (0.05, 0.1, 0.3, 0.7, 4.0):
+        latency.observe(value)
+
+    text = registry.render()
+    assert text.endswith('\n')
+    assert '# HELP depth Queue depth\\nsecond line' in text and '# TYPE depth gauge' in text
+    assert _sample(text, 'depth') == 3
+    assert '# TYPE api_requests counter' in text
+    assert _sample(text, 'api_requests_total{path="/a\\"b\\\\c"}') == 3
+    # le is inclusive and buckets are cumulative
+    assert _sample(text, 'latency_seconds_bucket{le="0.1"}') == 2
+    assert _sample(text, 'latency_seconds_bucket{le="0.5"}') == 3
+    assert _sample(text, 'latency_seconds_bucket{le="1"}') == 4
+    assert _sample(text, 'latency_seconds_bucket{le="+Inf"}') == 5
+    assert _sample(text, 'latency_seconds_count') == 5
+    assert abs(_sample(text, 'latency_seconds_sum') - 5.15) < 1e-9
+    lines = text.splitlines()
+    assert lines.index('# TYPE api_requests counter') < lines.index('# TYPE depth gauge')
+
+
+def test_probe_db_and_queue_instrumentation():
+    print('🧪 Testing probe, DB write and queue-depth instrumentation...')
+    from adaptive_network_controller import AdaptiveNetworkController
+    from sharded_collection_executor import AssetBatchWriter
+
+    registry = get_metrics_registry()
+    probes = metrics_registry.PROBE_DURATION
+
+    @timed_probe('wmi')
+    def collect(ip, outcome):
+        if outcome == 'raise':
+            raise OSError('RPC server unavailable')
+        return {'Error': {'code': 'auth'}} if outcome == 'fail' else {'Hostname': ip}
+
+    before = {o: probes.labels('wmi', o).count for o in ('ok', 'fail', 'error')}
+    collect('10.0.0.1', 'ok')
+    collect('10.0.0.1', 'fail')
+    try:
+        collect('10.0.0.1', 'raise')
+    except OSError:
+        pass
+    assert {o: probes.labels('wmi', o).count - before[o] for o in before} == {'ok': 1, 'fail': 1, 'error': 1}
+    assert collect.__name__ == 'collect'
+
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(4)
+    open_port = listener.getsockname()[1]
+    closed = socket.socket()
+    closed.bind(('127.0.0.1', 0))
+    closed_port = closed.getsockname()[1]
+    closed.close()
+    try:
+        controller = AdaptiveNetworkController()
+        opened, refused = probes.labels('tcp', 'open').count, probes.labels('tcp', 'refused').count
+        assert controller.tcp_probe('127.0.0.1', open_port)
+        assert not controller.tcp_probe('127.0.0.1', closed_port)
+        assert probes.labels('tcp', 'open').count == opened + 1
+        assert probes.labels('tcp', 'refused').count == refused + 1
+    finally:
+        listener.close()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'assets.db')
+        conn = sqlite3.connect(db_path)
+        conn.execute('CREATE TABLE assets (id INTEGER PRIMARY KEY, ip_address TEXT, hostname TEXT)')
+        conn.close()
+        batches = metrics_registry.DB_WRITE_BATCH.labels('sharded_writer')
+        count, total = batches.count, batches.sum
+        AssetBatchWriter(db_path).write([{'ip_address': f'10.1.0.{n}', 'hostname': f'h{n}'} for n in range(40)])
+        assert batches.count == count + 1 and batches.sum == total + 40
+        assert metrics_registry.DB_COMMIT_DURATION.labels('sharded_writer').count >= 1
+
+    # Collector entry points: WMI reports PlatformNotSupported off Windows, HTTP finds nothing listening
+    from collectors.wmi_collector import collect_windows_wmi
+    from core.collector import http_fingerprint
+    wmi_failed = probes.labels('wmi', 'fail').count
+    assert 'Error' in collect_windows_wmi('10.0.0.1', 'user', 'secret')
+    assert probes.labels('wmi', 'fail').count == wmi_failed + 1
+    http_failed = probes.labels('http', 'fail').count
+    assert http_fingerprint('127.0.0.1', timeout=0.2) == {}
+    assert probes.labels('http', 'fail').count == http_failed + 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        from smart_duplicate_validator import SmartDuplicateValidator
+        db_path = os.path.join(tmp, 'assets.db')
+        conn = sqlite3.connect(db_path)
+        conn.execute('CREATE TABLE assets (id INTEGER PRIMARY KEY, ip_address TEXT, hostname TEXT, serial_number TEXT, '
+                     'mac_address TEXT, device_fingerprint TEXT, created_at TEXT, last_seen TEXT, seen_count INTEGER, '
+                     'data_source TEXT, duplicate_check_status TEXT)')
+        conn.close()
+        saves = metrics_registry.DB_WRITE_BATCH.labels('smart_validator')
+        checks = metrics_registry.DUPLICATE_DETECTION.labels('smart_validator')
+        save_count, check_count = saves.count, checks.count
+        validator = SmartDuplicateValidator(db_path)
+        device = {'ip_address': '10.2.0.1', 'hostname': 'pc-1', 'serial_number': 'SN1', 'mac_address': 'aa:bb'}
+        inserted, updated = validator.smart_save_device(dict(device)), validator.smart_save_device(dict(device))
+        assert inserted['action'] == 'insert' and updated['action'] == 'update' and updated['success']
+        assert saves.count == save_count + 2 and checks.count == check_count + 2
+
+    work = Queue()
+    for n in range(7):
+        work.put(n)
+    track_queue('test_collector', 'discovery', work)
+    assert _sample(registry.render(), 'collector_queue_depth{collector="test_collector",queue="discovery"}') == 7
+    work.get()
+    assert _sample(registry.render(), 'collector_queue_depth{collector="test_collector",queue="discovery"}') == 6
+    del work  # only a weak reference is held
+    assert _sample(registry.render(), 'collector_queue_depth{collector="test_collector",queue="discovery"}') == 0
+
+
+def test_flask_metrics_endpoint():
+    print('🧪 Testing the Flask /metrics endpoint and per-endpoint latency...')
+    registry = MetricsRegistry()
+    app = Flask(__name__)
+
+    @app.route('/api/devices/<int:device_id>')
+    def device(device_id):
+        return {'id': device_id}
+
+    @app.route('/api/boom')
+    def boom():
+        raise RuntimeError('boom')
+
+    install_flask_metrics(app, service='test_web', registry=registry)
+    install_flask_metrics(app, service='test_web', registry=registry)  # idempotent
+    client = app.test_client()
+    for device_id in range(5):
+        assert client.get(f'/api/devices/{device_id}').status_code == 200
+    assert client.get('/nowhere').status_code == 404
+    assert client.get('/api/boom').status_code == 500
+
+    response = client.get('/metrics')
+    assert response.status_code == 200 and response.headers['Content-Type'] == CONTENT_TYPE
+    text = response.get_data(as_text=True)
+    base = 'http_request_duration_seconds_count{service="test_web",'
+    # Labelled by URL rule, not by the concrete path, so cardinality stays bounded
+    assert _sample(text, base + 'endpoint="/api/devices/<int:device_id>",method="GET",status="200"}') == 5
+    assert _sample(text, base + 'endpoint="unmatched",method="GET",status="404"}') == 1
+    assert _sample(text, base + 'endpoint="/api/boom",method="GET",status="500"}') == 1
+
+    from tools import web_database_monitor as monitor
+    response = monitor.app.test_client().get('/metrics')
+    assert response.status_code == 200 and 'collector_probe_duration_seconds' in response.get_data(as_text=True)
+
+
+def _worker_process(directory, requests, done, release):
+    """Forked worker: counts requests, keeps a live gauge, then waits or exits"""
+    registry = get_metrics_registry()
+    registry.reset()  # what gunicorn's post_fork hook does with values inherited from the parent
+    counter = registry.counter('mp_test_requests', 'requests', ('service',)).labels('web')
+    histogram = registry.histogram('mp_test_seconds', 'latency', buckets=(0.1, 1.0))
+    registry.gauge('mp_test_in_flight', 'in flight').set(2)
+    for _ in range(requests):
+        counter.inc()
+        histogram.observe(0.05)
+    write_snapshot(directory)
+    done.set()
+    release.wait(10)
+
+
+def test_multiprocess_snapshots_merge():
+    print('🧪 Testing merged metrics across pre-forked workers...')
+    context = multiprocessing.get_context('fork')
+    with tempfile.TemporaryDirectory() as directory:
+        release = context.Event()
+        workers = []
+        for requests in (3, 5):
+            done = context.Event()
+            worker = context.Process(target=_worker_process, args=(directory, requests, done, release))
+            worker.start()
+            assert done.wait(10)
+            workers.append(worker)
+        # A recycled worker: it exited, but what it counted still belongs in the totals
+        done = context.Event()
+        recycled = context.Process(target=_worker_process, args=(directory, 7, done, context.Event()))
+        recycled.start()
+        assert done.wait(10)
+        recycled.kill()
+        recycled.join()
+        try:
+            merged = collect_multiprocess(directory)
+            text = merged.render()
+            assert merged.processes == 3  # two live workers + this process
+            assert _sample(text, 'mp_test_requests_total{service="web"}') == 15
+            assert _sample(text, 'mp_test_seconds_count') == 15
+            assert _sample(text, 'mp_test_seconds_bucket{le="0.1"}') == 15
+            assert _sample(text, 'mp_test_in_flight') == 4  # gauges: live workers only
+        finally:
+            release.set()
+            for worker in workers:
+                worker.join(10)
+
+        # Single-process mode is unchanged
+        os.environ.pop(metrics_registry.MULTIPROCESS_DIR_ENV, None)
+        assert metrics_registry.render_metrics() == get_metrics_registry().render()
+
+
+def test_headless_exposure_and_scheduler():
+    print('🧪 Testing the headless metrics server, textfile output and scheduler metrics...')
+    from scan_scheduler_service import FakeClock, ScanSchedulerService, ScheduleSpec
+
+    runs = get_metrics_registry().get('scheduler_runs')
+    succeeded, failed = runs.labels('succeeded').value, runs.labels('failed').value
+    with tempfile.TemporaryDirectory() as tmp:
+        def runner(run):
+            if run.target.startswith('10.0.1.'):
+                raise RuntimeError('unreachable')
+            return {'success': True, 'devices_found': 4}
+
+        service = ScanSchedulerService(runner, db_path=os.path.join(tmp, 'scheduler.db'), clock=FakeClock())
+        service.add_schedule(ScheduleSpec(id='a', name='A', targets=['10.0.0.0/24', '10.0.1.0/24', '10.0.2.0/24']))
+        service.run_pending()
+        assert service.wait_idle()
+        service.stop()
+        assert runs.labels('succeeded').value == succeeded + 2 and runs.labels('failed').value == failed + 1
+
+        server = start_metrics_server(0, host='127.0.0.1')
+        try:
+            url = f'http://127.0.0.1:{server.server_address[1]}/metrics'
+            with urllib.request.urlopen(url, timeout=5) as response:
+                assert response.headers['Content-Type'] == CONTENT_TYPE
+                text = response.read().decode('utf-8')
+            assert _sample(text, 'scheduler_runs_total{status="failed"}') == failed + 1
+            assert 'scheduler_run_duration_seconds_bucket{status="succeeded",le="1"}' in text
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        path = os.path.join(tmp, 'collector.prom')
+        write_textfile(path)
+        with open(path, encoding='utf-8') as handle:
+            assert '# TYPE scheduler_runs counter' in handle.read()
+        assert os.listdir(tmp).count('collector.prom') == 1
+        assert not [f for f in os.listdir(tmp) if f.startswith('.metrics_')]
+
+
+def test_instrumentation_overhead():
+    print('🧪 Testing per-observation overhead...')
+    results = benchmark(50000)
+    for name, micros in results.items():
+        print(f'   {name}: {micros:.3f} µs/call')
+    # A probe or commit takes milliseconds; a few microseconds of bookkeeping is noise
+    assert results['histogram_observe'] < 5
+    assert max(results.values()) < 20
+    print('✅ Metrics registry test completed successfully!')
+
+
+if __name__ == '__main__':
+    test_exposition_format()
+    test_probe_db_and_queue_instrumentation()
+    test_flask_metrics_endpoint()
+    test_multiprocess_snapshots_merge()
+    test_headless_exposure_and_scheduler()
+    test_instrumentation_overhead()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Test the adaptive rescan planner with a simulated /24: a few DHCP laptops
+that change hourly, stable servers, a flapping printer and empty addresses,
+scanned by an hourly schedule for a simulated week
+"""
+
+import logging
+import os
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta
+
+from rescan_planner import RescanPlanner, expand_scan_targets
+
+VOLATILE = {f'10.9.0.{i}' for i in range(1, 21)}       # DHCP laptops, change every hour
+STABLE = {f'10.9.0.{i}' for i in range(21, 121)}       # servers, never change
+FLAPPING = '10.9.0.200'                                # up on even hours only
+
+
+def _simulated_scan(ips, hour):
+    """Return (devices, reachable) the collector would see for these IPs"""
+    devices = []
+    for ip in ips:
+        if ip in VOLATILE:
+            devices.append({'ip_address': ip, 'hostname': f'laptop-{hour}', 'working_user': f'user{hour}'})
+        elif ip in STABLE:
+            devices.append({'ip_address': ip, 'hostname': f'srv-{ip}', 'serial_number': 'SN-' + ip})
+        elif ip == FLAPPING and hour % 2 == 0:
+            devices.append({'ip_address': ip, 'hostname': 'printer'})
+    return devices
+
+
+def test_expand_scan_targets():
+    print('🧪 Testing target expansion...')
+    assert len(expand_scan_targets(['10.0.0.0/24'])) == 254
+    assert expand_scan_targets(['10.0.0.1-3', '10.0.0.2']) == ['10.0.0.1', '10.0.0.2', '10.0.0.3']
+    assert expand_scan_targets(['10.0.0.250-10.0.1.1']) == ['10.0.0.250', '10.0.0.251', '10.0.0.252',
+                                                           '10.0.0.253', '10.0.0.254', '10.0.0.255', '10.0.1.0',
+                                                           '10.0.1.1']
+
+    # Oversized targets are capped, and the cut is reported rather than silent
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logger = logging.getLogger('rescan_planner')
+    logger.addHandler(handler)
+    try:
+        assert len(expand_scan_targets(['10.0.0.0/24', '10.1.0.0/16', '10.2.0.1-10.2.0.200'], max_per_target=100)) == 300
+        assert len(expand_scan_targets(['10.3.0.0/25'], max_per_target=126)) == 126
+    finally:
+        logger.removeHandler(handler)
+    assert [record.getMessage() for record in records] == [
+        'Scan target 10.0.0.0/24 has 254 hosts; planning the first 100 and dropping 154',
+        'Scan target 10.1.0.0/16 has 65534 hosts; planning the first 100 and dropping 65434',
+        'Scan target 10.2.0.1-10.2.0.200 has 200 hosts; planning the first 100 and dropping 100']
+
+
+def test_week_of_hourly_runs_cuts_work_and_keeps_freshness():
+    print('🧪 Simulating one week of hourly scheduled scans...')
+    with tempfile.TemporaryDirectory() as tmp:
+        planner = RescanPlanner(os.path.join(tmp, 'assets.db'), min_interval_minutes=60,
+                                max_interval_minutes=24 * 60, volatile_sla_minutes=60)
+        start = datetime(2025, 1, 6, 0, 0)
+        total_scanned = 0
+        last_seen = {}
+        max_staleness = {}
+        hours = 7 * 24
+        for hour in range(hours):
+            now = start + timedelta(hours=hour)
+            plan = planner.plan(['10.9.0.0/24'], now=now)
+            if hour == 0:
+                assert len(plan.targets) == 254  # everything unknown on the first run
+            total_scanned += len(plan.targets)
+            devices = _simulated_scan(plan.targets, hour)
+            planner.record_results(plan.targets, devices, now=now)
+            for ip in plan.targets:
+                if ip in VOLATILE and hour >= 24:  # after the first day of learning
+                    if ip in last_seen:
+                        gap = (now - last_seen[ip]).total_seconds() / 60
+                        max_staleness[ip] = max(max_staleness.get(ip, 0), gap)
+                    last_seen[ip] = now
+
+        baseline = 254 * hours
+        ratio = total_scanned / baseline
+        print(f'   scanned {total_scanned} IPs vs {baseline} baseline ({ratio:.1%} of the work)')
+        assert ratio < 0.25
+        # Freshness SLA: once learned, volatile laptops are rescanned every run
+        assert max(max_staleness.values()) <= 60
+        # Stable servers and empty addresses backed off to the max interval
+        summary = planner.summary()
+        assert summary['volatile_assets'] >= len(VOLATILE)
+        assert summary['backed_off_assets'] >= 200
+
+        # Statistics persist for the next process
+        reloaded = RescanPlanner(os.path.join(tmp, 'assets.db'))
+        assert reloaded.summary()['tracked_assets'] == 254
+
+
+def test_priority_order_and_budget():
+    print('🧪 Testing priority order and per-run budget...')
+    with tempfile.TemporaryDirectory() as tmp:
+        planner = RescanPlanner(os.path.join(tmp, 'assets.db'), min_interval_minutes=60)
+        t0 = datetime(2025, 1, 6, 0, 0)
+        for i in range(1, 5):
+            planner.record_observation(f'10.1.0.{i}', True, {'hostname': 'a'}, now=t0)
+        # .1 changes repeatedly, .2 fails collection, .3/.4 are stable
+        for step in range(1, 4):
+            now = t0 + timedelta(hours=2 * step)
+            planner.record_observation('10.1.0.1', True, {'hostname': f'b{step}'}, now=now)
+            planner.record_observation('10.1.0.2', True, None, success=False, now=now)
+            planner.record_observation('10.1.0.3', True, {'hostname': 'a'}, now=now)
+            planner.record_observation('10.1.0.4', True, {'hostname': 'a'}, now=now)
+        plan = planner.plan(['10.1.0.1-5'], now=t0 + timedelta(hours=8))
+        assert plan.targets[0] == '10.1.0.5'  # never scanned
+        assert plan.targets[1:] == ['10.1.0.1', '10.1.0.2']  # stable .3/.4 backed off
+        assert plan.entries[1].reason == 'volatile'
+        assert plan.entries[2].reason == 'failed collection'
+
+        budgeted = planner.plan(['10.1.0.1-5'], now=t0 + timedelta(hours=8), budget=2)
+        assert budgeted.targets == ['10.1.0.5', '10.1.0.1'] and budgeted.deferred >= 1
+
+
+def test_seed_from_existing_assets():
+    print('🧪 Testing bootstrap from the assets table...')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'assets.db')
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("CREATE TABLE assets (id INTEGER PRIMARY KEY, ip_address TEXT, last_seen TEXT)")
+            conn.execute("INSERT INTO assets (ip_address, last_seen) VALUES ('10.2.0.1', '2025-01-06T00:00:00')")
+        planner = RescanPlanner(db_path)
+        assert planner.seed_from_assets() == 1
+        assert planner.plan(['10.2.0.1'], now=datetime(2025, 1, 6, 0, 30)).targets == []
+        assert planner.plan(['10.2.0.1'], now=datetime(2025, 1, 6, 1, 30)).targets == ['10.2.0.1']
+        print('✅ Rescan planner test completed successfully!')
+
+
+if __name__ == '__main__':
+    test_expand_scan_targets()
+    test_week_of_hourly_runs_cuts_work_and_keeps_freshness()
+    test_priority_order_and_budget()
+    test_seed_from_existing_assets()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Test the data-version response cache: invalidation after writes from other
+connections, ETag revalidation, gzip/brotli variants, query normalization,
+memory-bounded LRU eviction and the department web service wiring
+"""
+
+import gzip
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from flask import Flask, jsonify, request
+
+import response_cache
+from metrics_registry import get_metrics_registry
+from response_cache import ResponseCache, install_response_cache
+
+
+def _database(tmp):
+    db_path = os.path.join(tmp, 'assets.db')
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE assets (id INTEGER PRIMARY KEY, hostname TEXT, device_type TEXT)")
+    conn.executemany("INSERT INTO assets (hostname, device_type) VALUES (?, ?)",
+                     [(f'host-{n}', 'Laptop' if n % 2 else 'Server') for n in range(40)])
+    conn.commit()
+    conn.close()
+    return db_path
+
+
+def _app(db_path, **options):
+    app = Flask(__name__)
+    cache = install_response_cache(app, db_path, service='test', **options)
+    calls = []
+
+    @app.route('/api/assets', methods=['GET', 'POST'])
+    @cache.cached()
+    def assets():
+        calls.append(request.method)
+        with sqlite3.connect(db_path) as conn:
+            if request.method == 'POST':
+                conn.execute("INSERT INTO assets (hostname, device_type) VALUES (?, ?)", (request.json['hostname'], 'Phone'))
+                return jsonify({'message': 'created'})
+            rows = conn.execute("SELECT id, hostname, device_type FROM assets ORDER BY id LIMIT ?",
+                                (request.args.get('limit', 1000, type=int),)).fetchall()
+        return jsonify({'assets': [list(row) for row in rows], 'total': len(rows)})
+
+    @app.route('/api/broken')
+    @cache.cached()
+    def broken():
+        calls.append('broken')
+        return jsonify({'error': 'database is locked'})
+
+    @app.route('/api/clock')
+    @cache.cached(max_age=0.05)
+    def clock():
+        calls.append('clock')
+        return jsonify({'now': time.time()})
+
+    return app, cache, calls
+
+
+def test_invalidation_after_write():
+    print('🧪 Testing invalidation after a write from another connection...')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = _database(tmp)
+        app, cache, calls = _app(db_path)
+        client = app.test_client()
+
+        first = client.get('/api/assets')
+        assert first.headers['X-Cache'] == 'MISS' and first.json['total'] == 40
+        second = client.get('/api/assets')
+        assert second.headers['X-Cache'] == 'HIT' and second.data == first.data and calls == ['GET']
+
+        # A scanner process commits on its own connection
+        writer = sqlite3.connect(db_path)
+        writer.execute("UPDATE assets SET device_type = 'Desktop' WHERE id = 1")
+        writer.commit()
+        third = client.get('/api/assets')
+        assert third.headers['X-Cache'] == 'MISS' and third.json['assets'][0][2] == 'Desktop'
+        assert client.get('/api/assets').headers['X-Cache'] == 'HIT'
+
+        # Writes through the app itself are other connections too
+        assert client.post('/api/assets', json={'hostname': 'new'}).json == {'message': 'created'}
+        assert client.get('/api/assets').json['total'] == 41
+
+        # An uncommitted write is invisible, so it does not invalidate
+        writer.execute("DELETE FROM assets")
+        assert client.get('/api/assets').headers['X-Cache'] == 'HIT'
+        writer.rollback()
+        writer.close()
+
+        cache.invalidate()
+        assert client.get('/api/assets').headers['X-Cache'] == 'MISS'
+        assert cache.stats()['invalidations'] == 3
+        cache.version.close()
+
+
+def test_replaced_database_and_query_keys():
+    print('🧪 Testing database replacement and query normalization...')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = _database(tmp)
+        app, cache, calls = _app(db_path)
+        client = app.test_client()
+
+        client.get('/api/assets?limit=5&b=2')
+        assert client.get('/api/assets?b=2&limit=5&_=1700000000').headers['X-Cache'] == 'HIT'
+        assert client.get('/api/assets?limit=6&b=2').json['total'] == 6
+
+        # A restore swaps the file: different inode, even though its data_version could repeat
+        backup = os.path.join(tmp, 'backup.db')
+        shutil.copy(db_path, backup)
+        with sqlite3.connect(backup) as conn:
+            conn.execute("DELETE FROM assets WHERE id > 3")
+        os.replace(backup, db_path)
+        assert client.get('/api/assets?limit=5&b=2').json['total'] == 3
+
+        # A missing database is never created by the version check
+        os.remove(db_path)
+        cache.version.current()
+        assert not os.path.exists(db_path)
+        cache.version.close()
+
+
+def test_etags_and_compression():
+    print('🧪 Testing ETag revalidation and gzip/brotli encodings...')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = _database(tmp)
+        app, cache, calls = _app(db_path, min_compress_bytes=512)
+        client = app.test_client()
+
+        plain = client.get('/api/assets')
+        assert 'Content-Encoding' not in plain.headers and plain.headers['Vary'] == 'Accept-Encoding'
+        assert 'no-cache' in plain.headers['Cache-Control']
+        etag = plain.headers['ETag']
+        revalidated = client.get('/api/assets', headers={'If-None-Match': etag})
+        assert revalidated.status_code == 304 and revalidated.data == b'' and revalidated.headers['ETag'] == etag
+
+        zipped = client.get('/api/assets', headers={'Accept-Encoding': 'gzip, deflate'})
+        assert zipped.headers['Content-Encoding'] == 'gzip' and zipped.headers['ETag'] != etag
+        assert gzip.decompress(zipped.data) == plain.data and len(zipped.data) < len(plain.data)
+        # The revalidation of a gzip copy still matches the same body
+        assert client.get('/api/assets', headers={'If-None-Match': zipped.headers['ETag']}).status_code == 304
+        assert client.get('/api/assets', headers={'Accept-Encoding': 'gzip;q=0'}).headers.get('Content-Encoding') is None
+
+        if response_cache.BROTLI_AVAILABLE:
+            import brotli
+            encoded = client.get('/api/assets', headers={'Accept-Encoding': 'gzip, br'})
+            assert encoded.headers['Content-Encoding'] == 'br' and brotli.decompress(encoded.data) == plain.data
+
+        small = client.get('/api/assets?limit=1', headers={'Accept-Encoding': 'gzip'})
+        assert 'Content-Encoding' not in small.headers
+
+        # After a write the body differs, so the old ETag no longer matches
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("UPDATE assets SET hostname = 'renamed' WHERE id = 2")
+        changed = client.get('/api/assets', headers={'If-None-Match': etag})
+        assert changed.status_code == 200 and changed.headers['ETag'] != etag
+        assert calls == ['GET', 'GET', 'GET']
+        cache.version.close()
+
+
+def test_uncacheable_responses_and_max_age():
+    print('🧪 Testing errors, POST pass-through and max_age...')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = _database(tmp)
+        app, cache, calls = _app(db_path)
+        client = app.test_client()
+
+        client.get('/api/broken')
+        client.get('/api/broken')
+        assert calls.count('broken') == 2 and len(cache) == 0
+
+        client.get('/api/clock')
+        client.get('/api/clock')
+        time.sleep(0.1)
+        client.get('/api/clock')
+        assert calls.count('clock') == 2
+
+        stats = client.get('/api/cache/stats').json
+        assert stats['bypass'] == 2 and stats['hit'] == 1 and stats['miss'] == 2 and stats['hit_rate'] == 0.3333
+        cache.version.close()
+
+
+def test_lru_is_bounded_by_bytes():
+    print('🧪 Testing memory-bounded LRU eviction...')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = _database(tmp)
+        app, cache, calls = _app(db_path, max_bytes=8000)
+        client = app.test_client()
+        for limit in range(1, 40):
+            client.get(f'/api/assets?limit={limit}')
+            assert cache.bytes <= cache.max_bytes
+        assert 0 < len(cache) < 39 and cache.evictions > 0
+        # Most recently used entries survive
+        assert client.get('/api/assets?limit=39').headers['X-Cache'] == 'HIT'
+        assert client.get('/api/assets?limit=1').headers['X-Cache'] == 'MISS'
+
+        metrics = get_metrics_registry().render()
+        assert 'response_cache_requests_total{service="test",endpoint="/api/assets",result="hit"}' in metrics
+        assert 'response_cache_evictions_total{service="test"}' in metrics
+        cache.version.close()
+
+
+def test_department_service_wiring():
+    print('🧪 Testing the department web service cache wiring...')
+    from complete_department_web_service import CompleteDepartmentWebService
+    from db.migrations import migrate
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'assets.db')
+        migrate(db_path)
+        service = CompleteDepartmentWebService(db_path)
+        client = service.app.test_client()
+
+        before = client.get('/api/departments')
+        assert before.status_code == 200 and client.get('/api/departments').headers['X-Cache'] == 'HIT'
+        created = client.post('/api/departments', json={'name': 'Cache Test', 'description': 'x'})
+        assert created.status_code == 200
+        after = client.get('/api/departments')
+        assert after.headers['X-Cache'] == 'MISS' and 'Cache Test' in {d['name'] for d in after.json}
+        assert client.get('/api/cache/stats').json['service'] == 'department_web'
+
+        # Cached stats are still behind the access check (the service's own schema has a classification column)
+        conn = sqlite3.connect(db_path)
+        conn.execute('ALTER TABLE assets ADD COLUMN classification TEXT')
+        conn.commit()
+        conn.close()
+        assert client.get('/api/stats').status_code == 200 and client.get('/api/stats').headers['X-Cache'] == 'HIT'
+        outsider = {'REMOTE_ADDR': '203.0.113.9'}
+        assert client.get('/api/realtime/stats', environ_base=outsider).status_code == 403
+        assert client.get('/api/stats', environ_base=outsider).status_code == 403
+        service.response_cache.version.close()
+    print('✅ Response cache test completed successfully!')
+
+
+if __name__ == '__main__':
+    test_invalidation_after_write()
+    test_replaced_database_and_query_keys()
+    test_etags_and_compression()
+    test_uncacheable_responses_and_max_age()
+    test_lru_is_bounded_by_bytes()
+    test_department_service_wiring()
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Test resumable scan checkpoints: chunk planning from the massive-scan chunk
+sizes, batched host-state commits, resuming after the scanning process is
+killed mid-sweep without redoing committed work, stale runs expiring instead
+of being resumed, MassiveScanThread picking up an interrupted network
+where it stopped (or starting fresh when asked to), and the desktop app's
+"Resume interrupted scan" option routing the scan to the checkpointed
+enhanced collection strategy (and being disabled when nothing can resume)
+"""
+
+import multiprocessing
+import os
+import signal
+import sqlite3
+import sys
+import tempfile
+import time
+import types
+
+from db.migrations import LATEST_VERSION, current_version, history
+from scan_checkpoints import ScanCheckpointStore, benchmark, run_key_for
+
+KILL_TARGETS = ['10.20.0.0/24', '10.20.1.1-120']
+COMMIT_EVERY = 8
+
+
+def _is_alive(ip):
+    return int(ip.rsplit('.', 1)[1]) % 3 == 0
+
+
+def _scan_worker(db_path, log_path):
+    """Child process: a checkpointed sweep that logs every probe and collection it performs"""
+    log_file = open(log_path, 'a', buffering=1)
+
+    def discover(ip):
+        log_file.write(f'D {ip}\n')
+        time.sleep(0.002)
+        return _is_alive(ip)
+
+    def collect(ip):
+        log_file.write(f'C {ip}\n')
+        time.sleep(0.004)
+        return True
+
+    store = ScanCheckpointStore(db_path, commit_every=COMMIT_EVERY, commit_interval=60)
+    store.start(KILL_TARGETS).process(discover, collect, workers=2)
+
+
+def _read_log(path):
+    with open(path) as handle:
+        return [line.split() for line in handle if line.strip()]
+
+
+def test_plan_and_resume_identity():
+    print('🧪 Testing chunk planning and run identity...')
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ScanCheckpointStore(os.path.join(tmp, 'assets.db'))
+        run = store.start(['10.0.0.0/24', '10.0.1.1-30', '10.0.0.7'])
+        status = run.status()
+        # /24 -> 50 per chunk (MassiveScanThread), 30-host range -> one chunk, duplicate IP dropped
+        assert not run.resumed and status['total_hosts'] == 284 and status['chunks'] == 7
+        assert [chunk.seq for chunk in run.chunks()] == list(range(7))
+
+        again = store.start(['10.0.0.7', '10.0.1.1-30', ' 10.0.0.0/24'])
+        assert again.resumed and again.run_id == run.run_id
+        assert run_key_for(['a', 'b']) == run_key_for(['b', 'a', ''])
+        assert [run['id'] for run in store.unfinished_runs()] == [run.run_id]
+
+        fresh = store.start(['10.0.0.0/24', '10.0.1.1-30', '10.0.0.7'], resume=False)
+        assert fresh.run_id != run.run_id and store.run_status(run.run_id)['status'] == 'aborted'
+
+        # Non-/24 networks are split too (a /16 used to be scanned as one chunk)
+        big = store.start(['172.16.0.0/16'])
+        assert big.status()['chunks'] == 656
+
+
+def test_stale_runs_expire():
+    print('🧪 Testing that old unfinished runs expire instead of resuming...')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'assets.db')
+        store = ScanCheckpointStore(db_path, max_resume_age_hours=6)
+        with sqlite3.connect(db_path) as conn:
+            # The tables come from the schema migrations, not from the store
+            assert current_version(conn) == LATEST_VERSION
+            assert 'scan_checkpoint_tables' in [row[1] for row in history(conn)]
+        old = store.start(['10.30.0.1-40'])
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("UPDATE scan_runs SET updated_at = '2020-01-01T00:00:00' WHERE id = ?", (old.run_id,))
+
+        # No age limit: even a years-old run is offered
+        assert ScanCheckpointStore(db_path, max_resume_age_hours=None).unfinished_runs()[0]['id'] == old.run_id
+        assert store.unfinished_runs() == []
+        fresh = store.start(['10.30.0.1-40'])
+        assert not fresh.resumed and store.run_status(old.run_id)['status'] == 'expired'
+        assert store.start(['10.30.0.1-40']).run_id == fresh.run_id  # recent runs still resume
+        assert store.expire_stale_runs() == 0
+
+
+def test_batched_commits():
+    print('🧪 Testing batched host-state commits and known-alive hand-off...')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'assets.db')
+        store = ScanCheckpointStore(db_path, commit_every=10, commit_interval=60)
+        run = store.start(['10.0.0.1-25'], chunk_size=25)
+
+        def committed(state):
+            with sqlite3.connect(db_path) as conn:
+                return conn.execute("SELECT COUNT(*) FROM scan_run_hosts WHERE state = ?", (state,)).fetchone()[0]
+
+        for n in range(1, 10):
+            run.mark_discovered(f'10.0.0.{n}', alive=n % 2 == 0)
+        assert committed('dead') == 0  # still buffered
+        run.mark_discovered('10.0.0.10', alive=True)
+        assert committed('dead') == 5 and committed('alive') == 5
+        run.mark_collected('10.0.0.2')
+        run.mark_collected('10.0.0.4', success=False)
+        assert run.flush() == 2 and run.flush() == 0
+        try:
+            run.mark('10.0.0.11', 'maybe')
+            assert False, 'unknown state accepted'
+        except ValueError:
+            pass
+
+        chunk = next(store.start(['10.0.0.1-25']).chunks())
+        assert chunk.alive == ['10.0.0.6', '10.0.0.8', '10.0.0.10']
+        assert chunk.discover == [f'10.0.0.{n}' for n in range(11, 26)] and chunk.done == 7
+        assert chunk.attempt == 1 and chunk.status == 'pending'
+
+
+def test_kill_and_resume_without_duplicate_work():
+    print('🧪 Testing resume after the scanning process is killed mid-sweep...')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'assets.db')
+        first_log, resume_log = os.path.join(tmp, 'first.log'), os.path.join(tmp, 'resume.log')
+        open(first_log, 'w').close()
+
+        worker = multiprocessing.get_context('fork').Process(target=_scan_worker, args=(db_path, first_log))
+        worker.start()
+        deadline = time.time() + 60
+        while sum(1 for entry in _read_log(first_log) if entry[0] == 'C') < 60:
+            assert worker.is_alive() and time.time() < deadline, 'worker finished before it could be killed'
+            time.sleep(0.01)
+        os.kill(worker.pid, signal.SIGKILL)
+        worker.join()
+        assert worker.exitcode == -signal.SIGKILL
+
+        with sqlite3.connect(db_path) as conn:
+            run_id, status = conn.execute("SELECT id, status FROM scan_runs").fetchone()
+            final = dict(conn.execute("SELECT ip, state FROM scan_run_hosts WHERE state IN ('dead', 'collected')"))
+            closed = {ip for (ip,) in conn.execute(
+                "SELECT h.ip FROM scan_run_hosts h JOIN scan_run_chunks c ON c.run_id = h.run_id AND c.seq = h.chunk_seq "
+                "WHERE c.status = 'collected'")}
+            total = conn.execute("SELECT COUNT(*) FROM scan_run_hosts").fetchone()[0]
+        assert status == 'running' and closed and len(final) < total
+
+        # Resume in this process with the same targets
+        store = ScanCheckpointStore(db_path, commit_every=COMMIT_EVERY, commit_interval=60)
+        run = store.start(list(reversed(KILL_TARGETS)))
+        assert run.resumed and run.run_id == run_id
+        with open(resume_log, 'a', buffering=1) as resume_file:
+            result = run.process(lambda ip: resume_file.write(f'D {ip}\n') and _is_alive(ip),
+                                 lambda ip: resume_file.write(f'C {ip}\n') > 0, workers=2)
+
+        first, resumed = _read_log(first_log), _read_log(resume_log)
+        redone = {ip for _, ip in resumed}
+        # Nothing committed before the kill is probed or collected again
+        assert not redone & set(final) and not redone & closed
+        done_before = {(kind, ip) for kind, ip in first}
+        repeated = [(kind, ip) for kind, ip in resumed if (kind, ip) in done_before]
+        # Only work still in the unflushed batch (or in flight on the 2 workers) may repeat
+        assert len(repeated) <= COMMIT_EVERY + 2, repeated
+
+        alive = sorted(ip for ip in {ip for _, ip in first + resumed} if _is_alive(ip))
+        collected = [ip for kind, ip in first + resumed if kind == 'C']
+        assert sorted(set(collected)) == alive
+        assert len(collected) - len(alive) <= COMMIT_EVERY + 2
+        assert result['status'] == 'completed' and result['collected'] == len(alive) == 84 + 40
+        assert result['chunks_done'] == result['chunks'] and result['host_states'].get('pending') is None
+
+
+class _Signal:
+    def __init__(self):
+        self.messages = []
+
+    def emit(self, *args):
+        self.messages.append(args)
+
+
+class _Controller:
+    def __init__(self):
+        self.progress_updated = _Signal()
+
+
+class _MainWindow:
+    def get_snmp_v2c(self):
+        return ['public']
+
+    def get_snmp_v3(self):
+        return {}
+
+
+def test_massive_scan_thread_resumes_network():
+    print('🧪 Testing MassiveScanThread resuming an aborted network...')
+    from massive_scan_protection import MassiveScanThread
+
+    calls = []
+
+    class FakeCollector:
+        """Stands in for the network-bound collector; reports through the checkpoint like the real one"""
+
+        def __init__(self, targets, checkpoint=None, known_alive=None, **kwargs):
+            self.targets, self.checkpoint, self.known_alive = targets, checkpoint, known_alive or []
+            self._processed_devices = []
+
+        def start(self):
+            calls.append((list(self.targets), list(self.known_alive)))
+            for ip in self.targets:
+                self.checkpoint.mark_discovered(ip, _is_alive(ip))
+            for ip in [ip for ip in self.targets if _is_alive(ip)] + self.known_alive:
+                self.checkpoint.mark_collected(ip)
+                self._processed_devices.append({'ip_address': ip})
+            if len(calls) == 2 and thread.should_abort is False:
+                thread.abort_scan()  # user hits abort during the second chunk
+
+        def wait(self):
+            return True
+
+    # scan_network_chunked imports the collector per chunk; hand it the stand-in module
+    original = sys.modules.get('ultra_fast_collector')
+    sys.modules['ultra_fast_collector'] = types.SimpleNamespace(UltraFastDeviceCollector=FakeCollector)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, 'assets.db')
+            thread = MassiveScanThread(['10.9.0.0/24'], 50, _MainWindow(), _Controller(), checkpoint_db=db_path)
+            thread.scan_network_chunked('10.9.0.0/24', [], [], 'Network 1/1')
+            assert len(calls) == 2 and len(calls[0][0]) == 50  # 50 hosts per /24 chunk
+
+            thread = MassiveScanThread(['10.9.0.0/24'], 50, _MainWindow(), _Controller(), checkpoint_db=db_path)
+            devices = thread.scan_network_chunked('10.9.0.0/24', [], [], 'Network 1/1')
+            first_pass = {ip for targets, _ in calls[:2] for ip in targets}
+            resumed = {ip for targets, alive in calls[2:] for ip in targets + alive}
+            # The chunk finished before the abort is skipped; the aborted one is neither re-probed nor re-collected
+            assert not first_pass & resumed and len(calls) == 2 + 4
+            assert len(first_pass | resumed) == 254 and len(devices) == 51
+            assert any('Resuming' in message[1] for message in thread.controller.progress_updated.messages)
+
+            store = ScanCheckpointStore(db_path)
+            assert store.unfinished_runs() == []
+            with sqlite3.connect(db_path) as conn:
+                assert conn.execute("SELECT collected, chunks_done FROM scan_runs").fetchone() == (84, 6)
+
+            # Interrupted again, then started with resume off: the saved progress is discarded
+            calls.clear()
+            thread = MassiveScanThread(['10.9.0.0/24'], 50, _MainWindow(), _Controller(), checkpoint_db=db_path)
+            thread.scan_network_chunked('10.9.0.0/24', [], [], 'Network 1/1')
+            interrupted = store.unfinished_runs()[0]['id']
+            thread = MassiveScanThread(['10.9.0.0/24'], 50, _MainWindow(), _Controller(), checkpoint_db=db_path,
+                                       resume_scan=False)
+            devices = thread.scan_network_chunked('10.9.0.0/24', [], [], 'Network 1/1')
+            assert len(calls) == 2 + 6 and len(devices) == 84  # every chunk scanned again
+            assert store.run_status(interrupted)['status'] == 'aborted' and store.unfinished_runs() == []
+    finally:
+        if original is None:
+            sys.modules.pop('ultra_fast_collector', None)
+        else:
+            sys.modules['ultra_fast_collector'] = original
+
+
+class RecordingStrategy:
+    """Stands in for EnhancedCollectionStrategy; keeps the kwargs the main window passed"""
+    created = []
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        RecordingStrategy.created.append(self)
+
+    def start(self):
+        pass
+
+
+class RecordingUltimateThread:
+    """Stands in for UltimatePerformanceCollectorThread (which does not checkpoint)"""
+    created = []
+
+    def __init__(self, parent, collector_class, ip_list, **kwargs):
+        self.ip_list = ip_list
+        signal = types.SimpleNamespace(connect=lambda slot: None)
+        self.progress_updated = self.log_message = self.collection_finished = self.device_collected = signal
+        RecordingUltimateThread.created.append(self)
+
+    def start(self):
+        pass
+
+
+def test_main_window_forwards_resume_option():
+    print('🧪 Testing the desktop resume option reaches the collection strategy...')
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt6.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication([])
+    cwd = os.getcwd()
+    original = sys.modules.get('enhanced_collection_strategy')
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)  # the window reads and writes its JSON settings in the working directory
+        try:
+            import gui.app as desktop
+            window = desktop.MainWindow()
+            assert window.chk_resume_scan.isChecked() and window.chk_resume_scan.isEnabled()
+            flags = {name: getattr(desktop, name) for name in (
+                'ULTIMATE_PERFORMANCE_AVAILABLE', 'ENHANCED_STRATEGY_AVAILABLE', 'THREAD_SAFE_AVAILABLE',
+                'CHECKPOINTED_STRATEGY_AVAILABLE', 'UltimatePerformanceCollectorThread')}
+            # The default desktop flow: the ultimate collector is importable and takes priority
+            desktop.ULTIMATE_PERFORMANCE_AVAILABLE, desktop.ENHANCED_STRATEGY_AVAILABLE = True, False
+            desktop.THREAD_SAFE_AVAILABLE, desktop.CHECKPOINTED_STRATEGY_AVAILABLE = False, True
+            desktop.UltimatePerformanceCollectorThread = RecordingUltimateThread
+            sys.modules['enhanced_collection_strategy'] = types.SimpleNamespace(
+                EnhancedCollectionStrategy=RecordingStrategy)
+            strategies, ultimates = len(RecordingStrategy.created), len(RecordingUltimateThread.created)
+            try:
+                window.add_windows_cred('CORP\\svc-scan', 'S3cret!')
+                window.target_entry.setText('10.30.0.0/28')
+                # The instance attribute is wrapped by the UI-responsiveness patches; test the method itself
+                window.chk_resume_scan.setChecked(True)
+                desktop.MainWindow.start_collection(window)  # resumable: the checkpointed strategy
+                window.chk_resume_scan.setChecked(False)
+                desktop.MainWindow.start_collection(window)  # from scratch: the fastest collector
+                assert len(RecordingStrategy.created) == strategies + 1
+                assert len(RecordingUltimateThread.created) == ultimates + 1
+                assert len(RecordingUltimateThread.created[-1].ip_list) == 14
+
+                # Without the ultimate collector the strategy also gets the unchecked option
+                desktop.ULTIMATE_PERFORMANCE_AVAILABLE, desktop.ENHANCED_STRATEGY_AVAILABLE = False, True
+                desktop.MainWindow.start_collection(window)
+
+                # No checkpointing strategy: the option is switched off rather than ignored
+                desktop.ULTIMATE_PERFORMANCE_AVAILABLE, desktop.ENHANCED_STRATEGY_AVAILABLE = True, False
+                desktop.CHECKPOINTED_STRATEGY_AVAILABLE = False
+                window._update_resume_option()
+                assert not window.chk_resume_scan.isChecked() and not window.chk_resume_scan.isEnabled()
+                desktop.MainWindow.start_collection(window)
+                assert len(RecordingUltimateThread.created) == ultimates + 2
+            finally:
+                for name, value in flags.items():
+                    setattr(desktop, name, value)
+            kwargs = [strategy.kwargs for strategy in RecordingStrategy.created[strategies:]]
+            assert [k['resume_scan'] for k in kwargs] == [True, False]
+            assert kwargs[0]['targets'] == ['10.30.0.0/28']
+            assert {'username': 'svc-scan', 'password': 'S3cret!', 'domain': 'CORP'} in kwargs[0]['credentials']['windows']
+            window.close()
+            app.processEvents()
+        finally:
+            os.chdir(cwd)
+            sys.modules.pop('enhanced_collection_strategy', None)
+            if original is not None:
+                sys.modules['enhanced_collection_strategy'] = original
+
+
+def test_benchmark():
+    print('🧪 Testing the interrupted-sweep benchmark...')
+    result = benchmark('10.0.0.0/22')
+    assert result['hosts'] == 1022 and result['chunks'] == 35
+    assert result['resume']['resumed'] and result['reprobed'] == 0
+    assert result['status']['status'] == 'completed' and result['status']['collected'] == 255
+    print('✅ Scan checkpoints test completed successfully!')
+
+
+if __name__ == '__main__':
+    test_plan_and_resume_identity()
+    test_stale_runs_expire()
+    test_batched_commits()
+    test_kill_and_resume_without_duplicate_work()
+    test_massive_scan_thread_resumes_network()
+    test_main_window_forwards_resume_option()
+    test_benchmark()
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Time-travel tests for the headless scan scheduler: a FakeClock is advanced
+manually and run_pending() is called directly, so days of schedules run in
+milliseconds. Also covers the GUI AutomaticScanner keeping a running service
+in sync with its saved configuration
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import types
+from datetime import datetime
+
+from scan_scheduler_service import (FakeClock, ScanSchedulerService, ScheduleSpec,
+                                    expand_targets, next_run_after, target_jitter)
+
+
+class RecordingRunner:
+    """Runner that records calls and optionally blocks until released"""
+
+    def __init__(self, block: bool = False):
+        self.calls = []
+        self.lock = threading.Lock()
+        self.release = threading.Event()
+        if not block:
+            self.release.set()
+        self.concurrent = 0
+        self.max_concurrent = 0
+
+    def __call__(self, run):
+        with self.lock:
+            self.calls.append((run.schedule_id, run.target, run.scheduled_at))
+            self.concurrent += 1
+            self.max_concurrent = max(self.max_concurrent, self.concurrent)
+        self.release.wait(5)
+        with self.lock:
+            self.concurrent -= 1
+        return 3
+
+
+def _service(tmp, runner, clock, max_concurrent=2):
+    return ScanSchedulerService(runner, max_concurrent=max_concurrent,
+                                db_path=os.path.join(tmp, 'scheduler.db'), clock=clock)
+
+
+def test_next_run_calculation():
+    print('🧪 Testing next-run calculation...')
+    monday = datetime(2025, 1, 6, 10, 30)
+    daily = ScheduleSpec(id='d', name='daily', kind='daily', time_of_day='02:00')
+    assert next_run_after(daily, monday) == datetime(2025, 1, 7, 2, 0)
+    weekly = ScheduleSpec(id='w', name='weekly', kind='weekly', time_of_day='01:00', weekdays=[2, 4])
+    assert next_run_after(weekly, monday) == datetime(2025, 1, 8, 1, 0)
+    interval = ScheduleSpec(id='i', name='interval', kind='interval', interval_minutes=15)
+    assert next_run_after(interval, monday) == monday
+    assert next_run_after(interval, monday, last_fired=monday) == datetime(2025, 1, 6, 10, 45)
+    once = ScheduleSpec(id='o', name='once', kind='once', once_at='2025-01-06T12:00:00')
+    assert next_run_after(once, monday) == datetime(2025, 1, 6, 12, 0)
+    assert next_run_after(once, monday, last_fired=monday) is None
+    assert len(expand_targets(['10.0.0.0/22', '10.1.0.5'], 24)) == 5
+    assert target_jitter('s', '10.0.1.0/24', 60) == target_jitter('s', '10.0.1.0/24', 60) <= 60
+
+
+def test_interval_and_daily_time_travel():
+    print('🧪 Testing interval and daily schedules over two simulated days...')
+    with tempfile.TemporaryDirectory() as tmp:
+        clock = FakeClock(datetime(2025, 1, 6, 0, 0))
+        runner = RecordingRunner()
+        service = _service(tmp, runner, clock)
+        service.add_schedule(ScheduleSpec(id='hourly', name='Hourly', interval_minutes=60, targets=['10.0.0.0/24']))
+        service.add_schedule(ScheduleSpec(id='nightly', name='Nightly', kind='daily', time_of_day='02:00',
+                                          targets=['10.0.1.0/24']))
+        for _ in range(48 * 4):  # 15 minute steps
+            service.run_pending()
+            service.wait_idle()
+            clock.advance(minutes=15)
+        service.stop()
+
+        hourly = [c for c in runner.calls if c[0] == 'hourly']
+        nightly = [c for c in runner.calls if c[0] == 'nightly']
+        assert len(hourly) == 48
+        assert [c[2].hour for c in nightly] == [2, 2]
+        assert service.stats['succeeded'] == 50
+
+
+def test_overlap_policies():
+    print('🧪 Testing skip / queue / coalesce overlap policies...')
+    for policy, expected_runs, expected_status in (('skip', 1, 'skipped'),
+                                                   ('queue', 4, None),
+                                                   ('coalesce', 2, 'coalesced')):
+        with tempfile.TemporaryDirectory() as tmp:
+            clock = FakeClock()
+            runner = RecordingRunner(block=True)
+            service = _service(tmp, runner, clock)
+            service.add_schedule(ScheduleSpec(id='fast', name='Fast', interval_minutes=1,
+                                              targets=['10.0.0.0/24'], overlap=policy))
+            for _ in range(4):  # fires every minute while the first run is still blocked
+                service.run_pending()
+                clock.advance(minutes=1)
+            runner.release.set()
+            assert service.wait_idle()
+            service.stop()
+
+            assert len(runner.calls) == expected_runs, (policy, runner.calls)
+            assert runner.max_concurrent == 1  # never two scans of the same target
+            if expected_status:
+                statuses = [row['status'] for row in service.history.recent(10)]
+                assert statuses.count(expected_status) == 4 - expected_runs
+
+
+def test_shared_concurrency_budget():
+    print('🧪 Testing shared concurrency budget across schedules...')
+    with tempfile.TemporaryDirectory() as tmp:
+        clock = FakeClock()
+        runner = RecordingRunner(block=True)
+        service = _service(tmp, runner, clock, max_concurrent=2)
+        service.add_schedule(ScheduleSpec(id='a', name='A', targets=['10.0.0.0/24', '10.0.1.0/24']))
+        service.add_schedule(ScheduleSpec(id='b', name='B', targets=['10.0.2.0/24', '10.0.3.0/24']))
+        assert service.run_pending() == 2
+        assert service.status()['waiting_for_budget'] == 2
+        runner.release.set()
+        assert service.wait_idle()
+        service.stop()
+        assert len(runner.calls) == 4 and runner.max_concurrent <= 2
+
+
+def test_jitter_spreads_split_subnets():
+    print('🧪 Testing jitter across a split /20...')
+    with tempfile.TemporaryDirectory() as tmp:
+        clock = FakeClock()
+        runner = RecordingRunner()
+        service = _service(tmp, runner, clock, max_concurrent=16)
+        service.add_schedule(ScheduleSpec(id='campus', name='Campus', kind='daily', time_of_day='00:10',
+                                          targets=['10.20.0.0/20'], split_prefix=24, jitter_seconds=600))
+        started_per_step = []
+        clock.advance(minutes=10)
+        for _ in range(11):  # 0..10 minutes after the fire time
+            started_per_step.append(service.run_pending())
+            service.wait_idle()
+            clock.advance(minutes=1)
+        service.stop()
+        assert sum(started_per_step) == 16
+        assert max(started_per_step) < 16  # not all subnets at the same instant
+
+
+def test_history_and_state_survive_restart():
+    print('🧪 Testing persisted history and last-fired state...')
+    with tempfile.TemporaryDirectory() as tmp:
+        clock = FakeClock(datetime(2025, 1, 6, 8, 0))
+        spec = ScheduleSpec(id='hourly', name='Hourly', interval_minutes=60, targets=['10.0.0.0/24'])
+        runner = RecordingRunner()
+        service = _service(tmp, runner, clock)
+        service.add_schedule(spec)
+        service.run_pending()
+        service.wait_idle()
+        service.stop()
+
+        # Restart 20 minutes later: nothing due until 09:00
+        clock.advance(minutes=20)
+        restarted = _service(tmp, runner, clock)
+        restarted.add_schedule(spec)
+        assert restarted.run_pending() == 0
+        assert restarted.next_runs()[0]['next_run'] == '2025-01-06T09:00:00'
+        clock.advance(minutes=40)
+        assert restarted.run_pending() == 1
+        restarted.wait_idle()
+        restarted.stop()
+
+        history = restarted.history.recent(10)
+        assert [row['status'] for row in history] == ['succeeded', 'succeeded']
+        assert history[0]['devices_found'] == 3
+
+
+class _CredentialRow:
+    def __init__(self, username, password, reads):
+        self._username, self._password, self.reads = username, password, reads
+
+    def username(self):
+        self.reads.append(threading.current_thread())
+        return self._username
+
+    def password(self):
+        return self._password
+
+
+class _Checkbox:
+    def isChecked(self):
+        return False
+
+
+def test_automatic_scanner_resyncs_running_service():
+    print('🧪 Testing AutomaticScanner config saves reaching the running scheduler...')
+    import automatic_scanner
+    from automatic_scanner import AutomaticScanner, ScanSchedule, ScheduleType
+
+    reads, collected = [], []
+    main_window = types.SimpleNamespace(win_rows=[_CredentialRow('admin', 'pw', reads)], lin_rows=[],
+                                        chk_snmp=_Checkbox(), chk_nmap=_Checkbox(), collection_worker=None)
+
+    def collect_all_devices(targets, windows_credentials, linux_credentials, **kwargs):
+        collected.append((threading.current_thread(), list(targets), list(windows_credentials)))
+        return {'success': True, 'devices': [{'ip_address': '10.30.0.5', 'hostname': 'ws-5'}]}
+
+    original_collector = sys.modules.get('ultra_fast_collector')
+    original_planner = automatic_scanner.RESCAN_PLANNER_AVAILABLE
+    sys.modules['ultra_fast_collector'] = types.SimpleNamespace(collect_all_devices=collect_all_devices)
+    automatic_scanner.RESCAN_PLANNER_AVAILABLE = False
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)  # config file and assets.db are relative to the working directory
+        try:
+            with open('automatic_scanner_config.json', 'w') as f:
+                json.dump({'schedules': [
+                    {'schedule_type': 'interval', 'interval_minutes': 30, 'name': 'Half-hourly'},
+                    {'schedule_type': 'daily', 'daily_time': '02:00', 'name': 'Nightly'}],
+                    'targets': [{'name': 'Office', 'network_range': '10.30.0.0/24'}]}, f)
+            scanner = AutomaticScanner(main_window)
+            keys = [schedule.key for schedule in scanner.schedules]
+            with open('automatic_scanner_config.json') as f:
+                assert [entry['key'] for entry in json.load(f)['schedules']] == keys  # persisted once assigned
+
+            clock = FakeClock(datetime(2025, 1, 6, 8, 0))
+            service = _service(tmp, scanner._run_scheduled_target, clock)
+            scanner.scheduler_service = service
+            scanner.sync_scheduler()
+            assert set(service.schedules) == {f'auto_{key}' for key in keys}
+
+            # Reordering changes nothing the scheduler sees: same ids, no rescheduling
+            versions = dict(service._versions)
+            scanner.schedules.reverse()
+            scanner.save_configuration()
+            assert service._versions == versions
+
+            # Edits and deletions reach the running service on save
+            half_hourly = next(s for s in scanner.schedules if s.name == 'Half-hourly')
+            edited = ScanSchedule(schedule_type=ScheduleType.INTERVAL, interval_minutes=10, name='Every 10')
+            edited.key = half_hourly.key
+            scanner.schedules = [edited]
+            scanner.save_configuration()
+            assert list(service.schedules) == [f'auto_{half_hourly.key}']
+            assert service.schedules[f'auto_{half_hourly.key}'].interval_minutes == 10
+
+            # Runs are a plain function on the pool thread; widgets were only read on this thread
+            assert service.trigger_now(f'auto_{half_hourly.key}') and service.run_pending() == 1
+            assert service.wait_idle()
+            service.stop()
+            assert len(collected) == 1 and collected[0][0] is not threading.main_thread()
+            assert collected[0][1:] == (['10.30.0.0/24'], [('admin', 'pw')])
+            assert reads and all(thread is threading.main_thread() for thread in reads)
+            assert service.history.recent(5)[0]['devices_found'] == 1
+            assert scanner.targets[0].devices_found == 1
+        finally:
+            os.chdir(cwd)
+            automatic_scanner.RESCAN_PLANNER_AVAILABLE = original_planner
+            if original_collector is None:
+                sys.modules.pop('ultra_fast_collector', None)
+            else:
+                sys.modules['ultra_fast_collector'] = original_collector
+    print('✅ Scan scheduler test completed successfully!')
+
+
+if __name__ == '__main__':
+    test_next_run_calculation()
+    test_interval_and_daily_time_travel()
+    test_overlap_policies()
+    test_shared_concurrency_budget()
+    test_jitter_spreads_split_subnets()
+    test_history_and_state_survive_restart()
+    test_automatic_scanner_resyncs_running_service()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Test the versioned schema migration engine: fresh databases, the legacy
+assets.db.backup_* snapshots, the single-PRAGMA fast path, rollback of a
+failing migration and concurrent first starts
+"""
+
+import glob
+import os
+import sqlite3
+import tempfile
+import threading
+
+from db import connection as db_connection
+from db.migrations import (LATEST_VERSION, MIGRATIONS, Migration, MigrationError, add_columns, alterable,
+                           current_version, ensure_schema, execute, history, migrate)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+LEGACY_BACKUPS = sorted(path for path in glob.glob(os.path.join(HERE, 'assets.db.backup_*'))
+                        if not path.endswith(('-wal', '-shm')))
+
+
+def _columns(conn, table='assets'):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _tables(conn):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+def _traced(conn):
+    statements = []
+    conn.set_trace_callback(statements.append)
+    return statements
+
+
+def test_fresh_database():
+    print('🧪 Testing migration of a fresh database...')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'assets.db')
+        applied = migrate(db_path)
+        assert [record['version'] for record in applied] == [m.version for m in MIGRATIONS]
+
+        conn = sqlite3.connect(db_path)
+        assert current_version(conn) == LATEST_VERSION
+        assert [row[:2] for row in history(conn)] == [(m.version, m.name) for m in MIGRATIONS]
+        columns = _columns(conn)
+        for column in ('_sync_pending', '_error_count', 'nmap_os_family', 'gpu_name', 'data_hash', 'rack_position'):
+            assert column in columns, column
+        assert 'assigned_department' in _columns(conn, 'assets_enhanced')
+        assert {'assets', 'assets_enhanced', 'hypervisors', 'schema_version'} <= _tables(conn)
+        assert conn.execute("SELECT dflt_value FROM pragma_table_info('assets') WHERE name = '_collection_quality'"
+                            ).fetchone() == ("'Standard'",)
+
+        # Current database: one PRAGMA read, no introspection, nothing applied
+        statements = _traced(conn)
+        assert ensure_schema(conn) is False and migrate(conn) == []
+        assert statements == ['PRAGMA user_version', 'PRAGMA user_version']
+        conn.close()
+
+
+def test_legacy_backups():
+    print('🧪 Testing migration of the legacy assets.db backups...')
+    assert LEGACY_BACKUPS, 'no assets.db.backup_* snapshots next to the tests'
+    with tempfile.TemporaryDirectory() as tmp:
+        for backup in LEGACY_BACKUPS:
+            db_path = os.path.join(tmp, os.path.basename(backup))
+            # immutable: the snapshots are WAL databases and must not grow -wal/-shm files in the tree
+            source = sqlite3.connect(f'file:{backup}?mode=ro&immutable=1', uri=True)
+            conn = sqlite3.connect(db_path)
+            source.backup(conn)
+            source.close()
+
+            assert current_version(conn) == 0
+            counts = {table: conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0] for table in _tables(conn)}
+            before = _columns(conn)
+            sample = conn.execute("SELECT id, hostname, ip_address FROM assets ORDER BY id LIMIT 5").fetchall()
+
+            assert ensure_schema(db_path) is True
+            assert current_version(conn) == LATEST_VERSION
+            after = _columns(conn)
+            assert before < after and 'rack_position' in after
+            assert conn.execute("SELECT id, hostname, ip_address FROM assets ORDER BY id LIMIT 5").fetchall() == sample
+            for table, count in counts.items():
+                assert conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0] == count, table
+            assert 'assets_enhanced' in _tables(conn)
+            # Columns the old ALTER scripts already added are skipped, not re-added
+            added = {row[1]: row[4] for row in history(conn)}
+            assert added['nmap_detection_columns'] == 0 and added['persistence_columns'] == 0
+            # (assigned_department lands on assets_enhanced, which _columns() does not look at)
+            assert len(after) - len(before) == sum(added.values()) - added['assets_enhanced_department']
+
+            statements = _traced(conn)
+            assert ensure_schema(conn) is False and statements == ['PRAGMA user_version']
+            conn.close()
+
+
+def test_failed_migration_rolls_back():
+    print('🧪 Testing that a failing migration leaves the database untouched...')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'assets.db')
+        migrations = (
+            Migration(1, 'table', (execute("CREATE TABLE IF NOT EXISTS assets (id INTEGER PRIMARY KEY)"),)),
+            Migration(2, 'columns', (add_columns('assets', [('hostname', 'TEXT NOT NULL'),
+                                                            ('seen', 'TEXT DEFAULT CURRENT_TIMESTAMP')]),)),
+        )
+        assert [r['columns_added'] for r in migrate(db_path, migrations)] == [0, 2]
+
+        broken = migrations + (
+            Migration(3, 'broken', (add_columns('assets', [('serial', 'TEXT')]),
+                                    execute("CREATE INDEX idx_missing ON assets (no_such_column)"))),
+        )
+        try:
+            migrate(db_path, broken)
+            assert False, 'broken migration applied'
+        except MigrationError as e:
+            assert 'broken' in str(e)
+        conn = sqlite3.connect(db_path)
+        assert current_version(conn) == 2 and 'serial' not in _columns(conn)
+        assert [row[0] for row in history(conn)] == [1, 2]
+
+        # Stop at a target version, then continue
+        fixed = migrations + (Migration(3, 'serial', (add_columns('assets', [('serial', 'TEXT')]),)),
+                              Migration(4, 'asset_tag', (add_columns('assets', [('asset_tag', 'TEXT')]),)))
+        assert [r['version'] for r in migrate(conn, fixed, target_version=3)] == [3]
+        assert [r['version'] for r in migrate(conn, fixed)] == [4]
+        assert {'serial', 'asset_tag'} <= _columns(conn)
+        conn.close()
+
+    assert alterable('TIMESTAMP DEFAULT CURRENT_TIMESTAMP') == 'TIMESTAMP'
+    assert alterable('INTEGER PRIMARY KEY AUTOINCREMENT') == 'INTEGER'
+    assert alterable("TEXT NOT NULL DEFAULT 'x'") == "TEXT DEFAULT 'x'"
+
+
+def test_concurrent_start_and_bootstrap():
+    print('🧪 Testing concurrent first starts and db.models bootstrap...')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'assets.db')
+        results, errors = [], []
+
+        def start():
+            try:
+                results.append(ensure_schema(db_path))
+            except Exception as e:  # pragma: no cover - reported below
+                errors.append(e)
+
+        threads = [threading.Thread(target=start) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors, errors
+        assert sorted(results) == [False, False, False, True]
+        assert len(history(db_path)) == len(MIGRATIONS)
+
+        from db.models import bootstrap_schema
+        bootstrap_path = os.path.join(tmp, 'bootstrap.db')
+        original = db_connection.DB_PATH
+        db_connection.DB_PATH = bootstrap_path
+        try:
+            bootstrap_schema()
+            bootstrap_schema()
+        finally:
+            db_connection.DB_PATH = original
+        conn = sqlite3.connect(bootstrap_path)
+        assert current_version(conn) == LATEST_VERSION and len(history(conn)) == len(MIGRATIONS)
+        conn.close()
+    print('✅ Schema migrations test completed successfully!')
+
+
+if __name__ == '__main__':
+    test_fresh_database()
+    test_legacy_backups()
+    test_failed_migration_rolls_back()
+    test_concurrent_start_and_bootstrap()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Test the process-sharded collection executor with stubbed collectors:
+complete collection through the single parent writer, worker-crash recovery
+(one-off and poison IPs) and cancellation
+"""
+
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from sharded_collection_executor import AssetBatchWriter, ShardedCollectionExecutor
+
+
+def stub_collect(ip, options):
+    last_octet = int(ip.rsplit('.', 1)[1])
+    if last_octet % 10 == 0:
+        return None  # unreachable
+    return {'ip_address': ip, 'hostname': f'host-{last_octet}', 'worker_pid': os.getpid()}
+
+
+def crashing_collect(ip, options):
+    if ip == options['poison']:
+        os._exit(3)  # hard crash, no cleanup
+    marker = options['crash_once_marker']
+    if ip == options['crash_once'] and not os.path.exists(marker):
+        open(marker, 'w').close()
+        os._exit(4)
+    time.sleep(0.002)
+    return {'ip_address': ip, 'hostname': f'host-{ip}'}
+
+
+def slow_collect(ip, options):
+    time.sleep(0.1)
+    return {'ip_address': ip, 'hostname': f'host-{ip}'}
+
+
+class RecordingSink:
+    def __init__(self):
+        self.devices = []
+        self.thread_ids = set()
+
+    def __call__(self, devices):
+        self.thread_ids.add(threading.get_ident())
+        self.devices.extend(devices)
+        return len(devices)
+
+
+def test_sharded_collection_streams_to_single_writer():
+    print('🧪 Testing sharded collection across worker processes...')
+    sink = RecordingSink()
+    progress = []
+    executor = ShardedCollectionExecutor('test_sharded_collection_executor:stub_collect', workers=3,
+                                         threads_per_worker=4, result_sink=sink, batch_size=25,
+                                         progress_callback=lambda pct, done, total: progress.append(done))
+    result = executor.run(['10.30.0.0/24'])
+    assert result.total == 254
+    assert result.collected == 254 - 25 and result.unreachable == 25
+    assert result.written == len(sink.devices) == result.collected
+    assert len({d['ip_address'] for d in sink.devices}) == result.collected  # no duplicates
+    assert len({d['worker_pid'] for d in sink.devices}) == 3 and os.getpid() not in {d['worker_pid'] for d in sink.devices}
+    assert sink.thread_ids == {threading.get_ident()}  # writer runs in the parent only
+    assert progress[-1] == 254 and result.crashed_workers == 0
+
+
+def test_worker_crash_recovery():
+    print('🧪 Testing worker-crash recovery...')
+    with tempfile.TemporaryDirectory() as tmp:
+        sink = RecordingSink()
+        options = {'poison': '10.31.0.7', 'crash_once': '10.31.0.50',
+                   'crash_once_marker': os.path.join(tmp, 'crashed')}
+        logs = []
+        executor = ShardedCollectionExecutor('test_sharded_collection_executor:crashing_collect', options,
+                                             workers=2, threads_per_worker=1, result_sink=sink,
+                                             log_callback=logs.append, max_ip_attempts=2)
+        result = executor.run(['10.31.0.1-100'])
+        collected = {d['ip_address'] for d in sink.devices}
+        assert result.crashed_workers == 3  # poison twice, crash-once once
+        assert list(result.failed) == ['10.31.0.7']
+        assert '10.31.0.50' in collected  # retried on a replacement worker
+        assert len(collected) == len(sink.devices) == 99
+        assert any('re-sharding' in line for line in logs)
+
+
+def test_cancellation():
+    print('🧪 Testing cancellation...')
+    sink = RecordingSink()
+    executor = ShardedCollectionExecutor('test_sharded_collection_executor:slow_collect', workers=2,
+                                         threads_per_worker=2, result_sink=sink)
+    threading.Timer(1.5, executor.cancel).start()
+    started = time.perf_counter()
+    result = executor.run(['10.32.0.0/24'])
+    elapsed = time.perf_counter() - started
+    assert result.cancelled
+    assert 0 < result.collected < 254 and result.written == result.collected
+    assert elapsed < 8
+
+
+def test_asset_batch_writer_upserts():
+    print('🧪 Testing parent-side asset batch writer...')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'assets.db')
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("CREATE TABLE assets (id INTEGER PRIMARY KEY, ip_address TEXT, hostname TEXT)")
+        writer = AssetBatchWriter(db_path)
+        assert writer.write([{'ip_address': '10.0.0.1', 'hostname': 'a', 'unknown_field': 1}]) == 1
+        assert writer.write([{'ip_address': '10.0.0.1', 'hostname': 'b'}, {'ip_address': '10.0.0.2'}]) == 2
+        with sqlite3.connect(db_path) as conn:
+            rows = conn.execute("SELECT ip_address, hostname FROM assets ORDER BY ip_address").fetchall()
+        assert rows == [('10.0.0.1', 'b'), ('10.0.0.2', None)]
+        print('✅ Sharded collection executor test completed successfully!')
+
+
+if __name__ == '__main__':
+    test_sharded_collection_streams_to_single_writer()
+    test_worker_crash_recovery()
+    test_cancellation()
+    test_asset_batch_writer_upserts()
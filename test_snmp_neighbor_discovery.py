@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Test SNMP neighbor discovery against a UDP SNMP simulator: BER codec, GETBULK
+and GETNEXT walks, a 10k-entry router ARP table merged with switch FDB tables
+into a live-host set with MAC and edge port, and the plan that only leaves
+uncovered subnets for active probing
+"""
+
+import bisect
+import ipaddress
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from snmp_neighbor_discovery import (DOT1D_BASE_PORT_IF_INDEX, DOT1D_TP_FDB_PORT, DOT1Q_TP_FDB_PORT,
+                                     END_OF_MIB_VIEW, GAUGE32, GET, GET_BULK, GET_NEXT, IF_NAME,
+                                     IP_AD_ENT_NET_MASK, IP_ADDRESS, IP_NET_TO_MEDIA_PHYS,
+                                     IP_NET_TO_PHYSICAL_PHYS, NO_SUCH_INSTANCE, RESPONSE, SYS_NAME,
+                                     GatewayConfig, NeighborDiscovery, SnmpBulkClient, SnmpError, SnmpTimeout,
+                                     decode_message, encode_message, harvest_device, load_gateways, parse_oid)
+
+
+class SnmpSimulator:
+    """
+    Minimal SNMP agent over a sorted OID table: GET, GETNEXT (v1 noSuchName at
+    the end), GETBULK truncated to max_response bytes like a real agent.
+    Requests with the wrong community are dropped, as agents do.
+    """
+
+    def __init__(self, table, community='public', max_response=8192, too_big_above=None, drop_first=0,
+                 stuck=False):
+        self.table = table
+        self.oids = sorted(table)
+        self.community = community
+        self.max_response = max_response
+        self.too_big_above = too_big_above
+        self.drop_first = drop_first
+        self.stuck = stuck
+        self.requests = Counter()
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.settimeout(0.1)
+        self.port = self.sock.getsockname()[1]
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        self.sock.close()
+
+    def _after(self, oid):
+        index = bisect.bisect_right(self.oids, oid)
+        return self.oids[index] if index < len(self.oids) else None
+
+    def _serve(self):
+        while not self._stop.is_set():
+            try:
+                data, sender = self.sock.recvfrom(65535)
+            except socket.timeout:
+                continue
+            request = decode_message(data)
+            self.requests[request['pdu_type']] += 1
+            if request['community'] != self.community:
+                continue
+            if self.drop_first > 0:
+                self.drop_first -= 1
+                continue
+            self.sock.sendto(self.respond(request), sender)
+
+    def respond(self, request):
+        varbinds, status, index = [], 0, 0
+        pdu, version = request['pdu_type'], request['version']
+        if pdu == GET:
+            varbinds = [(oid, self.table.get(oid, NO_SUCH_INSTANCE)) for oid, _ in request['varbinds']]
+        elif pdu == GET_NEXT:
+            for oid, _ in request['varbinds']:
+                following = oid if self.stuck else self._after(oid)
+                if following is None:
+                    if version == 0:
+                        status, index, varbinds = 2, 1, request['varbinds']
+                        break
+                    varbinds.append((oid, END_OF_MIB_VIEW))
+                else:
+                    varbinds.append((following, self.table.get(following, b'stuck')))
+        elif pdu == GET_BULK:
+            repetitions = request['error_index']
+            if self.too_big_above and repetitions > self.too_big_above:
+                status, varbinds = 1, request['varbinds']
+            else:
+                oid, size = request['varbinds'][0][0], 0
+                for _ in range(repetitions):
+                    following = oid if self.stuck else self._after(oid)
+                    if following is None:
+                        varbinds.append((oid, END_OF_MIB_VIEW))
+                        break
+                    value = self.table.get(following, b'stuck')
+                    size += len(encode_message(1, '', RESPONSE, 0, [(following, value)])) - 12
+                    if varbinds and size > self.max_response:
+                        break
+                    varbinds.append((following, value))
+                    oid = following
+        return encode_message(version, self.community, RESPONSE, request['request_id'], varbinds, status, index)
+
+
+def _mac(i):
+    return bytes([0x00, 0x1b, 0x21, (i >> 16) & 0xFF, (i >> 8) & 0xFF, i & 0xFF])
+
+
+def _host_ip(i):
+    return str(ipaddress.ip_address('10.20.0.2') + i)
+
+
+HOSTS = 10000
+ACCESS_HOSTS = 5000
+
+
+def router_table():
+    """Core router / L3 switch: 10k ARP entries on Vlan20, both halves of the FDB behind port-channels"""
+    table = {SYS_NAME: b'core-rtr1'}
+    for i in range(HOSTS):
+        address = tuple(int(octet) for octet in _host_ip(i).split('.'))
+        table[IP_NET_TO_MEDIA_PHYS + (20,) + address] = _mac(i)
+        table[DOT1D_TP_FDB_PORT + tuple(_mac(i))] = 1 if i < ACCESS_HOSTS else 2
+    table[IP_NET_TO_MEDIA_PHYS + (20, 10, 20, 63, 250)] = b'\0' * 6  # incomplete entry
+    table[IP_AD_ENT_NET_MASK + (10, 20, 0, 1)] = (IP_ADDRESS, '255.255.192.0')
+    table[IP_AD_ENT_NET_MASK + (127, 0, 0, 1)] = (IP_ADDRESS, '255.0.0.0')
+    table[IP_AD_ENT_NET_MASK + (192, 168, 250, 1)] = (IP_ADDRESS, '255.255.255.252')
+    table[DOT1D_BASE_PORT_IF_INDEX + (1,)] = 101
+    table[DOT1D_BASE_PORT_IF_INDEX + (2,)] = 102
+    table[IF_NAME + (20,)] = b'Vlan20'
+    table[IF_NAME + (101,)] = b'Po1'
+    table[IF_NAME + (102,)] = b'Po2'
+    table[parse_oid('1.3.6.1.2.1.2.2.1.10.101')] = (GAUGE32, 1)  # unrelated column after the walked ones
+    return table
+
+
+def access_switch_table():
+    """L2 access switch with a Q-BRIDGE FDB only: the first 5000 hosts on 48 edge ports, VLAN 20"""
+    table = {SYS_NAME: b'access-sw1'}
+    for i in range(ACCESS_HOSTS):
+        table[DOT1Q_TP_FDB_PORT + (20,) + tuple(_mac(i))] = i % 48 + 1
+    for port in range(1, 49):
+        table[DOT1D_BASE_PORT_IF_INDEX + (port,)] = 10100 + port
+        table[IF_NAME + (10100 + port,)] = f'Gi1/0/{port}'.encode()
+    return table
+
+
+def test_ber_codec():
+    print('🧪 Testing the SNMP BER codec...')
+    varbinds = [(parse_oid('1.3.6.1.2.1.1.5.0'), b'core-rtr1'), (parse_oid('1.3.6.1.2.1.4.20.1.3.10.0.0.1'),
+                (IP_ADDRESS, '255.255.255.0')), (parse_oid('1.3.6.1.4.1.9.9.2000000.1'), -129),
+                (parse_oid('1.3.6.1.2.1.2.2.1.10.7'), (GAUGE32, 4294967295)), (parse_oid('1.3.6.1.2.1.1.2.0'),
+                parse_oid('1.3.6.1.4.1.9.1.1208')), (parse_oid('1.3.6.1.2.1.1.3.0'), None),
+                (parse_oid('1.3.6.1.2.1.1.9.0'), END_OF_MIB_VIEW)]
+    message = encode_message(1, 'public', GET_BULK, 424242, varbinds, 0, 25)
+    decoded = decode_message(message)
+    assert decoded['community'] == 'public' and decoded['pdu_type'] == GET_BULK
+    assert decoded['request_id'] == 424242 and decoded['error_index'] == 25
+    values = [value for _, value in decoded['varbinds']]
+    assert values == [b'core-rtr1', '255.255.255.0', -129, 4294967295, parse_oid('1.3.6.1.4.1.9.1.1208'), None,
+                      END_OF_MIB_VIEW]
+    assert [oid for oid, _ in decoded['varbinds']] == [oid for oid, _ in varbinds]
+    long_message = encode_message(1, 'public', RESPONSE, 1, [(SYS_NAME, b'x' * 70000)])
+    assert decode_message(long_message)['varbinds'][0][1] == b'x' * 70000
+    for broken in (message[:40], b'\x30\x85' + message[2:], b'\x04\x00'):
+        try:
+            decode_message(broken)
+            assert False, 'malformed message accepted'
+        except SnmpError:
+            pass
+
+
+def test_walks_retries_and_errors():
+    print('🧪 Testing GETBULK / GETNEXT walks, tooBig, retries and loop protection...')
+    table = {IF_NAME + (n,): f'Gi0/{n}'.encode() for n in range(1, 121)}
+    table[SYS_NAME] = b'edge'
+    agent = SnmpSimulator(table, too_big_above=20, drop_first=1)
+    try:
+        client = SnmpBulkClient('127.0.0.1', port=agent.port, timeout=0.3, retries=1, max_repetitions=50)
+        names = list(client.walk(IF_NAME))
+        assert [oid[-1] for oid, _ in names] == list(range(1, 121)) and names[0][1] == b'Gi0/1'
+        assert client.max_repetitions == 50 and agent.requests[GET_BULK] >= 3 + 120 // 12
+        assert client.get(SYS_NAME) == b'edge' and client.get(SYS_NAME + (1,)) is NO_SUCH_INSTANCE
+        client.close()
+
+        v1 = SnmpBulkClient('127.0.0.1', port=agent.port, version='1', timeout=0.3)
+        assert len(list(v1.walk('1.3.6.1.2.1.31'))) == 120 and agent.requests[GET_NEXT] == 121
+        v1.close()
+
+        wrong = SnmpBulkClient('127.0.0.1', community='private', port=agent.port, timeout=0.1, retries=1)
+        started = time.monotonic()
+        try:
+            list(wrong.walk(IF_NAME))
+            assert False, 'walk with the wrong community succeeded'
+        except SnmpTimeout:
+            assert time.monotonic() - started < 1.0
+        wrong.close()
+    finally:
+        agent.close()
+
+    stuck = SnmpSimulator(table, stuck=True)
+    try:
+        with SnmpBulkClient('127.0.0.1', port=stuck.port, timeout=0.3) as client:
+            list(client.walk(IF_NAME))
+        assert False, 'non-increasing OIDs accepted'
+    except SnmpError as e:
+        assert 'non-increasing' in str(e)
+    finally:
+        stuck.close()
+
+
+def test_harvest_10k_arp_table():
+    print('🧪 Testing a 10k-entry ARP harvest merged with switch FDB tables...')
+    router = SnmpSimulator(router_table())
+    switch = SnmpSimulator(access_switch_table())
+    silent = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)  # gateway that never answers
+    silent.bind(('127.0.0.1', 0))
+    try:
+        discovery = NeighborDiscovery([
+            {'host': '127.0.0.1', 'port': router.port},
+            {'host': '127.0.0.1', 'port': switch.port, 'arp': False},
+            {'host': '127.0.0.1', 'port': silent.getsockname()[1], 'timeout': 0.2, 'retries': 0,
+             'subnets': ['10.30.0.0/24']},
+        ])
+        started = time.monotonic()
+        harvest = discovery.harvest()
+        elapsed = time.monotonic() - started
+    finally:
+        router.close()
+        switch.close()
+        silent.close()
+
+    core, access, dead = harvest.devices
+    assert core.error is None and core.name == 'core-rtr1' and len(core.arp) == HOSTS
+    assert core.connected == [ipaddress.ip_network('10.20.0.0/18'), ipaddress.ip_network('192.168.250.0/30')]
+    assert access.arp == {} and len(access.fdb) == ACCESS_HOSTS and access.coverage == []
+    assert dead.error and dead.coverage == []  # its subnet stays with active probing
+    # GETBULK: a few hundred round trips for the whole ARP + FDB table, not one per address
+    assert core.requests < 500 and access.requests < 200
+    print(f'   core: {len(core.arp)} ARP + {len(core.fdb)} FDB in {core.requests} requests, {core.seconds:.2f}s; '
+          f'total {elapsed:.2f}s')
+
+    assert len(harvest.hosts) == HOSTS
+    edge = harvest.hosts[_host_ip(7)]
+    assert edge.mac_address == '00:1b:21:00:00:07' and edge.gateway == '127.0.0.1' and edge.if_index == 20
+    assert (edge.switch, edge.switch_port, edge.vlan) == ('access-sw1', 'Gi1/0/8', 20)  # edge port, not Po1
+    far = harvest.hosts[_host_ip(7000)]
+    assert (far.switch, far.switch_port, far.vlan) == ('core-rtr1', 'Po2', None)
+    assert '10.20.63.250' not in harvest.hosts  # incomplete ARP entry
+
+    targets = [str(ip) for cidr in ('10.20.0.0/18', '10.30.0.0/24', '10.40.0.0/28')
+               for ip in ipaddress.ip_network(cidr).hosts()]
+    live, probe = harvest.plan(targets)
+    assert len(live) == HOSTS and {h.ip for h in live} == set(harvest.hosts)
+    assert len(probe) == 254 + 14 and probe[0] == '10.30.0.1' and probe[-1] == '10.40.0.14'
+    lookup = harvest.mac_lookup(lambda ip: 'aa:bb:cc:dd:ee:ff' if ip == '10.40.0.1' else None)
+    assert lookup(_host_ip(0)) == '00:1b:21:00:00:00' and lookup('10.40.0.1') == 'aa:bb:cc:dd:ee:ff'
+    summary = harvest.summary()
+    assert summary['hosts'] == HOSTS and summary['with_port'] == HOSTS and summary['devices'][2]['error']
+
+
+def test_gateway_config():
+    print('🧪 Testing gateway configuration and ipNetToPhysicalTable fallback...')
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'snmp_gateways.json')
+        assert load_gateways(path) == []
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'gateways': [{'host': '10.0.21.1', 'subnets': ['10.0.21.0/24']}]}, f)
+        entries = load_gateways(path)
+        config = GatewayConfig.from_dict(entries[0], default_community='campus-ro')
+        assert config.community == 'campus-ro' and config.subnets == ['10.0.21.0/24'] and config.version == '2c'
+
+    # Agents that only implement the RFC 4293 table (ipv4 rows indexed ifIndex.1.4.a.b.c.d)
+    table = {SYS_NAME: b'fw1', IP_AD_ENT_NET_MASK + (10, 0, 21, 1): (IP_ADDRESS, '255.255.255.0')}
+    for n in range(2, 40):
+        table[IP_NET_TO_PHYSICAL_PHYS + (3, 1, 4, 10, 0, 21, n)] = _mac(n)
+    table[IP_NET_TO_PHYSICAL_PHYS + (3, 2, 16) + (0xfe, 0x80) + (0,) * 13 + (1,)] = _mac(1)  # ipv6 neighbour
+    agent = SnmpSimulator(table)
+    try:
+        harvest = harvest_device(GatewayConfig('127.0.0.1', port=agent.port, subnets=['10.0.21.0/25'], fdb=False))
+    finally:
+        agent.close()
+    assert harvest.error is None and sorted(harvest.arp) == sorted(f'10.0.21.{n}' for n in range(2, 40))
+    assert harvest.arp['10.0.21.5'] == ('00:1b:21:00:00:05', 3)
+    assert harvest.coverage == [ipaddress.ip_network('10.0.21.0/25')]  # explicit subnets win
+    assert harvest.connected == [ipaddress.ip_network('10.0.21.0/24')]
+    print('✅ SNMP neighbor discovery test completed successfully!')
+
+
+if __name__ == '__main__':
+    test_ber_codec()
+    test_walks_retries_and_errors()
+    test_harvest_10k_arp_table()
+    test_gateway_config()
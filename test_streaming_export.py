@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Test the streaming exporter: column selection and filters, CSV/NDJSON
+chunking, write-only XLSX with sampled widths, the streamed web endpoints,
+and peak memory that stays flat as the inventory grows
+"""
+
+import csv
+import io
+import json
+import os
+import sqlite3
+import tempfile
+import tracemalloc
+
+from openpyxl import load_workbook
+
+from streaming_export import StreamingExporter, sample_column_widths
+
+
+def _make_db(path, rows):
+    conn = sqlite3.connect(path)
+    conn.execute("""CREATE TABLE assets (id INTEGER PRIMARY KEY, hostname TEXT, ip_address TEXT, os_name TEXT,
+                    department TEXT, working_user TEXT, serial_number TEXT, updated_at TEXT)""")
+    conn.executemany("INSERT INTO assets (hostname, ip_address, os_name, department, working_user, serial_number, "
+                     "updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                     ((f'host-{n:06d}', f'10.{n // 65536 % 256}.{n // 256 % 256}.{n % 256}',
+                       'Windows Server 2019' if n % 3 == 0 else 'Ubuntu 22.04', 'IT' if n % 2 else 'Finance',
+                       f'user{n}', f'SN{n:08d}' * (3 if n == 7 else 1), f'2026-01-{n % 28 + 1:02d} 10:00:00')
+                      for n in range(rows)))
+    conn.commit()
+    conn.close()
+
+
+def test_selection_filters_and_chunks():
+    print('🧪 Testing column selection, filters and CSV/NDJSON chunking...')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'assets.db')
+        _make_db(db_path, 250)
+        exporter = StreamingExporter(db_path, chunk_size=40)
+
+        columns, rows = exporter.select(['hostname', 'department', 'bogus'], equals={'department': 'IT'})
+        assert columns == ['hostname', 'department']
+        chunks = list(exporter.csv_chunks(columns, rows))
+        assert len(chunks) == 4  # 125 rows in chunks of 40
+        parsed = list(csv.reader(io.StringIO(''.join(chunks))))
+        assert parsed[0] == ['Hostname', 'Department'] and len(parsed) == 126
+        assert all(row[1] == 'IT' for row in parsed[1:])
+
+        columns, rows = exporter.select(['hostname', 'os_name'], search='server', search_columns=['os_name'],
+                                        updated_since='2026-01-20')
+        records = [json.loads(line) for line in ''.join(exporter.ndjson_chunks(columns, rows)).splitlines()]
+        assert records and all('Server' in r['os_name'] for r in records)
+        assert set(records[0]) == {'hostname', 'os_name'}
+
+        try:
+            exporter.select(['hostname'], equals={'hostname; DROP TABLE assets': 'x'})
+            assert False, "unknown filter column accepted"
+        except ValueError:
+            pass
+
+        out = os.path.join(tmp, 'devices.csv')
+        assert exporter.write_csv(out, ['ip_address', 'hostname'], headers=['IP Address', 'Hostname']) == 250
+
+
+def test_write_only_xlsx_and_sampled_widths():
+    print('🧪 Testing write-only XLSX export with sampled column widths...')
+    assert sample_column_widths(['IP'], [('10.0.0.1',), ('x' * 200,)]) == [50]
+    assert sample_column_widths(['Hostname'], [], minimum=8) == [10]
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'assets.db')
+        _make_db(db_path, 300)
+        exporter = StreamingExporter(db_path, width_sample=20)
+        path, count = exporter.xlsx_tempfile(['hostname', 'ip_address', 'serial_number'], order_by='id')
+        try:
+            assert count == 300
+            sheet = load_workbook(path, read_only=False)['Network Assets']
+            assert [c.value for c in sheet[1]] == ['Hostname', 'IP Address', 'Serial Number']
+            assert sheet['A1'].font.bold and sheet.max_row == 301
+            assert sheet['A2'].value == 'host-000000'
+            # row 7 (the long serial) is inside the 20-row sample
+            assert sheet.column_dimensions['C'].width == len('SN00000007' * 3) + 2
+        finally:
+            os.remove(path)
+
+
+def test_web_endpoints_stream():
+    print('🧪 Testing streamed CSV / NDJSON / XLSX web export endpoints...')
+    from tools import web_database_monitor as monitor
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'assets.db')
+        _make_db(db_path, 120)
+        conn = sqlite3.connect(db_path)
+        for column in ('device_model', 'manufacturer', 'cpu_info', 'ram_gb', 'storage_info', 'domain',
+                       'mac_address', 'created_at'):
+            conn.execute(f"ALTER TABLE assets ADD COLUMN {column} TEXT")
+        conn.commit()
+        conn.close()
+        original = monitor.DB_PATH
+        monitor.DB_PATH = db_path
+        try:
+            client = monitor.app.test_client()
+            response = client.get('/api/export/csv?columns=hostname,device_type&type=Linux&filter.department=IT')
+            assert response.status_code == 200 and response.is_streamed
+            lines = response.get_data(as_text=True).splitlines()
+            assert lines[0] == 'Hostname,Device Type' and len(lines) == 41
+            assert all(line.endswith(',Linux') for line in lines[1:])
+
+            response = client.get('/api/export/ndjson?columns=ip_address&search=host-00011')
+            ips = {json.loads(line)['ip_address'] for line in response.get_data(as_text=True).splitlines()}
+            assert ips == {f'10.0.0.{n}' for n in range(110, 120)}
+
+            response = client.get('/api/export/excel?type=Windows Server')
+            data = response.get_data()
+            assert response.status_code == 200 and int(response.headers['Content-Length']) == len(data)
+            sheet = load_workbook(io.BytesIO(data))['Network Assets']
+            assert sheet.max_row == 41 and sheet['A1'].value == 'Hostname'
+            assert not [f for f in os.listdir(tempfile.gettempdir()) if f.startswith('asset_export_')]
+
+            assert client.get('/api/export/csv?filter.nope=1').status_code == 400
+        finally:
+            monitor.DB_PATH = original
+
+
+def _peak_memory(export):
+    tracemalloc.start()
+    try:
+        export()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_peak_memory_is_flat():
+    print('🧪 Testing peak memory for small vs large exports...')
+    with tempfile.TemporaryDirectory() as tmp:
+        small, large = os.path.join(tmp, 'small.db'), os.path.join(tmp, 'large.db')
+        _make_db(small, 1000)
+        _make_db(large, 30000)
+        peaks = {}
+        for name, db_path in (('small', small), ('large', large)):
+            exporter = StreamingExporter(db_path, chunk_size=500, width_sample=200)
+            peaks[name, 'csv'] = _peak_memory(lambda: exporter.write_csv(os.path.join(tmp, f'{name}.csv')))
+
+            def xlsx():
+                columns, rows = exporter.select()
+                exporter.write_xlsx(os.path.join(tmp, f'{name}.xlsx'), columns, rows)
+            peaks[name, 'xlsx'] = _peak_memory(xlsx)
+
+        for fmt in ('csv', 'xlsx'):
+            small_peak, large_peak = peaks['small', fmt], peaks['large', fmt]
+            print(f'   {fmt}: 1k rows {small_peak / 1024:.0f} KiB, 30k rows {large_peak / 1024:.0f} KiB')
+            assert large_peak < small_peak * 1.5 + 256 * 1024
+    print('✅ Streaming export test completed successfully!')
+
+
+if __name__ == '__main__':
+    test_selection_filters_and_chunks()
+    test_write_only_xlsx_and_sampled_widths()
+    test_web_endpoints_stream()
+    test_peak_memory_is_flat()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Test production WSGI serving: inline templates compiled once, HTML ETags and
+static Cache-Control, the wsgi.py entry point, server selection, metrics and
+cache stats summed over pre-forked gunicorn workers, and the asyncio
+load-test client
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+from flask import Flask
+from werkzeug.serving import make_server
+
+import wsgi_serving
+from web_load_test import load_test, percentile
+from wsgi_serving import (configure_production, gunicorn_options, inline_templates, pick_server, render_inline,
+                          run_app)
+
+PAGE = "<html><body>{{ title }} {% for n in items %}<i>{{ n }}</i>{% endfor %}</body></html>"
+
+
+def _app(static_folder=None):
+    app = Flask(__name__, static_folder=static_folder, static_url_path='/static')
+
+    @app.route('/')
+    def index():
+        return render_inline(PAGE, title='Assets', items=[1, 2])
+
+    @app.route('/api/data')
+    def data():
+        return {'ok': True}
+
+    return app
+
+
+def test_inline_templates_compile_once():
+    print('🧪 Testing inline template compilation cache...')
+    app = _app()
+    app.context_processor(lambda: {'title': 'ignored', 'user': 'ops'})
+    client = app.test_client()
+    for _ in range(5):
+        response = client.get('/')
+        assert response.status_code == 200
+        assert response.get_data(as_text=True) == '<html><body>Assets <i>1</i><i>2</i></body></html>'
+    assert inline_templates(app).compiled == 1
+    # Context processors still apply, as with render_template_string
+    with app.test_request_context('/'):
+        assert render_inline("{{ user }}") == 'ops'
+    assert inline_templates(app).compiled == 2
+
+
+def test_production_cache_headers():
+    print('🧪 Testing HTML ETags and static Cache-Control...')
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, 'site.css'), 'w') as f:
+            f.write('body { color: black; }')
+        app = configure_production(_app(static_folder=tmp), static_max_age=600, sources=[PAGE])
+        assert configure_production(app) is app and len(app.after_request_funcs[None]) == 1
+        assert inline_templates(app).compiled == 1 and app.jinja_env.auto_reload is False
+        client = app.test_client()
+
+        page = client.get('/')
+        assert page.status_code == 200 and page.headers['ETag'] and 'no-cache' in page.headers['Cache-Control']
+        revalidated = client.get('/', headers={'If-None-Match': page.headers['ETag']})
+        assert revalidated.status_code == 304 and revalidated.data == b''
+        assert 'ETag' not in client.get('/api/data').headers
+
+        static = client.get('/static/site.css')
+        assert static.status_code == 200
+        assert static.cache_control.public and static.cache_control.max_age == 600
+        static.close()
+
+
+def test_wsgi_entry_point():
+    print('🧪 Testing the wsgi.py entry point...')
+    import wsgi
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        os.environ['ASSETS_DB_PATH'] = os.path.join(tmp, 'assets.db')
+        try:
+            app = wsgi.create_app('department')
+            assert 'wsgi_serving' in app.extensions
+            assert inline_templates(app).compiled == 5
+            assert app.test_client().get('/').status_code == 200
+            # Rendering the precompiled pages does not compile again
+            assert inline_templates(app).compiled == 5
+        finally:
+            os.environ.pop('ASSETS_DB_PATH', None)
+            os.chdir(cwd)
+    try:
+        wsgi.create_app('nope')
+        assert False, 'unknown app accepted'
+    except ValueError:
+        pass
+
+
+def test_server_selection():
+    print('🧪 Testing WSGI server selection and options...')
+    if wsgi_serving.GUNICORN_AVAILABLE:
+        assert pick_server() == 'gunicorn'
+    if wsgi_serving.WAITRESS_AVAILABLE:
+        assert pick_server('waitress') == 'waitress'
+    try:
+        pick_server('uwsgi')
+        assert False, 'unknown server accepted'
+    except (ValueError, RuntimeError):
+        pass
+
+    options = gunicorn_options('127.0.0.1', 8000, workers=3, threads=4)
+    assert options['bind'] == '127.0.0.1:8000' and options['workers'] == 3
+    assert options['worker_class'] == 'gthread' and options['graceful_timeout'] > 0
+    assert gunicorn_options('0.0.0.0', 80, 2, 1)['worker_class'] == 'sync'
+    assert options['post_fork'] is wsgi_serving._post_fork
+
+
+MULTI_WORKER_APP = """
+import os
+from flask import Flask, jsonify
+from metrics_registry import install_flask_metrics
+from response_cache import install_response_cache
+
+app = Flask(__name__)
+install_flask_metrics(app, service='mp_web')
+cache = install_response_cache(app, os.environ['MP_DB'], service='mp_web')
+
+
+@app.route('/api/data')
+@cache.cached()
+def data():
+    return jsonify({'ok': True})
+"""
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _get(url):
+    with urllib.request.urlopen(url, timeout=5) as response:
+        return response.read().decode('utf-8')
+
+
+def test_gunicorn_workers_aggregate_metrics():
+    print('🧪 Testing /metrics and cache stats summed over gunicorn workers...')
+    if not wsgi_serving.GUNICORN_AVAILABLE:
+        print('   gunicorn not installed, skipped')
+        return
+    repo = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, 'mp_app.py'), 'w') as handle:
+            handle.write(MULTI_WORKER_APP)
+        db_path = os.path.join(tmp, 'assets.db')
+        sqlite3.connect(db_path).close()
+        port = _free_port()
+        env = dict(os.environ, MP_DB=db_path, METRICS_MULTIPROC_INTERVAL='0.2',
+                   METRICS_MULTIPROC_DIR=os.path.join(tmp, 'metrics'),
+                   PYTHONPATH=os.pathsep.join([tmp, repo, os.environ.get('PYTHONPATH', '')]))
+        server = subprocess.Popen(
+            [sys.executable, '-c', f"import wsgi_serving; wsgi_serving.serve('mp_app:app', '127.0.0.1', {port}, "
+                                   f"workers=3, threads=1, server='gunicorn')"],
+            cwd=tmp, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        base = f'http://127.0.0.1:{port}'
+        try:
+            deadline = time.time() + 30
+            while True:
+                try:
+                    _get(base + '/api/data')
+                    break
+                except OSError:
+                    assert server.poll() is None and time.time() < deadline, 'gunicorn did not start'
+                    time.sleep(0.1)
+            for _ in range(59):
+                _get(base + '/api/data')
+            time.sleep(1.0)  # every worker has flushed its snapshot since
+
+            text = _get(base + '/metrics')
+            count = 'http_request_duration_seconds_count{service="mp_web",endpoint="/api/data",method="GET",status="200"}'
+            assert sum(float(line.rsplit(' ', 1)[1]) for line in text.splitlines() if line.startswith(count)) == 60
+            stats = json.loads(_get(base + '/api/cache/stats'))
+            # Whichever worker answers, the stats cover all three
+            assert stats['workers'] == 3 and stats['hit'] + stats['miss'] == 60 and 1 <= stats['miss'] <= 3
+        finally:
+            server.terminate()
+            server.wait(30)
+
+
+def test_run_app_development_default():
+    print('🧪 Testing run_app keeps the development server by default...')
+
+    class RecordingApp(Flask):
+        def run(self, **kwargs):
+            self.run_kwargs = kwargs
+
+    app = RecordingApp(__name__)
+    os.environ.pop('WEB_SERVICE_MODE', None)
+    run_app(app, '127.0.0.1', 5999)
+    assert app.run_kwargs == {'host': '127.0.0.1', 'port': 5999, 'debug': False, 'threaded': True}
+    assert 'wsgi_serving' not in app.extensions
+
+
+def test_load_test_client():
+    print('🧪 Testing the asyncio load-test client...')
+    assert percentile([], 0.99) == 0.0 and percentile([1.0, 2.0, 3.0], 0.5) == 2.0
+    server = make_server('127.0.0.1', 0, _app(), threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        result = load_test(f'http://127.0.0.1:{server.server_port}/', ['/', '/api/data'], concurrency=4, duration=1.0)
+    finally:
+        server.shutdown()
+    assert result['requests'] > 0 and result['errors'] == 0
+    assert set(result['statuses']) == {'200'} and result['rps'] > 0
+    assert 0 < result['p50_ms'] <= result['p99_ms'] <= result['max_ms']
+    print('✅ WSGI serving test completed successfully!')
+
+
+if __name__ == '__main__':
+    test_inline_templates_compile_once()
+    test_production_cache_headers()
+    test_wsgi_entry_point()
+    test_server_selection()
+    test_gunicorn_workers_aggregate_metrics()
+    test_run_app_development_default()
+    test_load_test_client()
@@ -10,12 +10,18 @@ Creates beautifully formatted asset data presentation exactly like your requirem
 - Excel export with professional styling
 """
 
+import os
+import sys
+
 import pandas as pd
 from openpyxl.styles import PatternFill, Font, Alignment
 from datetime import datetime
 import re
 from typing import List, Dict, Any
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from streaming_export import StreamingExporter
+
 class ProfessionalAssetFormatter:
     """Professional asset data formatter with smart duplicate handling"""
     
@@ -233,70 +239,49 @@ class ProfessionalAssetFormatter:
         print(f"\n📊 EXPORTING PROFESSIONAL EXCEL: {filename}")
         print("=" * 50)
         
-        # Create Excel writer
-        with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='Asset Report', index=False)
-            
-            workbook = writer.book
-            worksheet = writer.sheets['Asset Report']
-            
-            # Define professional styles
-            header_fill = PatternFill(
-                start_color=self.color_scheme['header_bg'],
-                end_color=self.color_scheme['header_bg'],
-                fill_type='solid'
-            )
-            header_font = Font(
-                color=self.color_scheme['header_text'],
-                bold=True,
-                size=12
-            )
-            
-            even_fill = PatternFill(
-                start_color=self.color_scheme['row_even'],
-                end_color=self.color_scheme['row_even'],
-                fill_type='solid'
-            )
-            
-            odd_fill = PatternFill(
-                start_color=self.color_scheme['row_odd'],
-                end_color=self.color_scheme['row_odd'],
-                fill_type='solid'
-            )
-            
-            # Apply header styling
-            for cell in worksheet[1]:
-                cell.fill = header_fill
-                cell.font = header_font
-                cell.alignment = Alignment(horizontal='center', vertical='center')
-            
-            # Apply row styling
-            for row_num, row in enumerate(worksheet.iter_rows(min_row=2), start=2):
-                fill = even_fill if row_num % 2 == 0 else odd_fill
-                for cell in row:
-                    cell.fill = fill
-                    cell.alignment = Alignment(horizontal='left', vertical='center', wrap_text=True)
-                    
-                    # Special formatting for status column
-                    if 'Active' in str(cell.value):
-                        cell.font = Font(color=self.color_scheme['success'], bold=True)
-                    elif 'Offline' in str(cell.value):
-                        cell.font = Font(color=self.color_scheme['error'], bold=True)
-            
-            # Auto-adjust column widths
-            for column in worksheet.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                
-                adjusted_width = min(max_length + 3, 60)
-                worksheet.column_dimensions[column_letter].width = adjusted_width
+        # Define professional styles
+        header_fill = PatternFill(
+            start_color=self.color_scheme['header_bg'],
+            end_color=self.color_scheme['header_bg'],
+            fill_type='solid'
+        )
+        header_font = Font(
+            color=self.color_scheme['header_text'],
+            bold=True,
+            size=12
+        )
+        
+        even_fill = PatternFill(
+            start_color=self.color_scheme['row_even'],
+            end_color=self.color_scheme['row_even'],
+            fill_type='solid'
+        )
+        
+        odd_fill = PatternFill(
+            start_color=self.color_scheme['row_odd'],
+            end_color=self.color_scheme['row_odd'],
+            fill_type='solid'
+        )
+        row_alignment = Alignment(horizontal='left', vertical='center', wrap_text=True)
+        active_font = Font(color=self.color_scheme['success'], bold=True)
+        offline_font = Font(color=self.color_scheme['error'], bold=True)
+        
+        def cell_style(row_num, column_index, value):
+            style = {'fill': even_fill if row_num % 2 == 0 else odd_fill, 'alignment': row_alignment}
+            # Special formatting for status column
+            if 'Active' in str(value):
+                style['font'] = active_font
+            elif 'Offline' in str(value):
+                style['font'] = offline_font
+            return style
+        
+        # Write-only workbook: rows are streamed out, widths come from a sampled prefix
+        header_style = {'fill': header_fill, 'font': header_font,
+                        'alignment': Alignment(horizontal='center', vertical='center')}
+        exporter = StreamingExporter()
+        exporter.write_xlsx(filename, list(df.columns), df.itertuples(index=False, name=None),
+                            headers=[str(c) for c in df.columns], sheet_name='Asset Report',
+                            header_style=header_style, cell_style=cell_style, max_width=60)
         
         print("✅ Professional Excel exported successfully!")
         print(f"📁 File: {filename}")
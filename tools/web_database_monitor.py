@@ -16,18 +16,39 @@ Features:
 Access from any browser: http://localhost:5555
 """
 
-from flask import Flask, render_template, jsonify, request, send_file
+from flask import Flask, Response, render_template, jsonify, request
 import sqlite3
 import os
+import sys
 from datetime import datetime
-import pandas as pd
-from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from metrics_registry import install_flask_metrics
+from streaming_export import XLSX_MIMETYPE, StreamingExporter, stream_file
 
 app = Flask(__name__)
+install_flask_metrics(app, service='database_monitor')
 
 # Database path
 DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'assets.db')
 
+DEVICE_TYPE_SQL = """CASE 
+                    WHEN os_name LIKE '%Windows%' AND os_name LIKE '%Server%' THEN 'Windows Server'
+                    WHEN os_name LIKE '%Windows%' THEN 'Windows Workstation'
+                    WHEN os_name LIKE '%Linux%' OR os_name LIKE '%Ubuntu%' OR os_name LIKE '%CentOS%' THEN 'Linux'
+                    WHEN hostname LIKE '%switch%' OR hostname LIKE '%sw-%' THEN 'Network Device'
+                    ELSE 'Other'
+                END"""
+
+DEVICE_TYPE_FILTERS = {
+    'Windows Server': "os_name LIKE '%Windows%' AND os_name LIKE '%Server%'",
+    'Windows Workstation': "os_name LIKE '%Windows%' AND os_name NOT LIKE '%Server%'",
+    'Linux': "os_name LIKE '%Linux%' OR os_name LIKE '%Ubuntu%' OR os_name LIKE '%CentOS%'",
+    'Network Device': "hostname LIKE '%switch%' OR hostname LIKE '%sw-%'",
+}
+
+EXPORT_SEARCH_COLUMNS = ('hostname', 'ip_address', 'os_name', 'working_user')
+
 def init_database():
     """Initialize database if needed"""
     try:
@@ -121,16 +142,10 @@ def get_all_devices(search='', device_type='', limit=100, offset=0):
                 id, hostname, ip_address, os_name, device_model, manufacturer,
                 serial_number, cpu_info, ram_gb, storage_info, working_user,
                 domain, mac_address, created_at, updated_at,
-                CASE 
-                    WHEN os_name LIKE '%Windows%' AND os_name LIKE '%Server%' THEN 'Windows Server'
-                    WHEN os_name LIKE '%Windows%' THEN 'Windows Workstation'
-                    WHEN os_name LIKE '%Linux%' OR os_name LIKE '%Ubuntu%' OR os_name LIKE '%CentOS%' THEN 'Linux'
-                    WHEN hostname LIKE '%switch%' OR hostname LIKE '%sw-%' THEN 'Network Device'
-                    ELSE 'Other'
-                END as device_type
+                {DEVICE_TYPE_SQL} as device_type
             FROM assets 
             WHERE (hostname IS NOT NULL AND hostname != '')
-        """
+        """.format(DEVICE_TYPE_SQL=DEVICE_TYPE_SQL)
         
         params = []
         
@@ -139,15 +154,8 @@ def get_all_devices(search='', device_type='', limit=100, offset=0):
             search_param = f"%{search}%"
             params.extend([search_param, search_param, search_param, search_param])
         
-        if device_type and device_type != 'All':
-            if device_type == 'Windows Server':
-                query += " AND os_name LIKE '%Windows%' AND os_name LIKE '%Server%'"
-            elif device_type == 'Windows Workstation':
-                query += " AND os_name LIKE '%Windows%' AND os_name NOT LIKE '%Server%'"
-            elif device_type == 'Linux':
-                query += " AND (os_name LIKE '%Linux%' OR os_name LIKE '%Ubuntu%' OR os_name LIKE '%CentOS%')"
-            elif device_type == 'Network Device':
-                query += " AND (hostname LIKE '%switch%' OR hostname LIKE '%sw-%')"
+        if device_type in DEVICE_TYPE_FILTERS:
+            query += f" AND ({DEVICE_TYPE_FILTERS[device_type]})"
         
         query += " ORDER BY updated_at DESC LIMIT ? OFFSET ?"
         params.extend([limit, offset])
@@ -212,72 +220,67 @@ def api_device_details(device_id):
     finally:
         conn.close()
 
+def _export_request():
+    """Columns and filters shared by the export endpoints"""
+    columns = request.args.get('columns', '')
+    search = request.args.get('search', '')
+    device_type = request.args.get('type', '')
+    extra_filters = []
+    if device_type in DEVICE_TYPE_FILTERS:
+        extra_filters.append((DEVICE_TYPE_FILTERS[device_type], []))
+    equals = {key[len('filter.'):]: value for key, value in request.args.items() if key.startswith('filter.')}
+    return ([c for c in columns.split(',') if c] or None,
+            dict(search=search, search_columns=EXPORT_SEARCH_COLUMNS, equals=equals,
+                 updated_since=request.args.get('since') or None, extra_filters=extra_filters))
+
+def get_exporter():
+    return StreamingExporter(DB_PATH, computed_columns={'device_type': DEVICE_TYPE_SQL},
+                             base_filters=[("hostname IS NOT NULL AND hostname != ''", [])])
+
 @app.route('/api/export/excel')
 def export_excel():
-    """Export devices to Excel"""
-    result = get_all_devices(limit=10000)  # Export all
+    """Export devices to Excel (write-only workbook, streamed from a temp file)"""
+    columns, filters = _export_request()
+    try:
+        path, count = get_exporter().xlsx_tempfile(columns, **filters)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    if not result['devices']:
+    if not count:
+        os.remove(path)
         return jsonify({'error': 'No devices to export'}), 400
     
-    # Create DataFrame
-    df = pd.DataFrame(result['devices'])
-    
-    # Select and rename columns for better presentation
-    columns_mapping = {
-        'hostname': 'Hostname',
-        'ip_address': 'IP Address',
-        'os_name': 'Operating System',
-        'device_model': 'Device Model',
-        'manufacturer': 'Manufacturer',
-        'serial_number': 'Serial Number',
-        'cpu_info': 'CPU Information',
-        'ram_gb': 'RAM (GB)',
-        'storage_info': 'Storage',
-        'working_user': 'Working User',
-        'domain': 'Domain',
-        'mac_address': 'MAC Address',
-        'device_type': 'Device Type',
-        'created_at': 'Created At',
-        'updated_at': 'Last Updated'
-    }
-    
-    # Select only existing columns
-    available_columns = [col for col in columns_mapping.keys() if col in df.columns]
-    df_export = df[available_columns].copy()
-    df_export.columns = [columns_mapping[col] for col in available_columns]
-    
-    # Create Excel file in memory
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df_export.to_excel(writer, sheet_name='Network Assets', index=False)
-        
-        # Get the workbook and worksheet
-        workbook = writer.book
-        worksheet = writer.sheets['Network Assets']
-        
-        # Auto-adjust column widths
-        for column in worksheet.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            worksheet.column_dimensions[column_letter].width = adjusted_width
-    
-    output.seek(0)
     filename = f"Network_Assets_Export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+    return Response(stream_file(path), mimetype=XLSX_MIMETYPE, headers={
+        'Content-Disposition': f'attachment; filename="{filename}"',
+        'Content-Length': str(os.path.getsize(path)),
+    })
+
+@app.route('/api/export/csv')
+def export_csv():
+    """Export devices as CSV, streamed chunk by chunk"""
+    columns, filters = _export_request()
+    exporter = get_exporter()
+    try:
+        names, rows = exporter.select(columns, **filters)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    filename = f"Network_Assets_Export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    return Response(exporter.csv_chunks(names, rows), mimetype='text/csv',
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+@app.route('/api/export/ndjson')
+def export_ndjson():
+    """Export devices as newline-delimited JSON, streamed chunk by chunk"""
+    columns, filters = _export_request()
+    exporter = get_exporter()
+    try:
+        names, rows = exporter.select(columns, **filters)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    return send_file(
-        output,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        as_attachment=True,
-        download_name=filename
-    )
+    return Response(exporter.ndjson_chunks(names, rows), mimetype='application/x-ndjson')
 
 # Create templates directory and files
 def create_templates():
@@ -725,7 +728,11 @@ def create_templates():
             btn.textContent = 'Exporting...';
             btn.disabled = true;
             
-            fetch('/api/export/excel')
+            const params = new URLSearchParams({
+                search: document.getElementById('searchBox').value,
+                type: document.getElementById('typeFilter').value
+            });
+            fetch(`/api/export/excel?${params}`)
                 .then(response => {
                     if (response.ok) {
                         return response.blob();
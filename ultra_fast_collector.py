@@ -48,6 +48,51 @@ try:
 except ImportError:
     NMAP_AVAILABLE = False
 
+try:
+    from rescan_planner import RescanPlanner
+    RESCAN_PLANNER_AVAILABLE = True
+except ImportError:
+    RESCAN_PLANNER_AVAILABLE = False
+
+try:
+    from scan_checkpoints import ScanRun
+    SCAN_CHECKPOINTS_AVAILABLE = True
+except ImportError:
+    SCAN_CHECKPOINTS_AVAILABLE = False
+
+try:
+    from field_mapping import get_field_mapper
+    FIELD_MAPPING_AVAILABLE = True
+except ImportError:
+    FIELD_MAPPING_AVAILABLE = False
+
+try:
+    from credential_affinity import CredentialAffinityCache, get_credential_cache, normalize_credential
+    CREDENTIAL_AFFINITY_AVAILABLE = True
+except ImportError:
+    CREDENTIAL_AFFINITY_AVAILABLE = False
+
+try:
+    from adaptive_network_controller import AdaptiveNetworkController, get_network_controller
+    NETWORK_CONTROLLER_AVAILABLE = True
+except ImportError:
+    NETWORK_CONTROLLER_AVAILABLE = False
+
+try:
+    from metrics_registry import observe_db_write, observe_duplicate_detection, track_queue
+    METRICS_AVAILABLE = True
+except ImportError:
+    METRICS_AVAILABLE = False
+
+try:
+    from collection_tracing import annotate, get_tracer, record_span, traced
+    TRACING_AVAILABLE = True
+except ImportError:
+    TRACING_AVAILABLE = False
+
+    def traced(stage, outcome=None, device=None, scan=False):
+        return lambda function: function
+
 log = logging.getLogger(__name__)
 
 def _collect_windows_standalone(ip: str, username: str, password: str) -> Optional[Dict]:
@@ -613,7 +658,24 @@ def _collect_http_standalone(ip: str) -> Optional[Dict]:
     except Exception:
         return None
 
-def _enhanced_device_collection(ip: str, os_info: Dict[str, str], win_creds: Optional[List] = None, linux_creds: Optional[List] = None, snmp_communities: Optional[List] = None) -> Optional[Dict]:
+def _try_credential_list(ip: str, protocol: str, creds: List, collect, is_success, credential_cache=None) -> Optional[Dict]:
+    """Try creds in credential-affinity order when a cache is given, else in list order"""
+    if credential_cache is not None:
+        outcome = credential_cache.try_credentials(ip, protocol, creds, lambda username, password, cred: collect(username, password), is_success)
+        if outcome.skipped:
+            log.debug(f"      Skipped {len(outcome.skipped)} recently failed {protocol.upper()} credentials")
+        return outcome.result if outcome.success else None
+    for i, creds_entry in enumerate(creds):
+        try:
+            log.debug(f"      Trying {protocol.upper()} credentials {i+1}/{len(creds)}")
+            data = collect(creds_entry.get('username', ''), creds_entry.get('password', ''))
+            if is_success(data):
+                return data
+        except Exception as e:
+            log.debug(f"      {protocol.upper()} attempt {i+1} failed: {e}")
+    return None
+
+def _enhanced_device_collection(ip: str, os_info: Dict[str, str], win_creds: Optional[List] = None, linux_creds: Optional[List] = None, snmp_communities: Optional[List] = None, credential_cache: Optional['CredentialAffinityCache'] = None) -> Optional[Dict]:
     """
     Enhanced device collection using hierarchical strategy based on OS detection
     
@@ -650,18 +712,15 @@ def _enhanced_device_collection(ip: str, os_info: Dict[str, str], win_creds: Opt
         log.info("   🪟 Windows strategy: WMI → SNMP fallback")
         
         # Try WMI first
-        for i, creds in enumerate(win_creds):
-            try:
-                log.debug(f"      Trying WMI credentials {i+1}/{len(win_creds)}")
-                data = _collect_windows_standalone(ip, creds.get('username', ''), creds.get('password', ''))
-                
-                if data and data.get('wmi_collection_status') == 'Success':
-                    data.update(collection_data)
-                    data['collection_strategy'] = 'Windows Hierarchical (WMI Success)'
-                    log.info("   ✅ WMI collection successful!")
-                    return data
-            except Exception as e:
-                log.debug(f"      WMI attempt {i+1} failed: {e}")
+        data = _try_credential_list(ip, 'wmi', win_creds,
+                                    lambda username, password: _collect_windows_standalone(ip, username, password),
+                                    lambda data: bool(data) and data.get('wmi_collection_status') == 'Success',
+                                    credential_cache)
+        if data:
+            data.update(collection_data)
+            data['collection_strategy'] = 'Windows Hierarchical (WMI Success)'
+            log.info("   ✅ WMI collection successful!")
+            return data
         
         # SNMP fallback
         log.info("   2️⃣  WMI failed, trying SNMP fallback...")
@@ -677,18 +736,15 @@ def _enhanced_device_collection(ip: str, os_info: Dict[str, str], win_creds: Opt
         log.info("   🐧 Linux strategy: SSH → SNMP fallback")
         
         # Try SSH first
-        for i, creds in enumerate(linux_creds):
-            try:
-                log.debug(f"      Trying SSH credentials {i+1}/{len(linux_creds)}")
-                data = _collect_ssh_standalone(ip, creds.get('username', ''), creds.get('password', ''))
-                
-                if data and 'SSH Failed' not in str(data.get('wmi_collection_status', '')):
-                    data.update(collection_data)
-                    data['collection_strategy'] = 'Linux Hierarchical (SSH Success)'
-                    log.info("   ✅ SSH collection successful!")
-                    return data
-            except Exception as e:
-                log.debug(f"      SSH attempt {i+1} failed: {e}")
+        data = _try_credential_list(ip, 'ssh', linux_creds,
+                                    lambda username, password: _collect_ssh_standalone(ip, username, password),
+                                    lambda data: bool(data) and 'SSH Failed' not in str(data.get('wmi_collection_status', '')),
+                                    credential_cache)
+        if data:
+            data.update(collection_data)
+            data['collection_strategy'] = 'Linux Hierarchical (SSH Success)'
+            log.info("   ✅ SSH collection successful!")
+            return data
         
         # SNMP fallback
         log.info("   2️⃣  SSH failed, trying SNMP fallback...")
@@ -713,16 +769,15 @@ def _enhanced_device_collection(ip: str, os_info: Dict[str, str], win_creds: Opt
         
         # SSH fallback
         log.info("   2️⃣  SNMP failed, trying SSH fallback...")
-        for i, creds in enumerate(linux_creds):
-            try:
-                data = _collect_ssh_standalone(ip, creds.get('username', ''), creds.get('password', ''))
-                if data and 'SSH Failed' not in str(data.get('wmi_collection_status', '')):
-                    data.update(collection_data)
-                    data['collection_strategy'] = 'Other Hierarchical (SSH Fallback)'
-                    log.info("   ✅ SSH fallback successful!")
-                    return data
-            except Exception as e:
-                log.debug(f"      SSH fallback attempt {i+1} failed: {e}")
+        data = _try_credential_list(ip, 'ssh', linux_creds,
+                                    lambda username, password: _collect_ssh_standalone(ip, username, password),
+                                    lambda data: bool(data) and 'SSH Failed' not in str(data.get('wmi_collection_status', '')),
+                                    credential_cache)
+        if data:
+            data.update(collection_data)
+            data['collection_strategy'] = 'Other Hierarchical (SSH Fallback)'
+            log.info("   ✅ SSH fallback successful!")
+            return data
         
         # HTTP fallback for web devices
         http_data = _collect_http_standalone(ip)
@@ -829,6 +884,7 @@ def _nmap_os_detection(ip: str) -> Dict[str, str]:
         # Fall back to port-based detection
         return _port_based_os_detection(ip)
 
+@traced('os_detection', device='ip')
 def _port_based_os_detection(ip: str) -> Dict[str, str]:
     """Port-based OS detection as fallback when NMAP is not available"""
     result = {'os_family': 'Unknown', 'device_type': 'Unknown', 'confidence': '0', 'detection_method': 'Port-based'}
@@ -887,8 +943,11 @@ def _port_based_os_detection(ip: str) -> Dict[str, str]:
         log.warning(f"Port-based OS detection failed for {ip}: {e}")
         return result
 
-def _quick_port_check(ip: str, port: int, timeout: float = 0.5) -> bool:
-    """Quick port check for OS detection"""
+def _quick_port_check(ip: str, port: int, timeout: Optional[float] = None) -> bool:
+    """Quick port check for OS detection (adaptive per-subnet timeout unless one is given)"""
+    if timeout is None and NETWORK_CONTROLLER_AVAILABLE:
+        return get_network_controller().tcp_probe(ip, port)
+    timeout = 0.5 if timeout is None else timeout
     try:
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         sock.settimeout(timeout)
@@ -974,20 +1033,48 @@ class UltraFastDeviceCollector(QThread):
                  use_http: bool = False,  # Disabled by default for speed
                  discovery_workers: int = 20,  # Increased from 15
                  collection_workers: int = 12,  # Increased from 8
+                 rescan_planner: Optional['RescanPlanner'] = None,
+                 credential_cache: Optional['CredentialAffinityCache'] = None,
+                 network_controller: Optional['AdaptiveNetworkController'] = None,
+                 checkpoint: Optional['ScanRun'] = None,
+                 known_alive: Optional[List[str]] = None,
                  parent=None):
         super().__init__(parent)
         
         self.targets = targets or []
+        self.rescan_planner = rescan_planner  # Optional: only queue IPs that are due
+        # Optional: resumable scan run; host progress is recorded there and known-alive
+        # hosts from an interrupted run go straight to collection
+        self.checkpoint = checkpoint
+        self.known_alive = known_alive or []
+        self._planned_ips: List[str] = []
+        self._processed_devices: List[Dict] = []
         self.win_creds = win_creds or []
         self.linux_creds = linux_creds or []
         self.snmp_v2c = snmp_v2c or []
         self.snmp_v3 = snmp_v3 or {}
         self.use_http = use_http  # HTTP slows down collection significantly
         
+        # Credential affinity: try the credential that worked for this host / subnet first
+        self.credential_cache = credential_cache
+        if self.credential_cache is None and CREDENTIAL_AFFINITY_AVAILABLE:
+            try:
+                self.credential_cache = get_credential_cache()
+            except Exception as e:
+                log.warning(f"Credential affinity cache unavailable: {e}")
+        
         # Optimized worker counts
         self.discovery_workers = discovery_workers
         self.collection_workers = collection_workers
         
+        # Adaptive per-subnet timeouts + AIMD in-flight limit shared with the other scanners
+        self.network_controller = network_controller
+        if self.network_controller is None and NETWORK_CONTROLLER_AVAILABLE:
+            self.network_controller = get_network_controller()
+        if self.network_controller is not None:
+            # Threads are only an upper bound; the controller's limit gates actual probes
+            self.discovery_workers = max(discovery_workers, min(64, self.network_controller.limiter.maximum))
+        
         # Thread control
         self._stop_requested = threading.Event()
         self._discovery_complete = threading.Event()
@@ -997,6 +1084,10 @@ class UltraFastDeviceCollector(QThread):
         self.discovery_queue = Queue()
         self.collection_queue = Queue()
         self.results_queue = Queue()
+        if METRICS_AVAILABLE:
+            track_queue('ultra_fast', 'discovery', self.discovery_queue)
+            track_queue('ultra_fast', 'collection', self.collection_queue)
+            track_queue('ultra_fast', 'results', self.results_queue)
         
         # Thread-safe tracking
         self.stats_lock = threading.Lock()
@@ -1012,6 +1103,10 @@ class UltraFastDeviceCollector(QThread):
         try:
             self.log_message.emit("🚀 Starting ULTRA-FAST collection with hang prevention...")
             self.stats.start_time = time.time()
+            if self.credential_cache is not None:
+                self.credential_cache.reset_stats()
+            if TRACING_AVAILABLE:
+                get_tracer().begin_scan('ultra_fast')
             
             # Phase 1: Lightning-fast discovery (parallel)
             discovery_future = self._run_discovery_phase_async()
@@ -1024,6 +1119,9 @@ class UltraFastDeviceCollector(QThread):
             
             # Phase 4: Process results
             self._process_results()
+            self._record_rescan_observations()
+            if self.checkpoint is not None:
+                self.checkpoint.flush()
             
             # Final statistics
             self._emit_final_stats()
@@ -1039,9 +1137,22 @@ class UltraFastDeviceCollector(QThread):
         """Run discovery phase asynchronously"""
         executor = ThreadPoolExecutor(max_workers=self.discovery_workers, thread_name_prefix="Discovery")
         
-        # Populate discovery queue
-        for target in self.targets:
-            self._populate_ips_for_target(target)
+        # Populate discovery queue (planned order: volatile/stale assets first)
+        if self.rescan_planner is not None:
+            plan = self.rescan_planner.plan(self.targets)
+            self._planned_ips = plan.targets
+            self.log_message.emit(f"🎯 Rescan plan: {len(plan.targets)}/{plan.considered} IPs due, "
+                                  f"{plan.skipped} stable IPs backed off")
+            for ip in plan.targets:
+                self.discovery_queue.put(ip)
+        else:
+            for target in self.targets:
+                self._populate_ips_for_target(target)
+        for ip in self.known_alive:
+            self.collection_queue.put(OptimizedDeviceTask(ip=ip, quality_score=self._calculate_device_priority_fast(ip),
+                                                          timeout=self._task_timeout(ip)))
+            with self.stats_lock:
+                self.discovered_devices.add(ip)
         
         # Submit discovery workers
         futures = []
@@ -1142,10 +1253,13 @@ class UltraFastDeviceCollector(QThread):
             try:
                 ip = self.discovery_queue.get(timeout=0.5)  # Short timeout
                 
-                if self._is_device_reachable_ultra_fast(ip):
+                alive = self._is_device_reachable_ultra_fast(ip)
+                if self.checkpoint is not None:
+                    self.checkpoint.mark_discovered(ip, alive)
+                if alive:
                     # Device is reachable, add to collection queue
                     quality = self._calculate_device_priority_fast(ip)
-                    task = OptimizedDeviceTask(ip=ip, quality_score=quality, timeout=5.0)
+                    task = OptimizedDeviceTask(ip=ip, quality_score=quality, timeout=self._task_timeout(ip))
                     
                     self.collection_queue.put(task)
                     
@@ -1220,6 +1334,8 @@ class UltraFastDeviceCollector(QThread):
                         with self.stats_lock:
                             self.collected_ips.add(task.ip)
                             self.stats.collected += 1
+                        if self.checkpoint is not None:
+                            self.checkpoint.mark_collected(task.ip)
                         
                         self.device_collected.emit(device_data)
                         self._update_progress()
@@ -1246,6 +1362,8 @@ class UltraFastDeviceCollector(QThread):
                                 with self.stats_lock:
                                     self.collected_ips.add(task.ip)
                                     self.stats.collected += 1
+                                if self.checkpoint is not None:
+                                    self.checkpoint.mark_collected(task.ip)
                                 self.device_collected.emit(fallback_data)
                                 self._update_progress()
                                 continue
@@ -1267,12 +1385,16 @@ class UltraFastDeviceCollector(QThread):
                             with self.stats_lock:
                                 self.failed_ips.add(task.ip)
                                 self.stats.failed += 1
+                            if self.checkpoint is not None:
+                                self.checkpoint.mark_collected(task.ip, success=False)
                 else:
                     # device_data is None or empty
                     # Debug disabled: self.log_message.emit(f"🔍 DEBUG: No device data returned for {task.ip}")
                     with self.stats_lock:
                         self.failed_ips.add(task.ip)
                         self.stats.failed += 1
+                    if self.checkpoint is not None:
+                        self.checkpoint.mark_collected(task.ip, success=False)
                     self._update_progress()
                 
                 self.collection_queue.task_done()
@@ -1284,6 +1406,7 @@ class UltraFastDeviceCollector(QThread):
             except Exception as e:
                 log.warning(f"Collection worker error: {e}")
 
+    @traced('discovery', device='ip', outcome=lambda alive: 'alive' if alive else 'unreachable')
     def _is_device_reachable_ultra_fast(self, ip: str) -> bool:
         """Ultra-fast device reachability check with minimal timeout"""
         try:
@@ -1294,6 +1417,11 @@ class UltraFastDeviceCollector(QThread):
                 if self._stop_requested.is_set():
                     return False
                 
+                if self.network_controller is not None:
+                    if self.network_controller.tcp_probe(ip, port, cancel=self._stop_requested):
+                        return True
+                    continue
+                
                 try:
                     sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
                     sock.settimeout(0.3)  # Ultra-fast 300ms timeout
@@ -1323,8 +1451,16 @@ class UltraFastDeviceCollector(QThread):
         
         return min(score, 1.0)
 
+    def _task_timeout(self, ip: str) -> float:
+        """Per-device collection budget: 5s on a LAN, stretched for high-RTT subnets"""
+        if self.network_controller is None:
+            return 5.0
+        return self.network_controller.operation_timeout(ip, 5.0)
+
     def _is_port_open_fast(self, ip: str, port: int, timeout: float = 0.2) -> bool:
         """Ultra-fast port check"""
+        if self.network_controller is not None:
+            return self.network_controller.tcp_probe(ip, port, cancel=self._stop_requested)
         try:
             sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             sock.settimeout(timeout)
@@ -1334,6 +1470,7 @@ class UltraFastDeviceCollector(QThread):
         except:
             return False
 
+    @traced('collect', device='task.ip')
     def _collect_device_data_ultra_fast(self, task: OptimizedDeviceTask) -> Optional[Dict]:
         """Ultra-fast device collection with strict timeouts and hang prevention"""
         if not COLLECTION_UTILS_AVAILABLE:
@@ -1342,7 +1479,8 @@ class UltraFastDeviceCollector(QThread):
         try:
             # Use ThreadPoolExecutor with timeout to prevent hangs
             with ThreadPoolExecutor(max_workers=1) as executor:
-                future = executor.submit(self._attempt_collection_with_timeout, task)
+                attempt = self._attempt_collection_with_timeout
+                future = executor.submit(get_tracer().wrap(attempt) if TRACING_AVAILABLE else attempt, task)
                 
                 try:
                     # Strict timeout to prevent hangs
@@ -1352,6 +1490,8 @@ class UltraFastDeviceCollector(QThread):
                     # Collection timed out - create basic record
                     with self.stats_lock:
                         self.stats.timeout_errors += 1
+                    if TRACING_AVAILABLE:
+                        annotate(outcome='timeout')
                     
                     self.log_message.emit(f"⏰ Collection timeout for {task.ip} after {task.timeout}s")
                     
@@ -1371,6 +1511,7 @@ class UltraFastDeviceCollector(QThread):
             log.warning(f"Collection error for {task.ip}: {e}")
             return None
 
+    @traced('attempt')
     def _attempt_collection_with_timeout(self, task: OptimizedDeviceTask) -> Optional[Dict]:
         """Attempt collection with NMAP OS detection and optimized method selection"""
         ip = task.ip
@@ -1459,12 +1600,29 @@ class UltraFastDeviceCollector(QThread):
         # If all specific methods failed, try HTTP and basic detection
         return self._fallback_collection_methods(ip, task, os_info)
     
+    @traced('wmi', device='ip')
     def _collect_windows_wmi(self, ip: str, task: OptimizedDeviceTask) -> Optional[Dict]:
         """Collect Windows data using WMI"""
         if not self.win_creds:
             return None
             
         log.info(f"Trying {len(self.win_creds)} Windows credentials for {ip}")
+        if self.credential_cache is not None:
+            outcome = self.credential_cache.try_credentials(
+                ip, 'wmi', self.win_creds[:5],
+                lambda username, password, cred: _collect_windows_standalone(ip, username, password))
+            if TRACING_AVAILABLE:
+                annotate(retries=max(0, outcome.attempts - 1))
+            if not outcome.success:
+                log.debug(f"❌ Windows credentials failed for {ip} ({outcome.attempts} tried, {len(outcome.skipped)} known-bad skipped)")
+                return None
+            device_data = outcome.result
+            device_data['Collection Method'] = 'WMI'
+            device_data['Collection Time'] = datetime.now().isoformat()
+            device_data['Quality Score'] = task.quality_score
+            device_data['Successful Credential'] = (normalize_credential(outcome.credential) or ('',))[0]
+            log.info(f"✅ Windows collection successful for {ip} ({outcome.source} affinity, {outcome.attempts} attempts)")
+            return device_data
         for i, cred in enumerate(self.win_creds[:5], 1):  # Try up to 5 credentials
             try:
                 # Handle different credential formats defensively
@@ -1487,7 +1645,8 @@ class UltraFastDeviceCollector(QThread):
                 
                 self.log_message.emit(f"🔍 DEBUG: Credential {i} - Raw: {cred}")
                 self.log_message.emit(f"🔍 DEBUG: Credential {i} - Formatted username: '{username}', password: {'***set***' if password else '***empty***'}")
-                log.debug(f"Trying Windows credential {i}/5: {username.split('\\')[-1]}@{domain if domain != '.' else 'local'}")
+                account = username.split('\\')[-1]
+                log.debug(f"Trying Windows credential {i}/5: {account}@{domain if domain != '.' else 'local'}")
                 device_data = _collect_windows_standalone(ip, username, password)
                 if device_data:
                     device_data['Collection Method'] = 'WMI'
@@ -1503,12 +1662,29 @@ class UltraFastDeviceCollector(QThread):
                 continue
         return None
     
+    @traced('ssh', device='ip')
     def _collect_linux_ssh(self, ip: str, task: OptimizedDeviceTask) -> Optional[Dict]:
         """Collect Linux data using SSH"""
         if not self.linux_creds:
             return None
         
         log.info(f"Trying {len(self.linux_creds)} Linux/SSH credentials for {ip}")
+        if self.credential_cache is not None:
+            outcome = self.credential_cache.try_credentials(
+                ip, 'ssh', self.linux_creds[:5],
+                lambda username, password, cred: _collect_ssh_standalone(ip, username, password))
+            if TRACING_AVAILABLE:
+                annotate(retries=max(0, outcome.attempts - 1))
+            if not outcome.success:
+                log.debug(f"❌ SSH credentials failed for {ip} ({outcome.attempts} tried, {len(outcome.skipped)} known-bad skipped)")
+                return None
+            device_data = outcome.result
+            device_data['Collection Method'] = 'SSH'
+            device_data['Collection Time'] = datetime.now().isoformat()
+            device_data['Quality Score'] = task.quality_score
+            device_data['Successful Credential'] = (normalize_credential(outcome.credential) or ('',))[0]
+            log.info(f"✅ SSH collection successful for {ip} ({outcome.source} affinity, {outcome.attempts} attempts)")
+            return device_data
         for i, cred in enumerate(self.linux_creds[:5], 1):  # Try up to 5 credentials
             try:
                 # Handle different credential formats defensively
@@ -1546,6 +1722,7 @@ class UltraFastDeviceCollector(QThread):
                 continue
         return None
     
+    @traced('snmp', device='ip')
     def _collect_snmp_method(self, ip: str, task: OptimizedDeviceTask) -> Optional[Dict]:
         """Collect device data using SNMP"""
         try:
@@ -1560,6 +1737,7 @@ class UltraFastDeviceCollector(QThread):
             log.debug(f"❌ SNMP collection error for {ip}: {str(e)[:50]}")
         return None
     
+    @traced('fallback', device='ip')
     def _fallback_collection_methods(self, ip: str, task: OptimizedDeviceTask, os_info: Dict) -> Dict:
         """Try HTTP and basic detection as fallback methods"""
         # Try HTTP collection if enabled
@@ -1650,6 +1828,7 @@ class UltraFastDeviceCollector(QThread):
             except Empty:
                 break
         
+        self._processed_devices = devices_to_save
         if not devices_to_save:
             self.log_message.emit("⚠️ NO DEVICES TO SAVE - Results queue was empty!")
             return
@@ -1695,6 +1874,19 @@ class UltraFastDeviceCollector(QThread):
         else:
             self.log_message.emit("🎉 SUCCESS: All devices saved to database!")
 
+    def _record_rescan_observations(self):
+        """Feed this run's reachability/collection outcome back into the rescan planner"""
+        if self.rescan_planner is None or not self._planned_ips:
+            return
+        try:
+            with self.stats_lock:
+                reachable = set(self.discovered_devices)
+                failed = set(self.failed_ips)
+            self.rescan_planner.record_results(self._planned_ips, self._processed_devices,
+                                               reachable=reachable, failed=failed)
+        except Exception as e:
+            log.warning(f"Rescan planner update failed: {e}")
+
     def _update_progress(self):
         """Update progress calculation"""
         with self.stats_lock:
@@ -1724,6 +1916,8 @@ class UltraFastDeviceCollector(QThread):
                     'results': self.results_queue.qsize()
                 }
             }
+            if self.credential_cache is not None:
+                stats_dict['credential_affinity'] = dict(self.credential_cache.stats)
             self.stats_updated.emit(stats_dict)
 
     def _emit_final_stats(self):
@@ -1737,6 +1931,16 @@ class UltraFastDeviceCollector(QThread):
             self.log_message.emit(f"   • Timeout Errors: {self.stats.timeout_errors}")
             self.log_message.emit(f"   • Success Rate: {self.stats.success_rate:.1f}%")
             self.log_message.emit(f"   • Speed: {self.stats.devices_per_minute:.1f} devices/min")
+        if self.credential_cache is not None:
+            cred_stats = dict(self.credential_cache.stats)
+            self.log_message.emit(f"   • Credential Attempts: {cred_stats['attempts']} "
+                                  f"({cred_stats['attempts_saved']} saved, {cred_stats['host_hits']} host / "
+                                  f"{cred_stats['subnet_hits']} subnet hits, {cred_stats['negative_skips']} known-bad skipped)")
+        if self.network_controller is not None:
+            net = self.network_controller.snapshot()
+            timeouts = ", ".join(f"{subnet} {info['timeout_ms']}ms" for subnet, info in list(net['subnets'].items())[:5])
+            self.log_message.emit(f"   • Network Control: concurrency {net['concurrency']} "
+                                  f"({net['cuts']} backoffs), timeouts {timeouts or 'n/a'}")
 
     def _normalize_device_data(self, data: Dict) -> Dict:
         """Normalize device data to match database schema consistently"""
@@ -1810,6 +2014,7 @@ class UltraFastDeviceCollector(QThread):
         
         return normalized
     
+    @traced('save', device=lambda self, data: data.get('ip_address') or data.get('IP Address'))
     def _save_to_database(self, device_data: Dict) -> bool:
         """Save device data to database with full schema support"""
         try:
@@ -1832,50 +2037,56 @@ class UltraFastDeviceCollector(QThread):
                     self.log_message.emit("❌ Cannot save device: missing hostname and ip_address")
                     return False
             
-            # Get all available columns in the database
-            cursor.execute('PRAGMA table_info(assets)')
-            db_columns = [col[1] for col in cursor.fetchall()]
-            
-            # Prepare data for insertion - only include columns that exist in DB
-            db_data = {}
-            
-            # Map common field variations
-            field_mappings = {
-                'hostname': ['hostname', 'Hostname', 'computer_name', 'Computer Name'],
-                'ip_address': ['ip_address', 'IP Address', 'IP'],
-                'working_user': ['working_user', 'Working User', 'Current User'],
-                'operating_system': ['operating_system', 'OS', 'Operating System'],
-                'system_manufacturer': ['system_manufacturer', 'Manufacturer'],
-                'system_model': ['system_model', 'Model'],
-                'device_type': ['device_type', 'Device Type', 'Asset Type'],
-                'status': ['status', 'Status']
-            }
-            
-            # Apply field mappings
-            for db_field, source_fields in field_mappings.items():
-                if db_field in db_columns:
-                    for source_field in source_fields:
-                        if source_field in device_data and device_data[source_field] is not None:
-                            value = str(device_data[source_field]).strip()
-                            if value and value.lower() != 'none' and value != '':
-                                db_data[db_field] = value
-                                break
+            if FIELD_MAPPING_AVAILABLE:
+                # Compiled aliases, cached column set and type coercion (no PRAGMA per device)
+                mapper = get_field_mapper()
+                row = mapper.prepare(conn, device_data, 'default', key='assets.db')
+                db_data = row.as_dict()
+            else:
+                # Get all available columns in the database
+                cursor.execute('PRAGMA table_info(assets)')
+                db_columns = [col[1] for col in cursor.fetchall()]
+            
+                # Prepare data for insertion - only include columns that exist in DB
+                db_data = {}
+            
+                # Map common field variations
+                field_mappings = {
+                    'hostname': ['hostname', 'Hostname', 'computer_name', 'Computer Name'],
+                    'ip_address': ['ip_address', 'IP Address', 'IP'],
+                    'working_user': ['working_user', 'Working User', 'Current User'],
+                    'operating_system': ['operating_system', 'OS', 'Operating System'],
+                    'system_manufacturer': ['system_manufacturer', 'Manufacturer'],
+                    'system_model': ['system_model', 'Model'],
+                    'device_type': ['device_type', 'Device Type', 'Asset Type'],
+                    'status': ['status', 'Status']
+                }
             
-            # Add remaining fields that match database columns
-            for key, value in device_data.items():
-                if key in db_columns and key not in db_data and value is not None:
-                    clean_value = str(value).strip()
-                    if clean_value and clean_value.lower() != 'none' and clean_value != '':
-                        db_data[key] = clean_value
-            
-            # Add timestamps
-            now = datetime.now().isoformat()
-            if 'created_at' in db_columns:
-                db_data['created_at'] = now
-            if 'updated_at' in db_columns:
-                db_data['updated_at'] = now
-            if 'last_scan_time' in db_columns:
-                db_data['last_scan_time'] = now
+                # Apply field mappings
+                for db_field, source_fields in field_mappings.items():
+                    if db_field in db_columns:
+                        for source_field in source_fields:
+                            if source_field in device_data and device_data[source_field] is not None:
+                                value = str(device_data[source_field]).strip()
+                                if value and value.lower() != 'none' and value != '':
+                                    db_data[db_field] = value
+                                    break
+            
+                # Add remaining fields that match database columns
+                for key, value in device_data.items():
+                    if key in db_columns and key not in db_data and value is not None:
+                        clean_value = str(value).strip()
+                        if clean_value and clean_value.lower() != 'none' and clean_value != '':
+                            db_data[key] = clean_value
+            
+                # Add timestamps
+                now = datetime.now().isoformat()
+                if 'created_at' in db_columns:
+                    db_data['created_at'] = now
+                if 'updated_at' in db_columns:
+                    db_data['updated_at'] = now
+                if 'last_scan_time' in db_columns:
+                    db_data['last_scan_time'] = now
             
             # Ensure we have minimum required data
             if not db_data.get('hostname') and not db_data.get('ip_address'):
@@ -1884,6 +2095,7 @@ class UltraFastDeviceCollector(QThread):
             
             # ENHANCED HARDWARE-BASED DEDUPLICATION STRATEGY
             # Priority: 1) Hardware Serial Numbers  2) MAC Address  3) Hostname+IP  4) IP only
+            dedupe_started = time.perf_counter()
             hostname_to_check = db_data.get('hostname')
             ip_to_check = db_data.get('ip_address')
             bios_serial = db_data.get('bios_serial_number')
@@ -1959,7 +2171,14 @@ class UltraFastDeviceCollector(QThread):
                     match_reason = f"IP Fallback: {ip_to_check}"
                     self.log_message.emit(f"⚠️ Found existing device by IP only: ID {existing_id} (IP-based matching is less reliable)")
             
+            if METRICS_AVAILABLE:
+                observe_duplicate_detection('ultra_fast_collector', time.perf_counter() - dedupe_started)
+            if TRACING_AVAILABLE:
+                record_span('duplicate_check', time.perf_counter() - dedupe_started,
+                            outcome='match' if existing_id else 'new')
+            
             # Debug logging with deduplication strategy
+            write_started = time.perf_counter()
             if existing_id:
                 self.log_message.emit(f"🔄 Will UPDATE existing record ID {existing_id}: {match_reason}")
                 self.log_message.emit(f"   Old: '{existing_hostname}' -> New: '{hostname_to_check}'")
@@ -1977,14 +2196,20 @@ class UltraFastDeviceCollector(QThread):
             
             if existing_id:
                 # Update existing record
-                if len(db_data) > 0:
+                if FIELD_MAPPING_AVAILABLE:
+                    mapper.update(conn, row, existing_id)
+                    self.log_message.emit(f"✅ UPDATED existing device: {hostname_to_check or ip_to_check} (ID: {existing_id})")
+                elif len(db_data) > 0:
                     set_clause = ', '.join([f'{col} = ?' for col in db_data.keys()])
                     cursor.execute(f'UPDATE assets SET {set_clause} WHERE id = ?', 
                                  list(db_data.values()) + [existing_id])
                     self.log_message.emit(f"✅ UPDATED existing device: {hostname_to_check or ip_to_check} (ID: {existing_id})")
             else:
                 # Insert new record
-                if len(db_data) > 0:
+                if FIELD_MAPPING_AVAILABLE:
+                    new_id = mapper.insert(conn, row)
+                    self.log_message.emit(f"✅ INSERTED new device: {hostname_to_check or ip_to_check} (ID: {new_id})")
+                elif len(db_data) > 0:
                     columns = list(db_data.keys())
                     placeholders = ', '.join(['?' for _ in columns])
                     cursor.execute(f'INSERT INTO assets ({", ".join(columns)}) VALUES ({placeholders})', 
@@ -1994,6 +2219,8 @@ class UltraFastDeviceCollector(QThread):
             
             conn.commit()
             conn.close()
+            if METRICS_AVAILABLE:
+                observe_db_write('ultra_fast_collector', 1, time.perf_counter() - write_started)
             
             # Log success with details
             saved_fields = len(db_data)
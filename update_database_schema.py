@@ -9,66 +9,36 @@ Add new columns for NMAP/OS detection results
 import sqlite3
 import sys
 
+from db.migrations import LATEST_VERSION, NMAP_COLUMNS, MigrationError, current_version, migrate
+
 def update_database_schema():
-    """Add NMAP OS detection columns to assets table"""
+    """Add NMAP OS detection columns to assets table (schema migration 2)"""
     
     print("🔧 UPDATING DATABASE SCHEMA FOR NMAP OS DETECTION")
     print("=" * 60)
     
     try:
         conn = sqlite3.connect('assets.db')
-        cursor = conn.cursor()
         
-        # Check current schema
-        cursor.execute('PRAGMA table_info(assets)')
-        existing_columns = [col[1] for col in cursor.fetchall()]
-        
-        print(f"📊 Current database has {len(existing_columns)} columns")
-        
-        # Add new columns for NMAP OS detection
-        new_columns = [
-            ('nmap_os_family', 'TEXT'),
-            ('nmap_device_type', 'TEXT'), 
-            ('nmap_confidence', 'TEXT'),
-            ('detection_method', 'TEXT')
-        ]
-        
-        added_columns = []
-        for column_name, column_type in new_columns:
-            if column_name not in existing_columns:
-                try:
-                    alter_sql = f'ALTER TABLE assets ADD COLUMN {column_name} {column_type}'
-                    cursor.execute(alter_sql)
-                    added_columns.append(column_name)
-                    print(f"✅ Added column: {column_name} ({column_type})")
-                except Exception as e:
-                    print(f"❌ Failed to add {column_name}: {e}")
-            else:
-                print(f"ℹ️ Column already exists: {column_name}")
-        
-        if added_columns:
-            conn.commit()
-            print(f"\n✅ Successfully added {len(added_columns)} new columns")
-            print(f"   New columns: {', '.join(added_columns)}")
-        else:
-            print("\nℹ️ No new columns needed - schema already up to date")
+        print(f"📊 Current database is at schema version {current_version(conn)} of {LATEST_VERSION}")
         
-        # Verify the update
-        cursor.execute('PRAGMA table_info(assets)')
-        final_columns = [col[1] for col in cursor.fetchall()]
+        applied = migrate(conn)
+        added_columns = sum(record['columns_added'] for record in applied)
+        for record in applied:
+            print(f"✅ Applied migration {record['version']}: {record['name']} ({record['columns_added']} columns)")
         
-        print(f"\n📊 Updated database now has {len(final_columns)} columns")
+        if applied:
+            print(f"\n✅ Successfully added {added_columns} new columns")
+        else:
+            print("\nℹ️ No new columns needed - schema already up to date")
         
-        # Show NMAP-related columns
-        nmap_columns = [col for col in final_columns if 'nmap' in col.lower() or 'detection' in col.lower()]
-        if nmap_columns:
-            print(f"🎯 NMAP/Detection columns: {', '.join(nmap_columns)}")
+        print(f"🎯 NMAP/Detection columns: {', '.join(name for name, _ in NMAP_COLUMNS)}")
         
         conn.close()
         
         print("\n✅ Database schema update completed successfully!")
         
-    except Exception as e:
+    except (sqlite3.Error, MigrationError) as e:
         print(f"❌ Database schema update failed: {e}")
         return False
     
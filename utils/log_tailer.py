@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+"""
+Log Tailer Module
+
+Event-driven tailing of growing log files. On Linux the tailer sleeps on
+inotify events for the log directories; elsewhere (or if inotify is not
+available) it falls back to polling. New bytes are read in large chunks,
+rotation and truncation are detected through (st_dev, st_ino) tracking and
+file size, and complete lines are handed to a callback in batches at most
+``max_batches_per_second`` times per second.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+# (source name, line) pairs delivered to the batch callback
+LogBatch = List[Tuple[str, str]]
+
+
+class _Inotify:
+    """Minimal ctypes binding for inotify directory watches (Linux only)"""
+
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_Q_OVERFLOW = 0x00004000
+
+    WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM |
+                  IN_MOVED_TO | IN_CREATE | IN_DELETE)
+    _EVENT_HEADER = struct.Struct("iIII")
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches: Dict[int, str] = {}
+
+    def add_directory(self, path: str) -> None:
+        wd = self._add_watch(self.fd, os.fsencode(path), self.WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+        self.watches[wd] = path
+
+    def read_events(self) -> Tuple[set, bool]:
+        """Return ({(directory, file name)}, overflowed) for pending events"""
+        touched, overflow = set(), False
+        while True:
+            try:
+                buf = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not buf:
+                break
+            offset = 0
+            while offset + self._EVENT_HEADER.size <= len(buf):
+                wd, mask, _cookie, length = self._EVENT_HEADER.unpack_from(buf, offset)
+                offset += self._EVENT_HEADER.size
+                name = buf[offset:offset + length].rstrip(b"\0")
+                offset += length
+                if mask & self.IN_Q_OVERFLOW:
+                    overflow = True
+                elif wd in self.watches and name:
+                    touched.add((self.watches[wd], os.fsdecode(name)))
+        return touched, overflow
+
+    def close(self) -> None:
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+
+
+class _TailState:
+    """Per-file read position, identity and incomplete trailing line"""
+
+    def __init__(self, name: str, path: str):
+        self.name = name
+        self.path = os.path.abspath(path)
+        self.directory = os.path.dirname(self.path)
+        self.basename = os.path.basename(self.path)
+        self.handle = None
+        self.identity: Optional[Tuple[int, int]] = None
+        self.partial = b""
+
+
+class LogTailer:
+    """
+    Tail several log files from one background thread and deliver new lines
+    in coalesced batches.
+    """
+
+    def __init__(self, files: Dict[str, str], on_batch: Callable[[LogBatch], None],
+                 max_batches_per_second: float = 4.0, read_chunk_size: int = 1024 * 1024,
+                 poll_interval: float = 0.25, backlog_bytes: int = 0,
+                 use_inotify: bool = True):
+        self.on_batch = on_batch
+        self.batch_interval = 1.0 / max(0.1, float(max_batches_per_second))
+        self.read_chunk_size = max(4096, int(read_chunk_size))
+        self.poll_interval = poll_interval
+        self.backlog_bytes = max(0, int(backlog_bytes))
+        self.states = [_TailState(name, path) for name, path in files.items()]
+
+        self._pending: LogBatch = []
+        self._next_flush = 0.0
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._wake_r, self._wake_w = os.pipe() if sys.platform != "win32" else (None, None)
+
+        self._inotify: Optional[_Inotify] = None
+        if use_inotify and sys.platform.startswith("linux"):
+            try:
+                self._inotify = _Inotify()
+                for directory in sorted({s.directory for s in self.states}):
+                    if os.path.isdir(directory):
+                        self._inotify.add_directory(directory)
+            except (OSError, AttributeError):
+                if self._inotify is not None:
+                    self._inotify.close()
+                self._inotify = None
+
+        self.stats = {"batches": 0, "lines": 0, "bytes": 0, "rotations": 0, "truncations": 0}
+
+    @property
+    def backend(self) -> str:
+        return "inotify" if self._inotify is not None else "polling"
+
+    # ----------------- Lifecycle -----------------
+
+    def start(self) -> None:
+        if self._running:
+            return
+        for state in self.states:
+            self._open(state, from_start=False)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="LogTailer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self._running = False
+        if self._wake_w is not None:
+            try:
+                os.write(self._wake_w, b"x")
+            except OSError:
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout)
+        # Deliver whatever is still buffered before shutting down
+        for state in self.states:
+            self._drain(state)
+            if state.handle is not None:
+                state.handle.close()
+                state.handle = None
+        self._flush(force=True)
+        if self._inotify is not None:
+            self._inotify.close()
+        for fd in (self._wake_r, self._wake_w):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self._wake_r = self._wake_w = None
+
+    # ----------------- Main loop -----------------
+
+    def _run(self) -> None:
+        last_sweep = time.monotonic()
+        while self._running:
+            timeout = self.poll_interval
+            if self._pending:
+                timeout = max(0.0, min(timeout, self._next_flush - time.monotonic()))
+
+            if self._inotify is not None:
+                readers = [self._inotify.fd] + ([self._wake_r] if self._wake_r is not None else [])
+                ready, _, _ = select.select(readers, [], [], timeout)
+                if self._inotify.fd in ready:
+                    touched, overflow = self._inotify.read_events()
+                    for state in self.states:
+                        if overflow or (state.directory, state.basename) in touched:
+                            self._drain(state)
+                # Cheap safety sweep in case an event was missed
+                if time.monotonic() - last_sweep >= 5.0:
+                    last_sweep = time.monotonic()
+                    for state in self.states:
+                        self._drain(state)
+            else:
+                if self._wake_r is not None:
+                    select.select([self._wake_r], [], [], timeout)
+                else:
+                    time.sleep(timeout)
+                for state in self.states:
+                    self._drain(state)
+
+            self._flush()
+
+    def _flush(self, force: bool = False) -> None:
+        if not self._pending:
+            return
+        now = time.monotonic()
+        if not force and now < self._next_flush:
+            return
+        batch, self._pending = self._pending, []
+        self._next_flush = now + self.batch_interval
+        self.stats["batches"] += 1
+        self.stats["lines"] += len(batch)
+        try:
+            self.on_batch(batch)
+        except Exception as e:
+            print(f"Log tailer callback error: {e}")
+
+    # ----------------- File handling -----------------
+
+    def _open(self, state: _TailState, from_start: bool) -> bool:
+        try:
+            handle = open(state.path, "rb")
+        except OSError:
+            state.handle, state.identity = None, None
+            return False
+        st = os.fstat(handle.fileno())
+        state.handle = handle
+        state.identity = (st.st_dev, st.st_ino)
+        state.partial = b""
+        if not from_start:
+            start = max(0, st.st_size - self.backlog_bytes)
+            handle.seek(start)
+            if start > 0 and self.backlog_bytes:
+                handle.readline()  # drop the cut-off first line
+        return True
+
+    def _drain(self, state: _TailState) -> None:
+        if state.handle is None and not self._open(state, from_start=True):
+            return
+        while True:
+            self._read_available(state)
+            try:
+                st = os.stat(state.path)
+            except OSError:
+                return  # rotated away and not recreated yet; keep the old handle
+            if (st.st_dev, st.st_ino) != state.identity:
+                # Rotation: old handle is drained, continue with the new file
+                self._emit_partial(state)
+                state.handle.close()
+                self.stats["rotations"] += 1
+                if not self._open(state, from_start=True):
+                    return
+                continue
+            if st.st_size < state.handle.tell():
+                # Truncation (copytruncate or manual clear): restart at zero
+                state.handle.seek(0)
+                state.partial = b""
+                self.stats["truncations"] += 1
+                continue
+            return
+
+    def _read_available(self, state: _TailState) -> None:
+        while True:
+            data = state.handle.read(self.read_chunk_size)
+            if not data:
+                return
+            self.stats["bytes"] += len(data)
+            lines = (state.partial + data).split(b"\n")
+            state.partial = lines.pop()
+            name = state.name
+            for raw in lines:
+                line = raw.rstrip(b"\r")
+                if line:
+                    self._pending.append((name, line.decode("utf-8", errors="replace")))
+
+    def _emit_partial(self, state: _TailState) -> None:
+        if state.partial.strip():
+            self._pending.append((state.name, state.partial.decode("utf-8", errors="replace")))
+        state.partial = b""
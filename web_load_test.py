@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+📊 WEB SERVICE LOAD TEST
+========================
+A dependency-free asyncio HTTP/1.1 keep-alive client that reports
+requests/sec and latency percentiles. Its compare mode starts the same
+service twice, on Flask's development server and on the production WSGI
+server (wsgi.py), and load-tests both.
+
+    python web_load_test.py run --url http://127.0.0.1:5556/ --concurrency 32 --duration 10
+    python web_load_test.py compare --app department --workers 4 --duration 10
+    python web_load_test.py templates --app department
+"""
+
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence
+from urllib.parse import urlsplit
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_PATHS = {
+    'department': ('/', '/departments', '/add-asset', '/monitor', '/api/departments'),
+    'intelligent': ('/', '/api/test', '/api/stats'),
+    'secure': ('/', '/api/status'),
+}
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+# ======================================================================
+# Client
+# ======================================================================
+
+async def _read_response(reader: asyncio.StreamReader):
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split()[1])
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        while True:
+            size = int((await reader.readuntil(b'\r\n')).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    else:
+        await reader.read()
+        headers['connection'] = 'close'
+    return status, headers.get('connection', '').lower() == 'close'
+
+
+async def _client(host: str, port: int, paths: Sequence[str], offset: int, deadline: float,
+                  latencies: List[float], statuses: Counter) -> None:
+    reader = writer = None
+    n = offset
+    while time.perf_counter() < deadline:
+        path = paths[n % len(paths)]
+        n += 1
+        started = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            writer.write(f'GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nUser-Agent: web_load_test\r\n'
+                         f'Accept: */*\r\nConnection: keep-alive\r\n\r\n'.encode('latin-1'))
+            await writer.drain()
+            status, close = await _read_response(reader)
+        except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError, IndexError):
+            statuses['error'] += 1
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+            await asyncio.sleep(0.01)
+            continue
+        latencies.append(time.perf_counter() - started)
+        statuses[status] += 1
+        if close:
+            writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def _load(host, port, paths, concurrency, duration) -> Dict[str, Any]:
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(_client(host, port, paths, i, deadline, latencies, statuses) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        'requests': len(latencies), 'errors': statuses.pop('error', 0),
+        'statuses': {str(k): v for k, v in sorted(statuses.items())},
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p90_ms': round(percentile(latencies, 0.90) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'max_ms': round((latencies[-1] if latencies else 0.0) * 1000, 2),
+    }
+
+
+def load_test(url: str, paths: Optional[Sequence[str]] = None, concurrency: int = 16,
+              duration: float = 10.0) -> Dict[str, Any]:
+    """Keep-alive GET load against url's host, cycling through paths (default: url's path)"""
+    parts = urlsplit(url)
+    host, port = parts.hostname or '127.0.0.1', parts.port or 80
+    paths = list(paths or [parts.path or '/'])
+    result = asyncio.run(_load(host, port, paths, concurrency, duration))
+    result.update({'url': url, 'paths': paths, 'concurrency': concurrency, 'duration_s': duration})
+    return result
+
+
+# ======================================================================
+# Dev server vs production server
+# ======================================================================
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _wait_for_port(port: int, process: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with {process.returncode}")
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError(f"server did not listen on {port} within {timeout}s")
+
+
+def _prepare_workdir(workdir: str) -> None:
+    from db.migrations import migrate
+
+    migrate(os.path.join(workdir, 'assets.db'))
+    # The access-control layer allows 60 requests/minute per endpoint, which a load test exceeds
+    # within a second; its config is read from the working directory
+    with open(os.path.join(workdir, 'access_control_enhanced.json'), 'w') as f:
+        json.dump({'settings': {'rate_limiting_enabled': False}}, f)
+
+
+def _start(app: str, port: int, workdir: str, extra: Sequence[str]) -> subprocess.Popen:
+    env = dict(os.environ, ASSETS_DB_PATH=os.path.join(workdir, 'assets.db'), PYTHONPATH=HERE)
+    env.pop('WEB_SERVICE_MODE', None)
+    return subprocess.Popen([sys.executable, os.path.join(HERE, 'wsgi.py'), '--app', app, '--host', '127.0.0.1',
+                             '--port', str(port), *extra], cwd=workdir, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def compare(app: str = 'department', paths: Optional[Sequence[str]] = None, concurrency: int = 16,
+            duration: float = 10.0, workers: Optional[int] = None, threads: Optional[int] = None,
+            server: Optional[str] = None) -> Dict[str, Any]:
+    """Same service, same load: Flask development server vs the production WSGI server"""
+    paths = list(paths or DEFAULT_PATHS[app])
+    production = ['--workers', str(workers)] if workers else []
+    if threads:
+        production += ['--threads', str(threads)]
+    if server:
+        production += ['--server', server]
+    results: Dict[str, Any] = {'app': app}
+    with tempfile.TemporaryDirectory() as workdir:
+        _prepare_workdir(workdir)
+        for label, extra in (('dev', ['--dev']), ('production', production)):
+            port = _free_port()
+            process = _start(app, port, workdir, extra)
+            try:
+                _wait_for_port(port, process)
+                load_test(f'http://127.0.0.1:{port}/', paths, concurrency, min(2.0, duration))  # warm-up
+                results[label] = load_test(f'http://127.0.0.1:{port}/', paths, concurrency, duration)
+            finally:
+                process.terminate()
+                try:
+                    process.wait(timeout=35)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+    if results['dev']['rps']:
+        results['speedup'] = round(results['production']['rps'] / results['dev']['rps'], 2)
+    return results
+
+
+def template_benchmark(app: str = 'department', repeat: int = 200) -> Dict[str, float]:
+    """Per-render cost of the inline pages: render_template_string vs the compiled cache"""
+    from flask import render_template_string
+
+    from wsgi_serving import render_inline
+
+    if app != 'department':
+        raise ValueError("only the department service renders inline templates per page")
+    from complete_department_web_service import CompleteDepartmentWebService
+
+    with tempfile.TemporaryDirectory() as workdir:
+        service = CompleteDepartmentWebService(os.path.join(workdir, 'assets.db'))
+        sources = [service.get_dashboard_template(), service.get_departments_template(),
+                   service.get_add_asset_template(), service.get_realtime_monitor_template()]
+        results = {}
+        with service.app.test_request_context('/'):
+            for label, render in (('render_template_string_ms', render_template_string), ('render_inline_ms', render_inline)):
+                render(sources[0])
+                started = time.perf_counter()
+                for n in range(repeat):
+                    render(sources[n % len(sources)])
+                results[label] = round((time.perf_counter() - started) * 1000 / repeat, 3)
+    return results
+
+
+def _print(result: Dict[str, Any], label: str) -> None:
+    print(f"   {label:<11} {result['rps']:>8.1f} req/s   p50 {result['p50_ms']:>7.2f} ms   "
+          f"p99 {result['p99_ms']:>8.2f} ms   max {result['max_ms']:>8.2f} ms   "
+          f"{result['requests']} ok / {result['errors']} errors {result['statuses']}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Load-test the asset web services")
+    sub = parser.add_subparsers(dest='command', required=True)
+    run = sub.add_parser('run', help="load-test a running server")
+    run.add_argument('--url', default='http://127.0.0.1:5556/')
+    run.add_argument('--path', action='append', dest='paths', help="repeatable; default: the URL's path")
+    cmp_parser = sub.add_parser('compare', help="development server vs production server")
+    cmp_parser.add_argument('--app', choices=sorted(DEFAULT_PATHS), default='department')
+    cmp_parser.add_argument('--path', action='append', dest='paths')
+    cmp_parser.add_argument('--workers', type=int, default=None)
+    cmp_parser.add_argument('--threads', type=int, default=None)
+    cmp_parser.add_argument('--server', choices=('gunicorn', 'waitress'), default=None)
+    for p in (run, cmp_parser):
+        p.add_argument('--concurrency', type=int, default=16)
+        p.add_argument('--duration', type=float, default=10.0)
+        p.add_argument('--json', action='store_true')
+    tpl = sub.add_parser('templates', help="inline template render cost, uncached vs compiled")
+    tpl.add_argument('--app', default='department')
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        outcome = load_test(args.url, args.paths, args.concurrency, args.duration)
+        if args.json:
+            print(json.dumps(outcome, indent=2))
+        else:
+            _print(outcome, 'server')
+    elif args.command == 'compare':
+        outcome = compare(args.app, args.paths, args.concurrency, args.duration, args.workers, args.threads,
+                          args.server)
+        if args.json:
+            print(json.dumps(outcome, indent=2))
+        else:
+            print(f"📊 {args.app}: {args.concurrency} connections x {args.duration:.0f}s")
+            _print(outcome['dev'], 'dev server')
+            _print(outcome['production'], 'production')
+            print(f"   🚀 {outcome.get('speedup', 0):.2f}x requests/sec")
+    else:
+        print(json.dumps(template_benchmark(args.app), indent=2))
@@ -125,10 +125,10 @@ class WebServiceManager:
             else:
                 self.acl = {
                     "users": {
-                        "PLACEHOLDER_ADMIN"  # SECURITY: Replace with secure credential: {
+                        "admin": {
                             "password_hash": "admin123",  # Should be hashed in production
                             "role": "administrator",
-                            "permissions": ["read", "write", "PLACEHOLDER_ADMIN"  # SECURITY: Replace with secure credential],
+                            "permissions": ["read", "write", "admin"],
                             "allowed_ips": ["*"],
                             "created": datetime.now().isoformat(),
                             "last_login": None,
@@ -518,7 +518,7 @@ class WebServiceManager:
                 }
                 
             if permissions is None:
-                permissions = ["read"] if role == "user" else ["read", "write", "PLACEHOLDER_ADMIN"  # SECURITY: Replace with secure credential]
+                permissions = ["read"] if role == "user" else ["read", "write", "admin"]
                 
             if allowed_ips is None:
                 allowed_ips = ["*"]
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+🌐 WSGI ENTRY POINT
+===================
+Import target for gunicorn / waitress; see wsgi_serving for the options.
+
+    gunicorn -w 4 -k gthread --threads 4 -b 0.0.0.0:5556 'wsgi:create_app("department")'
+    waitress-serve --port=5556 --threads=16 wsgi:application
+    python wsgi.py --app intelligent --port 5000 --workers 4
+
+`application` is built on first access from WEB_SERVICE_APP
+(department / intelligent / secure, default department) and ASSETS_DB_PATH.
+"""
+
+import os
+import sys
+
+from wsgi_serving import configure_production, run_app
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+APPS = ('department', 'intelligent', 'secure')
+DEFAULT_PORTS = {'department': 5556, 'intelligent': 5000, 'secure': 5556}
+
+
+def _department_app():
+    from complete_department_web_service import CompleteDepartmentWebService
+
+    service = CompleteDepartmentWebService(os.environ.get('ASSETS_DB_PATH', 'assets.db'))
+    sources = [service.get_dashboard_template(), service.get_departments_template(),
+               service.get_add_asset_template(), service.get_logs_template(), service.get_realtime_monitor_template()]
+    return service.app, sources
+
+
+def _intelligent_app():
+    web_service_dir = os.path.join(HERE, 'WebService')
+    if web_service_dir not in sys.path:
+        sys.path.insert(0, web_service_dir)
+    from intelligent_app import create_intelligent_service
+
+    return create_intelligent_service(), []
+
+
+def _secure_app():
+    import secure_web_service
+
+    if 'ASSETS_DB_PATH' in os.environ:
+        secure_web_service.DB_PATH = os.environ['ASSETS_DB_PATH']
+    # Its one inline page is compiled on first request
+    return secure_web_service.app, []
+
+
+def create_app(name=None):
+    """The named service's Flask app, configured for production serving"""
+    name = (name or os.environ.get('WEB_SERVICE_APP') or 'department').strip().lower()
+    factories = {'department': _department_app, 'intelligent': _intelligent_app, 'secure': _secure_app}
+    if name not in factories:
+        raise ValueError(f"unknown web service {name!r}; expected one of {', '.join(APPS)}")
+    app, sources = factories[name]()
+    return configure_production(app, sources=sources)
+
+
+def __getattr__(name):
+    # Lazy so importing wsgi (tests, tooling) does not build a service
+    if name == 'application':
+        app = create_app()
+        globals()['application'] = app
+        return app
+    raise AttributeError(name)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve an asset web service on a production WSGI server")
+    parser.add_argument('--app', choices=APPS, default=os.environ.get('WEB_SERVICE_APP', 'department'))
+    parser.add_argument('--host', default=os.environ.get('WEB_SERVICE_HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=None)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--threads', type=int, default=None)
+    parser.add_argument('--server', choices=('gunicorn', 'waitress'), default=None)
+    parser.add_argument('--dev', action='store_true', help="Flask development server (baseline)")
+    args = parser.parse_args()
+
+    port = args.port or int(os.environ.get('WEB_SERVICE_PORT', DEFAULT_PORTS[args.app]))
+    run_app(create_app(args.app), args.host, port, production=not args.dev, workers=args.workers,
+            threads=args.threads, server=args.server, spec=f'wsgi:create_app("{args.app}")')
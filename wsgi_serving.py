@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+🚀 PRODUCTION WSGI SERVING
+==========================
+Production mode for the Flask services (CompleteDepartmentWebService,
+WebService/intelligent_app and secure_web_service), which otherwise run on
+Flask's development server.
+
+- run_app() keeps the development server by default. With
+  WEB_SERVICE_MODE=production (or production=True) it serves through
+  gunicorn: N pre-forked workers, graceful reload on SIGHUP and worker
+  recycling. On Windows, or where gunicorn is missing, it uses waitress
+  with a thread pool instead.
+- Each gunicorn worker has its own metrics registry and response cache.
+  serve() gives the workers a shared METRICS_MULTIPROC_DIR, so /metrics and
+  /api/cache/stats report totals over all workers. Other workers' numbers
+  can be a few seconds old. An external gunicorn command line needs
+  METRICS_MULTIPROC_DIR exported (to an empty directory) for the same
+  result; without it each scrape sees one worker.
+- render_inline() replaces render_template_string(): each inline template
+  source is compiled once per app, not on every request.
+- configure_production() precompiles the file templates, turns off
+  template mtime checks, gives static files a Cache-Control max-age, and
+  adds an ETag to HTML pages so a revalidation that hits returns 304
+  without the body.
+
+wsgi.py is the import target for an external server:
+
+    gunicorn -w 4 -k gthread --threads 4 -b 0.0.0.0:5556 'wsgi:create_app("department")'
+    waitress-serve --port=5556 --threads=16 wsgi:application
+    python wsgi.py --app department --workers 4
+
+Environment: WEB_SERVICE_MODE, WEB_SERVICE_SERVER (gunicorn / waitress),
+WEB_SERVICE_WORKERS, WEB_SERVICE_THREADS, WEB_SERVICE_STATIC_MAX_AGE.
+"""
+
+import importlib
+import os
+import sys
+import threading
+from typing import Any, Dict, Optional, Sequence, Union
+
+try:
+    import waitress
+    WAITRESS_AVAILABLE = True
+except ImportError:
+    WAITRESS_AVAILABLE = False
+
+try:
+    import metrics_registry
+    METRICS_AVAILABLE = True
+except ImportError:
+    METRICS_AVAILABLE = False
+
+try:
+    from gunicorn.app.base import BaseApplication
+    GUNICORN_AVAILABLE = True
+except ImportError:
+    BaseApplication = object
+    GUNICORN_AVAILABLE = False
+
+DEFAULT_STATIC_MAX_AGE = 3600
+DEFAULT_THREADS = 4
+GRACEFUL_TIMEOUT = 30
+# Recycle a worker after this many requests (with jitter) to bound slow leaks
+MAX_REQUESTS = 5000
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def production_mode() -> bool:
+    return os.environ.get('WEB_SERVICE_MODE', '').strip().lower() in ('production', 'prod', 'wsgi')
+
+
+def default_workers() -> int:
+    return _env_int('WEB_SERVICE_WORKERS', (os.cpu_count() or 1) * 2 + 1)
+
+
+# ======================================================================
+# Templates
+# ======================================================================
+
+class InlineTemplates:
+    """Compiled Jinja templates keyed by their source text, one cache per app"""
+
+    def __init__(self, app):
+        self.app = app
+        self._templates: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self.compiled = 0
+
+    def get(self, source: str):
+        template = self._templates.get(source)
+        if template is None:
+            with self._lock:
+                template = self._templates.get(source)
+                if template is None:
+                    template = self.app.jinja_env.from_string(source)
+                    self._templates[source] = template
+                    self.compiled += 1
+        return template
+
+
+def inline_templates(app) -> InlineTemplates:
+    templates = app.extensions.get('inline_templates')
+    if templates is None:
+        templates = app.extensions.setdefault('inline_templates', InlineTemplates(app))
+    return templates
+
+
+def render_inline(source: str, **context) -> str:
+    """Drop-in for render_template_string that compiles each source once"""
+    from flask import current_app, render_template
+
+    # render_template accepts a Template object: same context processors and signals
+    return render_template(inline_templates(current_app).get(source), **context)
+
+
+def precompile(app, *sources: str) -> int:
+    """Compile inline sources and every file template now instead of on first request"""
+    templates = inline_templates(app)
+    for source in sources:
+        templates.get(source)
+    count = len(sources)
+    if app.jinja_env.loader is not None:
+        for name in app.jinja_env.list_templates(filter_func=lambda n: n.endswith(('.html', '.htm', '.j2'))):
+            app.jinja_env.get_template(name)
+            count += 1
+    return count
+
+
+# ======================================================================
+# Production app settings
+# ======================================================================
+
+def configure_production(app, static_max_age: Optional[int] = None, sources: Sequence[str] = ()):
+    """Template caching, static Cache-Control and HTML ETags; idempotent"""
+    from flask import request
+
+    if 'wsgi_serving' in app.extensions:
+        return app
+    if static_max_age is None:
+        static_max_age = _env_int('WEB_SERVICE_STATIC_MAX_AGE', DEFAULT_STATIC_MAX_AGE)
+    app.extensions['wsgi_serving'] = {'static_max_age': static_max_age}
+    app.config['TEMPLATES_AUTO_RELOAD'] = False
+    app.jinja_env.auto_reload = False
+    # send_file / the static route already answer If-None-Match / If-Modified-Since
+    app.config['SEND_FILE_MAX_AGE_DEFAULT'] = static_max_age
+
+    @app.after_request
+    def _cache_headers(response):
+        if request.method not in ('GET', 'HEAD') or response.status_code != 200 or response.is_streamed:
+            return response
+        if request.endpoint == 'static':
+            response.cache_control.public = True
+            response.cache_control.max_age = static_max_age
+        elif response.mimetype == 'text/html' and 'ETag' not in response.headers:
+            # Pages are rendered per request; let the browser revalidate instead of re-downloading
+            response.cache_control.no_cache = True
+            response.add_etag()
+            response.make_conditional(request)
+        return response
+
+    try:
+        precompile(app, *sources)
+    except Exception as e:  # a broken template must not stop the service; it fails on its own route
+        app.logger.warning(f"Template precompile skipped: {e}")
+    return app
+
+
+# ======================================================================
+# Servers
+# ======================================================================
+
+class _GunicornApplication(BaseApplication):
+    """gunicorn with the options passed in code; app is an object or an import spec"""
+
+    def __init__(self, app: Union[str, Any], options: Dict[str, Any]):
+        self.application = app
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            if key in self.cfg.settings and value is not None:
+                self.cfg.set(key, value)
+
+    def load(self):
+        if isinstance(self.application, str):
+            from gunicorn.util import import_app
+            # Imported in each worker, so SIGHUP picks up new code
+            return import_app(self.application)
+        return self.application
+
+
+def import_spec(spec: str):
+    """'module:attribute' or 'module:factory()'"""
+    module, _, attribute = spec.partition(':')
+    call = attribute.endswith('()')
+    target = getattr(importlib.import_module(module), (attribute[:-2] if call else attribute) or 'application')
+    return target() if call else target
+
+
+def pick_server(server: Optional[str] = None) -> str:
+    server = (server or os.environ.get('WEB_SERVICE_SERVER') or '').strip().lower()
+    if not server:
+        if GUNICORN_AVAILABLE and sys.platform != 'win32':
+            return 'gunicorn'
+        if WAITRESS_AVAILABLE:
+            return 'waitress'
+        raise RuntimeError("No production WSGI server installed: pip install waitress (or gunicorn on Linux)")
+    if server == 'gunicorn' and not GUNICORN_AVAILABLE:
+        raise RuntimeError("gunicorn is not installed")
+    if server == 'waitress' and not WAITRESS_AVAILABLE:
+        raise RuntimeError("waitress is not installed")
+    if server not in ('gunicorn', 'waitress'):
+        raise ValueError(f"unknown WSGI server: {server}")
+    return server
+
+
+def _post_fork(server, worker) -> None:
+    """gunicorn hook: start this worker's metrics snapshots, dropping counts inherited from the master"""
+    if METRICS_AVAILABLE:
+        metrics_registry.enable_multiprocess(reset=True)
+
+
+def gunicorn_options(host: str, port: int, workers: int, threads: int) -> Dict[str, Any]:
+    return {
+        'bind': f'{host}:{port}',
+        'workers': workers,
+        'threads': threads,
+        'worker_class': 'gthread' if threads > 1 else 'sync',
+        'graceful_timeout': GRACEFUL_TIMEOUT,
+        'timeout': 120,
+        'keepalive': 5,
+        'max_requests': MAX_REQUESTS,
+        'max_requests_jitter': MAX_REQUESTS // 10,
+        # With an import spec every worker builds its own app: no SQLite handle crosses a fork
+        'preload_app': False,
+        'post_fork': _post_fork,
+    }
+
+
+def serve(app: Union[str, Any], host: str = '0.0.0.0', port: int = 5556, workers: Optional[int] = None,
+          threads: Optional[int] = None, server: Optional[str] = None) -> None:
+    """Block serving app (a Flask app or a 'module:callable' spec) on a production server"""
+    server = pick_server(server)
+    workers = workers or default_workers()
+    threads = threads or _env_int('WEB_SERVICE_THREADS', DEFAULT_THREADS)
+    if server == 'gunicorn':
+        if METRICS_AVAILABLE:
+            # Exported before the fork: workers aggregate /metrics and cache stats through this directory
+            metrics_registry.prepare_multiprocess_directory()
+        _GunicornApplication(app, gunicorn_options(host, port, workers, threads)).run()
+        return
+
+    if isinstance(app, str):
+        app = import_spec(app)
+    # waitress is one process: the worker count becomes more request threads
+    waitress.serve(app, host=host, port=port, threads=workers * threads, channel_timeout=120,
+                   ident='assets-web')
+
+
+def run_app(app, host: str = '0.0.0.0', port: int = 5556, debug: bool = False, production: Optional[bool] = None,
+            workers: Optional[int] = None, threads: Optional[int] = None, server: Optional[str] = None,
+            spec: Optional[str] = None) -> None:
+    """The services' run(): development server unless production mode was asked for"""
+    if production is None:
+        production = production_mode()
+    if debug or not production:
+        app.run(host=host, port=port, debug=debug, threaded=True)
+        return
+    configure_production(app)
+    try:
+        server = pick_server(server)
+    except RuntimeError as e:
+        print(f"[WARNING] {e} - falling back to the development server")
+        app.run(host=host, port=port, debug=False, threaded=True)
+        return
+    print(f"[PRODUCTION] Serving on http://{host}:{port} with {server} "
+          f"({workers or default_workers()} workers x {threads or _env_int('WEB_SERVICE_THREADS', DEFAULT_THREADS)} threads)")
+    # gunicorn reloads from the import spec on SIGHUP; an in-memory app reloads workers, not code
+    serve(spec if spec and server == 'gunicorn' else app, host, port, workers, threads, server)